@@ -1062,10 +1062,9 @@ def _user_login_is_deactivated(user: User) -> bool:
 
 def _log_login_failure(db: Session, request: Request, reason: str, message: str) -> None:
     try:
-        from ..services.system_log import write_system_log
+        from ..services.system_log import enqueue_system_log
 
-        write_system_log(
-            db,
+        enqueue_system_log(
             "warning",
             "auth",
             message,
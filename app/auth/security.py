@@ -1,7 +1,7 @@
 import uuid
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Literal, Any
+from typing import Optional, List, Literal, Any, FrozenSet
 
 import jwt
 from fastapi import Depends, HTTPException, Query, status
@@ -1264,35 +1264,54 @@ def has_project_files_category_permission(
     - Uncategorized files use `None` category; we treat it as "uncategorized" when comparing.
     - If `project` is passed, business-line access is checked.
     """
+    return project_file_category_allowed(category_id, allowed_project_file_categories(user, action, project))
+
+
+def allowed_project_file_categories(
+    user: User,
+    action: Literal["read", "write"] = "read",
+    project: Optional[Any] = None,
+) -> Optional[FrozenSet[str]]:
+    """
+    Resolve the Project > Files category rules for a user once.
+
+    Returns None when every category is allowed, otherwise the lower-cased allowed category
+    names (empty when the user has no files access at all). Pair with
+    project_file_category_allowed() to check many files without re-reading permissions.
+    """
     if _user_is_admin(user):
-        return True
+        return None
     line = getattr(project, "business_line", None) if project is not None else None
     if project is not None and not can_access_business_line(user, line):
-        return False
+        return frozenset()
     if action not in ("read", "write"):
-        return False
+        return frozenset()
 
     if not _has_project_feature_permission(user, line, "files", action):
-        return False
+        return frozenset()
 
     perm_map = _get_user_permission_map(user)
     allow_list = _project_category_allow_list(perm_map, line, "files", action)
 
     # Missing config => allow all categories
     if not isinstance(allow_list, list):
-        return True
+        return None
 
-    cat = (category_id or "uncategorized").strip() or "uncategorized"
-    allowed = [str(x) for x in allow_list if isinstance(x, str)]
-    if cat in allowed:
-        return True
-    cat_l = cat.lower()
-    if cat_l in {a.lower() for a in allowed}:
-        return True
+    allowed = {x.lower() for x in allow_list if isinstance(x, str)}
     # Legacy slug overlap (Pictures vs photos)
-    if cat_l in {"pictures", "photos"} and any(a.lower() in {"pictures", "photos"} for a in allowed):
+    if allowed & {"pictures", "photos"}:
+        allowed |= {"pictures", "photos"}
+    return frozenset(allowed)
+
+
+def project_file_category_allowed(category_id: Optional[str], allowed: Optional[FrozenSet[str]]) -> bool:
+    """Check one file category against allowed_project_file_categories().
+
+    Uncategorized files use `None` category; we treat it as "uncategorized" when comparing."""
+    if allowed is None:
         return True
-    return False
+    cat = (category_id or "uncategorized").strip() or "uncategorized"
+    return cat.lower() in allowed
 
 
 def has_project_reports_category_permission(
@@ -1397,20 +1416,8 @@ def can_approve_timesheet(approver: User, target_user_id: str, db: Session) -> b
         return True
     # Supervisor chain path
     try:
-        import uuid as _uuid
-        from ..models.models import EmployeeProfile
-        target = db.query(EmployeeProfile).filter(EmployeeProfile.user_id == _uuid.UUID(str(target_user_id))).first()
-        visited = set()
-        depth = 0
-        while target and getattr(target, 'manager_user_id', None) and depth < 8:
-            mgr_id = str(getattr(target, 'manager_user_id'))
-            if not mgr_id or mgr_id in visited:
-                break
-            if str(approver.id) == mgr_id:
-                return True
-            visited.add(mgr_id)
-            depth += 1
-            target = db.query(EmployeeProfile).filter(EmployeeProfile.user_id == _uuid.UUID(mgr_id)).first()
+        from ..services.hierarchy import is_in_chain
+
+        return is_in_chain(str(approver.id), str(target_user_id), db)
     except Exception:
-        return False
-    return False
\ No newline at end of file
+        return False
\ No newline at end of file
@@ -1,22 +1,53 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
 from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str, pool_size: int, max_overflow: int):
+    return create_engine(
+        url,
+        future=True,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=3600,  # Recycle connections after 1 hour
+        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {}
+    )
+
 
 # Configure connection pool for better performance and burst traffic (e.g. many thumbnails/downloads, post-deploy spikes)
-engine = create_engine(
-    settings.database_url,
-    future=True,
-    pool_pre_ping=True,
-    pool_size=15,
-    max_overflow=35,
-    pool_recycle=3600,  # Recycle connections after 1 hour
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
+engine = _create_engine(settings.database_url, pool_size=15, max_overflow=35)
+
+# Long analytic reads (dashboards, insights, audit timelines, exports) get their own pool on the
+# replica so they do not compete with clock-in writes and uploads for primary connections.
+read_engine = (
+    _create_engine(settings.database_read_url, settings.read_pool_size, settings.read_max_overflow)
+    if settings.database_read_url
+    else None
 )
 
 # IMPORTANT: do not use scoped_session with async frameworks; create a fresh Session per request
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# Read sessions are flagged read_only; flushing one raises (see _reject_read_only_flush).
+ReadSessionLocal = (
+    sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True, info={"read_only": True})
+    if read_engine is not None
+    else None
+)
+# Fallback when there is no replica or it is lagging: same guard, primary connection.
+PrimaryReadSessionLocal = sessionmaker(
+    bind=engine, autoflush=False, autocommit=False, future=True, info={"read_only": True}
+)
+
 Base = declarative_base()
 
 
@@ -27,3 +58,105 @@ def get_db():
     finally:
         db.close()
 
+
+@event.listens_for(Session, "before_flush")
+def _reject_read_only_flush(session, flush_context, instances):
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise RuntimeError("Attempted to write through a read-only session (use get_db for writes)")
+
+
+# ---------------------------------------------------------------------------
+# Replica health: lag is checked at most every read_replica_check_interval_seconds
+# ---------------------------------------------------------------------------
+
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+_replica_lock = threading.Lock()
+_replica_state: Dict[str, Any] = {"checked_at": None, "healthy": False, "lag_seconds": None, "error": None}
+
+
+def replica_lag_seconds(conn) -> float:
+    """Replay lag of the server behind ``conn``; non-Postgres replicas (local SQLite) report 0."""
+    if conn.dialect.name != "postgresql":
+        return 0.0
+    return float(conn.execute(_REPLICA_LAG_SQL).scalar() or 0.0)
+
+
+def _check_replica() -> None:
+    try:
+        with read_engine.connect() as conn:
+            lag = replica_lag_seconds(conn)
+        healthy = lag <= settings.read_replica_max_lag_seconds
+        if not healthy and _replica_state["healthy"]:
+            logger.warning("read replica lag %.1fs exceeds limit; reading from primary", lag)
+        _replica_state.update(healthy=healthy, lag_seconds=lag, error=None)
+    except Exception as e:
+        if _replica_state["healthy"]:
+            logger.warning("read replica check failed; reading from primary: %s", e)
+        _replica_state.update(healthy=False, lag_seconds=None, error=str(e))
+    _replica_state["checked_at"] = time.monotonic()
+
+
+def replica_available() -> bool:
+    """True when a replica is configured and was within the lag limit at the last check."""
+    if read_engine is None:
+        return False
+    checked_at = _replica_state["checked_at"]
+    if checked_at is not None and time.monotonic() - checked_at < settings.read_replica_check_interval_seconds:
+        return _replica_state["healthy"]
+    # One request re-checks; concurrent ones use the previous answer instead of queueing behind it.
+    if _replica_lock.acquire(blocking=checked_at is None):
+        try:
+            _check_replica()
+        finally:
+            _replica_lock.release()
+    return _replica_state["healthy"]
+
+
+def read_session() -> Session:
+    """Read-only session on the replica when it is healthy, otherwise on the primary."""
+    if ReadSessionLocal is not None and replica_available():
+        return ReadSessionLocal()
+    return PrimaryReadSessionLocal()
+
+
+def get_read_db():
+    """Dependency for read-only endpoints; see read_session()."""
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _pool_stats(eng) -> Dict[str, Any]:
+    pool = eng.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            stats[name] = fn()
+    return stats
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool usage per engine, plus the last replica health check."""
+    out: Dict[str, Any] = {"primary": _pool_stats(engine), "replica": None}
+    if read_engine is not None:
+        replica: Dict[str, Any] = _pool_stats(read_engine)
+        checked_at: Optional[float] = _replica_state["checked_at"]
+        replica.update(
+            healthy=_replica_state["healthy"],
+            lag_seconds=_replica_state["lag_seconds"],
+            error=_replica_state["error"],
+            checked_seconds_ago=None if checked_at is None else round(time.monotonic() - checked_at, 1),
+            max_lag_seconds=settings.read_replica_max_lag_seconds,
+        )
+        out["replica"] = replica
+    return out
@@ -9,22 +9,21 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.utils import simpleSplit
+from reportlab.lib.utils import ImageReader, simpleSplit
 from reportlab.platypus import Paragraph
 from reportlab.pdfgen import canvas
 from xml.sax.saxutils import escape
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.pdfmetrics import getAscentDescent
-from reportlab.pdfbase.ttfonts import TTFont
 from sqlalchemy.orm import Session
 import httpx
 
 from ..models.models import DocumentTemplate, UserDocument, FileObject
-from ..config import settings
 from ..storage.provider import StorageProvider
 from ..storage.local_provider import LocalStorageProvider
-from ..storage.blob_provider import BlobStorageProvider
+from ..storage.registry import get_provider_for
 from ..proposals.pdf_image_optimizer import pil_image_to_raster_bytes_for_document_pdf
+from ..proposals.pdf_resources import cached_image_reader, register_fonts
 
 
 # In the editor, fontSize is stored in reference CSS px and preview scales it by
@@ -80,73 +79,39 @@ def _font_line_height_pt(font_name: str, font_size_pt: float) -> float:
     return max(font_size_pt * 1.33, content_h * 1.12, font_size_pt * CSS_NORMAL_LINE_HEIGHT)
 
 
-# Register document editor fonts. Returns dict: family -> (regular, bold, italic, bold_italic)
+# Document editor font families: family -> (regular, bold, italic, bold_italic) ReportLab names.
+_FONT_FAMILIES = {
+    "Montserrat": ("Montserrat", "Montserrat-Bold", "Montserrat-Italic", "Montserrat-BoldItalic"),
+    "Open Sans": ("OpenSans", "OpenSans-Bold", "OpenSans-Italic", "OpenSans-BoldItalic"),
+}
+_HELVETICA = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique")
+
+
 def _register_fonts():
-    import os
+    """Resolve each family against the shared font registry; missing variants fall back within the family."""
     result = {}
-    fonts_path = os.path.join(os.path.dirname(__file__), "..", "proposals", "assets", "fonts")
-
-    def _try_register(name: str, path: str) -> bool:
+    for family, (reg, bold, italic, bolditalic) in _FONT_FAMILIES.items():
+        ok = register_fonts((reg, bold, italic, bolditalic))
+        if not ok[reg]:
+            result[family] = _HELVETICA
+            continue
+        result[family] = (
+            reg,
+            bold if ok[bold] else reg,
+            italic if ok[italic] else reg,
+            bolditalic if ok[bolditalic] else (bold if ok[bold] else reg),
+        )
+        # Register family aliases for ReportLab (optional; helps some APIs).
         try:
-            if os.path.exists(path):
-                pdfmetrics.registerFont(TTFont(name, path))
-                return True
+            pdfmetrics.registerFontFamily(
+                family.replace(" ", ""),
+                normal=result[family][0],
+                bold=result[family][1],
+                italic=result[family][2],
+                boldItalic=result[family][3],
+            )
         except Exception:
             pass
-        return False
-
-    # Montserrat
-    try:
-        reg_ok = _try_register("Montserrat", os.path.join(fonts_path, "Montserrat-Regular.ttf"))
-        bold_ok = _try_register("Montserrat-Bold", os.path.join(fonts_path, "Montserrat-Bold.ttf"))
-        italic_ok = _try_register("Montserrat-Italic", os.path.join(fonts_path, "Montserrat-Italic.ttf"))
-        bolditalic_ok = _try_register("Montserrat-BoldItalic", os.path.join(fonts_path, "Montserrat-BoldItalic.ttf"))
-        if reg_ok:
-            result["Montserrat"] = (
-                "Montserrat",
-                "Montserrat-Bold" if bold_ok else "Montserrat",
-                "Montserrat-Italic" if italic_ok else "Montserrat",
-                "Montserrat-BoldItalic" if bolditalic_ok else ("Montserrat-Bold" if bold_ok else "Montserrat"),
-            )
-    except Exception:
-        pass
-
-    # Open Sans
-    try:
-        reg_ok = _try_register("OpenSans", os.path.join(fonts_path, "OpenSans-Regular.ttf"))
-        bold_ok = _try_register("OpenSans-Bold", os.path.join(fonts_path, "OpenSans-Bold.ttf"))
-        italic_ok = _try_register("OpenSans-Italic", os.path.join(fonts_path, "OpenSans-Italic.ttf"))
-        bolditalic_ok = _try_register("OpenSans-BoldItalic", os.path.join(fonts_path, "OpenSans-BoldItalic.ttf"))
-        if reg_ok:
-            result["Open Sans"] = (
-                "OpenSans",
-                "OpenSans-Bold" if bold_ok else "OpenSans",
-                "OpenSans-Italic" if italic_ok else "OpenSans",
-                "OpenSans-BoldItalic" if bolditalic_ok else ("OpenSans-Bold" if bold_ok else "OpenSans"),
-            )
-        else:
-            result["Open Sans"] = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique")
-    except Exception:
-        result["Open Sans"] = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique")
-
-    if "Montserrat" not in result:
-        result["Montserrat"] = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique")
-
-    # Register family aliases for ReportLab (optional; helps some APIs).
-    try:
-        for family, entry in result.items():
-            reg, bold, italic, bolditalic = (entry + (entry[0],))[:4]
-            if reg in pdfmetrics.getRegisteredFontNames():
-                pdfmetrics.registerFontFamily(
-                    family.replace(" ", ""),
-                    normal=reg,
-                    bold=bold,
-                    italic=italic,
-                    boldItalic=bolditalic,
-                )
-    except Exception:
-        pass
-
     return result
 
 
@@ -1063,12 +1028,7 @@ def _parse_object_position(pos: Optional[str]) -> tuple[float, float]:
 
 
 def _get_storage_for_file(fo: FileObject) -> StorageProvider:
-    if getattr(fo, "provider", None) == "blob" and settings.azure_blob_connection and settings.azure_blob_container:
-        try:
-            return BlobStorageProvider()
-        except Exception:
-            pass
-    return LocalStorageProvider()
+    return get_provider_for(getattr(fo, "provider", None))
 
 
 def _read_file_bytes(db: Session, file_id: uuid.UUID) -> Optional[bytes]:
@@ -1094,6 +1054,28 @@ def _read_file_bytes(db: Session, file_id: uuid.UUID) -> Optional[bytes]:
         return None
 
 
+def _template_background_reader(
+    db: Session, file_id: uuid.UUID, width_pt: float, height_pt: float
+) -> Optional[ImageReader]:
+    """
+    Full-page template background, rasterized for the page size once per process and
+    shared by every page and document using the same background file.
+    """
+
+    def load() -> Optional[bytes]:
+        img_bytes = _read_file_bytes(db, file_id)
+        if not img_bytes:
+            return None
+        from PIL import Image as PILImage
+
+        raster_bytes, _ = pil_image_to_raster_bytes_for_document_pdf(
+            PILImage.open(io.BytesIO(img_bytes)), width_pt, height_pt
+        )
+        return raster_bytes
+
+    return cached_image_reader(f"document-template-bg:{file_id}:{width_pt:.0f}x{height_pt:.0f}", load)
+
+
 def build_pdf_bytes(db: Session, doc: UserDocument, canvas_width_px: Optional[float] = None) -> bytes:
     """Generate PDF bytes for the given UserDocument."""
     fonts_map = _get_fonts_map()
@@ -1131,16 +1113,12 @@ def build_pdf_bytes(db: Session, doc: UserDocument, canvas_width_px: Optional[fl
 
             # Draw background
             if template and template.background_file_id:
-                img_bytes = _read_file_bytes(db, template.background_file_id)
-                if img_bytes:
-                    try:
-                        from PIL import Image as PILImage
-                        pil_im = PILImage.open(io.BytesIO(img_bytes))
-                        _draw_raster_image_on_canvas(
-                            c, pil_im, page_width, page_height, 0, 0, page_width, page_height
-                        )
-                    except Exception:
-                        pass
+                try:
+                    bg = _template_background_reader(db, template.background_file_id, page_width, page_height)
+                    if bg is not None:
+                        c.drawImage(bg, 0, 0, width=page_width, height=page_height, mask="auto")
+                except Exception:
+                    pass
 
             # Draw elements (Canva-style: text, image) or legacy areas
             elements = page_data.get("elements") if isinstance(page_data, dict) else []
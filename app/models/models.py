@@ -23,9 +23,12 @@ from sqlalchemy import (
     text,
 )
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import event, func, inspect, literal, select, update
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from ..db import Base
+from ..utils.geohash import geohash_or_none
+from ..utils.proposal_totals import proposal_value
 
 
 def uuid_pk() -> Mapped[uuid.UUID]:
@@ -190,6 +193,7 @@ class Project(Base):
     address_country: Mapped[Optional[str]] = mapped_column(String(100))
     lat: Mapped[Optional[float]] = mapped_column(Numeric(10, 7))  # Latitude for geofence
     lng: Mapped[Optional[float]] = mapped_column(Numeric(10, 7))  # Longitude for geofence
+    geohash: Mapped[Optional[str]] = mapped_column(String(12))  # Map grid index, kept in sync with lat/lng (partial index: migration 0026)
     geocoded_address: Mapped[Optional[str]] = mapped_column(String(500))
     geocoding_status: Mapped[Optional[str]] = mapped_column(String(20))  # pending|success|failed|manual
     geocoded_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
@@ -253,6 +257,29 @@ class Project(Base):
     deleted_by_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
 
 
+@event.listens_for(Project, "before_insert")
+@event.listens_for(Project, "before_update")
+def _sync_project_geohash(mapper, connection, target: Project) -> None:
+    target.geohash = geohash_or_none(target.lat, target.lng)
+
+
+class GeocodeCache(Base):
+    """Geocoder answers keyed by normalized address, shared by every project at that address."""
+
+    __tablename__ = "geocode_cache"
+
+    address_key: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 of the normalized address
+    address: Mapped[str] = mapped_column(String(1000), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)  # ok|not_found
+    lat: Mapped[Optional[float]] = mapped_column(Numeric(10, 7))
+    lng: Mapped[Optional[float]] = mapped_column(Numeric(10, 7))
+    formatted_address: Mapped[Optional[str]] = mapped_column(String(500))
+    error: Mapped[Optional[str]] = mapped_column(String(500))
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+
 class ProjectMember(Base):
     __tablename__ = "project_members"
     __table_args__ = (
@@ -880,6 +907,43 @@ class ClientFolder(Base):
     # If is_public is true or permissions is null/empty, all users can access
     # If is_public is false, only users in allowed_user_ids or with divisions in allowed_divisions can access
     access_permissions: Mapped[Optional[dict]] = mapped_column(JSON)
+    # Materialized path "/<root id>/.../<own id>/", kept in sync with parent_id by the mapper events below;
+    # a subtree is "path LIKE '<folder path>%'".
+    path: Mapped[Optional[str]] = mapped_column(Text)
+
+
+def _client_folder_path(connection, target: "ClientFolder") -> Optional[str]:
+    if target.id is None:
+        target.id = uuid.uuid4()
+    if not target.parent_id:
+        return f"/{target.id}/"
+    parent_path = connection.execute(
+        select(ClientFolder.path).where(ClientFolder.id == target.parent_id)
+    ).scalar()
+    if not parent_path or f"/{target.id}/" in parent_path:
+        # Parent not backfilled yet, or a move under its own subtree: leave it for the backfill.
+        return None
+    return f"{parent_path}{target.id}/"
+
+
+@event.listens_for(ClientFolder, "before_insert")
+def _set_client_folder_path(mapper, connection, target: ClientFolder) -> None:
+    target.path = _client_folder_path(connection, target)
+
+
+@event.listens_for(ClientFolder, "before_update")
+def _move_client_folder_path(mapper, connection, target: ClientFolder) -> None:
+    if not inspect(target).attrs.parent_id.history.has_changes():
+        return
+    old_path, new_path = target.path, _client_folder_path(connection, target)
+    target.path = new_path
+    if old_path and new_path and old_path != new_path:
+        # Re-root every descendant in the same statement as the move.
+        connection.execute(
+            update(ClientFolder.__table__)
+            .where(ClientFolder.path.like(f"{old_path}%"), ClientFolder.id != target.id)
+            .values(path=literal(new_path) + func.substr(ClientFolder.path, len(old_path) + 1))
+        )
 
 
 class ProjectFolder(Base):
@@ -1074,6 +1138,8 @@ class Proposal(Base):
     order_number: Mapped[Optional[str]] = mapped_column(String(20))
     title: Mapped[Optional[str]] = mapped_column(String(255))
     data: Mapped[Optional[dict]] = mapped_column(JSON)
+    # proposal_value(data), kept current on save (see _sync_proposal_grand_total); NULL = not backfilled yet
+    grand_total: Mapped[Optional[float]] = mapped_column(Float)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     # Change Order fields
     is_change_order: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -1086,6 +1152,12 @@ class Proposal(Base):
     deleted_by_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
 
 
+@event.listens_for(Proposal, "before_insert")
+@event.listens_for(Proposal, "before_update")
+def _sync_proposal_grand_total(mapper, connection, target: Proposal) -> None:
+    target.grand_total = proposal_value(target.data)
+
+
 class Quote(Base):
     __tablename__ = "quotes"
 
@@ -1123,6 +1195,8 @@ class ReviewCycle(Base):
     director_1on1_schedule: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     # Admin: meeting length + availability windows; slots are derived as non-overlapping segments of duration_minutes.
     director_1on1_slot_config: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Last full rebuild of review_cycle_progress (participant scope re-evaluated); null = never built.
+    progress_built_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
 
 class ReviewAssignment(Base):
@@ -1140,6 +1214,39 @@ class ReviewAssignment(Base):
     form_definition_snapshot: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
 
+class ReviewCycleProgress(Base):
+    """Materialized per-reviewee status of a cycle (assignments + director 1:1), see services/review_progress."""
+
+    __tablename__ = "review_cycle_progress"
+
+    cycle_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("review_cycles.id", ondelete="CASCADE"), primary_key=True
+    )
+    reviewee_user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    in_scope: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    self_assignment_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True))
+    self_status: Mapped[Optional[str]] = mapped_column(String(50))
+    self_due_date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    supervisor_assignment_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True))
+    supervisor_user_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True))
+    supervisor_status: Mapped[Optional[str]] = mapped_column(String(50))
+    supervisor_due_date: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    employee_self_done: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    supervisor_done: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    both_done: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Director 1:1 entry as stored in review_cycles.director_1on1_schedule (ISO strings kept verbatim)
+    meeting_scheduled_at: Mapped[Optional[str]] = mapped_column(String(64))
+    meeting_scheduled_until: Mapped[Optional[str]] = mapped_column(String(64))
+    meeting_notes: Mapped[Optional[str]] = mapped_column(Text)
+    meeting_hr_pending_reschedule_at: Mapped[Optional[str]] = mapped_column(String(64))
+    meeting_hr_pending_reschedule_message: Mapped[Optional[str]] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_review_cycle_progress_reviewee", "reviewee_user_id", "cycle_id"),)
+
+
 class ReviewAnswer(Base):
     __tablename__ = "review_answers"
 
@@ -2247,6 +2354,11 @@ class TaskItem(Base):
 
     request = relationship("TaskRequest", back_populates="task")
 
+    __table_args__ = (
+        # Keyset order for the /tasks/changes delta feed.
+        Index("idx_tasks_v2_updated_at_id", "updated_at", "id"),
+    )
+
 
 class TaskLogEntry(Base):
     """
@@ -2349,10 +2461,12 @@ class Attendance(Base):
 
     id: Mapped[uuid.UUID] = uuid_pk()
     shift_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), ForeignKey("shifts.id", ondelete="CASCADE"), nullable=True, index=True)  # Optional for direct attendance (non-scheduled)
-    worker_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # active_history on worker / clock times: edits keep the previous value so the daily rollup
+    # (services/attendance_rollup) can also refresh the day an entry moved away from.
+    worker_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True, active_history=True)
     
     # Clock-in fields
-    clock_in_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # Selected clock-in time (after rounding)
+    clock_in_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, active_history=True)  # Selected clock-in time (after rounding)
     clock_in_entered_utc: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # When clock-in record was created
     clock_in_gps_lat: Mapped[Optional[float]] = mapped_column(Numeric(10, 7), nullable=True)  # GPS latitude for clock-in
     clock_in_gps_lng: Mapped[Optional[float]] = mapped_column(Numeric(10, 7), nullable=True)  # GPS longitude for clock-in
@@ -2360,7 +2474,7 @@ class Attendance(Base):
     clock_in_mocked_flag: Mapped[bool] = mapped_column(Boolean, default=False)  # Flag if GPS was mocked for clock-in
     
     # Clock-out fields
-    clock_out_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # Selected clock-out time (after rounding)
+    clock_out_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, active_history=True)  # Selected clock-out time (after rounding)
     clock_out_entered_utc: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)  # When clock-out record was created
     clock_out_gps_lat: Mapped[Optional[float]] = mapped_column(Numeric(10, 7), nullable=True)  # GPS latitude for clock-out
     clock_out_gps_lng: Mapped[Optional[float]] = mapped_column(Numeric(10, 7), nullable=True)  # GPS longitude for clock-out
@@ -2396,6 +2510,46 @@ class Attendance(Base):
         Index('idx_attendance_worker_clock_out', 'worker_id', 'clock_out_time'),
         Index('idx_attendance_shift', 'shift_id'),
         Index('idx_attendance_status', 'status'),
+        Index('idx_attendance_status_clock_in', 'status', 'clock_in_time'),
+    )
+
+
+# Attendance ledger order (services/attendance_ledger.EFFECTIVE_TS, id), newest first.
+Index(
+    'idx_attendance_effective_ts',
+    func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time, Attendance.created_at).desc(),
+    Attendance.id.desc(),
+)
+
+
+class AttendanceDailyRollup(Base):
+    """Per worker / local day / project attendance totals, see services/attendance_rollup."""
+
+    __tablename__ = "attendance_daily_rollup"
+
+    worker_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    work_date: Mapped[date] = mapped_column(Date, primary_key=True)  # local date (settings.tz_default)
+    # str(shift project id) | "job_<type>" (direct attendance) | "" (neither)
+    project_key: Mapped[str] = mapped_column(String(80), primary_key=True, default="")
+    project_id: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    job_type: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    entries: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    open_entries: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # clock-in without clock-out
+    gross_minutes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    break_minutes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # stored breaks only
+    minutes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # net (gross - stored break per entry)
+    # Closed 5h+ entries without a stored break: the timesheet default break is applied on read.
+    default_break_entries: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    pending_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    approved_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rejected_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_attendance_daily_rollup_date", "work_date", "worker_id"),
+        Index("ix_attendance_daily_rollup_project", "project_id", "work_date", "worker_id"),
     )
 
 
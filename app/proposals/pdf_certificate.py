@@ -3,9 +3,7 @@ Training certificate PDF — landscape Letter, Mack Kirk–style layout.
 Supports full-page background image, logo top-left, editable headings/body,
 colored placeholders, instructor + employee signature script lines.
 """
-import os
 import re
-import qrcode
 from html import escape
 from io import BytesIO
 from datetime import datetime
@@ -17,12 +15,8 @@ from reportlab.lib import colors
 from reportlab.lib.units import inch
 from reportlab.lib.utils import ImageReader
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from PIL import Image as PILImage
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-fonts_path = os.path.join(BASE_DIR, "assets", "fonts")
+from .pdf_resources import font_name, image_reader_for_bytes, qr_code_png
 
 BRAND = colors.HexColor("#7f1010")
 BODY_GREY = colors.HexColor("#2d2d2d")
@@ -48,54 +42,20 @@ DEFAULT_CERT_LAYOUT: Dict[str, float] = {
     "signatureSideInset": 66.0,
 }
 
-# Register fonts
-_SCRIPT_REGISTERED = False
-try:
-    _pacifico = os.path.join(fonts_path, "Pacifico-Regular.ttf")
-    if os.path.isfile(_pacifico):
-        pdfmetrics.registerFont(TTFont("CertScript", _pacifico))
-        _SCRIPT_REGISTERED = True
-except Exception:
-    pass
-
-try:
-    _mreg = os.path.join(fonts_path, "Montserrat-Regular.ttf")
-    _mbold = os.path.join(fonts_path, "Montserrat-Bold.ttf")
-    if os.path.isfile(_mreg):
-        pdfmetrics.registerFont(TTFont("Montserrat", _mreg))
-    if os.path.isfile(_mbold):
-        pdfmetrics.registerFont(TTFont("Montserrat-Bold", _mbold))
-except Exception:
-    pass
-
-
 def _font_regular() -> str:
-    return "Montserrat" if "Montserrat" in pdfmetrics.getRegisteredFontNames() else "Helvetica"
+    return font_name("Montserrat", "Helvetica")
 
 
 def _font_bold() -> str:
-    return "Montserrat-Bold" if "Montserrat-Bold" in pdfmetrics.getRegisteredFontNames() else "Helvetica-Bold"
+    return font_name("Montserrat-Bold", "Helvetica-Bold")
 
 
 def _font_script() -> str:
-    return "CertScript" if _SCRIPT_REGISTERED and "CertScript" in pdfmetrics.getRegisteredFontNames() else "Helvetica-Oblique"
+    return font_name("CertScript", "Helvetica-Oblique")
 
 
 def generate_qr_code_image(data: str, size: int = 200) -> BytesIO:
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    img = img.resize((size, size), PILImage.Resampling.LANCZOS)
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    return buffer
+    return BytesIO(qr_code_png(data, size))
 
 
 def _make_page_callback(
@@ -221,14 +181,14 @@ def create_certificate_pdf(
     bg_reader: Optional[ImageReader] = None
     if background_image_bytes:
         try:
-            bg_reader = ImageReader(BytesIO(background_image_bytes))
+            bg_reader = image_reader_for_bytes(background_image_bytes)
         except Exception:
             bg_reader = None
 
     logo_reader: Optional[ImageReader] = None
     if logo_image_bytes:
         try:
-            logo_reader = ImageReader(BytesIO(logo_image_bytes))
+            logo_reader = image_reader_for_bytes(logo_image_bytes)
         except Exception:
             logo_reader = None
 
@@ -1,13 +1,11 @@
 import os
 import uuid
-import hashlib
 from datetime import datetime
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import (
     BaseDocTemplate, Paragraph, Spacer, Frame, PageTemplate, PageBreak, Flowable, KeepTogether,
     Table, TableStyle, Image, CondPageBreak, NextPageTemplate
 )
-from reportlab.lib.utils import ImageReader
 from PIL import Image as PILImage
 try:
     from pillow_heif import register_heif_opener  # HEIC/HEIF support
@@ -16,10 +14,9 @@ except Exception:
     pass
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase.pdfmetrics import stringWidth
 from .pdf_image_optimizer import optimize_image_bytes
+from .pdf_resources import background_reader, register_fonts
 from .pdf_fixed import HEADER_TITLE_MAX_WIDTH, HEADER_TITLE_BASE_SIZE, HEADER_TITLE_MIN_SIZE
 
 
@@ -31,56 +28,7 @@ SECTION_IMAGE_PDF_LANDSCAPE_W = round(1024 * _CROP_TO_PDF_SCALE)
 SECTION_IMAGE_PDF_LANDSCAPE_H = round(591 * _CROP_TO_PDF_SCALE)
 SECTION_IMAGE_PDF_PORTRAIT_W = round(_PORTRAIT_CROP_W * _CROP_TO_PDF_SCALE)
 SECTION_IMAGE_PDF_PORTRAIT_H = round(_PORTRAIT_CROP_H * _CROP_TO_PDF_SCALE)
-fonts_path = os.path.join(BASE_DIR, "assets", "fonts")
-pdfmetrics.registerFont(TTFont("Montserrat", os.path.join(fonts_path, "Montserrat-Regular.ttf")))
-pdfmetrics.registerFont(TTFont("Montserrat-Bold", os.path.join(fonts_path, "Montserrat-Bold.ttf")))
-
-_bg_reader_cache: dict[str, ImageReader] = {}
-_bg_jpg_path_cache: dict[str, str] = {}
-_BG_CACHE_DIR = os.path.join("var", "uploads", "pdf_template_cache")
-
-
-def _png_to_cached_jpg_path(png_path: str) -> str:
-    os.makedirs(_BG_CACHE_DIR, exist_ok=True)
-    abs_path = os.path.abspath(png_path)
-    key = hashlib.md5(abs_path.encode("utf-8")).hexdigest()
-    jpg_name = f"{os.path.splitext(os.path.basename(png_path))[0]}_{key}.jpg"
-    return os.path.join(_BG_CACHE_DIR, jpg_name)
-
-
-def _get_cached_bg_reader(png_path: str) -> ImageReader:
-    cached = _bg_reader_cache.get(png_path)
-    if cached is not None:
-        return cached
-
-    try:
-        jpg_path = _bg_jpg_path_cache.get(png_path)
-        if not jpg_path:
-            jpg_path = _png_to_cached_jpg_path(png_path)
-            _bg_jpg_path_cache[png_path] = jpg_path
-
-        if not os.path.exists(jpg_path):
-            with PILImage.open(png_path) as im:
-                if im.mode in ("RGBA", "LA", "P"):
-                    if im.mode == "P":
-                        im = im.convert("RGBA")
-                    rgb = PILImage.new("RGB", im.size, (255, 255, 255))
-                    if im.mode in ("RGBA", "LA"):
-                        rgb.paste(im, mask=im.split()[-1])
-                    else:
-                        rgb.paste(im)
-                    im = rgb
-                elif im.mode != "RGB":
-                    im = im.convert("RGB")
-                im.save(jpg_path, format="JPEG", quality=85, optimize=True, progressive=True, subsampling=2)
-
-        reader = ImageReader(jpg_path)
-        _bg_reader_cache[png_path] = reader
-        return reader
-    except Exception:
-        reader = ImageReader(png_path)
-        _bg_reader_cache[png_path] = reader
-        return reader
+register_fonts(("Montserrat", "Montserrat-Bold"))
 
 
 def draw_template_page3(c, doc, data):
@@ -94,7 +42,7 @@ def draw_template_page3(c, doc, data):
         else:
             bg_path = os.path.join(BASE_DIR, "assets", "templates", "page_MK_template.png")
         if os.path.exists(bg_path):
-            bg = _get_cached_bg_reader(bg_path)
+            bg = background_reader(bg_path)
             c.drawImage(bg, 0, 0, width=page_width, height=page_height)
     except Exception:
         # Fail gracefully – if background can't be drawn, continue with text only
@@ -8,17 +8,14 @@ from reportlab.platypus import (
 )
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase.pdfmetrics import stringWidth
 from .pdf_image_optimizer import optimize_image_bytes
+from .pdf_resources import asset_reader, register_fonts
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-fonts_path = os.path.join(BASE_DIR, "assets", "fonts")
-pdfmetrics.registerFont(TTFont("Montserrat", os.path.join(fonts_path, "Montserrat-Regular.ttf")))
-pdfmetrics.registerFont(TTFont("Montserrat-Bold", os.path.join(fonts_path, "Montserrat-Bold.ttf")))
+register_fonts(("Montserrat", "Montserrat-Bold"))
 
 
 def format_number(num):
@@ -119,12 +116,12 @@ def build_estimate_fixed_pages(data, output_path):
 
     logo_path = os.path.join(BASE_DIR, "assets", "logo.png")
     if os.path.exists(logo_path):
-        logo = ImageReader(logo_path)
+        logo = asset_reader(logo_path, max_dim=1200)
         c.drawImage(logo, 175, 690, width=230, height=125, mask="auto")
 
     overlay_path = os.path.join(BASE_DIR, "assets", "Asset 1@2x.png")
     if os.path.exists(overlay_path):
-        overlay = ImageReader(overlay_path)
+        overlay = asset_reader(overlay_path, max_dim=None)
         c.drawImage(overlay, 39, 304, width=516, height=60, mask="auto")
 
     # Helper to auto-fit text
@@ -1,6 +1,5 @@
 import os
 import uuid
-import hashlib
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
@@ -11,124 +10,15 @@ try:
     register_heif_opener()
 except Exception:
     pass
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 from datetime import datetime
 from reportlab.pdfbase.pdfmetrics import stringWidth
 from .pdf_image_optimizer import optimize_image_bytes
+from .pdf_resources import asset_reader, background_reader, register_fonts
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 page_width, page_height = A4
-fonts_path = os.path.join(BASE_DIR, "assets", "fonts")
-pdfmetrics.registerFont(TTFont("Montserrat", os.path.join(fonts_path, "Montserrat-Regular.ttf")))
-pdfmetrics.registerFont(TTFont("Montserrat-Bold", os.path.join(fonts_path, "Montserrat-Bold.ttf")))
-
-_bg_reader_cache: dict[str, ImageReader] = {}
-_bg_jpg_path_cache: dict[str, str] = {}
-_BG_CACHE_DIR = os.path.join("var", "uploads", "pdf_template_cache")
-_asset_reader_cache: dict[str, ImageReader] = {}
-
-
-def _png_to_cached_jpg_path(png_path: str) -> str:
-    """
-    Convert A4 template PNGs into cached JPEG files on disk and return the JPEG path.
-    Using a *file path* lets ReportLab embed the JPEG as DCT (much smaller) instead of raw bitmap streams.
-    """
-    os.makedirs(_BG_CACHE_DIR, exist_ok=True)
-    abs_path = os.path.abspath(png_path)
-    key = hashlib.md5(abs_path.encode("utf-8")).hexdigest()  # stable per template path
-    jpg_name = f"{os.path.splitext(os.path.basename(png_path))[0]}_{key}.jpg"
-    return os.path.join(_BG_CACHE_DIR, jpg_name)
-
-
-def _get_cached_bg_reader(png_path: str) -> ImageReader:
-    cached = _bg_reader_cache.get(png_path)
-    if cached is not None:
-        return cached
-
-    try:
-        jpg_path = _bg_jpg_path_cache.get(png_path)
-        if not jpg_path:
-            jpg_path = _png_to_cached_jpg_path(png_path)
-            _bg_jpg_path_cache[png_path] = jpg_path
-
-        # Create/refresh cache if missing
-        if not os.path.exists(jpg_path):
-            with Image.open(png_path) as im:
-                # Flatten alpha to white and ensure RGB
-                if im.mode in ("RGBA", "LA", "P"):
-                    if im.mode == "P":
-                        im = im.convert("RGBA")
-                    rgb = Image.new("RGB", im.size, (255, 255, 255))
-                    if im.mode in ("RGBA", "LA"):
-                        rgb.paste(im, mask=im.split()[-1])
-                    else:
-                        rgb.paste(im)
-                    im = rgb
-                elif im.mode != "RGB":
-                    im = im.convert("RGB")
-                im.save(jpg_path, format="JPEG", quality=85, optimize=True, progressive=True, subsampling=2)
-
-        reader = ImageReader(jpg_path)
-        _bg_reader_cache[png_path] = reader
-        return reader
-    except Exception:
-        # Fallback: use PNG directly
-        reader = ImageReader(png_path)
-        _bg_reader_cache[png_path] = reader
-        return reader
-
-
-def _png_to_cached_png_path(png_path: str, max_dim: int) -> str:
-    os.makedirs(_BG_CACHE_DIR, exist_ok=True)
-    abs_path = os.path.abspath(png_path)
-    key = hashlib.md5(f"{abs_path}|{max_dim}".encode("utf-8")).hexdigest()
-    out_name = f"{os.path.splitext(os.path.basename(png_path))[0]}_{key}_{max_dim}px.png"
-    return os.path.join(_BG_CACHE_DIR, out_name)
-
-
-def _get_cached_asset_reader(png_path: str, max_dim: int = 1200) -> ImageReader:
-    """
-    Cache-heavy static assets (like very large logo PNGs) are resized and re-saved as PNG
-    preserving alpha. This prevents huge FlateDecode image streams in the PDF.
-    """
-    cache_key = f"{png_path}|{max_dim}"
-    cached = _asset_reader_cache.get(cache_key)
-    if cached is not None:
-        return cached
-
-    try:
-        out_path = _png_to_cached_png_path(png_path, max_dim=max_dim)
-        if not os.path.exists(out_path):
-            with Image.open(png_path) as im:
-                # Preserve alpha if present
-                if im.mode == "P":
-                    im = im.convert("RGBA")
-                elif im.mode not in ("RGBA", "RGB"):
-                    im = im.convert("RGBA")
-
-                w, h = im.size
-                m = max(w, h)
-                if m > max_dim:
-                    if w >= h:
-                        new_w = max_dim
-                        new_h = int(h * (max_dim / w))
-                    else:
-                        new_h = max_dim
-                        new_w = int(w * (max_dim / h))
-                    im = im.resize((max(1, new_w), max(1, new_h)), Image.Resampling.LANCZOS)
-
-                # Save optimized PNG (still preserves alpha)
-                im.save(out_path, format="PNG", optimize=True, compress_level=9)
-
-        reader = ImageReader(out_path)
-        _asset_reader_cache[cache_key] = reader
-        return reader
-    except Exception:
-        reader = ImageReader(png_path)
-        _asset_reader_cache[cache_key] = reader
-        return reader
+register_fonts(("Montserrat", "Montserrat-Bold"))
 
 
 def build_cover_page(c, data):
@@ -136,7 +26,7 @@ def build_cover_page(c, data):
     try:
         cover_bg_path = os.path.join(BASE_DIR, "assets", "templates", "cover_template.png")
         if os.path.exists(cover_bg_path):
-            bg = _get_cached_bg_reader(cover_bg_path)
+            bg = background_reader(cover_bg_path)
             c.drawImage(bg, 0, 0, width=page_width, height=page_height)
     except Exception:
         # Fail gracefully if background image is missing
@@ -198,7 +88,7 @@ def build_cover_page(c, data):
             logo_path = os.path.join(BASE_DIR, "assets", "MK_logo.png")
         if os.path.exists(logo_path):
             # These logo PNGs can be extremely large (especially MKM). Resize/cache before embedding.
-            logo = _get_cached_asset_reader(logo_path, max_dim=1200)
+            logo = asset_reader(logo_path, max_dim=1200)
             c.drawImage(logo, 175, 690, width=230, height=125, mask="auto")
     except Exception:
         pass
@@ -207,7 +97,7 @@ def build_cover_page(c, data):
     try:
         overlay_path = os.path.join(BASE_DIR, "assets", "cover_overlay.png")
         if os.path.exists(overlay_path):
-            overlay = ImageReader(overlay_path)
+            overlay = asset_reader(overlay_path, max_dim=None)
             c.drawImage(overlay, 39, 304, width=516, height=60, mask="auto")
     except Exception:
         pass
@@ -385,7 +275,7 @@ def build_page2(c, data):
         # Backwards compatibility with old file name
         template_path = os.path.join(BASE_DIR, "assets", "templates", "page_MK_template.png")
     if os.path.exists(template_path):
-        bg = _get_cached_bg_reader(template_path)
+        bg = background_reader(template_path)
         c.drawImage(bg, 0, 0, width=page_width, height=page_height)
 
     c.setFillColor(colors.white)
@@ -0,0 +1,309 @@
+"""
+Process-wide registry of static PDF resources shared by every ReportLab builder
+(proposals, quotes, estimates, certificates, document creator, safety inspections).
+
+    fonts        register_font / font_name register a TTF once per process and fall
+                 back to a built-in face when the file is missing
+    backgrounds  background_reader turns A4 template PNGs into cached JPEGs on disk
+                 (embedded as DCT instead of huge Flate bitmaps) and keeps one reader
+    assets       asset_reader keeps downscaled PNG logos/overlays (alpha preserved)
+    uploads      cached_image_reader / image_reader_for_bytes keep readers for uploaded
+                 logos and template backgrounds (by file id or content hash), LRU-bounded
+                 by PDF_RESOURCE_CACHE_MAX_MB
+    QR codes     qr_code_png memoizes rendered QR PNGs
+
+prewarm() loads all of the above at startup so the first PDF after a deploy does not
+pay for TTF parsing and PNG conversion; memory_usage() reports what is held.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import structlog
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from ..config import settings
+
+logger = structlog.get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+FONTS_DIR = os.path.join(ASSETS_DIR, "fonts")
+TEMPLATES_DIR = os.path.join(ASSETS_DIR, "templates")
+BG_CACHE_DIR = os.path.join("var", "uploads", "pdf_template_cache")
+
+# ReportLab font name -> file under FONTS_DIR. Builders ask for names, never paths.
+FONT_FILES: Dict[str, str] = {
+    "Montserrat": "Montserrat-Regular.ttf",
+    "Montserrat-Bold": "Montserrat-Bold.ttf",
+    "Montserrat-Italic": "Montserrat-Italic.ttf",
+    "Montserrat-BoldItalic": "Montserrat-BoldItalic.ttf",
+    "OpenSans": "OpenSans-Regular.ttf",
+    "OpenSans-Bold": "OpenSans-Bold.ttf",
+    "OpenSans-Italic": "OpenSans-Italic.ttf",
+    "OpenSans-BoldItalic": "OpenSans-BoldItalic.ttf",
+    "CertScript": "Pacifico-Regular.ttf",
+}
+
+# Static images drawn by the proposal/quote builders: (file, max_dim) for assets.
+PREWARM_BACKGROUNDS = ("cover_template.png", "page_MK_template.png", "page_MKM_template.png")
+PREWARM_ASSETS = (("MK_logo.png", 1200), ("MKM_logo.png", 1200), ("cover_overlay.png", None))
+
+_lock = threading.RLock()
+_fonts: Dict[str, Optional[int]] = {}  # name -> file size when registered, None when unavailable
+_bg_readers: Dict[str, Tuple[ImageReader, int]] = {}
+_asset_readers: Dict[Tuple[str, Optional[int]], Tuple[ImageReader, int]] = {}
+_keyed_readers: "OrderedDict[str, Tuple[ImageReader, int]]" = OrderedDict()
+_keyed_readers_size = 0
+
+
+class SharedImageReader(ImageReader):
+    """
+    ImageReader safe to draw from several threads at once: ReportLab embeds JPEGs by
+    seeking and reading the reader's own file handle, so each draw gets its own copy.
+    """
+
+    def _jpeg_fh(self):
+        return io.BytesIO(self.fp.getvalue())
+
+
+def _reader_size(reader: ImageReader) -> int:
+    size = len(reader.fp.getvalue()) if getattr(reader, "fp", None) is not None else 0
+    if getattr(reader, "_data", None) is not None:  # decoded RGB kept after the first Flate embed
+        size += len(reader._data)
+    return size
+
+
+# --- fonts ---------------------------------------------------------------------------
+
+
+def register_font(name: str, filename: Optional[str] = None) -> bool:
+    """Register ``name`` from FONTS_DIR once per process; False when the TTF is missing or broken."""
+    if name in _fonts:
+        return _fonts[name] is not None
+    with _lock:
+        if name in _fonts:
+            return _fonts[name] is not None
+        path = os.path.join(FONTS_DIR, filename or FONT_FILES[name])
+        size: Optional[int] = None
+        try:
+            if os.path.isfile(path):
+                pdfmetrics.registerFont(TTFont(name, path))
+                size = os.path.getsize(path)
+        except Exception as e:
+            logger.warning("pdf_resources: could not register font", font=name, path=path, error=str(e))
+        _fonts[name] = size
+        return size is not None
+
+
+def register_fonts(names: Iterable[str]) -> Dict[str, bool]:
+    return {name: register_font(name) for name in names}
+
+
+def font_name(name: str, fallback: str) -> str:
+    """``name`` when it is (or can be) registered, else the built-in ``fallback`` face."""
+    return name if register_font(name) else fallback
+
+
+# --- images --------------------------------------------------------------------------
+
+
+def _cache_path(src_path: str, suffix: str) -> str:
+    os.makedirs(BG_CACHE_DIR, exist_ok=True)
+    key = hashlib.md5(os.path.abspath(src_path).encode("utf-8")).hexdigest()  # stable per template path
+    return os.path.join(BG_CACHE_DIR, f"{os.path.splitext(os.path.basename(src_path))[0]}_{key}{suffix}")
+
+
+def _flatten_to_jpeg(png_path: str, jpg_path: str) -> None:
+    with Image.open(png_path) as im:
+        # Flatten alpha to white and ensure RGB
+        if im.mode in ("RGBA", "LA", "P"):
+            if im.mode == "P":
+                im = im.convert("RGBA")
+            rgb = Image.new("RGB", im.size, (255, 255, 255))
+            if im.mode in ("RGBA", "LA"):
+                rgb.paste(im, mask=im.split()[-1])
+            else:
+                rgb.paste(im)
+            im = rgb
+        elif im.mode != "RGB":
+            im = im.convert("RGB")
+        tmp_path = f"{jpg_path}.{os.getpid()}.tmp"
+        im.save(tmp_path, format="JPEG", quality=85, optimize=True, progressive=True, subsampling=2)
+    os.replace(tmp_path, jpg_path)  # other workers never see a half-written file
+
+
+def background_reader(png_path: str) -> ImageReader:
+    """
+    Reader for a full-page template PNG. The PNG is converted once to a JPEG next to the
+    uploads (so ReportLab embeds it as DCT, much smaller) and the reader is kept for the
+    life of the process. Falls back to the PNG itself when conversion fails.
+    """
+    cached = _bg_readers.get(png_path)
+    if cached is not None:
+        return cached[0]
+    with _lock:
+        cached = _bg_readers.get(png_path)
+        if cached is not None:
+            return cached[0]
+        try:
+            jpg_path = _cache_path(png_path, ".jpg")
+            if not os.path.exists(jpg_path):
+                _flatten_to_jpeg(png_path, jpg_path)
+            reader = SharedImageReader(jpg_path)
+        except Exception:
+            reader = SharedImageReader(png_path)
+        _bg_readers[png_path] = (reader, _reader_size(reader))
+        return reader
+
+
+def asset_reader(png_path: str, max_dim: Optional[int] = 1200) -> ImageReader:
+    """
+    Reader for a static asset (logo, overlay). Very large logo PNGs are resized to
+    ``max_dim`` and re-saved as PNG preserving alpha, which keeps huge FlateDecode
+    streams out of the PDF. ``max_dim=None`` uses the file as is.
+    """
+    key = (png_path, max_dim)
+    cached = _asset_readers.get(key)
+    if cached is not None:
+        return cached[0]
+    with _lock:
+        cached = _asset_readers.get(key)
+        if cached is not None:
+            return cached[0]
+        try:
+            if max_dim is None:
+                reader = SharedImageReader(png_path)
+            else:
+                out_path = _cache_path(f"{png_path}|{max_dim}", f"_{max_dim}px.png")
+                if not os.path.exists(out_path):
+                    with Image.open(png_path) as im:
+                        if im.mode == "P":
+                            im = im.convert("RGBA")
+                        elif im.mode not in ("RGBA", "RGB"):
+                            im = im.convert("RGBA")
+                        im.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+                        tmp_path = f"{out_path}.{os.getpid()}.tmp"
+                        im.save(tmp_path, format="PNG", optimize=True, compress_level=9)
+                    os.replace(tmp_path, out_path)
+                reader = SharedImageReader(out_path)
+        except Exception:
+            reader = SharedImageReader(png_path)
+        _asset_readers[key] = (reader, _reader_size(reader))
+        return reader
+
+
+def cached_image_reader(key: str, load: Callable[[], Optional[bytes]]) -> Optional[ImageReader]:
+    """
+    Reader for an image identified by ``key``; ``load`` supplies the encoded bytes on a
+    miss (None is not cached). Least recently used entries are dropped once the held
+    bytes pass PDF_RESOURCE_CACHE_MAX_MB.
+    """
+    global _keyed_readers_size
+    with _lock:
+        cached = _keyed_readers.get(key)
+        if cached is not None:
+            _keyed_readers.move_to_end(key)
+            return cached[0]
+    data = load()
+    if not data:
+        return None
+    reader = SharedImageReader(io.BytesIO(data))
+    size = _reader_size(reader)
+    limit = max(0, settings.pdf_resource_cache_max_mb) * 1024 * 1024
+    with _lock:
+        if key not in _keyed_readers:
+            _keyed_readers[key] = (reader, size)
+            _keyed_readers_size += size
+        while _keyed_readers and _keyed_readers_size > limit:
+            _, (_, dropped) = _keyed_readers.popitem(last=False)
+            _keyed_readers_size -= dropped
+    return reader
+
+
+def image_reader_for_bytes(data: bytes) -> ImageReader:
+    """Reader for uploaded image bytes (training logos, certificate backgrounds), shared by content hash."""
+    return cached_image_reader(f"sha256:{hashlib.sha256(data).hexdigest()}", lambda: data)
+
+
+@lru_cache(maxsize=256)
+def qr_code_png(data: str, size: int = 200) -> bytes:
+    """PNG bytes of a QR code for ``data``, ``size`` pixels square."""
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    img = img.resize((size, size), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# --- warm-up and accounting ----------------------------------------------------------
+
+
+def prewarm() -> Dict[str, int]:
+    """Register every known font and load the template backgrounds and logos."""
+    register_fonts(FONT_FILES)
+    for filename in PREWARM_BACKGROUNDS:
+        path = os.path.join(TEMPLATES_DIR, filename)
+        if os.path.exists(path):
+            background_reader(path)
+    for filename, max_dim in PREWARM_ASSETS:
+        path = os.path.join(ASSETS_DIR, filename)
+        if os.path.exists(path):
+            asset_reader(path, max_dim=max_dim)
+    return memory_usage()
+
+
+def memory_usage() -> Dict[str, int]:
+    """Counts and approximate bytes held (font files, image streams, decoded bitmaps)."""
+    with _lock:
+        fonts = [s for s in _fonts.values() if s is not None]
+        bg = [_reader_size(r) for r, _ in _bg_readers.values()]
+        assets = [_reader_size(r) for r, _ in _asset_readers.values()]
+        qr = qr_code_png.cache_info()
+        return {
+            "fonts": len(fonts),
+            "font_bytes": sum(fonts),
+            "backgrounds": len(bg),
+            "background_bytes": sum(bg),
+            "assets": len(assets),
+            "asset_bytes": sum(assets),
+            "uploaded_images": len(_keyed_readers),
+            "uploaded_image_bytes": _keyed_readers_size,
+            "qr_codes": qr.currsize,
+        }
+
+
+def start_prewarm() -> threading.Thread:
+    """Run prewarm() on a daemon thread so startup does not wait for it."""
+
+    def _run() -> None:
+        try:
+            usage = prewarm()
+            print(
+                f"[startup] PDF resources ready: {usage['fonts']} fonts, "
+                f"{usage['backgrounds'] + usage['assets']} images, "
+                f"{(usage['font_bytes'] + usage['background_bytes'] + usage['asset_bytes']) / 1048576:.1f} MiB"
+            )
+        except Exception as e:
+            print(f"⚠️  Could not prewarm PDF resources: {e}")
+
+    thread = threading.Thread(target=_run, name="pdf-resources-prewarm", daemon=True)
+    thread.start()
+    return thread
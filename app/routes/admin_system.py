@@ -10,10 +10,13 @@ from sqlalchemy import cast, String, or_
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from ..db import get_db
+from ..db import get_db, get_read_db, pool_stats
 from ..auth.security import require_roles
 from ..models.models import User, AuditLog, SystemLog, EmployeeProfile
 from ..services.audit_log_entries import audit_rows_to_entry_dicts, user_display_for_audit
+from ..services.db_metrics import db_stats
+from ..storage.metrics import storage_stats
+from ..storage.registry import get_blob_provider, hybrid_configured
 
 
 def _user_ids_matching_search(db: Session, term: str, limit: int = 200) -> List[uuid.UUID]:
@@ -196,7 +199,7 @@ def list_audit_logs(
     date_to: Optional[str] = Query(None, description="To date (YYYY-MM-DD)"),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin: User = Depends(require_roles("admin")),
 ):
     """List audit logs with filters (admin only). Enriches with actor name and entity display name."""
@@ -436,3 +439,29 @@ class HealthResponse(BaseModel):
 def system_health(admin: User = Depends(require_roles("admin"))):
     """Basic health/summary for admin panel (admin only)."""
     return HealthResponse(status="ok")
+
+
+@router.get("/storage")
+def storage_metrics(admin: User = Depends(require_roles("admin"))):
+    """Blob call latency and signed-URL cache counters for this worker process (admin only)."""
+    out = storage_stats()
+    if hybrid_configured():
+        out["hybrid"] = get_blob_provider().stats()
+    return out
+
+
+@router.get("/db-pools")
+def db_pool_metrics(admin: User = Depends(require_roles("admin"))):
+    """Connection pool usage per engine (primary, read replica) and replica lag for this worker (admin only)."""
+    return pool_stats()
+
+
+@router.get("/db-metrics")
+def db_query_metrics(
+    top: int = Query(25, ge=1, le=200),
+    admin: User = Depends(require_roles("admin")),
+):
+    """Query counts/latency per engine and the endpoints issuing the most queries per request (admin only)."""
+    out = db_stats(top=top)
+    out["pools"] = pool_stats()
+    return out
@@ -6,7 +6,7 @@ from sqlalchemy import text, or_, and_, exists, select, func, literal
 from typing import Optional, List
 from datetime import datetime, timezone
 
-from ..db import get_db
+from ..db import get_db, get_read_db
 from ..models.models import Client, ClientContact, ClientSite, ClientFile, FileObject, ClientFolder, ClientDocument, Project, Proposal, User
 import mimetypes
 from ..schemas.clients import (
@@ -25,6 +25,7 @@ from ..auth.security import (
     has_project_files_category_permission,
     User,
 )
+from ..services.company_folder_index import invalidate_folder_tree
 from ..services.standard_file_categories import get_categories_for_client_api, get_default_folder_rows
 from ..services.project_visibility import project_visibility_clause_for_user, is_project_visible_to_user
 
@@ -582,7 +583,7 @@ def get_client_insights(
     client_id: str,
     from_: str = Query(..., alias="from"),
     to: str = Query(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
 ):
     """
@@ -612,11 +613,11 @@ def get_client_insights(
     if not c:
         raise HTTPException(status_code=404, detail="Not found")
 
-    from ..services.customer_insights import build_customer_insights_payload
+    from ..services.customer_insights import cached_customer_insights_payload
 
     try:
         client_created = c.created_at.isoformat() if getattr(c, "created_at", None) else None
-        return build_customer_insights_payload(db, client_uuid, user, from_, to, client_created)
+        return cached_customer_insights_payload(db, client_uuid, user, from_, to, client_created)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1530,8 +1531,13 @@ def delete_client_folder(client_id: str, folder_id: str, db: Session = Depends(g
     has_docs = db.query(ClientDocument).filter(ClientDocument.client_id == client_id, ClientDocument.doc_type == tag).first()
     if has_docs:
         raise HTTPException(status_code=400, detail="Folder not empty")
+    # Detach subfolders through the ORM (as ON DELETE SET NULL would) so their paths are re-rooted.
+    for child in db.query(ClientFolder).filter(ClientFolder.client_id == client_id, ClientFolder.parent_id == fid).all():
+        child.parent_id = None
+    db.flush()
     db.query(ClientFolder).filter(ClientFolder.client_id == client_id, ClientFolder.id == fid).delete()
     db.commit()
+    invalidate_folder_tree(uuid.UUID(str(client_id)))
     return {"status":"ok"}
 
 
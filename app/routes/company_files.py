@@ -6,9 +6,10 @@ For now, we'll use department_id to organize files.
 """
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Body
+from sqlalchemy import func
 from sqlalchemy.orm import Session, defer
 from sqlalchemy.exc import ProgrammingError
-from typing import Optional, List, Dict, Set
+from typing import Optional, List, Set
 import uuid
 
 from ..db import get_db
@@ -20,6 +21,15 @@ from ..auth.security import (
     has_company_files_department_permission,
     assert_company_files_department_permission,
 )
+from ..services.company_folder_index import (
+    FolderViewer,
+    compile_folder_acl,
+    current_folder_tree,
+    folder_acl_rows,
+    get_folder_tree,
+    invalidate_folder_tree,
+    subtree_acl_rows,
+)
 
 router = APIRouter(prefix="/company/files", tags=["company-files"])
 
@@ -94,45 +104,10 @@ def user_has_folder_access(db: Session, user: User, folder: ClientFolder) -> boo
     - User ID is in allowed_user_ids
     - User's division is in allowed_divisions
     - User is admin
+
+    Listing endpoints check many folders at once through current_folder_tree(...).hidden_ids() instead.
     """
-    # Admin users always have access
-    from ..services.permissions import is_admin
-    if is_admin(user, db):
-        return True
-    
-    # If no permissions set, folder is public
-    perms = getattr(folder, 'access_permissions', None)
-    if not perms:
-        return True
-    
-    # Check if folder is explicitly public
-    if perms.get('is_public', True):
-        return True
-    
-    # Check if user ID is in allowed list
-    allowed_user_ids = perms.get('allowed_user_ids', [])
-    if allowed_user_ids:
-        # Convert to UUIDs if they're strings
-        user_ids = []
-        for uid in allowed_user_ids:
-            try:
-                if isinstance(uid, str):
-                    user_ids.append(uuid.UUID(uid))
-                else:
-                    user_ids.append(uid)
-            except Exception:
-                pass
-        if user.id in user_ids:
-            return True
-    
-    # Check if user's division is in allowed list
-    allowed_divisions = perms.get('allowed_divisions', [])
-    if allowed_divisions:
-        user_division = get_user_division(db, user.id)
-        if user_division and user_division in allowed_divisions:
-            return True
-    
-    return False
+    return FolderViewer(db, user).can_open(compile_folder_acl(getattr(folder, "access_permissions", None)))
 
 
 def get_or_create_department_root_folder(db: Session, company_id: uuid.UUID, department_id: str) -> Optional[ClientFolder]:
@@ -175,6 +150,14 @@ def list_department_setting_items(db: Session) -> List[SettingItem]:
     )
 
 
+def _path_root_id(path: Optional[str]) -> Optional[uuid.UUID]:
+    parts = [p for p in (path or "").split("/") if p]
+    try:
+        return uuid.UUID(parts[0]) if parts else None
+    except ValueError:
+        return None
+
+
 def resolve_department_id_for_folder(
     db: Session,
     company_id: uuid.UUID,
@@ -184,6 +167,14 @@ def resolve_department_id_for_folder(
     if not folder:
         return None
     current = folder
+    root_id = _path_root_id(getattr(folder, "path", None))
+    if root_id is not None and root_id != folder.id:
+        # Materialized path names the root directly; no walk up the parents.
+        current = (
+            db.query(ClientFolder)
+            .filter(ClientFolder.client_id == company_id, ClientFolder.id == root_id)
+            .first()
+        )
     seen: Set[uuid.UUID] = set()
     while current and getattr(current, "parent_id", None):
         if current.id in seen:
@@ -227,21 +218,18 @@ def assert_write_for_folder_id(
 
 
 def collect_descendant_folder_ids(db: Session, company_id: uuid.UUID, root_id: uuid.UUID) -> Set[uuid.UUID]:
-    """Collect root folder id and all descendant folder ids."""
-    all_folders = db.query(ClientFolder).filter(ClientFolder.client_id == company_id).all()
-    by_parent: Dict[Optional[uuid.UUID], List[uuid.UUID]] = {}
-    for f in all_folders:
-        pid = getattr(f, "parent_id", None)
-        by_parent.setdefault(pid, []).append(f.id)
-    out: Set[uuid.UUID] = {root_id}
-    stack = [root_id]
-    while stack:
-        current = stack.pop()
-        for child_id in by_parent.get(current, []):
-            if child_id not in out:
-                out.add(child_id)
-                stack.append(child_id)
-    return out
+    """Collect root folder id and all descendant folder ids (uncached; a prefix scan on the path index)."""
+    root_path = db.query(ClientFolder.path).filter(
+        ClientFolder.client_id == company_id,
+        ClientFolder.id == root_id,
+    ).scalar()
+    if not root_path:
+        return get_folder_tree(db, company_id).descendants(root_id)
+    rows = db.query(ClientFolder.id).filter(
+        ClientFolder.client_id == company_id,
+        ClientFolder.path.like(f"{root_path}%"),
+    ).all()
+    return {root_id} | {r[0] for r in rows}
 
 
 def serialize_company_document(db: Session, d: ClientDocument, include_deleted: bool = False) -> Optional[dict]:
@@ -360,23 +348,23 @@ def list_company_folders(
         query = query.filter(ClientFolder.parent_id == None)
     
     rows = query.order_by(ClientFolder.sort_index.asc(), ClientFolder.name.asc()).all()
-    
+    hidden = current_folder_tree(db, company_id, rows).hidden_ids(FolderViewer(db, user))
+    rows = [f for f in rows if f.id not in hidden]
+
+    # Last modified date from documents, one grouped query for all listed folders
+    latest_by_tag = dict(
+        db.query(ClientDocument.doc_type, func.max(ClientDocument.created_at))
+        .filter(
+            ClientDocument.client_id == company_id,
+            ClientDocument.doc_type.in_([f"folder:{f.id}" for f in rows]),
+        )
+        .group_by(ClientDocument.doc_type)
+        .all()
+    ) if rows else {}
+
     out = []
     for f in rows:
-        # Check if user has access to this folder
-        if not user_has_folder_access(db, user, f):
-            continue
-        
-        # Get last modified date from documents in this folder
-        last_modified = getattr(f, 'created_at', None)
-        if f.id:
-            latest_doc = db.query(ClientDocument).filter(
-                ClientDocument.client_id == company_id,
-                ClientDocument.doc_type == f"folder:{f.id}"
-            ).order_by(ClientDocument.created_at.desc()).first()
-            if latest_doc and getattr(latest_doc, 'created_at', None):
-                last_modified = latest_doc.created_at
-        
+        last_modified = latest_by_tag.get(f"folder:{f.id}") or getattr(f, 'created_at', None)
         folder_data = {
             "id": str(f.id),
             "name": f.name,
@@ -403,24 +391,21 @@ def list_company_folder_tree(
     dept_root = get_or_create_department_root_folder(db, company_id, department_id)
     if not dept_root:
         raise HTTPException(status_code=404, detail="Department not found")
-    subtree_ids = collect_descendant_folder_ids(db, company_id, dept_root.id)
-    rows = (
-        db.query(ClientFolder)
-        .filter(ClientFolder.client_id == company_id, ClientFolder.id.in_(subtree_ids))
-        .order_by(ClientFolder.sort_index.asc(), ClientFolder.name.asc())
-        .all()
-    )
+    subtree_rows = subtree_acl_rows(db, company_id, dept_root.id)
+    tree = current_folder_tree(db, company_id, subtree_rows)
+    subtree_ids = {r.id for r in subtree_rows}
+    hidden = tree.hidden_ids(FolderViewer(db, user))
     folders = []
-    for f in rows:
-        if not user_has_folder_access(db, user, f):
+    for f in tree.rows:
+        if f["id"] not in subtree_ids or f["id"] in hidden:
             continue
         folders.append({
-            "id": str(f.id),
-            "name": f.name,
-            "parent_id": str(f.parent_id) if getattr(f, "parent_id", None) else None,
-            "sort_index": f.sort_index,
-            "access_permissions": getattr(f, "access_permissions", None),
-            "created_at": f.created_at.isoformat() if getattr(f, "created_at", None) else None,
+            "id": str(f["id"]),
+            "name": f["name"],
+            "parent_id": str(f["parent_id"]) if f["parent_id"] else None,
+            "sort_index": f["sort_index"],
+            "access_permissions": f["access_permissions"],
+            "created_at": f["created_at"].isoformat() if f["created_at"] else None,
         })
     return {
         "root_folder_id": str(dept_root.id),
@@ -507,9 +492,17 @@ def update_company_folder(
     
     if parent_id is not None:
         try:
-            folder.parent_id = uuid.UUID(str(parent_id)) if parent_id else None
+            new_parent_id = uuid.UUID(str(parent_id)) if parent_id else None
         except Exception:
-            folder.parent_id = None
+            new_parent_id = None
+        if new_parent_id is not None:
+            new_parent = db.query(ClientFolder.path).filter(
+                ClientFolder.client_id == company_id,
+                ClientFolder.id == new_parent_id,
+            ).first()
+            if new_parent_id == folder.id or (new_parent and f"/{folder.id}/" in (new_parent.path or "")):
+                raise HTTPException(status_code=400, detail="Cannot move a folder into itself")
+        folder.parent_id = new_parent_id
     
     db.commit()
     return {"status": "ok"}
@@ -540,11 +533,19 @@ def delete_company_folder(
     if has_docs:
         raise HTTPException(status_code=400, detail="Folder not empty")
     
+    # Detach subfolders through the ORM (as ON DELETE SET NULL would) so their paths are re-rooted.
+    for child in db.query(ClientFolder).filter(
+        ClientFolder.client_id == company_id,
+        ClientFolder.parent_id == fid,
+    ).all():
+        child.parent_id = None
+    db.flush()
     db.query(ClientFolder).filter(
         ClientFolder.client_id == company_id,
         ClientFolder.id == fid
     ).delete()
     db.commit()
+    invalidate_folder_tree(company_id)
     return {"status": "ok"}
 
 
@@ -577,6 +578,7 @@ def list_company_documents(
         ClientDocument.client_id == company_id,
         ClientDocument.deleted_at.is_(None),
     )
+    viewer = FolderViewer(db, user)
     
     if folder_id:
         tag = f"folder:{folder_id}"
@@ -584,16 +586,12 @@ def list_company_documents(
         
         try:
             fid = uuid.UUID(str(folder_id))
-            folder = db.query(ClientFolder).filter(
-                ClientFolder.client_id == company_id,
-                ClientFolder.id == fid
-            ).first()
-            if folder and not user_has_folder_access(db, user, folder):
-                raise HTTPException(status_code=403, detail="Access denied to this folder")
-        except HTTPException:
-            raise
         except Exception:
-            pass
+            fid = None
+        if fid is not None:
+            acl_rows = folder_acl_rows(db, company_id, [fid])
+            if fid in current_folder_tree(db, company_id, acl_rows).hidden_ids(viewer):
+                raise HTTPException(status_code=403, detail="Access denied to this folder")
     elif department_id:
         dept_root = get_or_create_department_root_folder(db, company_id, department_id)
         if not dept_root:
@@ -603,26 +601,22 @@ def list_company_documents(
         query = query.filter(ClientDocument.doc_type.in_(tags))
     
     rows = query.order_by(ClientDocument.created_at.desc()).all()
+
+    # Check every folder the documents sit in against its current DB row, not only the cached tree.
+    doc_folder_ids = {}
+    for d in rows:
+        if (d.doc_type or '').startswith('folder:'):
+            try:
+                doc_folder_ids[d.id] = uuid.UUID(d.doc_type.split(':', 1)[1])
+            except Exception:
+                pass
+    acl_rows = folder_acl_rows(db, company_id, doc_folder_ids.values())
+    hidden = current_folder_tree(db, company_id, acl_rows).hidden_ids(viewer) if acl_rows else frozenset()
     
     out = []
     for d in rows:
-        fid = None
-        try:
-            if (d.doc_type or '').startswith('folder:'):
-                fid = d.doc_type.split(':', 1)[1]
-                if fid:
-                    try:
-                        folder_uuid = uuid.UUID(str(fid))
-                        folder = db.query(ClientFolder).filter(
-                            ClientFolder.client_id == company_id,
-                            ClientFolder.id == folder_uuid
-                        ).first()
-                        if folder and not user_has_folder_access(db, user, folder):
-                            continue
-                    except Exception:
-                        pass
-        except Exception:
-            fid = None
+        if doc_folder_ids.get(d.id) in hidden:
+            continue
         
         serialized = serialize_company_document(db, d)
         if serialized:
@@ -734,6 +728,7 @@ def list_deleted_company_documents(
         ClientDocument.client_id == company_id,
         ClientDocument.deleted_at.isnot(None),
     )
+    tree = get_folder_tree(db, company_id)
     if department_id:
         dept_root = get_or_create_department_root_folder(db, company_id, department_id)
         if dept_root:
@@ -748,10 +743,9 @@ def list_deleted_company_documents(
             dept_label = None
             try:
                 if (d.doc_type or "").startswith("folder:"):
-                    folder_uuid = uuid.UUID(str(d.doc_type.split(":", 1)[1]))
-                    folder = db.query(ClientFolder).filter(ClientFolder.id == folder_uuid).first()
+                    folder = tree.by_id.get(uuid.UUID(str(d.doc_type.split(":", 1)[1])))
                     if folder:
-                        dept_label = folder.name
+                        dept_label = folder["name"]
             except Exception:
                 pass
             serialized["department_label"] = dept_label
@@ -2,7 +2,7 @@
 Dispatch & Time Tracking API routes.
 Handles shifts, attendance, and approvals.
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 from typing import List, Optional, Dict
@@ -40,6 +40,19 @@ from ..services.service_items import (
     resolve_service_item_value,
 )
 from ..services.attendance_edit import attendance_edit_fields
+from ..services.attendance_ledger import LedgerFilters, deleted_shift_info, ledger_query
+from ..services.attendance_rollup import (
+    WORKER_PAGE_DEFAULT,
+    WORKER_PAGE_MAX,
+    entry_break_minutes,
+    load_break_policy,
+    local_days_utc,
+    rollup_rows,
+    sum_totals,
+    summarize_by_worker,
+    work_date as attendance_work_date,
+    worker_page,
+)
 from ..services.notifications import send_shift_notification, send_attendance_notification
 from ..services.permissions import (
     is_admin, is_supervisor, is_worker,
@@ -732,7 +745,6 @@ def update_shift(
                 detail=f"Worker already has overlapping shift(s)"
             )
     
-    from datetime import timezone
     shift.updated_at = datetime.now(timezone.utc)
     db.commit()
     db.refresh(shift)
@@ -842,7 +854,6 @@ def delete_shift(
     project_id = str(shift.project_id)
     
     # Soft delete the shift (keep row so Attendance.shift_id FK doesn't cascade-delete)
-    from datetime import timezone
     shift.status = "deleted"
     shift.cancelled_at = datetime.now(timezone.utc)
     shift.cancelled_by = user.id
@@ -1054,7 +1065,6 @@ def create_attendance(
             time_selected_utc = time_selected_utc.replace(tzinfo=UTC)
         
         # Get current UTC time (timezone-aware)
-        from datetime import timezone
         time_entered_utc = datetime.now(timezone.utc)
         
         # Check if user has permission to edit clock in/out time
@@ -1701,7 +1711,6 @@ def create_attendance_supervisor(
     
     # Check if user has permission to edit clock in/out time
     # If time_selected_local is different from current time (within 4 minute margin), require unrestricted permission
-    from datetime import timezone, timedelta
     time_entered_utc = datetime.now(timezone.utc)
     time_diff = abs((time_selected_utc - time_entered_utc).total_seconds() / 60)  # Difference in minutes
     
@@ -1728,7 +1737,6 @@ def create_attendance_supervisor(
         time_selected_utc = time_selected_utc.replace(tzinfo=UTC)
     
     # Get current UTC time (timezone-aware)
-    from datetime import timezone
     time_entered_utc = datetime.now(timezone.utc)
     
     # Get GPS data (supervisor's location)
@@ -1948,7 +1956,6 @@ def create_direct_attendance(
             raise HTTPException(status_code=403, detail="You can only create direct attendance for yourself")
         
         # Workers log start + end at the end of the day, so their own selected times are kept.
-        from datetime import timezone, timedelta
         time_entered_utc = datetime.now(timezone.utc)
         time_diff = abs((time_selected_utc - time_entered_utc).total_seconds() / 60)
 
@@ -2372,10 +2379,58 @@ def get_direct_attendances_for_date(
     return result
 
 
+def _summary_target_worker(worker_id: Optional[str], user: User, db: Session) -> tuple:
+    """(has_permission, explicit worker id or None) for attendance summaries; 403 for other workers without access."""
+    from ..auth.security import _has_permission
+
+    has_permission = is_admin(user, db) or is_supervisor(user, db) or _has_permission(user, "hr:attendance:read")
+    if not worker_id:
+        return has_permission, None
+    if not has_permission:
+        # Without permission only the caller's own summary is visible
+        if str(worker_id) != str(user.id):
+            raise HTTPException(
+                status_code=403,
+                detail="You do not have permission to view other workers' attendance summaries"
+            )
+        return has_permission, user.id
+    try:
+        return has_permission, uuid.UUID(worker_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid worker_id format")
+
+
+def _sunday_on_or_before(d: date) -> date:
+    # weekday() returns: Monday=0, ..., Sunday=6
+    return d - timedelta(days=(d.weekday() + 1) % 7)
+
+
+def _minutes_formatted(minutes: int) -> str:
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+
+def _summary_worker_names(db: Session, worker_ids: List[uuid.UUID]) -> Dict[uuid.UUID, str]:
+    names = {}
+    if not worker_ids:
+        return names
+    rows = (
+        db.query(User.id, User.username, EmployeeProfile.preferred_name, EmployeeProfile.first_name, EmployeeProfile.last_name)
+        .outerjoin(EmployeeProfile, EmployeeProfile.user_id == User.id)
+        .filter(User.id.in_(worker_ids))
+        .all()
+    )
+    for wid, username, preferred, first, last in rows:
+        name = (preferred or "").strip() or " ".join(x for x in [(first or "").strip(), (last or "").strip()] if x)
+        names[wid] = name or username or "Employee"
+    return names
+
+
 @router.get("/attendance/weekly-summary")
 def get_weekly_attendance_summary(
     week_start: Optional[str] = None,  # YYYY-MM-DD format, defaults to current week (Sunday)
     worker_id: Optional[str] = None,  # Optional worker ID to filter by (requires admin/supervisor permissions)
+    limit: int = Query(WORKER_PAGE_DEFAULT, ge=1, le=WORKER_PAGE_MAX),  # workers per page without worker_id
+    cursor: Optional[str] = None,  # next_cursor of the previous page
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
@@ -2383,460 +2438,196 @@ def get_weekly_attendance_summary(
     Get weekly attendance summary for the current user or specified worker.
     Returns list of daily entries with clock-in/out times, hours worked, job type, etc.
     All users can view their own weekly summary. Viewing other workers' summaries requires permissions.
+    Without worker_id, callers with permission get every worker who has attendance that week, `limit`
+    workers per page (pass next_cursor back as cursor). Week totals come from attendance_daily_rollup.
     """
-    from datetime import date as date_type, timedelta
-    
-    # Determine which worker(s) to query
-    from ..auth.security import _has_permission
-    
-    is_user_admin = is_admin(user, db)
-    is_user_supervisor = is_supervisor(user, db)
-    has_hr_read = _has_permission(user, "hr:attendance:read")
-    has_permission = is_user_admin or is_user_supervisor or has_hr_read
-    
-    # If worker_id is provided, use that specific worker
-    # If worker_id is not provided and user has permission, get all workers
-    # Otherwise, use current user only
-    target_worker_ids = []
-    if worker_id:
-        # Check if user has permission to view other workers' attendance
-        if not has_permission:
-            # If no permission, only allow viewing own summary
-            if str(worker_id) != str(user.id):
-                raise HTTPException(
-                    status_code=403,
-                    detail="You do not have permission to view other workers' attendance summaries"
-                )
-            target_worker_ids = [user.id]
-        else:
-            try:
-                target_worker_ids = [uuid.UUID(worker_id)]
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid worker_id format")
-    elif has_permission:
-        # Get all workers (users with employee profiles or all users)
-        all_workers = db.query(User.id).all()
-        target_worker_ids = [w.id for w in all_workers]
-    else:
-        # No permission, only current user (all users can view their own summary)
-        target_worker_ids = [user.id]
-    
+    has_permission, explicit_worker_id = _summary_target_worker(worker_id, user, db)
+
     # Calculate week start (Sunday) - ensure it's always a Sunday
+    week_start_date = None
     if week_start:
         try:
-            week_start_date = datetime.fromisoformat(week_start).date()
-            # Ensure the provided date is actually a Sunday
-            # weekday() returns: Monday=0, Tuesday=1, ..., Sunday=6
-            day_of_week = week_start_date.weekday()
-            if day_of_week != 6:  # Not Sunday
-                # Calculate days to subtract to get to Sunday
-                days_to_subtract = (day_of_week + 1) % 7
-                week_start_date = week_start_date - timedelta(days=days_to_subtract)
-        except:
-            today = date_type.today()
-            days_since_sunday = today.weekday() + 1
-            if days_since_sunday == 7:
-                days_since_sunday = 0
-            week_start_date = today - timedelta(days=days_since_sunday)
-    else:
-        today = date_type.today()
-        days_since_sunday = today.weekday() + 1
-        if days_since_sunday == 7:
-            days_since_sunday = 0
-        week_start_date = today - timedelta(days=days_since_sunday)
-    
+            week_start_date = _sunday_on_or_before(datetime.fromisoformat(week_start).date())
+        except ValueError:
+            week_start_date = None
+    if week_start_date is None:
+        week_start_date = _sunday_on_or_before(date.today())
     # Week end is always Saturday (6 days after Sunday = 7 days total)
-    week_end_date = week_start_date + timedelta(days=6)  # Saturday
-    
-    # Get all attendances for this week - NEW MODEL: each record is already a complete event
-    # Use clock_in_time for date filtering (or clock_out_time if clock_in_time is null)
-    week_start_dt = datetime.combine(week_start_date, time.min).replace(tzinfo=timezone.utc)
-    week_end_dt = datetime.combine(week_end_date + timedelta(days=1), time.min).replace(tzinfo=timezone.utc)
-    
-    # Query attendances where clock_in_time or clock_out_time falls within the week for all target workers
-    attendances = db.query(Attendance).filter(
-        Attendance.worker_id.in_(target_worker_ids),
-        or_(
-            and_(
-                Attendance.clock_in_time.isnot(None),
-                Attendance.clock_in_time >= week_start_dt,
-                Attendance.clock_in_time < week_end_dt
-            ),
-            and_(
-                Attendance.clock_in_time.is_(None),
-                Attendance.clock_out_time.isnot(None),
-                Attendance.clock_out_time >= week_start_dt,
-                Attendance.clock_out_time < week_end_dt
-            )
+    week_end_date = week_start_date + timedelta(days=6)
+
+    next_cursor = None
+    if explicit_worker_id is not None:
+        target_worker_ids = [explicit_worker_id]
+    elif has_permission:
+        target_worker_ids, next_cursor = worker_page(db, week_start_date, week_end_date, limit=limit, cursor=cursor)
+    else:
+        target_worker_ids = [user.id]
+
+    # Events of the week by local work date - each attendance record is already a complete event
+    entries = []
+    if target_worker_ids:
+        lo, hi = local_days_utc(week_start_date, week_end_date)
+        ts = func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time)
+        entries = (
+            ledger_query(db, LedgerFilters())
+            .filter(Attendance.worker_id.in_(target_worker_ids), ts >= lo, ts < hi)
+            .order_by(Attendance.worker_id.asc(), ts.asc(), Attendance.id.asc())
+            .all()
         )
-    ).order_by(
-        Attendance.worker_id.asc(),
-        func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time).asc()
-    ).all()
-    
-    # Get worker names mapping for all workers
-    worker_names_map = {}
-    for worker_id in target_worker_ids:
-        worker_user = db.query(User).filter(User.id == worker_id).first()
-        worker_name = worker_user.username if worker_user else "Employee"
-        if worker_user:
-            worker_profile = db.query(EmployeeProfile).filter(EmployeeProfile.user_id == worker_id).first()
-            if worker_profile:
-                name = (worker_profile.preferred_name or "").strip()
-                if not name:
-                    first = (worker_profile.first_name or "").strip()
-                    last = (worker_profile.last_name or "").strip()
-                    if first or last:
-                        name = f"{first} {last}".strip()
-                if name:
-                    worker_name = name
-        worker_names_map[worker_id] = worker_name
-    
-    direct_job_types = [
-        parse_job_type_from_reason_text(att.reason_text)
-        for att in attendances
-        if not att.shift_id and att.reason_text
-    ]
-    projects_by_id = load_projects_by_id(
+    worker_names_map = _summary_worker_names(db, target_worker_ids)
+    policy = load_break_policy(db)
+    shift_deletions = deleted_shift_info(
         db,
-        collect_project_ids_from_job_types([jt for jt in direct_job_types if jt]),
+        {
+            r.Attendance.shift_id
+            for r in entries
+            if r.Attendance.shift_id and (r.shift_row_id is None or r.shift_status == "deleted")
+        },
     )
+    job_types = [
+        r.job_name if r.Attendance.shift_id else parse_job_type_from_reason_text(r.Attendance.reason_text)
+        for r in entries
+    ]
+    projects_by_id = load_projects_by_id(db, collect_project_ids_from_job_types(job_types))
+
+    days: Dict[date, list] = {}
+    for row, job_type in zip(entries, job_types):
+        attendance = row.Attendance
+        event_date = attendance_work_date(attendance.clock_in_time, attendance.clock_out_time)
+        if event_date is None or not attendance.clock_in_time:
+            continue  # clock-out only records are not listed
 
-    # Group attendances by date and worker - each attendance is already a complete event
-    daily_entries = {}
-    
-    for attendance in attendances:
-        # Determine the date for this event (use clock_in_time if available, otherwise clock_out_time)
-        event_date = None
-        if attendance.clock_in_time:
-            event_date = attendance.clock_in_time.date()
-        elif attendance.clock_out_time:
-            event_date = attendance.clock_out_time.date()
-        else:
-            continue  # Skip if neither clock_in nor clock_out exists
-        
-        if event_date < week_start_date or event_date > week_end_date:
-            continue
-        
-        date_str = event_date.isoformat()
-        
-        # Initialize daily entry if not exists
-        if date_str not in daily_entries:
-            daily_entries[date_str] = {
-                "date": date_str,
-                "events": [],  # List of events (each attendance is already a complete event)
-            }
-        
-        # Extract job_type and project_name for this attendance
-        job_type = None
         project_name = None
-        shift_deleted = False
-        shift_deleted_by = None
-        shift_deleted_at = None
-        
         if attendance.shift_id:
-            # Scheduled attendance - get from shift
-            shift = db.query(Shift).filter(Shift.id == attendance.shift_id).first()
-            # Detect soft-deleted shifts (status="deleted") or missing shift
-            if (shift is None) or (getattr(shift, "status", None) == "deleted"):
-                shift_deleted = True
-                # Get information about who deleted the shift from audit log
-                delete_log = db.query(AuditLog).filter(
-                    AuditLog.entity_type == "shift",
-                    AuditLog.entity_id == attendance.shift_id,
-                    AuditLog.action == "DELETE"
-                ).order_by(AuditLog.timestamp_utc.desc()).first()
-                if delete_log:
-                    shift_deleted_at = delete_log.timestamp_utc.isoformat() if delete_log.timestamp_utc else None
-                    actor = db.query(User).filter(User.id == delete_log.actor_id).first()
-                    if actor:
-                        shift_deleted_by = actor.username or actor.email or str(delete_log.actor_id)
-                    else:
-                        shift_deleted_by = str(delete_log.actor_id)
-            if shift:
-                job_type = shift.job_name
-                # Get project name if it's not a predefined job
-                if shift.project_id:
-                    project = db.query(Project).filter(Project.id == shift.project_id).first()
-                    if project:
-                        project_name = project.name
+            # Scheduled attendance - job and project come from the shift
+            project_name = row.project_name if row.shift_row_id is not None else None
+            if row.shift_row_id is None:
+                job_type = None
+        elif job_type:
+            _, project_name = resolve_job_label(db, job_type, projects_by_id=projects_by_id)
+        if job_type:
+            job_name, _ = resolve_job_label(db, job_type, project_name=project_name, projects_by_id=projects_by_id)
         else:
-            job_type = parse_job_type_from_reason_text(attendance.reason_text)
-            if job_type:
-                _, resolved_project_name = resolve_job_label(
-                    db,
-                    job_type,
-                    projects_by_id=projects_by_id,
-                )
-                if resolved_project_name:
-                    project_name = resolved_project_name
-        
-        # Extract HOURS_WORKED from reason_text if present
-        hours_worked = None
-        reason = attendance.reason_text or ""
-        if "HOURS_WORKED:" in reason:
-            parts = reason.split("|")
-            for part in parts:
-                if part.startswith("HOURS_WORKED:"):
-                    try:
-                        hours_worked = float(part.replace("HOURS_WORKED:", ""))
-                    except:
-                        pass
-                    break
-        
-        # Calculate break minutes using the same function as the attendance table
-        # This ensures consistency between the attendance table and weekly summary
-        from ..routes.settings import calculate_break_minutes as calc_break
-        break_minutes_calculated = None
-        if attendance.clock_in_time and attendance.clock_out_time:
-            break_minutes_calculated = calc_break(
-                db, attendance.worker_id, attendance.clock_in_time, attendance.clock_out_time
+            job_name = project_name or "Unknown"
+
+        # "Hours worked" entries show no clock times; minutes still come from clock-in/out
+        is_hours_worked = "HOURS_WORKED:" in (attendance.reason_text or "")
+        completed = attendance.clock_out_time is not None
+        if completed:
+            gross = int((attendance.clock_out_time - attendance.clock_in_time).total_seconds() / 60)
+            break_minutes = entry_break_minutes(
+                attendance.worker_id, attendance.clock_in_time, attendance.clock_out_time, attendance.break_minutes, policy
             )
-        # Use calculated break_minutes if available, otherwise fall back to stored value
-        final_break_minutes = break_minutes_calculated if break_minutes_calculated is not None else (attendance.break_minutes if attendance.break_minutes is not None else 0)
-        
-        # Get worker name for this attendance
-        worker_name = worker_names_map.get(attendance.worker_id, "Employee")
-        worker_can_edit = attendance_edit_fields(attendance, user)["can_edit"]
-        
-        # Add event - each attendance is already a complete event
-        daily_entries[date_str]["events"].append({
+            net_minutes = max(0, gross - break_minutes)
+        else:
+            break_minutes = net_minutes = 0
+        shift_deleted = bool(attendance.shift_id) and (row.shift_row_id is None or row.shift_status == "deleted")
+        shift_deleted_at, shift_deleted_by = shift_deletions.get(str(attendance.shift_id), (None, None))
+
+        days.setdefault(event_date, []).append({
+            "date": event_date.isoformat(),
+            "day_name": event_date.strftime("%a").lower(),  # mon, tue, etc.
             "attendance_id": str(attendance.id),
             "shift_id": str(attendance.shift_id) if attendance.shift_id else None,
             "status": attendance.status,
             "approved_by": str(attendance.approved_by) if attendance.approved_by else None,
-            "can_edit": worker_can_edit,
+            "can_edit": attendance_edit_fields(attendance, user)["can_edit"],
             "reason_text": attendance.reason_text,
-            "clock_in": {
-                "id": str(attendance.id),
-                "time": attendance.clock_in_time.isoformat() if attendance.clock_in_time else None,
-                "status": attendance.status,
-                "reason_text": attendance.reason_text,
-            } if attendance.clock_in_time else None,
-            "clock_out": {
-                "id": str(attendance.id),
-                "time": attendance.clock_out_time.isoformat() if attendance.clock_out_time else None,
-                "status": attendance.status,
-                "reason_text": attendance.reason_text,
-            } if attendance.clock_out_time else None,
-            "job_type": job_type,
-            "project_name": project_name,
             "service_item": parse_service_item_from_reason_text(attendance.reason_text),
-            "hours_worked": hours_worked,
-            "break_minutes": final_break_minutes,
+            "clock_in": None if (completed and is_hours_worked) else attendance.clock_in_time.isoformat(),
+            "clock_out": attendance.clock_out_time.isoformat() if (completed and not is_hours_worked) else None,
+            "clock_in_status": attendance.status,
+            "clock_out_status": attendance.status if completed else None,
+            "job_type": job_type,
+            "job_name": job_name,
+            "hours_worked_minutes": net_minutes,
+            "hours_worked_formatted": _minutes_formatted(net_minutes),
+            "break_minutes": break_minutes,
+            "break_formatted": f"{break_minutes}m" if break_minutes > 0 else None,
             "worker_id": str(attendance.worker_id),
-            "worker_name": worker_name,
+            "worker_name": worker_names_map.get(attendance.worker_id, "Employee"),
             "shift_deleted": shift_deleted,
             "shift_deleted_by": shift_deleted_by,
             "shift_deleted_at": shift_deleted_at,
         })
-    
-    # Calculate hours worked for each day - handle multiple events per day
-    result = []
-    total_minutes = 0  # Net minutes (after break deduction) - used for "Total"
-    total_gross_minutes = 0  # Gross minutes (before break deduction) - used to calculate "Reg"
-    
-    for i in range(7):  # Sunday to Saturday
-        current_date = week_start_date + timedelta(days=i)
-        date_str = current_date.isoformat()
-        
-        entry = daily_entries.get(date_str, {
-            "date": date_str,
-            "events": [],
-        })
-        
-        # Calculate total hours for the day (sum of all completed events, minus breaks)
-        day_total_minutes = 0  # Net minutes for the day
-        day_gross_minutes = 0  # Gross minutes for the day (before break)
-        day_break_minutes = 0
-        events_list = []
-        
-        for event in entry["events"]:
-            # Check if this is a "hours worked" entry
-            hours_value = event.get("hours_worked")
-            is_hours_worked = hours_value is not None
-            
-            # If not found, try to extract from clock-in or clock-out reason_text as fallback
-            if not is_hours_worked:
-                clock_in_reason = event.get("clock_in", {}).get("reason_text") if isinstance(event.get("clock_in"), dict) else None
-                clock_out_reason = event.get("clock_out", {}).get("reason_text") if isinstance(event.get("clock_out"), dict) else None
-                
-                # Try clock-in first, then clock-out
-                for reason in [clock_in_reason, clock_out_reason]:
-                    if reason and "HOURS_WORKED:" in reason:
-                        parts = reason.split("|")
-                        for part in parts:
-                            if part.startswith("HOURS_WORKED:"):
-                                try:
-                                    hours_value = float(part.replace("HOURS_WORKED:", ""))
-                                    is_hours_worked = True
-                                    break
-                                except:
-                                    pass
-                        if is_hours_worked:
-                            break
-            
-            clock_in_time_str = event.get("clock_in", {}).get("time") if isinstance(event.get("clock_in"), dict) else None
-            clock_out_time_str = event.get("clock_out", {}).get("time") if isinstance(event.get("clock_out"), dict) else None
-            clock_in_status = event.get("clock_in", {}).get("status") if isinstance(event.get("clock_in"), dict) else None
-            clock_out_status = event.get("clock_out", {}).get("status") if isinstance(event.get("clock_out"), dict) else None
-            
-            if clock_in_time_str and clock_out_time_str:
-                # Completed event - calculate hours
-                # Always calculate from clock-in/out times to ensure consistency with attendance table
-                # This matches exactly how the attendance table calculates hours_worked
-                clock_in_time = datetime.fromisoformat(clock_in_time_str)
-                clock_out_time = datetime.fromisoformat(clock_out_time_str)
-                diff = clock_out_time - clock_in_time
-                event_gross_minutes = int(diff.total_seconds() / 60)  # Gross minutes (before break)
-                
-                # Get break minutes from event (already calculated using same function as attendance table)
-                break_minutes = event.get("break_minutes", 0) or 0
-                
-                # For "hours worked" entries, if hours_value is provided, use it as the net value
-                # Otherwise, calculate net by subtracting break (same as attendance table)
-                if is_hours_worked and hours_value is not None:
-                    # For "hours worked" entries, the hours_value might be the net value
-                    # But to be consistent, let's calculate from times and subtract break
-                    # This ensures we always use the same calculation as the attendance table
-                    net_minutes = max(0, event_gross_minutes - break_minutes)
-                else:
-                    # Regular entry: calculate total from times, then subtract break
-                    # This matches exactly what the attendance table does
-                    net_minutes = max(0, event_gross_minutes - break_minutes)
-                
-                # Determine job name
-                job_name = "Unknown"
-                if event["job_type"]:
-                    job_name, _ = resolve_job_label(
-                        db,
-                        event["job_type"],
-                        project_name=event.get("project_name"),
-                        projects_by_id=projects_by_id,
-                    )
-                elif event["project_name"]:
-                    job_name = event["project_name"]
-                
-                day_break_minutes += break_minutes
-                day_total_minutes += net_minutes  # Net (after break)
-                day_gross_minutes += event_gross_minutes  # Gross (before break)
-                
-                events_list.append({
-                    "attendance_id": event.get("attendance_id"),
-                    "shift_id": event.get("shift_id"),
-                    "status": event.get("status"),
-                    "approved_by": event.get("approved_by"),
-                    "can_edit": event.get("can_edit", True),
-                    "reason_text": event.get("reason_text"),
-                    "service_item": event.get("service_item"),
-                    "clock_in": None if is_hours_worked else clock_in_time_str,
-                    "clock_out": None if is_hours_worked else clock_out_time_str,
-                    "clock_in_status": clock_in_status,
-                    "clock_out_status": clock_out_status,
-                    "job_type": event["job_type"],
-                    "job_name": job_name,
-                    "hours_worked_minutes": net_minutes,
-                    "hours_worked_formatted": f"{net_minutes // 60}h {net_minutes % 60:02d}m",
-                    "break_minutes": break_minutes,
-                    "break_formatted": f"{break_minutes}m" if break_minutes > 0 else None,
-                    "worker_id": event.get("worker_id"),
-                    "worker_name": event.get("worker_name", "Employee"),
-                    "shift_deleted": bool(event.get("shift_deleted", False)),
-                    "shift_deleted_by": event.get("shift_deleted_by"),
-                    "shift_deleted_at": event.get("shift_deleted_at"),
-                })
-            elif clock_in_time_str:
-                # Open event (clock-in without clock-out)
-                job_name = "Unknown"
-                if event["job_type"]:
-                    job_name, _ = resolve_job_label(
-                        db,
-                        event["job_type"],
-                        project_name=event.get("project_name"),
-                        projects_by_id=projects_by_id,
-                    )
-                elif event["project_name"]:
-                    job_name = event["project_name"]
-                
-                events_list.append({
-                    "attendance_id": event.get("attendance_id"),
-                    "shift_id": event.get("shift_id"),
-                    "status": event.get("status"),
-                    "approved_by": event.get("approved_by"),
-                    "can_edit": event.get("can_edit", True),
-                    "reason_text": event.get("reason_text"),
-                    "service_item": event.get("service_item"),
-                    "clock_in": clock_in_time_str,
-                    "clock_out": None,
-                    "clock_in_status": clock_in_status,
-                    "clock_out_status": None,
-                    "job_type": event["job_type"],
-                    "job_name": job_name,
-                    "hours_worked_minutes": 0,
-                    "hours_worked_formatted": "0h 00m",
-                    "break_minutes": 0,
-                    "break_formatted": None,
-                    "worker_id": event.get("worker_id"),
-                    "worker_name": event.get("worker_name", "Employee"),
-                    "shift_deleted": bool(event.get("shift_deleted", False)),
-                    "shift_deleted_by": event.get("shift_deleted_by"),
-                    "shift_deleted_at": event.get("shift_deleted_at"),
-                })
-        
-        total_minutes += day_total_minutes  # Net total (after break)
-        total_gross_minutes += day_gross_minutes  # Gross total (before break)
-        
-        # If there are events, add them to result
-        if events_list:
-            # Add each event as a separate entry for the day
-            for event_data in events_list:
-                result.append({
-                    "date": date_str,
-                    "day_name": current_date.strftime("%a").lower(),  # mon, tue, etc.
-                    "attendance_id": event_data.get("attendance_id"),
-                    "shift_id": event_data.get("shift_id"),
-                    "status": event_data.get("status"),
-                    "approved_by": event_data.get("approved_by"),
-                    "can_edit": event_data.get("can_edit", True),
-                    "reason_text": event_data.get("reason_text"),
-                    "service_item": event_data.get("service_item"),
-                    "clock_in": event_data["clock_in"],
-                    "clock_out": event_data["clock_out"],
-                    "clock_in_status": event_data["clock_in_status"],
-                    "clock_out_status": event_data["clock_out_status"],
-                    "job_type": event_data["job_type"],
-                    "job_name": event_data["job_name"],
-                    "hours_worked_minutes": event_data["hours_worked_minutes"],
-                    "hours_worked_formatted": event_data["hours_worked_formatted"],
-                    "break_minutes": event_data.get("break_minutes", 0),
-                    "break_formatted": event_data.get("break_formatted"),
-                    "worker_id": event_data.get("worker_id"),
-                    "worker_name": event_data.get("worker_name", "Employee"),  # Add worker name for display
-                    "shift_deleted": event_data.get("shift_deleted", False),
-                    "shift_deleted_by": event_data.get("shift_deleted_by"),
-                    "shift_deleted_at": event_data.get("shift_deleted_at"),
-                })
-    
-    # Calculate total break minutes for the week
-    total_break_minutes = 0
-    for day_entry in result:
-        total_break_minutes += day_entry.get("break_minutes", 0) or 0
-    
-    # Reg = Total de horas brutas (soma de todos os shifts sem descontar break)
-    reg_minutes = total_gross_minutes
-    # Total = Reg - Break (horas líquidas após descontar break)
+    result = [event for d in sorted(days) for event in days[d]]
+
+    totals = sum_totals(rollup_rows(db, week_start_date, week_end_date, target_worker_ids))
+    # Reg = gross minutes of completed events; Total = Reg - Break
+    reg_minutes = totals["gross_minutes"]
+    total_break_minutes = totals["break_minutes"]
     total_net_minutes = max(0, reg_minutes - total_break_minutes)
-    
+
     return {
         "week_start": week_start_date.isoformat(),
         "week_end": week_end_date.isoformat(),
         "days": result,
         "total_minutes": total_net_minutes,  # Total = Reg - Break
-        "total_hours_formatted": f"{total_net_minutes // 60}h {total_net_minutes % 60:02d}m",
-        "reg_minutes": reg_minutes,  # Reg = Total de horas brutas
-        "reg_hours_formatted": f"{reg_minutes // 60}h {reg_minutes % 60:02d}m",
+        "total_hours_formatted": _minutes_formatted(total_net_minutes),
+        "reg_minutes": reg_minutes,  # Reg = gross minutes before break
+        "reg_hours_formatted": _minutes_formatted(reg_minutes),
         "total_break_minutes": total_break_minutes,
-        "total_break_formatted": f"{total_break_minutes // 60}h {total_break_minutes % 60:02d}m",
+        "total_break_formatted": _minutes_formatted(total_break_minutes),
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/attendance/summary")
+def get_attendance_period_summary(
+    period: str = Query("week", description="week | month"),
+    start: Optional[str] = None,  # week: any YYYY-MM-DD in the week; month: YYYY-MM. Defaults to the current one.
+    worker_id: Optional[str] = None,
+    limit: int = Query(WORKER_PAGE_DEFAULT, ge=1, le=WORKER_PAGE_MAX),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Per-worker daily totals (net / gross / break minutes, status counts) for a week or month, read
+    from attendance_daily_rollup and paged by worker. Same visibility rules as /attendance/weekly-summary.
+    """
+    from calendar import monthrange
+
+    has_permission, explicit_worker_id = _summary_target_worker(worker_id, user, db)
+    try:
+        if period == "week":
+            period_start = _sunday_on_or_before(datetime.fromisoformat(start).date() if start else date.today())
+            period_end = period_start + timedelta(days=6)
+        elif period == "month":
+            period_start = datetime.strptime(start + "-01", "%Y-%m-%d").date() if start else date.today().replace(day=1)
+            period_end = period_start.replace(day=monthrange(period_start.year, period_start.month)[1])
+        else:
+            raise HTTPException(status_code=400, detail="period must be week or month")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid start")
+
+    next_cursor = None
+    if explicit_worker_id is not None:
+        worker_ids = [explicit_worker_id]
+    elif has_permission:
+        worker_ids, next_cursor = worker_page(db, period_start, period_end, limit=limit, cursor=cursor)
+    else:
+        worker_ids = [user.id]
+
+    by_worker = summarize_by_worker(rollup_rows(db, period_start, period_end, worker_ids))
+    names = _summary_worker_names(db, worker_ids)
+    workers = []
+    for wid in worker_ids:
+        summary = by_worker.get(wid)
+        if summary is None:
+            continue
+        workers.append({
+            "worker_id": str(wid),
+            "worker_name": names.get(wid, "Employee"),
+            "totals": summary["totals"],
+            "days": [{"date": d.isoformat(), **t} for d, t in summary["days"].items()],
+        })
+    return {
+        "period": period,
+        "start": period_start.isoformat(),
+        "end": period_end.isoformat(),
+        "workers": workers,
+        "next_cursor": next_cursor,
     }
 
 
@@ -2868,7 +2659,6 @@ def approve_attendance(
     note = payload.get("note", "")
     
     # Update status
-    from datetime import timezone
     attendance.status = "approved"
     attendance.approved_at = datetime.now(timezone.utc)
     attendance.approved_by = user.id
@@ -3174,7 +2964,6 @@ def reject_attendance(
         raise HTTPException(status_code=400, detail="rejection reason is required")
     
     # Update status
-    from datetime import timezone
     attendance.status = "rejected"
     attendance.rejected_at = datetime.now(timezone.utc)
     attendance.rejected_by = user.id
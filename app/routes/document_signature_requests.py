@@ -27,7 +27,7 @@ from ..models.models import (
 from ..routes.files import canonical_key, get_storage
 from ..services.onboarding_sign import (
     apply_template_field_overlays,
-    build_signed_pdf_with_certificate_from_merged,
+    build_signed_pdf_from_template,
 )
 from ..services.onboarding_signature_template import (
     filter_fields_for_document_role,
@@ -635,7 +635,6 @@ async def me_sign(
 
     ep = db.query(EmployeeProfile).filter(EmployeeProfile.user_id == user.id).first()
     resolved = validate_field_values_for_signing(my_fields, fv, ep, user)
-    merged = apply_template_field_overlays(base_pdf, my_fields, resolved)
 
     now = datetime.now(timezone.utc)
     parts = _participants_for(db, row.id)
@@ -683,8 +682,10 @@ async def me_sign(
                 }
             )
 
-        final_pdf, _cert_hash = build_signed_pdf_with_certificate_from_merged(
-            merged,
+        final_pdf, _cert_hash = build_signed_pdf_from_template(
+            base_pdf,
+            my_fields,
+            resolved,
             document_name=row.display_name,
             document_id=str(row.id),
             base_doc_hash=base_hash,
@@ -728,6 +729,7 @@ async def me_sign(
         return _request_dict(row, db, my_participant=part)
 
     # Intermediate turn: save overlays only, advance next participant
+    merged = apply_template_field_overlays(base_pdf, my_fields, resolved)
     fname = f"{safe_name}_partial_{part.role}_{now.strftime('%Y%m%d%H%M%S')}.pdf"
     current_fo = save_document_signature_pdf(
         db,
@@ -3,7 +3,6 @@ from datetime import datetime, timezone
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
 from ..auth.security import get_current_user, require_permissions
@@ -11,7 +10,14 @@ from ..db import get_db
 from ..models.models import DocumentSignatureTemplate, FileObject, User
 from ..services.onboarding_signature_template import validate_and_normalize_template
 from ..services.onboarding_storage import read_file_object_bytes
-from ..services.pdf_page_preview import inline_pdf_response, pdf_first_page_png
+from ..services.pdf_page_preview import (
+    cached_pdf_page_png,
+    cached_pdf_sprite,
+    clamp_page_width,
+    clamp_thumbnail_width,
+    inline_pdf_response,
+    png_response,
+)
 from ..utils.pdf_hash import sha256_bytes
 
 router = APIRouter(prefix="/document-signature-templates", tags=["document-signature-templates"])
@@ -42,6 +48,16 @@ def list_templates(
     return [_row_dict(r) for r in rows]
 
 
+def _template_file(db: Session, doc_id: UUID) -> FileObject:
+    row = db.query(DocumentSignatureTemplate).filter(DocumentSignatureTemplate.id == doc_id).first()
+    if not row:
+        raise HTTPException(404, "Not found")
+    fo = db.query(FileObject).filter(FileObject.id == row.file_id).first()
+    if not fo:
+        raise HTTPException(404, "File not found")
+    return fo
+
+
 @router.get("/{doc_id}/thumbnail")
 def thumbnail(
     doc_id: UUID,
@@ -50,14 +66,47 @@ def thumbnail(
     user: User = Depends(get_current_user),
     _=Depends(require_permissions("documents:read")),
 ):
-    row = db.query(DocumentSignatureTemplate).filter(DocumentSignatureTemplate.id == doc_id).first()
-    if not row:
-        raise HTTPException(404, "Not found")
-    fo = db.query(FileObject).filter(FileObject.id == row.file_id).first()
-    if not fo:
-        raise HTTPException(404, "File not found")
-    png = pdf_first_page_png(read_file_object_bytes(db, fo), w)
-    return Response(content=png, media_type="image/png", headers={"Cache-Control": "private, max-age=3600"})
+    fo = _template_file(db, doc_id)
+    png = cached_pdf_page_png(fo.id, fo.size_bytes, 0, clamp_thumbnail_width(w), lambda: read_file_object_bytes(db, fo))
+    return png_response(png, max_age=3600)
+
+
+@router.get("/{doc_id}/pages/{page}")
+def page_image(
+    doc_id: UUID,
+    page: int,
+    w: int = 800,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    _=Depends(require_permissions("documents:read")),
+):
+    """One page (0-based) as PNG for the overlay editor."""
+    fo = _template_file(db, doc_id)
+    if page < 0:
+        raise HTTPException(404, "Page not found")
+    png = cached_pdf_page_png(fo.id, fo.size_bytes, page, clamp_page_width(w), lambda: read_file_object_bytes(db, fo))
+    return png_response(png)
+
+
+@router.get("/{doc_id}/sprite")
+def page_sprite(
+    doc_id: UUID,
+    first: int = 0,
+    count: int = 10,
+    w: int = 320,
+    format: str = "png",
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    _=Depends(require_permissions("documents:read")),
+):
+    """Pages first..first+count-1 stacked in one PNG; format=json returns the page layout."""
+    fo = _template_file(db, doc_id)
+    png, layout = cached_pdf_sprite(
+        fo.id, fo.size_bytes, first, count, clamp_thumbnail_width(w), lambda: read_file_object_bytes(db, fo)
+    )
+    if format == "json":
+        return layout
+    return png_response(png)
 
 
 @router.get("/{doc_id}/preview")
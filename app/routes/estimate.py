@@ -1228,12 +1228,9 @@ def delete_estimate(estimate_id: int, db: Session = Depends(get_db), _=Depends(r
 
 @router.get("/estimates/{estimate_id}/generate")
 async def generate_estimate_pdf(estimate_id: int, db: Session = Depends(get_db), _=Depends(require_permissions("business:projects:costs:read", "inventory:read"))):
-    from fastapi.responses import FileResponse
-    import tempfile
-    import os
-    import uuid
     from ..proposals.pdf_estimate import generate_estimate_pdf as generate_pdf
-    
+    from ..services import pdf_artifacts
+
     est = db.query(Estimate).filter(Estimate.id == estimate_id).first()
     if not est:
         raise HTTPException(status_code=404, detail="Estimate not found")
@@ -1472,16 +1469,10 @@ async def generate_estimate_pdf(estimate_id: int, db: Session = Depends(get_db),
         "page2_image": None
     }
     
-    # Create temporary output file
-    file_id = str(uuid.uuid4())
-    output_path = os.path.join(tempfile.gettempdir(), f"estimate_{file_id}.pdf")
-    
-    await generate_pdf(estimate_data, output_path)
-    
-    return FileResponse(
-        output_path,
-        media_type="application/pdf",
-        filename=f"estimate-{estimate_id}.pdf"
+    # Same estimate data -> same PDF: serve the stored artifact, render only after a change
+    path, key, hit = await pdf_artifacts.render_file(
+        "estimate", estimate_data, lambda output_path: generate_pdf(estimate_data, output_path)
     )
+    return pdf_artifacts.file_response(path, f"estimate-{estimate_id}.pdf", key, hit)
 
 
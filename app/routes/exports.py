@@ -0,0 +1,91 @@
+"""
+Background export jobs: status polling and download for exports started with mode=job
+(user activity, attendance, timesheets, fleet history).
+"""
+import uuid
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from ..auth.security import get_current_user, get_current_user_bearer_or_query_token
+from ..models.models import FileObject, User
+from ..services.exports import EXPORT_SOURCE_REF, JOB_STATUS_READY, export_job_payload
+from ..storage.local_provider import LocalStorageProvider
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+
+def _get_own_job(db: Session, job_id: str, user: User) -> FileObject:
+    try:
+        fid = uuid.UUID(str(job_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Export not found")
+    fo = (
+        db.query(FileObject)
+        .filter(
+            FileObject.id == fid,
+            FileObject.source_ref == EXPORT_SOURCE_REF,
+            FileObject.created_by == user.id,
+        )
+        .first()
+    )
+    if not fo:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return fo
+
+
+@router.get("/jobs")
+def list_export_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> List[dict]:
+    rows = (
+        db.query(FileObject)
+        .filter(FileObject.source_ref == EXPORT_SOURCE_REF, FileObject.created_by == user.id)
+        .order_by(FileObject.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    return [export_job_payload(fo) for fo in rows]
+
+
+@router.get("/jobs/{job_id}")
+def get_export_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    return export_job_payload(_get_own_job(db, job_id, user))
+
+
+@router.get("/jobs/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user_bearer_or_query_token),
+):
+    from .files import get_storage_for_file
+
+    fo = _get_own_job(db, job_id, user)
+    payload = export_job_payload(fo)
+    if payload["status"] != JOB_STATUS_READY:
+        raise HTTPException(status_code=409, detail=f"Export is {payload['status']}")
+
+    storage = get_storage_for_file(fo)
+    if isinstance(storage, LocalStorageProvider):
+        path = storage._get_path(fo.key)
+        if not path.exists():
+            raise HTTPException(status_code=404, detail="File not found")
+        return FileResponse(
+            path=str(path),
+            media_type=fo.content_type or "application/octet-stream",
+            filename=payload["filename"],
+        )
+    url = storage.get_download_url(fo.key, expires_s=300)
+    if not url:
+        raise HTTPException(status_code=404, detail="File not available in blob storage")
+    return {"download_url": url, "expires_in": 300}
@@ -6,10 +6,12 @@ from typing import Optional
 from urllib.parse import unquote, quote
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, File, UploadFile
-from fastapi.responses import Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from slugify import slugify
 import httpx
+from azure.core.exceptions import HttpResponseError
 
 # Register HEIF opener early to support HEIC/HEIF files
 try:
@@ -44,13 +46,24 @@ from ..services.image_thumbnails import (
     render_thumbnail,
     thumbnail_slot,
 )
-from ..storage.blob_provider import BlobStorageProvider
+from ..services.pdf_page_preview import (
+    cached_pdf_page_png,
+    cached_pdf_sprite,
+    clamp_page_width,
+    clamp_thumbnail_width,
+    png_response,
+)
+from ..storage.registry import get_default_provider, get_local_provider, get_provider_for, is_blob_backed
 from ..storage.local_provider import LocalStorageProvider
-from ..storage.provider import StorageProvider
+from ..storage.aio import as_async
+from ..storage.provider import StorageProvider, UploadTooLarge
 
 
 router = APIRouter(prefix="/files", tags=["files"])
 
+# Read size for multipart uploads streamed to storage by the proxy endpoints.
+UPLOAD_READ_CHUNK = 1024 * 1024
+
 
 def _upload_via_backend_local_dev_bypass(request: Request) -> bool:
     """Browser PUT to upload-via-backend cannot attach Bearer; allow only non-prod + localhost origin."""
@@ -93,13 +106,9 @@ def get_storage() -> StorageProvider:
     Get storage provider based on configuration.
     Uses LocalStorageProvider for local development when Azure Blob is not configured.
     Uses BlobStorageProvider in production (Render) when Azure Blob is configured.
+    Providers are process-wide singletons (shared client, connection pool and SAS cache).
     """
-    # Check if Azure Blob Storage is configured
-    if settings.azure_blob_connection and settings.azure_blob_container:
-        return BlobStorageProvider()
-    else:
-        # Use local filesystem storage for development
-        return LocalStorageProvider()
+    return get_default_provider()
 
 
 def get_storage_for_file(fo: FileObject) -> StorageProvider:
@@ -108,18 +117,7 @@ def get_storage_for_file(fo: FileObject) -> StorageProvider:
     This ensures that files stored in blob storage can be accessed even in local development
     if Azure credentials are available, and files stored locally can be accessed locally.
     """
-    # If the file was stored with blob provider, try to use blob storage
-    if fo.provider == "blob":
-        # Check if Azure Blob Storage is configured (even in local dev)
-        if settings.azure_blob_connection and settings.azure_blob_container:
-            try:
-                return BlobStorageProvider()
-            except Exception:
-                # If blob provider fails, fall back to local storage
-                pass
-    
-    # For local files or if blob is not available, use local storage
-    return LocalStorageProvider()
+    return get_provider_for(fo.provider)
 
 
 def canonical_key(
@@ -189,7 +187,7 @@ def upload(
     origin = request.headers.get("origin")
     # When running locally with blob configured, return backend proxy URL so the browser
     # does not hit CORS when PUTting to Azure. File goes: browser -> our backend -> blob.
-    if isinstance(storage, BlobStorageProvider) and _is_local_origin(origin):
+    if is_blob_backed(storage) and _is_local_origin(origin):
         base = str(request.base_url).rstrip("/")
         url = f"{base}/files/upload-via-backend?key={quote(key)}"
         return UploadResponse(key=key, upload_url=url, expires_in=900)
@@ -197,6 +195,137 @@ def upload(
     return UploadResponse(key=key, upload_url=url, expires_in=900)
 
 
+def _convert_heic_upload(file_content: bytes, final_key: str, original_name: str):
+    """Convert an uploaded HEIC/HEIF to JPEG (CPU-bound; run in the threadpool).
+
+    Returns (content, content_type, key) with the key's extension switched to .jpg."""
+    import logging
+    logger = logging.getLogger(__name__)
+    final_content = file_content
+    final_content_type = "image/heic"
+    logger.info(f"Detected HEIC file in upload-proxy: {original_name}, converting to JPG")
+    try:
+        import io
+        from PIL import Image as PILImage
+
+        # Try to register pillow-heif
+        pillow_heif_available = False
+        try:
+            from pillow_heif import register_heif_opener
+            register_heif_opener()
+            pillow_heif_available = True
+            logger.info("pillow-heif opener registered successfully in upload-proxy")
+        except Exception as heif_err:
+            logger.warning(f"Could not register pillow-heif opener: {heif_err}")
+
+        if pillow_heif_available:
+            # Convert using pillow-heif
+            try:
+                buf = io.BytesIO(file_content)
+                im = PILImage.open(buf)
+                if im.mode != "RGB":
+                    im = im.convert("RGB")
+                out = io.BytesIO()
+                im.save(out, format="JPEG", quality=95)
+                final_content = out.getvalue()
+                final_content_type = "image/jpeg"
+                # Update key to use .jpg extension
+                if final_key.lower().endswith(('.heic', '.heif')):
+                    final_key = final_key.rsplit('.', 1)[0] + '.jpg'
+                else:
+                    final_key = final_key + '.jpg'
+                im.close()
+                logger.info(f"Successfully converted HEIC to JPG: {original_name}")
+            except Exception as convert_err:
+                logger.error(f"Failed to convert HEIC using pillow-heif: {convert_err}")
+                # Try CLI fallback if available
+                try:
+                    import tempfile
+                    import subprocess
+                    import platform
+                    # Check if we're on Windows - heif-convert may not be available
+                    if platform.system() == 'Windows':
+                        raise Exception("heif-convert not available on Windows")
+                    with tempfile.TemporaryDirectory() as td:
+                        src_path = os.path.join(td, "in.heic")
+                        dst_path = os.path.join(td, "out.jpg")
+                        with open(src_path, "wb") as fsrc:
+                            fsrc.write(file_content)
+                        subprocess.run(["heif-convert", "-q", "95", src_path, dst_path], check=True, timeout=30)
+                        with open(dst_path, "rb") as fdst:
+                            final_content = fdst.read()
+                    final_content_type = "image/jpeg"
+                    if final_key.lower().endswith(('.heic', '.heif')):
+                        final_key = final_key.rsplit('.', 1)[0] + '.jpg'
+                    else:
+                        final_key = final_key + '.jpg'
+                    logger.info(f"Successfully converted HEIC to JPG using heif-convert: {original_name}")
+                except Exception as cli_err:
+                    logger.error(f"HEIC conversion failed completely: {cli_err}. The file will be saved as HEIC and conversion will be attempted on access.")
+                    raise HTTPException(status_code=400, detail=f"Cannot convert HEIC file. Please install pillow-heif: pip install pillow-heif. Error: {convert_err}")
+        else:
+            # Try CLI fallback if available (non-Windows)
+            try:
+                import tempfile
+                import subprocess
+                import platform
+                if platform.system() == 'Windows':
+                    raise Exception("heif-convert not available on Windows, pillow-heif required")
+                with tempfile.TemporaryDirectory() as td:
+                    src_path = os.path.join(td, "in.heic")
+                    dst_path = os.path.join(td, "out.jpg")
+                    with open(src_path, "wb") as fsrc:
+                        fsrc.write(file_content)
+                    subprocess.run(["heif-convert", "-q", "95", src_path, dst_path], check=True, timeout=30)
+                    with open(dst_path, "rb") as fdst:
+                        final_content = fdst.read()
+                final_content_type = "image/jpeg"
+                if final_key.lower().endswith(('.heic', '.heif')):
+                    final_key = final_key.rsplit('.', 1)[0] + '.jpg'
+                else:
+                    final_key = final_key + '.jpg'
+                logger.info(f"Successfully converted HEIC to JPG using heif-convert: {original_name}")
+            except Exception as cli_err:
+                logger.error(f"HEIC conversion failed: {cli_err}")
+                raise HTTPException(status_code=400, detail=f"Cannot convert HEIC file. Please install pillow-heif: pip install pillow-heif")
+    except HTTPException:
+        raise
+    except Exception as conv_err:
+        logger.error(f"HEIC conversion error: {conv_err}")
+        raise HTTPException(status_code=400, detail=f"Cannot convert HEIC file. Please install pillow-heif: pip install pillow-heif. Error: {conv_err}")
+    return final_content, final_content_type, final_key
+
+
+def _upload_too_large(db: Session, request: Request) -> HTTPException:
+    try:
+        from ..services.system_log import write_system_log
+        write_system_log(
+            db,
+            "warning",
+            "upload",
+            "File too large",
+            request_id=getattr(request.state, "request_id", None),
+            path=request.url.path,
+            method=request.method,
+            status_code=413,
+            detail="file_too_large",
+        )
+    except Exception:
+        pass
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {settings.upload_max_mb} MB.",
+    )
+
+
+async def _iter_upload(file: UploadFile):
+    while True:
+        chunk = await file.read(UPLOAD_READ_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+
 @router.post("/upload-proxy")
 async def upload_proxy(
     request: Request,
@@ -242,54 +371,7 @@ async def upload_proxy(
     max_bytes = settings.upload_max_mb * 1024 * 1024
     content_length = request.headers.get("content-length")
     if content_length and int(content_length) > max_bytes:
-        try:
-            from ..services.system_log import write_system_log
-            write_system_log(
-                db,
-                "warning",
-                "upload",
-                "File too large",
-                request_id=getattr(request.state, "request_id", None),
-                path=request.url.path,
-                method=request.method,
-                status_code=413,
-                detail="file_too_large",
-            )
-        except Exception:
-            pass
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size is {settings.upload_max_mb} MB.",
-        )
-
-    # Read file content (in chunks to enforce size limit when Content-Length is missing)
-    file_content = b""
-    chunk_size = 1024 * 1024  # 1 MB
-    while True:
-        chunk = await file.read(chunk_size)
-        if not chunk:
-            break
-        file_content += chunk
-        if len(file_content) > max_bytes:
-            try:
-                from ..services.system_log import write_system_log
-                write_system_log(
-                    db,
-                    "warning",
-                    "upload",
-                    "File too large",
-                    request_id=getattr(request.state, "request_id", None),
-                    path=request.url.path,
-                    method=request.method,
-                    status_code=413,
-                    detail="file_too_large",
-                )
-            except Exception:
-                pass
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large. Maximum size is {settings.upload_max_mb} MB.",
-            )
+        raise _upload_too_large(db, request)
 
     # Use provided original_name or filename from upload
     if not original_name or original_name == "upload":
@@ -302,8 +384,6 @@ async def upload_proxy(
     if original_name.lower().endswith(('.heic', '.heif')):
         is_heic = True
     
-    # If HEIC, convert to JPG first
-    final_content = file_content
     final_content_type = content_type
     final_key = canonical_key(
         project_code=(project_id or client_id or "misc"),
@@ -312,117 +392,29 @@ async def upload_proxy(
         original_name=original_name,
     )
     final_key = unique_upload_key(final_key)
-    
-    if is_heic:
-        logger.info(f"Detected HEIC file in upload-proxy: {original_name}, converting to JPG")
-        try:
-            import io
-            from PIL import Image as PILImage
-            
-            # Try to register pillow-heif
-            pillow_heif_available = False
-            try:
-                from pillow_heif import register_heif_opener
-                register_heif_opener()
-                pillow_heif_available = True
-                logger.info("pillow-heif opener registered successfully in upload-proxy")
-            except Exception as heif_err:
-                logger.warning(f"Could not register pillow-heif opener: {heif_err}")
-            
-            if pillow_heif_available:
-                # Convert using pillow-heif
-                try:
-                    buf = io.BytesIO(file_content)
-                    im = PILImage.open(buf)
-                    if im.mode != "RGB":
-                        im = im.convert("RGB")
-                    out = io.BytesIO()
-                    im.save(out, format="JPEG", quality=95)
-                    final_content = out.getvalue()
-                    final_content_type = "image/jpeg"
-                    # Update key to use .jpg extension
-                    if final_key.lower().endswith(('.heic', '.heif')):
-                        final_key = final_key.rsplit('.', 1)[0] + '.jpg'
-                    else:
-                        final_key = final_key + '.jpg'
-                    im.close()
-                    logger.info(f"Successfully converted HEIC to JPG: {original_name}")
-                except Exception as convert_err:
-                    logger.error(f"Failed to convert HEIC using pillow-heif: {convert_err}")
-                    # Try CLI fallback if available
-                    try:
-                        import tempfile
-                        import subprocess
-                        import platform
-                        # Check if we're on Windows - heif-convert may not be available
-                        if platform.system() == 'Windows':
-                            raise Exception("heif-convert not available on Windows")
-                        with tempfile.TemporaryDirectory() as td:
-                            src_path = os.path.join(td, "in.heic")
-                            dst_path = os.path.join(td, "out.jpg")
-                            with open(src_path, "wb") as fsrc:
-                                fsrc.write(file_content)
-                            subprocess.run(["heif-convert", "-q", "95", src_path, dst_path], check=True, timeout=30)
-                            with open(dst_path, "rb") as fdst:
-                                final_content = fdst.read()
-                        final_content_type = "image/jpeg"
-                        if final_key.lower().endswith(('.heic', '.heif')):
-                            final_key = final_key.rsplit('.', 1)[0] + '.jpg'
-                        else:
-                            final_key = final_key + '.jpg'
-                        logger.info(f"Successfully converted HEIC to JPG using heif-convert: {original_name}")
-                    except Exception as cli_err:
-                        logger.error(f"HEIC conversion failed completely: {cli_err}. The file will be saved as HEIC and conversion will be attempted on access.")
-                        raise HTTPException(status_code=400, detail=f"Cannot convert HEIC file. Please install pillow-heif: pip install pillow-heif. Error: {convert_err}")
-            else:
-                # Try CLI fallback if available (non-Windows)
-                try:
-                    import tempfile
-                    import subprocess
-                    import platform
-                    if platform.system() == 'Windows':
-                        raise Exception("heif-convert not available on Windows, pillow-heif required")
-                    with tempfile.TemporaryDirectory() as td:
-                        src_path = os.path.join(td, "in.heic")
-                        dst_path = os.path.join(td, "out.jpg")
-                        with open(src_path, "wb") as fsrc:
-                            fsrc.write(file_content)
-                        subprocess.run(["heif-convert", "-q", "95", src_path, dst_path], check=True, timeout=30)
-                        with open(dst_path, "rb") as fdst:
-                            final_content = fdst.read()
-                    final_content_type = "image/jpeg"
-                    if final_key.lower().endswith(('.heic', '.heif')):
-                        final_key = final_key.rsplit('.', 1)[0] + '.jpg'
-                    else:
-                        final_key = final_key + '.jpg'
-                    logger.info(f"Successfully converted HEIC to JPG using heif-convert: {original_name}")
-                except Exception as cli_err:
-                    logger.error(f"HEIC conversion failed: {cli_err}")
-                    raise HTTPException(status_code=400, detail=f"Cannot convert HEIC file. Please install pillow-heif: pip install pillow-heif")
-        except HTTPException:
-            raise
-        except Exception as conv_err:
-            logger.error(f"HEIC conversion error: {conv_err}")
-            raise HTTPException(status_code=400, detail=f"Cannot convert HEIC file. Please install pillow-heif: pip install pillow-heif. Error: {conv_err}")
-    
-    # Generate upload URL with final key and content type
-    upload_url = storage.generate_upload_url(final_key, final_content_type, expires_s=900)
-    
-    # Upload to Azure Blob Storage via backend
-    async with httpx.AsyncClient() as client:
-        try:
-            put_resp = await client.put(
-                upload_url,
-                content=final_content,
-                headers={
-                    "Content-Type": final_content_type,
-                    "x-ms-blob-type": "BlockBlob"
-                },
-                timeout=60.0
+
+    # Stream to storage in blocks (HEIC must be buffered for conversion to JPG first)
+    astorage = as_async(storage)
+    try:
+        if is_heic:
+            file_content = bytearray()
+            async for chunk in _iter_upload(file):
+                file_content.extend(chunk)
+                if len(file_content) > max_bytes:
+                    raise UploadTooLarge(final_key)
+            final_content, final_content_type, final_key = await run_in_threadpool(
+                _convert_heic_upload, bytes(file_content), final_key, original_name
             )
-            put_resp.raise_for_status()
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to upload to Azure: {str(e)}")
+            size_bytes = await astorage.put(final_key, final_content, final_content_type)
+        else:
+            size_bytes = await astorage.put(final_key, _iter_upload(file), final_content_type, max_bytes=max_bytes)
+    except UploadTooLarge:
+        raise _upload_too_large(db, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"upload-proxy storage write failed for {final_key}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to upload to storage: {str(e)}")
     
     # Confirm upload
     try:
@@ -444,7 +436,7 @@ async def upload_proxy(
             provider=provider,
             container=container,
             key=final_key,
-            size_bytes=len(final_content),
+            size_bytes=size_bytes,
             checksum_sha256="na",
             content_type=final_content_type,
             **_fo_kw,
@@ -455,6 +447,7 @@ async def upload_proxy(
         return {"id": str(fo.id), "key": final_key}
     except Exception as e:
         db.rollback()
+        logger.error(f"upload-proxy confirm failed for {final_key}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to confirm upload: {str(e)}")
 
 
@@ -503,8 +496,6 @@ def confirm(
         logger.info(f"Detected HEIC file: {original_key}, content_type: {content_type}")
         try:
             import io
-            import httpx
-            import time
             from PIL import Image as PILImage
             
             # Ensure pillow-heif is registered and working
@@ -540,16 +531,7 @@ def confirm(
                 try:
                     import tempfile
                     import subprocess
-                    # Small delay to ensure Azure blob is available
-                    time.sleep(0.5)
-                    download_url = storage.get_download_url(original_key, expires_s=300)
-                    if not download_url:
-                        raise ValueError("Could not get download URL for HEIC file")
-                    with httpx.stream("GET", download_url, timeout=30.0) as r:
-                        r.raise_for_status()
-                        file_content = b""
-                        for chunk in r.iter_bytes():
-                            file_content += chunk
+                    file_content = storage.read_bytes(original_key)
                     if len(file_content) == 0:
                         raise ValueError("Downloaded HEIC file is empty")
                     with tempfile.TemporaryDirectory() as td:
@@ -571,14 +553,7 @@ def confirm(
                         jpg_key = original_key[:-5] + '.jpg'
                     else:
                         jpg_key = original_key.rsplit('.', 1)[0] + '.jpg'
-                    upload_url = storage.generate_upload_url(jpg_key, "image/jpeg", expires_s=900)
-                    put_resp = httpx.put(
-                        upload_url,
-                        content=jpg_content,
-                        headers={"Content-Type": "image/jpeg", "x-ms-blob-type": "BlockBlob"},
-                        timeout=30.0
-                    )
-                    put_resp.raise_for_status()
+                    storage.put_chunks(jpg_key, [jpg_content], "image/jpeg")
                     # Determine provider and container based on storage type
                     if isinstance(storage, LocalStorageProvider):
                         provider = "local"
@@ -603,22 +578,8 @@ def confirm(
                     logger.warning(f"heif-convert fallback failed for {original_key}: {cli_err}. Saving HEIC as-is.", exc_info=True)
                     # Fall through to save the original HEIC file
             
-            # Small delay to ensure Azure blob is available
-            time.sleep(0.5)
-            
-            # Download the HEIC file from storage
-            download_url = storage.get_download_url(original_key, expires_s=300)
-            if not download_url:
-                raise ValueError("Could not get download URL for HEIC file")
-            
-            logger.info(f"Downloading HEIC from Azure: {download_url[:100]}...")
-            
-            # Download and convert
-            with httpx.stream("GET", download_url, timeout=30.0) as r:
-                r.raise_for_status()
-                file_content = b""
-                for chunk in r.iter_bytes():
-                    file_content += chunk
+            # Read the HEIC file straight from storage (SDK / filesystem, no signed-URL round trip)
+            file_content = storage.read_bytes(original_key)
             
             logger.info(f"Downloaded {len(file_content)} bytes")
             
@@ -668,17 +629,7 @@ def confirm(
             
             logger.info(f"Uploading converted JPG to Azure: {jpg_key}")
             
-            # Generate upload URL for JPG
-            upload_url = storage.generate_upload_url(jpg_key, "image/jpeg", expires_s=900)
-            
-            # Upload JPG
-            put_resp = httpx.put(
-                upload_url,
-                content=jpg_content,
-                headers={"Content-Type": "image/jpeg", "x-ms-blob-type": "BlockBlob"},
-                timeout=30.0
-            )
-            put_resp.raise_for_status()
+            storage.put_chunks(jpg_key, [jpg_content], "image/jpeg")
             
             logger.info(f"Successfully converted and uploaded JPG: {jpg_key}")
             
@@ -747,7 +698,7 @@ async def upload_via_backend(
     """
     if not key:
         raise HTTPException(status_code=400, detail="key is required")
-    if not isinstance(storage, BlobStorageProvider):
+    if not is_blob_backed(storage):
         raise HTTPException(
             status_code=400,
             detail="upload-via-backend is only for blob storage; configure AZURE_BLOB_* locally",
@@ -766,10 +717,16 @@ async def upload_via_backend(
             employee_id=e,
             category_id=cat,
         )
-    body = await request.body()
+    max_bytes = settings.upload_max_mb * 1024 * 1024
     try:
-        import io
-        storage.copy_in(io.BytesIO(body), key_decoded)
+        await as_async(storage).put(
+            key_decoded,
+            request.stream(),
+            request.headers.get("content-type"),
+            max_bytes=max_bytes,
+        )
+    except UploadTooLarge:
+        raise _upload_too_large(db, request)
     except Exception as e:
         import logging
         logging.getLogger(__name__).exception("upload_via_backend failed")
@@ -790,7 +747,7 @@ def serve_local_file(
     # Security: prevent directory traversal
     clean_path = unquote(file_path).lstrip("/").replace("..", "").replace("\\", "/")
     assert_can_read_storage_key(user, db, clean_path)
-    local_storage = LocalStorageProvider()
+    local_storage = get_local_provider()
     file_path_obj = local_storage._get_path(clean_path)
     
     # Ensure the file is within the storage directory
@@ -829,7 +786,7 @@ def serve_local_file_inline(
 
     clean_path = unquote(file_path).lstrip("/").replace("..", "").replace("\\", "/")
     assert_can_read_storage_key(user, db, clean_path)
-    local_storage = LocalStorageProvider()
+    local_storage = get_local_provider()
     file_path_obj = local_storage._get_path(clean_path)
 
     storage_base = local_storage.base_dir.resolve()
@@ -903,20 +860,22 @@ def serve_file_inline_by_id(
             headers={"Content-Disposition": "inline"},
         )
 
-    url = storage.get_download_url(fo.key, expires_s=300)
-    if not url:
-        raise HTTPException(status_code=404, detail="File not available in blob storage")
+    # Stream from storage instead of buffering the whole blob in memory.
+    chunks = storage.iter_chunks(fo.key)
     try:
-        with httpx.Client(timeout=120.0) as client:
-            r = client.get(url)
-            r.raise_for_status()
-            body = r.content
-    except httpx.HTTPError as e:
+        first = next(chunks, b"")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not available in blob storage")
+    except Exception as e:
         logger.warning("Inline fetch failed for file %s: %s", file_id, e)
         raise HTTPException(status_code=502, detail="Could not read file from storage") from e
 
-    return Response(
-        content=body,
+    def _body():
+        yield first
+        yield from chunks
+
+    return StreamingResponse(
+        _body(),
         media_type=content_type,
         headers={"Content-Disposition": "inline"},
     )
@@ -1002,26 +961,9 @@ def preview(
         u = f"{base}/files/local-inline/{key}"
         return {"preview_url": _file_url_with_access_token(u, request), "expires_in": 300}
 
-    # Blob storage: generate SAS URL with inline content disposition.
+    # Blob storage: SAS URL with inline content disposition (cached per expiry bucket).
     try:
-        from datetime import timedelta
-        from azure.storage.blob import generate_blob_sas, BlobSasPermissions
-        expiry = datetime.utcnow() + timedelta(seconds=300)
-        service = storage._service
-        container = storage._container
-        blob_name = fo.key.lstrip("/")
-        sas = generate_blob_sas(
-            account_name=service.account_name,
-            container_name=container,
-            blob_name=blob_name,
-            account_key=service.credential.account_key,
-            permission=BlobSasPermissions(read=True),
-            expiry=expiry,
-            content_disposition="inline",
-            content_type=(fo.content_type or None),
-        )
-        blob_url = service.get_blob_client(container, blob_name).url
-        return {"preview_url": f"{blob_url}?{sas}", "expires_in": 300}
+        return {"preview_url": storage.get_inline_url(fo.key, 300, fo.content_type or None), "expires_in": 300}
     except Exception:
         # Fallback to regular signed URL when inline override isn't available.
         url = storage.get_download_url(fo.key, expires_s=300)
@@ -1044,33 +986,96 @@ def _read_storage_bytes_for_thumbnail(storage, fo: FileObject, file_id: str, log
             raise HTTPException(status_code=404, detail="File not found")
         return file_path.read_bytes()
 
-    url = storage.get_download_url(fo.key, expires_s=300)
-    if not url:
-        raise HTTPException(status_code=404, detail="File not available in blob storage")
     max_bytes = int(settings.upload_max_mb) * 1024 * 1024
-    with httpx.stream("GET", url, timeout=30.0) as r:
-        if r.status_code == 404:
-            logger.warning(
-                "Thumbnail: blob missing (404) for file %s (key: %s)",
-                file_id,
-                fo.key,
-            )
-            raise HTTPException(status_code=404, detail="File not found in storage")
-        if 400 <= r.status_code < 500:
+    try:
+        return storage.read_bytes(fo.key, max_bytes=max_bytes)
+    except FileNotFoundError:
+        logger.warning(
+            "Thumbnail: blob missing (404) for file %s (key: %s)",
+            file_id,
+            fo.key,
+        )
+        raise HTTPException(status_code=404, detail="File not found in storage")
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="File too large to thumbnail")
+    except (HttpResponseError, httpx.HTTPStatusError) as e:
+        status = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+        if status and 400 <= status < 500:
             logger.warning(
                 "Thumbnail: upstream HTTP %s for file %s (key: %s)",
-                r.status_code,
+                status,
                 file_id,
                 fo.key,
             )
             raise HTTPException(status_code=404, detail="File not available in storage")
-        r.raise_for_status()
-        buf = bytearray()
-        for chunk in r.iter_bytes(65536):
-            buf.extend(chunk)
-            if len(buf) > max_bytes:
-                raise HTTPException(status_code=413, detail="File too large to thumbnail")
-        return bytes(buf)
+        raise
+
+
+def _is_pdf_file(fo: FileObject) -> bool:
+    return (fo.content_type or "").lower() == "application/pdf" or str(fo.key or "").lower().endswith(".pdf")
+
+
+def _readable_pdf(db: Session, user: User, file_id: str) -> FileObject:
+    fo: Optional[FileObject] = db.query(FileObject).filter(FileObject.id == file_id).first()
+    if not fo:
+        raise HTTPException(status_code=404, detail="File not found")
+    assert_can_read_file_object(user, db, fo)
+    if not _is_pdf_file(fo):
+        raise HTTPException(status_code=400, detail="Not a PDF")
+    return fo
+
+
+@router.get("/{file_id}/pdf-pages/{page}")
+def pdf_page_image(
+    file_id: str,
+    page: int,
+    w: int = 800,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user_bearer_or_query_token),
+):
+    """One PDF page (0-based) as PNG, e.g. a document-creator background in the editor."""
+    import logging
+
+    fo = _readable_pdf(db, user, file_id)
+    if page < 0:
+        raise HTTPException(status_code=404, detail="Page not found")
+    storage = get_storage_for_file(fo)
+    png = cached_pdf_page_png(
+        fo.id,
+        fo.size_bytes,
+        page,
+        clamp_page_width(w),
+        lambda: _read_storage_bytes_for_thumbnail(storage, fo, file_id, logging.getLogger(__name__)),
+    )
+    return png_response(png)
+
+
+@router.get("/{file_id}/pdf-sprite")
+def pdf_page_sprite(
+    file_id: str,
+    first: int = 0,
+    count: int = 10,
+    w: int = 320,
+    format: str = "png",
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user_bearer_or_query_token),
+):
+    """Pages first..first+count-1 stacked in one PNG; format=json returns the page layout."""
+    import logging
+
+    fo = _readable_pdf(db, user, file_id)
+    storage = get_storage_for_file(fo)
+    png, layout = cached_pdf_sprite(
+        fo.id,
+        fo.size_bytes,
+        first,
+        count,
+        clamp_thumbnail_width(w),
+        lambda: _read_storage_bytes_for_thumbnail(storage, fo, file_id, logging.getLogger(__name__)),
+    )
+    if format == "json":
+        return layout
+    return png_response(png)
 
 
 @router.get("/{file_id}/thumbnail")
@@ -1089,6 +1094,17 @@ def thumbnail(
         raise HTTPException(status_code=404, detail="File not found")
     assert_can_read_file_object(user, db, fo)
 
+    if _is_pdf_file(fo):
+        storage = get_storage_for_file(fo)
+        png = cached_pdf_page_png(
+            fo.id,
+            fo.size_bytes,
+            0,
+            clamp_thumbnail_width(w),
+            lambda: _read_storage_bytes_for_thumbnail(storage, fo, file_id, logger),
+        )
+        return png_response(png)
+
     target_w = clamp_thumb_width(w)
     cached = cache_lookup(file_id, target_w, fo.size_bytes)
     if cached is not None:
@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
 
-from ..db import get_db
+from ..db import get_db, get_read_db
 from ..auth.security import (
     get_current_user,
     require_permissions,
@@ -43,6 +43,7 @@ from ..services.equipment_work_order_sync import (
     sync_equipment_status_from_work_orders,
 )
 from ..services.task_service import get_user_display
+from ..services.exports import export_job_payload, normalize_format, start_export_job, stream_export
 from ..models.models import (
     FleetAsset,
     Equipment,
@@ -383,7 +384,7 @@ def _assert_manual_status_transition_allowed(current_status: str, target_status:
 # ---------- DASHBOARD ----------
 @router.get("/dashboard", response_model=FleetDashboardResponse)
 def get_dashboard(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _=Depends(require_permissions("fleet:access", "fleet:read"))
 ):
     """Get dashboard statistics"""
@@ -856,6 +857,28 @@ def get_asset_logs(
     ).order_by(FleetLog.log_date.desc()).all()
 
 
+@router.get("/assets/{asset_id}/logs/export")
+def export_asset_logs(
+    asset_id: uuid.UUID,
+    log_type: Optional[str] = None,
+    format: str = Query("csv", description="csv | xlsx"),
+    mode: str = Query("stream", description="stream | job"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Export the history log of a fleet asset as CSV or XLSX."""
+    assert_fleet_asset_tab(user, "history", "read")
+    fmt = normalize_format(format)
+    asset = db.query(FleetAsset).filter(FleetAsset.id == asset_id).first()
+    if not asset:
+        raise HTTPException(status_code=404, detail="Fleet asset not found")
+    params = {"fleet_asset_id": asset_id, "log_type": log_type}
+    filename = f"fleet-history-{asset.unit_number or str(asset_id)[:8]}"
+    if mode == "job":
+        return export_job_payload(start_export_job(db, "fleet_history", params, fmt, filename, user.id))
+    return stream_export("fleet_history", params, fmt, filename)
+
+
 def _fleet_audit_ctx_for_work_order(wo: WorkOrder, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Audit context for work orders; includes fleet_asset_id when the WO is tied to a fleet asset."""
     ctx: Dict[str, Any] = dict(extra or ())
@@ -32,9 +32,8 @@ from ..services.onboarding_assign import (
     promote_scheduled_assignment_items,
 )
 from ..services.onboarding_sign import (
-    apply_template_field_overlays,
+    build_signed_pdf_from_template,
     build_signed_pdf_with_certificate,
-    build_signed_pdf_with_certificate_from_merged,
     default_placement,
 )
 from ..services.onboarding_signature_template import (
@@ -46,7 +45,12 @@ from ..services.onboarding_signature_template import (
     validate_field_values_for_signing,
 )
 from ..services.onboarding_storage import read_file_object_bytes, save_pdf_bytes_as_file_object
-from ..services.pdf_page_preview import inline_pdf_response, pdf_first_page_png
+from ..services.pdf_page_preview import (
+    cached_pdf_page_png,
+    clamp_thumbnail_width,
+    inline_pdf_response,
+    png_response,
+)
 from ..services.task_service import get_user_display
 from ..utils.pdf_hash import sha256_bytes
 
@@ -269,8 +273,8 @@ def thumbnail_base_document(
     fo = db.query(FileObject).filter(FileObject.id == bd.file_id).first()
     if not fo:
         raise HTTPException(404, "File not found")
-    png = pdf_first_page_png(read_file_object_bytes(db, fo), w)
-    return Response(content=png, media_type="image/png", headers={"Cache-Control": "private, max-age=3600"})
+    png = cached_pdf_page_png(fo.id, fo.size_bytes, 0, clamp_thumbnail_width(w), lambda: read_file_object_bytes(db, fo))
+    return png_response(png, max_age=3600)
 
 
 @router.get("/base-documents/{doc_id}/preview")
@@ -939,9 +943,10 @@ async def me_sign(
         if not isinstance(fv, dict):
             raise HTTPException(400, "field_values must be a JSON object")
         resolved = validate_field_values_for_signing(fields, fv, ep, user)
-        merged = apply_template_field_overlays(base_pdf, fields, resolved)
-        final_pdf, cert_hash = build_signed_pdf_with_certificate_from_merged(
-            merged,
+        final_pdf, cert_hash = build_signed_pdf_from_template(
+            base_pdf,
+            fields,
+            resolved,
             document_name=(it.display_name or "").strip() or bd.name,
             document_id=str(bd.id),
             base_doc_hash=base_hash,
@@ -1,6 +1,6 @@
 import copy
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request, Response
 from sqlalchemy.orm import Session, defer, object_session
 from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.exc import ProgrammingError
@@ -8,7 +8,7 @@ from sqlalchemy import func, extract, select, literal, or_
 from typing import List, Optional
 import uuid
 
-from ..db import get_db
+from ..db import get_db, get_read_db
 from ..models.models import (
     Project,
     ClientFile,
@@ -30,20 +30,23 @@ from ..models.models import (
     SettingList,
     SettingItem,
     Shift,
-    AuditLog,
     Estimate,
     EstimateItem,
     ProjectFolder,
     FormTemplate,
     ProjectMember,
+    Attendance,
+    AttendanceDailyRollup,
 )
 from datetime import datetime, timezone, time, timedelta
+from ..utils.proposal_totals import calculate_proposal_grand_total
 from ..auth.security import (
     get_current_user,
     require_permissions,
     require_roles,
     can_approve_timesheet,
     has_project_files_category_permission,
+    allowed_project_file_categories,
     can_access_business_line,
     can_write_business_line,
     has_project_permission,
@@ -62,6 +65,19 @@ from ..services.business_line import (
     normalize_business_line,
 )
 from ..services.rm_pictures_folders import ensure_rm_pictures_default_folders
+from ..services.attendance_ledger import deleted_shift_info
+from ..services.attendance_rollup import (
+    WORKER_PAGE_DEFAULT,
+    WORKER_PAGE_MAX,
+    entry_break_minutes,
+    load_break_policy,
+    local_days_utc,
+    rollup_rows,
+    summarize_by_worker,
+    work_date as attendance_work_date,
+    worker_page,
+)
+from ..services.time_rules import utc_to_local
 from ..services.project_visibility import (
     can_manage_project_members,
     can_view_all_projects_in_line,
@@ -75,6 +91,7 @@ from sqlalchemy import or_, and_, cast, String, Date
 
 
 from ..services.project_utils import sanitize_division_onsite_leads
+from ..services.exports import export_job_payload, normalize_format, start_export_job, stream_export
 from ..services.project_duplicate import generate_project_code, duplicate_project_deep
 from ..services.project_customer_participation import project_site_address_payload
 from ..services.leak_investigation import (
@@ -711,10 +728,12 @@ def _attach_safety_inspection_pdf(
     log: logging.Logger,
     name_suffix: str,
     audit_source: str,
+    refresh_pdf: bool = False,
 ) -> tuple[Optional[str], Optional[str], Optional[uuid.UUID]]:
     """Returns (pdf_attachment_error, file_object_id_str for API, client_file_id)."""
     from slugify import slugify
 
+    from ..services import pdf_artifacts
     from ..services.onboarding_storage import save_project_pdf_bytes_as_file_object
     from ..services.safety_inspection_pdf import build_safety_inspection_pdf_bytes
 
@@ -734,22 +753,29 @@ def _attach_safety_inspection_pdf(
     project_address = (getattr(p, "address", None) or "").strip()
     extra = _extra_signers_pdf_payload(db, row.id)
     ff_at = getattr(row, "first_finalized_at", None) if document_kind == "final" else None
+    pdf_kwargs = dict(
+        definition=defn,
+        form_payload=fp,
+        project_name=str(p.name or ""),
+        project_code=str(p.code or ""),
+        project_address=project_address,
+        template_name=str(template_name),
+        template_version_label=tv_label,
+        inspection_id=str(row.id),
+        inspection_date=row.inspection_date,
+        finalized_by_name=finalizer,
+        document_kind=document_kind,
+        extra_signers=extra,
+        first_finalized_at=ff_at,
+    )
     try:
-        pdf_bytes = build_safety_inspection_pdf_bytes(
-            db,
-            definition=defn,
-            form_payload=fp,
-            project_name=str(p.name or ""),
-            project_code=str(p.code or ""),
-            project_address=project_address,
-            template_name=str(template_name),
-            template_version_label=tv_label,
-            inspection_id=str(row.id),
-            inspection_date=row.inspection_date,
-            finalized_by_name=finalizer,
-            document_kind=document_kind,
-            extra_signers=extra,
-            first_finalized_at=ff_at,
+        # An unchanged inspection reuses the stored render (images are keyed by file id); explicit
+        # regenerates re-render so renamed users/assets and edited custom lists are picked up.
+        pdf_bytes = pdf_artifacts.render_bytes(
+            "safety_inspection",
+            pdf_kwargs,
+            lambda: build_safety_inspection_pdf_bytes(db, **pdf_kwargs),
+            refresh=refresh_pdf,
         )
     except Exception:
         log.exception("Safety inspection PDF generation failed inspection_id=%s", row.id)
@@ -1009,34 +1035,6 @@ def _paginate_projects_with_section_access(
     return filter_projects_with_section_access(user, rows), total
 
 
-def calculate_proposal_grand_total(proposal_data: dict) -> float:
-    """
-    Project/list Value from proposal pricing: sum of (value * quantity) for approved
-    additional_costs only — base amount, without PST or GST.
-    """
-    if not proposal_data:
-        return 0.0
-    
-    additional_costs = proposal_data.get('additional_costs', [])
-    if not isinstance(additional_costs, list):
-        return 0.0
-    
-    total_direct_costs = 0.0
-    
-    for item in additional_costs:
-        if not isinstance(item, dict):
-            continue
-        # Only include approved items (default True for backward compatibility)
-        if item.get('approved', True) is not True:
-            continue
-
-        value = float(item.get('value', 0) or 0)
-        quantity = float(item.get('quantity', 1) or 1)
-        total_direct_costs += value * quantity
-    
-    return total_direct_costs
-
-
 def calculate_proposal_values_for_division(proposal_data: dict, division_id: Optional[str] = None) -> tuple[float, float]:
     """
     Base pricing value from proposal additional_costs (no PST/GST).
@@ -2463,46 +2461,81 @@ def remove_project_member(
     return {"status": "ok"}
 
 
+_PROJECT_FILE_IMAGE_EXTS = {"png", "jpg", "jpeg", "webp", "gif", "bmp", "heic", "heif"}
+
+
+def _project_file_is_image(name: str, content_type: Optional[str]) -> bool:
+    ext = (name.rsplit(".", 1)[-1] if "." in name else "").lower()
+    return (content_type or "").startswith("image/") or ext in _PROJECT_FILE_IMAGE_EXTS
+
+
+def _project_files_category_clause(user: User, proj: Project):
+    """SQL filter for the Files categories this user may read (None = no restriction).
+
+    Permissions are resolved once per request instead of once per file."""
+    allowed = allowed_project_file_categories(user, "read", proj)
+    if allowed is None:
+        return None
+    category = func.lower(func.trim(ClientFile.category))
+    clauses = []
+    if allowed:
+        clauses.append(func.coalesce(func.nullif(category, ""), "uncategorized").in_(sorted(allowed)))
+    # Document Creator gallery originals/edited use document-creator* categories.
+    if _has_project_feature_permission(user, getattr(proj, "business_line", None), "documents", "read"):
+        clauses.append(category.like("document-creator%"))
+    return or_(*clauses) if clauses else literal(False)
+
+
 @router.get("/{project_id}/files")
 def list_project_files(
     project_id: str,
+    response: Response,
+    folder_id: Optional[str] = Query(None, description="Only files in this folder; 'root' for files outside any folder"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
     _=Depends(require_permissions("business:projects:files:read", "business:projects:files:write")),
 ):
+    """Project library files, newest first. With `limit`, X-Has-More / X-Next-Offset headers page the list."""
     proj = db.query(Project).filter(Project.id == project_id, Project.deleted_at.is_(None)).first()
     if not proj:
         raise HTTPException(status_code=404, detail="Project not found")
     _assert_project_line_read(user, proj)
-    cfiles = (
-        db.query(ClientFile)
-        .filter(ClientFile.client_id == proj.client_id, ClientFile.deleted_at.is_(None))
-        .order_by(ClientFile.uploaded_at.desc())
-        .all()
+    q = (
+        db.query(ClientFile, FileObject.content_type)
+        .join(FileObject, FileObject.id == ClientFile.file_object_id)
+        .filter(
+            FileObject.project_id == proj.id,
+            ClientFile.client_id == proj.client_id,
+            ClientFile.deleted_at.is_(None),
+        )
     )
+    category_clause = _project_files_category_clause(user, proj)
+    if category_clause is not None:
+        q = q.filter(category_clause)
+    if folder_id == "root":
+        q = q.filter(ClientFile.folder_id.is_(None))
+    elif folder_id:
+        try:
+            q = q.filter(ClientFile.folder_id == uuid.UUID(str(folder_id)))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid folder id")
+    q = q.order_by(ClientFile.uploaded_at.desc(), ClientFile.id.desc())
+    if offset:
+        q = q.offset(offset)
+    if limit is not None:
+        rows = q.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        response.headers["X-Has-More"] = "true" if has_more else "false"
+        if has_more:
+            response.headers["X-Next-Offset"] = str(offset + limit)
+    else:
+        rows = q.all()
     out = []
-    for cf in cfiles:
-        # Category-level permission filter (default allow-all if config not set)
-        cat = getattr(cf, "category", None)
-        if not has_project_files_category_permission(user, cat, action="read", project=proj):
-            # Document Creator gallery originals/edited use document-creator* categories.
-            if not (
-                str(cat or "").strip().lower().startswith("document-creator")
-                and _has_project_feature_permission(
-                    user, getattr(proj, "business_line", None), "documents", "read"
-                )
-            ):
-                continue
-        fo = db.query(FileObject).filter(FileObject.id == cf.file_object_id).first()
-        if not fo:
-            continue
-        if str(getattr(fo, 'project_id', '') or '') != str(project_id):
-            continue
-        ct = getattr(fo, 'content_type', None)
+    for cf, ct in rows:
         name = cf.original_name or cf.key or ''
-        ext = (name.rsplit('.', 1)[-1] if '.' in name else '').lower()
-        is_img_ext = ext in { 'png','jpg','jpeg','webp','gif','bmp','heic','heif' }
-        is_image = (ct or '').startswith('image/') or is_img_ext
         out.append({
             "id": str(cf.id),
             "file_object_id": str(cf.file_object_id),
@@ -2513,7 +2546,7 @@ def list_project_files(
             "notes": getattr(cf, "notes", None),
             "uploaded_at": cf.uploaded_at.isoformat() if cf.uploaded_at else None,
             "content_type": ct,
-            "is_image": is_image,
+            "is_image": _project_file_is_image(name, ct),
         })
     return out
 
@@ -2529,22 +2562,21 @@ def list_deleted_project_files(
     if not proj:
         raise HTTPException(status_code=404, detail="Project not found")
     _assert_project_line_read(user, proj)
-    cfiles = (
-        db.query(ClientFile)
-        .filter(ClientFile.client_id == proj.client_id, ClientFile.deleted_at.isnot(None))
+    rows = (
+        db.query(ClientFile, FileObject.content_type)
+        .join(FileObject, FileObject.id == ClientFile.file_object_id)
+        .filter(
+            FileObject.project_id == proj.id,
+            ClientFile.client_id == proj.client_id,
+            ClientFile.deleted_at.isnot(None),
+        )
         .order_by(ClientFile.deleted_at.desc())
         .all()
     )
     out = []
-    for cf in cfiles:
-        fo = db.query(FileObject).filter(FileObject.id == cf.file_object_id).first()
-        if not fo or str(getattr(fo, "project_id", "") or "") != str(project_id):
-            continue
-        ct = getattr(fo, "content_type", None)
+    for cf, ct in rows:
         name = cf.original_name or cf.key or ""
-        ext = (name.rsplit(".", 1)[-1] if "." in name else "").lower()
-        is_img_ext = ext in {"png", "jpg", "jpeg", "webp", "gif", "bmp", "heic", "heif"}
-        is_image = (ct or "").startswith("image/") or is_img_ext
+        is_image = _project_file_is_image(name, ct)
         out.append(
             {
                 "id": str(cf.id),
@@ -3449,6 +3481,7 @@ def regenerate_project_safety_inspection_pdf(
             log=log,
             name_suffix="",
             audit_source="safety_inspection_pdf_regenerate",
+            refresh_pdf=True,
         )
         if err:
             out = dict(_safety_inspection_to_dict(db, row))
@@ -3478,6 +3511,7 @@ def regenerate_project_safety_inspection_pdf(
             log=log,
             name_suffix="-interim",
             audit_source="safety_inspection_pdf_regenerate_interim",
+            refresh_pdf=True,
         )
         out = dict(_safety_inspection_to_dict(db, row))
         if err:
@@ -4510,194 +4544,138 @@ def delete_project_event(project_id: str, event_id: str, db: Session = Depends(g
 
 
 # ---- Timesheets ----
-@router.get("/{project_id}/timesheet")
-def list_timesheet(project_id: str, month: Optional[str] = None, user_id: Optional[str] = None, db: Session = Depends(get_db), user: User = Depends(get_current_user), _=Depends(require_permissions("business:projects:timesheet:read", "hr:timesheet:read", "timesheet:read"))):
-    from ..routes.settings import calculate_break_minutes
+def _timesheet_month(month: Optional[str]):
+    """(first, last) local dates of a YYYY-MM month; (None, None) when absent or malformed."""
+    if not month:
+        return None, None
+    try:
+        from calendar import monthrange
+
+        first = datetime.strptime(month + "-01", "%Y-%m-%d").date()
+    except ValueError:
+        return None, None
+    return first, first.replace(day=monthrange(first.year, first.month)[1])
+
+
+def _timesheet_worker_page(db: Session, pid: uuid.UUID, date_start, date_end, limit: int, cursor: Optional[str]):
+    """Workers with project attendance (attendance_daily_rollup) or manual entries in the month, by id."""
+    from sqlalchemy import union
 
+    rollup_q = select(AttendanceDailyRollup.worker_id.label("worker_id")).where(AttendanceDailyRollup.project_id == pid)
+    manual_q = select(ProjectTimeEntry.user_id.label("worker_id")).where(ProjectTimeEntry.project_id == pid)
+    if date_start and date_end:
+        rollup_q = rollup_q.where(AttendanceDailyRollup.work_date >= date_start, AttendanceDailyRollup.work_date <= date_end)
+        manual_q = manual_q.where(ProjectTimeEntry.work_date >= date_start, ProjectTimeEntry.work_date <= date_end)
+    workers = union(rollup_q, manual_q).subquery()
+    q = select(workers.c.worker_id)
+    if cursor:
+        try:
+            q = q.where(workers.c.worker_id > uuid.UUID(cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    ids = [r[0] for r in db.execute(q.order_by(workers.c.worker_id).limit(limit + 1)).all()]
+    if len(ids) <= limit:
+        return ids, None
+    return ids[:limit], str(ids[limit - 1])
+
+
+@router.get("/{project_id}/timesheet")
+def list_timesheet(
+    project_id: str,
+    response: Response,
+    month: Optional[str] = None,
+    user_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=WORKER_PAGE_MAX),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    _=Depends(require_permissions("business:projects:timesheet:read", "hr:timesheet:read", "timesheet:read")),
+):
+    """Attendance-backed and manual timesheet rows. With `limit`, rows are paged by worker
+    (`limit` workers per page): X-Has-More / X-Next-Cursor headers, pass the cursor back."""
     p = db.query(Project).filter(Project.id == project_id, Project.deleted_at.is_(None)).first()
     if not p:
         raise HTTPException(status_code=404, detail="Project not found")
     _assert_project_line_read(user, p)
-    
-    # Calculate date range for month filter
-    date_start = None
-    date_end = None
-    if month:
+
+    date_start, date_end = _timesheet_month(month)
+    worker_ids = None
+    if user_id:
         try:
-            from datetime import datetime
-            dt = datetime.strptime(month+"-01", "%Y-%m-%d").date()
-            y = dt.year; m = dt.month
-            from datetime import date as date_type
-            from calendar import monthrange
-            date_start = date_type(y, m, 1)
-            date_end = date_type(y, m, monthrange(y, m)[1])
-        except Exception:
-            pass
-    
-    # First, get all attendances for this project through shifts
-    # This ensures we use the same data source as the attendance table
-    from ..models.models import Shift, Attendance
-    from sqlalchemy import and_, or_, func
-    
-    # Get all shifts for this project
-    shifts_query = db.query(Shift).filter(Shift.project_id == project_id)
+            worker_ids = [uuid.UUID(user_id)]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid user_id")
+    elif limit is not None:
+        worker_ids, next_cursor = _timesheet_worker_page(db, p.id, date_start, date_end, limit, cursor)
+        response.headers["X-Has-More"] = "true" if next_cursor else "false"
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+    if worker_ids is not None and not worker_ids:
+        return []
+
+    # Attendance of the project's shifts (same data source as the attendance table), by local work date
+    q = (
+        db.query(
+            Attendance,
+            Shift.job_name,
+            Shift.status.label("shift_status"),
+            User.username,
+            EmployeeProfile.preferred_name,
+            EmployeeProfile.first_name,
+            EmployeeProfile.last_name,
+            EmployeeProfile.profile_photo_file_id,
+        )
+        .join(Shift, Shift.id == Attendance.shift_id)
+        .outerjoin(User, User.id == Attendance.worker_id)
+        .outerjoin(EmployeeProfile, EmployeeProfile.user_id == Attendance.worker_id)
+        .filter(Shift.project_id == p.id, or_(Attendance.clock_in_time.isnot(None), Attendance.clock_out_time.isnot(None)))
+    )
+    effective_ts = func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time)
     if date_start and date_end:
-        shifts_query = shifts_query.filter(Shift.date >= date_start, Shift.date <= date_end)
-    shifts = shifts_query.all()
-    shift_ids = [s.id for s in shifts]
-    
-    # Get all attendances for these shifts
-    attendances = []
-    if shift_ids:
-        # Build date range for attendance query
-        if date_start and date_end:
-            date_start_dt = datetime.combine(date_start, time.min).replace(tzinfo=timezone.utc)
-            date_end_dt = datetime.combine(date_end + timedelta(days=1), time.min).replace(tzinfo=timezone.utc)
-            attendances_query = db.query(Attendance).filter(
-                Attendance.shift_id.in_(shift_ids),
-                or_(
-                    and_(
-                        Attendance.clock_in_time.isnot(None),
-                        Attendance.clock_in_time >= date_start_dt,
-                        Attendance.clock_in_time < date_end_dt
-                    ),
-                    and_(
-                        Attendance.clock_in_time.is_(None),
-                        Attendance.clock_out_time.isnot(None),
-                        Attendance.clock_out_time >= date_start_dt,
-                        Attendance.clock_out_time < date_end_dt
-                    )
-                )
-            )
-        else:
-            attendances_query = db.query(Attendance).filter(Attendance.shift_id.in_(shift_ids))
-        
-        if user_id:
-            attendances_query = attendances_query.filter(Attendance.worker_id == user_id)
-        
-        attendances = attendances_query.order_by(
-            func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time).asc()
-        ).all()
-    
-    # Get user and profile info for attendances
-    worker_ids = list(set([str(a.worker_id) for a in attendances]))
-    users_dict = {}
-    profiles_dict = {}
-    if worker_ids:
-        try:
-            worker_ids_uuid = [uuid.UUID(wid) for wid in worker_ids]
-            users = db.query(User).filter(User.id.in_(worker_ids_uuid)).all()
-            users_dict = {str(u.id): u for u in users}
-            profiles = db.query(EmployeeProfile).filter(EmployeeProfile.user_id.in_(worker_ids_uuid)).all()
-            profiles_dict = {str(p.user_id): p for p in profiles}
-        except Exception:
-            pass
-    
-    # Build shifts dict for quick lookup
-    shifts_dict = {str(s.id): s for s in shifts}
-    
-    # Convert attendances to timesheet format (same as attendance table)
+        lo, hi = local_days_utc(date_start, date_end)
+        q = q.filter(effective_ts >= lo, effective_ts < hi)
+    if worker_ids is not None:
+        q = q.filter(Attendance.worker_id.in_(worker_ids))
+    rows = q.order_by(effective_ts.asc(), Attendance.id.asc()).all()
+
+    policy = load_break_policy(db)
+    shift_deletions = deleted_shift_info(
+        db, {r.Attendance.shift_id for r in rows if r.shift_status == "deleted"}
+    )
+    from ..config import settings
+
     out = []
-    for att in attendances:
-        worker = users_dict.get(str(att.worker_id))
-        profile = profiles_dict.get(str(att.worker_id))
-        
+    for row in rows:
+        att = row.Attendance
         # Get worker name
-        worker_name = worker.username if worker else "Unknown"
-        if profile:
-            name = (profile.preferred_name or '').strip()
-            if not name:
-                first = (profile.first_name or '').strip()
-                last = (profile.last_name or '').strip()
-                name = ' '.join([x for x in [first, last] if x])
-            if name:
-                worker_name = name
-        
-        # Get work_date from clock_in_time or clock_out_time
-        work_date = None
-        if att.clock_in_time:
-            work_date = att.clock_in_time.date()
-        elif att.clock_out_time:
-            work_date = att.clock_out_time.date()
-        
-        if not work_date:
-            continue
-        
-        # Calculate hours_worked (same as attendance table)
-        hours_worked = None
+        worker_name = (row.preferred_name or "").strip() or " ".join(
+            x for x in [(row.first_name or "").strip(), (row.last_name or "").strip()] if x
+        )
+        worker_name = worker_name or row.username or "Unknown"
+
+        work_date = attendance_work_date(att.clock_in_time, att.clock_out_time)
+        net_minutes = 0
+        break_minutes = entry_break_minutes(att.worker_id, att.clock_in_time, att.clock_out_time, att.break_minutes, policy)
         if att.clock_in_time and att.clock_out_time:
-            diff = att.clock_out_time - att.clock_in_time
-            hours_worked = diff.total_seconds() / 3600  # Convert to hours
-        
-        # Use break_minutes from database (already calculated and saved, including manual breaks)
-        # Only calculate if not already set in database
-        break_minutes = att.break_minutes
-        if break_minutes is None and att.clock_in_time and att.clock_out_time:
-            # Fallback: calculate if not set (for old records or edge cases)
-            break_minutes = calculate_break_minutes(
-                db, att.worker_id, att.clock_in_time, att.clock_out_time
-            )
-        
-        # Calculate net hours (hours - break)
-        net_hours = hours_worked
-        if hours_worked is not None and break_minutes is not None and break_minutes > 0:
-            net_hours = max(0, hours_worked - (break_minutes / 60))
-        
-        # Get shift for notes
-        shift = shifts_dict.get(str(att.shift_id)) if att.shift_id else None
-        shift_deleted = False
-        shift_deleted_by = None
-        shift_deleted_at = None
-        
-        # Check if shift was deleted (soft-delete uses status="deleted")
-        if att.shift_id and (not shift or getattr(shift, "status", None) == "deleted"):
-            shift_deleted = True
-            # Get information about who deleted the shift from audit log
-            delete_log = db.query(AuditLog).filter(
-                AuditLog.entity_type == "shift",
-                AuditLog.entity_id == att.shift_id,
-                AuditLog.action == "DELETE"
-            ).order_by(AuditLog.timestamp_utc.desc()).first()
-            
-            if delete_log:
-                shift_deleted_at = delete_log.timestamp_utc.isoformat() if delete_log.timestamp_utc else None
-                # Get actor name
-                actor = db.query(User).filter(User.id == delete_log.actor_id).first()
-                if actor:
-                    shift_deleted_by = actor.username or actor.email or str(delete_log.actor_id)
-                else:
-                    shift_deleted_by = str(delete_log.actor_id)
-        
+            gross = int((att.clock_out_time - att.clock_in_time).total_seconds() / 60)
+            net_minutes = max(0, gross - break_minutes)
+
         notes = f"Clock-in via attendance system"
-        if shift and shift.job_name:
-            notes = f"Clock-in via attendance system - {shift.job_name}"
-        
-        # Format times - convert from UTC to local timezone before extracting time
-        from ..config import settings
-        import pytz
-        start_time_str = None
-        end_time_str = None
-        local_tz = pytz.timezone(settings.tz_default)
-        if att.clock_in_time:
-            # Convert UTC to local timezone
-            local_time = att.clock_in_time.astimezone(local_tz)
-            start_time_str = local_time.time().isoformat()
-        if att.clock_out_time:
-            # Convert UTC to local timezone
-            local_time = att.clock_out_time.astimezone(local_tz)
-            end_time_str = local_time.time().isoformat()
-        
+        if row.job_name:
+            notes = f"Clock-in via attendance system - {row.job_name}"
+
         entry_dict = {
             "id": f"attendance_{att.id}",  # Prefix to distinguish from ProjectTimeEntry
             "project_id": str(project_id),
             "user_id": str(att.worker_id),
             "user_name": worker_name,
-            "user_avatar_file_id": str(profile.profile_photo_file_id) if (profile and profile.profile_photo_file_id) else None,
+            "user_avatar_file_id": str(row.profile_photo_file_id) if row.profile_photo_file_id else None,
             "work_date": work_date.isoformat(),
-            "start_time": start_time_str,
-            "end_time": end_time_str,
-            "minutes": int(net_hours * 60) if net_hours is not None else 0,  # Net minutes (after break)
-            "break_minutes": break_minutes if break_minutes is not None else 0,
+            # Local wall-clock times (settings.tz_default)
+            "start_time": utc_to_local(att.clock_in_time, settings.tz_default).time().isoformat() if att.clock_in_time else None,
+            "end_time": utc_to_local(att.clock_out_time, settings.tz_default).time().isoformat() if att.clock_out_time else None,
+            "minutes": net_minutes,  # Net minutes (after break)
+            "break_minutes": break_minutes,
             "notes": notes,
             "created_at": att.created_at.isoformat() if att.created_at else None,
             "is_approved": att.status == "approved",
@@ -4706,69 +4684,133 @@ def list_timesheet(project_id: str, month: Optional[str] = None, user_id: Option
             "is_from_attendance": True,  # Flag to indicate this comes from attendance
             "attendance_id": str(att.id),  # Store attendance ID for reference
         }
-        
-        # Add shift deleted information if applicable
-        if shift_deleted:
+        # Shift soft-deleted (status="deleted") after the attendance was recorded
+        if row.shift_status == "deleted":
+            shift_deleted_at, shift_deleted_by = shift_deletions.get(str(att.shift_id), (None, None))
             entry_dict["shift_deleted"] = True
             entry_dict["shift_deleted_by"] = shift_deleted_by
             entry_dict["shift_deleted_at"] = shift_deleted_at
-        
         out.append(entry_dict)
-    
-    # Also include regular ProjectTimeEntry records (manual entries without attendance)
-    # join with users and employee_profiles for display
-    q = db.query(ProjectTimeEntry, User, EmployeeProfile).join(User, User.id == ProjectTimeEntry.user_id).outerjoin(EmployeeProfile, EmployeeProfile.user_id == User.id).filter(ProjectTimeEntry.project_id == project_id)
-    if month:
-        try:
-            from datetime import datetime
-            dt = datetime.strptime(month+"-01", "%Y-%m-%d").date()
-            y = dt.year; m = dt.month
-            from sqlalchemy import extract
-            q = q.filter(extract('year', ProjectTimeEntry.work_date) == y, extract('month', ProjectTimeEntry.work_date) == m)
-        except Exception:
-            pass
-    if user_id:
-        q = q.filter(ProjectTimeEntry.user_id == user_id)
-    rows = q.order_by(ProjectTimeEntry.work_date.asc(), ProjectTimeEntry.start_time.asc()).all()
-    for r,u,ep in rows:
-        # Check if this entry already has an attendance record (to avoid duplicates)
-        # We'll skip manual entries that have corresponding attendance
-        entry_date = r.work_date
-        entry_user_id = str(r.user_id)
-        has_attendance = any(
-            str(a.worker_id) == entry_user_id and 
-            ((a.clock_in_time and a.clock_in_time.date() == entry_date) or 
-             (a.clock_out_time and a.clock_out_time.date() == entry_date))
-            for a in attendances
+
+    # Also include regular ProjectTimeEntry records (manual entries), unless the worker already has
+    # project attendance that day (attendance_daily_rollup holds one row per worker / day / project)
+    has_attendance = (
+        db.query(AttendanceDailyRollup.worker_id)
+        .filter(
+            AttendanceDailyRollup.worker_id == ProjectTimeEntry.user_id,
+            AttendanceDailyRollup.work_date == ProjectTimeEntry.work_date,
+            AttendanceDailyRollup.project_id == p.id,
         )
-        
-        # Only include manual entries that don't have attendance
-        if not has_attendance:
-            out.append({
-                "id": str(r.id),
-                "project_id": str(r.project_id),
-                "user_id": str(r.user_id),
-                "user_name": (getattr(ep,'preferred_name',None) or ((' '.join([getattr(ep,'first_name',None) or '', getattr(ep,'last_name',None) or '']).strip()) if ep else '') or u.username),
-                "user_avatar_file_id": str(getattr(ep,'profile_photo_file_id')) if (ep and getattr(ep,'profile_photo_file_id', None)) else None,
-                "work_date": r.work_date.isoformat(),
-                "start_time": getattr(r,'start_time', None).isoformat() if getattr(r,'start_time', None) else None,
-                "end_time": getattr(r,'end_time', None).isoformat() if getattr(r,'end_time', None) else None,
-                "minutes": r.minutes,
-                "break_minutes": 0,  # Manual entries don't have break
-                "notes": r.notes,
-                "created_at": r.created_at.isoformat() if getattr(r,'created_at', None) else None,
-                "is_approved": bool(getattr(r,'is_approved', False)),
-                "approved_at": getattr(r,'approved_at', None).isoformat() if getattr(r,'approved_at', None) else None,
-                "approved_by": str(getattr(r,'approved_by', None)) if getattr(r,'approved_by', None) else None,
-                "is_from_attendance": False,
-            })
-    
+        .exists()
+    )
+    q = (
+        db.query(ProjectTimeEntry, User, EmployeeProfile)
+        .join(User, User.id == ProjectTimeEntry.user_id)
+        .outerjoin(EmployeeProfile, EmployeeProfile.user_id == User.id)
+        .filter(ProjectTimeEntry.project_id == p.id, ~has_attendance)
+    )
+    if date_start and date_end:
+        q = q.filter(ProjectTimeEntry.work_date >= date_start, ProjectTimeEntry.work_date <= date_end)
+    if worker_ids is not None:
+        q = q.filter(ProjectTimeEntry.user_id.in_(worker_ids))
+    for r, u, ep in q.order_by(ProjectTimeEntry.work_date.asc(), ProjectTimeEntry.start_time.asc()).all():
+        out.append({
+            "id": str(r.id),
+            "project_id": str(r.project_id),
+            "user_id": str(r.user_id),
+            "user_name": (getattr(ep,'preferred_name',None) or ((' '.join([getattr(ep,'first_name',None) or '', getattr(ep,'last_name',None) or '']).strip()) if ep else '') or u.username),
+            "user_avatar_file_id": str(getattr(ep,'profile_photo_file_id')) if (ep and getattr(ep,'profile_photo_file_id', None)) else None,
+            "work_date": r.work_date.isoformat(),
+            "start_time": getattr(r,'start_time', None).isoformat() if getattr(r,'start_time', None) else None,
+            "end_time": getattr(r,'end_time', None).isoformat() if getattr(r,'end_time', None) else None,
+            "minutes": r.minutes,
+            "break_minutes": 0,  # Manual entries don't have break
+            "notes": r.notes,
+            "created_at": r.created_at.isoformat() if getattr(r,'created_at', None) else None,
+            "is_approved": bool(getattr(r,'is_approved', False)),
+            "approved_at": getattr(r,'approved_at', None).isoformat() if getattr(r,'approved_at', None) else None,
+            "approved_by": str(getattr(r,'approved_by', None)) if getattr(r,'approved_by', None) else None,
+            "is_from_attendance": False,
+        })
+
     # Sort by work_date and start_time (handle None values)
     out.sort(key=lambda x: (x.get("work_date") or "", x.get("start_time") or ""))
-    
+
     return out
 
 
+@router.get("/{project_id}/timesheet/summary")
+def project_timesheet_summary(
+    project_id: str,
+    month: Optional[str] = None,
+    limit: int = Query(WORKER_PAGE_DEFAULT, ge=1, le=WORKER_PAGE_MAX),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    _=Depends(require_permissions("business:projects:timesheet:read", "hr:timesheet:read", "timesheet:read")),
+):
+    """Attendance totals per worker and day on this project (attendance_daily_rollup), paged by worker."""
+    p = db.query(Project).filter(Project.id == project_id, Project.deleted_at.is_(None)).first()
+    if not p:
+        raise HTTPException(status_code=404, detail="Project not found")
+    _assert_project_line_read(user, p)
+    date_start, date_end = _timesheet_month(month)
+    worker_ids, next_cursor = worker_page(db, date_start, date_end, project_id=p.id, limit=limit, cursor=cursor)
+    by_worker = summarize_by_worker(rollup_rows(db, date_start, date_end, worker_ids, project_id=p.id))
+    names = {}
+    if worker_ids:
+        for uid, username, preferred, first, last in (
+            db.query(User.id, User.username, EmployeeProfile.preferred_name, EmployeeProfile.first_name, EmployeeProfile.last_name)
+            .outerjoin(EmployeeProfile, EmployeeProfile.user_id == User.id)
+            .filter(User.id.in_(worker_ids))
+        ):
+            names[uid] = (preferred or "").strip() or " ".join(x for x in [(first or "").strip(), (last or "").strip()] if x) or username
+    return {
+        "workers": [
+            {
+                "user_id": str(wid),
+                "user_name": names.get(wid) or "Unknown",
+                "totals": by_worker[wid]["totals"],
+                "days": [{"work_date": d.isoformat(), **t} for d, t in by_worker[wid]["days"].items()],
+            }
+            for wid in worker_ids
+            if wid in by_worker
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/{project_id}/timesheet/export")
+def export_timesheet(
+    project_id: str,
+    month: Optional[str] = None,
+    user_id: Optional[str] = None,
+    format: str = Query("csv", description="csv | xlsx"),
+    mode: str = Query("stream", description="stream | job"),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+    _=Depends(require_permissions("business:projects:timesheet:read", "hr:timesheet:read", "timesheet:read")),
+):
+    """Timesheet rows (attendance-backed and manual) as CSV or XLSX."""
+    fmt = normalize_format(format)
+    try:
+        pid = uuid.UUID(str(project_id))
+        uid = uuid.UUID(user_id) if user_id else None
+        if month:
+            datetime.strptime(month + "-01", "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid filter value")
+    p = db.query(Project).filter(Project.id == pid, Project.deleted_at.is_(None)).first()
+    if not p:
+        raise HTTPException(status_code=404, detail="Project not found")
+    _assert_project_line_read(user, p)
+    params = {"project_id": pid, "month": month, "user_id": uid}
+    filename = f"timesheet-{p.code or str(pid)[:8]}-{month or 'all'}"
+    if mode == "job":
+        return export_job_payload(start_export_job(db, "timesheet", params, fmt, filename, user.id))
+    return stream_export("timesheet", params, fmt, filename)
+
+
 @router.post("/{project_id}/timesheet")
 def create_time_entry(project_id: str, payload: dict, db: Session = Depends(get_db), user=Depends(get_current_user), _=Depends(require_permissions("business:projects:timesheet:write", "hr:timesheet:write", "timesheet:write"))):
     p = db.query(Project).filter(Project.id == project_id, Project.deleted_at.is_(None)).first()
@@ -5632,7 +5674,7 @@ def get_project_audit_logs(
     month: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
     _=Depends(require_permissions("business:projects:read"))
 ):
@@ -6017,7 +6059,7 @@ def business_dashboard(
     project_status_labels: Optional[List[str]] = Query(None),
     related_to_me: Optional[bool] = False,
     business_line: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user)
 ):
     """Get business dashboard statistics. opportunity_status_labels / project_status_labels: optional lists to filter by status. customer_id: optional filter by customer (client). related_to_me: if True, only projects/opportunities where the current user is estimator, project_admin, or onsite_lead."""
@@ -6300,7 +6342,7 @@ def business_dashboard_timeseries(
     metric: Optional[str] = "opportunities_by_status",
     related_to_me: Optional[bool] = False,
     business_line: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user)
 ):
     """Get dashboard stats by month for line charts. Returns months (X) and series (one line per status/division). customer_id: optional filter by customer (client). related_to_me: if True, only projects/opportunities related to the current user."""
@@ -7858,6 +7900,7 @@ def business_projects(
 
 @router.get("/business/projects/map-points")
 def business_projects_map_points(
+    request: Request,
     division_id: Optional[str] = None,
     division_id_not: Optional[str] = None,
     subdivision_id: Optional[str] = None,
@@ -7882,12 +7925,13 @@ def business_projects_map_points(
     east: Optional[float] = None,
     west: Optional[float] = None,
     zoom: Optional[float] = None,
+    tile: Optional[str] = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     """Lightweight map markers for projects list — same filters/permissions as business_projects."""
     from ..services.project_list_filters import filters_from_query_params
-    from ..services.project_map_service import get_project_map_points
+    from ..services.project_map_service import get_project_map_points, map_points_response
 
     filters = filters_from_query_params(
         division_id=division_id,
@@ -7909,7 +7953,7 @@ def business_projects_map_points(
         value_max=value_max,
         related_to_me=related_to_me,
     )
-    return get_project_map_points(
+    payload = get_project_map_points(
         db,
         user,
         business_line,
@@ -7920,11 +7964,14 @@ def business_projects_map_points(
         east=east,
         west=west,
         zoom=zoom,
+        tile=tile,
     )
+    return map_points_response(request, payload)
 
 
 @router.get("/business/opportunities/map-points")
 def business_opportunities_map_points(
+    request: Request,
     division_id: Optional[str] = None,
     division_id_not: Optional[str] = None,
     subdivision_id: Optional[str] = None,
@@ -7948,12 +7995,13 @@ def business_opportunities_map_points(
     east: Optional[float] = None,
     west: Optional[float] = None,
     zoom: Optional[float] = None,
+    tile: Optional[str] = None,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     """Lightweight map markers for opportunities list — same filters/permissions as business_opportunities."""
     from ..services.project_list_filters import filters_from_query_params
-    from ..services.project_map_service import get_project_map_points
+    from ..services.project_map_service import get_project_map_points, map_points_response
 
     filters = filters_from_query_params(
         division_id=division_id,
@@ -7974,7 +8022,7 @@ def business_opportunities_map_points(
         value_max=value_max,
         related_to_me=related_to_me,
     )
-    return get_project_map_points(
+    payload = get_project_map_points(
         db,
         user,
         business_line,
@@ -7985,7 +8033,9 @@ def business_opportunities_map_points(
         east=east,
         west=west,
         zoom=zoom,
+        tile=tile,
     )
+    return map_points_response(request, payload)
 
 
 @router.get("/business/projects/tab-counts")
@@ -16,7 +16,7 @@ from ..auth.security import get_current_user
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.attributes import flag_modified
 from ..storage.provider import StorageProvider
-from ..storage.blob_provider import BlobStorageProvider
+from ..storage.registry import get_blob_provider
 from ..storage.hybrid_provider import HybridStorageProvider
 from ..storage.provider import StorageProvider
 from ..models import models
@@ -25,6 +25,7 @@ from ..schemas import files as file_schemas
 from ..services.project_utils import sanitize_division_onsite_leads
 from ..proposals.pdf_merge import generate_pdf
 from ..proposals.pdf_image_optimizer import optimize_image_bytes
+from ..services import pdf_artifacts
 import httpx
 from PIL import Image as PILImage
 try:
@@ -109,6 +110,58 @@ async def generate_proposal(
     file_id = str(uuid.uuid4())
     output_path = os.path.join(UPLOAD_DIR, f"proposal_{file_id}.pdf")
 
+    def _audit_generation(cached: bool) -> None:
+        # Create audit log for PDF generation (also when served from the stored artifact)
+        try:
+            from ..services.audit import create_audit_log
+            create_audit_log(
+                db=db,
+                entity_type="proposal",
+                entity_id=file_id,
+                action="GENERATE_PDF",
+                actor_id=str(user.id) if user else None,
+                actor_role="user",
+                source="api",
+                changes_json={
+                    "cover_title": cover_title,
+                    "order_number": order_number,
+                    "project_name": project_name,
+                    "client_name": client_name,
+                    "total": total,
+                    "template_style": template_style,
+                },
+                context={
+                    "project_id": project_id,
+                    "proposal_created_for": proposal_created_for,
+                    "cached": cached,
+                }
+            )
+        except Exception:
+            pass
+
+    # Check if this is an opportunity (bidding project) or regular project
+    project_id_clean = (project_id or "").strip()
+    is_bidding = False
+    # True if this is for an opportunity or project (not a standalone quote)
+    # Use project_id presence as the source of truth (DB lookup is best-effort).
+    is_project = bool(project_id_clean)
+    if project_id_clean:
+        from ..models.models import Project
+        project = db.query(Project).filter(Project.id == project_id_clean, Project.deleted_at.is_(None)).first()
+        if project:
+            is_bidding = getattr(project, 'is_bidding', False) or False
+    
+    # Everything that shapes the PDF: form fields, uploaded image contents, opportunity flag.
+    # An unchanged proposal is served from the stored artifact without re-rendering.
+    form_data = await request.form()
+    artifact_key = pdf_artifacts.content_key(
+        "proposal", {"form": await pdf_artifacts.form_fingerprint(form_data), "is_bidding": is_bidding}
+    )
+    cached = pdf_artifacts.lookup("proposal", artifact_key)
+    if cached is not None:
+        _audit_generation(cached=True)
+        return pdf_artifacts.file_response(cached, "ProjectProposal.pdf", artifact_key, hit=True)
+
     cover_path, page2_path = None, None
 
     if cover_image and getattr(cover_image, "filename", ""):
@@ -169,7 +222,7 @@ async def generate_proposal(
                 pass
 
     # If no direct upload, but a file_object_id is provided, download the image from storage
-    storage: StorageProvider = BlobStorageProvider()
+    storage: StorageProvider = get_blob_provider()
     async def _download_fileobject_to_tmp(file_object_id: str, prefix: str) -> Optional[str]:
         try:
             fo = db.query(FileObject).filter(FileObject.id == file_object_id).first()
@@ -229,8 +282,6 @@ async def generate_proposal(
     except Exception:
         parsed_sections = []
 
-    form_data = await request.form()
-
     def _is_upload(v):
         return hasattr(v, "file") and hasattr(v, "filename")
 
@@ -273,18 +324,6 @@ async def generate_proposal(
                             except Exception:
                                 pass
 
-    # Check if this is an opportunity (bidding project) or regular project
-    project_id_clean = (project_id or "").strip()
-    is_bidding = False
-    # True if this is for an opportunity or project (not a standalone quote)
-    # Use project_id presence as the source of truth (DB lookup is best-effort).
-    is_project = bool(project_id_clean)
-    if project_id_clean:
-        from ..models.models import Project
-        project = db.query(Project).filter(Project.id == project_id_clean, Project.deleted_at.is_(None)).first()
-        if project:
-            is_bidding = getattr(project, 'is_bidding', False) or False
-    
     proposal_data = {
         "company_name": company_name,
         "company_address": company_address,
@@ -338,34 +377,9 @@ async def generate_proposal(
         except Exception:
             pass
 
-    # Create audit log for PDF generation
-    try:
-        from ..services.audit import create_audit_log
-        create_audit_log(
-            db=db,
-            entity_type="proposal",
-            entity_id=file_id,
-            action="GENERATE_PDF",
-            actor_id=str(user.id) if user else None,
-            actor_role="user",
-            source="api",
-            changes_json={
-                "cover_title": cover_title,
-                "order_number": order_number,
-                "project_name": project_name,
-                "client_name": client_name,
-                "total": total,
-                "template_style": template_style,
-            },
-            context={
-                "project_id": project_id,
-                "proposal_created_for": proposal_created_for,
-            }
-        )
-    except Exception:
-        pass
-
-    return FileResponse(output_path, media_type="application/pdf", filename="ProjectProposal.pdf")
+    _audit_generation(cached=False)
+    path = pdf_artifacts.store_file("proposal", artifact_key, output_path)
+    return pdf_artifacts.file_response(path, "ProjectProposal.pdf", artifact_key, hit=False)
 
 
 # ---------- Drafts ----------
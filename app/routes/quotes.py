@@ -1,3 +1,4 @@
+import hashlib
 import os
 import uuid
 import shutil
@@ -17,7 +18,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_, cast, String, Date, func
 import uuid
 from ..storage.provider import StorageProvider
-from ..storage.blob_provider import BlobStorageProvider
+from ..storage.registry import get_blob_provider
 from ..storage.hybrid_provider import HybridStorageProvider
 from ..storage.provider import StorageProvider
 from ..models import models
@@ -25,6 +26,7 @@ from ..schemas import files as file_schemas
 
 from ..proposals.pdf_merge import generate_pdf
 from ..proposals.pdf_image_optimizer import optimize_image_bytes
+from ..services import pdf_artifacts
 import httpx
 from PIL import Image as PILImage
 try:
@@ -63,6 +65,31 @@ UPLOAD_DIR = "var/uploads/quotes"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+def _product_image_digests(db: Session, pricing_sections: str, additional_costs: str) -> dict:
+    """Content hash of each referenced product's image; the PDF embeds it, so it is part of the key."""
+    product_ids = set()
+    try:
+        for section in json.loads(pricing_sections) or []:
+            for item in (section.get("items") or []) if isinstance(section, dict) else []:
+                if isinstance(item, dict) and (item.get("product_id") or item.get("productId")):
+                    product_ids.add(int(item.get("product_id") or item.get("productId")))
+    except Exception:
+        pass
+    try:
+        for cost in json.loads(additional_costs) or []:
+            if isinstance(cost, dict) and cost.get("product_id"):
+                product_ids.add(int(cost["product_id"]))
+    except Exception:
+        pass
+    if not product_ids:
+        return {}
+    rows = db.query(Material.id, Material.image_base64).filter(Material.id.in_(product_ids)).all()
+    return {
+        str(mid): hashlib.sha256(image.encode("utf-8")).hexdigest() if image else None
+        for mid, image in rows
+    }
+
+
 @router.post("/generate")
 async def generate_quote(
     request: Request,
@@ -104,6 +131,20 @@ async def generate_quote(
     page2_file_object_id: Optional[str] = Form(None),
     db: Session = Depends(get_db),
 ):
+    # Everything that shapes the PDF: form fields, uploaded image contents, product images.
+    # An unchanged quote is served from the stored artifact without re-rendering.
+    form_data = await request.form()
+    artifact_key = pdf_artifacts.content_key(
+        "quote",
+        {
+            "form": await pdf_artifacts.form_fingerprint(form_data),
+            "product_images": _product_image_digests(db, pricing_sections, additional_costs),
+        },
+    )
+    cached = pdf_artifacts.lookup("quote", artifact_key)
+    if cached is not None:
+        return pdf_artifacts.file_response(cached, "Quote.pdf", artifact_key, hit=True)
+
     file_id = str(uuid.uuid4())
     output_path = os.path.join(UPLOAD_DIR, f"quote_{file_id}.pdf")
 
@@ -167,7 +208,7 @@ async def generate_quote(
                 pass
 
     # If no direct upload, but a file_object_id is provided, download the image from storage
-    storage: StorageProvider = BlobStorageProvider()
+    storage: StorageProvider = get_blob_provider()
     async def _download_fileobject_to_tmp(file_object_id: str, prefix: str) -> Optional[str]:
         try:
             fo = db.query(FileObject).filter(FileObject.id == file_object_id).first()
@@ -282,8 +323,6 @@ async def generate_quote(
     except Exception:
         parsed_sections = []
 
-    form_data = await request.form()
-
     def _is_upload(v):
         return hasattr(v, "file") and hasattr(v, "filename")
 
@@ -397,7 +436,8 @@ async def generate_quote(
             except Exception:
                 pass
 
-    return FileResponse(output_path, media_type="application/pdf", filename="Quote.pdf")
+    path = pdf_artifacts.store_file("quote", artifact_key, output_path)
+    return pdf_artifacts.file_response(path, "Quote.pdf", artifact_key, hit=False)
 
 
 @router.get("/next-code")
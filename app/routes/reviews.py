@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import case, func, or_
 import copy
 import uuid
 from typing import Optional, List, Dict, Any, Set
@@ -15,6 +15,7 @@ from ..models.models import (
     ReviewCycle,
     ReviewAssignment,
     ReviewAnswer,
+    ReviewCycleProgress,
     User,
     EmployeeProfile,
     FormTemplate,
@@ -24,6 +25,7 @@ from ..models.models import (
 )
 from ..auth.security import get_current_user, require_permissions, require_roles, _has_permission
 from ..services.hierarchy import get_direct_reports
+from ..services.review_progress import CLOSED_CYCLE_STATUSES, ensure_cycle_progress
 from ..services.legacy_review_import import (
     auto_patch_field_type_for_legacy_row,
     detect_definition_type_fixes,
@@ -847,6 +849,125 @@ def list_cycles(db: Session = Depends(get_db), _=Depends(require_permissions("re
     ]
 
 
+@router.get("/cycles/open-summary")
+def open_cycles_summary(db: Session = Depends(get_db), _=Depends(require_permissions("reviews:read"))):
+    """Completion counts for every open cycle from one grouped read of review_cycle_progress."""
+    cycles = (
+        db.query(ReviewCycle)
+        .filter(func.lower(func.coalesce(ReviewCycle.status, "")).notin_(CLOSED_CYCLE_STATUSES))
+        .order_by(ReviewCycle.period_start.desc().nullslast())
+        .all()
+    )
+    if not cycles:
+        return []
+    ensure_cycle_progress(db, cycles)
+
+    P = ReviewCycleProgress
+    has_sup = P.supervisor_assignment_id.isnot(None)
+
+    def _count(cond):
+        return func.sum(case((cond, 1), else_=0))
+
+    listed = or_(P.in_scope.is_(True), P.self_assignment_id.isnot(None), has_sup)
+    agg = (
+        db.query(
+            P.cycle_id,
+            _count(listed),
+            _count(listed & P.employee_self_done.is_(True)),
+            _count(listed & P.supervisor_done.is_(True)),
+            _count(listed & P.both_done.is_(True)),
+            _count(listed & P.employee_self_done.is_(False)),
+            _count(listed & has_sup & P.supervisor_done.is_(False)),
+            _count(P.meeting_scheduled_at.isnot(None)),
+            _count(P.meeting_hr_pending_reschedule_at.isnot(None)),
+        )
+        .filter(P.cycle_id.in_([c.id for c in cycles]))
+        .group_by(P.cycle_id)
+        .all()
+    )
+    keys = (
+        "reviewees",
+        "employee_self_done",
+        "supervisor_done",
+        "both_done",
+        "missing_employee",
+        "missing_supervisor",
+        "meetings_scheduled",
+        "meetings_pending_reschedule",
+    )
+    by_cycle = {row[0]: dict(zip(keys, (int(v or 0) for v in row[1:]))) for row in agg}
+    out = []
+    for c in cycles:
+        counts = by_cycle.get(c.id) or dict.fromkeys(keys, 0)
+        out.append(
+            {
+                "id": str(c.id),
+                "name": c.name,
+                "status": c.status,
+                "period_start": c.period_start.isoformat() if c.period_start else None,
+                "period_end": c.period_end.isoformat() if c.period_end else None,
+                **counts,
+            }
+        )
+    return out
+
+
+@router.get("/progress/compare")
+def compare_cycle_progress(
+    cycle_ids: str,
+    user_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+    _=Depends(require_permissions("reviews:read")),
+):
+    """Per-reviewee status across several cycles (comma-separated cycle_ids), optionally for one user."""
+    cids: List[uuid.UUID] = []
+    for raw in (cycle_ids or "").split(","):
+        if not raw.strip():
+            continue
+        cid = _uuid_or_none(raw.strip())
+        if not cid:
+            raise HTTPException(status_code=400, detail="Invalid cycle_ids")
+        if cid not in cids:
+            cids.append(cid)
+    if not cids:
+        raise HTTPException(status_code=400, detail="cycle_ids required")
+    uid = None
+    if user_id:
+        uid = _uuid_or_none(user_id)
+        if not uid:
+            raise HTTPException(status_code=400, detail="Invalid user_id")
+    cycles = db.query(ReviewCycle).filter(ReviewCycle.id.in_(cids)).all()
+    found = {c.id for c in cycles}
+    if len(found) != len(cids):
+        raise HTTPException(status_code=404, detail="Cycle not found")
+    ensure_cycle_progress(db, cycles)
+
+    people: Dict[uuid.UUID, Dict[str, Any]] = {}
+    for p, ru, rep, su, sep in _progress_rows(db, cids, reviewee_id=uid):
+        person = people.get(p.reviewee_user_id)
+        if person is None:
+            disp = _user_label(ru, rep) or str(p.reviewee_user_id)
+            person = people[p.reviewee_user_id] = {
+                "user_id": str(p.reviewee_user_id),
+                "display_name": disp,
+                "cycles": {},
+            }
+        person["cycles"][str(p.cycle_id)] = {
+            "employee_self_done": p.employee_self_done,
+            "supervisor_done": p.supervisor_done,
+            "both_done": p.both_done,
+            "self_status": p.self_status,
+            "supervisor_status": p.supervisor_status,
+            "supervisor_display_name": _user_label(su, sep) if p.supervisor_user_id else None,
+            "director_meeting_scheduled_at": p.meeting_scheduled_at,
+        }
+    by_id = {c.id: c for c in cycles}
+    return {
+        "cycles": [{"id": str(cid), "name": by_id[cid].name, "status": by_id[cid].status} for cid in cids],
+        "reviewees": sorted(people.values(), key=lambda r: r["display_name"].lower()),
+    }
+
+
 @router.get("/cycles/{cycle_id}")
 def get_cycle(cycle_id: str, db: Session = Depends(get_db), _=Depends(require_permissions("reviews:read"))):
     cid = _uuid_or_none(cycle_id)
@@ -984,6 +1105,42 @@ def list_assignments(
     ]
 
 
+def _progress_rows(
+    db: Session,
+    cycle_ids: List[uuid.UUID],
+    *,
+    reviewee_id: Optional[uuid.UUID] = None,
+    listed_only: bool = True,
+    scheduled_only: bool = False,
+):
+    """Materialized progress rows with reviewee / supervisor user + profile, in one query."""
+    P = ReviewCycleProgress
+    RevUser, RevEp = aliased(User), aliased(EmployeeProfile)
+    SupUser, SupEp = aliased(User), aliased(EmployeeProfile)
+    q = (
+        db.query(P, RevUser, RevEp, SupUser, SupEp)
+        .outerjoin(RevUser, RevUser.id == P.reviewee_user_id)
+        .outerjoin(RevEp, RevEp.user_id == P.reviewee_user_id)
+        .outerjoin(SupUser, SupUser.id == P.supervisor_user_id)
+        .outerjoin(SupEp, SupEp.user_id == P.supervisor_user_id)
+        .filter(P.cycle_id.in_(cycle_ids))
+    )
+    if reviewee_id is not None:
+        q = q.filter(P.reviewee_user_id == reviewee_id)
+    if listed_only:
+        # Reviewees with only a schedule entry (e.g. out of scope, no assignments) are board-only.
+        q = q.filter(
+            or_(P.in_scope.is_(True), P.self_assignment_id.isnot(None), P.supervisor_assignment_id.isnot(None))
+        )
+    if scheduled_only:
+        q = q.filter(P.meeting_scheduled_at.isnot(None))
+    return q.all()
+
+
+def _user_label(u: Optional[User], ep: Optional[EmployeeProfile]) -> Optional[str]:
+    return _display_name_from_user_profile(u, ep) or (getattr(u, "username", None) if u else None)
+
+
 @router.get("/cycles/{cycle_id}/hr-status")
 def cycle_hr_status(cycle_id: str, db: Session = Depends(get_db), _=Depends(require_permissions("reviews:read"))):
     cid = _uuid_or_none(cycle_id)
@@ -992,96 +1149,40 @@ def cycle_hr_status(cycle_id: str, db: Session = Depends(get_db), _=Depends(requ
     c = db.query(ReviewCycle).filter(ReviewCycle.id == cid).first()
     if not c:
         raise HTTPException(status_code=404, detail="Cycle not found")
-    assigns = db.query(ReviewAssignment).filter(ReviewAssignment.cycle_id == cid).all()
-
-    by_reviewee = defaultdict(list)
-    for a in assigns:
-        by_reviewee[str(a.reviewee_user_id)].append(a)
-
-    for rid in _scoped_reviewee_ids(c, db):
-        by_reviewee.setdefault(str(rid), [])
-
-    all_uids: Set[uuid.UUID] = set()
-    for rid, arr in by_reviewee.items():
-        u = _uuid_or_none(rid)
-        if u:
-            all_uids.add(u)
-        for a in arr:
-            all_uids.add(a.reviewee_user_id)
-            all_uids.add(a.reviewer_user_id)
-
-    users_by_id: Dict[uuid.UUID, User] = {}
-    if all_uids:
-        for urow in db.query(User).filter(User.id.in_(list(all_uids))).all():
-            users_by_id[urow.id] = urow
-    ep_by_uid: Dict[uuid.UUID, EmployeeProfile] = {}
-    if all_uids:
-        for ep in db.query(EmployeeProfile).filter(EmployeeProfile.user_id.in_(list(all_uids))).all():
-            ep_by_uid[ep.user_id] = ep
-
-    sched_raw = getattr(c, "director_1on1_schedule", None) or {}
-    sched_map: Dict[str, Any] = sched_raw if isinstance(sched_raw, dict) else {}
-    merged_sched = _sched_reviewee_entries(sched_map)
-
-    def _label(uid: Optional[uuid.UUID]) -> Optional[str]:
-        if not uid:
-            return None
-        u = users_by_id.get(uid)
-        ep = ep_by_uid.get(uid)
-        return _display_name_from_user_profile(u, ep) or (getattr(u, "username", None) if u else None)
+    ensure_cycle_progress(db, [c])
 
     out = []
-    for reviewee_id, arr in by_reviewee.items():
-        rid = _uuid_or_none(reviewee_id)
-        if not rid:
-            continue
-        self_a = next((a for a in arr if str(a.reviewee_user_id) == str(a.reviewer_user_id)), None)
-        mgr_a = next((a for a in arr if str(a.reviewee_user_id) != str(a.reviewer_user_id)), None)
-        st_self = (self_a.status or "").lower() if self_a else ""
-        st_mgr = (mgr_a.status or "").lower() if mgr_a else ""
-        has_self_assignment = self_a is not None
-        has_supervisor_assignment = mgr_a is not None
-        employee_self_done = has_self_assignment and st_self == "submitted"
-        supervisor_done = has_supervisor_assignment and st_mgr == "submitted"
-        # No manager task in org chart → supervisor step does not block cycle completion.
-        both_done = employee_self_done and (supervisor_done or not has_supervisor_assignment)
-        missing_employee = not employee_self_done
-        missing_supervisor = has_supervisor_assignment and not supervisor_done
-        disp = _label(rid) or str(rid)
-        sup_uid = mgr_a.reviewer_user_id if mgr_a else None
-        meet = merged_sched.get(str(rid))
-        if not isinstance(meet, dict):
-            meet = {}
-        until_out = meet.get("scheduled_until")
-        if not until_out and meet.get("scheduled_at"):
-            st = _parse_iso_dt(meet.get("scheduled_at"))
-            if st:
-                until_out = _iso_utc_z(st + timedelta(minutes=_get_cycle_slot_duration(c)))
+    for p, ru, rep, su, sep in _progress_rows(db, [cid]):
+        rid = p.reviewee_user_id
+        disp = _user_label(ru, rep) or str(rid)
+        sup_uid = p.supervisor_user_id
+        has_self = p.self_assignment_id is not None
+        has_sup = p.supervisor_assignment_id is not None
         out.append(
             {
                 "user_id": str(rid),
                 "name": disp,
                 "display_name": disp,
                 "supervisor_user_id": str(sup_uid) if sup_uid else None,
-                "supervisor_display_name": _label(sup_uid) if sup_uid else None,
-                "employee_self_done": employee_self_done,
-                "supervisor_done": supervisor_done,
-                "both_done": both_done,
-                "missing_employee": missing_employee,
-                "missing_supervisor": missing_supervisor,
-                "self_assignment_id": str(self_a.id) if self_a else None,
-                "supervisor_assignment_id": str(mgr_a.id) if mgr_a else None,
-                "self_status": self_a.status if self_a else None,
-                "supervisor_status": mgr_a.status if mgr_a else None,
-                "self_due_date": self_a.due_date.isoformat() if self_a and self_a.due_date else None,
-                "supervisor_due_date": mgr_a.due_date.isoformat() if mgr_a and mgr_a.due_date else None,
-                "has_self_assignment": self_a is not None,
-                "has_supervisor_assignment": mgr_a is not None,
-                "director_meeting_scheduled_at": meet.get("scheduled_at"),
-                "director_meeting_scheduled_until": until_out,
-                "director_meeting_notes": meet.get("notes"),
-                "director_meeting_hr_pending_reschedule_at": meet.get("hr_pending_reschedule_at"),
-                "director_meeting_hr_pending_reschedule_message": meet.get("hr_pending_reschedule_message"),
+                "supervisor_display_name": _user_label(su, sep) if sup_uid else None,
+                "employee_self_done": p.employee_self_done,
+                "supervisor_done": p.supervisor_done,
+                "both_done": p.both_done,
+                "missing_employee": not p.employee_self_done,
+                "missing_supervisor": has_sup and not p.supervisor_done,
+                "self_assignment_id": str(p.self_assignment_id) if has_self else None,
+                "supervisor_assignment_id": str(p.supervisor_assignment_id) if has_sup else None,
+                "self_status": p.self_status,
+                "supervisor_status": p.supervisor_status,
+                "self_due_date": p.self_due_date.isoformat() if p.self_due_date else None,
+                "supervisor_due_date": p.supervisor_due_date.isoformat() if p.supervisor_due_date else None,
+                "has_self_assignment": has_self,
+                "has_supervisor_assignment": has_sup,
+                "director_meeting_scheduled_at": p.meeting_scheduled_at,
+                "director_meeting_scheduled_until": p.meeting_scheduled_until,
+                "director_meeting_notes": p.meeting_notes,
+                "director_meeting_hr_pending_reschedule_at": p.meeting_hr_pending_reschedule_at,
+                "director_meeting_hr_pending_reschedule_message": p.meeting_hr_pending_reschedule_message,
             }
         )
     out.sort(key=lambda r: (r.get("display_name") or "").lower())
@@ -1188,33 +1289,13 @@ def _build_director_meeting_board(c: ReviewCycle, db: Session) -> Dict[str, Any]
     if not isinstance(windows, list):
         windows = []
     slots_raw = _derive_slots_from_windows(duration, windows)
-    sched_src = getattr(c, "director_1on1_schedule", None) or {}
-    sched_map = sched_src if isinstance(sched_src, dict) else {}
-    sched_rev = _sched_reviewee_entries(sched_map)
+    ensure_cycle_progress(db, [c])
 
-    uids: Set[uuid.UUID] = set()
-    for uid_s in sched_rev.keys():
-        u = _uuid_or_none(uid_s)
-        if u:
-            uids.add(u)
-    users_by_id_str: Dict[str, User] = {}
-    ep_by_uid_str: Dict[str, EmployeeProfile] = {}
-    if uids:
-        uid_list = list(uids)
-        for urow in db.query(User).filter(User.id.in_(uid_list)).all():
-            users_by_id_str[str(urow.id)] = urow
-        for ep in db.query(EmployeeProfile).filter(EmployeeProfile.user_id.in_(uid_list)).all():
-            ep_by_uid_str[str(ep.user_id)] = ep
-
-    def _disp(uid: uuid.UUID) -> str:
-        sk = str(uid)
-        u = users_by_id_str.get(sk)
-        ep = ep_by_uid_str.get(sk)
-        return (
-            _display_name_from_user_profile(u, ep)
-            or (getattr(u, "username", None) if u else None)
-            or str(uid)
-        )
+    booked: List[tuple] = []
+    for p, ru, rep, _su, _sep in _progress_rows(db, [c.id], listed_only=False, scheduled_only=True):
+        entry = {"scheduled_at": p.meeting_scheduled_at, "scheduled_until": p.meeting_scheduled_until}
+        booked.append((str(p.reviewee_user_id), _user_label(ru, rep) or str(p.reviewee_user_id), entry))
+    booked.sort(key=lambda b: b[2]["scheduled_at"] or "")
 
     slots_out: List[Dict[str, Any]] = []
     for s in slots_raw:
@@ -1224,13 +1305,10 @@ def _build_director_meeting_board(c: ReviewCycle, db: Session) -> Dict[str, Any]
             continue
         booked_for: Optional[str] = None
         booked_name: Optional[str] = None
-        for uid_str, entry in sched_rev.items():
-            if not isinstance(entry, dict):
-                continue
+        for uid_str, name, entry in booked:
             if _booking_blocks_slot(entry, ss, se, duration):
                 booked_for = uid_str
-                bu = _uuid_or_none(uid_str)
-                booked_name = _disp(bu) if bu else uid_str
+                booked_name = name
                 break
         slots_out.append(
             {
@@ -1261,15 +1339,12 @@ def get_director_meeting_board(
     if not c:
         raise HTTPException(status_code=404, detail="Cycle not found")
     base = _build_director_meeting_board(c, db)
-    sched_src = getattr(c, "director_1on1_schedule", None) or {}
-    sched_map = sched_src if isinstance(sched_src, dict) else {}
-    merged_sched = _sched_reviewee_entries(sched_map)
-    my_ent = merged_sched.get(str(user.id))
+    mine = db.get(ReviewCycleProgress, (cid, user.id))
     hr_pending_reschedule: Optional[Dict[str, Any]] = None
-    if isinstance(my_ent, dict) and my_ent.get("hr_pending_reschedule_at"):
+    if mine is not None and mine.meeting_hr_pending_reschedule_at:
         hr_pending_reschedule = {
-            "since": my_ent.get("hr_pending_reschedule_at"),
-            "message": my_ent.get("hr_pending_reschedule_message"),
+            "since": mine.meeting_hr_pending_reschedule_at,
+            "message": mine.meeting_hr_pending_reschedule_message,
         }
     base["hr_pending_reschedule"] = hr_pending_reschedule
     return base
@@ -16,7 +16,6 @@ from ..models.models import (
     Shift,
     Project,
     EmployeeProfile,
-    AuditLog,
     FileObject,
     SubcontractorAttendance,
     SubcontractorWorker,
@@ -29,6 +28,15 @@ from ..services.attendance_job_labels import (
     resolve_job_label,
 )
 from ..services.standard_file_categories import ensure_standard_file_categories
+from ..services.exports import export_job_payload, normalize_format, start_export_job, stream_export
+from ..services.attendance_ledger import (
+    LEDGER_PAGE_DEFAULT,
+    LEDGER_PAGE_MAX,
+    deleted_shift_info,
+    ledger_export_params,
+    ledger_page,
+    parse_ledger_filters,
+)
 from ..services.training_matrix_slots import (
     ensure_training_matrix_slots,
     validate_cell_kind,
@@ -675,7 +683,6 @@ def delete_attendance(
     # Prefer precise linkage by source_attendance_id; fallback to legacy note pattern (pre-migration rows).
     if project_id and work_date:
         from ..models.models import ProjectTimeEntry
-        from sqlalchemy import or_, and_
         q = db.query(ProjectTimeEntry).filter(
             ProjectTimeEntry.project_id == project_id,
             ProjectTimeEntry.user_id == attendance.worker_id,
@@ -1189,6 +1196,139 @@ def _build_subcontractor_attendance_rows(
     return out
 
 
+def _ledger_worker_name(row) -> str:
+    name = (row.preferred_name or "").strip()
+    if not name:
+        name = " ".join(x for x in [(row.first_name or "").strip(), (row.last_name or "").strip()] if x)
+    return name or row.username or "Unknown"
+
+
+def _ledger_items(db: Session, rows) -> List[dict]:
+    """Attendance list items from attendance_ledger rows (worker / shift / project already joined)."""
+    import logging
+
+    logger = logging.getLogger(__name__)
+    direct_job_types = [
+        parse_job_type_from_reason_text(r.Attendance.reason_text)
+        for r in rows
+        if not r.Attendance.shift_id and r.Attendance.reason_text
+    ]
+    projects_dict = load_projects_by_id(db, collect_project_ids_from_job_types([jt for jt in direct_job_types if jt]))
+
+    # Who deleted missing / soft-deleted shifts: one query for the page, latest DELETE per shift.
+    shift_deletions = deleted_shift_info(
+        db,
+        {
+            r.Attendance.shift_id
+            for r in rows
+            if r.Attendance.shift_id and (r.shift_row_id is None or r.shift_status == "deleted")
+        },
+    )
+
+    result = []
+    for row in rows:
+        att = row.Attendance
+        try:
+            job_name = None
+            project_name = None
+            if att.shift_id and row.shift_row_id is not None:
+                job_name = row.job_name
+                project_name = row.project_name
+            elif att.reason_text and att.reason_text.startswith("JOB_TYPE:"):
+                job_type = parse_job_type_from_reason_text(att.reason_text)
+                if job_type:
+                    job_name, resolved_project_name = resolve_job_label(
+                        db,
+                        job_type,
+                        project_name=project_name,
+                        projects_by_id=projects_dict,
+                    )
+                    if resolved_project_name:
+                        project_name = resolved_project_name
+
+            # Calculate hours - NEW MODEL: clock_in_time and clock_out_time are in the same record
+            hours_worked = None
+            if att.clock_in_time and att.clock_out_time:
+                hours_worked = (att.clock_out_time - att.clock_in_time).total_seconds() / 3600
+            elif "HOURS_WORKED:" in (att.reason_text or ""):
+                # Extract hours_worked from reason_text for "hours worked" entries
+                for part in (att.reason_text or "").split("|"):
+                    if part.startswith("HOURS_WORKED:"):
+                        try:
+                            hours_worked = float(part.replace("HOURS_WORKED:", ""))
+                        except ValueError:
+                            pass
+                        break
+
+            # Determine type for backward compatibility
+            att_type = None
+            if att.clock_in_time:
+                att_type = "in"
+            elif att.clock_out_time:
+                att_type = "out"
+
+            time_selected = att.clock_in_time if att.clock_in_time else att.clock_out_time
+            time_entered = att.clock_in_entered_utc if att.clock_in_time else att.clock_out_entered_utc
+
+            # Use break_minutes from database (already calculated and saved, including manual breaks)
+            break_minutes = att.break_minutes
+            if break_minutes is None and att.clock_in_time and att.clock_out_time:
+                # Fallback: calculate if not set (for old records or edge cases)
+                break_minutes = calculate_break_minutes(db, att.worker_id, att.clock_in_time, att.clock_out_time)
+
+            # Check if shift was deleted (soft-delete uses status="deleted")
+            shift_deleted = bool(att.shift_id) and (row.shift_row_id is None or row.shift_status == "deleted")
+            shift_deleted_at, shift_deleted_by = shift_deletions.get(str(att.shift_id), (None, None))
+
+            has_shift_project = row.shift_row_id is not None and row.shift_project_id is not None
+            gps_acc = None
+            for acc in (att.clock_out_gps_accuracy_m, att.clock_in_gps_accuracy_m):
+                if gps_acc is None and acc is not None:
+                    try:
+                        gps_acc = float(acc)
+                    except (TypeError, ValueError):
+                        pass
+
+            result.append({
+                "id": str(att.id),
+                "record_kind": "internal",
+                "worker_id": str(att.worker_id),
+                "worker_name": _ledger_worker_name(row),
+                "type": att_type,  # For backward compatibility
+                "clock_in_time": att.clock_in_time.isoformat() if att.clock_in_time else None,
+                "clock_out_time": att.clock_out_time.isoformat() if att.clock_out_time else None,
+                "time_selected_utc": time_selected.isoformat() if time_selected else None,  # Backward compatibility
+                "time_entered_utc": time_entered.isoformat() if time_entered else None,  # Backward compatibility
+                "clock_in_entered_utc": att.clock_in_entered_utc.isoformat() if att.clock_in_entered_utc else None,
+                "clock_out_entered_utc": att.clock_out_entered_utc.isoformat() if att.clock_out_entered_utc else None,
+                "status": att.status,
+                "source": att.source,
+                "shift_id": str(att.shift_id) if att.shift_id else None,
+                "job_name": job_name,
+                "project_name": project_name,
+                "project_id": str(row.shift_project_id) if has_shift_project else None,
+                "project_address": _format_project_address_line(row) if row.project_row_id is not None else None,
+                "hours_worked": round(hours_worked, 2) if hours_worked else None,
+                "break_minutes": break_minutes,
+                "reason_text": att.reason_text,
+                "gps_lat": float(att.clock_in_gps_lat) if att.clock_in_gps_lat else (float(att.clock_out_gps_lat) if att.clock_out_gps_lat else None),
+                "gps_lng": float(att.clock_in_gps_lng) if att.clock_in_gps_lng else (float(att.clock_out_gps_lng) if att.clock_out_gps_lng else None),
+                "gps_accuracy_m": gps_acc,
+                "created_at": att.created_at.isoformat() if att.created_at else None,
+                "approved_at": att.approved_at.isoformat() if att.approved_at else None,
+                "approved_by": str(att.approved_by) if att.approved_by else None,
+                "shift_deleted": shift_deleted,
+                "shift_deleted_by": shift_deleted_by,
+                "shift_deleted_at": shift_deleted_at,
+                "_sort_ts": time_selected.isoformat() if time_selected else "",
+            })
+        except Exception as e:
+            logger.error(f"Error processing attendance {att.id}: {str(e)}", exc_info=True)
+            # Continue processing other attendances even if one fails
+            continue
+    return result
+
+
 @router.get("/attendance/list")
 def list_attendances(
     worker_id: Optional[str] = None,
@@ -1241,302 +1381,20 @@ def list_attendances(
                 it.pop("_sort_ts", None)
             return sc_only
 
-        # Query attendances directly without joins first
-        query = db.query(Attendance)
-        
+        filters = parse_ledger_filters(
+            worker_id=worker_id,
+            start_date=start_date,
+            end_date=end_date,
+            status=status,
+            type_filter=type_filter,
+            project_id=project_id,
+            strict=False,
+        )
         # If user doesn't have permission, restrict to their own attendances
         if not has_permission:
-            query = query.filter(Attendance.worker_id == user.id)
-        
-        # Apply filters
-        if worker_id:
-            try:
-                query = query.filter(Attendance.worker_id == uuid.UUID(worker_id))
-            except Exception as e:
-                logger.warning(f"Invalid worker_id format: {worker_id}, error: {e}")
-                pass
-        if status:
-            query = query.filter(Attendance.status == status)
-        # NEW MODEL: type_filter is not directly applicable, but we can filter by clock_in_time/clock_out_time
-        # For backward compatibility, if type_filter is "in", only show records with clock_in_time
-        # If type_filter is "out", only show records with clock_out_time
-        if type_filter == "in":
-            query = query.filter(Attendance.clock_in_time.isnot(None))
-        elif type_filter == "out":
-            query = query.filter(Attendance.clock_out_time.isnot(None))
-        
-        if start_date:
-            try:
-                start_dt = datetime.fromisoformat(start_date).date()
-                start_dt_utc = datetime.combine(start_dt, time.min).replace(tzinfo=timezone.utc)
-                # Filter by clock_in_time or clock_out_time
-                query = query.filter(
-                    or_(
-                        and_(Attendance.clock_in_time.isnot(None), Attendance.clock_in_time >= start_dt_utc),
-                        and_(Attendance.clock_in_time.is_(None), Attendance.clock_out_time.isnot(None), Attendance.clock_out_time >= start_dt_utc)
-                    )
-                )
-            except Exception as e:
-                logger.warning(f"Invalid start_date format: {start_date}, error: {e}")
-                pass
-        if end_date:
-            try:
-                end_dt = datetime.fromisoformat(end_date).date()
-                end_dt_utc = datetime.combine(end_dt + timedelta(days=1), time.min).replace(tzinfo=timezone.utc)
-                # Filter by clock_in_time or clock_out_time
-                query = query.filter(
-                    or_(
-                        and_(Attendance.clock_in_time.isnot(None), Attendance.clock_in_time < end_dt_utc),
-                        and_(Attendance.clock_in_time.is_(None), Attendance.clock_out_time.isnot(None), Attendance.clock_out_time < end_dt_utc)
-                    )
-                )
-            except Exception as e:
-                logger.warning(f"Invalid end_date format: {end_date}, error: {e}")
-                pass
-        
-        # Filter by project_id (through shift) or job_type (through reason_text)
-        if project_id:
-            # Check if it's a job filter (prefixed with "job_")
-            if project_id.startswith("job_"):
-                # Extract job_type from "job_{job_type}"
-                job_type = project_id.replace("job_", "")
-                # Filter by attendances with shift_id NULL and reason_text starting with JOB_TYPE:{job_type}
-                query = query.filter(
-                    and_(
-                        Attendance.shift_id.is_(None),
-                        Attendance.reason_text.like(f"JOB_TYPE:{job_type}%")
-                    )
-                )
-            else:
-                # It's a project UUID - filter through shift
-                try:
-                    project_uuid = uuid.UUID(project_id)
-                    # Join with Shift to filter by project_id
-                    query = query.join(Shift, Attendance.shift_id == Shift.id).filter(Shift.project_id == project_uuid).distinct()
-                except Exception as e:
-                    logger.warning(f"Invalid project_id format: {project_id}, error: {e}")
-                    pass
-        
-        # Order by clock_in_time or clock_out_time
-        from sqlalchemy import func
-        attendances = query.order_by(func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time).desc()).limit(1000).all()
-        total_in_db = db.query(Attendance).count()
-        logger.info(f"Query returned {len(attendances)} attendance records (total in DB: {total_in_db})")
-        
-        # Debug: log first few attendance IDs if any
-        if attendances:
-            logger.info(f"First attendance IDs: {[str(a.id) for a in attendances[:3]]}")
-        else:
-            logger.warning(f"No attendances found from query, but DB has {total_in_db} records!")
-        
-        # Get all unique worker IDs and shift IDs for batch fetching
-        worker_ids_str = list(set([str(a.worker_id) for a in attendances]))
-        logger.info(f"Unique worker IDs (as strings): {worker_ids_str}")
-        users_dict = {}
-        profiles_dict = {}
-        if worker_ids_str:
-            try:
-                # Convert string IDs to UUID for query
-                worker_ids_uuid = [uuid.UUID(wid) for wid in worker_ids_str]
-                users = db.query(User).filter(User.id.in_(worker_ids_uuid)).all()
-                users_dict = {str(u.id): u for u in users}
-                logger.info(f"Found {len(users_dict)} users for {len(worker_ids_uuid)} worker IDs")
-            except Exception as e:
-                logger.error(f"Error fetching users: {e}", exc_info=True)
-            try:
-                # Convert string IDs to UUID for query
-                worker_ids_uuid = [uuid.UUID(wid) for wid in worker_ids_str]
-                profiles = db.query(EmployeeProfile).filter(EmployeeProfile.user_id.in_(worker_ids_uuid)).all()
-                profiles_dict = {str(p.user_id): p for p in profiles}
-                logger.info(f"Found {len(profiles_dict)} profiles for {len(worker_ids_uuid)} worker IDs")
-            except Exception as e:
-                logger.error(f"Error fetching profiles: {e}", exc_info=True)
-        
-        shift_ids = [str(a.shift_id) for a in attendances if a.shift_id]
-        shifts_dict = {}
-        projects_dict = {}
-        if shift_ids:
-            shifts_dict = {str(s.id): s for s in db.query(Shift).filter(Shift.id.in_(shift_ids)).all()}
-            project_ids = [str(s.project_id) for s in shifts_dict.values() if s.project_id]
-            if project_ids:
-                projects_dict = {str(p.id): p for p in db.query(Project).filter(Project.id.in_(project_ids)).all()}
-
-        direct_job_types = [
-            parse_job_type_from_reason_text(att.reason_text)
-            for att in attendances
-            if not att.shift_id and att.reason_text
-        ]
-        direct_project_ids = collect_project_ids_from_job_types(
-            [jt for jt in direct_job_types if jt]
-        )
-        if direct_project_ids:
-            projects_dict.update(load_projects_by_id(db, direct_project_ids))
-        
-        result = []
-        logger.info(f"Processing {len(attendances)} attendances...")
-        for i, att in enumerate(attendances):
-            try:
-                logger.debug(f"Processing attendance {i+1}/{len(attendances)}: {att.id}")
-                worker = users_dict.get(str(att.worker_id))
-                profile = profiles_dict.get(str(att.worker_id))
-                
-                # Get worker name
-                worker_name = worker.username if worker else "Unknown"
-                if profile:
-                    name = (profile.preferred_name or '').strip()
-                    if not name:
-                        first = (profile.first_name or '').strip()
-                        last = (profile.last_name or '').strip()
-                        name = ' '.join([x for x in [first, last] if x])
-                    if name:
-                        worker_name = name
-                
-                # Get job/project info
-                job_name = None
-                project_name = None
-                if att.shift_id and str(att.shift_id) in shifts_dict:
-                    shift = shifts_dict[str(att.shift_id)]
-                    job_name = shift.job_name
-                    if shift.project_id and str(shift.project_id) in projects_dict:
-                        project = projects_dict[str(shift.project_id)]
-                        project_name = project.name
-                elif att.reason_text and att.reason_text.startswith("JOB_TYPE:"):
-                    job_type = parse_job_type_from_reason_text(att.reason_text)
-                    if job_type:
-                        job_name, resolved_project_name = resolve_job_label(
-                            db,
-                            job_type,
-                            project_name=project_name,
-                            projects_by_id=projects_dict,
-                        )
-                        if resolved_project_name:
-                            project_name = resolved_project_name
-                
-                # Calculate hours - NEW MODEL: clock_in_time and clock_out_time are in the same record
-                hours_worked = None
-                if att.clock_in_time and att.clock_out_time:
-                    diff = att.clock_out_time - att.clock_in_time
-                    hours_worked = diff.total_seconds() / 3600  # Convert to hours
-                elif "HOURS_WORKED:" in (att.reason_text or ""):
-                    # Extract hours_worked from reason_text for "hours worked" entries
-                    parts = (att.reason_text or "").split("|")
-                    for part in parts:
-                        if part.startswith("HOURS_WORKED:"):
-                            try:
-                                hours_worked = float(part.replace("HOURS_WORKED:", ""))
-                            except:
-                                pass
-                            break
-                
-                # Determine type for backward compatibility
-                att_type = None
-                if att.clock_in_time and att.clock_out_time:
-                    att_type = "in"  # Complete event
-                elif att.clock_in_time:
-                    att_type = "in"
-                elif att.clock_out_time:
-                    att_type = "out"
-                
-                time_selected = att.clock_in_time if att.clock_in_time else att.clock_out_time
-                time_entered = att.clock_in_entered_utc if att.clock_in_time else att.clock_out_entered_utc
-                
-                # Use break_minutes from database (already calculated and saved, including manual breaks)
-                # Only calculate if not already set in database
-                break_minutes = att.break_minutes
-                if break_minutes is None and att.clock_in_time and att.clock_out_time:
-                    # Fallback: calculate if not set (for old records or edge cases)
-                    break_minutes = calculate_break_minutes(
-                        db, att.worker_id, att.clock_in_time, att.clock_out_time
-                    )
-                
-                # Check if shift was deleted (soft-delete uses status="deleted")
-                shift_deleted = False
-                shift_deleted_by = None
-                shift_deleted_at = None
-                
-                if att.shift_id:
-                    shift = shifts_dict.get(str(att.shift_id)) if att.shift_id else None
-                    if not shift or getattr(shift, "status", None) == "deleted":
-                        shift_deleted = True
-                        # Get information about who deleted the shift from audit log
-                        delete_log = db.query(AuditLog).filter(
-                            AuditLog.entity_type == "shift",
-                            AuditLog.entity_id == att.shift_id,
-                            AuditLog.action == "DELETE"
-                        ).order_by(AuditLog.timestamp_utc.desc()).first()
-                        
-                        if delete_log:
-                            shift_deleted_at = delete_log.timestamp_utc.isoformat() if delete_log.timestamp_utc else None
-                            # Get actor name
-                            actor = db.query(User).filter(User.id == delete_log.actor_id).first()
-                            if actor:
-                                shift_deleted_by = actor.username or actor.email or str(delete_log.actor_id)
-                            else:
-                                shift_deleted_by = str(delete_log.actor_id)
-
-                shift_row = shifts_dict.get(str(att.shift_id)) if att.shift_id else None
-                project_id_str = str(shift_row.project_id) if shift_row and shift_row.project_id else None
-                proj_for_addr = None
-                if shift_row and shift_row.project_id:
-                    proj_for_addr = projects_dict.get(str(shift_row.project_id))
-                project_address_str = _format_project_address_line(proj_for_addr)
-                gps_acc = None
-                if att.clock_out_gps_accuracy_m is not None:
-                    try:
-                        gps_acc = float(att.clock_out_gps_accuracy_m)
-                    except (TypeError, ValueError):
-                        pass
-                if gps_acc is None and att.clock_in_gps_accuracy_m is not None:
-                    try:
-                        gps_acc = float(att.clock_in_gps_accuracy_m)
-                    except (TypeError, ValueError):
-                        pass
-
-                result.append({
-                    "id": str(att.id),
-                    "record_kind": "internal",
-                    "worker_id": str(att.worker_id),
-                    "worker_name": worker_name,
-                    "type": att_type,  # For backward compatibility
-                    "clock_in_time": att.clock_in_time.isoformat() if att.clock_in_time else None,
-                    "clock_out_time": att.clock_out_time.isoformat() if att.clock_out_time else None,
-                    "time_selected_utc": time_selected.isoformat() if time_selected else None,  # Backward compatibility
-                    "time_entered_utc": time_entered.isoformat() if time_entered else None,  # Backward compatibility
-                    "clock_in_entered_utc": att.clock_in_entered_utc.isoformat() if att.clock_in_entered_utc else None,
-                    "clock_out_entered_utc": att.clock_out_entered_utc.isoformat() if att.clock_out_entered_utc else None,
-                    "status": att.status,
-                    "source": att.source,
-                    "shift_id": str(att.shift_id) if att.shift_id else None,
-                    "job_name": job_name,
-                    "project_name": project_name,
-                    "project_id": project_id_str,
-                    "project_address": project_address_str,
-                    "hours_worked": round(hours_worked, 2) if hours_worked else None,
-                    "break_minutes": break_minutes,
-                    "reason_text": att.reason_text,
-                    "gps_lat": float(att.clock_in_gps_lat) if att.clock_in_gps_lat else (float(att.clock_out_gps_lat) if att.clock_out_gps_lat else None),
-                    "gps_lng": float(att.clock_in_gps_lng) if att.clock_in_gps_lng else (float(att.clock_out_gps_lng) if att.clock_out_gps_lng else None),
-                    "gps_accuracy_m": gps_acc,
-                    "created_at": att.created_at.isoformat() if att.created_at else None,
-                    "approved_at": att.approved_at.isoformat() if att.approved_at else None,
-                    "approved_by": str(att.approved_by) if att.approved_by else None,
-                    "shift_deleted": shift_deleted,
-                    "shift_deleted_by": shift_deleted_by,
-                    "shift_deleted_at": shift_deleted_at,
-                    "_sort_ts": time_selected.isoformat() if time_selected else "",
-                })
-            except Exception as e:
-                logger.error(f"Error processing attendance {att.id}: {str(e)}", exc_info=True)
-                # Continue processing other attendances even if one fails
-                continue
-        
-        logger.info(f"Returning {len(result)} attendance records (from {len(attendances)} raw records)")
-        if len(result) == 0 and len(attendances) > 0:
-            logger.warning(f"WARNING: Found {len(attendances)} attendance records but result list is empty!")
-            # Debug: try to see what's wrong
-            for i, att in enumerate(attendances[:3]):
-                att_type = "in" if att.clock_in_time else ("out" if att.clock_out_time else "unknown")
-                logger.warning(f"  Attendance {i+1}: id={att.id}, worker_id={att.worker_id}, type={att_type}, shift_id={att.shift_id}")
+            filters.only_worker_id = user.id
+        rows, _next = ledger_page(db, filters, limit=LEDGER_PAGE_MAX)
+        result = _ledger_items(db, rows)
         internal_result = result if isinstance(result, list) else []
         if rk == "internal":
             for it in internal_result:
@@ -1570,6 +1428,103 @@ def list_attendances(
         return []
 
 
+@router.get("/attendance/ledger")
+def attendance_ledger(
+    cursor: Optional[str] = None,
+    limit: int = Query(LEDGER_PAGE_DEFAULT, ge=1, le=LEDGER_PAGE_MAX),
+    worker_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status: Optional[str] = None,
+    type_filter: Optional[str] = None,
+    project_id: Optional[str] = None,
+    format: Optional[str] = Query(None, description="csv | xlsx: stream the whole payroll period instead of a page"),
+    db: Session = Depends(get_db),
+    user: UserType = Depends(get_current_user),
+):
+    """Internal attendance, newest first, in cursor pages: pass next_cursor back as cursor.
+
+    With format=csv|xlsx the whole filtered range is streamed (start_date and end_date required),
+    grouped by worker in clock order for payroll.
+    """
+    from ..auth.security import _has_permission
+
+    filters = parse_ledger_filters(
+        worker_id=worker_id,
+        start_date=start_date,
+        end_date=end_date,
+        status=status,
+        type_filter=type_filter,
+        project_id=project_id,
+    )
+    can_view_others = (
+        _has_permission(user, "users:read")
+        or _has_permission(user, "hr:attendance:read")
+        or _has_permission(user, "hr:users:view:timesheet")
+    )
+    if not can_view_others:
+        filters.only_worker_id = user.id
+
+    if format:
+        fmt = normalize_format(format)
+        if not (filters.start_date and filters.end_date):
+            raise HTTPException(status_code=400, detail="start_date and end_date are required for exports")
+        if filters.end_date < filters.start_date:
+            raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+        filename = f"payroll-attendance-{filters.start_date.isoformat()}-{filters.end_date.isoformat()}"
+        return stream_export("attendance_ledger", ledger_export_params(filters), fmt, filename)
+
+    rows, next_cursor = ledger_page(db, filters, limit=limit, cursor=cursor)
+    items = _ledger_items(db, rows)
+    for it in items:
+        it.pop("_sort_ts", None)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/attendance/export")
+def export_attendances(
+    worker_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status: Optional[str] = None,
+    project_id: Optional[str] = None,
+    format: str = Query("csv", description="csv | xlsx"),
+    mode: str = Query("stream", description="stream | job"),
+    db: Session = Depends(get_db),
+    user: UserType = Depends(get_current_user),
+):
+    """Export internal attendances (same visibility as /attendance/list) as CSV or XLSX."""
+    from ..auth.security import _has_permission
+
+    fmt = normalize_format(format)
+    can_view_others = (
+        _has_permission(user, "users:read")
+        or _has_permission(user, "hr:attendance:read")
+        or _has_permission(user, "hr:users:view:timesheet")
+    )
+    try:
+        for value in (start_date, end_date):
+            if value:
+                date.fromisoformat(value)
+        wid = uuid.UUID(worker_id) if worker_id else None
+        pid = uuid.UUID(project_id) if project_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid filter value")
+    if not can_view_others:
+        wid = user.id
+    params = {
+        "worker_id": wid,
+        "start_date": start_date,
+        "end_date": end_date,
+        "status": status,
+        "project_id": pid,
+    }
+    filename = f"attendance-{start_date or 'all'}-{end_date or 'all'}"
+    if mode == "job":
+        return export_job_payload(start_export_job(db, "attendance", params, fmt, filename, user.id))
+    return stream_export("attendance", params, fmt, filename)
+
+
 @router.get("/attendance/{attendance_id}")
 def get_attendance(
     attendance_id: str,
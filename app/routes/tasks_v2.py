@@ -2,15 +2,25 @@ import uuid
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
 from pydantic import BaseModel
 from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session, joinedload
 import structlog
 
-from ..auth.security import get_current_user
-from ..db import get_db
+from ..auth.security import decode_token, get_current_user
+from ..db import SessionLocal, get_db
 from ..models.models import EmployeeProfile, SettingItem, TaskItem, TaskLogEntry, User, user_divisions
+from ..services.chat_hub import hub
+from ..services.task_feed import (
+    after_cursor_filter,
+    decode_cursor,
+    encode_cursor,
+    publish_task_change,
+    publish_task_deleted,
+    task_channels,
+    viewer_channels,
+)
 from ..services.task_service import create_task_item, get_user_display
 
 
@@ -228,6 +238,104 @@ def tasks_sync(db: Session = Depends(get_db), me: User = Depends(get_current_use
     }
 
 
+@router.get("/changes")
+def tasks_changes(
+    cursor: Optional[str] = Query(None, description="Cursor from a previous /tasks/changes call or task_changed event"),
+    limit: int = Query(200, ge=1, le=500),
+    db: Session = Depends(get_db),
+    me: User = Depends(get_current_user),
+):
+    """
+    Delta feed for the task board. Without a cursor returns only the current head cursor
+    (load /tasks first, then resume from it). With a cursor returns the visible tasks,
+    archived ones included, whose updated_at moved past it, oldest first.
+    """
+    viewer_divisions = _get_viewer_divisions(db, me.id)
+    viewer_division = viewer_divisions[0] if viewer_divisions else None
+    visible = _tasks_filter_for_user(me, viewer_divisions)
+
+    if not cursor:
+        head = (
+            db.query(TaskItem.updated_at, TaskItem.id)
+            .filter(visible, TaskItem.updated_at.isnot(None))
+            .order_by(TaskItem.updated_at.desc(), TaskItem.id.desc())
+            .first()
+        )
+        return {
+            "tasks": [],
+            "cursor": encode_cursor(head[0], head[1]) if head else None,
+            "has_more": False,
+        }
+
+    try:
+        position = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = (
+        db.query(TaskItem)
+        .filter(visible, after_cursor_filter(position))
+        .order_by(TaskItem.updated_at.asc(), TaskItem.id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1].updated_at, rows[-1].id) if rows else cursor
+    return {
+        "tasks": [
+            _serialize_task(t, viewer_id=me.id, viewer_division=viewer_division, viewer_divisions=viewer_divisions)
+            for t in rows
+        ],
+        "cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+@router.websocket("/ws")
+async def ws_tasks(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Push channel for the task board: sends {"event": "task_changed", "data": {task_id, kind, cursor}}
+    for tasks assigned to the user or their divisions. Clients then call /tasks/changes.
+    """
+    # Same rule as /ws/chat: never hold a DB session for the socket lifetime.
+    if not token:
+        await websocket.close(code=4401)
+        return
+    try:
+        payload = decode_token(token)
+        user_id = uuid.UUID(str(payload.get("sub")))
+    except Exception:
+        await websocket.close(code=4401)
+        return
+
+    db = SessionLocal()
+    try:
+        u = db.query(User).filter(User.id == user_id).first()
+        if not u or not u.is_active:
+            await websocket.close(code=4401)
+            return
+        channels = viewer_channels(user_id, _get_viewer_divisions(db, user_id))
+    finally:
+        db.close()
+
+    await websocket.accept()
+    await hub.subscribe(websocket, channels)
+    try:
+        while True:
+            data = await websocket.receive_text()
+            if data and data.strip().lower() in {"ping", "keepalive"}:
+                await websocket.send_text("pong")
+    except WebSocketDisconnect:
+        await hub.unsubscribe(websocket)
+    except Exception:
+        await hub.unsubscribe(websocket)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+
 @router.get("/archived")
 def list_archived_tasks(
     limit: int = Query(100, ge=1, le=200),
@@ -399,7 +507,7 @@ def create_task(payload: TaskCreate, db: Session = Depends(get_db), me: User = D
     if not created_tasks:
         raise HTTPException(status_code=400, detail="No valid assignees found")
 
-    db.commit()
+    db.commit()  # create_task_item queued the task_changed events; they go out on commit
 
     # Return the first created task (frontend will refresh the list)
     db.refresh(created_tasks[0])
@@ -531,6 +639,7 @@ def update_task_title(
         _add_task_log(db, task, me, "title_changed", f'Title changed: "{old_title}" → "{title}"')
     db.commit()
     db.refresh(task)
+    publish_task_change(task, "updated")
     return _serialize_task(task, viewer_id=me.id, viewer_division=viewer_division, viewer_divisions=viewer_divisions)
 
 
@@ -554,6 +663,7 @@ def update_task_description(
         _add_task_log(db, task, me, "description_changed", "Description updated")
     db.commit()
     db.refresh(task)
+    publish_task_change(task, "updated")
     return _serialize_task(task, viewer_id=me.id, viewer_division=viewer_division, viewer_divisions=viewer_divisions)
 
 
@@ -572,6 +682,8 @@ def update_task(
     _ensure_action_permission(task, me, viewer_divisions)
 
     changes: list[str] = []
+    previous_user_id = task.assigned_to_id
+    previous_division = task.assigned_division_label
 
     if payload.priority is not None:
         priority = (payload.priority or "normal").lower()
@@ -633,6 +745,7 @@ def update_task(
     _add_task_log(db, task, me, "updated", "; ".join(changes))
     db.commit()
     db.refresh(task)
+    publish_task_change(task, "updated", previous_user_id=previous_user_id, previous_division=previous_division)
     return _serialize_task(task, viewer_id=me.id, viewer_division=viewer_division, viewer_divisions=viewer_divisions)
 
 
@@ -654,6 +767,7 @@ def block_task(task_id: str, db: Session = Depends(get_db), me: User = Depends(g
 
     db.commit()
     db.refresh(task)
+    publish_task_change(task, "updated")
     return _serialize_task(task, viewer_id=me.id, viewer_division=viewer_division, viewer_divisions=viewer_divisions)
 
 
@@ -675,6 +789,7 @@ def unblock_task(task_id: str, db: Session = Depends(get_db), me: User = Depends
 
     db.commit()
     db.refresh(task)
+    publish_task_change(task, "updated")
     return _serialize_task(task, viewer_id=me.id, viewer_division=viewer_division, viewer_divisions=viewer_divisions)
 
 
@@ -704,6 +819,7 @@ def start_task(task_id: str, db: Session = Depends(get_db), me: User = Depends(g
 
     db.commit()
     db.refresh(task)
+    publish_task_change(task, "updated")
     return _serialize_task(task, viewer_id=me.id, viewer_division=viewer_division, viewer_divisions=viewer_divisions)
 
 
@@ -734,6 +850,7 @@ def conclude_task(task_id: str, db: Session = Depends(get_db), me: User = Depend
 
     db.commit()
     db.refresh(task)
+    publish_task_change(task, "updated")
     return _serialize_task(task, viewer_id=me.id, viewer_division=viewer_division, viewer_divisions=viewer_divisions)
 
 
@@ -758,6 +875,7 @@ def archive_task(task_id: str, db: Session = Depends(get_db), me: User = Depends
 
     db.commit()
     db.refresh(task)
+    publish_task_change(task, "archived")
     return _serialize_task(task, viewer_id=me.id, viewer_division=viewer_division, viewer_divisions=viewer_divisions)
 
 
@@ -774,8 +892,11 @@ def delete_task(task_id: str, db: Session = Depends(get_db), me: User = Depends(
     if task.requested_by_id != me.id:
         raise HTTPException(status_code=403, detail="You can only delete tasks you created")
     
+    deleted_id = task.id
+    channels = task_channels(task)
     db.delete(task)
     db.commit()
+    publish_task_deleted(deleted_id, channels)
     return {"message": "Task deleted"}
 
 
@@ -812,7 +933,10 @@ def add_task_log(task_id: str, payload: TaskLogCreate, db: Session = Depends(get
         actor_name=get_user_display(db, me.id),
     )
     db.add(entry)
+    # Bump updated_at so the comment shows up in /tasks/changes deltas.
+    task.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(entry)
+    publish_task_change(task, "log")
     return _serialize_log_entry(entry)
 
@@ -9,7 +9,7 @@ from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
 from fastapi.responses import FileResponse, StreamingResponse, Response
 from io import BytesIO
 
-from ..db import get_db
+from ..db import get_db, read_session
 from ..auth.security import (
     _has_permission,
     get_current_user,
@@ -26,7 +26,6 @@ from ..models.models import (
     TrainingCompletedLesson,
     TrainingCertificate,
     User,
-    EmployeeProfile,
     Role,
     SettingItem,
     FileObject,
@@ -73,13 +72,18 @@ from ..services.training import (
     effective_max_attempts,
     sync_allow_retry_flag,
 )
+from ..services.training_compliance import (
+    DEFAULT_EXPIRING_WITHIN_DAYS,
+    get_compliance_sets,
+    get_compliance_summary,
+    iter_compliance_csv,
+    list_overdue,
+)
 from ..services.training_matrix_slots import is_valid_matrix_training_id
 from ..training_matrix_catalog import normalize_matrix_training_id
-from ..services.task_service import get_user_display
 from ..storage.provider import StorageProvider
 from ..storage.local_provider import LocalStorageProvider
-from ..storage.blob_provider import BlobStorageProvider
-from ..config import settings
+from ..storage.registry import get_provider_for
 def _training_admin_access(
     request: Request,
     user: User = Depends(get_current_user),
@@ -385,13 +389,7 @@ def list_certificates(
 
 def get_storage_for_file(fo: FileObject) -> StorageProvider:
     """Get the appropriate storage provider for a specific file"""
-    if fo.provider == "blob":
-        if settings.azure_blob_connection and settings.azure_blob_container:
-            try:
-                return BlobStorageProvider()
-            except Exception:
-                pass
-    return LocalStorageProvider()
+    return get_provider_for(fo.provider)
 
 
 @router.get("/certificates/{certificate_id}/download")
@@ -1932,34 +1930,50 @@ def get_overdue_training(
     db: Session = Depends(get_db),
     _=Depends(require_permissions("training:manage", "users:write"))
 ):
-    """List employees with overdue training"""
-    now = datetime.utcnow()
-    
-    # Find expired certificates
-    expired_certs = db.query(TrainingCertificate).filter(
-        TrainingCertificate.expires_at.isnot(None),
-        TrainingCertificate.expires_at <= now
-    ).all()
-    
-    result = []
-    for cert in expired_certs:
-        course = db.query(TrainingCourse).filter(TrainingCourse.id == cert.course_id).first()
-        user = db.query(User).filter(User.id == cert.user_id).first()
-        profile = db.query(EmployeeProfile).filter(EmployeeProfile.user_id == cert.user_id).first()
-        
-        user_name = get_user_display(db, cert.user_id) or user.username if user else "Unknown"
-        
-        result.append({
-            "user_id": str(cert.user_id),
-            "user_name": user_name,
-            "course_id": str(cert.course_id),
-            "course_title": course.title if course else None,
-            "certificate_id": str(cert.id),
-            "expired_at": cert.expires_at.isoformat() if cert.expires_at else None,
-            "days_overdue": (now - cert.expires_at).days if cert.expires_at else 0,
-        })
-    
-    return result
+    """List employees with overdue training (latest certificate per user/course only)"""
+    return list_overdue(db)
+
+
+@router.get("/admin/compliance")
+def get_training_compliance(
+    expiring_within_days: int = Query(DEFAULT_EXPIRING_WITHIN_DAYS, ge=0, le=365),
+    db: Session = Depends(get_db),
+    _=Depends(require_permissions("training:manage", "users:write"))
+):
+    """Overdue and expiring-soon certificate sets plus the cached summary counts"""
+    sets = get_compliance_sets(db, expiring_within_days=expiring_within_days)
+    return {
+        "summary": get_compliance_summary(db, expiring_within_days=expiring_within_days),
+        **sets,
+    }
+
+
+@router.get("/admin/compliance/export.csv")
+def export_training_compliance_csv(
+    expiring_within_days: int = Query(DEFAULT_EXPIRING_WITHIN_DAYS, ge=0, le=365),
+    include_expiring: bool = Query(True),
+    _=Depends(require_permissions("training:manage", "users:write"))
+):
+    """Stream the compliance report as CSV for HR (rows are fetched in batches)."""
+
+    def _rows():
+        # The request-scoped session is closed before a streamed body finishes; own one here.
+        export_db = read_session()
+        try:
+            yield from iter_compliance_csv(
+                export_db,
+                expiring_within_days=expiring_within_days,
+                include_expiring=include_expiring,
+            )
+        finally:
+            export_db.close()
+
+    stamp = datetime.utcnow().strftime("%Y%m%d")
+    return StreamingResponse(
+        _rows(),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="training-compliance-{stamp}.csv"'},
+    )
 
 
 @router.get("/admin/status")
@@ -1968,28 +1982,12 @@ def get_training_status(
     _=Depends(require_permissions("training:manage", "users:write"))
 ):
     """Dashboard: completion rates, overdue training, course statistics"""
-    # Total courses
-    total_courses = db.query(TrainingCourse).count()
-    published_courses = db.query(TrainingCourse).filter(TrainingCourse.status == "published").count()
-    draft_courses = db.query(TrainingCourse).filter(TrainingCourse.status == "draft").count()
-    
-    # Total completions
-    total_completions = db.query(TrainingProgress).filter(
-        TrainingProgress.completed_at.isnot(None)
-    ).count()
-    
-    # Overdue certificates
-    now = datetime.utcnow()
-    overdue_count = db.query(TrainingCertificate).filter(
-        TrainingCertificate.expires_at.isnot(None),
-        TrainingCertificate.expires_at <= now
-    ).count()
-    
+    summary = get_compliance_summary(db)
     return {
-        "total_courses": total_courses,
-        "published_courses": published_courses,
-        "draft_courses": draft_courses,
-        "total_completions": total_completions,
-        "overdue_certificates": overdue_count,
+        "total_courses": summary["total_courses"],
+        "published_courses": summary["published_courses"],
+        "draft_courses": summary["draft_courses"],
+        "total_completions": summary["total_completions"],
+        "overdue_certificates": summary["overdue_certificates"],
+        "expiring_soon_certificates": summary["expiring_soon_certificates"],
     }
-
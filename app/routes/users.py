@@ -1,9 +1,6 @@
-import csv
-import io
 import json
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Body, Query
-from fastapi.responses import Response
 from pydantic import BaseModel
 from sqlalchemy import update, or_, exists, select, func as sa_func, func, literal, cast, String
 from sqlalchemy.exc import IntegrityError
@@ -13,7 +10,7 @@ from collections import Counter, defaultdict
 import math
 import uuid
 
-from ..db import get_db
+from ..db import get_db, get_read_db
 from ..models.models import (
     User,
     Role,
@@ -35,6 +32,8 @@ from ..models.models import (
     EmployeeDocument,
 )
 from ..services.audit_log_entries import audit_rows_to_entry_dicts
+from ..services.exports import export_job_payload, normalize_format, start_export_job, stream_export
+from ..services.hierarchy import get_hierarchy_index
 from ..services.user_page_views import (
     PAGE_VIEW_CATEGORY,
     page_view_row_to_dict,
@@ -819,7 +818,7 @@ def users_org_tree(
     manager_id: Optional[str] = None,
     manager_id_not: Optional[str] = None,
     is_admin: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _=Depends(require_permissions("hr:users:read", "users:read")),
 ):
     """Unpaginated users for the org-chart view (supervisor = manager_user_id). Search is applied client-side."""
@@ -856,166 +855,54 @@ def users_org_tree(
         "items": items,
         "total": len(items),
         "truncated": len(rows) >= ORG_TREE_MAX,
+        "tree": _org_tree_payload(db, items),
     }
 
 
-def _json_cell(value: Any) -> str:
-    if value is None:
-        return ""
-    if isinstance(value, str):
-        return value
-    try:
-        return json.dumps(value, ensure_ascii=False, default=str)
-    except (TypeError, ValueError):
-        return str(value)
+def _org_tree_payload(db: Session, items: List[dict]) -> dict:
+    """Prebuilt supervisor forest for the org chart (roots split into teams / unassigned,
+    siblings sorted by display name); also stamps each item with its total report count."""
+    index = get_hierarchy_index(db)
+    sort_key = {row["id"]: (row.get("name") or row.get("username") or "").lower() for row in items}
+    forest = index.forest(row["id"] for row in items)
+    children = {pid: sorted(kids, key=sort_key.__getitem__) for pid, kids in forest["children"].items()}
+    roots = sorted(forest["roots"], key=sort_key.__getitem__)
+    for row in items:
+        row["subtree_size"] = index.subtree_size(row["id"])
+    return {
+        "teams": [r for r in roots if r in children],
+        "unassigned": [r for r in roots if r not in children],
+        "children": children,
+    }
 
 
 @router.get("/{user_id}/activity-log/export")
 def export_user_activity_log(
     user_id: str,
+    format: str = Query("csv", description="csv | xlsx"),
+    mode: str = Query("stream", description="stream | job"),
     db: Session = Depends(get_db),
     viewer: User = Depends(get_current_user),
 ):
-    """Export full sign-in history and audit trail for a user as CSV."""
+    """Export full sign-in history and audit trail for a user (streamed, or as a background job)."""
     try:
         uid = uuid.UUID(str(user_id))
     except ValueError:
         raise HTTPException(status_code=404, detail="Not found")
 
-    u = db.query(User).filter(User.id == uid).first()
-    if not u:
+    if not db.query(User.id).filter(User.id == uid).first():
         raise HTTPException(status_code=404, detail="Not found")
 
     if not _viewer_can_access_user_activity_log(viewer, uid):
         raise HTTPException(status_code=403, detail="Not allowed to view this activity log")
 
-    login_rows = (
-        db.query(SystemLog)
-        .filter(
-            SystemLog.user_id == uid,
-            SystemLog.category == "auth",
-            SystemLog.message == "Login successful",
-        )
-        .order_by(SystemLog.timestamp_utc.desc())
-        .all()
-    )
-
-    audit_rows = (
-        db.query(AuditLog)
-        .filter(AuditLog.actor_id == uid)
-        .order_by(AuditLog.timestamp_utc.desc())
-        .all()
-    )
-    audit_entries = audit_rows_to_entry_dicts(db, audit_rows)
-
-    page_rows = (
-        db.query(SystemLog)
-        .filter(SystemLog.user_id == uid, SystemLog.category == PAGE_VIEW_CATEGORY)
-        .order_by(SystemLog.timestamp_utc.desc())
-        .all()
-    )
-
-    export_rows: List[Tuple[str, List[str]]] = []
-
-    for row in login_rows:
-        ts = row.timestamp_utc.isoformat() if row.timestamp_utc else ""
-        export_rows.append(
-            (
-                ts,
-                [
-                    "sign_in",
-                    ts,
-                    "Sign-in",
-                    "",
-                    "",
-                    "",
-                    "",
-                    "",
-                    row.path or "",
-                    row.request_id or "",
-                    "",
-                    "",
-                ],
-            )
-        )
-
-    for row in page_rows:
-        ts = row.timestamp_utc.isoformat() if row.timestamp_utc else ""
-        title = row.message or "Page"
-        export_rows.append(
-            (
-                ts,
-                [
-                    "page_view",
-                    ts,
-                    f"Page · {title}",
-                    "",
-                    "",
-                    "",
-                    title,
-                    "",
-                    row.path or "",
-                    "",
-                    "",
-                    "",
-                ],
-            )
-        )
-
-    for entry in audit_entries:
-        label = entry.get("entity_display") or (entry.get("entity_type") or "").replace("_", " ")
-        summary = f"{entry.get('action')} · {label}"
-        ts = entry.get("timestamp_utc") or ""
-        export_rows.append(
-            (
-                ts,
-                [
-                    "audit",
-                    ts,
-                    summary,
-                    entry.get("action") or "",
-                    entry.get("entity_type") or "",
-                    entry.get("entity_id") or "",
-                    entry.get("entity_display") or "",
-                    entry.get("source") or "",
-                    "",
-                    "",
-                    _json_cell(entry.get("changes_json")),
-                    _json_cell(entry.get("context")),
-                ],
-            )
-        )
-
-    export_rows.sort(key=lambda item: item[0], reverse=True)
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "record_type",
-            "timestamp_utc",
-            "summary",
-            "action",
-            "entity_type",
-            "entity_id",
-            "entity_display",
-            "source",
-            "path",
-            "request_id",
-            "changes_json",
-            "context",
-        ]
-    )
-    for _, row in export_rows:
-        writer.writerow(row)
-
+    fmt = normalize_format(format)
     safe_id = str(uid).replace("-", "")[:8]
-    filename = f"user-activity-{safe_id}.csv"
-    return Response(
-        content="\ufeff" + output.getvalue(),
-        media_type="text/csv; charset=utf-8",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    params = {"user_id": uid}
+    if mode == "job":
+        fo = start_export_job(db, "user_activity", params, fmt, f"user-activity-{safe_id}", viewer.id)
+        return export_job_payload(fo)
+    return stream_export("user_activity", params, fmt, f"user-activity-{safe_id}")
 
 
 @router.get("/{user_id}/activity-log/audit/{audit_entry_id}")
@@ -1383,6 +1270,8 @@ def sync_all_users_from_bamboohr(
             limit=limit,
             include_photos=include_photos,
             force_update_photos=force_update_photos,
+            # Default is incremental (employees changed since the last complete sync)
+            full=bool(payload.get("full_sync", False)),
         )
 
         return {
@@ -0,0 +1,3359 @@
+"""Ordered, checksummed schema migrations recorded in a ledger table (no Alembic in this repo).
+
+Every step below used to run inline in main._startup on every boot: ~90 information_schema probes
+and ~140 conditional ALTER/CREATE statements, plus the permission seeders, all before serving
+traffic. Steps stay idempotent, but each one is now recorded in the schema_migrations table with a
+checksum of its source (and of any seeder script it runs) and only runs again if it never succeeded
+or its code changed. Once a database is current, boot costs one ledger read.
+
+A step whose SQL fails is not recorded, even when the step catches and logs the error itself (most
+do, to keep going), so it is retried on the next run exactly like the old boot-time checks.
+postgres_only steps are skipped on other dialects (local SQLite relies on create_all).
+
+New schema changes go at the end as a new @migration with the next id; never reuse an id.
+
+Run out-of-band (e.g. as a deploy step, with RUN_MIGRATIONS_ON_STARTUP=false on the web service):
+    python -m app.schema_migrations --migrate
+    python -m app.schema_migrations --status
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import inspect
+import os
+import sys
+import textwrap
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, delete, event, insert, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .db import Base, engine
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# pg_advisory_lock key: concurrent workers booting together apply each step once.
+_ADVISORY_LOCK_ID = 0x6D6B_6D69_6772
+
+_ledger_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _ledger_metadata,
+    Column("id", String(200), primary_key=True),
+    Column("checksum", String(64), nullable=False),
+    Column("phase", String(20), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+    Column("duration_ms", Integer, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class MigrationStep:
+    id: str
+    fn: Callable[[Session], None]
+    phase: str = "schema"
+    postgres_only: bool = True
+    # Extra files (repo-relative) whose content is part of the checksum, e.g. a seeder script.
+    sources: Tuple[str, ...] = ()
+
+    @property
+    def checksum(self) -> str:
+        h = hashlib.sha256(textwrap.dedent(inspect.getsource(self.fn)).encode())
+        for rel in self.sources:
+            try:
+                with open(os.path.join(_REPO_ROOT, rel), "rb") as fh:
+                    h.update(fh.read())
+            except OSError:
+                h.update(f"missing:{rel}".encode())
+        return h.hexdigest()
+
+
+@dataclass
+class MigrationResult:
+    step_id: str
+    phase: str
+    status: str  # applied | current | skipped | failed
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+MIGRATIONS: List[MigrationStep] = []
+
+
+def migration(step_id: str, *, phase: str = "schema", postgres_only: bool = True, sources: Sequence[str] = ()):
+    """Register the decorated function as the next step; ids must be unique and increasing."""
+
+    def register(fn: Callable[[Session], None]) -> Callable[[Session], None]:
+        if MIGRATIONS and step_id <= MIGRATIONS[-1].id:
+            raise ValueError(f"migration id {step_id!r} must sort after {MIGRATIONS[-1].id!r}")
+        MIGRATIONS.append(MigrationStep(step_id, fn, phase, postgres_only, tuple(sources)))
+        return fn
+
+    return register
+
+
+_tracking = threading.local()
+
+
+def _note_db_error(ctx) -> None:
+    errors = getattr(_tracking, "errors", None)
+    if errors is not None:
+        errors.append(str(ctx.original_exception).strip().splitlines()[0][:300] if ctx.original_exception else "error")
+
+
+def _is_postgres(bind: Engine) -> bool:
+    return "postgresql" in (bind.dialect.name or "")
+
+
+def _applies(step: MigrationStep, bind: Engine) -> bool:
+    return _is_postgres(bind) or not step.postgres_only
+
+
+def _ledger(bind: Engine) -> Dict[str, str]:
+    schema_migrations.create(bind, checkfirst=True)
+    with bind.connect() as conn:
+        return {r.id: r.checksum for r in conn.execute(select(schema_migrations.c.id, schema_migrations.c.checksum))}
+
+
+def migration_status(bind: Optional[Engine] = None, steps: Optional[Sequence[MigrationStep]] = None) -> List[Tuple[MigrationStep, str]]:
+    """(step, state) with state in applied | pending | changed | skipped."""
+    bind = bind or engine
+    applied = _ledger(bind)
+    out = []
+    for step in MIGRATIONS if steps is None else steps:
+        if not _applies(step, bind):
+            state = "skipped"
+        elif step.id not in applied:
+            state = "pending"
+        elif applied[step.id] != step.checksum:
+            state = "changed"
+        else:
+            state = "applied"
+        out.append((step, state))
+    return out
+
+
+def _run_step(step: MigrationStep, bind: Engine) -> Tuple[float, List[str]]:
+    _tracking.errors = []
+    t0 = time.perf_counter()
+    db = Session(bind=bind, autoflush=False, future=True)
+    try:
+        step.fn(db)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        _tracking.errors.append(str(e).strip().splitlines()[0][:300] if str(e).strip() else type(e).__name__)
+    finally:
+        db.close()
+        errors, _tracking.errors = _tracking.errors, None
+    return time.perf_counter() - t0, errors
+
+
+def run_migrations(
+    bind: Optional[Engine] = None,
+    *,
+    steps: Optional[Sequence[MigrationStep]] = None,
+    only: Optional[Iterable[str]] = None,
+    force: bool = False,
+    log: Callable[[str], None] = print,
+) -> List[MigrationResult]:
+    """Apply every step missing from the ledger (or whose checksum changed), in id order."""
+    bind = bind or engine
+    steps = MIGRATIONS if steps is None else steps
+    wanted = set(only) if only is not None else None
+    if not event.contains(bind, "handle_error", _note_db_error):
+        event.listen(bind, "handle_error", _note_db_error)
+
+    lock_conn = None
+    if _is_postgres(bind):
+        lock_conn = bind.connect()
+        lock_conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _ADVISORY_LOCK_ID})
+        lock_conn.commit()
+    try:
+        # Read after taking the lock: another worker may have just applied everything.
+        applied = _ledger(bind)
+        results: List[MigrationResult] = []
+        for step in steps:
+            if wanted is not None and step.id not in wanted:
+                continue
+            if not _applies(step, bind):
+                results.append(MigrationResult(step.id, step.phase, "skipped"))
+                continue
+            checksum = step.checksum
+            if not force and applied.get(step.id) == checksum:
+                results.append(MigrationResult(step.id, step.phase, "current"))
+                continue
+            seconds, errors = _run_step(step, bind)
+            if errors:
+                log(f"[migrate] {step.id} failed after {seconds:.2f}s, will retry next run: {errors[0]}")
+                results.append(MigrationResult(step.id, step.phase, "failed", seconds, errors[0]))
+                continue
+            with bind.begin() as conn:
+                conn.execute(delete(schema_migrations).where(schema_migrations.c.id == step.id))
+                conn.execute(
+                    insert(schema_migrations).values(
+                        id=step.id,
+                        checksum=checksum,
+                        phase=step.phase,
+                        applied_at=datetime.now(timezone.utc),
+                        duration_ms=int(seconds * 1000),
+                    )
+                )
+            log(f"[migrate] {step.id} applied in {seconds:.2f}s")
+            results.append(MigrationResult(step.id, step.phase, "applied", seconds))
+        return results
+    finally:
+        if lock_conn is not None:
+            try:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _ADVISORY_LOCK_ID})
+                lock_conn.commit()
+            finally:
+                lock_conn.close()
+
+
+def summarize_results(results: Sequence[MigrationResult], seconds: Optional[float] = None) -> List[str]:
+    """One timing segment per phase, e.g. 'schema 0.04s (0 applied, 58 current)'."""
+    segments = []
+    for phase in dict.fromkeys(r.phase for r in results):
+        rows = [r for r in results if r.phase == phase]
+        counts = {s: sum(1 for r in rows if r.status == s) for s in ("applied", "current", "failed", "skipped")}
+        detail = ", ".join(f"{n} {s}" for s, n in counts.items() if n or s in ("applied", "current"))
+        segments.append(f"{phase} {sum(r.seconds for r in rows):.2f}s ({detail})")
+    if seconds is not None:
+        segments.append(f"ledger overhead {max(0.0, seconds - sum(r.seconds for r in results)):.2f}s")
+    return segments
+
+
+def _ensure_scripts_importable() -> None:
+    if _REPO_ROOT not in sys.path:
+        sys.path.insert(0, _REPO_ROOT)
+
+
+@migration("0001_print_shop_tables", postgres_only=False)
+def print_shop_tables(db: Session) -> None:
+    # Ensure print shop table on all dialects (SQLite local + PostgreSQL)
+    try:
+        from .models.models import (
+            PrintShopRequest,
+            PrintShopRequestFile,
+            PrintShopRequestItem,
+            PrintShopSupplyOrder,
+            PrintShopSupplyOrderFile,
+            PrintShopSupplyOrderItem,
+            PrintShopSupplyProduct,
+        )
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[
+                PrintShopRequest.__table__,
+                PrintShopRequestItem.__table__,
+                PrintShopRequestFile.__table__,
+                PrintShopSupplyProduct.__table__,
+                PrintShopSupplyOrder.__table__,
+                PrintShopSupplyOrderItem.__table__,
+                PrintShopSupplyOrderFile.__table__,
+            ],
+        )
+    except Exception as _e:
+        print(f"[startup] print_shop_requests create_all (non-critical): {_e}")
+
+
+@migration("0002_auto_task_tables", postgres_only=False)
+def auto_task_tables(db: Session) -> None:
+    try:
+        from .models.models import AutoTaskLog, AutoTaskRoute
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[AutoTaskRoute.__table__, AutoTaskLog.__table__],
+        )
+    except Exception as _e:
+        print(f"[startup] auto_task tables create_all (non-critical): {_e}")
+
+
+@migration("0003_hours_reminder_tables", postgres_only=False)
+def hours_reminder_tables(db: Session) -> None:
+    try:
+        from .models.models import DevicePushToken, HoursReminderEvent
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[DevicePushToken.__table__, HoursReminderEvent.__table__],
+        )
+    except Exception as _e:
+        print(f"[startup] hours reminder tables create_all (non-critical): {_e}")
+
+
+@migration("0004_quotes_table")
+def quotes_table(db: Session) -> None:
+    # Ensure quotes table exists
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'quotes'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import Quote
+        Base.metadata.create_all(bind=engine, tables=[Quote.__table__])
+        db.commit()
+        print("[startup] Created quotes table")
+
+
+@migration("0005_user_home_dashboard_table")
+def user_home_dashboard_table(db: Session) -> None:
+    # Ensure user_home_dashboard table exists
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'user_home_dashboard'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import UserHomeDashboard
+        Base.metadata.create_all(bind=engine, tables=[UserHomeDashboard.__table__])
+        db.commit()
+        print("[startup] Created user_home_dashboard table")
+
+
+@migration("0006_task_log_entries")
+def task_log_entries(db: Session) -> None:
+    # Ensure task_log_entries table exists (Task modal activity log)
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'task_log_entries'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import TaskLogEntry
+        Base.metadata.create_all(bind=engine, tables=[TaskLogEntry.__table__])
+        db.commit()
+        print("[startup] Created task_log_entries table")
+
+    # Ensure required columns exist (schema drift safe-guard)
+    try:
+        db.execute(text("ALTER TABLE task_log_entries ADD COLUMN IF NOT EXISTS message TEXT NOT NULL DEFAULT ''"))
+        db.execute(text("ALTER TABLE task_log_entries ADD COLUMN IF NOT EXISTS entry_type VARCHAR(50) NOT NULL DEFAULT 'comment'"))
+        db.execute(text("ALTER TABLE task_log_entries ADD COLUMN IF NOT EXISTS actor_id UUID NULL"))
+        db.execute(text("ALTER TABLE task_log_entries ADD COLUMN IF NOT EXISTS actor_name VARCHAR(255) NULL"))
+        db.execute(text("ALTER TABLE task_log_entries ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()"))
+
+        body_exists = db.execute(
+            text(
+                """
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_name = 'task_log_entries'
+                  AND column_name = 'body'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if body_exists:
+            db.execute(text("UPDATE task_log_entries SET message = body WHERE (message IS NULL OR message = '') AND body IS NOT NULL"))
+            db.execute(text("ALTER TABLE task_log_entries ALTER COLUMN body DROP NOT NULL"))
+        db.commit()
+    except Exception as e:
+        print(f"[startup] task_log_entries schema check error (non-critical): {e}")
+
+
+@migration("0007_safety_inspection_status")
+def safety_inspection_status(db: Session) -> None:
+    # project_safety_inspections.status (draft | finalized)
+    try:
+        if db.execute(
+            text(
+                "SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'project_safety_inspections' LIMIT 1"
+            )
+        ).fetchall():
+            db.execute(
+                text(
+                    "ALTER TABLE project_safety_inspections ADD COLUMN IF NOT EXISTS status VARCHAR(20) NULL"
+                )
+            )
+            db.commit()
+            db.execute(
+                text(
+                    "UPDATE project_safety_inspections SET status = 'finalized' WHERE status IS NULL"
+                )
+            )
+            db.commit()
+            db.execute(
+                text(
+                    "ALTER TABLE project_safety_inspections ALTER COLUMN status SET DEFAULT 'draft'"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE project_safety_inspections ALTER COLUMN status SET NOT NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Ensured project_safety_inspections.status")
+    except Exception as e:
+        print(f"[startup] project_safety_inspections.status migration (non-critical): {e}")
+
+
+@migration("0008_safety_inspection_signatures")
+def safety_inspection_signatures(db: Session) -> None:
+    # Safety inspection: pending_signatures + sign requests + PDF client_file refs
+    try:
+        if db.execute(
+            text(
+                "SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'project_safety_inspections' LIMIT 1"
+            )
+        ).fetchall():
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE project_safety_inspections
+                    ADD COLUMN IF NOT EXISTS interim_pdf_client_file_id UUID NULL
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE project_safety_inspections
+                    ADD COLUMN IF NOT EXISTS final_pdf_client_file_id UUID NULL
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE project_safety_inspections
+                    ADD COLUMN IF NOT EXISTS first_finalized_at TIMESTAMPTZ NULL
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE project_safety_inspections
+                    ADD COLUMN IF NOT EXISTS first_finalized_by_id UUID NULL REFERENCES users(id) ON DELETE SET NULL
+                    """
+                )
+            )
+            db.commit()
+        if db.execute(
+            text(
+                "SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'project_safety_inspection_sign_requests' LIMIT 1"
+            )
+        ).fetchall():
+            pass
+        else:
+            db.execute(
+                text(
+                    """
+                    CREATE TABLE project_safety_inspection_sign_requests (
+                        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                        inspection_id UUID NOT NULL REFERENCES project_safety_inspections(id) ON DELETE CASCADE,
+                        signer_user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                        status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                        signature_file_object_id UUID NULL REFERENCES file_objects(id) ON DELETE SET NULL,
+                        signed_at TIMESTAMPTZ NULL,
+                        signer_display_name_snapshot VARCHAR(255) NULL,
+                        signature_meta_signed_at VARCHAR(64) NULL,
+                        signature_location_label VARCHAR(500) NULL,
+                        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                        CONSTRAINT uq_inspection_signer UNIQUE (inspection_id, signer_user_id)
+                    )
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS idx_sign_req_inspection_status ON project_safety_inspection_sign_requests (inspection_id, status)"
+                )
+            )
+            db.commit()
+            print("[startup] Created project_safety_inspection_sign_requests")
+    except Exception as e:
+        print(f"[startup] safety inspection sign requests migration (non-critical): {e}")
+
+
+@migration("0009_form_templates")
+def form_templates(db: Session) -> None:
+    # Form templates (Safety MVP) — tables + inspection FK columns
+    try:
+        if db.execute(
+            text(
+                "SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'form_templates' LIMIT 1"
+            )
+        ).fetchall():
+            pass
+        else:
+            from .models.models import FormTemplate
+
+            Base.metadata.create_all(bind=engine, tables=[FormTemplate.__table__])
+            db.commit()
+            print("[startup] Created form_templates")
+        db.execute(
+            text(
+                "ALTER TABLE project_safety_inspections ADD COLUMN IF NOT EXISTS form_template_version_id UUID NULL"
+            )
+        )
+        db.execute(
+            text(
+                "ALTER TABLE project_safety_inspections ADD COLUMN IF NOT EXISTS assigned_user_id UUID NULL"
+            )
+        )
+        db.commit()
+        try:
+            db.execute(
+                text(
+                    """
+                    DO $ff$
+                    BEGIN
+                        IF NOT EXISTS (
+                            SELECT 1 FROM pg_constraint WHERE conname = 'fk_project_safety_inspections_form_template_version'
+                        ) THEN
+                            ALTER TABLE project_safety_inspections
+                                ADD CONSTRAINT fk_project_safety_inspections_form_template_version
+                                FOREIGN KEY (form_template_version_id)
+                                REFERENCES form_template_versions(id) ON DELETE SET NULL;
+                        END IF;
+                    END $ff$;
+                    """
+                )
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+        try:
+            db.execute(
+                text(
+                    """
+                    DO $ff$
+                    BEGIN
+                        IF NOT EXISTS (
+                            SELECT 1 FROM pg_constraint WHERE conname = 'fk_project_safety_inspections_assigned_user'
+                        ) THEN
+                            ALTER TABLE project_safety_inspections
+                                ADD CONSTRAINT fk_project_safety_inspections_assigned_user
+                                FOREIGN KEY (assigned_user_id)
+                                REFERENCES users(id) ON DELETE SET NULL;
+                        END IF;
+                    END $ff$;
+                    """
+                )
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+        try:
+            db.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_project_safety_inspections_template_version ON project_safety_inspections(form_template_version_id)"
+                )
+            )
+            db.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_project_safety_inspections_assigned_user ON project_safety_inspections(assigned_user_id)"
+                )
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+        print("[startup] Ensured form_templates schema / inspection FK columns")
+    except Exception as e:
+        print(f"[startup] form_templates migration (non-critical): {e}")
+
+
+@migration("0010_form_templates_single_definition")
+def form_templates_single_definition(db: Session) -> None:
+    # Single-definition form templates: migrate from form_template_versions then drop that table
+    try:
+        if db.execute(
+            text(
+                "SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'form_templates' LIMIT 1"
+            )
+        ).fetchall():
+            db.execute(
+                text(
+                    "ALTER TABLE form_templates ADD COLUMN IF NOT EXISTS definition JSONB DEFAULT '{}'::jsonb"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE form_templates ADD COLUMN IF NOT EXISTS version_label VARCHAR(100) DEFAULT ''"
+                )
+            )
+            db.execute(text("UPDATE form_templates SET definition = '{}'::jsonb WHERE definition IS NULL"))
+            db.execute(text("ALTER TABLE form_templates ALTER COLUMN definition SET NOT NULL"))
+            db.execute(text("UPDATE form_templates SET version_label = COALESCE(version_label, '')"))
+            db.execute(text("ALTER TABLE form_templates ALTER COLUMN version_label SET NOT NULL"))
+            db.commit()
+            db.execute(
+                text(
+                    "ALTER TABLE project_safety_inspections ADD COLUMN IF NOT EXISTS form_template_id UUID NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE project_safety_inspections ADD COLUMN IF NOT EXISTS form_definition_snapshot JSONB NULL"
+                )
+            )
+            db.commit()
+            ftv_rows = db.execute(
+                text(
+                    "SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'form_template_versions' LIMIT 1"
+                )
+            ).fetchall()
+            if ftv_rows:
+                db.execute(
+                    text(
+                        """
+                        UPDATE form_templates ft SET definition = v.definition
+                        FROM (
+                            SELECT DISTINCT ON (form_template_id) form_template_id, definition
+                            FROM form_template_versions
+                            ORDER BY form_template_id, is_published DESC, version DESC
+                        ) v
+                        WHERE ft.id = v.form_template_id
+                        """
+                    )
+                )
+                db.execute(
+                    text(
+                        """
+                        UPDATE project_safety_inspections psi
+                        SET form_template_id = ftv.form_template_id,
+                            form_definition_snapshot = ftv.definition
+                        FROM form_template_versions ftv
+                        WHERE psi.form_template_version_id IS NOT NULL
+                          AND psi.form_template_version_id = ftv.id
+                        """
+                    )
+                )
+                db.commit()
+                try:
+                    db.execute(
+                        text(
+                            "ALTER TABLE project_safety_inspections DROP CONSTRAINT IF EXISTS fk_project_safety_inspections_form_template_version"
+                        )
+                    )
+                except Exception:
+                    db.rollback()
+                try:
+                    db.execute(text("DROP INDEX IF EXISTS ix_project_safety_inspections_template_version"))
+                except Exception:
+                    db.rollback()
+                try:
+                    db.execute(
+                        text(
+                            "ALTER TABLE project_safety_inspections DROP COLUMN IF EXISTS form_template_version_id"
+                        )
+                    )
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                try:
+                    db.execute(text("DROP TABLE IF EXISTS form_template_versions CASCADE"))
+                    db.commit()
+                except Exception:
+                    db.rollback()
+            try:
+                db.execute(
+                    text(
+                        "ALTER TABLE project_safety_inspections DROP COLUMN IF EXISTS form_template_version_id"
+                    )
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+            try:
+                db.execute(
+                    text(
+                        """
+                        DO $ff$
+                        BEGIN
+                            IF NOT EXISTS (
+                                SELECT 1 FROM pg_constraint WHERE conname = 'fk_project_safety_inspections_form_template'
+                            ) THEN
+                                ALTER TABLE project_safety_inspections
+                                    ADD CONSTRAINT fk_project_safety_inspections_form_template
+                                    FOREIGN KEY (form_template_id) REFERENCES form_templates(id) ON DELETE SET NULL;
+                            END IF;
+                        END $ff$;
+                        """
+                    )
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+            try:
+                db.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS ix_project_safety_inspections_form_template ON project_safety_inspections(form_template_id)"
+                    )
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+            print("[startup] Form templates unversioned migration (if needed)")
+    except Exception as e:
+        print(f"[startup] form_templates unversioned migration (non-critical): {e}")
+
+
+@migration("0011_form_custom_lists")
+def form_custom_lists(db: Session) -> None:
+    # Form custom lists (global dropdown options). create_all only; never drops tables or deletes rows.
+    try:
+        from .models.models import FormCustomList, FormCustomListItem
+
+        Base.metadata.create_all(bind=engine, tables=[FormCustomList.__table__, FormCustomListItem.__table__])
+        db.commit()
+        print("[startup] Ensured form_custom_lists / form_custom_list_items")
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] form_custom_lists create_all (non-critical): {e}")
+
+    try:
+        rows_io = db.execute(
+            text(
+                """
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = 'form_custom_lists'
+                  AND column_name = 'include_other'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not rows_io:
+            db.execute(
+                text(
+                    "ALTER TABLE form_custom_lists ADD COLUMN include_other BOOLEAN NOT NULL DEFAULT false"
+                )
+            )
+            db.commit()
+            print("[startup] Added form_custom_lists.include_other")
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] form_custom_lists include_other migration (non-critical): {e}")
+
+
+@migration("0012_review_cycle_templates")
+def review_cycle_templates(db: Session) -> None:
+    # Employee review: assignment snapshot + review_cycles.form_template_id (additive only)
+    try:
+        db.execute(
+            text(
+                "ALTER TABLE review_assignments ADD COLUMN IF NOT EXISTS form_definition_snapshot JSONB NULL"
+            )
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] review_assignments.form_definition_snapshot (non-critical): {e}")
+    try:
+        rows_rc_ft = db.execute(
+            text(
+                """
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = 'review_cycles'
+                  AND column_name = 'form_template_id'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not rows_rc_ft:
+            db.execute(text("ALTER TABLE review_cycles ADD COLUMN IF NOT EXISTS form_template_id UUID NULL"))
+            db.commit()
+            print("[startup] Added review_cycles.form_template_id (populate via scripts/migrate_review_templates_to_form_templates.sql if upgrading)")
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] review_cycles.form_template_id (non-critical): {e}")
+    try:
+        db.execute(
+            text(
+                "ALTER TABLE review_cycles ADD COLUMN IF NOT EXISTS participant_scope JSONB NULL"
+            )
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] review_cycles.participant_scope (non-critical): {e}")
+    try:
+        db.execute(
+            text(
+                "ALTER TABLE review_cycles ADD COLUMN IF NOT EXISTS template_by_department JSONB NULL"
+            )
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] review_cycles.template_by_department (non-critical): {e}")
+    try:
+        db.execute(
+            text(
+                "ALTER TABLE review_cycles ADD COLUMN IF NOT EXISTS director_1on1_schedule JSONB NULL"
+            )
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] review_cycles.director_1on1_schedule (non-critical): {e}")
+    try:
+        db.execute(
+            text(
+                "ALTER TABLE review_cycles ADD COLUMN IF NOT EXISTS director_1on1_slot_config JSONB NULL"
+            )
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] review_cycles.director_1on1_slot_config (non-critical): {e}")
+
+
+@migration("0013_review_cycle_progress")
+def review_cycle_progress(db: Session) -> None:
+    # Materialized per-reviewee cycle status (HR status, director board, summaries)
+    try:
+        db.execute(
+            text("ALTER TABLE review_cycles ADD COLUMN IF NOT EXISTS progress_built_at TIMESTAMPTZ NULL")
+        )
+        db.commit()
+        from .models.models import ReviewCycleProgress
+
+        Base.metadata.create_all(bind=engine, tables=[ReviewCycleProgress.__table__])
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] review_cycle_progress (non-critical): {e}")
+
+
+@migration("0014_review_cycles_drop_template_id")
+def review_cycles_drop_template_id(db: Session) -> None:
+    # ORM uses form_template_id only; legacy NOT NULL template_id breaks INSERTs if the column remains
+    try:
+        rows_legacy_tid = db.execute(
+            text(
+                """
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = 'review_cycles'
+                  AND column_name = 'template_id'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if rows_legacy_tid:
+            rows_ft2 = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = 'public' AND table_name = 'review_cycles'
+                      AND column_name = 'form_template_id'
+                    LIMIT 1
+                    """
+                )
+            ).fetchall()
+            if rows_ft2:
+                db.execute(
+                    text(
+                        """
+                        UPDATE review_cycles
+                        SET form_template_id = template_id
+                        WHERE form_template_id IS NULL AND template_id IS NOT NULL
+                        """
+                    )
+                )
+            db.execute(
+                text("ALTER TABLE review_cycles DROP COLUMN IF EXISTS template_id CASCADE")
+            )
+            db.commit()
+            print("[startup] Dropped legacy review_cycles.template_id (use form_template_id)")
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] review_cycles.template_id legacy drop (non-critical): {e}")
+
+
+@migration("0015_project_time_entries_source_attendance")
+def project_time_entries_source_attendance(db: Session) -> None:
+    # Check for source_attendance_id column in project_time_entries
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'project_time_entries'
+              AND column_name = 'source_attendance_id'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE project_time_entries ADD COLUMN source_attendance_id UUID NULL"))
+        try:
+            db.execute(text("CREATE INDEX IF NOT EXISTS idx_project_time_entries_source_attendance_id ON project_time_entries(source_attendance_id)"))
+        except Exception:
+            pass
+        try:
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE project_time_entries
+                    ADD CONSTRAINT fk_project_time_entries_source_attendance
+                    FOREIGN KEY (source_attendance_id)
+                    REFERENCES attendance(id)
+                    ON DELETE SET NULL
+                    """
+                )
+            )
+        except Exception:
+            pass
+        db.commit()
+
+
+@migration("0016_employee_profiles_columns")
+def employee_profiles_columns(db: Session) -> None:
+    # Check for cloth_size and cloth_sizes_custom columns in employee_profiles
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'employee_profiles'
+              AND column_name = 'cloth_size'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE employee_profiles ADD COLUMN cloth_size VARCHAR(50) NULL"))
+
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'employee_profiles'
+              AND column_name = 'cloth_sizes_custom'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE employee_profiles ADD COLUMN cloth_sizes_custom JSON NULL"))
+
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'employee_profiles'
+              AND column_name = 'bamboo_files_last_sync_at'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(
+            text(
+                "ALTER TABLE employee_profiles ADD COLUMN bamboo_files_last_sync_at TIMESTAMPTZ NULL"
+            )
+        )
+
+    for _col, _ddl in (
+        ("drivers_license_number", "VARCHAR(100) NULL"),
+        ("drivers_license_jurisdiction", "VARCHAR(10) NULL"),
+        ("drivers_license_class", "VARCHAR(100) NULL"),
+        ("drivers_license_issue_date", "TIMESTAMPTZ NULL"),
+        ("drivers_license_expiry_date", "TIMESTAMPTZ NULL"),
+        ("drivers_license_conditions", "VARCHAR(500) NULL"),
+        ("drivers_license_updated_at", "TIMESTAMPTZ NULL"),
+        ("drivers_license_last_requested_at", "TIMESTAMPTZ NULL"),
+        ("permit_file_id", "UUID NULL"),
+        ("pr_card_file_id", "UUID NULL"),
+    ):
+        rows = db.execute(
+            text(
+                f"""
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_name = 'employee_profiles'
+                  AND column_name = '{_col}'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not rows:
+            db.execute(
+                text(f"ALTER TABLE employee_profiles ADD COLUMN {_col} {_ddl}")
+            )
+
+    for _tbl, _col, _ddl in (
+        ("employee_profiles", "onboarding_document_ids", "JSON NULL"),
+        ("invites", "document_ids", "JSON NULL"),
+    ):
+        rows = db.execute(
+            text(
+                f"""
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_name = '{_tbl}'
+                  AND column_name = '{_col}'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not rows:
+            db.execute(text(f"ALTER TABLE {_tbl} ADD COLUMN {_col} {_ddl}"))
+            print(f"[startup] Added {_tbl}.{_col}")
+
+    db.commit()
+
+
+@migration("0017_projects_division_percentages")
+def projects_division_percentages(db: Session) -> None:
+    # Check for project_division_percentages column in projects
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'projects'
+              AND column_name = 'project_division_percentages'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE projects ADD COLUMN project_division_percentages JSON NULL"))
+        db.commit()
+        print("[startup] Added project_division_percentages column to projects table")
+
+
+@migration("0018_projects_estimator_ids")
+def projects_estimator_ids(db: Session) -> None:
+    # Check for estimator_ids column in projects
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'projects'
+              AND column_name = 'estimator_ids'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE projects ADD COLUMN estimator_ids JSON NULL"))
+        db.commit()
+        print("[startup] Added estimator_ids column to projects table")
+
+
+@migration("0019_projects_admin_id")
+def projects_admin_id(db: Session) -> None:
+    # Check for project_admin_id column in projects
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'projects'
+              AND column_name = 'project_admin_id'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE projects ADD COLUMN project_admin_id UUID NULL"))
+        db.commit()
+        print("[startup] Added project_admin_id column to projects table")
+
+
+@migration("0020_projects_date_awarded")
+def projects_date_awarded(db: Session) -> None:
+    # Awarded date (set on opportunity → project conversion; editable via API)
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'projects'
+              AND column_name = 'date_awarded'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE projects ADD COLUMN date_awarded TIMESTAMPTZ NULL"))
+        db.commit()
+        print("[startup] Added date_awarded column to projects table")
+
+
+@migration("0021_projects_awarded_related_client")
+def projects_awarded_related_client(db: Session) -> None:
+    # Awarded related customer (bid winner among related_client_ids)
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'projects'
+              AND column_name = 'awarded_related_client_id'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE projects ADD COLUMN awarded_related_client_id UUID NULL"))
+        db.commit()
+        print("[startup] Added awarded_related_client_id column to projects table")
+
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'projects'
+              AND column_name = 'awarded_related_client_ids'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE projects ADD COLUMN awarded_related_client_ids JSON NULL"))
+        db.commit()
+        print("[startup] Added awarded_related_client_ids column to projects table")
+
+
+@migration("0022_projects_acl")
+def projects_acl(db: Session) -> None:
+    # ACL visibility ownership on projects
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'projects'
+              AND column_name = 'created_by_user_id'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(
+            text(
+                "ALTER TABLE projects ADD COLUMN created_by_user_id UUID NULL REFERENCES users(id) ON DELETE SET NULL"
+            )
+        )
+        try:
+            db.execute(text("CREATE INDEX IF NOT EXISTS idx_projects_created_by_user_id ON projects(created_by_user_id)"))
+        except Exception:
+            pass
+        db.commit()
+        print("[startup] Added created_by_user_id column to projects table")
+
+    db.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS project_members (
+                id UUID PRIMARY KEY,
+                project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+                user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                member_role VARCHAR(50),
+                created_at TIMESTAMPTZ DEFAULT NOW(),
+                added_by_user_id UUID REFERENCES users(id) ON DELETE SET NULL
+            )
+            """
+        )
+    )
+    try:
+        db.execute(
+            text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_project_members_project_user ON project_members(project_id, user_id)"
+            )
+        )
+        db.execute(text("CREATE INDEX IF NOT EXISTS idx_project_members_project_id ON project_members(project_id)"))
+        db.execute(text("CREATE INDEX IF NOT EXISTS idx_project_members_user_id ON project_members(user_id)"))
+    except Exception:
+        pass
+    db.commit()
+
+
+@migration("0023_projects_business_line")
+def projects_business_line(db: Session) -> None:
+    # Business line: Construction vs Repairs & Maintenance
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'projects'
+              AND column_name = 'business_line'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE projects ADD COLUMN business_line VARCHAR(50) NULL"))
+        try:
+            db.execute(text("CREATE INDEX IF NOT EXISTS idx_projects_business_line ON projects(business_line)"))
+        except Exception:
+            pass
+        db.commit()
+        print("[startup] Added business_line column to projects table")
+    try:
+        from .services.business_line import backfill_business_line_column
+
+        n_null = db.execute(text("SELECT COUNT(*) FROM projects WHERE business_line IS NULL")).scalar() or 0
+        if int(n_null) > 0:
+            backfill_business_line_column(db, do_commit=False)
+            db.execute(text("UPDATE projects SET business_line = 'construction' WHERE business_line IS NULL"))
+        db.execute(text("ALTER TABLE projects ALTER COLUMN business_line SET DEFAULT 'construction'"))
+        try:
+            db.execute(text("ALTER TABLE projects ALTER COLUMN business_line SET NOT NULL"))
+        except Exception:
+            pass
+        try:
+            db.execute(text("CREATE INDEX IF NOT EXISTS idx_projects_business_line ON projects(business_line)"))
+        except Exception:
+            pass
+        db.commit()
+        print("[startup] business_line backfill / constraints OK")
+    except Exception as e:
+        print(f"[startup] business_line migration (non-critical): {e}")
+        db.rollback()
+
+
+@migration("0024_projects_related_leak_investigation")
+def projects_related_leak_investigation(db: Session) -> None:
+    try:
+        rows2 = db.execute(
+            text(
+                """
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_name = 'projects'
+                  AND column_name = 'related_leak_investigation_id'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not rows2:
+            db.execute(
+                text(
+                    "ALTER TABLE projects ADD COLUMN related_leak_investigation_id UUID NULL REFERENCES projects(id) ON DELETE SET NULL"
+                )
+            )
+            try:
+                db.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS idx_projects_related_leak_investigation_id ON projects(related_leak_investigation_id)"
+                    )
+                )
+            except Exception:
+                pass
+            db.commit()
+            print("[startup] Added related_leak_investigation_id column to projects table")
+    except Exception as e:
+        print(f"[startup] leak investigation columns (non-critical): {e}")
+        db.rollback()
+
+
+@migration("0025_projects_geocoding")
+def projects_geocoding(db: Session) -> None:
+    # Project geocoding metadata columns
+    try:
+        geocoding_cols = [
+            ("geocoded_address", "VARCHAR(500) NULL"),
+            ("geocoding_status", "VARCHAR(20) NULL"),
+            ("geocoded_at", "TIMESTAMPTZ NULL"),
+            ("geocoding_error", "VARCHAR(500) NULL"),
+        ]
+        for col, col_type in geocoding_cols:
+            rows = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'projects' AND column_name = :col LIMIT 1
+                    """
+                ),
+                {"col": col},
+            ).fetchall()
+            if not rows:
+                db.execute(text(f"ALTER TABLE projects ADD COLUMN {col} {col_type}"))
+                db.commit()
+                print(f"[startup] Added projects.{col}")
+        try:
+            db.execute(
+                text(
+                    """
+                    CREATE INDEX IF NOT EXISTS ix_projects_lat_lng
+                    ON projects (lat, lng)
+                    WHERE lat IS NOT NULL AND lng IS NOT NULL AND deleted_at IS NULL
+                    """
+                )
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+    except Exception as e:
+        print(f"[startup] project geocoding columns (non-critical): {e}")
+        db.rollback()
+
+
+@migration("0026_projects_geohash")
+def projects_geohash(db: Session) -> None:
+    # Map grid index: geohash of lat/lng (kept in sync by a Project mapper event)
+    try:
+        db.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS geohash VARCHAR(12)"))
+        db.execute(
+            text(
+                """
+                CREATE INDEX IF NOT EXISTS ix_projects_geohash
+                ON projects (geohash text_pattern_ops)
+                WHERE geohash IS NOT NULL AND deleted_at IS NULL
+                """
+            )
+        )
+        db.commit()
+        from .services.project_map_service import backfill_project_geohashes
+
+        filled = backfill_project_geohashes(db)
+        if filled:
+            print(f"[startup] Backfilled projects.geohash for {filled} rows")
+    except Exception as e:
+        print(f"[startup] projects.geohash (non-critical): {e}")
+        db.rollback()
+
+
+@migration("0027_geocode_cache")
+def geocode_cache(db: Session) -> None:
+    # Geocoder results shared by every project at the same normalized address
+    try:
+        from .models.models import GeocodeCache
+
+        Base.metadata.create_all(bind=engine, tables=[GeocodeCache.__table__])
+    except Exception as e:
+        print(f"[startup] geocode_cache table (non-critical): {e}")
+        db.rollback()
+
+
+@migration("0028_tasks_v2_change_feed_index")
+def tasks_v2_change_feed_index(db: Session) -> None:
+    try:
+        db.execute(
+            text("CREATE INDEX IF NOT EXISTS idx_tasks_v2_updated_at_id ON tasks_v2 (updated_at, id)")
+        )
+        db.commit()
+    except Exception as e:
+        print(f"[startup] tasks_v2 change-feed index (non-critical): {e}")
+        db.rollback()
+
+
+@migration("0029_billing_snapshots")
+def billing_snapshots(db: Session) -> None:
+    # Project + client billing snapshot columns
+    try:
+        client_billing_cols = [
+            ("billing_contact", "VARCHAR(255) NULL"),
+            ("invoice_to", "VARCHAR(255) NULL"),
+        ]
+        for col, col_type in client_billing_cols:
+            rows = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'clients' AND column_name = :col LIMIT 1
+                    """
+                ),
+                {"col": col},
+            ).fetchall()
+            if not rows:
+                db.execute(text(f"ALTER TABLE clients ADD COLUMN {col} {col_type}"))
+                db.commit()
+                print(f"[startup] Added clients.{col}")
+
+        project_billing_cols = [
+            ("purchase_order_number", "VARCHAR(100) NULL"),
+            ("billing_contact", "VARCHAR(255) NULL"),
+            ("invoice_to", "VARCHAR(255) NULL"),
+            ("billing_email", "VARCHAR(255) NULL"),
+            ("po_required", "BOOLEAN DEFAULT false"),
+            ("billing_address_line1", "VARCHAR(255) NULL"),
+            ("billing_address_line2", "VARCHAR(255) NULL"),
+            ("billing_city", "VARCHAR(100) NULL"),
+            ("billing_province", "VARCHAR(100) NULL"),
+            ("billing_postal_code", "VARCHAR(50) NULL"),
+            ("billing_country", "VARCHAR(100) NULL"),
+        ]
+        for col, col_type in project_billing_cols:
+            rows = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'projects' AND column_name = :col LIMIT 1
+                    """
+                ),
+                {"col": col},
+            ).fetchall()
+            if not rows:
+                db.execute(text(f"ALTER TABLE projects ADD COLUMN {col} {col_type}"))
+                db.commit()
+                print(f"[startup] Added projects.{col}")
+
+        project_field_brief_cols = [
+            ("scope_of_work", "TEXT NULL"),
+            ("job_completion_estimate", "VARCHAR(500) NULL"),
+            ("crew_material_list", "JSON NULL"),
+        ]
+        for col, col_type in project_field_brief_cols:
+            rows = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'projects' AND column_name = :col LIMIT 1
+                    """
+                ),
+                {"col": col},
+            ).fetchall()
+            if not rows:
+                db.execute(text(f"ALTER TABLE projects ADD COLUMN {col} {col_type}"))
+                db.commit()
+                print(f"[startup] Added projects.{col}")
+
+        project_number_rows = db.execute(
+            text(
+                """
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'projects' AND column_name = 'project_number' LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not project_number_rows:
+            db.execute(text("ALTER TABLE projects ADD COLUMN project_number VARCHAR(100) NULL"))
+            db.commit()
+            print("[startup] Added projects.project_number")
+
+        # Backfill active projects (not opportunities / leak investigations)
+        try:
+            from .services.billing_snapshot import billing_snapshot_from_client
+            from .models.models import Client as ClientModel, Project as ProjectModel
+
+            candidates = (
+                db.query(ProjectModel)
+                .filter(
+                    ProjectModel.deleted_at.is_(None),
+                    ProjectModel.is_bidding.is_(False),
+                    ProjectModel.client_id.isnot(None),
+                    ProjectModel.billing_email.is_(None),
+                    ProjectModel.billing_contact.is_(None),
+                    ProjectModel.invoice_to.is_(None),
+                )
+                .all()
+            )
+            for proj in candidates:
+                client_row = (
+                    db.query(ClientModel).filter(ClientModel.id == proj.client_id).first()
+                )
+                if not client_row:
+                    continue
+                snap = billing_snapshot_from_client(client_row)
+                for k, v in snap.items():
+                    setattr(proj, k, v)
+            if candidates:
+                db.commit()
+                print(f"[startup] Backfilled billing snapshot on {len(candidates)} project(s)")
+        except Exception as e:
+            print(f"[startup] project billing backfill (non-critical): {e}")
+            db.rollback()
+    except Exception as e:
+        print(f"[startup] billing columns migration (non-critical): {e}")
+        db.rollback()
+
+
+@migration("0030_user_documents_project_id")
+def user_documents_project_id(db: Session) -> None:
+    # Check for project_id column in user_documents
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'user_documents'
+              AND column_name = 'project_id'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(text("ALTER TABLE user_documents ADD COLUMN project_id UUID NULL REFERENCES projects(id) ON DELETE SET NULL"))
+        try:
+            db.execute(text("CREATE INDEX IF NOT EXISTS idx_user_documents_project_id ON user_documents(project_id)"))
+        except Exception:
+            pass
+        db.commit()
+        print("[startup] Added project_id column to user_documents table")
+
+
+@migration("0031_document_types")
+def document_types(db: Session) -> None:
+    # Create document_types table
+    db.execute(text("""
+        CREATE TABLE IF NOT EXISTS document_types (
+            id UUID PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            description VARCHAR(500),
+            category VARCHAR(100),
+            page_templates JSON,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """))
+    db.commit()
+    try:
+        rows = db.execute(text(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = 'document_types' AND column_name = 'category' LIMIT 1"
+        )).fetchall()
+        if not rows:
+            db.execute(text("ALTER TABLE document_types ADD COLUMN category VARCHAR(100)"))
+            db.commit()
+            print("[startup] Added category column to document_types table")
+    except Exception:
+        pass
+    print("[startup] document_types table ready")
+    try:
+        if not db.execute(
+            text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = 'public' AND table_name = 'document_types' "
+                "AND column_name = 'signer_roles' LIMIT 1"
+            )
+        ).fetchall():
+            db.execute(text("ALTER TABLE document_types ADD COLUMN signer_roles JSON"))
+            db.commit()
+            print("[startup] Added document_types.signer_roles")
+    except Exception as _e:
+        db.rollback()
+        print(f"[startup] document_types.signer_roles (non-critical): {_e}")
+
+
+@migration("0032_user_documents_signer_roles")
+def user_documents_signer_roles(db: Session) -> None:
+    try:
+        if db.execute(
+            text(
+                "SELECT 1 FROM information_schema.tables WHERE table_name = 'user_documents' LIMIT 1"
+            )
+        ).fetchall() and not db.execute(
+            text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = 'public' AND table_name = 'user_documents' "
+                "AND column_name = 'signer_roles' LIMIT 1"
+            )
+        ).fetchall():
+            db.execute(text("ALTER TABLE user_documents ADD COLUMN signer_roles JSON"))
+            db.commit()
+            print("[startup] Added user_documents.signer_roles")
+    except Exception as _e:
+        db.rollback()
+        print(f"[startup] user_documents.signer_roles (non-critical): {_e}")
+
+
+@migration("0033_document_signature_templates")
+def document_signature_templates(db: Session) -> None:
+    rows = db.execute(
+        text(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = 'document_signature_templates' LIMIT 1"
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import DocumentSignatureTemplate
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[DocumentSignatureTemplate.__table__],
+        )
+        db.commit()
+        print("[startup] Created document_signature_templates table")
+
+
+@migration("0034_document_signature_requests")
+def document_signature_requests(db: Session) -> None:
+    rows = db.execute(
+        text(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = 'document_signature_requests' LIMIT 1"
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import DocumentSignatureRequest
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[DocumentSignatureRequest.__table__],
+        )
+        db.commit()
+        print("[startup] Created document_signature_requests table")
+
+    if db.execute(
+        text(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = 'document_signature_requests' LIMIT 1"
+        )
+    ).fetchall():
+        if not db.execute(
+            text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = 'public' AND table_name = 'document_signature_requests' "
+                "AND column_name = 'current_pdf_file_id' LIMIT 1"
+            )
+        ).fetchall():
+            db.execute(
+                text(
+                    "ALTER TABLE document_signature_requests "
+                    "ADD COLUMN current_pdf_file_id UUID REFERENCES file_objects(id) ON DELETE SET NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "UPDATE document_signature_requests "
+                    "SET current_pdf_file_id = source_pdf_file_id "
+                    "WHERE current_pdf_file_id IS NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Added document_signature_requests.current_pdf_file_id")
+
+
+@migration("0035_document_signature_participants")
+def document_signature_participants(db: Session) -> None:
+    if not db.execute(
+        text(
+            "SELECT 1 FROM information_schema.tables "
+            "WHERE table_name = 'document_signature_participants' LIMIT 1"
+        )
+    ).fetchall():
+        from .models.models import DocumentSignatureParticipant
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[DocumentSignatureParticipant.__table__],
+        )
+        db.commit()
+        print("[startup] Created document_signature_participants table")
+        # Backfill: one employee participant from legacy signer_user_id
+        try:
+            db.execute(
+                text(
+                    """
+                    INSERT INTO document_signature_participants
+                        (id, request_id, role, signer_user_id, sort_order, status, signed_at, created_at)
+                    SELECT gen_random_uuid(), r.id, 'employee', r.signer_user_id, 0,
+                           CASE WHEN r.status = 'signed' THEN 'signed' ELSE 'ready' END,
+                           r.signed_at, COALESCE(r.created_at, NOW())
+                    FROM document_signature_requests r
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM document_signature_participants p WHERE p.request_id = r.id
+                    )
+                    """
+                )
+            )
+            db.commit()
+            print("[startup] Backfilled document_signature_participants from signer_user_id")
+        except Exception as _e:
+            db.rollback()
+            print(f"[startup] document_signature_participants backfill (non-critical): {_e}")
+
+    if db.execute(
+        text(
+            "SELECT 1 FROM information_schema.tables "
+            "WHERE table_name = 'document_signature_participants' LIMIT 1"
+        )
+    ).fetchall():
+        try:
+            col = db.execute(
+                text(
+                    "SELECT character_maximum_length FROM information_schema.columns "
+                    "WHERE table_schema = 'public' AND table_name = 'document_signature_participants' "
+                    "AND column_name = 'role' LIMIT 1"
+                )
+            ).fetchone()
+            if col and col[0] is not None and int(col[0]) < 64:
+                db.execute(
+                    text(
+                        "ALTER TABLE document_signature_participants "
+                        "ALTER COLUMN role TYPE VARCHAR(64)"
+                    )
+                )
+                db.commit()
+                print("[startup] Widened document_signature_participants.role to VARCHAR(64)")
+        except Exception as _e:
+            db.rollback()
+            print(f"[startup] widen participants.role (non-critical): {_e}")
+        try:
+            if not db.execute(
+                text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_schema = 'public' AND table_name = 'document_signature_participants' "
+                    "AND column_name = 'role_label' LIMIT 1"
+                )
+            ).fetchall():
+                db.execute(
+                    text(
+                        "ALTER TABLE document_signature_participants "
+                        "ADD COLUMN role_label VARCHAR(120)"
+                    )
+                )
+                db.commit()
+                print("[startup] Added document_signature_participants.role_label")
+        except Exception as _e:
+            db.rollback()
+            print(f"[startup] participants.role_label (non-critical): {_e}")
+        try:
+            if not db.execute(
+                text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_schema = 'public' AND table_name = 'document_signature_participants' "
+                    "AND column_name = 'ip_address' LIMIT 1"
+                )
+            ).fetchall():
+                db.execute(
+                    text(
+                        "ALTER TABLE document_signature_participants "
+                        "ADD COLUMN ip_address VARCHAR(100)"
+                    )
+                )
+                db.commit()
+                print("[startup] Added document_signature_participants.ip_address")
+        except Exception as _e:
+            db.rollback()
+            print(f"[startup] participants.ip_address (non-critical): {_e}")
+        try:
+            if not db.execute(
+                text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_schema = 'public' AND table_name = 'document_signature_participants' "
+                    "AND column_name = 'user_agent' LIMIT 1"
+                )
+            ).fetchall():
+                db.execute(
+                    text(
+                        "ALTER TABLE document_signature_participants "
+                        "ADD COLUMN user_agent VARCHAR(512)"
+                    )
+                )
+                db.commit()
+                print("[startup] Added document_signature_participants.user_agent")
+        except Exception as _e:
+            db.rollback()
+            print(f"[startup] participants.user_agent (non-critical): {_e}")
+
+
+@migration("0036_onboarding")
+def onboarding(db: Session) -> None:
+    # Onboarding (Step 2 documents, packages, signing)
+    rows = db.execute(
+        text(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = 'onboarding_base_documents' LIMIT 1"
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import (
+            OnboardingAssignment,
+            OnboardingAssignmentItem,
+            OnboardingBaseDocument,
+            OnboardingPackage,
+            OnboardingPackageItem,
+            OnboardingSignedDocument,
+            OnboardingTrigger,
+        )
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[
+                OnboardingBaseDocument.__table__,
+                OnboardingPackage.__table__,
+                OnboardingPackageItem.__table__,
+                OnboardingTrigger.__table__,
+                OnboardingAssignment.__table__,
+                OnboardingAssignmentItem.__table__,
+                OnboardingSignedDocument.__table__,
+            ],
+        )
+        db.commit()
+        print("[startup] Created onboarding_* tables")
+
+    def _onb_col(table: str, col: str) -> bool:
+        return bool(
+            db.execute(
+                text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_schema = 'public' AND table_name = :t AND column_name = :c LIMIT 1"
+                ),
+                {"t": table, "c": col},
+            ).fetchall()
+        )
+
+    if db.execute(
+        text("SELECT 1 FROM information_schema.tables WHERE table_name = 'onboarding_package_items' LIMIT 1")
+    ).fetchall():
+        for tbl, col, ddl in [
+            ("onboarding_package_items", "display_name", "VARCHAR(255)"),
+            ("onboarding_package_items", "notification_message", "VARCHAR(4000)"),
+            ("onboarding_package_items", "delivery_mode", "VARCHAR(20) NOT NULL DEFAULT 'on_hire'"),
+            ("onboarding_package_items", "delivery_amount", "INTEGER"),
+            ("onboarding_package_items", "delivery_unit", "VARCHAR(16)"),
+            ("onboarding_package_items", "delivery_direction", "VARCHAR(16)"),
+            (
+                "onboarding_package_items",
+                "requires_signature",
+                "BOOLEAN NOT NULL DEFAULT true",
+            ),
+            ("onboarding_package_items", "notification_policy", "JSONB"),
+        ]:
+            if not _onb_col(tbl, col):
+                db.execute(text(f"ALTER TABLE {tbl} ADD COLUMN {col} {ddl}"))
+                db.commit()
+                print(f"[startup] Added {tbl}.{col}")
+        if not _onb_col("onboarding_package_items", "applies_to_mode") and not _onb_col(
+            "onboarding_package_items", "recipient_scope"
+        ):
+            db.execute(text("ALTER TABLE onboarding_package_items ADD COLUMN applies_to_mode VARCHAR(20)"))
+            db.execute(text("ALTER TABLE onboarding_package_items ADD COLUMN applies_to_division_ids JSONB"))
+            db.commit()
+            print("[startup] Added onboarding_package_items applies_to_* (legacy)")
+            import json as _json
+
+            pkg_rows = db.execute(text("SELECT id FROM onboarding_packages")).fetchall()
+            for (pid,) in pkg_rows:
+                tr = db.execute(
+                    text(
+                        "SELECT condition_type, condition_value FROM onboarding_triggers WHERE package_id = :p"
+                    ),
+                    {"p": pid},
+                ).fetchall()
+                item_rows = db.execute(
+                    text("SELECT id FROM onboarding_package_items WHERE package_id = :p"),
+                    {"p": pid},
+                ).fetchall()
+                if not item_rows:
+                    continue
+                has_all = any((str(t[0] or "").lower() == "all") for t in tr)
+                if has_all:
+                    mode, div_json = "all", "[]"
+                elif tr:
+                    union_ids = []
+                    seen = set()
+                    for t in tr:
+                        if str(t[0] or "").lower() != "division":
+                            continue
+                        cv = t[1]
+                        if isinstance(cv, str):
+                            try:
+                                cv = _json.loads(cv) if cv else {}
+                            except Exception:
+                                cv = {}
+                        elif not isinstance(cv, dict):
+                            cv = {}
+                        for x in cv.get("division_ids") or []:
+                            s = str(x)
+                            if s not in seen:
+                                seen.add(s)
+                                union_ids.append(s)
+                    mode = "division"
+                    div_json = _json.dumps(union_ids)
+                else:
+                    mode = "division"
+                    div_json = "[]"
+                db.execute(
+                    text(
+                        """
+                        UPDATE onboarding_package_items
+                        SET applies_to_mode = :m,
+                            applies_to_division_ids = CAST(:j AS JSONB)
+                        WHERE package_id = :p
+                        """
+                    ),
+                    {"m": mode, "j": div_json, "p": pid},
+                )
+            db.execute(
+                text(
+                    "UPDATE onboarding_package_items SET applies_to_mode = 'all' "
+                    "WHERE applies_to_mode IS NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "UPDATE onboarding_package_items SET applies_to_division_ids = '[]'::jsonb "
+                    "WHERE applies_to_division_ids IS NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE onboarding_package_items ALTER COLUMN applies_to_mode SET DEFAULT 'all'"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE onboarding_package_items ALTER COLUMN applies_to_mode SET NOT NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Migrated package item applies_to from triggers (legacy)")
+        if not _onb_col("onboarding_package_items", "recipient_scope"):
+            db.execute(
+                text("ALTER TABLE onboarding_package_items ADD COLUMN recipient_scope VARCHAR(24)")
+            )
+            db.execute(text("ALTER TABLE onboarding_package_items ADD COLUMN recipient_user_ids JSONB"))
+            db.commit()
+            has_applies = _onb_col("onboarding_package_items", "applies_to_mode")
+            has_assign = _onb_col("onboarding_package_items", "assign_to")
+            if has_applies and has_assign:
+                db.execute(
+                    text(
+                        """
+                        UPDATE onboarding_package_items SET
+                          recipient_user_ids = '[]'::jsonb,
+                          recipient_scope = CASE
+                            WHEN LOWER(TRIM(COALESCE(applies_to_mode, 'all'))) = 'division'
+                              THEN 'specific_users'
+                            WHEN LOWER(TRIM(COALESCE(assign_to, 'employee'))) = 'manager'
+                              THEN 'specific_users'
+                            ELSE 'everyone'
+                          END
+                        """
+                    )
+                )
+            elif has_applies:
+                db.execute(
+                    text(
+                        """
+                        UPDATE onboarding_package_items SET
+                          recipient_user_ids = '[]'::jsonb,
+                          recipient_scope = CASE
+                            WHEN LOWER(TRIM(COALESCE(applies_to_mode, 'all'))) = 'division'
+                              THEN 'specific_users'
+                            ELSE 'everyone'
+                          END
+                        """
+                    )
+                )
+            elif has_assign:
+                db.execute(
+                    text(
+                        """
+                        UPDATE onboarding_package_items SET
+                          recipient_user_ids = '[]'::jsonb,
+                          recipient_scope = CASE
+                            WHEN LOWER(TRIM(COALESCE(assign_to, 'employee'))) = 'manager'
+                              THEN 'specific_users'
+                            ELSE 'everyone'
+                          END
+                        """
+                    )
+                )
+            else:
+                db.execute(
+                    text(
+                        "UPDATE onboarding_package_items SET recipient_scope = 'everyone', "
+                        "recipient_user_ids = '[]'::jsonb"
+                    )
+                )
+            db.execute(text("UPDATE onboarding_package_items SET recipient_user_ids = '[]'::jsonb WHERE recipient_user_ids IS NULL"))
+            db.execute(text("UPDATE onboarding_package_items SET recipient_scope = 'everyone' WHERE recipient_scope IS NULL OR recipient_scope = ''"))
+            db.execute(
+                text(
+                    "ALTER TABLE onboarding_package_items ALTER COLUMN recipient_scope SET DEFAULT 'everyone'"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE onboarding_package_items ALTER COLUMN recipient_scope SET NOT NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Migrated onboarding_package_items to recipient_scope / recipient_user_ids")
+        for legacy_col in ("assign_to", "applies_to_mode", "applies_to_division_ids"):
+            if _onb_col("onboarding_package_items", legacy_col):
+                try:
+                    db.execute(
+                        text(f"ALTER TABLE onboarding_package_items DROP COLUMN {legacy_col}")
+                    )
+                    db.commit()
+                    print(f"[startup] Dropped onboarding_package_items.{legacy_col}")
+                except Exception as _e:
+                    print(f"[startup] Could not drop onboarding_package_items.{legacy_col}: {_e}")
+        if not _onb_col("onboarding_package_items", "signing_deadline_days"):
+            db.execute(
+                text("ALTER TABLE onboarding_package_items ADD COLUMN signing_deadline_days INTEGER")
+            )
+            db.commit()
+            db.execute(
+                text(
+                    """
+                    UPDATE onboarding_package_items AS i
+                    SET signing_deadline_days = COALESCE(
+                      (SELECT b.default_deadline_days FROM onboarding_base_documents AS b
+                       WHERE b.id = i.base_document_id),
+                      7
+                    )
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    "UPDATE onboarding_package_items SET signing_deadline_days = 7 "
+                    "WHERE signing_deadline_days IS NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE onboarding_package_items ALTER COLUMN signing_deadline_days SET DEFAULT 7"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE onboarding_package_items ALTER COLUMN signing_deadline_days SET NOT NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Added onboarding_package_items.signing_deadline_days")
+    if db.execute(
+        text("SELECT 1 FROM information_schema.tables WHERE table_name = 'onboarding_assignment_items' LIMIT 1")
+    ).fetchall():
+        if not _onb_col("onboarding_assignment_items", "available_at"):
+            db.execute(text("ALTER TABLE onboarding_assignment_items ADD COLUMN available_at TIMESTAMP WITH TIME ZONE"))
+            db.execute(
+                text(
+                    """
+                    UPDATE onboarding_assignment_items AS i
+                    SET available_at = a.assigned_at
+                    FROM onboarding_assignments AS a
+                    WHERE i.assignment_id = a.id AND i.available_at IS NULL
+                    """
+                )
+            )
+            db.execute(text("UPDATE onboarding_assignment_items SET available_at = NOW() WHERE available_at IS NULL"))
+            db.execute(
+                text(
+                    "ALTER TABLE onboarding_assignment_items ALTER COLUMN available_at SET NOT NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Added onboarding_assignment_items.available_at")
+        for tbl, col, ddl in [
+            ("onboarding_assignment_items", "display_name", "VARCHAR(255)"),
+            ("onboarding_assignment_items", "user_message", "VARCHAR(4000)"),
+        ]:
+            if not _onb_col(tbl, col):
+                db.execute(text(f"ALTER TABLE {tbl} ADD COLUMN {col} {ddl}"))
+                db.commit()
+                print(f"[startup] Added {tbl}.{col}")
+        if not _onb_col("onboarding_assignment_items", "subject_user_id"):
+            db.execute(
+                text(
+                    "ALTER TABLE onboarding_assignment_items ADD COLUMN subject_user_id UUID REFERENCES users(id) ON DELETE SET NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Added onboarding_assignment_items.subject_user_id")
+
+    # Onboarding base document preferences (per-doc, no package UI)
+    if db.execute(
+        text("SELECT 1 FROM information_schema.tables WHERE table_name = 'onboarding_base_documents' LIMIT 1")
+    ).fetchall():
+        for tbl, col, ddl in [
+            ("onboarding_base_documents", "assignee_type", "VARCHAR(20) NOT NULL DEFAULT 'employee'"),
+            ("onboarding_base_documents", "assignee_user_id", "UUID REFERENCES users(id) ON DELETE SET NULL"),
+            ("onboarding_base_documents", "assignee_user_ids", "JSONB"),
+            ("onboarding_base_documents", "required", "BOOLEAN NOT NULL DEFAULT true"),
+            ("onboarding_base_documents", "employee_visible", "BOOLEAN NOT NULL DEFAULT true"),
+            ("onboarding_base_documents", "sort_order", "INTEGER NOT NULL DEFAULT 0"),
+            ("onboarding_base_documents", "display_name", "VARCHAR(255)"),
+            ("onboarding_base_documents", "notification_message", "VARCHAR(4000)"),
+            ("onboarding_base_documents", "delivery_mode", "VARCHAR(20) NOT NULL DEFAULT 'on_hire'"),
+            ("onboarding_base_documents", "delivery_amount", "INTEGER"),
+            ("onboarding_base_documents", "delivery_unit", "VARCHAR(16)"),
+            ("onboarding_base_documents", "delivery_direction", "VARCHAR(16)"),
+            ("onboarding_base_documents", "requires_signature", "BOOLEAN NOT NULL DEFAULT true"),
+            ("onboarding_base_documents", "notification_policy", "JSONB"),
+            ("onboarding_base_documents", "signing_deadline_days", "INTEGER NOT NULL DEFAULT 7"),
+            ("onboarding_base_documents", "signature_template", "JSONB"),
+        ]:
+            if not _onb_col(tbl, col):
+                db.execute(text(f"ALTER TABLE {tbl} ADD COLUMN {col} {ddl}"))
+                db.commit()
+                print(f"[startup] Added {tbl}.{col}")
+        try:
+            db.execute(
+                text(
+                    """
+                    UPDATE onboarding_base_documents SET signing_deadline_days = default_deadline_days
+                    WHERE signing_deadline_days IS NOT NULL AND default_deadline_days IS NOT NULL
+                    """
+                )
+            )
+            db.commit()
+        except Exception:
+            pass
+        try:
+            db.execute(
+                text(
+                    """
+                    UPDATE onboarding_base_documents
+                    SET assignee_user_ids = jsonb_build_array(assignee_user_id::text)
+                    WHERE assignee_user_id IS NOT NULL
+                      AND (assignee_user_ids IS NULL OR assignee_user_ids = '[]'::jsonb)
+                    """
+                )
+            )
+            db.commit()
+        except Exception:
+            pass
+        try:
+            rows_pkg = db.execute(
+                text("SELECT 1 FROM onboarding_packages WHERE name = 'HR Onboarding' LIMIT 1")
+            ).fetchall()
+            if not rows_pkg:
+                db.execute(
+                    text(
+                        """
+                        INSERT INTO onboarding_packages (id, name, description, active, created_at)
+                        VALUES (gen_random_uuid(), 'HR Onboarding', 'System package for onboarding base documents', true, NOW())
+                        """
+                    )
+                )
+                db.commit()
+                print("[startup] Seeded HR Onboarding system package")
+        except Exception as _e:
+            print(f"[startup] HR Onboarding package seed skipped: {_e}")
+        try:
+            if not _onb_col("onboarding_packages", "document_delivery_enabled"):
+                db.execute(
+                    text(
+                        "ALTER TABLE onboarding_packages ADD COLUMN document_delivery_enabled BOOLEAN NOT NULL DEFAULT true"
+                    )
+                )
+                db.commit()
+                print("[startup] Added onboarding_packages.document_delivery_enabled")
+        except Exception as _e:
+            print(f"[startup] onboarding_packages.document_delivery_enabled migration: {_e}")
+
+
+@migration("0037_project_folders")
+def project_folders(db: Session) -> None:
+    # Project folders
+    db.execute(text("""
+        CREATE TABLE IF NOT EXISTS project_folders (
+            id UUID PRIMARY KEY,
+            project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+            category VARCHAR(100) NOT NULL,
+            parent_id UUID REFERENCES project_folders(id) ON DELETE CASCADE,
+            name VARCHAR(255) NOT NULL,
+            sort_index INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """))
+    db.execute(text("CREATE INDEX IF NOT EXISTS idx_project_folders_project_id ON project_folders(project_id)"))
+    db.commit()
+    try:
+        rows = db.execute(text(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = 'client_files' AND column_name = 'folder_id' LIMIT 1"
+        )).fetchall()
+        if not rows:
+            db.execute(text("ALTER TABLE client_files ADD COLUMN folder_id UUID REFERENCES project_folders(id) ON DELETE SET NULL"))
+            db.commit()
+            print("[startup] Added folder_id column to client_files")
+    except Exception:
+        pass
+
+
+@migration("0038_client_files_soft_delete")
+def client_files_soft_delete(db: Session) -> None:
+    # Soft-delete columns for project/client file rows (removed from UI but kept until admin purges)
+    try:
+        _cf_cols = db.execute(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = 'public' AND table_name = 'client_files' "
+                "AND column_name IN ('deleted_at', 'deleted_by_id')"
+            )
+        ).fetchall()
+        _have = {str(r[0]) for r in _cf_cols}
+        if "deleted_at" not in _have:
+            db.execute(text("ALTER TABLE client_files ADD COLUMN deleted_at TIMESTAMPTZ NULL"))
+            db.commit()
+            print("[startup] Added client_files.deleted_at")
+        if "deleted_by_id" not in _have:
+            db.execute(
+                text(
+                    "ALTER TABLE client_files ADD COLUMN deleted_by_id UUID NULL "
+                    "REFERENCES users(id) ON DELETE SET NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Added client_files.deleted_by_id")
+        try:
+            db.execute(text("CREATE INDEX IF NOT EXISTS idx_client_files_deleted_at ON client_files(deleted_at)"))
+            db.commit()
+        except Exception:
+            pass
+    except Exception as _e:
+        print(f"[startup] client_files soft-delete columns (non-critical): {_e}")
+
+    try:
+        _notes_col = db.execute(
+            text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = 'public' AND table_name = 'client_files' "
+                "AND column_name = 'notes' LIMIT 1"
+            )
+        ).fetchall()
+        if not _notes_col:
+            db.execute(text("ALTER TABLE client_files ADD COLUMN notes VARCHAR(1000) NULL"))
+            db.commit()
+            print("[startup] Added client_files.notes")
+    except Exception as _e:
+        print(f"[startup] client_files.notes column (non-critical): {_e}")
+
+
+@migration("0039_client_folders_path_index")
+def client_folders_path_index(db: Session) -> None:
+    # Folder hierarchy index: materialized path kept in sync by ClientFolder mapper events
+    try:
+        db.execute(text("ALTER TABLE client_folders ADD COLUMN IF NOT EXISTS path TEXT"))
+        db.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_client_folders_client_path "
+                "ON client_folders (client_id, path text_pattern_ops)"
+            )
+        )
+        db.commit()
+        from .services.company_folder_index import backfill_client_folder_paths
+
+        filled = backfill_client_folder_paths(db)
+        if filled:
+            print(f"[startup] Backfilled client_folders.path for {filled} rows")
+    except Exception as _e:
+        print(f"[startup] client_folders.path (non-critical): {_e}")
+        db.rollback()
+
+
+@migration("0040_file_objects_project_id")
+def file_objects_project_id(db: Session) -> None:
+    # Project Files tab: file_objects.project_id drives the lookup, live client_files join on it
+    try:
+        db.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_file_objects_project_client "
+                "ON file_objects (project_id, client_id) WHERE project_id IS NOT NULL"
+            )
+        )
+        db.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_client_files_live_file_object "
+                "ON client_files (file_object_id, client_id) WHERE deleted_at IS NULL"
+            )
+        )
+        db.commit()
+    except Exception as _e:
+        print(f"[startup] project files indexes (non-critical): {_e}")
+        db.rollback()
+
+
+@migration("0041_client_documents_soft_delete")
+def client_documents_soft_delete(db: Session) -> None:
+    # Soft-delete columns for company file documents (ClientDocument rows)
+    try:
+        _cd_cols = db.execute(
+            text(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = 'public' AND table_name = 'client_documents' "
+                "AND column_name IN ('deleted_at', 'deleted_by')"
+            )
+        ).fetchall()
+        _cd_have = {str(r[0]) for r in _cd_cols}
+        if "deleted_at" not in _cd_have:
+            db.execute(text("ALTER TABLE client_documents ADD COLUMN deleted_at TIMESTAMPTZ NULL"))
+            db.commit()
+            print("[startup] Added client_documents.deleted_at")
+        if "deleted_by" not in _cd_have:
+            db.execute(
+                text(
+                    "ALTER TABLE client_documents ADD COLUMN deleted_by UUID NULL "
+                    "REFERENCES users(id) ON DELETE SET NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Added client_documents.deleted_by")
+        try:
+            db.execute(text("CREATE INDEX IF NOT EXISTS idx_client_documents_deleted_at ON client_documents(deleted_at)"))
+            db.commit()
+        except Exception:
+            pass
+    except Exception as _e:
+        print(f"[startup] client_documents soft-delete columns (non-critical): {_e}")
+
+
+@migration("0042_permission_templates_table")
+def permission_templates_table(db: Session) -> None:
+    # Ensure permission_templates table exists
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'permission_templates'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import PermissionTemplate
+        Base.metadata.create_all(bind=engine, tables=[PermissionTemplate.__table__])
+        db.commit()
+        print("[startup] Created permission_templates table")
+
+
+@migration("0043_system_logs_table")
+def system_logs_table(db: Session) -> None:
+    # Ensure system_logs table exists
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'system_logs'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import SystemLog
+        Base.metadata.create_all(bind=engine, tables=[SystemLog.__table__])
+        db.commit()
+        print("[startup] Created system_logs table")
+
+
+@migration("0044_work_order_files_table")
+def work_order_files_table(db: Session) -> None:
+    # Ensure work_order_files table exists (work order file attachments with categories)
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'work_order_files'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import WorkOrderFile
+        Base.metadata.create_all(bind=engine, tables=[WorkOrderFile.__table__])
+        db.commit()
+        print("[startup] Created work_order_files table")
+
+
+@migration("0045_work_order_activity_logs_table")
+def work_order_activity_logs_table(db: Session) -> None:
+    # Ensure work_order_activity_logs table exists
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'work_order_activity_logs'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import WorkOrderActivityLog
+        Base.metadata.create_all(bind=engine, tables=[WorkOrderActivityLog.__table__])
+        db.commit()
+        print("[startup] Created work_order_activity_logs table")
+
+
+@migration("0046_employee_training_records")
+def employee_training_records(db: Session) -> None:
+    # Manual HR training records (not LMS)
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'employee_training_records'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import EmployeeTrainingRecord
+        Base.metadata.create_all(bind=engine, tables=[EmployeeTrainingRecord.__table__])
+        db.commit()
+        print("[startup] Created employee_training_records table")
+
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'employee_training_records'
+              AND column_name = 'matrix_training_id'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        db.execute(
+            text(
+                "ALTER TABLE employee_training_records ADD COLUMN matrix_training_id VARCHAR(64) NULL"
+            )
+        )
+        db.commit()
+        print("[startup] Added matrix_training_id to employee_training_records")
+    try:
+        db.execute(
+            text(
+                """
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_employee_training_user_matrix
+                ON employee_training_records (user_id, matrix_training_id)
+                WHERE matrix_training_id IS NOT NULL
+                """
+            )
+        )
+        db.commit()
+    except Exception:
+        pass
+
+    try:
+        db.execute(
+            text(
+                """
+                UPDATE employee_training_records
+                SET matrix_training_id = NULL
+                WHERE matrix_training_id = 'drivers_licence'
+                """
+            )
+        )
+        db.commit()
+    except Exception:
+        pass
+
+
+@migration("0047_training_courses_matrix_sync")
+def training_courses_matrix_sync(db: Session) -> None:
+    # LMS → HR matrix sync fields on training_courses
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'training_courses'
+              AND column_name = 'matrix_training_id'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        try:
+            db.execute(
+                text(
+                    "ALTER TABLE training_courses ADD COLUMN matrix_training_id VARCHAR(64) NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE training_courses ADD COLUMN sync_completion_to_employee_record BOOLEAN NOT NULL DEFAULT false"
+                )
+            )
+            db.commit()
+            print("[startup] Added matrix_training_id / sync_completion_to_employee_record to training_courses")
+        except Exception:
+            db.rollback()
+
+
+@migration("0048_training_certificate_design")
+def training_certificate_design(db: Session) -> None:
+    # LMS certificate PDF: background/logo + wording (align DB with TrainingCourse model)
+    try:
+        if db.execute(
+            text(
+                "SELECT 1 FROM information_schema.tables WHERE table_schema = 'public' AND table_name = 'training_courses' LIMIT 1"
+            )
+        ).fetchall():
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE training_courses
+                    ADD COLUMN IF NOT EXISTS certificate_background_file_id UUID NULL
+                    REFERENCES file_objects(id) ON DELETE SET NULL
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE training_courses
+                    ADD COLUMN IF NOT EXISTS certificate_background_setting_item_id UUID NULL
+                    REFERENCES setting_items(id) ON DELETE SET NULL
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE training_courses
+                    ADD COLUMN IF NOT EXISTS certificate_logo_file_id UUID NULL
+                    REFERENCES file_objects(id) ON DELETE SET NULL
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE training_courses
+                    ADD COLUMN IF NOT EXISTS certificate_logo_setting_item_id UUID NULL
+                    REFERENCES setting_items(id) ON DELETE SET NULL
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE training_courses ADD COLUMN IF NOT EXISTS certificate_heading_primary VARCHAR(200) NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE training_courses ADD COLUMN IF NOT EXISTS certificate_heading_secondary VARCHAR(200) NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE training_courses ADD COLUMN IF NOT EXISTS certificate_body_template TEXT NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE training_courses ADD COLUMN IF NOT EXISTS certificate_instructor_name VARCHAR(255) NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE training_courses ADD COLUMN IF NOT EXISTS certificate_background_preset_key VARCHAR(64) NULL"
+                )
+            )
+            db.execute(
+                text(
+                    "ALTER TABLE training_courses ADD COLUMN IF NOT EXISTS certificate_layout JSON NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Ensured training_courses certificate design/wording columns")
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] training_courses certificate columns migration (non-critical): {e}")
+
+
+@migration("0049_training_quiz_attempts")
+def training_quiz_attempts(db: Session) -> None:
+    # LMS: quiz submission limits (max_attempts) + per-user submission counts
+    try:
+        tq = db.execute(
+            text(
+                """
+                SELECT 1 FROM information_schema.tables
+                WHERE table_schema = 'public' AND table_name = 'training_quizzes'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if tq:
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE training_quizzes
+                    ADD COLUMN IF NOT EXISTS max_attempts INTEGER NULL
+                    """
+                )
+            )
+            db.execute(
+                text(
+                    """
+                    UPDATE training_quizzes
+                    SET max_attempts = CASE WHEN allow_retry THEN NULL ELSE 1 END
+                    WHERE max_attempts IS NULL
+                    """
+                )
+            )
+            db.commit()
+            from .models.models import TrainingQuizUserAttempt
+
+            Base.metadata.create_all(bind=engine, tables=[TrainingQuizUserAttempt.__table__])
+            db.commit()
+            print("[startup] Ensured training_quizzes.max_attempts and training_quiz_user_attempts")
+    except Exception as e:
+        db.rollback()
+        print(f"[startup] training_quizzes max_attempts migration (non-critical): {e}")
+
+
+@migration("0050_company_credit_cards")
+def company_credit_cards(db: Session) -> None:
+    # Corporate credit card inventory (last four + expiry only; no full PAN)
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'company_credit_cards'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import CompanyCreditCard, CompanyCreditCardAssignment
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[
+                CompanyCreditCard.__table__,
+                CompanyCreditCardAssignment.__table__,
+            ],
+        )
+        db.commit()
+        print("[startup] Created company_credit_cards tables")
+
+
+@migration("0051_fuel_cards")
+def fuel_cards(db: Session) -> None:
+    # Fuel card inventory
+    rows = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'fuel_cards'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows:
+        from .models.models import FuelCard, FuelCardAssignment
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[
+                FuelCard.__table__,
+                FuelCardAssignment.__table__,
+            ],
+        )
+        db.commit()
+        print("[startup] Created fuel_cards tables")
+    else:
+        # Ensure newer fuel card columns exist
+        try:
+            db.execute(text("ALTER TABLE fuel_cards ADD COLUMN IF NOT EXISTS crew VARCHAR(100)"))
+            db.execute(text("ALTER TABLE fuel_cards ALTER COLUMN date_issued DROP NOT NULL"))
+            db.execute(text("ALTER TABLE fuel_card_assignments ADD COLUMN IF NOT EXISTS notes_in TEXT"))
+            db.execute(text("ALTER TABLE fuel_card_assignments ADD COLUMN IF NOT EXISTS reason_out VARCHAR(255)"))
+            db.execute(text("ALTER TABLE fuel_card_assignments ADD COLUMN IF NOT EXISTS reason_in VARCHAR(255)"))
+            db.execute(text("ALTER TABLE fuel_card_assignments ADD COLUMN IF NOT EXISTS attachments_out JSONB"))
+            db.execute(text("ALTER TABLE fuel_card_assignments ADD COLUMN IF NOT EXISTS attachments_in JSONB"))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"[startup] fuel_cards column migrate (non-critical): {e}")
+
+
+@migration("0052_offboarding")
+def offboarding(db: Session) -> None:
+    # HR Offboarding
+    rows_ob = db.execute(
+        text(
+            """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_name = 'offboarding_cases'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows_ob:
+        from .models.models import (
+            OffboardingActivityLog,
+            OffboardingAssetLink,
+            OffboardingCase,
+            OffboardingChecklistItem,
+        )
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[
+                OffboardingCase.__table__,
+                OffboardingAssetLink.__table__,
+                OffboardingChecklistItem.__table__,
+                OffboardingActivityLog.__table__,
+            ],
+        )
+        db.commit()
+        print("[startup] Created offboarding_* tables")
+
+
+@migration("0053_subcontractors")
+def subcontractors(db: Session) -> None:
+    # Subcontractor companies, workers, attendance
+    rows_sc = db.execute(
+        text(
+            """
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = 'subcontractor_companies'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows_sc:
+        from .models.models import (
+            SubcontractorAttendance,
+            SubcontractorCompany,
+            SubcontractorWorker,
+        )
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[
+                SubcontractorCompany.__table__,
+                SubcontractorWorker.__table__,
+                SubcontractorAttendance.__table__,
+            ],
+        )
+        db.commit()
+        print("[startup] Created subcontractor_* tables")
+
+    rows_scc = db.execute(
+        text(
+            """
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = 'subcontractor_company_contacts'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows_scc:
+        from .models.models import SubcontractorCompanyContact
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[SubcontractorCompanyContact.__table__],
+        )
+        db.commit()
+    rows_scf = db.execute(
+        text(
+            """
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = 'subcontractor_company_files'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows_scf:
+        from .models.models import SubcontractorCompanyFile
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[SubcontractorCompanyFile.__table__],
+        )
+        db.commit()
+        print("[startup] Created subcontractor_company_files table")
+
+    rows_swf = db.execute(
+        text(
+            """
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = 'public' AND table_name = 'subcontractor_worker_files'
+            LIMIT 1
+            """
+        )
+    ).fetchall()
+    if not rows_swf:
+        from .models.models import SubcontractorWorkerFile
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[SubcontractorWorkerFile.__table__],
+        )
+        db.commit()
+        print("[startup] Created subcontractor_worker_files table")
+
+    for col, ddl in [
+        ("first_name", "VARCHAR(255)"),
+        ("last_name", "VARCHAR(255)"),
+        ("middle_name", "VARCHAR(255)"),
+        ("preferred_name", "VARCHAR(255)"),
+        ("gender", "VARCHAR(100)"),
+        ("job_title", "VARCHAR(255)"),
+        ("address_line1", "VARCHAR(255)"),
+        ("address_line2", "VARCHAR(255)"),
+        ("city", "VARCHAR(100)"),
+        ("province", "VARCHAR(100)"),
+        ("postal_code", "VARCHAR(20)"),
+        ("country", "VARCHAR(100)"),
+        ("emergency_contact_name", "VARCHAR(255)"),
+        ("emergency_contact_relationship", "VARCHAR(255)"),
+        ("emergency_contact_phone", "VARCHAR(100)"),
+        ("emergency_contact_home_phone", "VARCHAR(50)"),
+        ("emergency_contact_work_phone", "VARCHAR(50)"),
+        ("emergency_contact_email", "VARCHAR(255)"),
+        ("emergency_contact_address", "TEXT"),
+    ]:
+        try:
+            chk = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = 'public' AND table_name = 'subcontractor_workers' AND column_name = :c
+                    LIMIT 1
+                    """
+                ),
+                {"c": col},
+            ).fetchall()
+            if not chk:
+                db.execute(
+                    text(f"ALTER TABLE subcontractor_workers ADD COLUMN {col} {ddl} NULL")
+                )
+                db.commit()
+                print(f"[startup] Added subcontractor_workers.{col}")
+        except Exception as _e:
+            pass
+
+
+@migration("0054_print_shop_columns")
+def print_shop_columns(db: Session) -> None:
+    # Print shop requests
+    try:
+        rows = db.execute(
+            text(
+                """
+                SELECT 1
+                FROM information_schema.tables
+                WHERE table_name = 'print_shop_requests'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not rows:
+            from .models.models import PrintShopRequest, PrintShopRequestFile, PrintShopRequestItem
+
+            Base.metadata.create_all(
+                bind=engine,
+                tables=[
+                    PrintShopRequest.__table__,
+                    PrintShopRequestItem.__table__,
+                    PrintShopRequestFile.__table__,
+                ],
+            )
+            db.commit()
+            print("[startup] Created print_shop_requests table")
+    except Exception as _e:
+        print(f"[startup] print_shop_requests migration (non-critical): {_e}")
+
+    try:
+        rows = db.execute(
+            text(
+                """
+                SELECT 1
+                FROM information_schema.tables
+                WHERE table_name = 'print_shop_request_items'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not rows:
+            from .models.models import PrintShopRequestItem
+
+            Base.metadata.create_all(
+                bind=engine, tables=[PrintShopRequestItem.__table__]
+            )
+            db.commit()
+            print("[startup] Created print_shop_request_items table")
+    except Exception as _e:
+        print(f"[startup] print_shop_request_items migration (non-critical): {_e}")
+
+    try:
+        rows = db.execute(
+            text(
+                """
+                SELECT 1
+                FROM information_schema.tables
+                WHERE table_name = 'print_shop_request_files'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not rows:
+            from .models.models import PrintShopRequestFile
+
+            Base.metadata.create_all(
+                bind=engine, tables=[PrintShopRequestFile.__table__]
+            )
+            db.commit()
+            print("[startup] Created print_shop_request_files table")
+    except Exception as _e:
+        print(f"[startup] print_shop_request_files migration (non-critical): {_e}")
+
+    try:
+        chk = db.execute(
+            text(
+                """
+                SELECT data_type FROM information_schema.columns
+                WHERE table_schema = 'public'
+                  AND table_name = 'print_shop_request_files'
+                  AND column_name = 'item_id'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if not chk:
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE print_shop_request_files
+                    ADD COLUMN item_id UUID NULL
+                    REFERENCES print_shop_request_items(id) ON DELETE CASCADE
+                    """
+                )
+            )
+            db.commit()
+            print("[startup] Added print_shop_request_files.item_id")
+        elif str(chk[0][0]).lower() != "uuid":
+            db.execute(
+                text(
+                    """
+                    ALTER TABLE print_shop_request_files
+                    ALTER COLUMN item_id TYPE UUID
+                    USING NULLIF(TRIM(item_id::text), '')::uuid
+                    """
+                )
+            )
+            db.commit()
+            print("[startup] Fixed print_shop_request_files.item_id type to UUID")
+    except Exception as _e:
+        print(f"[startup] print_shop_request_files.item_id migration (non-critical): {_e}")
+
+    for col, ddl in (
+        ("estimated_delivery_date", "DATE"),
+        ("estimate_message", "TEXT"),
+        ("pickup_location", "TEXT"),
+        ("received_emailed_at", "TIMESTAMP WITH TIME ZONE"),
+        ("estimate_emailed_at", "TIMESTAMP WITH TIME ZONE"),
+    ):
+        try:
+            chk = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = 'public'
+                      AND table_name = 'print_shop_requests'
+                      AND column_name = :c
+                    LIMIT 1
+                    """
+                ),
+                {"c": col},
+            ).fetchall()
+            if not chk:
+                db.execute(
+                    text(
+                        f"ALTER TABLE print_shop_requests ADD COLUMN {col} {ddl} NULL"
+                    )
+                )
+                db.commit()
+                print(f"[startup] Added print_shop_requests.{col}")
+        except Exception as _e:
+            print(f"[startup] print_shop_requests.{col} migration (non-critical): {_e}")
+
+    try:
+        null_chk = db.execute(
+            text(
+                """
+                SELECT is_nullable
+                FROM information_schema.columns
+                WHERE table_schema = 'public'
+                  AND table_name = 'print_shop_requests'
+                  AND column_name = 'artwork_file_id'
+                LIMIT 1
+                """
+            )
+        ).fetchall()
+        if null_chk and str(null_chk[0][0]).upper() == "NO":
+            db.execute(
+                text(
+                    "ALTER TABLE print_shop_requests ALTER COLUMN artwork_file_id DROP NOT NULL"
+                )
+            )
+            db.commit()
+            print("[startup] Made print_shop_requests.artwork_file_id nullable")
+    except Exception as _e:
+        print(f"[startup] print_shop_requests.artwork_file_id nullable (non-critical): {_e}")
+
+    try:
+        from .models.models import (
+            PrintShopSupplyOrder,
+            PrintShopSupplyOrderFile,
+            PrintShopSupplyOrderItem,
+            PrintShopSupplyProduct,
+        )
+
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[
+                PrintShopSupplyProduct.__table__,
+                PrintShopSupplyOrder.__table__,
+                PrintShopSupplyOrderItem.__table__,
+                PrintShopSupplyOrderFile.__table__,
+            ],
+        )
+        print("[startup] Ensured print shop supply tables")
+    except Exception as _e:
+        print(f"[startup] print shop supply tables (non-critical): {_e}")
+
+    for col, ddl in (
+        ("manufacturer", "VARCHAR(255)"),
+        ("supplier_id", "UUID NULL REFERENCES suppliers(id) ON DELETE SET NULL"),
+    ):
+        try:
+            chk = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_schema = 'public'
+                      AND table_name = 'print_shop_supply_products'
+                      AND column_name = :c
+                    LIMIT 1
+                    """
+                ),
+                {"c": col},
+            ).fetchall()
+            if not chk:
+                db.execute(
+                    text(
+                        f"ALTER TABLE print_shop_supply_products ADD COLUMN {col} {ddl}"
+                    )
+                )
+                db.commit()
+                print(f"[startup] Added print_shop_supply_products.{col}")
+        except Exception as _e:
+            print(f"[startup] print_shop_supply_products.{col} (non-critical): {_e}")
+
+
+@migration("0055_project_warranties")
+def project_warranties(db: Session) -> None:
+    # Project warranties tables
+    try:
+        rows = db.execute(
+            text(
+                "SELECT 1 FROM information_schema.tables WHERE table_name = 'project_warranties' LIMIT 1"
+            )
+        ).fetchall()
+        if not rows:
+            from .models.models import (
+                ProjectWarranty,
+                WarrantyMaintenance,
+                WarrantyClaim,
+                WarrantyActivityLog,
+                WarrantyAlertEvent,
+            )
+            Base.metadata.create_all(
+                bind=engine,
+                tables=[
+                    ProjectWarranty.__table__,
+                    WarrantyMaintenance.__table__,
+                    WarrantyClaim.__table__,
+                    WarrantyActivityLog.__table__,
+                    WarrantyAlertEvent.__table__,
+                ],
+            )
+            db.commit()
+            print("[startup] Created project warranty tables")
+    except Exception as _e:
+        print(f"[startup] project warranty tables (non-critical): {_e}")
+
+    try:
+        for col, ddl in [
+            (
+                "related_warranty_id",
+                "UUID REFERENCES project_warranties(id) ON DELETE SET NULL",
+            ),
+            (
+                "related_warranty_claim_id",
+                "UUID REFERENCES warranty_claims(id) ON DELETE SET NULL",
+            ),
+        ]:
+            exists = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'client_files' AND column_name = :c
+                    """
+                ),
+                {"c": col},
+            ).fetchall()
+            if not exists:
+                db.execute(text(f"ALTER TABLE client_files ADD COLUMN {col} {ddl}"))
+                db.commit()
+                print(f"[startup] Added client_files.{col}")
+    except Exception as _e:
+        print(f"[startup] client_files warranty columns (non-critical): {_e}")
+
+
+@migration("0056_invites")
+def invites(db: Session) -> None:
+    try:
+        for col, ddl in [
+            ("onboarding_requirements", "JSON"),
+            ("job_title", "VARCHAR(255)"),
+            ("hire_date", "VARCHAR(50)"),
+        ]:
+            exists = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'invites' AND column_name = :c
+                    """
+                ),
+                {"c": col},
+            ).fetchall()
+            if not exists:
+                db.execute(text(f"ALTER TABLE invites ADD COLUMN {col} {ddl}"))
+                db.commit()
+                print(f"[startup] Added invites.{col}")
+    except Exception as _e:
+        print(f"[startup] invites auto-task columns (non-critical): {_e}")
+
+
+@migration("0057_auto_task_routes")
+def auto_task_routes(db: Session) -> None:
+    try:
+        for col, ddl in [
+            ("task_title", "VARCHAR(255)"),
+            ("task_description", "TEXT"),
+            ("starts_after_key", "VARCHAR(100)"),
+        ]:
+            exists = db.execute(
+                text(
+                    """
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'auto_task_routes' AND column_name = :c
+                    """
+                ),
+                {"c": col},
+            ).fetchall()
+            if not exists:
+                db.execute(text(f"ALTER TABLE auto_task_routes ADD COLUMN {col} {ddl}"))
+                db.commit()
+                print(f"[startup] Added auto_task_routes.{col}")
+    except Exception as _e:
+        print(f"[startup] auto_task_routes copy columns (non-critical): {_e}")
+
+
+@migration("0058_soft_delete_columns")
+def soft_delete_columns(db: Session) -> None:
+    # Soft delete columns (if missing)
+    for table_name, fk_col in [("projects", "deleted_by_id"), ("clients", "deleted_by_id"), ("proposals", "deleted_by_id"), ("quotes", "deleted_by_id")]:
+        try:
+            rows = db.execute(text("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = :t AND column_name = 'deleted_at'
+            """), {"t": table_name}).fetchall()
+            if not rows:
+                db.execute(text(f"ALTER TABLE {table_name} ADD COLUMN deleted_at TIMESTAMP WITH TIME ZONE"))
+                db.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {fk_col} UUID REFERENCES users(id) ON DELETE SET NULL"))
+                db.commit()
+                print(f"[startup] Added soft delete columns to {table_name}")
+        except Exception:
+            pass
+
+
+@migration("0059_seed_permissions", phase="seed", postgres_only=False, sources=("scripts/seed_permissions.py",))
+def seed_base_permissions(db: Session) -> None:
+    from .models.models import PermissionCategory
+
+    existing_count = db.query(PermissionCategory).count()
+    print(f"[startup] Found {existing_count} permission categories")
+    if existing_count == 0:
+        _ensure_scripts_importable()
+        from scripts.seed_permissions import seed_permissions
+
+        seed_permissions()
+        print("✅ Permissions seeded successfully on startup")
+
+
+@migration(
+    "0060_seed_company_assets_permissions",
+    phase="seed",
+    postgres_only=False,
+    sources=("scripts/seed_company_assets_permissions.py",),
+)
+def seed_company_assets_permission_definitions(db: Session) -> None:
+    # Keep Company Assets (equipment / corporate / fuel cards) definitions current
+    _ensure_scripts_importable()
+    from scripts.seed_company_assets_permissions import seed_company_assets_permissions
+
+    seed_company_assets_permissions()
+
+
+@migration(
+    "0061_seed_settings_permissions",
+    phase="seed",
+    postgres_only=False,
+    sources=("scripts/seed_settings_permissions.py",),
+)
+def seed_settings_permission_definitions(db: Session) -> None:
+    _ensure_scripts_importable()
+    from scripts.seed_settings_permissions import seed_settings_permissions
+
+    seed_settings_permissions()
+
+
+@migration("0062_attendance_ledger_indexes")
+def attendance_ledger_indexes(db: Session) -> None:
+    # Keyset pages of the attendance ledger + status / worker range filters
+    db.execute(text("CREATE INDEX IF NOT EXISTS idx_attendance_worker_clock_in ON attendance (worker_id, clock_in_time)"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS idx_attendance_status_clock_in ON attendance (status, clock_in_time)"))
+    db.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_attendance_effective_ts ON attendance "
+            "((COALESCE(clock_in_time, clock_out_time, created_at)) DESC, id DESC)"
+        )
+    )
+
+
+@migration("0063_attendance_daily_rollup")
+def attendance_daily_rollup(db: Session) -> None:
+    # Per worker / local day / project attendance totals (services/attendance_rollup)
+    try:
+        from .models.models import AttendanceDailyRollup
+
+        Base.metadata.create_all(bind=engine, tables=[AttendanceDailyRollup.__table__])
+    except Exception as e:
+        print(f"[startup] attendance_daily_rollup (non-critical): {e}")
+
+
+@migration("0064_backfill_attendance_daily_rollup", phase="seed")
+def backfill_attendance_daily_rollup(db: Session) -> None:
+    # One-off fill from history; later changes are kept current by session events
+    from .models.models import AttendanceDailyRollup
+    from .services.attendance_rollup import rebuild_rollup
+
+    if db.query(AttendanceDailyRollup.worker_id).first() is None:
+        rows = rebuild_rollup(db)
+        print(f"[startup] attendance_daily_rollup backfilled ({rows} rows)")
+
+
+@migration("0065_proposal_grand_total")
+def proposal_grand_total(db: Session) -> None:
+    # Persisted proposal value (models._sync_proposal_grand_total) aggregated by customer insights
+    db.execute(text("ALTER TABLE proposals ADD COLUMN IF NOT EXISTS grand_total DOUBLE PRECISION"))
+    db.execute(text("CREATE INDEX IF NOT EXISTS idx_proposals_project_created ON proposals (project_id, created_at)"))
+
+
+@migration("0066_backfill_proposal_grand_total", phase="seed")
+def backfill_proposal_grand_total(db: Session) -> None:
+    # Rows saved before the column existed; later saves keep it current via the mapper event
+    from sqlalchemy import bindparam, update
+
+    from .models.models import Proposal
+    from .utils.proposal_totals import proposal_value
+
+    table = Proposal.__table__
+    stmt = update(table).where(table.c.id == bindparam("pid")).values(grand_total=bindparam("total"))
+    filled = 0
+    while True:
+        rows = db.execute(select(table.c.id, table.c.data).where(table.c.grand_total.is_(None)).limit(500)).all()
+        if not rows:
+            break
+        db.execute(stmt, [{"pid": r.id, "total": proposal_value(r.data)} for r in rows])
+        db.commit()
+        filled += len(rows)
+    if filled:
+        print(f"[startup] proposals.grand_total backfilled ({filled} rows)")
+
+
+@migration("0067_projects_geohash_partial_index")
+def projects_geohash_partial_index(db: Session) -> None:
+    # Databases built by create_all while the model still declared index=True got a plain
+    # ix_projects_geohash, so 0026's partial prefix index was skipped; replace it.
+    plain = db.execute(
+        text(
+            "SELECT 1 FROM pg_indexes WHERE tablename = 'projects' AND indexname = 'ix_projects_geohash' "
+            "AND indexdef NOT LIKE '%text_pattern_ops%'"
+        )
+    ).first()
+    if plain is None:
+        return
+    db.execute(text("DROP INDEX IF EXISTS ix_projects_geohash"))
+    db.execute(
+        text(
+            """
+            CREATE INDEX IF NOT EXISTS ix_projects_geohash
+            ON projects (geohash text_pattern_ops)
+            WHERE geohash IS NOT NULL AND deleted_at IS NULL
+            """
+        )
+    )
+
+
+@migration("0068_attendance_rollup_default_break_entries")
+def attendance_rollup_default_break_entries(db: Session) -> None:
+    # Default timesheet break moves to read time (attendance_rollup.rollup_rows)
+    db.execute(
+        text(
+            "ALTER TABLE attendance_daily_rollup "
+            "ADD COLUMN IF NOT EXISTS default_break_entries INTEGER NOT NULL DEFAULT 0"
+        )
+    )
+
+
+@migration("0069_rebuild_attendance_rollup_raw_breaks", phase="seed")
+def rebuild_attendance_rollup_raw_breaks(db: Session) -> None:
+    # Rows written before 0068 have the default break folded into break_minutes / minutes
+    from .services.attendance_rollup import rebuild_rollup
+
+    rows = rebuild_rollup(db)
+    if rows:
+        print(f"[startup] attendance_daily_rollup rebuilt with raw breaks ({rows} rows)")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Apply or inspect the schema migration ledger.")
+    mode = ap.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--migrate", action="store_true", help="Apply pending and changed steps")
+    mode.add_argument("--status", action="store_true", help="List every step and its ledger state")
+    ap.add_argument("--step", action="append", help="Limit --migrate to this step id (repeatable)")
+    ap.add_argument("--force", action="store_true", help="Re-run selected steps even if current")
+    ap.add_argument("--strict", action="store_true", help="Exit non-zero if any step failed")
+    args = ap.parse_args(argv)
+
+    if args.status:
+        for step, state in migration_status():
+            print(f"{state:<8} {step.id}")
+        return 0
+
+    t0 = time.perf_counter()
+    results = run_migrations(only=args.step, force=args.force)
+    print(f"[migrate] {' | '.join(summarize_results(results, time.perf_counter() - t0))}")
+    return 1 if args.strict and any(r.status == "failed" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
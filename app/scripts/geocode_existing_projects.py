@@ -3,13 +3,12 @@ from __future__ import annotations
 
 import argparse
 import logging
-import time
 
 from app.db import SessionLocal
 from app.models.models import Project
+from app.services.geocoding_queue import GeocodingQueue
 from app.services.project_geocoding_service import (
     GEOCODING_STATUS_MANUAL,
-    geocode_project_sync,
     is_valid_coordinate,
     normalize_project_address,
 )
@@ -23,11 +22,18 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Geocode existing projects")
     parser.add_argument("--limit", type=int, default=100, help="Max projects to process")
     parser.add_argument("--batch-size", type=int, default=25, help="Batch size for logging")
-    parser.add_argument("--delay-ms", type=int, default=150, help="Delay between geocode requests")
+    parser.add_argument("--delay-ms", type=int, default=150, help="Minimum delay between geocoder API calls")
+    parser.add_argument("--workers", type=int, default=3, help="Concurrent geocoding workers")
     args = parser.parse_args()
 
     db = SessionLocal()
-    success = failed = skipped = 0
+    skipped = 0
+    geocoding_queue = GeocodingQueue(
+        SessionLocal,
+        workers=args.workers,
+        max_size=max(args.limit, 1),
+        rate_per_second=1000.0 / args.delay_ms if args.delay_ms > 0 else 0,
+    )
 
     try:
         candidates = (
@@ -36,6 +42,8 @@ def main() -> None:
             .order_by(Project.created_at.desc())
             .all()
         )
+        site_ids = {p.site_id for p in candidates if p.site_id}
+        sites = {s.id: s for s in db.query(ClientSite).filter(ClientSite.id.in_(site_ids)).all()} if site_ids else {}
 
         processed = 0
         for project in candidates:
@@ -54,35 +62,22 @@ def main() -> None:
                 skipped += 1
                 continue
 
-            site = None
-            if getattr(project, "site_id", None):
-                site = db.query(ClientSite).filter(ClientSite.id == project.site_id).first()
-            address = normalize_project_address(project, site)
+            address = normalize_project_address(project, sites.get(project.site_id))
             if not address:
                 skipped += 1
                 continue
 
-            ok = geocode_project_sync(db, str(project.id))
-            if ok:
-                success += 1
-            else:
-                failed += 1
+            # Projects sharing an address are geocoded once and updated together.
+            geocoding_queue.submit(str(project.id), address)
             processed += 1
 
             if processed % args.batch_size == 0:
-                logger.info("Progress: processed=%s success=%s failed=%s skipped=%s", processed, success, failed, skipped)
+                logger.info("Queued: processed=%s skipped=%s %s", processed, skipped, geocoding_queue.stats())
 
-            if args.delay_ms > 0:
-                time.sleep(args.delay_ms / 1000.0)
-
-        logger.info(
-            "Done. processed=%s success=%s failed=%s skipped=%s",
-            processed,
-            success,
-            failed,
-            skipped,
-        )
+        geocoding_queue.wait_idle()
+        logger.info("Done. processed=%s skipped=%s %s", processed, skipped, geocoding_queue.stats())
     finally:
+        geocoding_queue.stop()
         db.close()
 
 
@@ -0,0 +1,216 @@
+"""Attendance ledger: internal attendance pages ordered by (effective timestamp, id).
+
+The effective timestamp is clock-in, else clock-out, else created_at, newest first. Pages are
+addressed by a keyset cursor ("<timestamp>|<id>" of the last row) rather than an offset, so
+page N costs the same as page 1 and HR can walk back past the most recent punches;
+idx_attendance_effective_ts matches the order. Worker, shift and project come from one
+outer-joined select per page instead of per-page batch lookups.
+"""
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Query, Session
+
+from ..models.models import Attendance, AuditLog, EmployeeProfile, Project, Shift, User
+
+EFFECTIVE_TS = func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time, Attendance.created_at)
+LEDGER_PAGE_DEFAULT = 100
+LEDGER_PAGE_MAX = 1000
+
+
+@dataclass
+class LedgerFilters:
+    worker_id: Optional[uuid.UUID] = None
+    # Visibility restriction from the route (callers without HR access see only themselves).
+    only_worker_id: Optional[uuid.UUID] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    status: Optional[str] = None
+    type_filter: Optional[str] = None  # "in" | "out"
+    project_id: Optional[uuid.UUID] = None
+    job_type: Optional[str] = None  # direct (unscheduled) attendance, project_id="job_<type>"
+
+
+def parse_ledger_filters(
+    *,
+    worker_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status: Optional[str] = None,
+    type_filter: Optional[str] = None,
+    project_id: Optional[str] = None,
+    strict: bool = True,
+) -> LedgerFilters:
+    """Parse query-string filters; strict=False ignores malformed values (legacy /attendance/list)."""
+    f = LedgerFilters(status=status or None, type_filter=type_filter if type_filter in ("in", "out") else None)
+    try:
+        if worker_id:
+            f.worker_id = uuid.UUID(worker_id)
+    except ValueError:
+        if strict:
+            raise HTTPException(status_code=400, detail="Invalid worker_id")
+    for attr, raw in (("start_date", start_date), ("end_date", end_date)):
+        if not raw:
+            continue
+        try:
+            setattr(f, attr, datetime.fromisoformat(raw).date())
+        except ValueError:
+            if strict:
+                raise HTTPException(status_code=400, detail=f"Invalid {attr}")
+    if project_id:
+        if project_id.startswith("job_"):
+            f.job_type = project_id[len("job_"):]
+        else:
+            try:
+                f.project_id = uuid.UUID(project_id)
+            except ValueError:
+                if strict:
+                    raise HTTPException(status_code=400, detail="Invalid project_id")
+    return f
+
+
+def ledger_export_params(f: LedgerFilters) -> Dict[str, Any]:
+    """JSON-safe params for the attendance_ledger export (see services/exports)."""
+    return {
+        "worker_id": str(f.worker_id) if f.worker_id else None,
+        "only_worker_id": str(f.only_worker_id) if f.only_worker_id else None,
+        "start_date": f.start_date.isoformat() if f.start_date else None,
+        "end_date": f.end_date.isoformat() if f.end_date else None,
+        "status": f.status,
+        "type_filter": f.type_filter,
+        "project_id": str(f.project_id) if f.project_id else (f"job_{f.job_type}" if f.job_type is not None else None),
+    }
+
+
+def filters_from_export_params(params: Dict[str, Any]) -> LedgerFilters:
+    f = parse_ledger_filters(
+        worker_id=params.get("worker_id"),
+        start_date=params.get("start_date"),
+        end_date=params.get("end_date"),
+        status=params.get("status"),
+        type_filter=params.get("type_filter"),
+        project_id=params.get("project_id"),
+    )
+    if params.get("only_worker_id"):
+        f.only_worker_id = uuid.UUID(str(params["only_worker_id"]))
+    return f
+
+
+def _day_start_utc(d: date) -> datetime:
+    return datetime.combine(d, dt_time.min).replace(tzinfo=timezone.utc)
+
+
+def ledger_query(db: Session, f: LedgerFilters) -> Query:
+    """Attendance joined to worker, profile, shift and project; filtered, not yet ordered."""
+    q = (
+        db.query(
+            Attendance,
+            EFFECTIVE_TS.label("effective_ts"),
+            User.username,
+            User.email_personal,
+            EmployeeProfile.preferred_name,
+            EmployeeProfile.first_name,
+            EmployeeProfile.last_name,
+            Shift.id.label("shift_row_id"),
+            Shift.job_name,
+            Shift.project_id.label("shift_project_id"),
+            Shift.status.label("shift_status"),
+            Project.id.label("project_row_id"),
+            Project.name.label("project_name"),
+            Project.address.label("address"),
+            Project.address_city.label("address_city"),
+            Project.address_province.label("address_province"),
+            Project.address_country.label("address_country"),
+        )
+        .outerjoin(User, User.id == Attendance.worker_id)
+        .outerjoin(EmployeeProfile, EmployeeProfile.user_id == Attendance.worker_id)
+        .outerjoin(Shift, Shift.id == Attendance.shift_id)
+        .outerjoin(Project, Project.id == Shift.project_id)
+    )
+    if f.only_worker_id is not None:
+        q = q.filter(Attendance.worker_id == f.only_worker_id)
+    if f.worker_id is not None:
+        q = q.filter(Attendance.worker_id == f.worker_id)
+    if f.status:
+        q = q.filter(Attendance.status == f.status)
+    if f.type_filter == "in":
+        q = q.filter(Attendance.clock_in_time.isnot(None))
+    elif f.type_filter == "out":
+        q = q.filter(Attendance.clock_out_time.isnot(None))
+    if f.start_date:
+        q = q.filter(EFFECTIVE_TS >= _day_start_utc(f.start_date))
+    if f.end_date:
+        q = q.filter(EFFECTIVE_TS < _day_start_utc(f.end_date + timedelta(days=1)))
+    if f.job_type is not None:
+        q = q.filter(Attendance.shift_id.is_(None), Attendance.reason_text.like(f"JOB_TYPE:{f.job_type}%"))
+    elif f.project_id is not None:
+        q = q.filter(Shift.project_id == f.project_id)
+    return q
+
+
+def encode_cursor(effective_ts: Optional[datetime], attendance_id) -> Optional[str]:
+    if effective_ts is None:
+        return None
+    return f"{effective_ts.isoformat()}|{attendance_id}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, uuid.UUID]]:
+    """Parse a cursor; raises ValueError on malformed input."""
+    if not cursor:
+        return None
+    ts_raw, _, id_raw = cursor.partition("|")
+    return datetime.fromisoformat(ts_raw), uuid.UUID(id_raw)
+
+
+def before_cursor_filter(position: Tuple[datetime, uuid.UUID]):
+    ts, attendance_id = position
+    return or_(EFFECTIVE_TS < ts, and_(EFFECTIVE_TS == ts, Attendance.id < attendance_id))
+
+
+def ledger_page(
+    db: Session,
+    f: LedgerFilters,
+    *,
+    limit: int = LEDGER_PAGE_DEFAULT,
+    cursor: Optional[str] = None,
+) -> Tuple[List, Optional[str]]:
+    """One page of joined rows, newest first, and the cursor of the next page (None at the end)."""
+    limit = max(1, min(LEDGER_PAGE_MAX, int(limit)))
+    try:
+        position = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    q = ledger_query(db, f)
+    if position is not None:
+        q = q.filter(before_cursor_filter(position))
+    rows = q.order_by(EFFECTIVE_TS.desc(), Attendance.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.effective_ts, last.Attendance.id)
+
+
+def deleted_shift_info(db: Session, shift_ids: Iterable[uuid.UUID]) -> Dict[str, Tuple[Optional[str], str]]:
+    """{shift_id: (deleted_at iso, deleted_by)} from the latest DELETE audit entry of each shift, in one query."""
+    ids = list(shift_ids)
+    if not ids:
+        return {}
+    logs = (
+        db.query(AuditLog.entity_id, AuditLog.timestamp_utc, AuditLog.actor_id, User.username, User.email_personal)
+        .outerjoin(User, User.id == AuditLog.actor_id)
+        .filter(AuditLog.entity_type == "shift", AuditLog.entity_id.in_(ids), AuditLog.action == "DELETE")
+        .order_by(AuditLog.timestamp_utc.desc())
+        .all()
+    )
+    out: Dict[str, Tuple[Optional[str], str]] = {}
+    for entity_id, ts, actor_id, actor_username, actor_email in logs:
+        if str(entity_id) not in out:
+            out[str(entity_id)] = (ts.isoformat() if ts else None, actor_username or actor_email or str(actor_id))
+    return out
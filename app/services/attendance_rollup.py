@@ -0,0 +1,386 @@
+"""Daily attendance rollup: one attendance_daily_rollup row per (worker, local day, project).
+
+Weekly / monthly summaries and project timesheets used to load every punch of the period (for every
+user when the caller had HR access) and add them up in Python. Rows here hold those totals: net,
+gross and break minutes plus status counts, by the worker's local work date (settings.tz_default)
+and project key (shift project, or job_<type> for direct attendance). They are refreshed inside
+the same transaction as the change that affects them: attendance inserts / edits / approvals /
+deletes re-aggregate the touched worker-days, and moving a shift to another project re-aggregates
+the days of its attendance (session events below).
+
+Break minutes follow the attendance table: the stored value (manual breaks included), else the
+timesheet default for eligible workers on entries of 5h or more (routes/settings.calculate_break_minutes).
+Rows store only the stored breaks and count the closed 5h+ entries without one
+(default_break_entries); rollup_rows() applies the current timesheet break settings when reading,
+so changing them needs no rebuild.
+
+Historical data (or after bulk SQL edits that bypass the ORM):
+    python scripts/rebuild_attendance_rollup.py [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+"""
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import delete, event, func, insert, inspect
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.models import Attendance, AttendanceDailyRollup, SettingItem, SettingList, Shift
+from .attendance_job_labels import parse_job_type_from_reason_text
+from .time_rules import local_to_utc, utc_to_local
+
+WORKER_PAGE_DEFAULT = 100
+WORKER_PAGE_MAX = 500
+REBUILD_WINDOW_DAYS = 31
+BREAK_MIN_ENTRY_MINUTES = 300
+
+_SESSION_KEY = "attendance_rollup_pending"
+_ROLLUP_COLUMNS = tuple(c.key for c in AttendanceDailyRollup.__table__.columns)
+_ROLLUP_ATTRS = ("worker_id", "shift_id", "clock_in_time", "clock_out_time", "status", "break_minutes", "reason_text")
+TOTAL_FIELDS = (
+    "entries",
+    "open_entries",
+    "gross_minutes",
+    "break_minutes",
+    "minutes",
+    "pending_count",
+    "approved_count",
+    "rejected_count",
+)
+
+# (default break minutes, eligible worker ids) from the "timesheet" settings list, or None.
+BreakPolicy = Optional[Tuple[int, Set[str]]]
+
+
+def load_break_policy(db: Session) -> BreakPolicy:
+    """The timesheet break settings in one query (calculate_break_minutes reads them per entry)."""
+    items = dict(
+        db.query(SettingItem.label, SettingItem.value)
+        .join(SettingList, SettingList.id == SettingItem.list_id)
+        .filter(
+            SettingList.name == "timesheet",
+            SettingItem.label.in_(("default_break_minutes", "break_eligible_employees")),
+        )
+        .all()
+    )
+    try:
+        minutes = int(items.get("default_break_minutes") or "")
+        eligible = json.loads(items.get("break_eligible_employees") or "")
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(eligible, list):
+        return None
+    return minutes, {str(e) for e in eligible}
+
+
+def entry_break_minutes(
+    worker_id: Any,
+    clock_in: Optional[datetime],
+    clock_out: Optional[datetime],
+    stored: Optional[int],
+    policy: BreakPolicy,
+) -> int:
+    if stored is not None:
+        return stored
+    if not clock_in or not clock_out or policy is None:
+        return 0
+    if int((clock_out - clock_in).total_seconds() / 60) < BREAK_MIN_ENTRY_MINUTES:
+        return 0
+    minutes, eligible = policy
+    return minutes if str(worker_id) in eligible else 0
+
+
+def work_date(clock_in: Optional[datetime], clock_out: Optional[datetime]) -> Optional[date]:
+    """Local date of an entry (clock-in, else clock-out); None when it has neither."""
+    ts = clock_in or clock_out
+    if ts is None:
+        return None
+    return utc_to_local(ts, settings.tz_default).date()
+
+
+def local_days_utc(start: date, end: date) -> Tuple[datetime, datetime]:
+    """UTC [start, end) covering local days start..end inclusive."""
+    return (
+        local_to_utc(datetime.combine(start, dt_time.min), settings.tz_default),
+        local_to_utc(datetime.combine(end + timedelta(days=1), dt_time.min), settings.tz_default),
+    )
+
+
+def project_key(shift_project_id: Optional[uuid.UUID], shift_id: Optional[uuid.UUID], reason_text: Optional[str]) -> Tuple[str, Optional[uuid.UUID], Optional[str]]:
+    """(project_key, project_id, job_type) as used by the attendance ledger project filter."""
+    if shift_id:
+        return (str(shift_project_id) if shift_project_id else ""), shift_project_id, None
+    job_type = parse_job_type_from_reason_text(reason_text)
+    if job_type:
+        return f"job_{job_type}"[:80], None, job_type[:64]
+    return "", None, None
+
+
+def _entry_query(db: Session):
+    return db.query(
+        Attendance.worker_id,
+        Attendance.shift_id,
+        Attendance.clock_in_time,
+        Attendance.clock_out_time,
+        Attendance.status,
+        Attendance.break_minutes,
+        Attendance.reason_text,
+        Shift.project_id.label("shift_project_id"),
+    ).outerjoin(Shift, Shift.id == Attendance.shift_id)
+
+
+def aggregate(entries: Iterable[Any], only: Optional[Set[Tuple[uuid.UUID, date]]] = None) -> Dict[tuple, Dict[str, Any]]:
+    """Rollup rows keyed by (worker_id, work_date, project_key) from _entry_query rows (stored breaks only)."""
+    out: Dict[tuple, Dict[str, Any]] = {}
+    for e in entries:
+        day = work_date(e.clock_in_time, e.clock_out_time)
+        if day is None or (only is not None and (e.worker_id, day) not in only):
+            continue
+        key, project_id, job_type = project_key(e.shift_project_id, e.shift_id, e.reason_text)
+        row = out.get((e.worker_id, day, key))
+        if row is None:
+            row = out[(e.worker_id, day, key)] = {
+                "worker_id": e.worker_id,
+                "work_date": day,
+                "project_key": key,
+                "project_id": project_id,
+                "job_type": job_type,
+                **{f: 0 for f in TOTAL_FIELDS},
+                "default_break_entries": 0,
+            }
+        row["entries"] += 1
+        status = (e.status or "").lower()
+        if status in ("pending", "approved", "rejected"):
+            row[f"{status}_count"] += 1
+        if e.clock_in_time and e.clock_out_time:
+            gross = int((e.clock_out_time - e.clock_in_time).total_seconds() / 60)
+            brk = e.break_minutes or 0
+            if e.break_minutes is None and gross >= BREAK_MIN_ENTRY_MINUTES:
+                row["default_break_entries"] += 1
+            row["gross_minutes"] += gross
+            row["break_minutes"] += brk
+            row["minutes"] += max(0, gross - brk)
+        elif e.clock_in_time:
+            row["open_entries"] += 1
+    return out
+
+
+def _insert_rows(db: Session, rows: Iterable[Dict[str, Any]]) -> int:
+    now = datetime.now(timezone.utc)
+    values = [{**r, "updated_at": now} for r in rows]
+    if values:
+        db.execute(insert(AttendanceDailyRollup), values)
+    return len(values)
+
+
+def refresh_worker_days(db: Session, keys: Iterable[Tuple[uuid.UUID, date]]) -> int:
+    """Re-aggregate the given (worker_id, local date) pairs; returns rows written."""
+    by_worker: Dict[uuid.UUID, Set[date]] = {}
+    for worker_id, day in keys:
+        if worker_id is not None and day is not None:
+            by_worker.setdefault(worker_id, set()).add(day)
+    if not by_worker:
+        return 0
+    written = 0
+    for worker_id, days in by_worker.items():
+        lo, hi = local_days_utc(min(days), max(days))
+        ts = func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time)
+        entries = _entry_query(db).filter(Attendance.worker_id == worker_id, ts >= lo, ts < hi).all()
+        db.execute(
+            delete(AttendanceDailyRollup).where(
+                AttendanceDailyRollup.worker_id == worker_id,
+                AttendanceDailyRollup.work_date.in_(sorted(days)),
+            )
+        )
+        written += _insert_rows(db, aggregate(entries, {(worker_id, d) for d in days}).values())
+    return written
+
+
+def rebuild_rollup(db: Session, start: Optional[date] = None, end: Optional[date] = None, *, log=print) -> int:
+    """Recompute every row between start and end (default: the whole attendance history), committing per window."""
+    if start is None or end is None:
+        lo, hi = db.query(
+            func.min(func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time)),
+            func.max(func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time)),
+        ).one()
+        if lo is None:
+            return 0
+        start = start or work_date(lo, None) - timedelta(days=1)
+        end = end or work_date(hi, None) + timedelta(days=1)
+    ts = func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time)
+    written = 0
+    window_start = start
+    while window_start <= end:
+        window_end = min(end, window_start + timedelta(days=REBUILD_WINDOW_DAYS - 1))
+        lo, hi = local_days_utc(window_start, window_end)
+        db.execute(
+            delete(AttendanceDailyRollup).where(
+                AttendanceDailyRollup.work_date >= window_start,
+                AttendanceDailyRollup.work_date <= window_end,
+            )
+        )
+        entries = _entry_query(db).filter(ts >= lo, ts < hi).yield_per(2000)
+        n = _insert_rows(db, aggregate(entries).values())
+        db.commit()
+        written += n
+        log(f"[attendance_rollup] {window_start}..{window_end}: {n} rows")
+        window_start = window_end + timedelta(days=1)
+    return written
+
+
+# ---- Reads ----
+
+
+def _in_range(q, start: Optional[date], end: Optional[date], project_id: Optional[uuid.UUID]):
+    if start is not None:
+        q = q.filter(AttendanceDailyRollup.work_date >= start)
+    if end is not None:
+        q = q.filter(AttendanceDailyRollup.work_date <= end)
+    if project_id is not None:
+        q = q.filter(AttendanceDailyRollup.project_id == project_id)
+    return q
+
+
+def worker_page(
+    db: Session,
+    start: Optional[date],
+    end: Optional[date],
+    *,
+    project_id: Optional[uuid.UUID] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[uuid.UUID], Optional[str]]:
+    """Workers with rollup rows in [start, end] ordered by id, after `cursor` (the last id of the previous page)."""
+    q = _in_range(db.query(AttendanceDailyRollup.worker_id), start, end, project_id)
+    if cursor:
+        try:
+            q = q.filter(AttendanceDailyRollup.worker_id > uuid.UUID(cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    q = q.distinct().order_by(AttendanceDailyRollup.worker_id.asc())
+    if limit is None:
+        return [r[0] for r in q.all()], None
+    limit = max(1, min(WORKER_PAGE_MAX, int(limit)))
+    ids = [r[0] for r in q.limit(limit + 1).all()]
+    if len(ids) <= limit:
+        return ids, None
+    ids = ids[:limit]
+    return ids, str(ids[-1])
+
+
+def rollup_rows(
+    db: Session,
+    start: Optional[date],
+    end: Optional[date],
+    worker_ids: Iterable[uuid.UUID],
+    *,
+    project_id: Optional[uuid.UUID] = None,
+) -> List[SimpleNamespace]:
+    """Rollup rows of the given workers with the current timesheet default break applied."""
+    ids = list(worker_ids)
+    if not ids:
+        return []
+    q = _in_range(db.query(AttendanceDailyRollup).filter(AttendanceDailyRollup.worker_id.in_(ids)), start, end, project_id)
+    policy = load_break_policy(db)
+    return [with_break_policy(r, policy) for r in q.order_by(AttendanceDailyRollup.worker_id, AttendanceDailyRollup.work_date)]
+
+
+def with_break_policy(row: AttendanceDailyRollup, policy: BreakPolicy) -> SimpleNamespace:
+    """Detached copy of a rollup row whose break and net minutes include the default break of its
+    default_break_entries (the session's row is left untouched)."""
+    out = SimpleNamespace(**{k: getattr(row, k) for k in _ROLLUP_COLUMNS})
+    if policy is not None and out.default_break_entries and str(out.worker_id) in policy[1]:
+        brk = policy[0] * out.default_break_entries
+        out.break_minutes += brk
+        out.minutes = max(0, out.minutes - brk)
+    return out
+
+
+def sum_totals(rows: Iterable[Any]) -> Dict[str, int]:
+    totals = {f: 0 for f in TOTAL_FIELDS}
+    for r in rows:
+        for f in TOTAL_FIELDS:
+            totals[f] += getattr(r, f) or 0
+    return totals
+
+
+def summarize_by_worker(rows: Iterable[AttendanceDailyRollup]) -> Dict[uuid.UUID, Dict[str, Any]]:
+    """{worker_id: {"days": {date: totals}, "totals": totals}} (projects of a day merged)."""
+    grouped: Dict[uuid.UUID, Dict[date, List[AttendanceDailyRollup]]] = {}
+    for r in rows:
+        grouped.setdefault(r.worker_id, {}).setdefault(r.work_date, []).append(r)
+    out = {}
+    for worker_id, days in grouped.items():
+        out[worker_id] = {
+            "days": {d: sum_totals(day_rows) for d, day_rows in sorted(days.items())},
+            "totals": sum_totals(r for day_rows in days.values() for r in day_rows),
+        }
+    return out
+
+
+# ---- Maintenance (session events) ----
+
+
+def _mark(session: Session, worker_ids: Iterable[Any], days: Iterable[Optional[date]]) -> None:
+    pending = session.info.setdefault(_SESSION_KEY, {"days": set(), "shifts": set()})
+    for w in worker_ids:
+        for d in days:
+            if w is not None and d is not None:
+                pending["days"].add((w, d))
+
+
+def _attendance_days(obj: Attendance) -> Tuple[Set[Any], Set[date]]:
+    state = inspect(obj)
+
+    def values(attr):
+        hist = state.attrs[attr].history
+        current = [getattr(obj, attr)]
+        return current + list(hist.deleted or ())
+
+    workers = {w for w in values("worker_id") if w is not None}
+    ins, outs = values("clock_in_time"), values("clock_out_time")
+    days = {work_date(ins[0], outs[0])}
+    days.update(work_date(ci, None) for ci in ins if ci is not None)
+    days.update(work_date(co, None) for co in outs if co is not None)
+    return workers, {d for d in days if d is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _track_attendance_changes(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Attendance):
+            if obj in session.dirty and obj not in session.new and obj not in session.deleted:
+                state = inspect(obj)
+                if not any(state.attrs[a].history.has_changes() for a in _ROLLUP_ATTRS):
+                    continue
+            workers, days = _attendance_days(obj)
+            _mark(session, workers, days)
+        elif isinstance(obj, Shift) and obj in session.dirty and obj not in session.new:
+            if inspect(obj).attrs.project_id.history.has_changes():
+                session.info.setdefault(_SESSION_KEY, {"days": set(), "shifts": set()})["shifts"].add(obj.id)
+
+
+@event.listens_for(Session, "before_commit")
+def _materialize_before_commit(session: Session) -> None:
+    for _ in range(3):
+        session.flush()
+        pending = session.info.pop(_SESSION_KEY, None)
+        if not pending:
+            return
+        keys = set(pending["days"])
+        if pending["shifts"]:
+            for e in session.query(Attendance.worker_id, Attendance.clock_in_time, Attendance.clock_out_time).filter(
+                Attendance.shift_id.in_(list(pending["shifts"]))
+            ):
+                keys.add((e.worker_id, work_date(e.clock_in_time, e.clock_out_time)))
+        refresh_worker_days(session, keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
@@ -1,5 +1,6 @@
 """
-Serialize AuditLog ORM rows with actor names and entity display labels (shared admin + user activity).
+Serialize AuditLog ORM rows with actor names and entity display labels (shared admin + user activity),
+and the user display-name helpers shared with exports and training compliance.
 """
 import uuid
 from typing import Any, Dict, List, Optional
@@ -27,6 +28,22 @@ from ..models.models import (
 )
 
 
+def display_name(
+    preferred_name: Optional[str],
+    first_name: Optional[str],
+    last_name: Optional[str],
+    username: Optional[str],
+    email: Optional[str],
+) -> Optional[str]:
+    """Same precedence as task_service._resolve_user_display, from already-joined columns."""
+    if preferred_name:
+        return preferred_name
+    composed = " ".join(p for p in (first_name or "", last_name or "") if p).strip()
+    if composed:
+        return composed
+    return username or email
+
+
 def user_display_for_audit(u: Optional[User]) -> str:
     if not u:
         return "—"
@@ -4,21 +4,78 @@ Handles authentication and API requests to BambooHR
 """
 import httpx
 import base64
+import threading
+import time
 import xml.etree.ElementTree as ET
-from typing import Optional, Dict, List, Any
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, List, Any, Union
 from ..config import settings
 
+# Statuses BambooHR uses for throttling / temporary unavailability; retried with backoff.
+RETRY_STATUSES = {429, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
 
 class BambooHRClient:
-    """Client for interacting with BambooHR API"""
+    """Client for interacting with BambooHR API.
+
+    One pooled ``httpx.Client`` is shared by every request (and every thread) made
+    through an instance; call ``close()`` or use the client as a context manager.
+    """
     
-    def __init__(self, api_key: Optional[str] = None, company_domain: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        company_domain: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: int = 10,
+        max_retries: int = MAX_RETRIES,
+        timeout: float = 30.0,
+    ):
         self.api_key = api_key or settings.bamboohr_api_key
         self.company_domain = company_domain or settings.bamboohr_subdomain or "mackkirkroofing"
-        self.base_url = f"https://{self.company_domain}.bamboohr.com/api/v1"
+        # base_url override lets tests (or a proxy) point the client at another server
+        self.base_url = (base_url or f"https://{self.company_domain}.bamboohr.com/api/v1").rstrip("/")
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._http: Optional[httpx.Client] = None
+        self._http_lock = threading.Lock()
+        # Shared across threads: once BambooHR throttles one request, every caller waits it out.
+        self._cooldown_until = 0.0
         
         if not self.api_key:
             raise ValueError("BambooHR API key is required")
+
+    def __enter__(self) -> "BambooHRClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the pooled HTTP client (a later request opens a new one)."""
+        with self._http_lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+
+    def _get_http(self) -> httpx.Client:
+        if self._http is None:
+            with self._http_lock:
+                if self._http is None:
+                    self._http = httpx.Client(
+                        timeout=self.timeout,
+                        headers=self._get_auth_header(),
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections,
+                        ),
+                    )
+        return self._http
     
     def _get_auth_header(self) -> Dict[str, str]:
         """Generate HTTP Basic Auth header for BambooHR API"""
@@ -26,42 +83,73 @@ class BambooHRClient:
         credentials = f"{self.api_key}:x"
         encoded = base64.b64encode(credentials.encode()).decode()
         return {"Authorization": f"Basic {encoded}"}
+
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> float:
+        """Seconds to wait before retrying: Retry-After when given, else exponential backoff."""
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), BACKOFF_MAX_SECONDS)
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    return min(max((when - datetime.now(timezone.utc)).total_seconds(), 0.0), BACKOFF_MAX_SECONDS)
+                except (TypeError, ValueError):
+                    pass
+        return min(BACKOFF_BASE_SECONDS * (2 ** attempt), BACKOFF_MAX_SECONDS)
+
+    def _start_cooldown(self, seconds: float) -> None:
+        with self._http_lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+
+    def _wait_for_cooldown(self) -> None:
+        remaining = self._cooldown_until - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
     
     def _request(self, method: str, endpoint: str, **kwargs) -> Any:
-        """Make HTTP request to BambooHR API"""
+        """Make HTTP request to BambooHR API (retries throttled/unavailable responses)"""
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        headers = self._get_auth_header()
-        headers.update(kwargs.pop("headers", {}))
+        headers = kwargs.pop("headers", {})
+        http = self._get_http()
+
+        attempt = 0
+        while True:
+            self._wait_for_cooldown()
+            response = http.request(method, url, headers=headers, **kwargs)
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._start_cooldown(self._retry_delay(response, attempt))
+                attempt += 1
+                continue
+            break
+        response.raise_for_status()
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.request(method, url, headers=headers, **kwargs)
-            response.raise_for_status()
-            
-            # BambooHR returns different content types
-            content_type = response.headers.get("content-type", "")
-            
-            if "application/json" in content_type:
+        # BambooHR returns different content types
+        content_type = response.headers.get("content-type", "")
+        
+        if "application/json" in content_type:
+            return response.json()
+        elif "text/csv" in content_type:
+            return response.text
+        elif "application/xml" in content_type or "text/xml" in content_type:
+            # Parse XML response
+            try:
+                root = ET.fromstring(response.content)
+                return self._xml_to_dict(root)
+            except Exception as e:
+                # If XML parsing fails, return raw content
+                return response.content
+        else:
+            # Try to parse as JSON first, then XML, fallback to bytes
+            try:
                 return response.json()
-            elif "text/csv" in content_type:
-                return response.text
-            elif "application/xml" in content_type or "text/xml" in content_type:
-                # Parse XML response
+            except Exception:
                 try:
                     root = ET.fromstring(response.content)
                     return self._xml_to_dict(root)
-                except Exception as e:
-                    # If XML parsing fails, return raw content
-                    return response.content
-            else:
-                # Try to parse as JSON first, then XML, fallback to bytes
-                try:
-                    return response.json()
                 except Exception:
-                    try:
-                        root = ET.fromstring(response.content)
-                        return self._xml_to_dict(root)
-                    except Exception:
-                        return response.content
+                    return response.content
     
     def _xml_to_dict(self, root: ET.Element) -> Any:
         """Convert XML element to dict/list structure"""
@@ -163,6 +251,32 @@ class BambooHRClient:
                 return emp if isinstance(emp, list) else [emp]
         return []
     
+    def get_changed_employees(self, since: Union[datetime, str], change_type: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Employees changed since a timestamp (BambooHR /employees/changed)
+
+        Args:
+            since: Aware datetime or ISO 8601 string
+            change_type: Optional "inserted", "updated" or "deleted"
+
+        Returns:
+            {employee_id: {"id", "action", "lastChanged"}}
+        """
+        if isinstance(since, datetime):
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            since = since.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        params = {"since": since}
+        if change_type:
+            params["type"] = change_type
+        result = self._request("GET", "/employees/changed", params=params, headers={"Accept": "application/json"})
+        employees = result.get("employees") if isinstance(result, dict) else None
+        if isinstance(employees, dict):
+            return {str(k): v if isinstance(v, dict) else {"id": str(k)} for k, v in employees.items()}
+        if isinstance(employees, list):
+            return {str(e.get("id")): e for e in employees if isinstance(e, dict) and e.get("id") is not None}
+        return {}
+    
     def get_employee(self, employee_id: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Get employee details
@@ -0,0 +1,158 @@
+"""
+BambooHR employee sync engine pieces: incremental watermark, bounded concurrent
+prefetch and photo dedup.
+
+HTTP work for each employee (details, compensation, photo, custom tables) runs on
+a small thread pool against one pooled ``BambooHRClient``; database writes stay on
+the caller's thread and session. The sync code keeps calling the client as before,
+through a ``PrefetchedClient`` that answers from the responses fetched ahead.
+"""
+from __future__ import annotations
+
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple, TypeVar
+
+from sqlalchemy.orm import Session
+
+from ..models.models import EmployeeProfile, FileObject, SettingItem, SettingList
+from .bamboohr_client import BambooHRClient
+
+LIST_NAME = "bamboohr_sync"
+WATERMARK_LABEL = "employees_synced_at"
+DEFAULT_WORKERS = 6
+MAX_WORKERS = 16
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def get_watermark(db: Session) -> Optional[datetime]:
+    """Start time of the last complete employee sync (UTC), or None before the first one."""
+    value = (
+        db.query(SettingItem.value)
+        .join(SettingList, SettingList.id == SettingItem.list_id)
+        .filter(SettingList.name == LIST_NAME, SettingItem.label == WATERMARK_LABEL)
+        .scalar()
+    )
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def set_watermark(db: Session, ts: datetime) -> None:
+    """Record ``ts`` as the next changed-since point (caller commits)."""
+    lst = db.query(SettingList).filter(SettingList.name == LIST_NAME).first()
+    if not lst:
+        lst = SettingList(name=LIST_NAME)
+        db.add(lst)
+        db.flush()
+    item = (
+        db.query(SettingItem)
+        .filter(SettingItem.list_id == lst.id, SettingItem.label == WATERMARK_LABEL)
+        .first()
+    )
+    if not item:
+        item = SettingItem(list_id=lst.id, label=WATERMARK_LABEL)
+        db.add(item)
+    item.value = ts.astimezone(timezone.utc).isoformat()
+
+
+def changed_employee_ids(client: BambooHRClient, since: datetime) -> Tuple[Set[str], Set[str]]:
+    """(inserted or updated ids, deleted ids) from BambooHR's changed-since API."""
+    changed: Set[str] = set()
+    deleted: Set[str] = set()
+    for emp_id, info in client.get_changed_employees(since).items():
+        if str(info.get("action", "")).lower() == "deleted":
+            deleted.add(emp_id)
+        else:
+            changed.add(emp_id)
+    return changed, deleted
+
+
+def map_bounded(fn: Callable[[T], R], items: Iterable[T], workers: int) -> Iterator[Tuple[T, Optional[R], Optional[BaseException]]]:
+    """
+    Yield (item, result, error) in input order while ``fn`` runs on up to ``workers``
+    threads. At most ``2 * workers`` items are in flight, so a slow consumer (the
+    database writes) holds back fetching instead of buffering the whole directory.
+    """
+    workers = max(1, min(int(workers or 1), MAX_WORKERS))
+    it = iter(items)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bamboohr-sync") as pool:
+        pending = deque((item, pool.submit(fn, item)) for item in islice(it, workers * 2))
+        while pending:
+            item, future = pending.popleft()
+            for nxt in islice(it, 1):
+                pending.append((nxt, pool.submit(fn, nxt)))
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
+
+
+class PrefetchedClient:
+    """
+    Client facade answering read calls from responses fetched ahead of time.
+
+    ``fetch`` runs on a worker thread and records the result (or exception) of a
+    call; the sync then makes the same calls on the main thread and gets the
+    recorded answers. Calls that were not prefetched go to the real client.
+    """
+
+    _MEMOIZED = ("get_employee", "get_employee_photo", "get_compensation", "get_table_data", "get_employee_table_by_field_id")
+
+    def __init__(self, client: BambooHRClient):
+        self._client = client
+        self._answers: Dict[Tuple[Any, ...], Tuple[bool, Any]] = {}
+
+    @staticmethod
+    def _key(name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (name, args, tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in kwargs.items())))
+
+    def fetch(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        """Call the real client now and remember the outcome for the same call later."""
+        key = self._key(name, args, kwargs)
+        try:
+            result = getattr(self._client, name)(*args, **kwargs)
+        except Exception as e:
+            self._answers[key] = (False, e)
+            raise
+        self._answers[key] = (True, result)
+        return result
+
+    def _answer(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        recorded = self._answers.get(self._key(name, args, kwargs))
+        if recorded is None:
+            return getattr(self._client, name)(*args, **kwargs)
+        ok, value = recorded
+        if not ok:
+            raise value
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self._MEMOIZED:
+            return lambda *args, **kwargs: self._answer(name, *args, **kwargs)
+        return getattr(self._client, name)
+
+
+def photo_checksum(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def photo_unchanged(db: Session, profile: Optional[EmployeeProfile], data: bytes) -> bool:
+    """True when the profile's current photo has the same content hash as ``data``."""
+    if not profile or not profile.profile_photo_file_id:
+        return False
+    current = (
+        db.query(FileObject.checksum_sha256)
+        .filter(FileObject.id == profile.profile_photo_file_id)
+        .scalar()
+    )
+    return bool(current) and current == photo_checksum(data)
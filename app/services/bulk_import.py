@@ -0,0 +1,326 @@
+"""
+Shared pipeline for spreadsheet imports (scripts/import_*.py).
+
+    read        iter_csv_rows / iter_csv_records / iter_xlsx_rows stream rows (csv module,
+                openpyxl read-only) instead of loading whole workbooks
+    normalize   normalize_columns runs each column's cleaner over the batch, once per
+                distinct raw value
+    plan        prefetch_index loads the natural keys of existing rows in one query; the
+                import records creates / updates / skips on an ImportPlan, which also
+                keeps the field-level diff for --dry-run reports
+    apply       apply_plan writes the plan in batches (INSERT ... ON CONFLICT on
+                PostgreSQL, executemany elsewhere) and commits each batch
+
+Batches are idempotent: a re-run after a failure plans against what was already
+committed, so finished batches come back as "unchanged" and the import resumes where
+it stopped.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.orm import Session
+
+DEFAULT_BATCH_SIZE = 1000
+ENCODINGS = ("utf-8-sig", "utf-8", "cp1252", "latin-1")
+_CHUNK = 1 << 20
+
+
+# --- readers -------------------------------------------------------------------------
+
+
+def detect_encoding(path: str, candidates: Sequence[str] = ENCODINGS) -> str:
+    """First encoding that decodes the whole file, checked in 1 MiB chunks."""
+    last_error: Optional[Exception] = None
+    for encoding in candidates:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(_CHUNK), b""):
+                    decoder.decode(chunk)
+                decoder.decode(b"", final=True)
+            return encoding
+        except UnicodeDecodeError as e:
+            last_error = e
+    raise RuntimeError(f"Could not decode {path} (last error: {last_error})")
+
+
+def normalize_headers(fieldnames: Iterable[Any]) -> List[str]:
+    return [str(name or "").strip().upper() for name in fieldnames]
+
+
+def iter_csv_rows(
+    path: str, *, encoding: Optional[str] = None, delimiter: Optional[str] = None
+) -> Iterator[Tuple[int, List[str]]]:
+    """(record number, cells) for every CSV record; the delimiter is sniffed when not given."""
+    encoding = encoding or detect_encoding(path)
+    with open(path, newline="", encoding=encoding) as fh:
+        if delimiter is None:
+            sample = fh.read(4096)
+            fh.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+            except csv.Error:
+                delimiter = ","
+        for row_num, row in enumerate(csv.reader(fh, delimiter=delimiter), start=1):
+            yield row_num, row
+
+
+def iter_csv_records(
+    path: str, *, encoding: Optional[str] = None, delimiter: Optional[str] = None
+) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """(record number, {HEADER: value}) with headers stripped and upper-cased; record 1 is the header."""
+    rows = iter_csv_rows(path, encoding=encoding, delimiter=delimiter)
+    first = next(rows, None)
+    if first is None:
+        return
+    headers = normalize_headers(first[1])
+    for row_num, row in rows:
+        yield row_num, dict(zip(headers, row))
+
+
+def iter_xlsx_rows(path: str, sheet: Optional[str] = None) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+    """(row number, cell values) from a read-only workbook; ``sheet`` matches ignoring outer spaces."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet is None:
+            ws = wb.active
+        else:
+            name = next((sn for sn in wb.sheetnames if sn.strip() == sheet.strip()), None)
+            if name is None:
+                raise KeyError(f"Sheet {sheet!r} not found. Available: {wb.sheetnames}")
+            ws = wb[name]
+        for row_num, values in enumerate(ws.iter_rows(values_only=True), start=1):
+            yield row_num, values
+    finally:
+        wb.close()
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# --- normalize -----------------------------------------------------------------------
+
+
+def normalize_columns(records: List[Dict[str, Any]], normalizers: Mapping[str, Callable[[Any], Any]]) -> List[Dict[str, Any]]:
+    """
+    Replace each listed column with its normalized value, in place, column by column.
+    Spreadsheets repeat values heavily (units, suppliers, provinces), so each distinct
+    raw value is normalized once per column.
+    """
+    for column, fn in normalizers.items():
+        memo: Dict[Hashable, Any] = {}
+        for record in records:
+            raw = record.get(column)
+            try:
+                record[column] = memo[raw]
+            except KeyError:
+                record[column] = memo[raw] = fn(raw)
+            except TypeError:  # unhashable raw value
+                record[column] = fn(raw)
+    return records
+
+
+# --- plan ----------------------------------------------------------------------------
+
+
+def prefetch_index(
+    db: Session,
+    columns: Sequence[Any],
+    key: Callable[[Any], Any],
+    *filters: Any,
+    keep: str = "first",
+) -> Dict[Any, Any]:
+    """
+    One SELECT of ``columns`` (with optional filters) indexed by ``key(row)``.
+    Rows whose key is None are left out; with ``keep="first"`` the first row per key wins
+    (the old per-row ``.first()`` lookups), with ``keep="all"`` values are lists.
+    """
+    index: Dict[Any, Any] = {}
+    for row in db.execute(select(*columns).where(*filters)):
+        k = key(row)
+        if k is None:
+            continue
+        if keep == "all":
+            index.setdefault(k, []).append(row)
+        elif k not in index:
+            index[k] = row
+    return index
+
+
+@dataclass
+class PlannedRow:
+    row_num: int
+    label: str
+    values: Dict[str, Any]
+    changes: Optional[Dict[str, Tuple[Any, Any]]] = None  # updates only
+    children: List[Tuple[Any, Dict[str, Any]]] = field(default_factory=list)  # (model, values) written with the row
+
+
+@dataclass
+class ImportPlan:
+    """Creates, updates and skips for one target table, in source order."""
+
+    pk: str = "id"
+    creates: List[PlannedRow] = field(default_factory=list)
+    updates: List[PlannedRow] = field(default_factory=list)
+    skipped: List[Tuple[int, str]] = field(default_factory=list)
+    unchanged: int = 0
+
+    def create(self, row_num: int, label: str, values: Dict[str, Any], children: Sequence[Tuple[Any, Dict[str, Any]]] = ()) -> None:
+        self.creates.append(PlannedRow(row_num, label, values, children=list(children)))
+
+    def update(
+        self,
+        row_num: int,
+        label: str,
+        pk: Any,
+        values: Dict[str, Any],
+        current: Mapping[str, Any],
+        ignore: Sequence[str] = (),
+    ) -> bool:
+        """Plan an update when ``values`` differ from ``current``; False (counted unchanged) otherwise."""
+        changes = {
+            k: (current.get(k), v)
+            for k, v in values.items()
+            if k not in ignore and k in current and current.get(k) != v
+        }
+        if not changes:
+            self.unchanged += 1
+            return False
+        self.updates.append(PlannedRow(row_num, label, {**values, self.pk: pk}, changes=changes))
+        return True
+
+    def skip(self, row_num: int, reason: str) -> None:
+        self.skipped.append((row_num, reason))
+
+    def summary(self) -> str:
+        return (
+            f"create={len(self.creates)} update={len(self.updates)} "
+            f"unchanged={self.unchanged} skipped={len(self.skipped)}"
+        )
+
+    def report(self, log: Callable[[str], None] = print, limit: Optional[int] = None) -> None:
+        """Diff report: every create, every changed field, every skip (first ``limit`` of each)."""
+        for row in self.creates[:limit]:
+            log(f"Row {row.row_num}: [CREATE] {row.label}")
+        for row in self.updates[:limit]:
+            fields = ", ".join(f"{k}: {old!r} -> {new!r}" for k, (old, new) in row.changes.items())
+            log(f"Row {row.row_num}: [UPDATE] {row.label} | {fields}")
+        for row_num, reason in self.skipped[:limit]:
+            log(f"Row {row_num}: [SKIP] {reason}")
+        log(f"Plan: {self.summary()}")
+
+
+# --- apply ---------------------------------------------------------------------------
+
+
+def _group_by_keys(rows: Sequence[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    """executemany needs the same parameter names in every row of a statement."""
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return iter(groups.values())
+
+
+def bulk_insert(db: Session, table: Any, rows: Sequence[Dict[str, Any]], pk: str = "id") -> None:
+    """executemany INSERT; on PostgreSQL rows that already exist (same pk) are left alone."""
+    is_pg = db.get_bind().dialect.name == "postgresql"
+    for group in _group_by_keys(rows):
+        if is_pg and pk in group[0]:
+            from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+            db.execute(pg_insert(table).on_conflict_do_nothing(index_elements=[pk]), group)
+        else:
+            db.execute(insert(table), group)
+
+
+def bulk_update(db: Session, table: Any, rows: Sequence[Dict[str, Any]], pk: str = "id", upsert: bool = False) -> None:
+    """
+    Update rows by primary key with an executemany UPDATE. With ``upsert`` on PostgreSQL
+    the rows go through ``INSERT ... ON CONFLICT (pk) DO UPDATE`` instead (batched
+    VALUES, far fewer round trips) — only for rows carrying every NOT NULL column.
+    """
+    if upsert and db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        for group in _group_by_keys(rows):
+            stmt = pg_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[pk], set_={c: stmt.excluded[c] for c in group[0] if c != pk}
+            )
+            db.execute(stmt, group)
+        return
+    stmt = table.update().where(table.c[pk] == bindparam("_pk"))
+    for group in _group_by_keys(rows):
+        db.execute(stmt, [{**{k: v for k, v in row.items() if k != pk}, "_pk": row[pk]} for row in group])
+
+
+@dataclass
+class ApplyResult:
+    created: int = 0
+    updated: int = 0
+    batches: int = 0
+    failed_batch: Optional[int] = None
+    error: Optional[str] = None
+
+
+def apply_plan(
+    db: Session,
+    model: Any,
+    plan: ImportPlan,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    upsert: bool = True,
+    log: Callable[[str], None] = print,
+) -> ApplyResult:
+    """
+    Write a plan: creates (with their child rows) then updates, ``batch_size`` rows per
+    transaction. Stops at the first failing batch; committed batches stay, and re-running
+    the import picks up from there.
+
+    Update rows are written as upserts on PostgreSQL (see ``bulk_update``); pass
+    ``upsert=False`` when they leave out NOT NULL columns.
+    """
+    table = model.__table__
+    result = ApplyResult()
+    work = [("create", chunk) for chunk in batched(plan.creates, batch_size)]
+    work += [("update", chunk) for chunk in batched(plan.updates, batch_size)]
+    for number, (kind, chunk) in enumerate(work, start=1):
+        try:
+            if kind == "create":
+                bulk_insert(db, table, [r.values for r in chunk], pk=plan.pk)
+                children: Dict[Any, List[Dict[str, Any]]] = {}
+                for r in chunk:
+                    for child_model, values in r.children:
+                        children.setdefault(child_model, []).append(values)
+                for child_model, rows in children.items():
+                    bulk_insert(db, child_model.__table__, rows)
+            else:
+                bulk_update(db, table, [r.values for r in chunk], pk=plan.pk, upsert=upsert)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            result.failed_batch, result.error = number, str(e)
+            log(f"Batch {number}/{len(work)} ({kind}, rows {chunk[0].row_num}-{chunk[-1].row_num}) failed: {e}")
+            return result
+        if kind == "create":
+            result.created += len(chunk)
+        else:
+            result.updated += len(chunk)
+        result.batches += 1
+        log(f"Batch {number}/{len(work)}: {kind}d {len(chunk)} row(s)")
+    return result
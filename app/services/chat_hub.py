@@ -1,5 +1,5 @@
 import asyncio
-from typing import Dict, Set, Any
+from typing import Any, Dict, Iterable, Set
 
 from fastapi import WebSocket
 
@@ -8,6 +8,8 @@ class ChatHub:
     def __init__(self) -> None:
         # user_id (str) -> set of WebSocket connections
         self._user_connections: Dict[str, Set[WebSocket]] = {}
+        # channel name (e.g. "tasks:user:<id>", "tasks:division:<label>") -> connections
+        self._channel_connections: Dict[str, Set[WebSocket]] = {}
         self._lock = asyncio.Lock()
 
     async def connect(self, user_id: str, ws: WebSocket) -> None:
@@ -23,6 +25,31 @@ class ChatHub:
                 if not conns:
                     self._user_connections.pop(user_id, None)
 
+    async def subscribe(self, ws: WebSocket, channels: Iterable[str]) -> None:
+        async with self._lock:
+            for channel in channels:
+                self._channel_connections.setdefault(channel, set()).add(ws)
+
+    async def unsubscribe(self, ws: WebSocket) -> None:
+        async with self._lock:
+            for channel in list(self._channel_connections):
+                conns = self._channel_connections[channel]
+                conns.discard(ws)
+                if not conns:
+                    self._channel_connections.pop(channel, None)
+
+    async def publish(self, channels: Iterable[str], event: str, payload: Any) -> None:
+        data = {"event": event, "data": payload}
+        async with self._lock:
+            targets: Set[WebSocket] = set()
+            for channel in channels:
+                targets.update(self._channel_connections.get(channel, set()))
+        for ws in targets:
+            try:
+                await ws.send_json(data)
+            except Exception:
+                pass
+
     async def send_to_user(self, user_id: str, event: str, payload: Any) -> None:
         data = {"event": event, "data": payload}
         async with self._lock:
@@ -0,0 +1,284 @@
+"""Per-company folder tree with compiled access rules.
+
+Every folder of a client is loaded with one query and kept per process: children lists,
+ordering, and each folder's access_permissions compiled once into a FolderAcl. The set of
+folders a given user may open is computed once per (user, division) and memoized on the
+tree. The tree of a client is dropped after any commit in this process that touched one of
+its folders (session events below; bulk Query.delete() callers invalidate explicitly) and
+at most FOLDER_TREE_TTL_S later in other workers. Access checks never trust that window:
+listings pass the folder rows they read from the DB to current_folder_tree(), which rebuilds
+the tree when one of them is missing from it or carries different access_permissions
+(a folder created or restricted by another worker).
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models.models import ClientFolder, EmployeeProfile, User
+
+FOLDER_TREE_TTL_S = 60
+# Distinct (user, division) hidden-folder sets memoized per tree.
+VISIBLE_CACHE_MAX = 2000
+
+_SESSION_KEY = "client_folders_changed"
+
+
+@dataclass(frozen=True)
+class FolderAcl:
+    """Compiled access_permissions of a non-public folder."""
+
+    user_ids: FrozenSet[uuid.UUID]
+    divisions: FrozenSet[str]
+
+    def allows(self, user_id: Optional[uuid.UUID], division: Optional[str]) -> bool:
+        if user_id is not None and user_id in self.user_ids:
+            return True
+        return bool(division) and division in self.divisions
+
+
+def compile_folder_acl(perms: Optional[dict]) -> Optional[FolderAcl]:
+    """None means the folder is public (no permissions, or is_public not false)."""
+    if not perms or not isinstance(perms, dict):
+        return None
+    if perms.get("is_public", True):
+        return None
+    user_ids: Set[uuid.UUID] = set()
+    for uid in perms.get("allowed_user_ids") or []:
+        try:
+            user_ids.add(uid if isinstance(uid, uuid.UUID) else uuid.UUID(str(uid)))
+        except Exception:
+            pass
+    divisions = frozenset(d for d in (perms.get("allowed_divisions") or []) if isinstance(d, str))
+    return FolderAcl(frozenset(user_ids), divisions)
+
+
+class FolderViewer:
+    """The parts of a user that folder ACLs look at, resolved once per request."""
+
+    def __init__(self, db: Session, user: User):
+        from .permissions import is_admin
+
+        self._db = db
+        self.user_id: Optional[uuid.UUID] = getattr(user, "id", None)
+        self.is_admin = is_admin(user, db)
+        self._division: Any = None
+        self._division_loaded = False
+
+    @property
+    def division(self) -> Optional[str]:
+        if not self._division_loaded:
+            self._division_loaded = True
+            if self.user_id is not None and not self.is_admin:
+                row = self._db.query(EmployeeProfile.division).filter(EmployeeProfile.user_id == self.user_id).first()
+                self._division = row[0] if row and row[0] else None
+        return self._division
+
+    def can_open(self, acl: Optional[FolderAcl]) -> bool:
+        if self.is_admin or acl is None:
+            return True
+        return acl.allows(self.user_id, self.division)
+
+
+class FolderTree:
+    def __init__(self, rows: List[Dict[str, Any]]):
+        # Rows arrive ordered by (sort_index, name), the order every listing uses.
+        self.rows = rows
+        self.by_id: Dict[uuid.UUID, Dict[str, Any]] = {r["id"]: r for r in rows}
+        self.children: Dict[Optional[uuid.UUID], List[uuid.UUID]] = {}
+        for r in rows:
+            self.children.setdefault(r["parent_id"], []).append(r["id"])
+        self.acl: Dict[uuid.UUID, Optional[FolderAcl]] = {
+            r["id"]: compile_folder_acl(r["access_permissions"]) for r in rows
+        }
+        self._restricted = [fid for fid, acl in self.acl.items() if acl is not None]
+        self._hidden: Dict[Tuple[Optional[uuid.UUID], Optional[str]], FrozenSet[uuid.UUID]] = {}
+        self._lock = threading.Lock()
+
+    def descendants(self, root_id: uuid.UUID) -> Set[uuid.UUID]:
+        """root_id and every folder below it."""
+        out: Set[uuid.UUID] = {root_id}
+        stack = [root_id]
+        while stack:
+            for child in self.children.get(stack.pop(), []):
+                if child not in out:
+                    out.add(child)
+                    stack.append(child)
+        return out
+
+    def hidden_ids(self, viewer: FolderViewer) -> FrozenSet[uuid.UUID]:
+        """Folders the viewer may not open (usually far fewer than the visible ones)."""
+        if viewer.is_admin or not self._restricted:
+            return frozenset()
+        division = viewer.division
+        key = (viewer.user_id, division)
+        hit = self._hidden.get(key)
+        if hit is not None:
+            return hit
+        hidden = frozenset(fid for fid in self._restricted if not self.acl[fid].allows(viewer.user_id, division))
+        with self._lock:
+            if len(self._hidden) >= VISIBLE_CACHE_MAX:
+                self._hidden.clear()
+            self._hidden[key] = hidden
+        return hidden
+
+    def can_open(self, viewer: FolderViewer, folder_id: Optional[uuid.UUID]) -> bool:
+        return folder_id not in self.hidden_ids(viewer)
+
+    def matches(self, rows: Iterable[Any]) -> bool:
+        """Every (id, access_permissions) row read from the DB is in the tree with the same ACL."""
+        for r in rows:
+            cached = self.by_id.get(r.id)
+            if cached is None or cached["access_permissions"] != r.access_permissions:
+                return False
+        return True
+
+
+_trees: Dict[uuid.UUID, Tuple[FolderTree, float]] = {}
+_lock = threading.Lock()
+
+
+def build_folder_tree(db: Session, client_id: uuid.UUID) -> FolderTree:
+    rows = (
+        db.query(
+            ClientFolder.id,
+            ClientFolder.name,
+            ClientFolder.parent_id,
+            ClientFolder.sort_index,
+            ClientFolder.access_permissions,
+            ClientFolder.created_at,
+        )
+        .filter(ClientFolder.client_id == client_id)
+        .order_by(ClientFolder.sort_index.asc(), ClientFolder.name.asc())
+        .all()
+    )
+    return FolderTree(
+        [
+            {
+                "id": r.id,
+                "name": r.name,
+                "parent_id": r.parent_id,
+                "sort_index": r.sort_index,
+                "access_permissions": r.access_permissions,
+                "created_at": r.created_at,
+            }
+            for r in rows
+        ]
+    )
+
+
+def get_folder_tree(db: Session, client_id: uuid.UUID) -> FolderTree:
+    now = time.monotonic()
+    hit = _trees.get(client_id)
+    if hit is not None and now - hit[1] < FOLDER_TREE_TTL_S:
+        return hit[0]
+    tree = build_folder_tree(db, client_id)
+    with _lock:
+        _trees[client_id] = (tree, now)
+    return tree
+
+
+def current_folder_tree(db: Session, client_id: uuid.UUID, rows: Iterable[Any]) -> FolderTree:
+    """get_folder_tree(), rebuilt when the cached tree disagrees with ``rows`` (folders with
+    id and access_permissions read from the DB in this request)."""
+    rows = list(rows)
+    tree = get_folder_tree(db, client_id)
+    if tree.matches(rows):
+        return tree
+    invalidate_folder_tree(client_id)
+    return get_folder_tree(db, client_id)
+
+
+def folder_acl_rows(db: Session, client_id: uuid.UUID, folder_ids: Iterable[uuid.UUID]) -> List[Any]:
+    """(id, access_permissions) of the given folders, for current_folder_tree()."""
+    ids = list(set(folder_ids))
+    if not ids:
+        return []
+    return (
+        db.query(ClientFolder.id, ClientFolder.access_permissions)
+        .filter(ClientFolder.client_id == client_id, ClientFolder.id.in_(ids))
+        .all()
+    )
+
+
+def subtree_acl_rows(db: Session, client_id: uuid.UUID, root_id: uuid.UUID) -> List[Any]:
+    """(id, access_permissions) of root_id and every folder below it (prefix scan on the path index)."""
+    root_path = db.query(ClientFolder.path).filter(ClientFolder.client_id == client_id, ClientFolder.id == root_id).scalar()
+    if not root_path:
+        # Paths not backfilled yet: fall back to the cached tree's idea of the subtree.
+        return folder_acl_rows(db, client_id, get_folder_tree(db, client_id).descendants(root_id))
+    return (
+        db.query(ClientFolder.id, ClientFolder.access_permissions)
+        .filter(ClientFolder.client_id == client_id, ClientFolder.path.like(f"{root_path}%"))
+        .all()
+    )
+
+
+def invalidate_folder_tree(client_id: Optional[uuid.UUID] = None) -> None:
+    with _lock:
+        if client_id is None:
+            _trees.clear()
+        else:
+            _trees.pop(client_id, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_folder_changes(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, ClientFolder) and obj.client_id is not None:
+            session.info.setdefault(_SESSION_KEY, set()).add(obj.client_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    for client_id in session.info.pop(_SESSION_KEY, ()):
+        invalidate_folder_tree(client_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+def backfill_client_folder_paths(db: Session) -> int:
+    """Fill ClientFolder.path for rows created before the column existed (startup)."""
+    if not db.query(ClientFolder.id).filter(ClientFolder.path.is_(None)).first():
+        return 0
+    rows = db.query(ClientFolder.id, ClientFolder.parent_id, ClientFolder.path).all()
+    parent_of = {r.id: r.parent_id for r in rows}
+    computed: Dict[uuid.UUID, Optional[str]] = {}
+
+    def path_of(fid: uuid.UUID) -> Optional[str]:
+        chain = []
+        seen: Set[uuid.UUID] = set()
+        current: Optional[uuid.UUID] = fid
+        while current is not None and current not in computed:
+            if current not in parent_of:
+                current = None  # dangling parent_id: ON DELETE SET NULL semantics
+                break
+            if current in seen:
+                return None  # parent_id cycle; leave these rows without a path
+            seen.add(current)
+            chain.append(current)
+            current = parent_of[current]
+        prefix = computed[current] if current is not None else "/"
+        for node in reversed(chain):
+            prefix = f"{prefix}{node}/"
+            computed[node] = prefix
+        return computed[fid]
+
+    updates = []
+    for r in rows:
+        path = path_of(r.id)
+        if path and path != r.path:
+            updates.append({"id": r.id, "path": path})
+    if updates:
+        db.bulk_update_mappings(ClientFolder, updates)
+        db.commit()
+    return len(updates)
@@ -1,17 +1,27 @@
 """
 Aggregate customer overview metrics for GET /clients/{id}/insights.
 Mirrors frontend business rules in customer overview components.
+
+Proposal values come from the persisted Proposal.grand_total (aggregated per project in SQL);
+range KPIs for the selected and previous period are one conditional-aggregate query. Payloads
+are cached per (client, user, range, day) and dropped after any commit in this process that
+touched one of the client's projects or proposals (session events below; bulk Query.update /
+delete callers are not seen) and at most INSIGHTS_CACHE_TTL_S later in other workers.
 """
 from __future__ import annotations
 
+import threading
+import time
 import uuid
 from datetime import date, datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple, Union
 
+from sqlalchemy import and_, case, event, func, inspect, select
 from sqlalchemy.orm import Session
 
 from ..models.models import Project, Proposal
-from ..routes.projects import calculate_proposal_grand_total, _business_line_filter_for_user
+from ..routes.projects import _business_line_filter_for_user
+from ..utils.proposal_totals import proposal_value
 from ..services.project_customer_participation import build_participation_payload
 from ..services.project_visibility import project_visibility_clause_for_user
 
@@ -68,18 +78,6 @@ def _in_range(date_str: Optional[str], d_from: Optional[str], d_to: Optional[str
     return True
 
 
-def _proposal_row_total(pr: Proposal) -> float:
-    data = pr.data or {}
-    if isinstance(data, dict):
-        stored = data.get("total")
-        if isinstance(stored, (int, float)) and stored > 0:
-            return float(stored)
-        computed = calculate_proposal_grand_total(data)
-        if computed > 0:
-            return computed
-    return 0.0
-
-
 def _project_fallback_value(p: Dict[str, Any]) -> float:
     for key in ("cost_estimated", "service_value", "cost_actual"):
         v = p.get(key)
@@ -88,55 +86,96 @@ def _project_fallback_value(p: Dict[str, Any]) -> float:
     return 0.0
 
 
+def _proposal_totals_query(ids: List[uuid.UUID]):
+    """
+    One row per project: sum of its proposals' grand_total, the grand_total of the proposal a
+    bidding project is valued by (newest original, else newest change order) and how many
+    proposals still lack a persisted total.
+    """
+    part = Proposal.project_id
+    ranked = (
+        select(
+            Proposal.project_id.label("project_id"),
+            Proposal.grand_total.label("picked_total"),
+            func.sum(func.coalesce(Proposal.grand_total, 0.0)).over(partition_by=part).label("sum_total"),
+            (func.count().over(partition_by=part) - func.count(Proposal.grand_total).over(partition_by=part)).label(
+                "missing"
+            ),
+            func.row_number()
+            .over(
+                partition_by=part,
+                order_by=(
+                    case((Proposal.is_change_order.is_(True), 1), else_=0),
+                    Proposal.created_at.desc().nulls_last(),
+                ),
+            )
+            .label("rn"),
+        )
+        .where(Proposal.project_id.in_(ids), Proposal.deleted_at.is_(None))
+        .subquery()
+    )
+    return (
+        select(ranked.c.project_id, ranked.c.sum_total, ranked.c.picked_total, ranked.c.missing)
+        .where(ranked.c.rn == 1)
+        .subquery()
+    )
+
+
+def _legacy_proposal_total(proposals: List[Proposal], is_bidding: bool) -> float:
+    """Value from the proposal JSON, for projects whose proposals predate Proposal.grand_total."""
+    if is_bidding:
+        originals = [p for p in proposals if not p.is_change_order]
+        candidates = originals if originals else proposals
+        picked = max(candidates, key=lambda p: p.created_at or datetime.min.replace(tzinfo=timezone.utc))
+        return proposal_value(picked.data)
+    return sum(proposal_value(p.data) for p in proposals)
+
+
 def build_proposal_value_maps(
     db: Session, rollup: List[Dict[str, Any]]
-) -> Tuple[Dict[str, float], int]:
-    """Returns (project_id -> value, count without proposal total)."""
+) -> Tuple[Dict[str, float], int, bool]:
+    """Returns (project_id -> value, count without proposal total, all proposal totals persisted)."""
     ids = [uuid.UUID(str(r["id"])) for r in rollup]
     if not ids:
-        return {}, 0
+        return {}, 0, True
 
-    rows = (
-        db.query(Proposal)
-        .filter(Proposal.project_id.in_(ids), Proposal.deleted_at.is_(None))
-        .all()
-    )
-    by_project: Dict[uuid.UUID, List[Proposal]] = {}
-    for pr in rows:
-        if pr.project_id:
+    totals = _proposal_totals_query(ids)
+    proposal_totals: Dict[str, float] = {}
+    unpersisted: List[uuid.UUID] = []
+    rollup_by_id = {str(r["id"]): r for r in rollup}
+    for row in db.execute(select(totals)).all():
+        pid_str = str(row.project_id)
+        if row.missing:
+            unpersisted.append(row.project_id)
+            continue
+        is_bidding = rollup_by_id.get(pid_str, {}).get("is_bidding") is True
+        proposal_totals[pid_str] = float((row.picked_total if is_bidding else row.sum_total) or 0.0)
+
+    if unpersisted:
+        by_project: Dict[uuid.UUID, List[Proposal]] = {}
+        legacy = (
+            db.query(Proposal)
+            .filter(Proposal.project_id.in_(unpersisted), Proposal.deleted_at.is_(None))
+            .all()
+        )
+        for pr in legacy:
             by_project.setdefault(pr.project_id, []).append(pr)
+        for pid, proposals in by_project.items():
+            is_bidding = rollup_by_id.get(str(pid), {}).get("is_bidding") is True
+            proposal_totals[str(pid)] = _legacy_proposal_total(proposals, is_bidding)
 
     values: Dict[str, float] = {}
     missing = 0
-    rollup_by_id = {str(r["id"]): r for r in rollup}
-
-    for pid, proposals in by_project.items():
-        pid_str = str(pid)
-        row = rollup_by_id.get(pid_str, {})
-        is_bidding = row.get("is_bidding") is True
-        total = 0.0
-        if is_bidding:
-            originals = [p for p in proposals if not p.is_change_order]
-            candidates = originals if originals else proposals
-            picked = max(candidates, key=lambda p: p.created_at or datetime.min.replace(tzinfo=timezone.utc))
-            total = _proposal_row_total(picked)
-        else:
-            total = sum(_proposal_row_total(p) for p in proposals)
-        if total <= 0:
-            total = _project_fallback_value(row)
-            if total <= 0:
-                missing += 1
-        values[pid_str] = total
-
     for r in rollup:
         pid_str = str(r["id"])
-        if pid_str not in values:
+        total = proposal_totals.get(pid_str, 0.0)
+        if total <= 0:
             total = _project_fallback_value(r)
-            values[pid_str] = total
             if total <= 0:
                 missing += 1
+        values[pid_str] = total
 
-    return values, missing
+    return values, missing, not unpersisted
 
 
 def _finished_date(p: Dict[str, Any]) -> Optional[str]:
@@ -154,25 +193,13 @@ def _open_opportunities(rollup: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return out
 
 
-def _compute_kpis(
-    rollup: List[Dict[str, Any]],
-    values: Dict[str, float],
-    d_from: str,
-    d_to: str,
-) -> Dict[str, Any]:
+def _range_totals(rollup: List[Dict[str, Any]], values: Dict[str, float], d_from: str, d_to: str) -> Dict[str, Any]:
+    """Range-dependent KPI inputs computed from the rollup (see _range_totals_sql)."""
     projects = [r for r in rollup if r.get("is_bidding") is not True]
     opps = [r for r in rollup if r.get("is_bidding") is True]
-
     finished_in_period = [
         p for p in projects if _status_norm(p.get("status_label")) == "finished" and _in_range(_finished_date(p), d_from, d_to)
     ]
-    open_opps = _open_opportunities(rollup)
-    wip = [p for p in projects if _status_norm(p.get("status_label")) == "in progress"]
-    on_hold = [p for p in projects if _status_norm(p.get("status_label")) == "on hold"]
-
-    def _sum(ids: List[Dict[str, Any]]) -> float:
-        return sum(values.get(str(x["id"]), 0) for x in ids)
-
     refused = [
         o
         for o in opps
@@ -185,8 +212,84 @@ def _compute_kpis(
         if _status_norm(p.get("status_label")) in ("in progress", "on hold", "finished")
         and _in_range(_iso_date(p.get("date_awarded")) or _iso_date(p.get("created_at")), d_from, d_to)
     ]
-    win_denom = len(converted_in_period) + len(refused)
-    win_rate = (len(converted_in_period) / win_denom * 100.0) if win_denom > 0 else 0.0
+    return {
+        "delivered_value": float(sum(values.get(str(x["id"]), 0) for x in finished_in_period)),
+        "delivered_count": len(finished_in_period),
+        "refused_count": len(refused),
+        "converted_count": len(converted_in_period),
+    }
+
+
+def _range_totals_sql(
+    db: Session, rollup: List[Dict[str, Any]], ranges: List[Tuple[str, str]]
+) -> List[Dict[str, Any]]:
+    """
+    Same figures as _range_totals for several (from, to) ranges in one query over the rollup's
+    projects: values use the persisted proposal totals with the cost_estimated / service_value
+    fallback of _project_fallback_value, dates compare as YYYY-MM-DD like _iso_date.
+    """
+    ids = [uuid.UUID(str(r["id"])) for r in rollup]
+    totals = _proposal_totals_query(ids)
+    is_bidding = Project.is_bidding.is_(True)
+    proposal_total = func.coalesce(case((is_bidding, totals.c.picked_total), else_=totals.c.sum_total), 0.0)
+    value = case(
+        (proposal_total > 0, proposal_total),
+        (Project.cost_estimated > 0, Project.cost_estimated),
+        (Project.service_value > 0, Project.service_value),
+        else_=0.0,
+    )
+    status = func.lower(func.trim(Project.status_label))
+    finished_on = func.coalesce(func.date(Project.date_end), func.date(Project.status_changed_at), func.date(Project.created_at))
+    decided_on = func.coalesce(func.date(Project.status_changed_at), func.date(Project.created_at))
+    awarded_on = func.coalesce(func.date(Project.date_awarded), func.date(Project.created_at))
+
+    columns = []
+    for d_from, d_to in ranges:
+        delivered = and_(~is_bidding, status == "finished", finished_on.between(d_from, d_to))
+        refused = and_(is_bidding, status == "refused", decided_on.between(d_from, d_to))
+        converted = and_(~is_bidding, status.in_(("in progress", "on hold", "finished")), awarded_on.between(d_from, d_to))
+        columns += [
+            func.sum(case((delivered, value), else_=0.0)),
+            func.sum(case((delivered, 1), else_=0)),
+            func.sum(case((refused, 1), else_=0)),
+            func.sum(case((converted, 1), else_=0)),
+        ]
+    row = db.execute(
+        select(*columns)
+        .select_from(Project)
+        .outerjoin(totals, totals.c.project_id == Project.id)
+        .where(Project.id.in_(ids))
+    ).one()
+    out = []
+    for i in range(len(ranges)):
+        delivered_value, delivered_count, refused_count, converted_count = row[i * 4 : i * 4 + 4]
+        out.append(
+            {
+                "delivered_value": float(delivered_value or 0),
+                "delivered_count": int(delivered_count or 0),
+                "refused_count": int(refused_count or 0),
+                "converted_count": int(converted_count or 0),
+            }
+        )
+    return out
+
+
+def _compute_kpis(
+    rollup: List[Dict[str, Any]],
+    values: Dict[str, float],
+    totals: Dict[str, Any],
+) -> Dict[str, Any]:
+    projects = [r for r in rollup if r.get("is_bidding") is not True]
+
+    open_opps = _open_opportunities(rollup)
+    wip = [p for p in projects if _status_norm(p.get("status_label")) == "in progress"]
+    on_hold = [p for p in projects if _status_norm(p.get("status_label")) == "on hold"]
+
+    def _sum(ids: List[Dict[str, Any]]) -> float:
+        return sum(values.get(str(x["id"]), 0) for x in ids)
+
+    win_denom = totals["converted_count"] + totals["refused_count"]
+    win_rate = (totals["converted_count"] / win_denom * 100.0) if win_denom > 0 else 0.0
 
     ages = []
     for o in open_opps:
@@ -197,8 +300,8 @@ def _compute_kpis(
     avg_age = round(sum(ages) / len(ages)) if ages else 0
 
     return {
-        "delivered_value": _sum(finished_in_period),
-        "delivered_count": len(finished_in_period),
+        "delivered_value": totals["delivered_value"],
+        "delivered_count": totals["delivered_count"],
         "pipeline_value": _sum(open_opps),
         "pipeline_count": len(open_opps),
         "wip_value": _sum(wip),
@@ -524,8 +627,6 @@ def build_customer_insights_payload(
     prev_from = prev_df.date().isoformat()
     prev_to = prev_dt.date().isoformat()
 
-    from sqlalchemy import and_
-
     bl_filter = _business_line_filter_for_user(user)
     if bl_filter is None:
         return {
@@ -552,11 +653,16 @@ def build_customer_insights_payload(
     bl_filter = and_(bl_filter, project_visibility_clause_for_user(user))
 
     rollup, related = build_participation_payload(db, client_uuid, bl_filter, limit=400)
-    values, missing_count = build_proposal_value_maps(db, rollup)
+    values, missing_count, totals_persisted = build_proposal_value_maps(db, rollup)
 
     use_daily = span_days <= 90
-    kpis = _compute_kpis(rollup, values, d_from, d_to)
-    prev_kpis = _compute_kpis(rollup, values, prev_from, prev_to)
+    if rollup and totals_persisted:
+        current, previous = _range_totals_sql(db, rollup, [(d_from, d_to), (prev_from, prev_to)])
+    else:
+        current = _range_totals(rollup, values, d_from, d_to)
+        previous = _range_totals(rollup, values, prev_from, prev_to)
+    kpis = _compute_kpis(rollup, values, current)
+    prev_kpis = _compute_kpis(rollup, values, previous)
     daily = _daily_series(rollup, values, d_from, d_to, use_daily)
     funnel = _funnel(rollup, values, d_from, d_to)
     by_status, by_division = _portfolio(rollup, values)
@@ -590,3 +696,103 @@ def build_customer_insights_payload(
         "client_since": _client_since(rollup, client_created_at),
         "project_values": values,
     }
+
+
+# ---------------------------------------------------------------------------
+# Per-client payload cache
+# ---------------------------------------------------------------------------
+
+INSIGHTS_CACHE_TTL_S = 60
+INSIGHTS_CACHE_MAX = 500
+
+_SESSION_KEY = "customer_insights_changed"
+# Project columns naming the clients whose insights include the project.
+_CLIENT_ATTRS = ("client_id", "awarded_related_client_id", "related_client_ids", "awarded_related_client_ids")
+
+_lock = threading.Lock()
+# (client_id, user_id, from, to, today) -> (payload, cached_at, project ids in the payload)
+_cache: Dict[Tuple[str, str, str, str, str], Tuple[Dict[str, Any], float, FrozenSet[str]]] = {}
+
+
+def cached_customer_insights_payload(
+    db: Session,
+    client_uuid: uuid.UUID,
+    user: Any,
+    date_from: str,
+    date_to: str,
+    client_created_at: Optional[str] = None,
+) -> Dict[str, Any]:
+    """build_customer_insights_payload, reused until a write touches the client or one of its projects."""
+    df, dt, _ = parse_insights_range(date_from, date_to)
+    today = datetime.now(timezone.utc).date().isoformat()  # ages and "past ETA" move with the day
+    key = (str(client_uuid), str(getattr(user, "id", "")), df.date().isoformat(), dt.date().isoformat(), today)
+    now = time.monotonic()
+    hit = _cache.get(key)
+    if hit is not None and now - hit[1] < INSIGHTS_CACHE_TTL_S:
+        return hit[0]
+    payload = build_customer_insights_payload(db, client_uuid, user, date_from, date_to, client_created_at)
+    project_ids = frozenset(
+        [str(r["id"]) for r in payload.get("rollup") or []] + [str(m["id"]) for m in payload.get("related_memberships") or []]
+    )
+    with _lock:
+        if len(_cache) >= INSIGHTS_CACHE_MAX:
+            for stale in sorted(_cache, key=lambda k: _cache[k][1])[: INSIGHTS_CACHE_MAX // 10 or 1]:
+                _cache.pop(stale, None)
+        _cache[key] = (payload, now, project_ids)
+    return payload
+
+
+def invalidate_customer_insights(
+    client_ids: Optional[Set[str]] = None, project_ids: Optional[Set[str]] = None
+) -> None:
+    """Drop cached payloads for these clients or containing these projects; no arguments drops all."""
+    with _lock:
+        if client_ids is None and project_ids is None:
+            _cache.clear()
+            return
+        client_ids = client_ids or set()
+        project_ids = project_ids or set()
+        for key in [k for k, (_, _, pids) in _cache.items() if k[0] in client_ids or pids & project_ids]:
+            _cache.pop(key, None)
+
+
+def _client_ids_of(obj: Any) -> Set[str]:
+    """Current and pre-change client ids on a Project/Proposal (history survives until after_flush)."""
+    out: Set[str] = set()
+    attrs = inspect(obj).attrs
+    for name in _CLIENT_ATTRS:
+        if name not in attrs.keys():
+            continue
+        hist = attrs[name].history
+        for v in list(hist.added or ()) + list(hist.unchanged or ()) + list(hist.deleted or ()):
+            for cid in v if isinstance(v, list) else [v]:
+                if cid:
+                    out.add(str(cid))
+    return out
+
+
+@event.listens_for(Session, "after_flush")
+def _track_insights_changes(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Project):
+            project_id = obj.id
+        elif isinstance(obj, Proposal):
+            project_id = obj.project_id
+        else:
+            continue
+        changed = session.info.setdefault(_SESSION_KEY, {"clients": set(), "projects": set()})
+        changed["clients"] |= _client_ids_of(obj)
+        if project_id is not None:
+            changed["projects"].add(str(project_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    changed = session.info.pop(_SESSION_KEY, None)
+    if changed and _cache:
+        invalidate_customer_insights(changed["clients"], changed["projects"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
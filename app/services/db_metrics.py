@@ -0,0 +1,329 @@
+"""SQLAlchemy instrumentation: per-request query counts and time, pool saturation, slow queries.
+
+Cursor events on each instrumented engine add to the stats of the request being served (a
+context variable set by DbMetricsMiddleware, which also writes a Server-Timing header) and to
+per-endpoint and per-engine totals kept in-process for /admin/system/db-metrics. Totals are
+mirrored to Prometheus when prometheus_client is installed.
+
+Slow statements are queued to system_logs (category "db") with a sampled EXPLAIN, as are
+requests issuing more than DB_REQUEST_QUERY_WARN queries (usually an N+1 loop).
+"""
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+import structlog
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from ..config import settings
+from .system_log_writer import path_shape
+
+logger = structlog.get_logger()
+
+MAX_ENDPOINTS = 500
+EXPLAIN_MAX_CHARS = 4000
+_READ_STATEMENT_RE = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+try:
+    from prometheus_client import Counter as _PromCounter, Gauge as _PromGauge, Histogram as _PromHistogram
+
+    _query_latency = _PromHistogram("db_query_seconds", "SQL statement latency", ["engine"])
+    _slow_total = _PromCounter("db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS", ["engine"])
+    _request_queries = _PromHistogram(
+        "db_queries_per_request", "SQL statements per HTTP request", buckets=(1, 5, 10, 25, 50, 100, 250, 500)
+    )
+    _pool_saturation = _PromGauge("db_pool_saturation", "Checked-out connections / pool capacity", ["engine"])
+except Exception:  # prometheus_client missing or metrics already registered
+    _query_latency = None
+    _slow_total = None
+    _request_queries = None
+    _pool_saturation = None
+
+
+class RequestDbStats:
+    __slots__ = ("request_id", "method", "path", "queries", "seconds", "slow")
+
+    def __init__(self, request_id: Optional[str] = None, method: Optional[str] = None, path: Optional[str] = None):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.queries = 0
+        self.seconds = 0.0
+        self.slow = 0
+
+
+_current: ContextVar[Optional[RequestDbStats]] = ContextVar("db_request_stats", default=None)
+
+_lock = threading.Lock()
+_engines: Dict[str, Dict[str, Any]] = {}
+_endpoints: Dict[str, Dict[str, float]] = {}
+
+
+def current_request_stats() -> Optional[RequestDbStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_request(
+    request_id: Optional[str] = None, method: Optional[str] = None, path: Optional[str] = None
+) -> Iterator[RequestDbStats]:
+    """Attribute statements run inside the block (including in threadpool endpoints) to one request."""
+    stats = RequestDbStats(request_id, method, path)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# ---------------------------------------------------------------------------
+# Engine and pool hooks
+# ---------------------------------------------------------------------------
+
+
+def _pool_capacity(pool) -> Optional[int]:
+    size = getattr(pool, "size", None)
+    max_overflow = getattr(pool, "_max_overflow", None)
+    if not callable(size) or max_overflow is None:
+        return None
+    if max_overflow < 0:  # unlimited overflow
+        return None
+    return size() + max_overflow
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Attach query and pool hooks to ``engine`` (idempotent)."""
+    with _lock:
+        if name in _engines:
+            return
+        st = _engines[name] = {
+            "queries": 0,
+            "total_s": 0.0,
+            "max_s": 0.0,
+            "slow": 0,
+            "checkouts": 0,
+            "saturated_checkouts": 0,
+            "peak_checked_out": 0,
+        }
+    pool = engine.pool
+    capacity = _pool_capacity(pool)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._db_metrics_t0 = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        t0 = getattr(context, "_db_metrics_t0", None)
+        if t0 is None:
+            return
+        elapsed = time.perf_counter() - t0
+        slow = elapsed * 1000 >= settings.db_slow_query_ms
+        with _lock:
+            st["queries"] += 1
+            st["total_s"] += elapsed
+            if elapsed > st["max_s"]:
+                st["max_s"] = elapsed
+            if slow:
+                st["slow"] += 1
+        req = _current.get()
+        if req is not None:
+            req.queries += 1
+            req.seconds += elapsed
+            if slow:
+                req.slow += 1
+        if _query_latency is not None:
+            _query_latency.labels(name).observe(elapsed)
+        if slow:
+            _log_slow_query(name, conn, statement, parameters, executemany, elapsed, req)
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out = pool.checkedout() if callable(getattr(pool, "checkedout", None)) else 0
+        with _lock:
+            st["checkouts"] += 1
+            if checked_out > st["peak_checked_out"]:
+                st["peak_checked_out"] = checked_out
+            # The pool is full: the next request for a connection waits up to pool_timeout.
+            if capacity and checked_out >= capacity:
+                st["saturated_checkouts"] += 1
+
+    if _pool_saturation is not None and capacity:
+        _pool_saturation.labels(name).set_function(lambda: pool.checkedout() / capacity)
+
+
+def _explain(conn, statement: str, parameters: Any) -> Optional[str]:
+    """Plan for a statement that just ran slow, on the same connection; None when unavailable."""
+    dialect = conn.dialect.name
+    prefix = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}.get(dialect)
+    if prefix is None:
+        return None
+    pg = dialect == "postgresql"
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+    except Exception:
+        return None
+    try:
+        # A failing statement would abort the surrounding Postgres transaction; fence it off.
+        if pg:
+            cursor.execute("SAVEPOINT db_metrics_explain")
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        except Exception:
+            if pg:
+                cursor.execute("ROLLBACK TO SAVEPOINT db_metrics_explain")
+            return None
+        if pg:
+            cursor.execute("RELEASE SAVEPOINT db_metrics_explain")
+        return "\n".join(str(row[-1]) for row in rows)[:EXPLAIN_MAX_CHARS]
+    except Exception:
+        return None
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+
+def _log_slow_query(
+    engine_name: str, conn, statement: str, parameters: Any, executemany: bool, elapsed: float, req: Optional[RequestDbStats]
+) -> None:
+    if _slow_total is not None:
+        _slow_total.labels(engine_name).inc()
+    ms = round(elapsed * 1000, 1)
+    plan = None
+    if (
+        not executemany
+        and _READ_STATEMENT_RE.match(statement)
+        and random.random() < settings.db_slow_query_explain_rate
+    ):
+        plan = _explain(conn, statement, parameters)
+    method = req.method if req else None
+    path = req.path if req else None
+    label = " ".join(p for p in (method, path) if p)
+    logger.warning("db_slow_query", engine=engine_name, ms=ms, path=path, request_id=req.request_id if req else None)
+    try:
+        from .system_log import enqueue_system_log
+
+        enqueue_system_log(
+            "warning",
+            "db",
+            f"Slow query ({ms:.0f} ms)" + (f" · {label}" if label else ""),
+            request_id=req.request_id if req else None,
+            path=path,
+            method=method,
+            detail=statement,
+            extra={k: v for k, v in (("duration_ms", ms), ("engine", engine_name), ("explain", plan)) if v is not None},
+        )
+    except Exception:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Per-request accounting
+# ---------------------------------------------------------------------------
+
+
+def record_request(method: str, endpoint: str, stats: RequestDbStats, total_s: float) -> None:
+    key = f"{method} {endpoint}"
+    with _lock:
+        ep = _endpoints.get(key)
+        if ep is None and len(_endpoints) < MAX_ENDPOINTS:
+            ep = _endpoints[key] = {"requests": 0, "queries": 0, "max_queries": 0, "db_s": 0.0, "total_s": 0.0}
+        if ep is not None:
+            ep["requests"] += 1
+            ep["queries"] += stats.queries
+            ep["db_s"] += stats.seconds
+            ep["total_s"] += total_s
+            if stats.queries > ep["max_queries"]:
+                ep["max_queries"] = stats.queries
+    if _request_queries is not None:
+        _request_queries.observe(stats.queries)
+    if stats.queries > settings.db_request_query_warn:
+        logger.warning("db_request_many_queries", endpoint=key, queries=stats.queries, request_id=stats.request_id)
+        try:
+            from .system_log import enqueue_system_log
+
+            enqueue_system_log(
+                "warning",
+                "db",
+                f"{stats.queries} queries in one request · {key}",
+                request_id=stats.request_id,
+                path=stats.path,
+                method=method,
+                extra={"queries": stats.queries, "db_ms": round(stats.seconds * 1000, 1), "endpoint": endpoint},
+            )
+        except Exception:
+            pass
+
+
+def server_timing(stats: RequestDbStats, total_s: float) -> str:
+    return f'db;dur={stats.seconds * 1000:.1f};desc="{stats.queries} queries", app;dur={total_s * 1000:.1f}'
+
+
+class DbMetricsMiddleware(BaseHTTPMiddleware):
+    """Counts statements per request; add it before RequestIdMiddleware so it runs inside it."""
+
+    async def dispatch(self, request: Request, call_next):
+        t0 = time.perf_counter()
+        path = request.url.path
+        with track_request(getattr(request.state, "request_id", None), request.method, path) as stats:
+            response: Response = await call_next(request)
+        total_s = time.perf_counter() - t0
+        route = request.scope.get("route")
+        record_request(request.method, getattr(route, "path", None) or path_shape(path), stats, total_s)
+        response.headers["Server-Timing"] = server_timing(stats, total_s)
+        return response
+
+
+def db_stats(top: int = 25) -> Dict[str, Any]:
+    """Per-engine totals and the endpoints issuing the most queries per request."""
+    with _lock:
+        engines = {
+            name: {
+                "queries": int(st["queries"]),
+                "avg_ms": round(st["total_s"] * 1000 / st["queries"], 2) if st["queries"] else 0.0,
+                "max_ms": round(st["max_s"] * 1000, 2),
+                "slow": int(st["slow"]),
+                "checkouts": int(st["checkouts"]),
+                "saturated_checkouts": int(st["saturated_checkouts"]),
+                "peak_checked_out": int(st["peak_checked_out"]),
+            }
+            for name, st in _engines.items()
+        }
+        endpoints = [
+            {
+                "endpoint": key,
+                "requests": int(ep["requests"]),
+                "avg_queries": round(ep["queries"] / ep["requests"], 1),
+                "max_queries": int(ep["max_queries"]),
+                "avg_db_ms": round(ep["db_s"] * 1000 / ep["requests"], 2),
+                "avg_total_ms": round(ep["total_s"] * 1000 / ep["requests"], 2),
+            }
+            for key, ep in _endpoints.items()
+            if ep["requests"]
+        ]
+    endpoints.sort(key=lambda e: e["avg_queries"], reverse=True)
+    return {
+        "slow_query_ms": settings.db_slow_query_ms,
+        "engines": engines,
+        "endpoints": endpoints[:top],
+    }
+
+
+def reset_db_stats() -> None:
+    with _lock:
+        _endpoints.clear()
+        for st in _engines.values():
+            st.update(queries=0, total_s=0.0, max_s=0.0, slow=0, checkouts=0, saturated_checkouts=0, peak_checked_out=0)
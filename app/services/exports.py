@@ -0,0 +1,766 @@
+"""Streaming CSV/XLSX exports.
+
+Each export kind registers a header row and a row iterator fed by a server-side cursor
+(``Query.yield_per``), so memory stays flat no matter how many rows are exported:
+
+- ``stream_export`` returns a StreamingResponse. CSV is written in ~64 KB chunks as rows
+  arrive; XLSX uses an openpyxl write-only workbook spooled to a temp file (a zip can only be
+  finalised at the end) and is then streamed out in chunks.
+- ``start_export_job`` is the async mode for large exports: a FileObject placeholder is
+  created right away (status in ``tags["export"]``), a bounded background worker writes the
+  file to storage and marks it ready; clients poll GET /exports/jobs/{id} and download it.
+
+Routes do the access checks and pass already-restricted ``params``; row iterators never
+check permissions themselves.
+"""
+from __future__ import annotations
+
+import csv
+import heapq
+import io
+import json
+import tempfile
+import threading
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from decimal import Decimal
+from itertools import islice
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import structlog
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from ..models.models import (
+    AuditLog,
+    Attendance,
+    AttendanceDailyRollup,
+    EmployeeProfile,
+    FileObject,
+    FleetLog,
+    Project,
+    ProjectTimeEntry,
+    Shift,
+    SystemLog,
+    User,
+)
+from .audit_log_entries import audit_rows_to_entry_dicts, display_name
+from .user_page_views import PAGE_VIEW_CATEGORY
+
+logger = structlog.get_logger()
+
+EXPORT_FORMATS = ("csv", "xlsx")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+YIELD_PER = 1000
+CSV_CHUNK_BYTES = 64 * 1024
+XLSX_SPOOL_BYTES = 8 * 1024 * 1024
+STREAM_READ_BYTES = 256 * 1024
+
+EXPORT_SOURCE_REF = "export"
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_READY = "ready"
+JOB_STATUS_FAILED = "failed"
+MAX_CONCURRENT_JOBS = 2
+
+RowIter = Iterator[List[Any]]
+RowSource = Callable[[Session, Dict[str, Any]], RowIter]
+
+_SOURCES: Dict[str, Tuple[List[str], RowSource]] = {}
+
+
+def register_export(kind: str, headers: List[str]) -> Callable[[RowSource], RowSource]:
+    def deco(fn: RowSource) -> RowSource:
+        _SOURCES[kind] = (list(headers), fn)
+        return fn
+
+    return deco
+
+
+def get_export_source(kind: str) -> Tuple[List[str], RowSource]:
+    try:
+        return _SOURCES[kind]
+    except KeyError:
+        raise ValueError(f"Unknown export kind: {kind}")
+
+
+def normalize_format(fmt: Optional[str]) -> str:
+    f = (fmt or "csv").strip().lower()
+    if f not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return f
+
+
+# -- writers -------------------------------------------------------------------
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def iter_csv_bytes(headers: List[str], rows: Iterable[List[Any]], chunk_bytes: int = CSV_CHUNK_BYTES) -> Iterator[bytes]:
+    """UTF-8 CSV (with BOM so Excel picks the encoding) yielded in ~chunk_bytes pieces."""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    buf.write("\ufeff")
+    w.writerow(headers)
+    for row in rows:
+        w.writerow([_cell(v) for v in row])
+        if buf.tell() >= chunk_bytes:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def write_xlsx(headers: List[str], rows: Iterable[List[Any]], fileobj: IO[bytes], sheet_title: str = "Export") -> int:
+    """Write rows with an openpyxl write-only workbook (constant memory). Returns the row count."""
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title[:31] or "Export")
+    ws.append(headers)
+    count = 0
+    for row in rows:
+        out = []
+        for v in row:
+            c = _cell(v)
+            if isinstance(c, str):
+                c = ILLEGAL_CHARACTERS_RE.sub("", c)
+            out.append(c)
+        ws.append(out)
+        count += 1
+    wb.save(fileobj)
+    return count
+
+
+class _CountingRows:
+    def __init__(self, rows: Iterable[List[Any]]):
+        self._it = iter(rows)
+        self.count = 0
+
+    def __iter__(self):
+        for row in self._it:
+            self.count += 1
+            yield row
+
+
+def write_export(fmt: str, headers: List[str], rows: Iterable[List[Any]], fileobj: IO[bytes], sheet_title: str = "Export") -> int:
+    """Write a whole export to a binary file object. Returns the data row count."""
+    if fmt == "xlsx":
+        return write_xlsx(headers, rows, fileobj, sheet_title)
+    counted = _CountingRows(rows)
+    for chunk in iter_csv_bytes(headers, counted):
+        fileobj.write(chunk)
+    return counted.count
+
+
+def _iter_file(fileobj: IO[bytes]) -> Iterator[bytes]:
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(STREAM_READ_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _session_factory():
+    from ..db import SessionLocal
+
+    return SessionLocal
+
+
+def _read_session_factory():
+    # Streamed downloads only read: replica when healthy (see db.read_session). Jobs write
+    # their FileObject state and keep the primary session above.
+    from ..db import read_session
+
+    return read_session
+
+
+def iter_export_bytes(
+    kind: str,
+    params: Dict[str, Any],
+    fmt: str,
+    *,
+    session_factory: Optional[Callable[[], Session]] = None,
+) -> Iterator[bytes]:
+    """Generator for StreamingResponse; owns its session (the request session is closed
+    before the body finishes streaming)."""
+    headers, source = get_export_source(kind)
+    db = (session_factory or _read_session_factory())()
+    try:
+        rows = source(db, params)
+        if fmt == "xlsx":
+            with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES) as tmp:
+                write_xlsx(headers, rows, tmp, kind)
+                yield from _iter_file(tmp)
+        else:
+            yield from iter_csv_bytes(headers, rows)
+    finally:
+        db.close()
+
+
+def export_filename(base: str, fmt: str) -> str:
+    return f"{base}.{fmt}"
+
+
+def stream_export(kind: str, params: Dict[str, Any], fmt: str, filename_base: str) -> StreamingResponse:
+    get_export_source(kind)
+    return StreamingResponse(
+        iter_export_bytes(kind, params, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(filename_base, fmt)}"'},
+    )
+
+
+# -- async jobs ------------------------------------------------------------------
+
+_job_slots = threading.BoundedSemaphore(MAX_CONCURRENT_JOBS)
+
+
+def _storage_location(storage) -> Tuple[str, str]:
+    from ..config import settings
+    from ..storage.local_provider import LocalStorageProvider
+
+    if isinstance(storage, LocalStorageProvider):
+        return "local", "local"
+    return "blob", settings.azure_blob_container or ""
+
+
+def _set_job_state(fo: FileObject, **changes: Any) -> None:
+    tags = dict(fo.tags or {})
+    tags["export"] = {**(tags.get("export") or {}), **changes}
+    fo.tags = tags
+
+
+def start_export_job(
+    db: Session,
+    kind: str,
+    params: Dict[str, Any],
+    fmt: str,
+    filename_base: str,
+    user_id: uuid.UUID,
+    *,
+    run_in_background: bool = True,
+) -> FileObject:
+    """Create the FileObject placeholder and hand the export to a background worker."""
+    from ..routes.files import get_storage
+
+    get_export_source(kind)
+    provider, container = _storage_location(get_storage())
+    file_id = uuid.uuid4()
+    fo = FileObject(
+        id=file_id,
+        provider=provider,
+        container=container,
+        key=f"exports/{kind}/{file_id}/{export_filename(filename_base, fmt)}",
+        content_type=MEDIA_TYPES[fmt].split(";")[0],
+        source_ref=EXPORT_SOURCE_REF,
+        created_by=user_id,
+        tags={
+            "export": {
+                "kind": kind,
+                "format": fmt,
+                "params": {k: (str(v) if v is not None else None) for k, v in params.items()},
+                "filename": export_filename(filename_base, fmt),
+                "status": JOB_STATUS_PENDING,
+            }
+        },
+    )
+    db.add(fo)
+    db.commit()
+    if run_in_background:
+        threading.Thread(
+            target=run_export_job,
+            args=(file_id, dict(params)),
+            name=f"export-{kind}",
+            daemon=True,
+        ).start()
+    return fo
+
+
+def run_export_job(
+    file_id: uuid.UUID,
+    params: Dict[str, Any],
+    *,
+    session_factory: Optional[Callable[[], Session]] = None,
+    storage=None,
+) -> None:
+    """Write the export for a pending job FileObject to storage (worker thread entry point)."""
+    with _job_slots:
+        db = (session_factory or _session_factory())()
+        try:
+            fo = db.query(FileObject).filter(FileObject.id == file_id).first()
+            if not fo:
+                return
+            state = (fo.tags or {}).get("export") or {}
+            kind, fmt = state.get("kind"), state.get("format") or "csv"
+            _set_job_state(fo, status=JOB_STATUS_RUNNING, started_at=datetime.utcnow().isoformat())
+            db.commit()
+            try:
+                headers, source = get_export_source(kind)
+                if storage is None:
+                    from ..routes.files import get_storage_for_file
+
+                    storage = get_storage_for_file(fo)
+                with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES) as tmp:
+                    rows = write_export(fmt, headers, source(db, params), tmp, kind)
+                    size = tmp.tell()
+                    tmp.seek(0)
+                    storage.copy_in(tmp, fo.key)
+                fo.size_bytes = size
+                _set_job_state(fo, status=JOB_STATUS_READY, rows=rows, finished_at=datetime.utcnow().isoformat())
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                fo = db.query(FileObject).filter(FileObject.id == file_id).first()
+                if fo is not None:
+                    _set_job_state(fo, status=JOB_STATUS_FAILED, error=str(e)[:500], finished_at=datetime.utcnow().isoformat())
+                    db.commit()
+                logger.warning("export_job_failed", file_id=str(file_id), kind=kind, error=str(e))
+        finally:
+            db.close()
+
+
+def export_job_payload(fo: FileObject) -> Dict[str, Any]:
+    state = (fo.tags or {}).get("export") or {}
+    return {
+        "id": str(fo.id),
+        "kind": state.get("kind"),
+        "format": state.get("format"),
+        "status": state.get("status"),
+        "filename": state.get("filename"),
+        "rows": state.get("rows"),
+        "size_bytes": fo.size_bytes,
+        "error": state.get("error"),
+        "created_at": fo.created_at.isoformat() if fo.created_at else None,
+        "finished_at": state.get("finished_at"),
+    }
+
+
+# -- sources ---------------------------------------------------------------------
+
+
+def _iso(value: Optional[datetime]) -> str:
+    return value.isoformat() if value else ""
+
+
+def _name(row) -> str:
+    return display_name(row.preferred_name, row.first_name, row.last_name, row.username, row.email_personal) or ""
+
+
+def _with_user_names(q, user_col):
+    return q.add_columns(
+        User.username,
+        User.email_personal,
+        EmployeeProfile.preferred_name,
+        EmployeeProfile.first_name,
+        EmployeeProfile.last_name,
+    ).outerjoin(User, User.id == user_col).outerjoin(EmployeeProfile, EmployeeProfile.user_id == user_col)
+
+
+USER_ACTIVITY_HEADERS = [
+    "record_type",
+    "timestamp_utc",
+    "summary",
+    "action",
+    "entity_type",
+    "entity_id",
+    "entity_display",
+    "source",
+    "path",
+    "request_id",
+    "changes_json",
+    "context",
+]
+
+
+def json_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    try:
+        return json.dumps(value, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _sign_in_rows(db: Session, uid: uuid.UUID) -> Iterator[Tuple[str, List[Any]]]:
+    q = (
+        db.query(SystemLog.timestamp_utc, SystemLog.path, SystemLog.request_id)
+        .filter(
+            SystemLog.user_id == uid,
+            SystemLog.category == "auth",
+            SystemLog.message == "Login successful",
+        )
+        .order_by(SystemLog.timestamp_utc.desc())
+    )
+    for row in q.yield_per(YIELD_PER):
+        ts = _iso(row.timestamp_utc)
+        yield ts, ["sign_in", ts, "Sign-in", "", "", "", "", "", row.path or "", row.request_id or "", "", ""]
+
+
+def _page_view_rows(db: Session, uid: uuid.UUID) -> Iterator[Tuple[str, List[Any]]]:
+    q = (
+        db.query(SystemLog.timestamp_utc, SystemLog.message, SystemLog.path)
+        .filter(SystemLog.user_id == uid, SystemLog.category == PAGE_VIEW_CATEGORY)
+        .order_by(SystemLog.timestamp_utc.desc())
+    )
+    for row in q.yield_per(YIELD_PER):
+        ts = _iso(row.timestamp_utc)
+        title = row.message or "Page"
+        yield ts, ["page_view", ts, f"Page · {title}", "", "", "", title, "", row.path or "", "", "", ""]
+
+
+def _audit_rows(db: Session, uid: uuid.UUID, batch_size: int = 500) -> Iterator[Tuple[str, List[Any]]]:
+    # Entity display names are resolved per batch, not per row and not for the whole history.
+    q = db.query(AuditLog).filter(AuditLog.actor_id == uid).order_by(AuditLog.timestamp_utc.desc())
+    it = iter(q.yield_per(batch_size))
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        for entry in audit_rows_to_entry_dicts(db, batch):
+            label = entry.get("entity_display") or (entry.get("entity_type") or "").replace("_", " ")
+            ts = entry.get("timestamp_utc") or ""
+            yield ts, [
+                "audit",
+                ts,
+                f"{entry.get('action')} · {label}",
+                entry.get("action") or "",
+                entry.get("entity_type") or "",
+                entry.get("entity_id") or "",
+                entry.get("entity_display") or "",
+                entry.get("source") or "",
+                "",
+                "",
+                json_cell(entry.get("changes_json")),
+                json_cell(entry.get("context")),
+            ]
+
+
+@register_export("user_activity", USER_ACTIVITY_HEADERS)
+def iter_user_activity_rows(db: Session, params: Dict[str, Any]) -> RowIter:
+    """Sign-ins, page views and audit entries merged newest-first from three cursors."""
+    uid = uuid.UUID(str(params["user_id"]))
+    merged = heapq.merge(
+        _sign_in_rows(db, uid),
+        _page_view_rows(db, uid),
+        _audit_rows(db, uid),
+        key=lambda item: item[0],
+        reverse=True,
+    )
+    for _, row in merged:
+        yield row
+
+
+ATTENDANCE_HEADERS = [
+    "worker",
+    "username",
+    "project",
+    "job",
+    "clock_in_utc",
+    "clock_out_utc",
+    "break_minutes",
+    "hours",
+    "status",
+    "source",
+    "reason",
+]
+
+
+def _day_start_utc(value: str, *, next_day: bool = False) -> datetime:
+    d = datetime.fromisoformat(value).date()
+    if next_day:
+        d = d + timedelta(days=1)
+    return datetime.combine(d, dt_time.min).replace(tzinfo=timezone.utc)
+
+
+def _attendance_hours(clock_in: Optional[datetime], clock_out: Optional[datetime], break_minutes: Optional[int]) -> Any:
+    if not clock_in or not clock_out:
+        return ""
+    minutes = (clock_out - clock_in).total_seconds() / 60 - (break_minutes or 0)
+    return round(max(0.0, minutes) / 60, 2)
+
+
+@register_export("attendance", ATTENDANCE_HEADERS)
+def iter_attendance_rows(db: Session, params: Dict[str, Any]) -> RowIter:
+    """params: worker_id, start_date, end_date (YYYY-MM-DD), status, project_id."""
+    q = db.query(
+        Attendance.clock_in_time,
+        Attendance.clock_out_time,
+        Attendance.break_minutes,
+        Attendance.status,
+        Attendance.source,
+        Attendance.reason_text,
+        Shift.job_name,
+        Project.name.label("project_name"),
+    ).outerjoin(Shift, Shift.id == Attendance.shift_id).outerjoin(Project, Project.id == Shift.project_id)
+    q = _with_user_names(q, Attendance.worker_id)
+    if params.get("worker_id"):
+        q = q.filter(Attendance.worker_id == uuid.UUID(str(params["worker_id"])))
+    if params.get("status"):
+        q = q.filter(Attendance.status == params["status"])
+    if params.get("project_id"):
+        q = q.filter(Shift.project_id == uuid.UUID(str(params["project_id"])))
+    if params.get("start_date"):
+        start = _day_start_utc(params["start_date"])
+        q = q.filter(
+            or_(
+                and_(Attendance.clock_in_time.isnot(None), Attendance.clock_in_time >= start),
+                and_(Attendance.clock_in_time.is_(None), Attendance.clock_out_time >= start),
+            )
+        )
+    if params.get("end_date"):
+        end = _day_start_utc(params["end_date"], next_day=True)
+        q = q.filter(
+            or_(
+                and_(Attendance.clock_in_time.isnot(None), Attendance.clock_in_time < end),
+                and_(Attendance.clock_in_time.is_(None), Attendance.clock_out_time < end),
+            )
+        )
+    q = q.order_by(Attendance.clock_in_time.desc(), Attendance.id.desc())
+    for row in q.yield_per(YIELD_PER):
+        yield [
+            _name(row),
+            row.username or "",
+            row.project_name or "",
+            row.job_name or "",
+            _iso(row.clock_in_time),
+            _iso(row.clock_out_time),
+            row.break_minutes if row.break_minutes is not None else "",
+            _attendance_hours(row.clock_in_time, row.clock_out_time, row.break_minutes),
+            row.status or "",
+            row.source or "",
+            row.reason_text or "",
+        ]
+
+
+ATTENDANCE_LEDGER_HEADERS = [
+    "worker",
+    "username",
+    "worker_id",
+    "work_date",
+    "clock_in_utc",
+    "clock_out_utc",
+    "break_minutes",
+    "hours",
+    "status",
+    "source",
+    "job",
+    "project",
+    "project_id",
+    "reason",
+]
+
+
+@register_export("attendance_ledger", ATTENDANCE_LEDGER_HEADERS)
+def iter_attendance_ledger_rows(db: Session, params: Dict[str, Any]) -> RowIter:
+    """Payroll period export of the attendance ledger (params from attendance_ledger.ledger_export_params),
+    grouped by worker in clock order; work_date is the company-local date of the effective timestamp."""
+    from ..config import settings
+    from .attendance_ledger import EFFECTIVE_TS, filters_from_export_params, ledger_query
+    from .time_rules import utc_to_local
+
+    q = ledger_query(db, filters_from_export_params(params))
+    q = q.order_by(Attendance.worker_id, EFFECTIVE_TS, Attendance.id)
+    for row in q.yield_per(YIELD_PER):
+        att = row.Attendance
+        ts = row.effective_ts
+        yield [
+            _name(row),
+            row.username or "",
+            str(att.worker_id),
+            utc_to_local(ts, settings.tz_default).date().isoformat() if ts else "",
+            _iso(att.clock_in_time),
+            _iso(att.clock_out_time),
+            att.break_minutes if att.break_minutes is not None else "",
+            _attendance_hours(att.clock_in_time, att.clock_out_time, att.break_minutes),
+            att.status or "",
+            att.source or "",
+            row.job_name or "",
+            row.project_name or "",
+            str(row.shift_project_id) if row.shift_project_id else "",
+            att.reason_text or "",
+        ]
+
+
+TIMESHEET_HEADERS = [
+    "work_date",
+    "worker",
+    "username",
+    "start",
+    "end",
+    "break_minutes",
+    "hours",
+    "approved",
+    "source",
+    "notes",
+]
+
+
+def _month_bounds(month: Optional[str]) -> Optional[Tuple[date, date]]:
+    if not month:
+        return None
+    y, m = (int(p) for p in str(month).split("-", 1))
+    return date(y, m, 1), date(y + (m // 12), (m % 12) + 1, 1)
+
+
+def _timesheet_attendance_rows(db: Session, pid: uuid.UUID, bounds, user_id) -> Iterator[Tuple[tuple, List[Any]]]:
+    from .attendance_rollup import local_days_utc, work_date as attendance_work_date
+
+    q = db.query(
+        Attendance.clock_in_time,
+        Attendance.clock_out_time,
+        Attendance.break_minutes,
+        Attendance.status,
+        Shift.notes,
+    ).join(Shift, Shift.id == Attendance.shift_id).filter(Shift.project_id == pid)
+    q = _with_user_names(q, Attendance.worker_id)
+    effective_ts = func.coalesce(Attendance.clock_in_time, Attendance.clock_out_time)
+    if bounds:
+        # Local work dates, as in attendance_daily_rollup and GET /projects/{id}/timesheet
+        start, end = local_days_utc(bounds[0], bounds[1] - timedelta(days=1))
+        q = q.filter(effective_ts >= start, effective_ts < end)
+    if user_id:
+        q = q.filter(Attendance.worker_id == user_id)
+    q = q.order_by(effective_ts.asc(), Attendance.id.asc())
+    for row in q.yield_per(YIELD_PER):
+        anchor = row.clock_in_time or row.clock_out_time
+        if anchor is None:
+            continue
+        work_date = attendance_work_date(row.clock_in_time, row.clock_out_time).isoformat()
+        yield (work_date, _iso(anchor)), [
+            work_date,
+            _name(row),
+            row.username or "",
+            _iso(row.clock_in_time),
+            _iso(row.clock_out_time),
+            row.break_minutes or 0,
+            _attendance_hours(row.clock_in_time, row.clock_out_time, row.break_minutes),
+            "yes" if row.status == "approved" else "no",
+            "attendance",
+            row.notes or "",
+        ]
+
+
+def _timesheet_manual_rows(db: Session, pid: uuid.UUID, bounds, user_id) -> Iterator[Tuple[tuple, List[Any]]]:
+    # Manual entries are hidden when the worker already has project attendance that (local) day,
+    # same rule as GET /projects/{id}/timesheet.
+    has_attendance = (
+        db.query(AttendanceDailyRollup.worker_id)
+        .filter(
+            AttendanceDailyRollup.project_id == pid,
+            AttendanceDailyRollup.worker_id == ProjectTimeEntry.user_id,
+            AttendanceDailyRollup.work_date == ProjectTimeEntry.work_date,
+        )
+        .exists()
+    )
+    q = db.query(
+        ProjectTimeEntry.work_date,
+        ProjectTimeEntry.start_time,
+        ProjectTimeEntry.end_time,
+        ProjectTimeEntry.minutes,
+        ProjectTimeEntry.is_approved,
+        ProjectTimeEntry.notes,
+    ).filter(ProjectTimeEntry.project_id == pid, ~has_attendance)
+    q = _with_user_names(q, ProjectTimeEntry.user_id)
+    if bounds:
+        q = q.filter(ProjectTimeEntry.work_date >= bounds[0], ProjectTimeEntry.work_date < bounds[1])
+    if user_id:
+        q = q.filter(ProjectTimeEntry.user_id == user_id)
+    q = q.order_by(ProjectTimeEntry.work_date.asc(), ProjectTimeEntry.start_time.asc(), ProjectTimeEntry.id.asc())
+    for row in q.yield_per(YIELD_PER):
+        minutes = row.minutes or 0
+        work_date = row.work_date.isoformat()
+        start = row.start_time.isoformat() if row.start_time else ""
+        yield (work_date, start), [
+            work_date,
+            _name(row),
+            row.username or "",
+            start,
+            row.end_time.isoformat() if row.end_time else "",
+            0,
+            round(minutes / 60, 2),
+            "yes" if row.is_approved else "no",
+            "manual",
+            row.notes or "",
+        ]
+
+
+@register_export("timesheet", TIMESHEET_HEADERS)
+def iter_timesheet_rows(db: Session, params: Dict[str, Any]) -> RowIter:
+    """params: project_id (required), month (YYYY-MM), user_id. Attendance-backed rows and
+    manual entries, ordered by work date and start."""
+    pid = uuid.UUID(str(params["project_id"]))
+    bounds = _month_bounds(params.get("month"))
+    user_id = uuid.UUID(str(params["user_id"])) if params.get("user_id") else None
+    merged = heapq.merge(
+        _timesheet_attendance_rows(db, pid, bounds, user_id),
+        _timesheet_manual_rows(db, pid, bounds, user_id),
+        key=lambda item: item[0],
+    )
+    for _, row in merged:
+        yield row
+
+
+FLEET_HISTORY_HEADERS = [
+    "log_date",
+    "log_type",
+    "description",
+    "odometer",
+    "hours",
+    "status",
+    "user",
+    "work_order_id",
+    "created_at",
+]
+
+
+@register_export("fleet_history", FLEET_HISTORY_HEADERS)
+def iter_fleet_history_rows(db: Session, params: Dict[str, Any]) -> RowIter:
+    """params: fleet_asset_id (required), log_type."""
+    q = db.query(
+        FleetLog.log_date,
+        FleetLog.log_type,
+        FleetLog.description,
+        FleetLog.odometer_snapshot,
+        FleetLog.hours_snapshot,
+        FleetLog.status_snapshot,
+        FleetLog.related_work_order_id,
+        FleetLog.created_at,
+    ).filter(FleetLog.fleet_asset_id == uuid.UUID(str(params["fleet_asset_id"])))
+    q = _with_user_names(q, FleetLog.user_id)
+    if params.get("log_type"):
+        q = q.filter(FleetLog.log_type == params["log_type"])
+    q = q.order_by(FleetLog.log_date.desc(), FleetLog.id.desc())
+    for row in q.yield_per(YIELD_PER):
+        yield [
+            _iso(row.log_date),
+            row.log_type or "",
+            row.description or "",
+            row.odometer_snapshot,
+            row.hours_snapshot,
+            row.status_snapshot or "",
+            _name(row) if row.username else "",
+            row.related_work_order_id,
+            _iso(row.created_at),
+        ]
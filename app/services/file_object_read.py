@@ -5,7 +5,6 @@ import logging
 from pathlib import Path
 from typing import Optional
 
-import httpx
 from ..models.models import FileObject
 from ..routes.files import get_storage_for_file
 from ..storage.local_provider import LocalStorageProvider
@@ -26,13 +25,7 @@ def read_file_object_bytes(fo: FileObject) -> Optional[bytes]:
                 logger.warning("file_object_read: missing local path for %s key=%s", fo.id, fo.key)
                 return None
             return Path(file_path).read_bytes()
-        url = storage.get_download_url(fo.key, expires_s=300)
-        if not url:
-            return None
-        with httpx.Client(timeout=120.0) as client:
-            r = client.get(url)
-            r.raise_for_status()
-            return r.content
+        return storage.read_bytes(fo.key)
     except Exception as e:
         logger.warning("file_object_read: failed for %s: %s", fo.id, e)
         return None
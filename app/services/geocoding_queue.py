@@ -0,0 +1,395 @@
+"""Bounded geocoding worker pool with a persistent per-address result cache.
+
+Project saves only put (project_id, address) on the queue. Jobs are keyed by the normalized
+address: a submit for an address that is already queued or in flight joins that job instead of
+costing another API call. Workers answer from geocode_cache when they can, otherwise call the
+geocoder under a shared rate limit (backing off on quota and transient errors), then write the
+result to every project on the job with one UPDATE.
+"""
+from __future__ import annotations
+
+import hashlib
+import queue
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+import structlog
+from sqlalchemy import and_, not_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.models import ClientSite, GeocodeCache, Project
+from ..utils.geohash import geohash_or_none
+from .project_geocoding_service import (
+    GEOCODE_ERROR,
+    GEOCODE_NOT_FOUND,
+    GEOCODE_OK,
+    GEOCODING_STATUS_FAILED,
+    GEOCODING_STATUS_MANUAL,
+    GEOCODING_STATUS_SUCCESS,
+    GeocodeResult,
+    google_geocode,
+    normalize_project_address,
+)
+
+logger = structlog.get_logger()
+
+Geocoder = Callable[[str], GeocodeResult]
+
+WORKERS = 3
+QUEUE_MAX_SIZE = 2000
+RATE_PER_SECOND = 10.0
+MAX_ATTEMPTS = 4
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+CACHE_TTL = timedelta(days=180)
+NOT_FOUND_TTL = timedelta(days=7)
+
+_PUNCT_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize_address_key(address: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of an address."""
+    return " ".join(_PUNCT_RE.sub(" ", (address or "").casefold()).split())
+
+
+def address_cache_key(address: str) -> str:
+    return hashlib.sha256(normalize_address_key(address).encode("utf-8")).hexdigest()
+
+
+def lookup_cached(db: Session, key: str, now: Optional[datetime] = None) -> Optional[GeocodeResult]:
+    row = (
+        db.query(GeocodeCache)
+        .filter(GeocodeCache.address_key == key, GeocodeCache.expires_at > (now or datetime.utcnow()))
+        .first()
+    )
+    if row is None:
+        return None
+    row.hits = (row.hits or 0) + 1
+    db.commit()
+    if row.status == GEOCODE_OK:
+        return GeocodeResult(GEOCODE_OK, float(row.lat), float(row.lng), row.formatted_address)
+    return GeocodeResult(GEOCODE_NOT_FOUND, error=row.error)
+
+
+def store_cached(db: Session, key: str, address: str, result: GeocodeResult) -> None:
+    """Persist an ok/not_found answer; transient errors are never cached."""
+    if result.status == GEOCODE_ERROR:
+        return
+    now = datetime.utcnow()
+    values = {
+        "address": address[:1000],
+        "status": result.status,
+        "lat": result.lat,
+        "lng": result.lng,
+        "formatted_address": (result.formatted_address or "")[:500] or None,
+        "error": (result.error or "")[:500] or None,
+        "hits": 0,
+        "created_at": now,
+        "expires_at": now + (CACHE_TTL if result.ok else NOT_FOUND_TTL),
+    }
+    row = db.get(GeocodeCache, key)
+    if row is None:
+        db.add(GeocodeCache(address_key=key, **values))
+    else:
+        for name, value in values.items():
+            setattr(row, name, value)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another process cached the same address first; its answer is as good as ours.
+        db.rollback()
+
+
+class _RateLimiter:
+    """Spaces calls at least 1/per_second apart across all workers; pause() pushes every
+    worker's next slot back (a quota error is account-wide, not per thread)."""
+
+    def __init__(self, per_second: float, sleep: Callable[[float], None]):
+        self._interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+        if slot > now:
+            self._sleep(slot - now)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+@dataclass
+class _Job:
+    key: str
+    address: str
+    project_ids: Set[str] = field(default_factory=set)
+
+
+class GeocodingQueue:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        geocoder: Optional[Geocoder] = None,
+        *,
+        workers: int = WORKERS,
+        max_size: int = QUEUE_MAX_SIZE,
+        rate_per_second: float = RATE_PER_SECOND,
+        max_attempts: int = MAX_ATTEMPTS,
+        backoff_base: float = BACKOFF_BASE_SECONDS,
+        backoff_max: float = BACKOFF_MAX_SECONDS,
+        sleep: Callable[[float], None] = time.sleep,
+        autostart: bool = True,
+    ):
+        self._session_factory = session_factory
+        self._geocoder = geocoder or google_geocode
+        self._workers = workers
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max_size)
+        self._jobs: Dict[str, _Job] = {}
+        self._limiter = _RateLimiter(rate_per_second, sleep)
+        self._max_attempts = max(1, max_attempts)
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._autostart = autostart
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._stats: Dict[str, int] = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "dropped": 0,
+            "cache_hits": 0,
+            "api_calls": 0,
+            "retries": 0,
+            "errors": 0,
+            "projects_updated": 0,
+        }
+
+    def _bump(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += n
+
+    # -- producer side -------------------------------------------------------
+
+    def submit(self, project_id: str, address: str) -> bool:
+        """Queue a project for geocoding (never blocks). Returns False if the queue is full."""
+        key = address_cache_key(address)
+        with self._lock:
+            self._stats["submitted"] += 1
+            job = self._jobs.get(key)
+            if job is not None:
+                job.project_ids.add(str(project_id))
+                self._stats["deduplicated"] += 1
+                return True
+            self._jobs[key] = _Job(key, address, {str(project_id)})
+        try:
+            self._queue.put_nowait(key)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(key, None)
+                self._stats["dropped"] += 1
+            logger.warning("geocoding_queue_full", project_id=str(project_id))
+            return False
+        if self._autostart:
+            self._ensure_started()
+        return True
+
+    # -- consumer side -------------------------------------------------------
+
+    def _geocode(self, address: str) -> GeocodeResult:
+        result = GeocodeResult(GEOCODE_ERROR, error="Geocoding not attempted")
+        for attempt in range(self._max_attempts):
+            self._limiter.wait()
+            self._bump("api_calls")
+            try:
+                result = self._geocoder(address)
+            except Exception as e:
+                result = GeocodeResult(GEOCODE_ERROR, error=str(e)[:500], retryable=True)
+            if not (result.status == GEOCODE_ERROR and result.retryable) or attempt + 1 >= self._max_attempts:
+                break
+            self._bump("retries")
+            self._limiter.pause(min(self._backoff_max, self._backoff_base * (2 ** attempt)))
+        return result
+
+    def _apply(self, db: Session, job: _Job, project_ids: Set[str], result: GeocodeResult) -> int:
+        """Write the result to the job's projects whose address still matches, in one UPDATE.
+
+        Manually placed pins are left alone, as in geocode_project_sync."""
+        candidates = (
+            db.query(Project, ClientSite)
+            .outerjoin(ClientSite, ClientSite.id == Project.site_id)
+            .filter(Project.id.in_([uuid.UUID(pid) for pid in project_ids]), Project.deleted_at.is_(None))
+            .all()
+        )
+        # An edit may have changed the address since this project was queued; the newer job owns it.
+        ids = [p.id for p, site in candidates if address_cache_key(normalize_project_address(p, site)) == job.key]
+        if not ids:
+            return 0
+        now = datetime.utcnow()
+        if result.ok:
+            values = {
+                "lat": result.lat,
+                "lng": result.lng,
+                # Core UPDATE skips the mapper event that normally keeps geohash in sync.
+                "geohash": geohash_or_none(result.lat, result.lng),
+                "geocoded_address": result.formatted_address,
+                "geocoding_status": GEOCODING_STATUS_SUCCESS,
+                "geocoding_error": None,
+                "geocoded_at": now,
+            }
+        else:
+            values = {
+                "geocoding_status": GEOCODING_STATUS_FAILED,
+                "geocoding_error": (result.error or "Unknown error")[:500],
+                "geocoded_at": now,
+            }
+        manual_pin = and_(
+            Project.geocoding_status == GEOCODING_STATUS_MANUAL,
+            Project.lat.isnot(None),
+            Project.lng.isnot(None),
+        )
+        res = db.execute(
+            update(Project)
+            .where(Project.id.in_(ids), not_(manual_pin))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return res.rowcount or 0
+
+    def process(self, key: str) -> None:
+        with self._lock:
+            job = self._jobs.get(key)
+        if job is None:
+            return
+        db = self._session_factory()
+        try:
+            result = lookup_cached(db, key)
+            if result is not None:
+                self._bump("cache_hits")
+            else:
+                result = self._geocode(job.address)
+                store_cached(db, key, job.address, result)
+                if result.status == GEOCODE_ERROR:
+                    self._bump("errors")
+                    logger.warning("geocoding_job_failed", error=result.error, projects=len(job.project_ids))
+            # Close the job before applying: later submits start a new job (answered from the
+            # cache) rather than joining one whose project list has already been read.
+            with self._lock:
+                self._jobs.pop(key, None)
+                project_ids = set(job.project_ids)
+            updated = self._apply(db, job, project_ids, result)
+            self._bump("projects_updated", updated)
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self._jobs.pop(key, None)
+            logger.warning("geocoding_job_error", error=str(e))
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while True:
+            key = self._queue.get()
+            try:
+                if key is None:
+                    return
+                self.process(key)
+            finally:
+                self._queue.task_done()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self._workers:
+                t = threading.Thread(target=self._loop, name="geocoding-worker", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def start(self) -> None:
+        self._ensure_started()
+
+    def wait_idle(self) -> None:
+        """Block until every queued job has been applied (scripts, tests)."""
+        self._queue.join()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for t in threads:
+            t.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._stats)
+            out["pending_jobs"] = len(self._jobs)
+        out["queued"] = self._queue.qsize()
+        return out
+
+
+class FakeGeocoder:
+    """Deterministic in-memory geocoder for tests and offline scripts.
+
+    `answers` maps normalized addresses to (lat, lng) tuples or GeocodeResult objects; unknown
+    addresses are not_found. `fail_first` makes the first N calls return a retryable error, and
+    `gate` (a threading.Event) holds every call until it is set, to exercise in-flight dedupe."""
+
+    def __init__(
+        self,
+        answers: Optional[Dict[str, object]] = None,
+        *,
+        fail_first: int = 0,
+        gate: Optional[threading.Event] = None,
+    ):
+        self.answers = {normalize_address_key(k): v for k, v in (answers or {}).items()}
+        self.fail_first = fail_first
+        self.gate = gate
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, address: str) -> GeocodeResult:
+        with self._lock:
+            self.calls.append(address)
+            failing = len(self.calls) <= self.fail_first
+        if self.gate is not None:
+            self.gate.wait(5)
+        if failing:
+            return GeocodeResult(GEOCODE_ERROR, error="OVER_QUERY_LIMIT", retryable=True)
+        answer = self.answers.get(normalize_address_key(address))
+        if isinstance(answer, GeocodeResult):
+            return answer
+        if answer is None:
+            return GeocodeResult(GEOCODE_NOT_FOUND, error="ZERO_RESULTS")
+        lat, lng = answer
+        return GeocodeResult(GEOCODE_OK, float(lat), float(lng), address)
+
+
+_queue: Optional[GeocodingQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_geocoding_queue() -> GeocodingQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                from ..db import SessionLocal
+
+                _queue = GeocodingQueue(SessionLocal)
+    return _queue
+
+
+def stop_geocoding_queue() -> None:
+    if _queue is not None:
+        _queue.stop()
@@ -1,44 +1,227 @@
+"""Supervisor hierarchy (EmployeeProfile.manager_user_id) answered from an in-memory index.
+
+The whole user -> manager adjacency is loaded with one query and kept per process. Ancestor
+walks and "is X above Y" checks are O(depth), subtree sizes are precomputed, and none of
+them touch the DB once the index is built. The index is rebuilt after any commit that
+changed a manager_user_id in this process (session events below) and at most
+HIERARCHY_TTL_S later in other workers.
+"""
 from __future__ import annotations
 
+import threading
+import time
 import uuid
-from typing import List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, inspect as sa_inspect
 from sqlalchemy.orm import Session
 
 from ..models.models import EmployeeProfile
 
+HIERARCHY_TTL_S = 60
 
-def get_manager_chain(user_id: str, db: Session, max_depth: int = 8) -> List[str]:
-    """Return list of manager user_ids from direct to top for the given user."""
+_SESSION_FLAG = "hierarchy_changed"
+
+
+class HierarchyIndex:
+    def __init__(self, parent_of: Dict[str, str]):
+        self.parent_of: Dict[str, str] = {k: v for k, v in parent_of.items() if v and v != k}
+        self.children: Dict[str, List[str]] = {}
+        for child, parent in self.parent_of.items():
+            self.children.setdefault(parent, []).append(child)
+        self._subtree_size = self._compute_subtree_sizes()
+
+    def _compute_subtree_sizes(self) -> Dict[str, int]:
+        """Descendant counts for every node reachable from a root (iterative post-order).
+        Nodes caught in a manager cycle are left out and counted on demand."""
+        sizes: Dict[str, int] = {}
+        roots = [n for n in self.children if n not in self.parent_of]
+        for root in roots:
+            stack = [(root, False)]
+            while stack:
+                node, done = stack.pop()
+                if done:
+                    sizes[node] = sum(sizes.get(c, 0) + 1 for c in self.children.get(node, ()))
+                    continue
+                stack.append((node, True))
+                for c in self.children.get(node, ()):
+                    if c not in sizes:
+                        stack.append((c, False))
+        return sizes
+
+    def manager_of(self, user_id: str) -> Optional[str]:
+        return self.parent_of.get(str(user_id))
+
+    def ancestors(self, user_id: str, max_depth: Optional[int] = None) -> List[str]:
+        """Manager ids from direct manager to the top; stops at cycles."""
+        chain: List[str] = []
+        seen: Set[str] = {str(user_id)}
+        current = self.parent_of.get(str(user_id))
+        while current and current not in seen:
+            if max_depth is not None and len(chain) >= max_depth:
+                break
+            chain.append(current)
+            seen.add(current)
+            current = self.parent_of.get(current)
+        return chain
+
+    def is_above(self, manager_id: str, user_id: str, max_depth: Optional[int] = None) -> bool:
+        return str(manager_id) in self.ancestors(user_id, max_depth)
+
+    def direct_reports(self, manager_id: str) -> List[str]:
+        return list(self.children.get(str(manager_id), ()))
+
+    def descendants(self, user_id: str) -> List[str]:
+        """All reports under user_id, breadth-first."""
+        root = str(user_id)
+        out: List[str] = []
+        seen: Set[str] = {root}
+        frontier = [root]
+        while frontier:
+            nxt: List[str] = []
+            for node in frontier:
+                for c in self.children.get(node, ()):
+                    if c not in seen:
+                        seen.add(c)
+                        out.append(c)
+                        nxt.append(c)
+            frontier = nxt
+        return out
+
+    def subtree_size(self, user_id: str) -> int:
+        uid = str(user_id)
+        if uid in self._subtree_size:
+            return self._subtree_size[uid]
+        if uid not in self.children:
+            return 0
+        return len(self.descendants(uid))
+
+    def forest(self, ids: Iterable[str]) -> Dict[str, object]:
+        """
+        Supervisor forest restricted to `ids` (same rules as the org chart: a manager outside
+        the set, or a cycle, makes the person a root). Returns root ids and a children map;
+        callers order siblings themselves.
+        """
+        members = [str(i) for i in ids]
+        member_set = set(members)
+        parent: Dict[str, Optional[str]] = {}
+        for m in members:
+            p = self.parent_of.get(m)
+            parent[m] = p if p in member_set else None
+        # Break cycles inside the set: the first node found revisiting itself becomes a root.
+        state: Dict[str, int] = {}
+        for m in members:
+            path: List[str] = []
+            node: Optional[str] = m
+            while node is not None and state.get(node) is None:
+                state[node] = 1
+                path.append(node)
+                node = parent[node]
+            if node is not None and state.get(node) == 1:
+                parent[node] = None
+            for n in path:
+                state[n] = 2
+        children: Dict[str, List[str]] = {}
+        roots: List[str] = []
+        for m in members:
+            p = parent[m]
+            if p is None:
+                roots.append(m)
+            else:
+                children.setdefault(p, []).append(m)
+        return {"roots": roots, "children": children}
+
+
+_lock = threading.Lock()
+_index: Optional[HierarchyIndex] = None
+_built_at = 0.0
+
+
+def build_hierarchy_index(db: Session) -> HierarchyIndex:
+    rows = (
+        db.query(EmployeeProfile.user_id, EmployeeProfile.manager_user_id)
+        .filter(EmployeeProfile.manager_user_id.isnot(None))
+        .all()
+    )
+    return HierarchyIndex({str(uid): str(mid) for uid, mid in rows})
+
+
+def get_hierarchy_index(db: Session) -> HierarchyIndex:
+    global _index, _built_at
+    now = time.monotonic()
+    idx = _index
+    if idx is not None and now - _built_at < HIERARCHY_TTL_S:
+        return idx
+    idx = build_hierarchy_index(db)
+    with _lock:
+        _index, _built_at = idx, now
+    return idx
+
+
+def invalidate_hierarchy_index() -> None:
+    global _index
+    with _lock:
+        _index = None
+
+
+@event.listens_for(Session, "after_flush")
+def _track_manager_changes(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, EmployeeProfile):
+            continue
+        if obj in session.new or obj in session.deleted:
+            session.info[_SESSION_FLAG] = True
+            return
+        if sa_inspect(obj).attrs.manager_user_id.history.has_changes():
+            session.info[_SESSION_FLAG] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_SESSION_FLAG, False):
+        invalidate_hierarchy_index()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_FLAG, None)
+
+
+def _norm(user_id) -> Optional[str]:
     try:
-        uid = uuid.UUID(str(user_id))
+        return str(uuid.UUID(str(user_id)))
     except Exception:
+        return None
+
+
+def get_manager_chain(user_id: str, db: Session, max_depth: int = 8) -> List[str]:
+    """Return list of manager user_ids from direct to top for the given user."""
+    uid = _norm(user_id)
+    if not uid:
         return []
-    chain: List[str] = []
-    visited: Set[str] = set()
-    current = db.query(EmployeeProfile).filter(EmployeeProfile.user_id == uid).first()
-    depth = 0
-    while current and getattr(current, 'manager_user_id', None) and depth < max_depth:
-        mid = str(getattr(current, 'manager_user_id'))
-        if not mid or mid in visited:
-            break
-        chain.append(mid)
-        visited.add(mid)
-        depth += 1
-        current = db.query(EmployeeProfile).filter(EmployeeProfile.user_id == getattr(current, 'manager_user_id')).first()
-    return chain
+    return get_hierarchy_index(db).ancestors(uid, max_depth)
 
 
 def get_direct_reports(manager_id: str, db: Session, limit: int = 500) -> List[str]:
-    try:
-        mid = uuid.UUID(str(manager_id))
-    except Exception:
+    mid = _norm(manager_id)
+    if not mid:
         return []
-    rows = db.query(EmployeeProfile).filter(EmployeeProfile.manager_user_id == mid).limit(limit).all()
-    return [str(r.user_id) for r in rows]
+    return get_hierarchy_index(db).direct_reports(mid)[:limit]
+
 
+def get_descendants(manager_id: str, db: Session) -> List[str]:
+    mid = _norm(manager_id)
+    return get_hierarchy_index(db).descendants(mid) if mid else []
 
-def is_in_chain(manager_id: str, user_id: str, db: Session) -> bool:
-    return str(manager_id) in set(get_manager_chain(user_id, db))
 
+def get_subtree_size(manager_id: str, db: Session) -> int:
+    mid = _norm(manager_id)
+    return get_hierarchy_index(db).subtree_size(mid) if mid else 0
 
 
+def is_in_chain(manager_id: str, user_id: str, db: Session, max_depth: int = 8) -> bool:
+    mid, uid = _norm(manager_id), _norm(user_id)
+    if not mid or not uid:
+        return False
+    return get_hierarchy_index(db).is_above(mid, uid, max_depth)
@@ -1,22 +1,70 @@
-"""Build signed PDF: original + signature overlay + certificate page."""
+"""Build signed PDF: original + signature overlay + certificate page.
+
+Signing is a single PyMuPDF pass: the document is opened once, every overlay is drawn
+straight onto its page, the certificate pages are inserted, form widgets are stripped and the
+result is written with one save whose bytes are hashed. Overlay coordinates are PDF user space
+(origin bottom-left), as stored in signature templates and sign placements.
+"""
 import io
-import os
-import tempfile
 from datetime import datetime, timezone
-from collections import defaultdict
 from typing import Any, Dict, List, Optional, Tuple
 
-from PyPDF2 import PdfReader, PdfWriter
+import fitz  # PyMuPDF
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
 
 from ..utils.pdf_hash import sha256_bytes
 
 
-def _page_size(page) -> tuple[float, float]:
-    mb = page.mediabox
-    return float(mb.width), float(mb.height)
+def _user_space_rect(page: "fitz.Page", x: float, y: float, w: float, h: float) -> "fitz.Rect":
+    """Box in PDF user space (origin bottom-left, as templates store it) in MuPDF page coordinates."""
+    return fitz.Rect(x, y, x + w, y + h) * page.transformation_matrix
+
+
+def _draw_string(page: "fitz.Page", x: float, y: float, text: str, fontname: str, fontsize: float) -> None:
+    """Same contract as ReportLab drawString: (x, y) is the baseline start in PDF user space."""
+    page.insert_text(fitz.Point(x, y) * page.transformation_matrix, text, fontname=fontname, fontsize=fontsize)
+
+
+def _draw_image(page: "fitz.Page", x: float, y: float, w: float, h: float, png_bytes: bytes) -> None:
+    """Fit the image inside the box, centered, keeping its aspect ratio (alpha is kept)."""
+    page.insert_image(_user_space_rect(page, x, y, w, h), stream=bytes(png_bytes), keep_proportion=True)
+
+
+def _resolve_page_index(doc: "fitz.Document", page_index: int) -> int:
+    n = doc.page_count
+    if page_index < 0:
+        page_index = n - 1
+    if page_index < 0 or page_index >= n:
+        raise ValueError(f"page_index {page_index} out of range (pages={n})")
+    return page_index
+
+
+def _draw_signature(
+    doc: "fitz.Document",
+    signature_png_bytes: bytes,
+    page_index: int,
+    x: float,
+    y: float,
+    w: float,
+    h: float,
+    signer_name: str,
+    display_datetime: str,
+) -> None:
+    page = doc[_resolve_page_index(doc, page_index)]
+    _draw_image(page, x, y, w, h, signature_png_bytes)
+    _draw_string(page, x, max(0, y - 12), f"Signed by: {signer_name}", "hebo", 10)
+    _draw_string(page, x, max(0, y - 24), f"Date: {display_datetime}", "hebo", 10)
+
+
+def _open_pdf(pdf_bytes: bytes) -> "fitz.Document":
+    return fitz.open(stream=pdf_bytes, filetype="pdf")
+
+
+def _save_pdf(doc: "fitz.Document", *, compact: bool = False) -> bytes:
+    if compact:
+        return doc.tobytes(garbage=4, deflate=True, clean=True)
+    return doc.tobytes(garbage=1, deflate=True)
 
 
 def overlay_signature_on_pdf(
@@ -30,49 +78,12 @@ def overlay_signature_on_pdf(
     signer_name: str,
     display_datetime: str,
 ) -> bytes:
-    reader = PdfReader(io.BytesIO(pdf_bytes))
-    n = len(reader.pages)
-    if page_index < 0:
-        page_index = n - 1
-    if page_index < 0 or page_index >= n:
-        raise ValueError(f"page_index {page_index} out of range (pages={n})")
-    target = reader.pages[page_index]
-    pw, ph = _page_size(target)
-    packet = io.BytesIO()
-    can = canvas.Canvas(packet, pagesize=(pw, ph))
-    sig_path = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+    doc = _open_pdf(pdf_bytes)
     try:
-        sig_path.write(signature_png_bytes)
-        sig_path.close()
-        can.drawImage(
-            ImageReader(sig_path.name),
-            x,
-            y,
-            width=w,
-            height=h,
-            preserveAspectRatio=True,
-            anchor="c",
-            mask="auto",
-        )
+        _draw_signature(doc, signature_png_bytes, page_index, x, y, w, h, signer_name, display_datetime)
+        return _save_pdf(doc)
     finally:
-        try:
-            os.unlink(sig_path.name)
-        except Exception:
-            pass
-    can.setFont("Helvetica-Bold", 10)
-    can.drawString(x, max(0, y - 12), f"Signed by: {signer_name}")
-    can.drawString(x, max(0, y - 24), f"Date: {display_datetime}")
-    can.save()
-    packet.seek(0)
-    overlay_pdf = PdfReader(packet)
-    writer = PdfWriter()
-    for i, page in enumerate(reader.pages):
-        if i == page_index:
-            page.merge_page(overlay_pdf.pages[0])
-        writer.add_page(page)
-    out = io.BytesIO()
-    writer.write(out)
-    return out.getvalue()
+        doc.close()
 
 
 def build_certificate_page_pdf(
@@ -211,14 +222,20 @@ def _single_line_baseline_bottom(y: float, h: float, font_size: float) -> float:
 
 
 def append_pdf_pages(main_pdf_bytes: bytes, extra_pdf_bytes: bytes) -> bytes:
-    w = PdfWriter()
-    for p in PdfReader(io.BytesIO(main_pdf_bytes)).pages:
-        w.add_page(p)
-    for p in PdfReader(io.BytesIO(extra_pdf_bytes)).pages:
-        w.add_page(p)
-    out = io.BytesIO()
-    w.write(out)
-    return out.getvalue()
+    doc = _open_pdf(main_pdf_bytes)
+    try:
+        _append_pages(doc, extra_pdf_bytes)
+        return _save_pdf(doc)
+    finally:
+        doc.close()
+
+
+def _append_pages(doc: "fitz.Document", extra_pdf_bytes: bytes) -> None:
+    extra = _open_pdf(extra_pdf_bytes)
+    try:
+        doc.insert_pdf(extra)
+    finally:
+        extra.close()
 
 
 def default_placement() -> dict[str, Any]:
@@ -233,24 +250,13 @@ def sort_template_fields_for_draw(fields: List[dict]) -> List[dict]:
     )
 
 
-def _merge_overlay_page_fields(
-    pdf_bytes: bytes,
-    page_index: int,
-    fields: List[dict],
-    values: Dict[str, Any],
-) -> bytes:
-    reader = PdfReader(io.BytesIO(pdf_bytes))
-    n = len(reader.pages)
-    if page_index < 0 or page_index >= n:
-        raise ValueError(f"page_index {page_index} out of range (pages={n})")
-    target = reader.pages[page_index]
-    pw, ph = _page_size(target)
-    packet = io.BytesIO()
-    can = canvas.Canvas(packet, pagesize=(pw, ph))
-
+def _draw_template_fields(doc: "fitz.Document", fields: List[dict], values: Dict[str, Any]) -> None:
+    n_pages = doc.page_count
     for f in sort_template_fields_for_draw(fields):
-        if int(f["page_index"]) != page_index:
-            continue
+        page_index = int(f["page_index"])
+        if page_index < 0 or page_index >= n_pages:
+            raise ValueError(f"page_index {page_index} out of range (pages={n_pages})")
+        page = doc[page_index]
         fid = f["id"]
         ftype = f["type"]
         val = values.get(fid)
@@ -260,32 +266,14 @@ def _merge_overlay_page_fields(
         if ftype in ("signature", "initials"):
             if not isinstance(val, (bytes, bytearray)) or len(val) < 10:
                 continue
-            sig_path = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-            try:
-                sig_path.write(bytes(val))
-                sig_path.close()
-                can.drawImage(
-                    ImageReader(sig_path.name),
-                    x,
-                    y,
-                    width=w,
-                    height=h,
-                    preserveAspectRatio=True,
-                    anchor="c",
-                    mask="auto",
-                )
-            finally:
-                try:
-                    os.unlink(sig_path.name)
-                except Exception:
-                    pass
+            _draw_image(page, x, y, w, h, val)
             continue
 
         if ftype == "checkbox":
             if val is True:
-                can.setFont("Helvetica-Bold", 14)
+                # ZapfDingbats "4" is the check mark (base-14 Helvetica has no such glyph).
                 fs_cb = 14
-                can.drawString(x + w / 2 - 4, y + h / 2 - fs_cb * 0.35, "✓")
+                _draw_string(page, x + w / 2 - 4, y + h / 2 - fs_cb * 0.35, "4", "zadb", fs_cb)
             continue
 
         if ftype in ("employee_info", "text", "value", "paragraph", "date"):
@@ -297,17 +285,19 @@ def _merge_overlay_page_fields(
                 continue
             font_size = 9 if ftype != "paragraph" else 8
             line_h = font_size + 3
-            can.setFont("Helvetica", font_size)
             max_chars = max(4, int(w / (font_size * 0.45)))
             if ftype == "paragraph":
                 lines = _wrap(text.replace("\r\n", "\n"), max_chars)
                 max_lines = max(1, int((h - 4) // line_h))
                 n = min(len(lines), max_lines)
                 if n == 1:
-                    can.drawString(
+                    _draw_string(
+                        page,
                         x + 2,
                         _single_line_baseline_bottom(y, h, font_size),
                         lines[0][: max_chars + 30],
+                        "helv",
+                        font_size,
                     )
                 else:
                     bottom_pad = max(1.5, font_size * 0.22)
@@ -321,74 +311,98 @@ def _merge_overlay_page_fields(
                     for line in lines[:n]:
                         if ty < y - 1:
                             break
-                        can.drawString(x + 2, ty, line[: max_chars + 30])
+                        _draw_string(page, x + 2, ty, line[: max_chars + 30], "helv", font_size)
                         ty -= line_h
             else:
                 s = text.replace("\n", " ")
                 if len(s) > max_chars:
-                    s = s[: max_chars - 1] + "…"
+                    # Base-14 text in PyMuPDF is Latin-1; there is no single-glyph ellipsis.
+                    s = s[: max_chars - 3] + "..."
                 baseline = _single_line_baseline_bottom(y, h, font_size)
-                can.drawString(x + 2, baseline, s)
-
-    can.save()
-    packet.seek(0)
-    overlay_pdf = PdfReader(packet)
-    writer = PdfWriter()
-    for i, page in enumerate(reader.pages):
-        if i == page_index:
-            page.merge_page(overlay_pdf.pages[0])
-        writer.add_page(page)
-    out = io.BytesIO()
-    writer.write(out)
-    return out.getvalue()
+                _draw_string(page, x + 2, baseline, s, "helv", font_size)
 
 
 def apply_template_field_overlays(pdf_bytes: bytes, fields: List[dict], values: Dict[str, Any]) -> bytes:
     """Apply all template fields (same assignee batch) onto the base PDF."""
-    by_page: dict[int, List[dict]] = defaultdict(list)
-    for f in fields:
-        by_page[int(f["page_index"])].append(f)
-    current = pdf_bytes
-    for pi in sorted(by_page.keys()):
-        current = _merge_overlay_page_fields(current, pi, by_page[pi], values)
-    return current
+    doc = _open_pdf(pdf_bytes)
+    try:
+        _draw_template_fields(doc, fields, values)
+        return _save_pdf(doc)
+    finally:
+        doc.close()
+
+
+def _strip_form_fields(doc: "fitz.Document") -> None:
+    """Remove AcroForm widgets and scripts so the signed PDF is not a fillable / editable form."""
+    for page in doc:
+        try:
+            widgets = list(page.widgets() or [])
+        except Exception:
+            widgets = []
+        for w in widgets:
+            try:
+                # PyMuPDF 1.23+: Page.delete_widget; older Widget.delete() removed in 1.27+
+                if hasattr(page, "delete_widget"):
+                    page.delete_widget(w)
+                elif hasattr(w, "delete"):
+                    w.delete()
+            except Exception:
+                pass
+    if hasattr(doc, "scrub"):
+        try:
+            doc.scrub(reset_fields=True, javascript=True)
+        except Exception:
+            pass
 
 
 def make_signed_pdf_non_interactive(pdf_bytes: bytes) -> bytes:
     """
     Strip AcroForm field widgets and tighten output so the signed PDF is not a fillable / editable form.
-    Base documents may still carry form fields after PyPDF2 merge; this removes them after overlays + certificate.
+    The signing pipeline does this in its own pass; kept for callers holding an already merged PDF.
     """
+    doc = _open_pdf(pdf_bytes)
     try:
-        import fitz  # PyMuPDF
-    except ImportError:
-        return pdf_bytes
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        _strip_form_fields(doc)
+        return _save_pdf(doc, compact=True)
+    finally:
+        doc.close()
+
+
+def sign_pdf(
+    pdf_bytes: bytes,
+    *,
+    certificate_pdf: bytes,
+    fields: Optional[List[dict]] = None,
+    values: Optional[Dict[str, Any]] = None,
+    signature: Optional[Dict[str, Any]] = None,
+) -> Tuple[bytes, str]:
+    """
+    Single-pass signing: open once, draw template fields and/or a placed signature, append the
+    certificate, flatten, save once and hash. `signature` takes the overlay_signature_on_pdf
+    arguments as a dict (png, page_index, x, y, w, h, signer_name, display_datetime).
+    """
+    doc = _open_pdf(pdf_bytes)
     try:
-        for page in doc:
-            try:
-                widgets = list(page.widgets() or [])
-            except Exception:
-                widgets = []
-            for w in widgets:
-                try:
-                    # PyMuPDF 1.23+: Page.delete_widget; older Widget.delete() removed in 1.27+
-                    if hasattr(page, "delete_widget"):
-                        page.delete_widget(w)
-                    elif hasattr(w, "delete"):
-                        w.delete()
-                except Exception:
-                    pass
-        if hasattr(doc, "scrub"):
-            try:
-                doc.scrub(reset_fields=True, javascript=True)
-            except Exception:
-                pass
-        buf = io.BytesIO()
-        doc.save(buf, garbage=4, deflate=True, clean=True)
-        return buf.getvalue()
+        if fields:
+            _draw_template_fields(doc, fields, values or {})
+        if signature:
+            _draw_signature(
+                doc,
+                signature["png"],
+                signature["page_index"],
+                signature["x"],
+                signature["y"],
+                signature["w"],
+                signature["h"],
+                signature["signer_name"],
+                signature["display_datetime"],
+            )
+        _append_pages(doc, certificate_pdf)
+        _strip_form_fields(doc)
+        final = _save_pdf(doc, compact=True)
     finally:
         doc.close()
+    return final, sha256_bytes(final)
 
 
 def _format_signed_times(signed_at: datetime, tz_name: str = "America/Vancouver") -> Tuple[str, str]:
@@ -406,8 +420,7 @@ def _format_signed_times(signed_at: datetime, tz_name: str = "America/Vancouver"
     return signed_local, signed_utc
 
 
-def build_signed_pdf_with_certificate_from_merged(
-    merged_pdf_bytes: bytes,
+def _certificate_for(
     *,
     document_name: str,
     document_id: str,
@@ -416,14 +429,13 @@ def build_signed_pdf_with_certificate_from_merged(
     requested_at: datetime,
     acceptance_statement: str,
     signers: Optional[List[Dict[str, Any]]] = None,
-    # Backward-compatible single-signer kwargs
     signer_name: str = "",
     signer_email: str = "",
     signed_at: Optional[datetime] = None,
     ip_address: str = "",
     user_agent: str = "",
     tz_name: str = "America/Vancouver",
-) -> Tuple[bytes, str]:
+) -> bytes:
     req_utc = (
         requested_at.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
         if requested_at.tzinfo
@@ -459,7 +471,7 @@ def build_signed_pdf_with_certificate_from_merged(
             normalized.append(entry)
         cert_signers = normalized
 
-    cert = build_certificate_page_pdf(
+    return build_certificate_page_pdf(
         document_name=document_name,
         document_id=document_id,
         document_hash_before_sign=base_doc_hash,
@@ -468,9 +480,60 @@ def build_signed_pdf_with_certificate_from_merged(
         acceptance_statement=acceptance_statement,
         signers=cert_signers,
     )
-    final = append_pdf_pages(merged_pdf_bytes, cert)
-    final = make_signed_pdf_non_interactive(final)
-    return final, sha256_bytes(final)
+
+
+def build_signed_pdf_with_certificate_from_merged(
+    merged_pdf_bytes: bytes,
+    *,
+    document_name: str,
+    document_id: str,
+    base_doc_hash: str,
+    requested_by: str,
+    requested_at: datetime,
+    acceptance_statement: str,
+    signers: Optional[List[Dict[str, Any]]] = None,
+    # Backward-compatible single-signer kwargs
+    signer_name: str = "",
+    signer_email: str = "",
+    signed_at: Optional[datetime] = None,
+    ip_address: str = "",
+    user_agent: str = "",
+    tz_name: str = "America/Vancouver",
+) -> Tuple[bytes, str]:
+    return build_signed_pdf_from_template(
+        merged_pdf_bytes,
+        [],
+        {},
+        document_name=document_name,
+        document_id=document_id,
+        base_doc_hash=base_doc_hash,
+        requested_by=requested_by,
+        requested_at=requested_at,
+        acceptance_statement=acceptance_statement,
+        signers=signers,
+        signer_name=signer_name,
+        signer_email=signer_email,
+        signed_at=signed_at,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        tz_name=tz_name,
+    )
+
+
+def build_signed_pdf_from_template(
+    base_pdf_bytes: bytes,
+    fields: List[dict],
+    values: Dict[str, Any],
+    **certificate: Any,
+) -> Tuple[bytes, str]:
+    """Template fields + certificate + flatten + hash in one pass; certificate kwargs as in
+    build_signed_pdf_with_certificate_from_merged."""
+    return sign_pdf(
+        base_pdf_bytes,
+        certificate_pdf=_certificate_for(**certificate),
+        fields=fields,
+        values=values,
+    )
 
 
 def build_signed_pdf_with_certificate(
@@ -501,24 +564,7 @@ def build_signed_pdf_with_certificate(
         signed_at = signed_at.replace(tzinfo=timezone.utc)
     local = signed_at.astimezone(tz)
     display_dt = local.strftime("%Y-%m-%d %H:%M %Z")
-    pi = int(placement.get("page_index", -1))
-    x = float(placement.get("x", 350))
-    y = float(placement.get("y", 80))
-    w = float(placement.get("w", 150))
-    h = float(placement.get("h", 50))
-    merged = overlay_signature_on_pdf(
-        base_pdf_bytes,
-        signature_png_bytes,
-        pi,
-        x,
-        y,
-        w,
-        h,
-        signer_name,
-        display_dt,
-    )
-    return build_signed_pdf_with_certificate_from_merged(
-        merged,
+    cert = _certificate_for(
         document_name=document_name,
         document_id=document_id,
         base_doc_hash=base_doc_hash,
@@ -532,3 +578,17 @@ def build_signed_pdf_with_certificate(
         acceptance_statement=acceptance_statement,
         tz_name=tz_name,
     )
+    return sign_pdf(
+        base_pdf_bytes,
+        certificate_pdf=cert,
+        signature={
+            "png": signature_png_bytes,
+            "page_index": int(placement.get("page_index", -1)),
+            "x": float(placement.get("x", 350)),
+            "y": float(placement.get("y", 80)),
+            "w": float(placement.get("w", 150)),
+            "h": float(placement.get("h", 50)),
+            "signer_name": signer_name,
+            "display_datetime": display_dt,
+        },
+    )
@@ -0,0 +1,225 @@
+"""Generated PDFs (estimates, quotes, proposals, safety inspections) as content-hashed artifacts.
+
+A PDF is keyed by a SHA-256 of its normalized input data, the kind's TEMPLATE_VERSION and a
+fingerprint of the builder modules' source, and kept on local disk. Opening the same estimate
+or re-sending the same quote is then a file read; anything that changes the input, the layout
+code or the template version produces a new key and one fresh render.
+
+Callers hash what determines the output, not the render payload itself: uploaded images by
+content, stored files by id, temp paths never.
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Sequence
+
+from fastapi.responses import FileResponse
+
+logger = logging.getLogger(__name__)
+
+PDF_ARTIFACT_CACHE_DIR = Path(os.getenv("PDF_ARTIFACT_CACHE_DIR", "var/cache/pdf_artifacts"))
+PDF_ARTIFACT_CACHE_MAX_FILES = max(10, int(os.getenv("PDF_ARTIFACT_CACHE_MAX_FILES", "2000")))
+
+# Bump a kind's version when its output changes without a code change (template PNGs, fonts).
+TEMPLATE_VERSION: Dict[str, int] = {
+    "estimate": 1,
+    "quote": 1,
+    "proposal": 1,
+    "safety_inspection": 1,
+}
+
+# Modules whose source is part of the key: deploying a layout change invalidates old artifacts.
+BUILDER_MODULES: Dict[str, Sequence[str]] = {
+    "estimate": ("app.proposals.pdf_estimate",),
+    "quote": ("app.proposals.pdf_merge", "app.proposals.pdf_fixed", "app.proposals.pdf_dynamic"),
+    "proposal": ("app.proposals.pdf_merge", "app.proposals.pdf_fixed", "app.proposals.pdf_dynamic"),
+    "safety_inspection": ("app.services.safety_inspection_pdf", "app.proposals.pdf_dynamic"),
+}
+
+
+def _normalize(value: Any) -> Any:
+    """JSON-ready value with a single canonical form (string keys, ISO dates, hashed bytes)."""
+    if isinstance(value, Mapping):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalize(v) for v in value), key=repr)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "sha256:" + hashlib.sha256(bytes(value)).hexdigest()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+@lru_cache(maxsize=None)
+def builder_fingerprint(kind: str) -> str:
+    digest = hashlib.sha256()
+    for module in BUILDER_MODULES.get(kind, ()):
+        spec = importlib.util.find_spec(module)
+        origin = spec.origin if spec else None
+        if origin and os.path.isfile(origin):
+            with open(origin, "rb") as fh:
+                digest.update(fh.read())
+    return digest.hexdigest()[:16]
+
+
+def content_key(kind: str, data: Any) -> str:
+    """Stable key for ``data`` rendered by ``kind``'s current template and builder code."""
+    payload = json.dumps(
+        {
+            "kind": kind,
+            "template_version": TEMPLATE_VERSION.get(kind, 0),
+            "builder": builder_fingerprint(kind),
+            "data": _normalize(data),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        allow_nan=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def artifact_path(kind: str, key: str) -> Path:
+    return PDF_ARTIFACT_CACHE_DIR / kind / f"{key}.pdf"
+
+
+def lookup(kind: str, key: str) -> Optional[Path]:
+    """Cached artifact for ``key``, or None. Hits are touched so eviction drops the coldest files."""
+    path = artifact_path(kind, key)
+    try:
+        if path.is_file() and path.stat().st_size > 0:
+            os.utime(path)
+            return path
+    except OSError:
+        return None
+    return None
+
+
+def store_file(kind: str, key: str, rendered_path: str) -> Path:
+    """Move a freshly rendered PDF into the cache (atomic rename) and return its cached path."""
+    path = artifact_path(kind, key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(rendered_path, path)
+        _evict_if_needed()
+        return path
+    except OSError as e:
+        logger.warning("pdf artifact cache write failed: %s", e)
+        return Path(rendered_path)
+
+
+def store_bytes(kind: str, key: str, content: bytes) -> None:
+    path = artifact_path(kind, key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        _evict_if_needed()
+    except OSError as e:
+        logger.warning("pdf artifact cache write failed: %s", e)
+
+
+def _evict_if_needed() -> None:
+    try:
+        files = [p for p in PDF_ARTIFACT_CACHE_DIR.glob("*/*.pdf") if p.is_file()]
+    except OSError:
+        return
+    overflow = len(files) - PDF_ARTIFACT_CACHE_MAX_FILES
+    if overflow <= 0:
+        return
+    files.sort(key=lambda p: p.stat().st_mtime)
+    for p in files[: overflow + PDF_ARTIFACT_CACHE_MAX_FILES // 20]:
+        try:
+            p.unlink()
+        except OSError:
+            pass
+
+
+async def render_file(
+    kind: str, data: Any, render: Callable[[str], Awaitable[None]]
+) -> tuple[Path, str, bool]:
+    """
+    (path, key, hit) for ``data``: the cached artifact, or ``render(output_path)`` once and
+    cache its output. ``render`` must write the complete PDF to the path it is given.
+    """
+    key = content_key(kind, data)
+    cached = lookup(kind, key)
+    if cached is not None:
+        return cached, key, True
+    PDF_ARTIFACT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    output_path = str(PDF_ARTIFACT_CACHE_DIR / f"render_{uuid.uuid4().hex}.pdf")
+    try:
+        await render(output_path)
+    except BaseException:
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+        raise
+    return store_file(kind, key, output_path), key, False
+
+
+def render_bytes(kind: str, data: Any, render: Callable[[], bytes], *, refresh: bool = False) -> bytes:
+    """
+    Cached PDF bytes for ``data``, calling ``render()`` only on a miss. ``refresh`` renders
+    regardless and replaces the stored artifact (for builders that also read lookups from
+    the database, e.g. user names, when the user explicitly asks to regenerate).
+    """
+    key = content_key(kind, data)
+    cached = None if refresh else lookup(kind, key)
+    if cached is not None:
+        try:
+            return cached.read_bytes()
+        except OSError:
+            pass
+    content = render()
+    store_bytes(kind, key, content)
+    return content
+
+
+def file_response(path: Path, filename: str, key: str, hit: bool) -> FileResponse:
+    """PDF response for an artifact; the content key doubles as a strong ETag."""
+    return FileResponse(
+        str(path),
+        media_type="application/pdf",
+        filename=filename,
+        headers={"ETag": f'"{key}"', "X-PDF-Cache": "hit" if hit else "miss"},
+    )
+
+
+async def upload_digest(upload: Any) -> str:
+    """Content hash of an UploadFile, leaving it readable from the start for the caller."""
+    digest = hashlib.sha256()
+    await upload.seek(0)
+    while True:
+        chunk = await upload.read(1 << 20)
+        if not chunk:
+            break
+        digest.update(chunk)
+    await upload.seek(0)
+    return digest.hexdigest()
+
+
+async def form_fingerprint(form: Any) -> Dict[str, Any]:
+    """Every field of a multipart form; uploads contribute their content hash, not their temp name."""
+    out: Dict[str, Any] = {}
+    for name, value in form.multi_items():
+        if hasattr(value, "file") and hasattr(value, "filename"):
+            value = {"upload": await upload_digest(value)}
+        out.setdefault(name, []).append(value)
+    return out
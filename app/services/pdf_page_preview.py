@@ -1,35 +1,250 @@
-"""Shared first-page PNG thumbnail and inline PDF responses."""
+"""Shared PDF page previews (thumbnails, editor pages, sprites) and inline PDF responses.
+
+Rendered pages are cached on local disk by (file id, file size, page, width), so list views
+that show the same thumbnails over and over neither download the PDF again nor re-rasterize
+it. Renders run on a small dedicated worker pool (PDF_PREVIEW_CONCURRENCY) instead of the
+request thread pool; concurrent requests for the same image share one render, and requests
+beyond PDF_PREVIEW_MAX_PENDING are turned away with 503 rather than queueing without bound.
+
+A sprite is N consecutive pages stacked vertically into one PNG, with a JSON layout giving
+each page's offset, so editors can show a whole document with two requests.
+"""
 from __future__ import annotations
 
+import json
+import logging
+import os
 import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
 from fastapi.responses import Response
 
+logger = logging.getLogger(__name__)
 
-def pdf_first_page_png(pdf_bytes: bytes, w: int = 200) -> bytes:
+PDF_PREVIEW_CACHE_DIR = Path(os.getenv("PDF_PREVIEW_CACHE_DIR", "var/cache/pdf_previews"))
+PDF_PREVIEW_CONCURRENCY = max(1, int(os.getenv("PDF_PREVIEW_CONCURRENCY", "2")))
+PDF_PREVIEW_MAX_PENDING = max(1, int(os.getenv("PDF_PREVIEW_MAX_PENDING", "16")))
+PDF_PREVIEW_TIMEOUT_S = 60
+PDF_PREVIEW_CACHE_MAX_FILES = 4000
+# Sprites are one bitmap: cap both the page count and the width to bound its memory.
+PDF_SPRITE_MAX_PAGES = 20
+PDF_SPRITE_MAX_WIDTH = 480
+
+PdfLoader = Callable[[], bytes]
+
+
+def clamp_thumbnail_width(w: Optional[int]) -> int:
+    return max(80, min(480, int(w or 200)))
+
+
+def clamp_page_width(w: Optional[int]) -> int:
+    """Editor page renders may be much wider than list thumbnails."""
+    return max(80, min(1600, int(w or 800)))
+
+
+def _open_pdf(pdf_bytes: bytes):
     try:
         import fitz  # PyMuPDF
     except ImportError:
         raise HTTPException(503, "PDF thumbnails unavailable")
-    tw = max(80, min(480, int(w or 200)))
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        return fitz, fitz.open(stream=pdf_bytes, filetype="pdf")
     except Exception:
         raise HTTPException(400, "Invalid PDF")
+
+
+def _pixmap(fitz, page, width: int):
+    scale = width / (float(page.rect.width) or 1.0)
+    return page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+
+
+def render_pdf_pages(pdf_bytes: bytes, pages: List[int], w: int) -> Dict[int, bytes]:
+    """PNG per requested page (0-based) from one open of the document; missing pages are skipped."""
+    fitz, doc = _open_pdf(pdf_bytes)
+    try:
+        if doc.page_count < 1:
+            raise HTTPException(400, "Empty PDF")
+        return {i: _pixmap(fitz, doc[i], w).tobytes("png") for i in pages if 0 <= i < doc.page_count}
+    finally:
+        doc.close()
+
+
+def render_pdf_sprite(pdf_bytes: bytes, first: int, count: int, w: int) -> Tuple[bytes, Dict[str, Any]]:
+    """Pages first..first+count-1 stacked top to bottom in one PNG, plus their layout."""
+    fitz, doc = _open_pdf(pdf_bytes)
     try:
         if doc.page_count < 1:
             raise HTTPException(400, "Empty PDF")
-        page = doc[0]
-        pw = float(page.rect.width) or 1.0
-        scale = tw / pw
-        mat = fitz.Matrix(scale, scale)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        return pix.tobytes("png")
+        if first < 0 or first >= doc.page_count:
+            raise HTTPException(404, "Page not found")
+        pixmaps = [_pixmap(fitz, doc[i], w) for i in range(first, min(doc.page_count, first + count))]
+        width = max(p.width for p in pixmaps)
+        height = sum(p.height for p in pixmaps)
+        sprite = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+        sprite.clear_with(255)
+        layout_pages = []
+        y = 0
+        for offset, pix in enumerate(pixmaps):
+            pix.set_origin(0, y)
+            sprite.copy(pix, pix.irect)
+            layout_pages.append({"page": first + offset, "y": y, "width": pix.width, "height": pix.height})
+            y += pix.height
+        layout = {"page_count": doc.page_count, "width": width, "height": height, "pages": layout_pages}
+        return sprite.tobytes("png"), layout
     finally:
         doc.close()
 
 
+def pdf_first_page_png(pdf_bytes: bytes, w: int = 200) -> bytes:
+    return render_pdf_pages(pdf_bytes, [0], clamp_thumbnail_width(w))[0]
+
+
+def _cache_path(name: str) -> Path:
+    return PDF_PREVIEW_CACHE_DIR / name
+
+
+def _cache_read(name: str) -> Optional[bytes]:
+    try:
+        path = _cache_path(name)
+        return path.read_bytes() if path.is_file() else None
+    except OSError:
+        return None
+
+
+def _cache_write(name: str, content: bytes) -> None:
+    try:
+        PDF_PREVIEW_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = _cache_path(f".{name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, _cache_path(name))
+    except OSError as e:
+        logger.warning("pdf preview cache write failed: %s", e)
+
+
+def _evict_cache_if_needed() -> None:
+    try:
+        files = [p for p in PDF_PREVIEW_CACHE_DIR.iterdir() if p.is_file()]
+    except OSError:
+        return
+    overflow = len(files) - PDF_PREVIEW_CACHE_MAX_FILES
+    if overflow <= 0:
+        return
+    files.sort(key=lambda p: p.stat().st_mtime)
+    for p in files[: overflow + 100]:
+        try:
+            p.unlink()
+        except OSError:
+            pass
+
+
+def _page_name(file_id: Any, size_bytes: Optional[int], page: int, w: int) -> str:
+    return f"{file_id}_{int(size_bytes or 0)}_p{page}_w{w}.png"
+
+
+def _sprite_stem(file_id: Any, size_bytes: Optional[int], first: int, count: int, w: int) -> str:
+    return f"{file_id}_{int(size_bytes or 0)}_s{first}-{count}_w{w}"
+
+
+class _RenderPool:
+    """Bounded render workers; identical jobs in flight share one Future."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self._workers = workers
+        self._max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}
+        # Re-entrant: a Future that is already done runs its done-callback right here.
+        self._lock = threading.RLock()
+
+    def run(self, key: str, fn: Callable[[], Any], timeout: float = PDF_PREVIEW_TIMEOUT_S) -> Any:
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is None:
+                if len(self._inflight) >= self._max_pending:
+                    raise HTTPException(503, "PDF preview busy, retry shortly")
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="pdf-preview")
+                fut = self._executor.submit(fn)
+                self._inflight[key] = fut
+                fut.add_done_callback(lambda _f, k=key: self._done(k))
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeout:
+            raise HTTPException(503, "PDF preview timed out, retry shortly")
+
+    def _done(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = _RenderPool(PDF_PREVIEW_CONCURRENCY, PDF_PREVIEW_MAX_PENDING)
+
+
+def cached_pdf_page_png(file_id: Any, size_bytes: Optional[int], page: int, w: int, load_pdf: PdfLoader) -> bytes:
+    """One page as PNG; the PDF is only loaded (via load_pdf) on a cache miss."""
+    name = _page_name(file_id, size_bytes, page, w)
+    hit = _cache_read(name)
+    if hit is not None:
+        return hit
+
+    def render() -> bytes:
+        again = _cache_read(name)
+        if again is not None:
+            return again
+        png = render_pdf_pages(load_pdf(), [page], w).get(page)
+        if png is None:
+            raise HTTPException(404, "Page not found")
+        _cache_write(name, png)
+        _evict_cache_if_needed()
+        return png
+
+    return _pool.run(name, render)
+
+
+def cached_pdf_sprite(
+    file_id: Any,
+    size_bytes: Optional[int],
+    first: int,
+    count: int,
+    w: int,
+    load_pdf: PdfLoader,
+) -> Tuple[bytes, Dict[str, Any]]:
+    count = max(1, min(PDF_SPRITE_MAX_PAGES, int(count)))
+    w = min(PDF_SPRITE_MAX_WIDTH, w)
+    stem = _sprite_stem(file_id, size_bytes, first, count, w)
+    png, layout = _cache_read(f"{stem}.png"), _cache_read(f"{stem}.json")
+    if png is not None and layout is not None:
+        return png, json.loads(layout)
+
+    def render() -> Tuple[bytes, Dict[str, Any]]:
+        png, layout = render_pdf_sprite(load_pdf(), first, count, w)
+        _cache_write(f"{stem}.png", png)
+        _cache_write(f"{stem}.json", json.dumps(layout).encode())
+        _evict_cache_if_needed()
+        return png, layout
+
+    return _pool.run(stem, render)
+
+
+def png_response(png: bytes, max_age: int = 86400) -> Response:
+    return Response(content=png, media_type="image/png", headers={"Cache-Control": f"private, max-age={max_age}"})
+
+
+def shutdown_pdf_preview_pool() -> None:
+    _pool.shutdown()
+
+
 def inline_pdf_response(pdf_bytes: bytes, name: str) -> Response:
     safe = re.sub(r"[^\w\s.-]", "_", (name or "document").strip())[:120] or "document"
     return Response(
@@ -54,10 +54,8 @@ def can_modify_shift(user: User, shift, db: Session) -> bool:
         return True
     
     # Check if user is supervisor of the worker
-    from ..models.models import EmployeeProfile
-    worker_profile = db.query(EmployeeProfile).filter(EmployeeProfile.user_id == shift.worker_id).first()
-    is_worker_supervisor = worker_profile and worker_profile.manager_user_id and str(worker_profile.manager_user_id) == str(user.id)
-    if is_worker_supervisor:
+    from .hierarchy import get_hierarchy_index
+    if shift.worker_id and get_hierarchy_index(db).manager_of(str(shift.worker_id)) == str(user.id):
         return True
     
     # Check if user is on-site lead of the project
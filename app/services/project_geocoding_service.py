@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import logging
-import threading
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Optional
 
@@ -87,13 +87,39 @@ def mark_manual_geocoding(project: Project) -> None:
     project.geocoding_error = None
 
 
-def geocode_address_string(address: str) -> tuple[Optional[float], Optional[float], Optional[str], Optional[str]]:
-    """Returns (lat, lng, formatted_address, error_message)."""
+@dataclass(frozen=True)
+class GeocodeResult:
+    """One geocoder answer. status is "ok", "not_found" (the address itself is bad; cached
+    like a success) or "error" (quota, network, configuration; never cached)."""
+
+    status: str
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    formatted_address: Optional[str] = None
+    error: Optional[str] = None
+    retryable: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status == GEOCODE_OK
+
+
+GEOCODE_OK = "ok"
+GEOCODE_NOT_FOUND = "not_found"
+GEOCODE_ERROR = "error"
+
+# Google statuses that describe the address rather than the request.
+_NOT_FOUND_STATUSES = {"ZERO_RESULTS", "INVALID_REQUEST"}
+_RETRYABLE_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+
+def google_geocode(address: str) -> GeocodeResult:
+    """Geocode one address with the Google Geocoding API."""
     if not address or not address.strip():
-        return None, None, None, "Empty address"
+        return GeocodeResult(GEOCODE_NOT_FOUND, error="Empty address")
     api_key = settings.google_places_api_key
     if not api_key:
-        return None, None, None, "Geocoding API key not configured"
+        return GeocodeResult(GEOCODE_ERROR, error="Geocoding API key not configured")
     try:
         client = _get_geocoding_client()
         r = client.get(
@@ -102,28 +128,41 @@ def geocode_address_string(address: str) -> tuple[Optional[float], Optional[floa
         )
         r.raise_for_status()
         data = r.json()
+    except httpx.HTTPStatusError as exc:
+        logger.warning("geocoding_http_error", extra={"error": str(exc)})
+        code = exc.response.status_code
+        return GeocodeResult(GEOCODE_ERROR, error=f"HTTP error: {exc}", retryable=code == 429 or code >= 500)
     except httpx.HTTPError as exc:
         logger.warning("geocoding_http_error", extra={"error": str(exc)})
-        return None, None, None, f"HTTP error: {exc}"
+        return GeocodeResult(GEOCODE_ERROR, error=f"HTTP error: {exc}", retryable=True)
 
     status = data.get("status")
     if status != "OK":
-        err = data.get("error_message") or status or "Geocoding failed"
+        err = str(data.get("error_message") or status or "Geocoding failed")[:500]
         logger.info("geocoding_failed", extra={"status": status, "address_len": len(address)})
-        return None, None, None, str(err)[:500]
+        if status in _NOT_FOUND_STATUSES:
+            return GeocodeResult(GEOCODE_NOT_FOUND, error=err)
+        return GeocodeResult(GEOCODE_ERROR, error=err, retryable=status in _RETRYABLE_STATUSES)
 
     results = data.get("results") or []
     if not results:
-        return None, None, None, "No results"
+        return GeocodeResult(GEOCODE_NOT_FOUND, error="No results")
 
     top = results[0]
     loc = (top.get("geometry") or {}).get("location") or {}
     lat = loc.get("lat")
     lng = loc.get("lng")
-    formatted = top.get("formatted_address")
     if not is_valid_coordinate(lat, lng):
-        return None, None, None, "Invalid coordinates returned"
-    return float(lat), float(lng), formatted, None
+        return GeocodeResult(GEOCODE_NOT_FOUND, error="Invalid coordinates returned")
+    return GeocodeResult(GEOCODE_OK, float(lat), float(lng), top.get("formatted_address"))
+
+
+def geocode_address_string(address: str) -> tuple[Optional[float], Optional[float], Optional[str], Optional[str]]:
+    """Returns (lat, lng, formatted_address, error_message)."""
+    result = google_geocode(address)
+    if result.ok:
+        return result.lat, result.lng, result.formatted_address, None
+    return None, None, None, result.error
 
 
 def geocode_project_sync(db: Session, project_id: str, *, force: bool = False) -> bool:
@@ -168,34 +207,43 @@ def geocode_project_sync(db: Session, project_id: str, *, force: bool = False) -
     return False
 
 
-def _geocode_project_background(project_id: str) -> None:
+def enqueue_projects_geocoding(db: Session, projects: list[Project]) -> int:
+    """Queue projects on the shared geocoding pool; returns how many were accepted.
+
+    Projects whose normalized address matches one already queued or in flight join that job,
+    so a site with many projects costs one geocoder call."""
+    from .geocoding_queue import get_geocoding_queue
+
+    site_ids = {p.site_id for p in projects if getattr(p, "site_id", None)}
+    sites = {}
+    if site_ids:
+        sites = {s.id: s for s in db.query(ClientSite).filter(ClientSite.id.in_(site_ids)).all()}
+    geocoding_queue = get_geocoding_queue()
+    accepted = 0
+    for project in projects:
+        address = normalize_project_address(project, sites.get(getattr(project, "site_id", None)))
+        if address and geocoding_queue.submit(str(project.id), address):
+            accepted += 1
+    return accepted
+
+
+def schedule_project_geocoding(project_id: str) -> None:
     db = SessionLocal()
     try:
-        geocode_project_sync(db, project_id)
-    except Exception as exc:
-        logger.exception("geocoding_background_error", extra={"project_id": project_id, "error": str(exc)})
+        project = db.query(Project).filter(Project.id == project_id, Project.deleted_at.is_(None)).first()
+        if project:
+            enqueue_projects_geocoding(db, [project])
     finally:
         db.close()
 
 
-def schedule_project_geocoding(project_id: str) -> None:
-    thread = threading.Thread(
-        target=_geocode_project_background,
-        args=(str(project_id),),
-        daemon=True,
-        name=f"geocode-project-{project_id}",
-    )
-    thread.start()
-
-
 def schedule_geocoding_for_site_projects(db: Session, site_id: str) -> None:
     projects = (
-        db.query(Project.id)
+        db.query(Project)
         .filter(Project.site_id == site_id, Project.deleted_at.is_(None))
         .all()
     )
-    for (pid,) in projects:
-        schedule_project_geocoding(str(pid))
+    enqueue_projects_geocoding(db, projects)
 
 
 def maybe_schedule_geocoding_after_project_save(
@@ -219,4 +267,4 @@ def maybe_schedule_geocoding_after_project_save(
     if status == GEOCODING_STATUS_MANUAL and has_coords:
         return
 
-    schedule_project_geocoding(str(project.id))
+    enqueue_projects_geocoding(db, [project])
@@ -1,14 +1,27 @@
-"""Lightweight map points for Projects Map View."""
+"""Lightweight map points and clustered map tiles for Projects Map View.
+
+Counts and clusters are computed in SQL. Clusters group projects by a geohash prefix
+(Project.geohash, maintained on every save) whose cell size follows the zoom level, so a
+zoomed-out viewport returns a few dozen centroids instead of every project. Only leaf points
+(zoomed in, or few enough projects in view) load client, site and user details.
+"""
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+import math
 from typing import Any, Optional
 
-from sqlalchemy.orm import Session
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import and_, case, func, not_
+from sqlalchemy.orm import Query, Session
 
 from ..models.models import Client, ClientSite, EmployeeProfile, Project, SettingItem, SettingList, User
 from .map_address_format import format_map_address
 from .project_geocoding_service import is_valid_coordinate
+from ..utils.geohash import precision_for_zoom
 from .project_list_filters import (
     BusinessProjectListFilters,
     apply_bounding_box_filter,
@@ -17,6 +30,11 @@ from .project_list_filters import (
 
 logger = logging.getLogger(__name__)
 
+# Above this zoom the map shows individual pins with popups.
+CLUSTER_MAX_ZOOM = 14
+# A viewport with at most this many projects is returned as leaf points at any zoom.
+LEAF_MAX_POINTS = 100
+
 
 def _format_map_address(project: Project, site: Optional[ClientSite]) -> dict[str, Optional[str]]:
     if site and getattr(project, "site_id", None):
@@ -101,52 +119,87 @@ def _resolve_division_names(project: Project, div_map: dict[str, str]) -> list[s
     return names
 
 
-def get_project_map_points(
-    db: Session,
-    user: User,
-    business_line: Optional[str],
-    filters: BusinessProjectListFilters,
-    *,
-    is_bidding: bool = False,
-    north: Optional[float] = None,
-    south: Optional[float] = None,
-    east: Optional[float] = None,
-    west: Optional[float] = None,
-    zoom: Optional[float] = None,
-) -> dict[str, Any]:
-    base_query = build_business_projects_query(
-        db, user, business_line, filters, is_bidding=is_bidding,
+def _valid_coordinate_clause():
+    """SQL twin of is_valid_coordinate()."""
+    return and_(
+        Project.lat.isnot(None),
+        Project.lng.isnot(None),
+        Project.lat.between(-90, 90),
+        Project.lng.between(-180, 180),
+        not_(and_(Project.lat == 0, Project.lng == 0)),
     )
-    if base_query is None:
-        return {"items": [], "mapped_count": 0, "unmapped_count": 0, "total_matching": 0}
 
-    all_matching = base_query.all()
-    total_matching = len(all_matching)
 
-    mapped_projects = []
-    unmapped_count = 0
-    for p in all_matching:
-        lat = getattr(p, "lat", None)
-        lng = getattr(p, "lng", None)
-        if is_valid_coordinate(lat, lng):
-            mapped_projects.append(p)
-        else:
-            unmapped_count += 1
+def tile_bounds(z: int, x: int, y: int) -> dict[str, float]:
+    """Web-mercator (slippy map) tile z/x/y -> north/south/east/west in degrees."""
+    n = 2 ** z
 
-    mapped_count = len(mapped_projects)
+    def _lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
 
-    viewport_query = apply_bounding_box_filter(
-        base_query,
-        north=north,
-        south=south,
-        east=east,
-        west=west,
+    return {
+        "north": _lat(y),
+        "south": _lat(y + 1),
+        "west": x / n * 360.0 - 180.0,
+        "east": (x + 1) / n * 360.0 - 180.0,
+    }
+
+
+def parse_tile(tile: Optional[str]) -> Optional[tuple[int, int, int]]:
+    """"z/x/y" -> (z, x, y); None when missing or out of range."""
+    if not tile:
+        return None
+    try:
+        z, x, y = (int(part) for part in tile.strip("/").split("/"))
+    except ValueError:
+        return None
+    if not (0 <= z <= 22) or not (0 <= x < 2 ** z) or not (0 <= y < 2 ** z):
+        return None
+    return z, x, y
+
+
+def _cluster_rows(viewport_query: Query, precision: int) -> list:
+    cell = func.substr(Project.geohash, 1, precision)
+    return (
+        viewport_query.order_by(None)
+        .filter(Project.geohash.isnot(None))
+        .with_entities(
+            cell.label("cell"),
+            func.count(Project.id),
+            func.avg(Project.lat),
+            func.avg(Project.lng),
+            func.min(Project.lat),
+            func.max(Project.lat),
+            func.min(Project.lng),
+            func.max(Project.lng),
+        )
+        .group_by(cell)
+        .all()
     )
-    if north is not None and south is not None and east is not None and west is not None:
-        projects = viewport_query.all()
-    else:
-        projects = mapped_projects
 
+
+def _cluster_payload(rows: list) -> list[dict[str, Any]]:
+    clusters = []
+    for cell, count, lat, lng, lat_min, lat_max, lng_min, lng_max in rows:
+        clusters.append(
+            {
+                "id": cell,
+                "count": int(count),
+                "latitude": round(float(lat), 6),
+                "longitude": round(float(lng), 6),
+                "bounds": {
+                    "north": float(lat_max),
+                    "south": float(lat_min),
+                    "east": float(lng_max),
+                    "west": float(lng_min),
+                },
+            }
+        )
+    clusters.sort(key=lambda c: c["id"])
+    return clusters
+
+
+def _leaf_items(db: Session, projects: list) -> list[dict[str, Any]]:
     site_ids = list({getattr(p, "site_id", None) for p in projects if getattr(p, "site_id", None)})
     sites_map: dict[str, ClientSite] = {}
     if site_ids:
@@ -216,13 +269,128 @@ def get_project_map_points(
                 "end_date": end.date().isoformat() if end else None,
             }
         )
+    return items
 
-    if zoom is not None:
-        logger.debug("map_points_query", extra={"zoom": zoom, "items": len(items), "total": total_matching})
 
-    return {
-        "items": items,
+def get_project_map_points(
+    db: Session,
+    user: User,
+    business_line: Optional[str],
+    filters: BusinessProjectListFilters,
+    *,
+    is_bidding: bool = False,
+    north: Optional[float] = None,
+    south: Optional[float] = None,
+    east: Optional[float] = None,
+    west: Optional[float] = None,
+    zoom: Optional[float] = None,
+    tile: Optional[str] = None,
+) -> dict[str, Any]:
+    """Map payload for the list filters. With a viewport (bounds or a "z/x/y" tile) and a zoom
+    at or below CLUSTER_MAX_ZOOM, dense areas come back as "clusters" (centroid + count) and
+    "items" only holds leaf points; otherwise every mapped project in view is a leaf."""
+    parsed_tile = parse_tile(tile)
+    if parsed_tile is not None:
+        zoom = parsed_tile[0]
+        bounds = tile_bounds(*parsed_tile)
+        north, south, east, west = bounds["north"], bounds["south"], bounds["east"], bounds["west"]
+
+    empty = {
+        "items": [],
+        "clusters": [],
+        "mode": "points",
+        "mapped_count": 0,
+        "unmapped_count": 0,
+        "total_matching": 0,
+    }
+    base_query = build_business_projects_query(
+        db, user, business_line, filters, is_bidding=is_bidding,
+    )
+    if base_query is None:
+        return empty
+
+    valid = _valid_coordinate_clause()
+    total_matching, mapped_count = (
+        base_query.order_by(None)
+        .with_entities(func.count(Project.id), func.coalesce(func.sum(case((valid, 1), else_=0)), 0))
+        .one()
+    )
+    total_matching = int(total_matching or 0)
+    mapped_count = int(mapped_count or 0)
+    out = {
+        **empty,
         "mapped_count": mapped_count,
-        "unmapped_count": unmapped_count,
+        "unmapped_count": total_matching - mapped_count,
         "total_matching": total_matching,
     }
+
+    has_viewport = north is not None and south is not None and east is not None and west is not None
+    viewport_query = apply_bounding_box_filter(
+        base_query.filter(valid),
+        north=north,
+        south=south,
+        east=east,
+        west=west,
+    )
+
+    leaf_query = viewport_query
+    if has_viewport and zoom is not None and float(zoom) <= CLUSTER_MAX_ZOOM:
+        precision = precision_for_zoom(float(zoom))
+        rows = _cluster_rows(viewport_query, precision)
+        in_view = sum(int(r[1]) for r in rows)
+        if in_view > LEAF_MAX_POINTS:
+            singles = [r[0] for r in rows if int(r[1]) == 1]
+            clusters = [r for r in rows if int(r[1]) > 1]
+            out["mode"] = "clusters"
+            out["precision"] = precision
+            out["clusters"] = _cluster_payload(clusters)
+            if not singles:
+                return out
+            # Lone projects in their cell are real pins; only those get details.
+            leaf_query = viewport_query.filter(
+                func.substr(Project.geohash, 1, precision).in_(singles)
+            )
+
+    projects = leaf_query.all()
+    out["items"] = _leaf_items(db, projects)
+    if zoom is not None:
+        logger.debug(
+            "map_points_query",
+            extra={"zoom": zoom, "items": len(out["items"]), "clusters": len(out["clusters"]), "total": total_matching},
+        )
+    return out
+
+
+def map_points_response(request: Request, payload: dict[str, Any]) -> Response:
+    """JSON response with a content ETag; answers If-None-Match with 304 so browsers re-use
+    tiles they already hold."""
+    body = json.dumps(payload, separators=(",", ":"), sort_keys=True, default=str).encode()
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    inm = request.headers.get("if-none-match")
+    if inm and etag in [t.strip() for t in inm.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def backfill_project_geohashes(db: Session, batch_size: int = 1000) -> int:
+    """Fill Project.geohash for rows geocoded before the column existed (startup)."""
+    from ..utils.geohash import geohash_or_none
+
+    updated = 0
+    while True:
+        rows = (
+            db.query(Project.id, Project.lat, Project.lng)
+            .filter(Project.geohash.is_(None), Project.lat.isnot(None), Project.lng.isnot(None))
+            .limit(batch_size)
+            .all()
+        )
+        values = [{"id": pid, "geohash": geohash_or_none(lat, lng) or ""} for pid, lat, lng in rows]
+        if not values:
+            return updated
+        # Invalid coordinates get "" so they are not re-scanned on every boot.
+        db.bulk_update_mappings(Project, values)
+        db.commit()
+        updated += len(values)
+        if len(values) < batch_size:
+            return updated
@@ -0,0 +1,204 @@
+"""Materialized review cycle progress: one review_cycle_progress row per (cycle, reviewee).
+
+Rows hold what HR status, the director meeting board and cross-cycle views used to rebuild on
+every request: the self / supervisor assignment picked for the reviewee, their statuses and
+completion flags, and the merged director 1:1 schedule entry. They are kept current inside the
+same transaction as the change that affects them: assignment inserts/updates/deletes refresh
+their reviewee, and edits to a cycle's schedule or slot config refresh the whole cycle (session
+events below). Participant scope (company-wide cycles include every user) is re-evaluated by a
+full rebuild when a cycle is first read, when its scope changes, and at most
+PROGRESS_SCOPE_TTL_S after the last rebuild.
+"""
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, event, inspect, insert
+from sqlalchemy.orm import Session
+
+from ..models.models import ReviewAssignment, ReviewCycle, ReviewCycleProgress, User
+
+PROGRESS_SCOPE_TTL_S = 900
+CLOSED_CYCLE_STATUSES = ("closed", "completed", "archived")
+
+_SESSION_KEY = "review_progress_pending"
+# Marker in the pending map: refresh every reviewee of the cycle (schedule / slot config change).
+_WHOLE_CYCLE = "*"
+_RESCOPE = "scope"
+
+
+def compute_reviewee_progress(
+    assignments: List[ReviewAssignment],
+    meeting: Optional[Dict[str, Any]],
+    slot_minutes: int,
+    in_scope: bool,
+) -> Dict[str, Any]:
+    """Status row for one reviewee from their assignments (oldest first) and schedule entry."""
+    from ..routes.reviews import _iso_utc_z, _parse_iso_dt
+
+    self_a = next((a for a in assignments if str(a.reviewee_user_id) == str(a.reviewer_user_id)), None)
+    mgr_a = next((a for a in assignments if str(a.reviewee_user_id) != str(a.reviewer_user_id)), None)
+    employee_self_done = self_a is not None and (self_a.status or "").lower() == "submitted"
+    supervisor_done = mgr_a is not None and (mgr_a.status or "").lower() == "submitted"
+    meet = meeting if isinstance(meeting, dict) else {}
+    until = meet.get("scheduled_until")
+    if not until and meet.get("scheduled_at"):
+        st = _parse_iso_dt(meet.get("scheduled_at"))
+        if st:
+            until = _iso_utc_z(st + timedelta(minutes=slot_minutes))
+    return {
+        "in_scope": in_scope,
+        "self_assignment_id": self_a.id if self_a else None,
+        "self_status": self_a.status if self_a else None,
+        "self_due_date": self_a.due_date if self_a else None,
+        "supervisor_assignment_id": mgr_a.id if mgr_a else None,
+        "supervisor_user_id": mgr_a.reviewer_user_id if mgr_a else None,
+        "supervisor_status": mgr_a.status if mgr_a else None,
+        "supervisor_due_date": mgr_a.due_date if mgr_a else None,
+        "employee_self_done": employee_self_done,
+        "supervisor_done": supervisor_done,
+        # No manager task in org chart → supervisor step does not block cycle completion.
+        "both_done": employee_self_done and (supervisor_done or mgr_a is None),
+        "meeting_scheduled_at": meet.get("scheduled_at"),
+        "meeting_scheduled_until": until,
+        "meeting_notes": meet.get("notes"),
+        "meeting_hr_pending_reschedule_at": meet.get("hr_pending_reschedule_at"),
+        "meeting_hr_pending_reschedule_message": meet.get("hr_pending_reschedule_message"),
+    }
+
+
+def refresh_cycle_progress(
+    db: Session,
+    cycle: ReviewCycle,
+    reviewee_ids: Optional[Iterable[uuid.UUID]] = None,
+    *,
+    rescope: bool = False,
+) -> int:
+    """Recompute rows of `reviewee_ids` (None = the whole cycle); rescope re-evaluates participant scope."""
+    from ..routes.reviews import _get_cycle_slot_duration, _sched_reviewee_entries, _scoped_reviewee_ids
+
+    targets: Optional[Set[uuid.UUID]] = None if reviewee_ids is None else set(reviewee_ids)
+    if targets is not None and not targets:
+        return 0
+    P = ReviewCycleProgress
+
+    q = db.query(ReviewAssignment).filter(ReviewAssignment.cycle_id == cycle.id)
+    if targets is not None:
+        q = q.filter(ReviewAssignment.reviewee_user_id.in_(list(targets)))
+    by_reviewee: Dict[uuid.UUID, List[ReviewAssignment]] = {}
+    for a in q.order_by(ReviewAssignment.created_at.asc(), ReviewAssignment.id.asc()).all():
+        by_reviewee.setdefault(a.reviewee_user_id, []).append(a)
+
+    sched_raw = getattr(cycle, "director_1on1_schedule", None)
+    sched = _sched_reviewee_entries(sched_raw if isinstance(sched_raw, dict) else {})
+    sched_ids = {uuid.UUID(k) for k in sched}
+    if targets is not None:
+        sched_ids &= targets
+    if sched_ids:
+        # Schedule keys may reference removed users; rows only exist for real users (FK).
+        sched_ids = {uid for (uid,) in db.query(User.id).filter(User.id.in_(list(sched_ids))).all()}
+
+    if rescope:
+        scoped = _scoped_reviewee_ids(cycle, db)
+        if targets is not None:
+            scoped &= targets
+    else:
+        sq = db.query(P.reviewee_user_id).filter(P.cycle_id == cycle.id, P.in_scope.is_(True))
+        if targets is not None:
+            sq = sq.filter(P.reviewee_user_id.in_(list(targets)))
+        scoped = {uid for (uid,) in sq.all()}
+
+    slot_minutes = _get_cycle_slot_duration(cycle)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for rid in set(by_reviewee) | sched_ids | scoped:
+        row = compute_reviewee_progress(by_reviewee.get(rid, []), sched.get(str(rid)), slot_minutes, rid in scoped)
+        row.update(cycle_id=cycle.id, reviewee_user_id=rid, updated_at=now)
+        rows.append(row)
+
+    stmt = delete(P).where(P.cycle_id == cycle.id)
+    if targets is not None:
+        stmt = stmt.where(P.reviewee_user_id.in_(list(targets)))
+    db.execute(stmt)
+    if rows:
+        db.execute(insert(P), rows)
+    if rescope:
+        cycle.progress_built_at = now
+    return len(rows)
+
+
+def ensure_cycle_progress(db: Session, cycles: Iterable[ReviewCycle]) -> int:
+    """Full rebuild of cycles never built or older than PROGRESS_SCOPE_TTL_S; commits when anything ran."""
+    now = datetime.now(timezone.utc)
+    rebuilt = 0
+    for c in cycles:
+        built = c.progress_built_at
+        if built is not None and built.tzinfo is None:
+            built = built.replace(tzinfo=timezone.utc)
+        if built is None or (now - built).total_seconds() > PROGRESS_SCOPE_TTL_S:
+            refresh_cycle_progress(db, c, rescope=True)
+            rebuilt += 1
+    if rebuilt:
+        db.commit()
+    return rebuilt
+
+
+def _mark(session: Session, cycle_id: Optional[uuid.UUID], what: Any) -> None:
+    if cycle_id is None:
+        return
+    pending: Dict[uuid.UUID, Any] = session.info.setdefault(_SESSION_KEY, {})
+    current = pending.get(cycle_id)
+    if what == _RESCOPE or current == _RESCOPE:
+        pending[cycle_id] = _RESCOPE
+    elif what == _WHOLE_CYCLE or current == _WHOLE_CYCLE:
+        pending[cycle_id] = _WHOLE_CYCLE
+    else:
+        pending[cycle_id] = (current or set()) | set(what)
+
+
+def _changed(obj: Any, *attrs: str) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_progress_changes(session: Session, flush_context) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, ReviewAssignment):
+            state = inspect(obj)
+            reviewees = {obj.reviewee_user_id} | set(state.attrs.reviewee_user_id.history.deleted or ())
+            cycles = {obj.cycle_id} | set(state.attrs.cycle_id.history.deleted or ())
+            for cid in cycles:
+                _mark(session, cid, {r for r in reviewees if r is not None})
+        elif isinstance(obj, ReviewCycle) and obj not in session.new and obj not in session.deleted:
+            if _changed(obj, "participant_scope"):
+                _mark(session, obj.id, _RESCOPE)
+            elif _changed(obj, "director_1on1_schedule", "director_1on1_slot_config"):
+                _mark(session, obj.id, _WHOLE_CYCLE)
+
+
+@event.listens_for(Session, "before_commit")
+def _materialize_before_commit(session: Session) -> None:
+    # Refreshing can flush again (and mark more work); a few rounds always settle.
+    for _ in range(3):
+        session.flush()
+        pending = session.info.pop(_SESSION_KEY, None)
+        if not pending:
+            return
+        for cycle_id, what in pending.items():
+            cycle = session.get(ReviewCycle, cycle_id)
+            if cycle is None:
+                continue
+            if what == _RESCOPE:
+                refresh_cycle_progress(session, cycle, rescope=True)
+            elif what == _WHOLE_CYCLE:
+                refresh_cycle_progress(session, cycle)
+            else:
+                refresh_cycle_progress(session, cycle, what)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
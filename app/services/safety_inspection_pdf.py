@@ -39,10 +39,11 @@ from sqlalchemy.orm import Session
 # Registers Montserrat (used in Paragraph styles)
 try:
     from ..proposals import pdf_dynamic as _pdf_dyn  # noqa: F401
-    from ..proposals.pdf_dynamic import _get_cached_bg_reader, wrap_text as _pdf_wrap_text
+    from ..proposals.pdf_dynamic import wrap_text as _pdf_wrap_text
+    from ..proposals.pdf_resources import background_reader as _background_reader
 except Exception:  # pragma: no cover
     _pdf_dyn = None  # type: ignore
-    _get_cached_bg_reader = None  # type: ignore
+    _background_reader = None  # type: ignore
     _pdf_wrap_text = None  # type: ignore
 
 try:
@@ -1296,22 +1297,22 @@ def build_safety_inspection_pdf_bytes(
     story.append(TopPadder(meta_table))
 
     tmpl_path = _template_bg_path()
-    use_bg = _get_cached_bg_reader and os.path.exists(tmpl_path)
+    use_bg = _background_reader and os.path.exists(tmpl_path)
 
     header_title = (template_name or "Safety inspection").strip() or "Safety inspection"
 
     def on_page(canvas: Any, doc: Any) -> None:
         canvas.saveState()
         try:
-            if use_bg and _get_cached_bg_reader:
-                bg = _get_cached_bg_reader(tmpl_path)
+            if use_bg and _background_reader:
+                bg = _background_reader(tmpl_path)
                 canvas.drawImage(bg, 0, 0, width=page_w, height=page_h)
             canvas.setFont("Helvetica", 8)
             canvas.setFillColor(colors.HexColor("#9ca3af"))
             suffix = " · INTERIM" if kind == "interim" else ""
             text = f"{project_code} · Page {canvas.getPageNumber()}{suffix}"
             canvas.drawRightString(page_w - _TOP_PAGE_CODE_RIGHT_INSET, _TOP_PAGE_CODE_LINE_Y, text)
-            if use_bg and _get_cached_bg_reader:
+            if use_bg and _background_reader:
                 _draw_mk_banner_header(
                     canvas,
                     title=header_title,
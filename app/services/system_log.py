@@ -44,3 +44,42 @@ def write_system_log(
     db.commit()
     db.refresh(entry)
     return entry
+
+
+def enqueue_system_log(
+    level: str,
+    category: str,
+    message: str,
+    *,
+    request_id: Optional[str] = None,
+    path: Optional[str] = None,
+    method: Optional[str] = None,
+    user_id: Optional[str] = None,
+    status_code: Optional[int] = None,
+    detail: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """
+    Non-blocking variant of write_system_log: the row is queued and bulk-inserted by the
+    background writer (see system_log_writer). Safe to call from async handlers.
+    Returns False when the entry was sampled out or the queue was full.
+    """
+    from .system_log_writer import build_row, get_system_log_writer
+
+    try:
+        return get_system_log_writer().submit(
+            build_row(
+                level,
+                category,
+                message,
+                request_id=request_id,
+                path=path,
+                method=method,
+                user_id=user_id,
+                status_code=status_code,
+                detail=detail,
+                extra=extra,
+            )
+        )
+    except Exception:
+        return False
@@ -0,0 +1,281 @@
+"""Background writer for system_logs.
+
+Request handlers (including the async exception handlers) only put a dict on a bounded
+in-memory queue; a daemon thread drains it and bulk-inserts rows in one transaction per
+batch. Repetitive entries (same category/status/method/path shape) are sampled so a 401
+or 404 storm after a deploy turns into a handful of rows instead of thousands of commits.
+"""
+from __future__ import annotations
+
+import queue
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models.models import SystemLog
+
+logger = structlog.get_logger()
+
+QUEUE_MAX_SIZE = 5000
+BATCH_SIZE = 200
+FLUSH_INTERVAL_SECONDS = 2.0
+
+# Per (category, status, method, path shape): keep the first SAMPLE_BURST entries of each
+# window, then one in SAMPLE_EVERY. Level "error" entries are never sampled, nor are the
+# categories below (each login failure matters most during a brute-force burst).
+SAMPLE_WINDOW_SECONDS = 60
+SAMPLE_BURST = 20
+SAMPLE_EVERY = 50
+UNSAMPLED_CATEGORIES = frozenset({"auth"})
+
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+_NUM_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+
+
+def path_shape(path: Optional[str]) -> str:
+    """Collapse ids in a path so /files/<uuid> storms share one sampling key."""
+    if not path:
+        return ""
+    return _NUM_SEGMENT_RE.sub("/:n", _UUID_RE.sub(":id", path))
+
+
+class _Sampler:
+    def __init__(self, window: float, burst: int, every: int):
+        self.window = window
+        self.burst = burst
+        self.every = max(1, every)
+        self._state: Dict[Tuple, List[float]] = {}  # key -> [window_start, seen, suppressed]
+
+    def admit(self, key: Tuple, now: float) -> Tuple[bool, int]:
+        """Return (keep, suppressed_since_last_kept)."""
+        st = self._state.get(key)
+        if st is None or now - st[0] >= self.window:
+            carried = int(st[2]) if st else 0
+            self._state[key] = [now, 1, 0]
+            if len(self._state) > 10000:
+                self._prune(now)
+            return True, carried
+        st[1] += 1
+        seen = int(st[1])
+        if seen <= self.burst or (seen - self.burst) % self.every == 0:
+            suppressed = int(st[2])
+            st[2] = 0
+            return True, suppressed
+        st[2] += 1
+        return False, 0
+
+    def _prune(self, now: float) -> None:
+        stale = [k for k, st in self._state.items() if now - st[0] >= self.window and not st[2]]
+        for k in stale:
+            self._state.pop(k, None)
+
+
+class SystemLogWriter:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        max_size: int = QUEUE_MAX_SIZE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        sample_window: float = SAMPLE_WINDOW_SECONDS,
+        sample_burst: int = SAMPLE_BURST,
+        sample_every: int = SAMPLE_EVERY,
+        autostart: bool = True,
+    ):
+        self._session_factory = session_factory
+        self._autostart = autostart
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._sampler = _Sampler(sample_window, sample_burst, sample_every)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+
+    # -- producer side -------------------------------------------------------
+
+    def submit(self, row: Dict[str, Any], *, sample: bool = True) -> bool:
+        """Queue a system_logs row (never blocks, never raises). Returns False if dropped."""
+        if sample and row.get("level") != "error" and row.get("category") not in UNSAMPLED_CATEGORIES:
+            key = (row.get("category"), row.get("status_code"), row.get("method"), path_shape(row.get("path")))
+            with self._lock:
+                keep, suppressed = self._sampler.admit(key, time.monotonic())
+                if not keep:
+                    self.sampled_out += 1
+                    return False
+            if suppressed:
+                row["extra"] = {**(row.get("extra") or {}), "sampled_suppressed": suppressed}
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        if self._autostart:
+            self._ensure_started()
+        return True
+
+    # -- consumer side -------------------------------------------------------
+
+    def _drain(self, first: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        rows = [first] if first is not None else []
+        while len(rows) < self._batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _dropped_summary_row(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        if not dropped:
+            return None
+        return build_row(
+            "warning",
+            "background",
+            f"System log queue full; dropped {dropped} entries",
+            extra={"dropped": dropped},
+        )
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        summary = self._dropped_summary_row()
+        if summary:
+            rows = rows + [summary]
+        if not rows:
+            return
+        with self._write_lock:
+            db = self._session_factory()
+            try:
+                db.execute(insert(SystemLog), rows)
+                db.commit()
+                self.written += len(rows)
+            except Exception as e:
+                db.rollback()
+                logger.warning("system_log_batch_failed", rows=len(rows), error=str(e))
+            finally:
+                db.close()
+
+    def flush(self) -> None:
+        """Synchronously write everything currently queued."""
+        while True:
+            rows = self._drain()
+            if not rows:
+                self._write([])
+                return
+            self._write(rows)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                self._write([])
+                continue
+            self._write(self._drain(first))
+        self.flush()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._stop.is_set() or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._loop, name="system-log-writer", daemon=True)
+            self._thread.start()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._ensure_started()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread after flushing whatever is queued (shutdown hook)."""
+        self._stop.set()
+        t = self._thread
+        if t is not None and t.is_alive():
+            t.join(timeout)
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+        }
+
+
+def _coerce_uuid(value: Any) -> Optional[uuid.UUID]:
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except (ValueError, TypeError):
+        return None
+
+
+def build_row(
+    level: str,
+    category: str,
+    message: str,
+    *,
+    request_id: Optional[str] = None,
+    path: Optional[str] = None,
+    method: Optional[str] = None,
+    user_id: Any = None,
+    status_code: Optional[int] = None,
+    detail: Optional[str] = None,
+    extra: Optional[Dict[str, Any]] = None,
+    entry_id: Optional[uuid.UUID] = None,
+) -> Dict[str, Any]:
+    return {
+        "id": entry_id or uuid.uuid4(),
+        "timestamp_utc": datetime.utcnow(),
+        "level": level,
+        "category": category,
+        "message": message,
+        "request_id": request_id,
+        "path": path[:512] if path else path,
+        "method": method,
+        "user_id": _coerce_uuid(user_id),
+        "status_code": status_code,
+        "detail": detail[:2000] if detail and len(detail) > 2000 else detail,
+        "extra": extra,
+    }
+
+
+_writer: Optional[SystemLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_system_log_writer() -> SystemLogWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                from ..db import SessionLocal
+
+                _writer = SystemLogWriter(SessionLocal)
+    return _writer
+
+
+def start_system_log_writer() -> None:
+    get_system_log_writer().start()
+    logger.info("system_log_writer_started", batch_size=BATCH_SIZE, max_queue=QUEUE_MAX_SIZE)
+
+
+def stop_system_log_writer() -> None:
+    if _writer is not None:
+        _writer.stop()
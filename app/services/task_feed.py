@@ -0,0 +1,151 @@
+"""Task board change feed.
+
+Tasks created or completed through services/task_service (any caller: task routes, dispatch,
+orders, auto tasks, training) are queued on the session with queue_task_change() and
+published when it commits; other writes in routes/tasks_v2 call publish_task_change() after
+commit. The event is pushed to the per-user and per-division channels on the WebSocket hub;
+clients then call GET /tasks/changes with their last cursor to fetch only the tasks that changed.
+
+Cursors are "<updated_at ISO>|<task id>" so they survive reconnects, worker restarts and
+multiple workers (the delta is answered from the DB, not from process memory). The push
+itself is not: the hub is per process, so a socket only hears about writes served by its
+own worker. Run the API with a single worker (as for chat), or accept that clients on other
+workers pick changes up on their /tasks/sync fallback poll.
+"""
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
+
+import structlog
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+
+from ..models.models import TaskItem
+from .chat_hub import hub
+
+logger = structlog.get_logger()
+
+TASK_CHANGED_EVENT = "task_changed"
+
+_SESSION_KEY = "task_feed_pending"
+
+
+def user_channel(user_id) -> str:
+    return f"tasks:user:{user_id}"
+
+
+def division_channel(label: str) -> str:
+    return f"tasks:division:{label}"
+
+
+def viewer_channels(user_id, division_labels: Iterable[str]) -> List[str]:
+    return [user_channel(user_id)] + [division_channel(d) for d in division_labels if d]
+
+
+def task_channels(
+    task: TaskItem,
+    *,
+    previous_user_id: Optional[uuid.UUID] = None,
+    previous_division: Optional[str] = None,
+) -> Set[str]:
+    """Channels that can see the task now, plus the ones it just left (reassignment)."""
+    channels: Set[str] = set()
+    for uid in (task.assigned_to_id, previous_user_id, task.requested_by_id):
+        if uid:
+            channels.add(user_channel(uid))
+    for label in (task.assigned_division_label, previous_division):
+        if label:
+            channels.add(division_channel(label))
+    return channels
+
+
+def encode_cursor(updated_at: Optional[datetime], task_id) -> Optional[str]:
+    if updated_at is None:
+        return None
+    return f"{updated_at.isoformat()}|{task_id}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, uuid.UUID]]:
+    """Parse a cursor; raises ValueError on malformed input."""
+    if not cursor:
+        return None
+    ts_raw, _, id_raw = cursor.partition("|")
+    return datetime.fromisoformat(ts_raw), uuid.UUID(id_raw)
+
+
+def after_cursor_filter(position: Tuple[datetime, uuid.UUID]):
+    ts, task_id = position
+    return or_(
+        TaskItem.updated_at > ts,
+        and_(TaskItem.updated_at == ts, TaskItem.id > task_id),
+    )
+
+
+def _push(channels: Set[str], payload: dict) -> None:
+    if not channels:
+        return
+    try:
+        import anyio
+
+        anyio.from_thread.run(hub.publish, channels, TASK_CHANGED_EVENT, payload)
+    except RuntimeError:
+        # Not called from an AnyIO worker thread (no event loop to hand off to).
+        pass
+    except Exception as e:
+        logger.warning("task_feed_publish_failed", task_id=payload.get("task_id"), error=str(e))
+
+
+def _task_event(task: TaskItem, kind: str) -> Tuple[Set[str], dict]:
+    return task_channels(task), {"task_id": str(task.id), "kind": kind, "cursor": encode_cursor(task.updated_at, task.id)}
+
+
+def queue_task_change(db: Session, task: TaskItem, kind: str) -> None:
+    """
+    Publish a task_changed event for ``task`` once ``db`` commits (nothing on rollback).
+    The event is re-read on every flush so later edits in the same transaction are included.
+    """
+    pending = db.info.setdefault(_SESSION_KEY, {})
+    previous = pending.get(task.id)
+    if previous is not None and previous[1] == "created":
+        kind = "created"
+    pending[task.id] = [task, kind, _task_event(task, kind)]
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_pending_events(session: Session, flush_context) -> None:
+    for entry in session.info.get(_SESSION_KEY, {}).values():
+        entry[2] = _task_event(entry[0], entry[1])
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_on_commit(session: Session) -> None:
+    for _task, _kind, (channels, payload) in session.info.pop(_SESSION_KEY, {}).values():
+        _push(channels, payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+def publish_task_change(
+    task: TaskItem,
+    kind: str,
+    *,
+    previous_user_id: Optional[uuid.UUID] = None,
+    previous_division: Optional[str] = None,
+) -> None:
+    """
+    Push a task_changed event to subscribers. Call after commit from sync route code
+    (runs on a threadpool worker); silently a no-op outside a request (scripts, schedulers).
+    kind: created | updated | archived | log
+    """
+    _, payload = _task_event(task, kind)
+    _push(task_channels(task, previous_user_id=previous_user_id, previous_division=previous_division), payload)
+
+
+def publish_task_deleted(task_id, channels: Set[str]) -> None:
+    """Deleted rows never show up in /tasks/changes; channels must be captured before delete."""
+    _push(channels, {"task_id": str(task_id), "kind": "deleted", "cursor": None})
@@ -11,6 +11,7 @@ from ..models.models import (
     TaskRequest,
     User,
 )
+from .task_feed import queue_task_change
 
 
 def _resolve_user_display(db: Session, user_id: Optional[uuid.UUID]) -> Optional[str]:
@@ -80,6 +81,7 @@ def create_task_item(
     db.flush()
     if request:
         request.accepted_task_id = task.id
+    queue_task_change(db, task, "created")
     return task
 
 
@@ -132,6 +134,8 @@ def complete_tasks_for_origin(
         task.concluded_at = now
         task.concluded_by_id = concluded_by_id
         task.concluded_by_name = concluded_by_name
+        task.updated_at = now
+        queue_task_change(db, task, "updated")
 
 
 def get_user_display(db: Session, user_id: Optional[uuid.UUID]) -> Optional[str]:
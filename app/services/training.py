@@ -26,9 +26,10 @@ from ..models.models import (
 from ..training_matrix_catalog import normalize_matrix_training_id
 from .training_matrix_slots import is_valid_matrix_training_id
 from .task_service import create_task_item, get_user_display
+from .training_compliance import invalidate_training_compliance_cache
 from ..storage.provider import StorageProvider
 from ..storage.local_provider import LocalStorageProvider
-from ..storage.blob_provider import BlobStorageProvider
+from ..storage.registry import get_default_provider
 from ..config import settings
 
 
@@ -128,10 +129,7 @@ def sync_course_completion_to_employee_record(course: TrainingCourse, user_id: u
 
 def get_storage() -> StorageProvider:
     """Get storage provider based on configuration"""
-    if settings.azure_blob_connection and settings.azure_blob_container:
-        return BlobStorageProvider()
-    else:
-        return LocalStorageProvider()
+    return get_default_provider()
 
 
 def get_required_courses_for_user(user_id: uuid.UUID, db: Session) -> List[TrainingCourse]:
@@ -544,6 +542,7 @@ def generate_certificate(course_id: uuid.UUID, user_id: uuid.UUID, db: Session)
     db.add(certificate)
     db.commit()
     db.refresh(certificate)
+    invalidate_training_compliance_cache()
     
     # Create renewal task if certificate expires
     if expires_at:
@@ -727,6 +726,7 @@ def publish_course(course_id: uuid.UUID, db: Session) -> Tuple[bool, Optional[st
     course.updated_at = datetime.utcnow()
     
     db.commit()
+    invalidate_training_compliance_cache()
     
     # Assign to required users
     assign_course_to_users(course_id, db)
@@ -743,6 +743,7 @@ def unpublish_course(course_id: uuid.UUID, db: Session) -> None:
     course.status = "draft"
     course.updated_at = datetime.utcnow()
     db.commit()
+    invalidate_training_compliance_cache()
 
 
 def duplicate_course(course_id: uuid.UUID, new_title: str, created_by: uuid.UUID, db: Session) -> Optional[TrainingCourse]:
@@ -0,0 +1,250 @@
+"""Training compliance: overdue / expiring-soon certificates computed set-wise.
+
+Only the latest certificate per (user, course) counts — a renewed certificate clears the
+older expired one. Everything is answered from one windowed query joined to the course,
+user and profile rows, so the cost no longer grows with the number of historical
+certificates × per-row lookups.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from ..models.models import (
+    EmployeeProfile,
+    TrainingCertificate,
+    TrainingCourse,
+    TrainingProgress,
+    User,
+)
+from .audit_log_entries import display_name
+
+DEFAULT_EXPIRING_WITHIN_DAYS = 30
+SUMMARY_CACHE_TTL_S = 60
+
+STATUS_OVERDUE = "overdue"
+STATUS_EXPIRING = "expiring_soon"
+
+CSV_HEADERS = [
+    "Employee",
+    "Username",
+    "Course",
+    "Certificate Number",
+    "Issued At",
+    "Expires At",
+    "Status",
+    "Days Overdue",
+    "Days Remaining",
+]
+
+_summary_lock = threading.Lock()
+_summary_cache: Dict[int, Dict[str, Any]] = {}
+
+
+def invalidate_training_compliance_cache() -> None:
+    """Drop cached dashboard summaries (call after issuing certificates or changing courses)."""
+    with _summary_lock:
+        _summary_cache.clear()
+
+
+def latest_certificates_subquery(db: Session):
+    """Latest certificate per (user_id, course_id) via ROW_NUMBER()."""
+    rn = (
+        func.row_number()
+        .over(
+            partition_by=(TrainingCertificate.user_id, TrainingCertificate.course_id),
+            order_by=(TrainingCertificate.issued_at.desc(), TrainingCertificate.id.desc()),
+        )
+        .label("rn")
+    )
+    ranked = db.query(
+        TrainingCertificate.id.label("certificate_id"),
+        TrainingCertificate.user_id.label("user_id"),
+        TrainingCertificate.course_id.label("course_id"),
+        TrainingCertificate.issued_at.label("issued_at"),
+        TrainingCertificate.expires_at.label("expires_at"),
+        TrainingCertificate.certificate_number.label("certificate_number"),
+        rn,
+    ).subquery("ranked_certs")
+    return (
+        db.query(ranked)
+        .filter(ranked.c.rn == 1, ranked.c.expires_at.isnot(None))
+        .subquery("latest_certs")
+    )
+
+
+def _naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is not None and dt.tzinfo is not None:
+        return dt.replace(tzinfo=None) - (dt.utcoffset() or timedelta(0))
+    return dt
+
+
+def _compliance_query(db: Session, now: datetime, expiring_within_days: int, include_expiring: bool):
+    latest = latest_certificates_subquery(db)
+    horizon = now + timedelta(days=max(0, expiring_within_days)) if include_expiring else now
+    return (
+        db.query(
+            latest.c.certificate_id,
+            latest.c.user_id,
+            latest.c.course_id,
+            latest.c.issued_at,
+            latest.c.expires_at,
+            latest.c.certificate_number,
+            TrainingCourse.title,
+            User.username,
+            User.email_personal,
+            EmployeeProfile.preferred_name,
+            EmployeeProfile.first_name,
+            EmployeeProfile.last_name,
+        )
+        .select_from(latest)
+        .join(User, User.id == latest.c.user_id)
+        .outerjoin(TrainingCourse, TrainingCourse.id == latest.c.course_id)
+        .outerjoin(EmployeeProfile, EmployeeProfile.user_id == latest.c.user_id)
+        .filter(latest.c.expires_at <= horizon)
+        .order_by(latest.c.expires_at.asc(), latest.c.certificate_id.asc())
+    )
+
+
+def _row_to_item(row, now: datetime) -> Dict[str, Any]:
+    expires_at = _naive_utc(row.expires_at)
+    overdue = expires_at is not None and expires_at <= now
+    return {
+        "user_id": str(row.user_id),
+        "user_name": display_name(
+            row.preferred_name, row.first_name, row.last_name, row.username, row.email_personal
+        ) or "Unknown",
+        "username": row.username,
+        "course_id": str(row.course_id),
+        "course_title": row.title,
+        "certificate_id": str(row.certificate_id),
+        "certificate_number": row.certificate_number,
+        "issued_at": row.issued_at.isoformat() if row.issued_at else None,
+        "expired_at": row.expires_at.isoformat() if row.expires_at else None,
+        "status": STATUS_OVERDUE if overdue else STATUS_EXPIRING,
+        "days_overdue": (now - expires_at).days if overdue else 0,
+        "days_remaining": 0 if overdue or expires_at is None else (expires_at - now).days,
+    }
+
+
+def iter_compliance_items(
+    db: Session,
+    *,
+    now: Optional[datetime] = None,
+    expiring_within_days: int = DEFAULT_EXPIRING_WITHIN_DAYS,
+    include_expiring: bool = True,
+    batch_size: int = 500,
+) -> Iterator[Dict[str, Any]]:
+    """Yield overdue (and optionally expiring-soon) items, streaming rows from the DB."""
+    t = now or datetime.utcnow()
+    q = _compliance_query(db, t, expiring_within_days, include_expiring)
+    for row in q.yield_per(batch_size):
+        yield _row_to_item(row, t)
+
+
+def list_overdue(db: Session, *, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    return list(iter_compliance_items(db, now=now, include_expiring=False))
+
+
+def get_compliance_sets(
+    db: Session,
+    *,
+    now: Optional[datetime] = None,
+    expiring_within_days: int = DEFAULT_EXPIRING_WITHIN_DAYS,
+) -> Dict[str, List[Dict[str, Any]]]:
+    overdue: List[Dict[str, Any]] = []
+    expiring: List[Dict[str, Any]] = []
+    for item in iter_compliance_items(db, now=now, expiring_within_days=expiring_within_days):
+        (overdue if item["status"] == STATUS_OVERDUE else expiring).append(item)
+    return {"overdue": overdue, "expiring_soon": expiring}
+
+
+def _compute_summary(db: Session, now: datetime, expiring_within_days: int) -> Dict[str, Any]:
+    course_counts = db.query(
+        func.count(TrainingCourse.id),
+        func.sum(case((TrainingCourse.status == "published", 1), else_=0)),
+        func.sum(case((TrainingCourse.status == "draft", 1), else_=0)),
+    ).one()
+    total_completions = (
+        db.query(func.count(TrainingProgress.id))
+        .filter(TrainingProgress.completed_at.isnot(None))
+        .scalar()
+    )
+    latest = latest_certificates_subquery(db)
+    horizon = now + timedelta(days=max(0, expiring_within_days))
+    cert_counts = db.query(
+        func.sum(case((latest.c.expires_at <= now, 1), else_=0)),
+        func.sum(case(((latest.c.expires_at > now) & (latest.c.expires_at <= horizon), 1), else_=0)),
+        func.count(func.distinct(case((latest.c.expires_at <= now, latest.c.user_id)))),
+    ).one()
+    return {
+        "total_courses": int(course_counts[0] or 0),
+        "published_courses": int(course_counts[1] or 0),
+        "draft_courses": int(course_counts[2] or 0),
+        "total_completions": int(total_completions or 0),
+        "overdue_certificates": int(cert_counts[0] or 0),
+        "expiring_soon_certificates": int(cert_counts[1] or 0),
+        "users_with_overdue": int(cert_counts[2] or 0),
+        "expiring_within_days": expiring_within_days,
+        "generated_at": now.isoformat(),
+    }
+
+
+def get_compliance_summary(
+    db: Session,
+    *,
+    expiring_within_days: int = DEFAULT_EXPIRING_WITHIN_DAYS,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """Dashboard counts, cached per process for SUMMARY_CACHE_TTL_S."""
+    mono = time.monotonic()
+    if use_cache:
+        with _summary_lock:
+            hit = _summary_cache.get(expiring_within_days)
+            if hit and mono - hit["at"] < SUMMARY_CACHE_TTL_S:
+                return dict(hit["data"])
+    data = _compute_summary(db, datetime.utcnow(), expiring_within_days)
+    with _summary_lock:
+        _summary_cache[expiring_within_days] = {"at": mono, "data": data}
+    return dict(data)
+
+
+def iter_compliance_csv(
+    db: Session,
+    *,
+    expiring_within_days: int = DEFAULT_EXPIRING_WITHIN_DAYS,
+    include_expiring: bool = True,
+) -> Iterator[str]:
+    """CSV chunks (BOM + header first) for StreamingResponse."""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    buf.write("\ufeff")
+    w.writerow(CSV_HEADERS)
+    yield buf.getvalue()
+    for item in iter_compliance_items(
+        db, expiring_within_days=expiring_within_days, include_expiring=include_expiring
+    ):
+        buf.seek(0)
+        buf.truncate(0)
+        w.writerow(
+            [
+                item["user_name"],
+                item["username"] or "",
+                item["course_title"] or "",
+                item["certificate_number"] or "",
+                item["issued_at"] or "",
+                item["expired_at"] or "",
+                "Overdue" if item["status"] == STATUS_OVERDUE else "Expiring soon",
+                item["days_overdue"],
+                item["days_remaining"],
+            ]
+        )
+        yield buf.getvalue()
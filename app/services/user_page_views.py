@@ -2,7 +2,9 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 import uuid
 
 from sqlalchemy.orm import Session
@@ -12,6 +14,11 @@ from ..models.models import SystemLog
 PAGE_VIEW_CATEGORY = "page_view"
 PAGE_VIEW_DEDUPE_MINUTES = 10
 
+# Per-process memory of recent (user, path) views so repeat navigations skip the DB probe and
+# rows still sitting in the system log queue are not recorded twice.
+_recent_lock = threading.Lock()
+_recent_views: Dict[Tuple[uuid.UUID, str], float] = {}
+
 _EXACT_LABELS: Dict[str, str] = {
     "/home": "Home",
     "/overview": "Overview",
@@ -162,31 +169,53 @@ def _recent_duplicate(db: Session, user_id: uuid.UUID, path: str) -> bool:
     )
 
 
+def _recent_in_memory(user_id: uuid.UUID, path: str, now: float) -> bool:
+    window = PAGE_VIEW_DEDUPE_MINUTES * 60
+    with _recent_lock:
+        seen = _recent_views.get((user_id, path))
+        if seen is not None and now - seen < window:
+            return True
+        if len(_recent_views) > 20000:
+            for key in [k for k, t in _recent_views.items() if now - t >= window]:
+                _recent_views.pop(key, None)
+        return False
+
+
+def _remember_view(user_id: uuid.UUID, path: str, now: float) -> None:
+    with _recent_lock:
+        _recent_views[(user_id, path)] = now
+
+
 def record_user_page_view(db: Session, user_id: uuid.UUID, path: str) -> Dict[str, Any]:
-    """Append a page view unless the same path was logged within the dedupe window."""
+    """Queue a page view unless the same path was logged within the dedupe window."""
     normalized = normalize_page_view_path(path)
     if not normalized:
         return {"recorded": False, "reason": "invalid_path"}
 
-    if _recent_duplicate(db, user_id, normalized):
+    now = time.monotonic()
+    if _recent_in_memory(user_id, normalized, now) or _recent_duplicate(db, user_id, normalized):
+        _remember_view(user_id, normalized, now)
         return {"recorded": False, "reason": "deduped"}
 
+    from .system_log_writer import build_row, get_system_log_writer
+
     label = page_view_label(normalized)
-    entry = SystemLog(
-        level="info",
-        category=PAGE_VIEW_CATEGORY,
-        message=label,
+    row = build_row(
+        "info",
+        PAGE_VIEW_CATEGORY,
+        label,
         path=normalized,
         method="GET",
         user_id=user_id,
         extra={"module": page_view_module(normalized)},
     )
-    db.add(entry)
-    db.commit()
-    db.refresh(entry)
+    # Already deduped per user/path, so skip the repetitive-error sampling.
+    if not get_system_log_writer().submit(row, sample=False):
+        return {"recorded": False, "reason": "dropped"}
+    _remember_view(user_id, normalized, now)
     return {
         "recorded": True,
-        "id": str(entry.id),
+        "id": str(row["id"]),
         "path": normalized,
         "label": label,
     }
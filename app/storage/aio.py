@@ -0,0 +1,115 @@
+"""Async facade over the storage providers for async routes.
+
+The Azure SDK's async client needs aiohttp, which this app does not ship, so blocking SDK
+and filesystem calls run on worker threads (anyio.to_thread) and never on the event loop.
+Uploads are consumed from the source in CHUNK_SIZE blocks; providers whose writer supports
+it (Azure staged blocks) upload up to ChunkWriter.max_parallel blocks concurrently, so a
+large upload holds at most that many blocks in memory.
+"""
+from typing import AsyncIterable, AsyncIterator, Optional, Union
+
+import anyio
+import anyio.to_thread
+
+from .provider import CHUNK_SIZE, StorageProvider, UploadTooLarge
+
+_DONE = object()
+
+
+async def _rechunk(source: AsyncIterable[bytes], size: int) -> AsyncIterator[bytes]:
+    buf = bytearray()
+    async for chunk in source:
+        buf.extend(chunk)
+        while len(buf) >= size:
+            yield bytes(buf[:size])
+            del buf[:size]
+    if buf:
+        yield bytes(buf)
+
+
+async def _one(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+
+class AsyncStorage:
+    def __init__(self, provider: StorageProvider):
+        self.provider = provider
+
+    async def exists(self, key: str) -> bool:
+        return await anyio.to_thread.run_sync(self.provider.exists, key)
+
+    async def delete(self, key: str) -> None:
+        await anyio.to_thread.run_sync(self.provider.delete, key)
+
+    async def stream(self, key: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Yield stored bytes; raises FileNotFoundError when the key is missing."""
+        it = await anyio.to_thread.run_sync(lambda: iter(self.provider.iter_chunks(key, chunk_size)))
+        while True:
+            chunk = await anyio.to_thread.run_sync(next, it, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+
+    async def get(self, key: str, max_bytes: Optional[int] = None) -> bytes:
+        buf = bytearray()
+        async for chunk in self.stream(key):
+            buf.extend(chunk)
+            if max_bytes is not None and len(buf) > max_bytes:
+                raise UploadTooLarge(key)
+        return bytes(buf)
+
+    async def put(
+        self,
+        key: str,
+        source: Union[bytes, AsyncIterable[bytes]],
+        content_type: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ) -> int:
+        """Upload bytes or an async byte stream; returns the size written. Raises
+        UploadTooLarge (nothing is committed) once the stream passes max_bytes."""
+        if isinstance(source, (bytes, bytearray)):
+            source = _one(bytes(source))
+        writer = await anyio.to_thread.run_sync(self.provider.open_writer, key, content_type)
+        slots = anyio.Semaphore(writer.max_parallel)
+        total = 0
+        count = 0
+        pending = None
+
+        async def _stage(index: int, block: bytes) -> None:
+            try:
+                await anyio.to_thread.run_sync(writer.write_block, index, block)
+            finally:
+                slots.release()
+
+        try:
+            try:
+                async with anyio.create_task_group() as tg:
+                    async for block in _rechunk(source, CHUNK_SIZE):
+                        total += len(block)
+                        if max_bytes is not None and total > max_bytes:
+                            raise UploadTooLarge(key)
+                        if pending is not None:
+                            await slots.acquire()
+                            if writer.max_parallel > 1:
+                                tg.start_soon(_stage, count, pending)
+                            else:
+                                await _stage(count, pending)
+                            count += 1
+                        pending = block
+            except BaseExceptionGroup as group:
+                # Surface the first real error (UploadTooLarge, SDK error) instead of the group.
+                raise group.exceptions[0]
+            if count == 0:
+                await anyio.to_thread.run_sync(writer.write_whole, pending or b"")
+            else:
+                await anyio.to_thread.run_sync(writer.write_block, count, pending)
+                await anyio.to_thread.run_sync(writer.commit, count + 1)
+        except BaseException:
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(writer.abort)
+            raise
+        return total
+
+
+def as_async(provider: StorageProvider) -> AsyncStorage:
+    return AsyncStorage(provider)
@@ -1,65 +1,220 @@
-from datetime import datetime, timedelta
-from typing import Optional, BinaryIO
+import base64
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional, BinaryIO, Tuple
 
+from azure.core.exceptions import ResourceNotFoundError
 from azure.storage.blob import (
+    BlobBlock,
     BlobServiceClient,
+    ContentSettings,
     generate_blob_sas,
     BlobSasPermissions,
 )
 
 from ..config import settings
-from .provider import StorageProvider
+from .metrics import observe_blob_call, record_sas
+from .provider import CHUNK_SIZE, ChunkWriter, StorageProvider
+
+# Connection pool for the shared requests.Session behind the Azure SDK transport.
+# Sized for the threadpool that serves sync routes (thumbnails/previews fan out).
+BLOB_POOL_CONNECTIONS = 10
+BLOB_POOL_MAXSIZE = 64
+BLOB_CONNECTION_TIMEOUT_S = 10
+BLOB_READ_TIMEOUT_S = 120
+
+# Signed read URLs are reused while they stay valid for at least the requested lifetime:
+# expiry is rounded up to the next SAS_BUCKET_S boundary, so all calls inside one bucket
+# share a URL (and browsers can cache the image/thumbnail behind it).
+SAS_BUCKET_S = 300
+SAS_CACHE_MAX = 4096
+
+# Staged blocks uploaded concurrently per chunked upload.
+BLOCK_UPLOAD_PARALLEL = 4
+
+
+def _build_transport():
+    import requests
+    from azure.core.pipeline.transport import RequestsTransport
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=BLOB_POOL_CONNECTIONS, pool_maxsize=BLOB_POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(
+        session=session,
+        session_owner=False,
+        connection_timeout=BLOB_CONNECTION_TIMEOUT_S,
+        read_timeout=BLOB_READ_TIMEOUT_S,
+    )
+
+
+class _SasCache:
+    def __init__(self, max_size: int):
+        self._max = max_size
+        self._items: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            url = self._items.get(key)
+            if url is not None:
+                self._items.move_to_end(key)
+            return url
+
+    def put(self, key: Tuple, url: str) -> None:
+        with self._lock:
+            self._items[key] = url
+            self._items.move_to_end(key)
+            while len(self._items) > self._max:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class _BlockBlobWriter(ChunkWriter):
+    """Stages CHUNK_SIZE blocks (thread-safe, so blocks upload in parallel) and commits the
+    ordered block list. Uncommitted blocks are garbage-collected by Azure, so abort is a no-op."""
+
+    max_parallel = BLOCK_UPLOAD_PARALLEL
+
+    def __init__(self, client, content_type: Optional[str]):
+        self._client = client
+        self._settings = ContentSettings(content_type=content_type) if content_type else None
+        self._prefix = uuid.uuid4().hex[:16]
+
+    def _block_id(self, index: int) -> str:
+        return base64.b64encode(f"{self._prefix}-{index:08d}".encode()).decode()
+
+    def write_block(self, index: int, data: bytes) -> None:
+        with observe_blob_call("stage_block"):
+            self._client.stage_block(self._block_id(index), data, length=len(data))
+
+    def write_whole(self, data: bytes) -> None:
+        with observe_blob_call("upload"):
+            self._client.upload_blob(data, overwrite=True, content_settings=self._settings)
+
+    def commit(self, block_count: int) -> None:
+        blocks = [BlobBlock(block_id=self._block_id(i)) for i in range(block_count)]
+        with observe_blob_call("commit_blocks"):
+            self._client.commit_block_list(blocks, content_settings=self._settings)
 
 
 class BlobStorageProvider(StorageProvider):
-    def __init__(self) -> None:
-        if not settings.azure_blob_connection or not settings.azure_blob_container:
-            raise RuntimeError("AZURE_BLOB_CONNECTION and AZURE_BLOB_CONTAINER must be set")
-        self._service = BlobServiceClient.from_connection_string(settings.azure_blob_connection)
-        self._container = settings.azure_blob_container
+    """
+    Azure Blob provider. Construct through app.storage.registry.get_blob_provider() so the
+    process shares one BlobServiceClient (and its connection pool) instead of building a
+    client per request.
+    """
 
-    def generate_upload_url(self, key: str, content_type: str, expires_s: int) -> str:
-        expiry = datetime.utcnow() + timedelta(seconds=expires_s)
+    def __init__(
+        self,
+        service: Optional[BlobServiceClient] = None,
+        *,
+        connection: Optional[str] = None,
+        container: Optional[str] = None,
+    ) -> None:
+        connection = connection or settings.azure_blob_connection
+        container = container or settings.azure_blob_container
+        if service is None:
+            if not connection or not container:
+                raise RuntimeError("AZURE_BLOB_CONNECTION and AZURE_BLOB_CONTAINER must be set")
+            service = BlobServiceClient.from_connection_string(connection, transport=_build_transport())
+        self._service = service
+        self._container = container
+        self._container_client = service.get_container_client(self._container)
+        self._sas_cache = _SasCache(SAS_CACHE_MAX)
+
+    def _blob(self, key: str):
+        return self._container_client.get_blob_client(key.lstrip("/"))
+
+    def _sas(self, key: str, permission: BlobSasPermissions, expiry: datetime, **kwargs) -> str:
+        t0 = time.perf_counter()
         sas = generate_blob_sas(
             account_name=self._service.account_name,
             container_name=self._container,
             blob_name=key.lstrip("/"),
             account_key=self._service.credential.account_key,
-            permission=BlobSasPermissions(write=True, create=True),
+            permission=permission,
             expiry=expiry,
-            content_type=content_type,
+            **kwargs,
         )
-        blob_url = self._service.get_blob_client(self._container, key.lstrip("/")).url
-        return f"{blob_url}?{sas}"
+        record_sas(time.perf_counter() - t0, cached=False)
+        return sas
 
-    def get_download_url(self, key: str, expires_s: int) -> Optional[str]:
+    def generate_upload_url(self, key: str, content_type: str, expires_s: int) -> str:
         expiry = datetime.utcnow() + timedelta(seconds=expires_s)
-        sas = generate_blob_sas(
-            account_name=self._service.account_name,
-            container_name=self._container,
-            blob_name=key.lstrip("/"),
-            account_key=self._service.credential.account_key,
-            permission=BlobSasPermissions(read=True),
-            expiry=expiry,
-        )
-        blob_url = self._service.get_blob_client(self._container, key.lstrip("/")).url
-        return f"{blob_url}?{sas}"
+        sas = self._sas(key, BlobSasPermissions(write=True, create=True), expiry, content_type=content_type)
+        return f"{self._blob(key).url}?{sas}"
+
+    def _cached_read_url(
+        self, key: str, expires_s: int, content_disposition: Optional[str] = None, content_type: Optional[str] = None
+    ) -> str:
+        bucket = math.ceil((time.time() + expires_s) / SAS_BUCKET_S)
+        cache_key = (key, expires_s, bucket, content_disposition, content_type)
+        url = self._sas_cache.get(cache_key)
+        if url is not None:
+            record_sas(0.0, cached=True)
+            return url
+        expiry = datetime.fromtimestamp(bucket * SAS_BUCKET_S, tz=timezone.utc)
+        extra = {}
+        if content_disposition:
+            extra["content_disposition"] = content_disposition
+        if content_type:
+            extra["content_type"] = content_type
+        url = f"{self._blob(key).url}?{self._sas(key, BlobSasPermissions(read=True), expiry, **extra)}"
+        self._sas_cache.put(cache_key, url)
+        return url
+
+    def get_download_url(self, key: str, expires_s: int) -> Optional[str]:
+        return self._cached_read_url(key, expires_s)
+
+    def get_inline_url(self, key: str, expires_s: int, content_type: Optional[str] = None) -> str:
+        """Read URL that overrides Content-Disposition to inline (browser previews)."""
+        return self._cached_read_url(key, expires_s, "inline", content_type)
 
     def exists(self, key: str) -> bool:
-        client = self._service.get_blob_client(self._container, key.lstrip("/"))
-        return client.exists()
+        with observe_blob_call("exists"):
+            return self._blob(key).exists()
 
     def copy_in(self, src_stream_or_url: str | BinaryIO, key: str) -> None:
-        client = self._service.get_blob_client(self._container, key.lstrip("/"))
+        client = self._blob(key)
         if isinstance(src_stream_or_url, str):
-            client.start_copy_from_url(src_stream_or_url)
+            with observe_blob_call("start_copy"):
+                client.start_copy_from_url(src_stream_or_url)
         else:
-            client.upload_blob(src_stream_or_url, overwrite=True)
+            with observe_blob_call("upload"):
+                client.upload_blob(src_stream_or_url, overwrite=True)
+
+    def copy_status(self, key: str) -> Optional[str]:
+        """Status of the last server-side copy into key ("pending", "success", "failed",
+        "aborted"), or None when the blob was not written by a copy."""
+        with observe_blob_call("get_properties"):
+            props = self._blob(key).get_blob_properties()
+        return props.copy.status if props.copy else None
+
+    def open_writer(self, key: str, content_type: Optional[str] = None) -> ChunkWriter:
+        return _BlockBlobWriter(self._blob(key), content_type)
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            with observe_blob_call("download"):
+                downloader = self._blob(key).download_blob(max_concurrency=1)
+        except ResourceNotFoundError:
+            raise FileNotFoundError(key)
+        yield from downloader.chunks()
 
     def delete(self, key: str) -> None:
-        client = self._service.get_blob_client(self._container, key.lstrip("/"))
+        client = self._blob(key)
         try:
-            client.delete_blob()
+            with observe_blob_call("delete"):
+                client.delete_blob()
         except Exception:
             pass
-
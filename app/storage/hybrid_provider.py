@@ -1,32 +1,248 @@
-from typing import Optional, BinaryIO
+"""Read-through storage across two providers while blobs are migrated.
 
-from .provider import StorageProvider
+Writes always go to the primary. Reads check the primary first; on a miss the fallback URL is
+served immediately and the blob is copied into the primary by a background worker, so the
+first access never waits on a cross-account copy. Existence checks are cached (positive
+results for longer than negative ones) because each check is a network round-trip.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+import structlog
+
+from .local_provider import LocalStorageProvider
+from .provider import CHUNK_SIZE, ChunkWriter, StorageProvider
+
+logger = structlog.get_logger()
+
+EXISTS_TTL_S = 600
+MISSING_TTL_S = 30
+EXISTS_CACHE_MAX = 20000
+COPY_WORKERS = 2
+COPY_QUEUE_MAX = 1000
+# Lifetime of the fallback SAS handed to the primary for server-side copies.
+COPY_SOURCE_EXPIRES_S = 3600
+# Server-side copies are asynchronous: poll their status until done (or give up).
+COPY_POLL_INTERVAL_S = 0.5
+COPY_POLL_TIMEOUT_S = 600
 
 
 class HybridStorageProvider(StorageProvider):
-    def __init__(self, primary: StorageProvider, fallback: StorageProvider):
+    def __init__(
+        self,
+        primary: StorageProvider,
+        fallback: StorageProvider,
+        *,
+        exists_ttl_s: float = EXISTS_TTL_S,
+        missing_ttl_s: float = MISSING_TTL_S,
+        cache_max: int = EXISTS_CACHE_MAX,
+        copy_workers: int = COPY_WORKERS,
+        copy_queue_max: int = COPY_QUEUE_MAX,
+        copy_poll_interval_s: float = COPY_POLL_INTERVAL_S,
+        copy_poll_timeout_s: float = COPY_POLL_TIMEOUT_S,
+    ):
         self.primary = primary
         self.fallback = fallback
+        self._exists_ttl_s = exists_ttl_s
+        self._missing_ttl_s = missing_ttl_s
+        self._cache_max = cache_max
+        self._cache: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._copy_workers = copy_workers
+        self._copy_poll_interval_s = copy_poll_interval_s
+        self._copy_poll_timeout_s = copy_poll_timeout_s
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=copy_queue_max)
+        self._pending: set = set()
+        self._threads: list = []
+        self._stats: Dict[str, int] = {
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "served_from_fallback": 0,
+            "copies_queued": 0,
+            "copies_dropped": 0,
+            "copied": 0,
+            "copy_errors": 0,
+        }
+
+    # --- existence cache -------------------------------------------------
+
+    def _bump(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += n
+
+    def _remember(self, key: str, present: bool) -> None:
+        ttl = self._exists_ttl_s if present else self._missing_ttl_s
+        with self._lock:
+            self._cache[key] = (present, time.monotonic() + ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_max:
+                self._cache.popitem(last=False)
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def primary_has(self, key: str) -> bool:
+        """Cached primary.exists(key)."""
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None and hit[1] > now:
+                self._stats["cache_hits"] += 1
+                return hit[0]
+            self._stats["cache_misses"] += 1
+        present = bool(self.primary.exists(key))
+        self._remember(key, present)
+        return present
+
+    # --- background copy -------------------------------------------------
+
+    def copy_missing(self, key: str) -> str:
+        """Copy key from fallback into primary if it is not there yet.
+
+        Returns "exists", "copied" or "missing" (not in the fallback either); raises when
+        the copy fails."""
+        if self.primary.exists(key):
+            self._remember(key, True)
+            return "exists"
+        if isinstance(self.fallback, LocalStorageProvider):
+            try:
+                self.primary.put_chunks(key, self.fallback.iter_chunks(key))
+            except FileNotFoundError:
+                return "missing"
+        else:
+            url = self.fallback.get_download_url(key, COPY_SOURCE_EXPIRES_S)
+            if not url:
+                return "missing"
+            self.primary.copy_in(url, key)
+            self._wait_for_server_copy(key)
+        self._remember(key, True)
+        return "copied"
+
+    def _wait_for_server_copy(self, key: str) -> None:
+        """Block until a copy started with a source URL has landed in the primary.
+
+        Raises on a failed/aborted copy (or one still pending at the timeout) so the key is
+        neither cached as present nor counted as copied."""
+        if not hasattr(self.primary, "copy_status"):
+            return
+        deadline = time.monotonic() + self._copy_poll_timeout_s
+        while True:
+            status = self.primary.copy_status(key)
+            if status in (None, "success"):
+                return
+            if status != "pending":
+                raise RuntimeError(f"server-side copy of {key} {status}")
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"server-side copy of {key} still pending")
+            time.sleep(self._copy_poll_interval_s)
+
+    def enqueue_copy(self, key: str) -> bool:
+        """Schedule a background copy; duplicate keys and a full queue are ignored."""
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        try:
+            self._queue.put_nowait(key)
+        except queue.Full:
+            with self._lock:
+                self._pending.discard(key)
+            self._bump("copies_dropped")
+            return False
+        self._bump("copies_queued")
+        self._ensure_workers()
+        return True
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self._copy_workers:
+                t = threading.Thread(target=self._copy_loop, name="storage-copy", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _copy_loop(self) -> None:
+        while True:
+            key = self._queue.get()
+            try:
+                if key is None:
+                    return
+                if self.copy_missing(key) == "copied":
+                    self._bump("copied")
+            except Exception as e:
+                self._bump("copy_errors")
+                logger.warning("storage_copy_failed", key=key, error=str(e))
+            finally:
+                if key is not None:
+                    with self._lock:
+                        self._pending.discard(key)
+                self._queue.task_done()
+
+    def wait_for_copies(self) -> None:
+        """Block until queued copies are done (tests, migration tooling)."""
+        self._queue.join()
+
+    def stop(self) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for t in threads:
+            t.join(timeout=5)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._stats)
+            out["cached_keys"] = len(self._cache)
+            out["pending_copies"] = len(self._pending)
+        return out
+
+    # --- StorageProvider -------------------------------------------------
 
     def generate_upload_url(self, key: str, content_type: str, expires_s: int) -> str:
+        # The client writes straight to the primary; don't keep serving a stale "missing".
+        self.forget(key)
         return self.primary.generate_upload_url(key, content_type, expires_s)
 
     def get_download_url(self, key: str, expires_s: int) -> Optional[str]:
-        if self.primary.exists(key):
+        if self.primary_has(key):
             return self.primary.get_download_url(key, expires_s)
-        # Read-through: try fallback, copy to primary
-        url = self.fallback.get_download_url(key, 300)
+        url = self.fallback.get_download_url(key, expires_s)
         if url:
-            self.primary.copy_in(url, key)
-            return self.primary.get_download_url(key, expires_s)
-        return None
+            self._bump("served_from_fallback")
+            self.enqueue_copy(key)
+        return url
+
+    def get_inline_url(self, key: str, expires_s: int, content_type: Optional[str] = None) -> Optional[str]:
+        target = self.primary if self.primary_has(key) else self.fallback
+        if target is self.fallback:
+            self.enqueue_copy(key)
+        if hasattr(target, "get_inline_url"):
+            return target.get_inline_url(key, expires_s, content_type)
+        return target.get_download_url(key, expires_s)
 
     def exists(self, key: str) -> bool:
-        return self.primary.exists(key) or self.fallback.exists(key)
+        return self.primary_has(key) or self.fallback.exists(key)
 
     def copy_in(self, src_stream_or_url: str | BinaryIO, key: str) -> None:
         self.primary.copy_in(src_stream_or_url, key)
+        self._remember(key, True)
 
     def delete(self, key: str) -> None:
         self.primary.delete(key)
+        self._remember(key, False)
+
+    def open_writer(self, key: str, content_type: Optional[str] = None) -> ChunkWriter:
+        # Forget first so a concurrent read re-checks the primary once the commit lands.
+        self.forget(key)
+        return self.primary.open_writer(key, content_type)
 
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        if self.primary_has(key):
+            return self.primary.iter_chunks(key, chunk_size)
+        self.enqueue_copy(key)
+        return self.fallback.iter_chunks(key, chunk_size)
@@ -3,12 +3,37 @@ Local filesystem storage provider for development.
 Saves files to a local directory instead of Azure Blob Storage.
 """
 import os
-from typing import Optional, BinaryIO
+import uuid
+from typing import Iterator, Optional, BinaryIO
 from pathlib import Path
 from urllib.parse import quote
 
 from ..config import settings
-from .provider import StorageProvider
+from .provider import CHUNK_SIZE, ChunkWriter, StorageProvider
+
+
+class _LocalFileWriter(ChunkWriter):
+    """Writes blocks in order to a temp file next to the target and renames on commit."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+        self._fh = open(self._tmp, "wb")
+
+    def write_block(self, index: int, data: bytes) -> None:
+        self._fh.write(data)
+
+    def commit(self, block_count: int) -> None:
+        self._fh.close()
+        os.replace(self._tmp, self._path)
+
+    def abort(self) -> None:
+        self._fh.close()
+        try:
+            self._tmp.unlink()
+        except FileNotFoundError:
+            pass
 
 
 class LocalStorageProvider(StorageProvider):
@@ -59,12 +84,30 @@ class LocalStorageProvider(StorageProvider):
             logger.warning(f"LocalStorageProvider: Cannot copy from URL {src_stream_or_url}")
             return
         
-        # Copy from stream
+        # Copy from stream in chunks (never hold the whole file in memory)
         with open(path, "wb") as f:
             if hasattr(src_stream_or_url, "read"):
-                f.write(src_stream_or_url.read())
+                while True:
+                    chunk = src_stream_or_url.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
             else:
                 f.write(src_stream_or_url)
+
+    def open_writer(self, key: str, content_type: Optional[str] = None) -> ChunkWriter:
+        return _LocalFileWriter(self._get_path(key))
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        path = self._get_path(key)
+        if not path.exists():
+            raise FileNotFoundError(key)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
     
     def delete(self, key: str) -> None:
         """Delete a file from local storage."""
@@ -0,0 +1,98 @@
+"""Storage instrumentation: SAS generation and blob call latency.
+
+Counters are kept in-process (exposed by /admin/system/storage) and mirrored to Prometheus
+histograms when prometheus_client is installed (it ships with the metrics instrumentator).
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+import structlog
+
+logger = structlog.get_logger()
+
+SLOW_BLOB_CALL_S = 2.0
+
+try:
+    from prometheus_client import Counter as _PromCounter, Histogram as _PromHistogram
+
+    _blob_latency = _PromHistogram(
+        "storage_blob_call_seconds", "Azure Blob call latency", ["op"]
+    )
+    _sas_total = _PromCounter(
+        "storage_sas_urls_total", "Signed URL requests", ["result"]
+    )
+except Exception:  # prometheus_client missing or metrics already registered
+    _blob_latency = None
+    _sas_total = None
+
+_lock = threading.Lock()
+_calls: Dict[str, Dict[str, float]] = {}
+_sas: Dict[str, float] = {"generated": 0, "cache_hits": 0, "generate_s_total": 0.0}
+
+
+def _bump(op: str, elapsed: float, failed: bool) -> None:
+    with _lock:
+        st = _calls.setdefault(op, {"count": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0})
+        st["count"] += 1
+        st["total_s"] += elapsed
+        if elapsed > st["max_s"]:
+            st["max_s"] = elapsed
+        if failed:
+            st["errors"] += 1
+
+
+@contextmanager
+def observe_blob_call(op: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        _bump(op, elapsed, failed)
+        if _blob_latency is not None:
+            _blob_latency.labels(op).observe(elapsed)
+        if elapsed >= SLOW_BLOB_CALL_S:
+            logger.warning("storage_blob_call_slow", op=op, seconds=round(elapsed, 3))
+
+
+def record_sas(elapsed: float, *, cached: bool) -> None:
+    with _lock:
+        if cached:
+            _sas["cache_hits"] += 1
+        else:
+            _sas["generated"] += 1
+            _sas["generate_s_total"] += elapsed
+    if _sas_total is not None:
+        _sas_total.labels("cache_hit" if cached else "generated").inc()
+
+
+def storage_stats() -> Dict[str, object]:
+    with _lock:
+        calls = {
+            op: {
+                "count": int(st["count"]),
+                "errors": int(st["errors"]),
+                "avg_ms": round(st["total_s"] * 1000 / st["count"], 2) if st["count"] else 0.0,
+                "max_ms": round(st["max_s"] * 1000, 2),
+            }
+            for op, st in _calls.items()
+        }
+        generated = int(_sas["generated"])
+        sas = {
+            "generated": generated,
+            "cache_hits": int(_sas["cache_hits"]),
+            "avg_generate_ms": round(_sas["generate_s_total"] * 1000 / generated, 3) if generated else 0.0,
+        }
+    return {"blob_calls": calls, "sas": sas}
+
+
+def reset_storage_stats() -> None:
+    with _lock:
+        _calls.clear()
+        _sas.update({"generated": 0, "cache_hits": 0, "generate_s_total": 0.0})
@@ -0,0 +1,107 @@
+"""Bulk copy of FileObject blobs from the fallback account into the primary.
+
+Walks file_objects by id (keyset, so it never re-reads finished pages), copies keys the
+primary is missing with a bounded thread pool and checkpoints the last finished id to a
+JSON file after each batch, so an interrupted run resumes where it stopped. Keys whose copy
+failed are kept in the checkpoint ("failed_keys") and retried first by the next run.
+"""
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import structlog
+
+from ..models.models import FileObject
+from .hybrid_provider import HybridStorageProvider
+
+logger = structlog.get_logger()
+
+DEFAULT_PROGRESS_PATH = "var/storage_migration.json"
+
+
+def load_progress(path: str) -> Dict[str, object]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def save_progress(path: str, progress: Dict[str, object]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(progress, fh, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def migrate_missing_blobs(
+    session_factory: Callable,
+    hybrid: HybridStorageProvider,
+    *,
+    provider_name: str = "blob",
+    concurrency: int = 8,
+    batch_size: int = 500,
+    progress_path: Optional[str] = DEFAULT_PROGRESS_PATH,
+    dry_run: bool = False,
+    limit: Optional[int] = None,
+    on_batch: Optional[Callable[[Dict[str, object]], None]] = None,
+) -> Dict[str, object]:
+    """Copy every FileObject key missing from hybrid.primary. Returns the final progress dict
+    ({"last_id", "scanned", "exists", "copied", "missing", "errors", "failed_keys"}); "errors"
+    counts the keys still failing."""
+    progress = load_progress(progress_path) if progress_path else {}
+    counts = {k: int(progress.get(k) or 0) for k in ("scanned", "exists", "copied", "missing")}
+    last_id = progress.get("last_id")
+    failed: List[str] = list(progress.get("failed_keys") or [])
+
+    def _one(key: str) -> str:
+        try:
+            if dry_run:
+                return "exists" if hybrid.primary.exists(key) else "copied"
+            return hybrid.copy_missing(key)
+        except Exception as e:
+            logger.warning("storage_migration_copy_failed", key=key, error=str(e))
+            return "errors"
+
+    def _run(pool, keys: List[str]) -> None:
+        for key, result in zip(keys, pool.map(_one, keys)):
+            if result == "errors":
+                failed.append(key)
+            else:
+                counts[result] += 1
+
+    def _checkpoint() -> Dict[str, object]:
+        return {"last_id": last_id, **counts, "errors": len(failed), "failed_keys": list(failed)}
+
+    processed = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        if failed:
+            retry, failed = failed, []
+            _run(pool, retry)
+            if progress_path and not dry_run:
+                save_progress(progress_path, _checkpoint())
+        while limit is None or processed < limit:
+            take = batch_size if limit is None else min(batch_size, limit - processed)
+            db = session_factory()
+            try:
+                q = db.query(FileObject.id, FileObject.key).filter(FileObject.provider == provider_name)
+                if last_id:
+                    q = q.filter(FileObject.id > uuid.UUID(str(last_id)))
+                rows = q.order_by(FileObject.id.asc()).limit(take).all()
+            finally:
+                db.close()
+            if not rows:
+                break
+            _run(pool, [key for _, key in rows if key])
+            counts["scanned"] += len(rows)
+            processed += len(rows)
+            last_id = str(rows[-1][0])
+            progress = _checkpoint()
+            if progress_path and not dry_run:
+                save_progress(progress_path, progress)
+            if on_batch is not None:
+                on_batch(progress)
+    return _checkpoint()
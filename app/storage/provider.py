@@ -1,4 +1,51 @@
-from typing import BinaryIO, Optional
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+# Chunk size for streamed reads/writes (also the Azure staged-block size).
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised by chunked writers when the source exceeds the caller's max_bytes."""
+
+
+class ChunkWriter:
+    """Chunked upload to one key: write_block() for each block, then commit() or abort().
+
+    Writers with max_parallel > 1 accept write_block() calls from several threads at once
+    (blocks are identified by index); others must receive blocks in order."""
+
+    max_parallel = 1
+
+    def write_block(self, index: int, data: bytes) -> None:
+        raise NotImplementedError
+
+    def write_whole(self, data: bytes) -> None:
+        """Single-shot upload when the source fits in one block."""
+        self.write_block(0, data)
+        self.commit(1)
+
+    def commit(self, block_count: int) -> None:
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        pass
+
+
+class _BufferedWriter(ChunkWriter):
+    """Fallback writer for providers that only implement copy_in."""
+
+    def __init__(self, provider: "StorageProvider", key: str):
+        self._provider = provider
+        self._key = key
+        self._blocks = []
+
+    def write_block(self, index: int, data: bytes) -> None:
+        self._blocks.append(data)
+
+    def commit(self, block_count: int) -> None:
+        import io
+
+        self._provider.copy_in(io.BytesIO(b"".join(self._blocks)), self._key)
 
 
 class StorageProvider:
@@ -17,3 +64,87 @@ class StorageProvider:
     def delete(self, key: str) -> None:
         raise NotImplementedError
 
+    def open_writer(self, key: str, content_type: Optional[str] = None) -> ChunkWriter:
+        return _BufferedWriter(self, key)
+
+    def iter_chunks(self, key: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream the stored bytes; raises FileNotFoundError when the key is missing."""
+        import httpx
+
+        url = self.get_download_url(key, 300)
+        if not url:
+            raise FileNotFoundError(key)
+        with httpx.stream("GET", url, timeout=120.0) as r:
+            if r.status_code == 404:
+                raise FileNotFoundError(key)
+            r.raise_for_status()
+            yield from r.iter_bytes(chunk_size)
+
+    def read_bytes(self, key: str, max_bytes: Optional[int] = None) -> bytes:
+        buf = bytearray()
+        for chunk in self.iter_chunks(key):
+            buf.extend(chunk)
+            if max_bytes is not None and len(buf) > max_bytes:
+                raise UploadTooLarge(key)
+        return bytes(buf)
+
+    def put_chunks(
+        self,
+        key: str,
+        chunks: Iterable[bytes],
+        content_type: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ) -> int:
+        """Upload an iterable of byte chunks in CHUNK_SIZE blocks; returns the size written."""
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor
+
+        writer = self.open_writer(key, content_type)
+        pool = ThreadPoolExecutor(writer.max_parallel) if writer.max_parallel > 1 else None
+        futures = deque()
+        total = 0
+        try:
+            pending = None
+            count = 0
+            for block in rechunk(chunks, CHUNK_SIZE):
+                total += len(block)
+                if max_bytes is not None and total > max_bytes:
+                    raise UploadTooLarge(key)
+                if pending is not None:
+                    if pool is not None:
+                        futures.append(pool.submit(writer.write_block, count, pending))
+                        # Bound memory: at most max_parallel blocks in flight.
+                        while len(futures) > writer.max_parallel:
+                            futures.popleft().result()
+                    else:
+                        writer.write_block(count, pending)
+                    count += 1
+                pending = block
+            if count == 0:
+                writer.write_whole(pending or b"")
+                return total
+            for f in futures:
+                f.result()
+            writer.write_block(count, pending)
+            writer.commit(count + 1)
+            return total
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            writer.abort()
+            raise
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+
+def rechunk(chunks: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """Regroup arbitrary byte chunks into blocks of exactly `size` (last one shorter)."""
+    buf = bytearray()
+    for chunk in chunks:
+        buf.extend(chunk)
+        while len(buf) >= size:
+            yield bytes(buf[:size])
+            del buf[:size]
+    if buf:
+        yield bytes(buf)
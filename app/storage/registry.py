@@ -0,0 +1,102 @@
+"""Process-wide storage providers.
+
+Providers are built once and reused: the blob provider owns a long-lived BlobServiceClient
+with a pooled HTTP transport and a signed-URL cache, so per-request callers must not
+construct BlobStorageProvider() themselves.
+"""
+import threading
+from typing import Dict, Optional
+
+from ..config import settings
+from .local_provider import LocalStorageProvider
+from .provider import StorageProvider
+
+_lock = threading.Lock()
+_blob: Optional[StorageProvider] = None
+_local: Dict[str, LocalStorageProvider] = {}
+
+
+def blob_configured() -> bool:
+    return bool(settings.azure_blob_connection and settings.azure_blob_container)
+
+
+def hybrid_configured() -> bool:
+    """STORAGE_PROVIDER=hybrid plus a legacy account to read through while migrating."""
+    return (
+        (settings.storage_provider or "").lower() == "hybrid"
+        and bool(settings.azure_blob_fallback_connection)
+        and blob_configured()
+    )
+
+
+def get_blob_provider() -> StorageProvider:
+    """Shared blob provider (raises RuntimeError when Azure is not configured).
+
+    With STORAGE_PROVIDER=hybrid this is a HybridStorageProvider that writes to the
+    configured account and reads through to AZURE_BLOB_FALLBACK_* until blobs are migrated."""
+    global _blob
+    if _blob is None:
+        with _lock:
+            if _blob is None:
+                from .blob_provider import BlobStorageProvider
+
+                primary = BlobStorageProvider()
+                if hybrid_configured():
+                    from .hybrid_provider import HybridStorageProvider
+
+                    fallback = BlobStorageProvider(
+                        connection=settings.azure_blob_fallback_connection,
+                        container=settings.azure_blob_fallback_container or settings.azure_blob_container,
+                    )
+                    _blob = HybridStorageProvider(primary, fallback)
+                else:
+                    _blob = primary
+    return _blob
+
+
+def is_blob_backed(provider: StorageProvider) -> bool:
+    """True for providers that store in Azure (plain blob or hybrid read-through)."""
+    from .blob_provider import BlobStorageProvider
+    from .hybrid_provider import HybridStorageProvider
+
+    return isinstance(provider, (BlobStorageProvider, HybridStorageProvider))
+
+
+def get_local_provider(base_dir: str = "var/storage") -> LocalStorageProvider:
+    provider = _local.get(base_dir)
+    if provider is None:
+        with _lock:
+            provider = _local.get(base_dir)
+            if provider is None:
+                provider = LocalStorageProvider(base_dir)
+                _local[base_dir] = provider
+    return provider
+
+
+def get_default_provider() -> StorageProvider:
+    """Blob when Azure is configured, local filesystem otherwise."""
+    if blob_configured():
+        return get_blob_provider()
+    return get_local_provider()
+
+
+def get_provider_for(provider_name: Optional[str]) -> StorageProvider:
+    """Provider for a stored FileObject.provider value; blob files fall back to local storage
+    when Azure is not configured (local dev)."""
+    if provider_name == "blob" and blob_configured():
+        try:
+            return get_blob_provider()
+        except Exception:
+            pass
+    return get_local_provider()
+
+
+def reset_storage_providers() -> None:
+    """Drop cached providers (tests, or after rotating storage credentials)."""
+    global _blob
+    with _lock:
+        stop = getattr(_blob, "stop", None)
+        if stop is not None:
+            stop()
+        _blob = None
+        _local.clear()
@@ -0,0 +1,73 @@
+"""Geohash encoding for the project map grid index.
+
+A geohash prefix of length p is a fixed grid cell, so "GROUP BY substr(geohash, 1, p)" clusters
+points in SQL and "geohash LIKE 'prefix%'" is an index range scan.
+"""
+import math
+from typing import Optional
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+GEOHASH_PRECISION = 9  # ~5 m cells; deeper than any map zoom needs
+
+
+def encode_geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    out = []
+    bit = 0
+    ch = 0
+    even = True
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            out.append(_BASE32[ch])
+            bit = 0
+            ch = 0
+    return "".join(out)
+
+
+def cell_size_degrees(precision: int) -> tuple[float, float]:
+    """(lat_height, lng_width) of a geohash cell."""
+    lng_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision - lng_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def precision_for_zoom(zoom: float, cells_per_tile: int = 8) -> int:
+    """Shortest geohash whose cells are at most 1/cells_per_tile of a web-map tile wide."""
+    tile_width = 360.0 / (2 ** max(0.0, float(zoom)))
+    target = tile_width / cells_per_tile
+    for p in range(1, GEOHASH_PRECISION + 1):
+        if cell_size_degrees(p)[1] <= target:
+            return p
+    return GEOHASH_PRECISION
+
+
+def geohash_or_none(lat, lng) -> Optional[str]:
+    try:
+        lat_f, lng_f = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if lat_f != lat_f or lng_f != lng_f or not (-90 <= lat_f <= 90) or not (-180 <= lng_f <= 180):
+        return None
+    if abs(lat_f) < 1e-9 and abs(lng_f) < 1e-9:
+        return None
+    return encode_geohash(lat_f, lng_f)
@@ -0,0 +1,48 @@
+"""Proposal values from the proposal JSON (approved additional_costs, base amount without taxes).
+
+Proposal.grand_total stores proposal_value() on every insert/update so listings and customer
+insights aggregate it in SQL instead of loading and re-pricing each proposal's JSON.
+"""
+from typing import Any, Optional
+
+
+def calculate_proposal_grand_total(proposal_data: Optional[dict]) -> float:
+    """
+    Project/list Value from proposal pricing: sum of (value * quantity) for approved
+    additional_costs only — base amount, without PST or GST.
+    """
+    if not proposal_data:
+        return 0.0
+
+    additional_costs = proposal_data.get('additional_costs', [])
+    if not isinstance(additional_costs, list):
+        return 0.0
+
+    total_direct_costs = 0.0
+
+    for item in additional_costs:
+        if not isinstance(item, dict):
+            continue
+        # Only include approved items (default True for backward compatibility)
+        if item.get('approved', True) is not True:
+            continue
+
+        value = float(item.get('value', 0) or 0)
+        quantity = float(item.get('quantity', 1) or 1)
+        total_direct_costs += value * quantity
+
+    return total_direct_costs
+
+
+def proposal_value(data: Any) -> float:
+    """The proposal's saved "total" when positive, else its priced additional_costs, else 0."""
+    if not isinstance(data, dict):
+        return 0.0
+    stored = data.get("total")
+    if isinstance(stored, (int, float)) and stored > 0:
+        return float(stored)
+    try:
+        computed = calculate_proposal_grand_total(data)
+    except (TypeError, ValueError):
+        return 0.0
+    return computed if computed > 0 else 0.0
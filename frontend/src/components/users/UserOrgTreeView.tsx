@@ -4,6 +4,7 @@ import { ChevronDown, Maximize2, Star, Users, ZoomIn, ZoomOut } from 'lucide-rea
 import { withFileAccessToken } from '@/lib/api';
 import {
   buildUserOrgForest,
+  orgForestFromPrebuilt,
   collectOrgNodeIdsWithChildren,
   countOrgForestPeople,
   countOrgNodeReports,
@@ -11,6 +12,7 @@ import {
   orgAncestorIdsToExpand,
   personMatchesOrgQuery,
   type OrgPerson,
+  type PrebuiltOrgTree,
   type OrgTreeNode,
 } from '@/lib/userOrgTree';
 import {
@@ -250,14 +252,19 @@ function zoomAroundPoint(camera: Camera, nextZoom: number, originX: number, orig
 
 export function UserOrgTreeView({
   people,
+  tree,
   searchQuery,
   canViewUserDetails,
 }: {
   people: OrgPerson[];
+  tree?: PrebuiltOrgTree;
   searchQuery: string;
   canViewUserDetails: boolean;
 }) {
-  const forest = useMemo(() => buildUserOrgForest(people), [people]);
+  const forest = useMemo(
+    () => (tree ? orgForestFromPrebuilt(people, tree) : buildUserOrgForest(people)),
+    [people, tree],
+  );
   const visible = useMemo(() => filterOrgForestByQuery(forest, searchQuery), [forest, searchQuery]);
   const visibleCount = countOrgForestPeople(visible);
   const peopleKey = useMemo(
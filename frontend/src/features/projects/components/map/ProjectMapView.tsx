@@ -6,13 +6,17 @@ import { uiCx, uiRadius, uiShadows } from '@/components/ui';
 import { PROJECT_MAP_LABELS } from '../../lib/mapViewLabels';
 import { isMapPointsAbortError, useProjectMapPoints } from '../../hooks/useProjectMapPoints';
 import { useProjectMapState } from '../../hooks/useProjectMapState';
-import { PROJECT_MAP_MIN_HEIGHT_PX } from '../../lib/projectMapConfig';
-import { fitMapToPoints, readMapBounds } from './projectMapBounds';
+import {
+  PROJECT_MAP_BBOX_PADDING_RATIO,
+  PROJECT_MAP_MIN_HEIGHT_PX,
+  PROJECT_MAP_OVERVIEW_BOUNDS,
+} from '../../lib/projectMapConfig';
+import { expandBounds, fitMapToResults, readMapBounds } from './projectMapBounds';
 import { buildMapPopupHtml, MAP_POPUP_ROOT_ID, ProjectMapPopup } from './ProjectMapPopup';
 import { ProjectMapFetchingOverlay } from './ProjectMapFetchingOverlay';
 import { ProjectMapStatusBar } from './ProjectMapStatusBar';
 import { createMarkerManager, groupPointsByLocation } from './projectMapMarkers';
-import type { LocationGroup, MapListKind, MapViewLabels } from './projectMap.types';
+import type { LocationGroup, MapBounds, MapListKind, MapViewLabels, ProjectMapCluster } from './projectMap.types';
 
 type Props = {
   searchParams: URLSearchParams;
@@ -39,7 +43,10 @@ export default function ProjectMapView({
   const [mapReady, setMapReady] = useState(false);
   const [loadError, setLoadError] = useState<string | null>(null);
   const filterKeyRef = useRef(searchParams.toString());
-  const hasFittedRef = useRef(false);
+  /** Viewport reported by the map's `idle` event; the hook debounces it before fetching. */
+  const [viewport, setViewport] = useState<MapBounds | null>(null);
+  /** Until the map is fitted to the results, request the whole-world overview instead of the viewport. */
+  const [overviewPending, setOverviewPending] = useState(true);
 
   const {
     getInitialCenter,
@@ -50,14 +57,15 @@ export default function ProjectMapView({
     resetAutoFit,
   } = useProjectMapState();
 
-  const { data, isLoading, isError, error, refetch, isFetching, isFetched } = useProjectMapPoints(
-    listKind,
-    searchParams,
-    businessLine,
-    null,
-    true,
-    false,
-  );
+  const { data, isLoading, isError, error, refetch, isFetching, isFetched, isPlaceholderData } =
+    useProjectMapPoints(
+      listKind,
+      searchParams,
+      businessLine,
+      overviewPending ? PROJECT_MAP_OVERVIEW_BOUNDS : viewport,
+      mapReady,
+      true,
+    );
 
   /** Only block the UI on first load — background refetches keep existing markers visible. */
   const isInitialMapLoading = isLoading && !data;
@@ -111,16 +119,19 @@ export default function ProjectMapView({
     [mountPopup, unmountPopup],
   );
 
-  const handleFitToResults = useCallback(() => {
+  const openCluster = useCallback((cluster: ProjectMapCluster) => {
     const map = mapRef.current;
-    if (!map || !data?.items?.length) return;
+    if (!map) return;
+    const { north, south, east, west } = cluster.bounds;
+    map.fitBounds({ north, south, east, west }, 48);
+  }, []);
+
+  const handleFitToResults = useCallback(() => {
+    if (!mapRef.current) return;
+    // Fitting needs every match, not just the viewport: re-request the overview and fit on arrival.
     resetAutoFit();
-    hasFittedRef.current = true;
-    fitMapToPoints(map, data.items);
-    window.setTimeout(() => {
-      if (mapRef.current) google.maps.event.trigger(mapRef.current, 'resize');
-    }, 100);
-  }, [data?.items, resetAutoFit]);
+    setOverviewPending(true);
+  }, [resetAutoFit]);
 
   const handleRetry = useCallback(() => {
     void refetch();
@@ -159,6 +170,10 @@ export default function ProjectMapView({
           const raw = readMapBounds(map);
           if (!raw) return;
           saveViewport(map.getCenter()!.toJSON(), map.getZoom() ?? getInitialZoom());
+          setViewport({
+            ...expandBounds(raw, PROJECT_MAP_BBOX_PADDING_RATIO),
+            zoom: Math.round(raw.zoom),
+          });
         };
 
         listeners.push(map.addListener('dragend', onUserMove));
@@ -197,7 +212,8 @@ export default function ProjectMapView({
       mapRef.current = null;
       markerManagerRef.current = null;
       setMapReady(false);
-      hasFittedRef.current = false;
+      setViewport(null);
+      setOverviewPending(true);
     };
   }, [getInitialCenter, getInitialZoom, markUserMoved, saveViewport, unmountPopup]);
 
@@ -233,7 +249,7 @@ export default function ProjectMapView({
     if (filterKey !== filterKeyRef.current) {
       filterKeyRef.current = filterKey;
       resetAutoFit();
-      hasFittedRef.current = false;
+      setOverviewPending(true);
       unmountPopup();
       infoWindowRef.current?.close();
     }
@@ -245,15 +261,29 @@ export default function ProjectMapView({
     const manager = markerManagerRef.current;
     if (!map || !manager || !data?.items) return;
 
+    const clusters = data.clusters ?? [];
     const groups = groupPointsByLocation(data.items);
-    manager.setGroups(groups, openGroup, labels.entityPlural);
+    manager.setGroups(groups, openGroup, labels.entityPlural, clusters, openCluster);
 
-    if (shouldAutoFit() && data.items.length > 0 && !hasFittedRef.current) {
-      hasFittedRef.current = true;
-      fitMapToPoints(map, data.items);
+    if (overviewPending && !isPlaceholderData) {
+      // The fit moves the map; its `idle` then switches the query to the real viewport.
+      if (shouldAutoFit() && (data.items.length > 0 || clusters.length > 0)) {
+        fitMapToResults(map, data.items, clusters);
+      }
+      setOverviewPending(false);
     }
     window.setTimeout(() => google.maps.event.trigger(map, 'resize'), 100);
-  }, [mapReady, data?.items, labels.entityPlural, openGroup, shouldAutoFit]);
+  }, [
+    mapReady,
+    data?.items,
+    data?.clusters,
+    isPlaceholderData,
+    overviewPending,
+    labels.entityPlural,
+    openGroup,
+    openCluster,
+    shouldAutoFit,
+  ]);
 
   useEffect(() => {
     const onKeyDown = (e: KeyboardEvent) => {
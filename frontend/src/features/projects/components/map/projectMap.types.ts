@@ -23,8 +23,20 @@ export type ProjectMapPoint = {
   end_date?: string | null;
 };
 
+/** Server-side cluster (geohash cell) returned for zoomed-out viewports. */
+export type ProjectMapCluster = {
+  id: string;
+  count: number;
+  latitude: number;
+  longitude: number;
+  bounds: Omit<MapBounds, 'zoom'>;
+};
+
 export type ProjectMapPointsResponse = {
   items: ProjectMapPoint[];
+  /** Present when the request sent a viewport + zoom; `items` then only holds leaf points. */
+  clusters?: ProjectMapCluster[];
+  mode?: 'points' | 'clusters';
   mapped_count: number;
   unmapped_count: number;
   total_matching: number;
@@ -1,5 +1,5 @@
 import { PROJECT_MAP_FIT_MAX_ZOOM } from '../../lib/projectMapConfig';
-import type { ProjectMapPoint } from './projectMap.types';
+import type { ProjectMapCluster, ProjectMapPoint } from './projectMap.types';
 
 export function isValidMapCoordinate(lat: unknown, lng: unknown): boolean {
   const la = Number(lat);
@@ -40,6 +40,34 @@ export function fitMapToPoints(
   };
 }
 
+/** Fit leaf points and server clusters (each cluster contributes the bounds of its projects). */
+export function fitMapToResults(
+  map: google.maps.Map,
+  points: ProjectMapPoint[],
+  clusters: ProjectMapCluster[] = [],
+  padding = 48,
+): void {
+  if (!clusters.length) {
+    fitMapToPoints(map, points, padding);
+    return;
+  }
+  const bounds = new google.maps.LatLngBounds();
+  for (const c of clusters) {
+    bounds.extend({ lat: c.bounds.north, lng: c.bounds.east });
+    bounds.extend({ lat: c.bounds.south, lng: c.bounds.west });
+  }
+  for (const p of points) {
+    if (isValidMapCoordinate(p.latitude, p.longitude)) bounds.extend({ lat: p.latitude, lng: p.longitude });
+  }
+  map.fitBounds(bounds, padding);
+  google.maps.event.addListenerOnce(map, 'idle', () => {
+    const zoom = map.getZoom();
+    if (zoom != null && zoom > PROJECT_MAP_FIT_MAX_ZOOM) {
+      map.setZoom(PROJECT_MAP_FIT_MAX_ZOOM);
+    }
+  });
+}
+
 export function readMapBounds(map: google.maps.Map): {
   north: number;
   south: number;
@@ -1,6 +1,6 @@
 import { MarkerClusterer } from '@googlemaps/markerclusterer';
 import { PROJECT_MAP_CLUSTER_COLOR, getProjectMapPinColor } from '../../lib/projectMapColors';
-import type { LocationGroup } from './projectMap.types';
+import type { LocationGroup, ProjectMapCluster } from './projectMap.types';
 
 function pinSvg(color: string, label?: string): string {
   const text = label
@@ -50,12 +50,16 @@ export type MarkerManager = {
     groups: LocationGroup[],
     onClick: (group: LocationGroup) => void,
     entityPlural?: string,
+    /** Server-side clusters (zoomed-out viewports); drawn as-is, not re-clustered in the browser. */
+    clusters?: ProjectMapCluster[],
+    onClusterClick?: (cluster: ProjectMapCluster) => void,
   ) => void;
   clear: () => void;
 };
 
 export function createMarkerManager(map: google.maps.Map): MarkerManager {
   const markers = new Map<string, google.maps.Marker>();
+  const clusterMarkers: google.maps.Marker[] = [];
   let clusterer: MarkerClusterer | null = null;
 
   const clear = () => {
@@ -63,6 +67,10 @@ export function createMarkerManager(map: google.maps.Map): MarkerManager {
       m.setMap(null);
     }
     markers.clear();
+    for (const m of clusterMarkers) {
+      m.setMap(null);
+    }
+    clusterMarkers.length = 0;
     clusterer?.clearMarkers();
     clusterer = null;
   };
@@ -71,10 +79,28 @@ export function createMarkerManager(map: google.maps.Map): MarkerManager {
     groups: LocationGroup[],
     onClick: (group: LocationGroup) => void,
     entityPlural = 'projects',
+    clusters: ProjectMapCluster[] = [],
+    onClusterClick?: (cluster: ProjectMapCluster) => void,
   ) => {
     clear();
     const markerList: google.maps.Marker[] = [];
 
+    for (const cluster of clusters) {
+      const marker = new google.maps.Marker({
+        map,
+        position: { lat: cluster.latitude, lng: cluster.longitude },
+        title: `${cluster.count} ${entityPlural}`,
+        icon: {
+          url: clusterSvg(cluster.count),
+          scaledSize: new google.maps.Size(40, 40),
+          anchor: new google.maps.Point(20, 20),
+        },
+        zIndex: Number(google.maps.Marker.MAX_ZINDEX) + cluster.count,
+      });
+      if (onClusterClick) marker.addListener('click', () => onClusterClick(cluster));
+      clusterMarkers.push(marker);
+    }
+
     for (const group of groups) {
       const count = group.projects.length;
       const status = group.projects[0]?.status;
@@ -1,6 +1,10 @@
 import { useEffect, useMemo, useRef, useState } from 'react';
 import { keepPreviousData, useQuery } from '@tanstack/react-query';
-import { PROJECT_MAP_CACHE_TTL_MS, PROJECT_MAP_DEBOUNCE_MS } from '../lib/projectMapConfig';
+import {
+  PROJECT_MAP_CACHE_TTL_MS,
+  PROJECT_MAP_DEBOUNCE_MS,
+  PROJECT_MAP_OVERVIEW_BOUNDS,
+} from '../lib/projectMapConfig';
 import { fetchMapPoints } from '../services/projectMap.service';
 import type { MapBounds, MapListKind, ProjectMapPointsResponse } from '../components/map/projectMap.types';
 
@@ -59,12 +63,18 @@ export function useProjectMapPoints(
     return p.toString();
   }, [searchParams]);
 
-  const effectiveBounds = useViewportBounds ? debouncedBounds : null;
+  // Only map movement is debounced; the overview request (auto-fit) applies in the same render.
+  const effectiveBounds = !useViewportBounds
+    ? null
+    : bounds === PROJECT_MAP_OVERVIEW_BOUNDS
+      ? bounds
+      : debouncedBounds;
   const boundsKey = roundBounds(effectiveBounds);
 
   return useQuery({
     queryKey: [listKind, 'map-points', businessLine, filterKey, boundsKey],
-    enabled,
+    // In viewport mode wait for the first (debounced) viewport instead of fetching every point.
+    enabled: enabled && (!useViewportBounds || effectiveBounds != null),
     staleTime: PROJECT_MAP_CACHE_TTL_MS,
     placeholderData: keepPreviousData,
     retry: (failureCount, error) => !isMapPointsAbortError(error) && failureCount < 1,
@@ -3,6 +3,9 @@ export const PROJECT_MAP_DEFAULT_REGION = {
   zoom: 6,
 } as const;
 
+/** Whole-world request at zoom 0: coarse server clusters of every match, used to auto-fit. */
+export const PROJECT_MAP_OVERVIEW_BOUNDS = { north: 90, south: -90, east: 180, west: -180, zoom: 0 } as const;
+
 export const PROJECT_MAP_FIT_MAX_ZOOM = 14;
 export const PROJECT_MAP_MIN_HEIGHT_PX = 480;
 export const PROJECT_MAP_DEBOUNCE_MS = 600;
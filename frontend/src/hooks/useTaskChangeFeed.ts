@@ -0,0 +1,129 @@
+import { useEffect, useRef, useState } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import { api, getToken } from '@/lib/api';
+import type { Task, TaskBuckets } from '@/components/tasks/types';
+
+type TaskChangesResponse = { tasks: Task[]; cursor: string | null; has_more: boolean };
+type TaskChangedEvent = { event: 'task_changed'; data: { task_id: string; kind: string; cursor: string | null } };
+
+const RECONNECT_MS = 5_000;
+
+function mergeTasks(buckets: TaskBuckets | undefined, changed: Task[], removedIds: string[]): TaskBuckets | undefined {
+  if (!buckets) return buckets;
+  const drop = new Set([...removedIds, ...changed.map((t) => t.id)]);
+  const next: TaskBuckets = {
+    accepted: buckets.accepted.filter((t) => !drop.has(t.id)),
+    in_progress: buckets.in_progress.filter((t) => !drop.has(t.id)),
+    blocked: (buckets.blocked || []).filter((t) => !drop.has(t.id)),
+    done: buckets.done.filter((t) => !drop.has(t.id)),
+  };
+  for (const task of changed) {
+    if (task.archived_at) continue;
+    const bucket = (next as Record<string, Task[]>)[task.status];
+    if (bucket) bucket.unshift(task);
+  }
+  return next;
+}
+
+/**
+ * Subscribes to /tasks/ws and patches the ['tasks'] query with /tasks/changes deltas.
+ * Returns whether the socket is connected so callers can fall back to slow polling.
+ */
+export function useTaskChangeFeed(enabled: boolean): boolean {
+  const queryClient = useQueryClient();
+  const cursorRef = useRef<string | null>(null);
+  const [connected, setConnected] = useState(false);
+
+  useEffect(() => {
+    if (!enabled) return;
+    let ws: WebSocket | null = null;
+    let closed = false;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let fetching = false;
+    let pending = false;
+    // Task ids announced by push events; if a delta does not return one, the task left this
+    // viewer's board (reassigned), so fall back to a full refetch.
+    const expected = new Set<string>();
+
+    const pullChanges = async () => {
+      if (fetching) {
+        pending = true;
+        return;
+      }
+      fetching = true;
+      try {
+        if (!cursorRef.current) {
+          const head = await api<TaskChangesResponse>('GET', '/tasks/changes');
+          cursorRef.current = head?.cursor || null;
+          queryClient.invalidateQueries({ queryKey: ['tasks'] });
+          return;
+        }
+        const announced = new Set(expected);
+        expected.clear();
+        let hasMore = true;
+        while (hasMore) {
+          const res = await api<TaskChangesResponse>(
+            'GET',
+            `/tasks/changes?cursor=${encodeURIComponent(cursorRef.current || '')}`,
+          );
+          const changed = res?.tasks || [];
+          changed.forEach((t) => announced.delete(t.id));
+          if (changed.length) {
+            queryClient.setQueryData<TaskBuckets>(['tasks'], (prev) => mergeTasks(prev, changed, []));
+          }
+          cursorRef.current = res?.cursor || cursorRef.current;
+          hasMore = !!res?.has_more;
+        }
+        if (announced.size) queryClient.invalidateQueries({ queryKey: ['tasks'] });
+      } catch {
+        queryClient.invalidateQueries({ queryKey: ['tasks'] });
+      } finally {
+        fetching = false;
+        if (pending) {
+          pending = false;
+          void pullChanges();
+        }
+      }
+    };
+
+    const connect = () => {
+      const token = getToken();
+      if (!token || closed) return;
+      const proto = window.location.protocol === 'https:' ? 'wss' : 'ws';
+      ws = new WebSocket(`${proto}://${window.location.host}/tasks/ws?token=${encodeURIComponent(token)}`);
+      ws.onopen = () => {
+        setConnected(true);
+        // Catch up on anything missed while disconnected.
+        void pullChanges();
+      };
+      ws.onmessage = (msg) => {
+        let parsed: TaskChangedEvent | null = null;
+        try {
+          parsed = JSON.parse(msg.data);
+        } catch {
+          return;
+        }
+        if (!parsed || parsed.event !== 'task_changed') return;
+        if (parsed.data.kind === 'deleted') {
+          queryClient.setQueryData<TaskBuckets>(['tasks'], (prev) => mergeTasks(prev, [], [parsed!.data.task_id]));
+          return;
+        }
+        expected.add(parsed.data.task_id);
+        void pullChanges();
+      };
+      ws.onclose = () => {
+        setConnected(false);
+        if (!closed) reconnectTimer = setTimeout(connect, RECONNECT_MS);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      if (reconnectTimer) clearTimeout(reconnectTimer);
+      ws?.close();
+    };
+  }, [enabled, queryClient]);
+
+  return connected;
+}
@@ -8,6 +8,15 @@ export type OrgPerson = {
   roles?: string[];
   profile_photo_file_id?: string | null;
   manager_user_id?: string | null;
+  /** Total reports under this person across the whole org (server hierarchy index). */
+  subtree_size?: number;
+};
+
+/** Forest prebuilt by GET /users/org-tree: root ids and sorted children per manager id. */
+export type PrebuiltOrgTree = {
+  teams: string[];
+  unassigned: string[];
+  children: Record<string, string[]>;
 };
 
 export type OrgTreeNode = OrgPerson & {
@@ -96,6 +105,25 @@ export function buildUserOrgForest(people: OrgPerson[]): OrgForest {
   return { teams, unassigned };
 }
 
+/** Materialize the server's prebuilt forest (no cycle detection or sorting needed client-side). */
+export function orgForestFromPrebuilt(people: OrgPerson[], tree: PrebuiltOrgTree): OrgForest {
+  const byId = new Map(people.map((person) => [person.id, person]));
+  const toNode = (id: string, depth: number): OrgTreeNode | null => {
+    const person = byId.get(id);
+    if (!person) return null;
+    return {
+      ...person,
+      depth,
+      children: (tree.children[id] || [])
+        .map((childId) => toNode(childId, depth + 1))
+        .filter((node): node is OrgTreeNode => node !== null),
+    };
+  };
+  const build = (ids: string[]) =>
+    ids.map((id) => toNode(id, 0)).filter((node): node is OrgTreeNode => node !== null);
+  return { teams: build(tree.teams), unassigned: build(tree.unassigned) };
+}
+
 export function personMatchesOrgQuery(person: OrgPerson, query: string): boolean {
   const needle = query.trim().toLowerCase();
   if (!needle) return true;
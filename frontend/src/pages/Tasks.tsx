@@ -10,6 +10,7 @@ import CreateTaskModal from '@/components/tasks/CreateTaskModal';
 import ArchivedTasksModal from '@/components/tasks/ArchivedTasksModal';
 import type { TaskBuckets } from '@/components/tasks/types';
 import { sortTasksByPriority } from '@/components/tasks/taskUi';
+import { useTaskChangeFeed } from '@/hooks/useTaskChangeFeed';
 import LoadingOverlay from '@/components/LoadingOverlay';
 import {
   AppButton,
@@ -144,10 +145,13 @@ export default function TasksPage() {
     staleTime: 15_000,
   });
 
+  // Live updates arrive over /tasks/ws; polling /tasks/sync is only a slow fallback.
+  const feedConnected = useTaskChangeFeed(true);
+
   useQuery({
     queryKey: ['tasks-sync'],
     queryFn: () => api<{ latest_task_updated_at: string | null }>('GET', '/tasks/sync'),
-    refetchInterval: 5_000,
+    refetchInterval: feedConnected ? 60_000 : 5_000,
     refetchIntervalInBackground: false,
     enabled: true,
     onSuccess: (res) => {
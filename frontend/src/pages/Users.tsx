@@ -5,7 +5,7 @@ import { useState, useMemo, useEffect } from 'react';
 import { LayoutGrid, List, Network, Search, SlidersHorizontal, Star, Users as UsersIcon } from 'lucide-react';
 import InviteUserModal from '@/components/InviteUserModal';
 import { UserOrgTreeView } from '@/components/users/UserOrgTreeView';
-import type { OrgPerson } from '@/lib/userOrgTree';
+import type { OrgPerson, PrebuiltOrgTree } from '@/lib/userOrgTree';
 import FilterBuilderModal from '@/components/FilterBuilder/FilterBuilderModal';
 import FilterChip from '@/components/FilterBuilder/FilterChip';
 import { FilterRule, FieldConfig } from '@/components/FilterBuilder/types';
@@ -56,7 +56,7 @@ type User = {
   manager_user_id?: string | null;
 };
 type UsersResponse = { items: User[], total: number, page: number, limit: number, total_pages: number };
-type UsersOrgTreeResponse = { items: OrgPerson[]; total: number; truncated?: boolean };
+type UsersOrgTreeResponse = { items: OrgPerson[]; total: number; truncated?: boolean; tree?: PrebuiltOrgTree };
 type UserSortColumn = 'user' | 'job_title' | 'email' | 'status';
 type UsersViewMode = 'cards' | 'list' | 'hierarchy';
 
@@ -876,6 +876,7 @@ export default function Users(){
             ) : null}
             <UserOrgTreeView
               people={orgTree?.items || []}
+              tree={orgTree?.tree}
               searchQuery={searchQuery}
               canViewUserDetails={canViewUserDetails}
             />
@@ -44,6 +44,7 @@ const backendProxyPrefixes = [
   '/document-signature-templates',
   '/employees',
   '/estimate',
+  '/exports',
   '/files',
   '/fleet',
   '/form-custom-lists',
@@ -83,7 +84,7 @@ const backendDevProxy = Object.fromEntries(
       target: BACKEND_DEV_TARGET,
       changeOrigin: true,
     };
-    if (prefix === '/chat') cfg.ws = true;
+    if (prefix === '/chat' || prefix === '/tasks') cfg.ws = true; // /chat/ws, /tasks/ws
     if (!PROXY_NO_SPA_BYPASS.has(prefix)) cfg.bypass = spaDocumentBypass;
     return [prefix, cfg];
   })
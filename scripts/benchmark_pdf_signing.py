@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy PyPDF2/ReportLab signing path vs the single-pass PyMuPDF pipeline.
+
+The legacy path (kept here only for comparison) re-parsed and re-wrote the whole PDF once per
+page carrying fields, again to append the certificate and again to flatten. The current path
+(app.services.onboarding_sign.build_signed_pdf_from_template) opens and saves once.
+
+Each run happens in a fresh child process so peak RSS is not polluted by earlier runs.
+
+Usage:
+    python scripts/benchmark_pdf_signing.py                 # synthetic 40-page scan
+    python scripts/benchmark_pdf_signing.py --pages 120 --repeat 5
+    python scripts/benchmark_pdf_signing.py --pdf path/to/scan.pdf
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fitz  # PyMuPDF
+
+from app.services import onboarding_sign as sign
+
+_CERT = {
+    "document_name": "Benchmark scan",
+    "document_id": "bench",
+    "base_doc_hash": "0" * 64,
+    "requested_by": "Benchmark",
+    "requested_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+    "acceptance_statement": "I have read and agree to this document.",
+    "signer_name": "Jane Doe",
+    "signer_email": "jane@example.com",
+    "signed_at": datetime(2026, 1, 2, tzinfo=timezone.utc),
+    "ip_address": "127.0.0.1",
+    "user_agent": "benchmark",
+}
+
+
+def make_scanned_pdf(pages: int, dpi: int = 150) -> bytes:
+    """Letter pages that are each one full-page grayscale noise image, like a raw scan."""
+    w, h = int(8.5 * dpi), int(11 * dpi)
+    doc = fitz.open()
+    for _ in range(pages):
+        # Light-gray paper noise: compresses about as badly as a real scan does.
+        samples = bytes(b | 0xC0 for b in os.urandom(w * h))
+        pix = fitz.Pixmap(fitz.csGRAY, w, h, samples, 0)
+        page = doc.new_page(width=612, height=792)
+        page.insert_image(page.rect, stream=pix.tobytes("jpeg", jpg_quality=70))
+    out = doc.tobytes(garbage=3, deflate=True)
+    doc.close()
+    return out
+
+
+def make_fields(page_count: int) -> tuple:
+    sig = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 300, 100), 1)
+    sig.clear_with(0)
+    png = sig.tobytes("png")
+    fields, values = [], {}
+    targets = sorted({0, page_count // 2, page_count - 1})
+    for pi in targets:
+        for kind, rect, val in (
+            ("signature", (350, 80, 150, 50), png),
+            ("initials", (500, 40, 60, 30), png),
+            ("text", (72, 120, 200, 14), "Jane Doe"),
+            ("date", (72, 100, 120, 14), "2026-01-02"),
+            ("checkbox", (72, 60, 14, 14), True),
+            ("paragraph", (72, 150, 300, 60), "Acknowledged. " * 20),
+        ):
+            fid = f"{kind}-{pi}"
+            x, y, w, h = rect
+            fields.append(
+                {"id": fid, "type": kind, "page_index": pi, "rect": {"x": x, "y": y, "width": w, "height": h}}
+            )
+            values[fid] = val
+    return fields, values
+
+
+def legacy_sign(base_pdf: bytes, fields: list, values: dict) -> bytes:
+    """The pre-pipeline flow: one PyPDF2 merge + rewrite per page, append, then flatten."""
+    import tempfile
+    from collections import defaultdict
+
+    from PyPDF2 import PdfReader, PdfWriter
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    def merge_page(pdf_bytes: bytes, page_index: int, page_fields: list) -> bytes:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        mb = reader.pages[page_index].mediabox
+        packet = io.BytesIO()
+        can = canvas.Canvas(packet, pagesize=(float(mb.width), float(mb.height)))
+        for f in sign.sort_template_fields_for_draw(page_fields):
+            r = f["rect"]
+            x, y, w, h = float(r["x"]), float(r["y"]), float(r["width"]), float(r["height"])
+            val = values.get(f["id"])
+            if f["type"] in ("signature", "initials"):
+                with tempfile.NamedTemporaryFile(suffix=".png") as tmp:
+                    tmp.write(val)
+                    tmp.flush()
+                    can.drawImage(ImageReader(tmp.name), x, y, width=w, height=h,
+                                  preserveAspectRatio=True, anchor="c", mask="auto")
+            elif f["type"] == "checkbox":
+                can.setFont("Helvetica-Bold", 14)
+                can.drawString(x + w / 2 - 4, y + h / 2 - 14 * 0.35, "✓")
+            else:
+                fs = 8 if f["type"] == "paragraph" else 9
+                can.setFont("Helvetica", fs)
+                max_chars = max(4, int(w / (fs * 0.45)))
+                ty = sign._single_line_baseline_bottom(y, h, fs)
+                for line in sign._wrap(val, max_chars)[: max(1, int((h - 4) // (fs + 3)))]:
+                    can.drawString(x + 2, ty, line)
+                    ty += fs + 3
+        can.save()
+        packet.seek(0)
+        overlay = PdfReader(packet)
+        writer = PdfWriter()
+        for i, page in enumerate(reader.pages):
+            if i == page_index:
+                page.merge_page(overlay.pages[0])
+            writer.add_page(page)
+        out = io.BytesIO()
+        writer.write(out)
+        return out.getvalue()
+
+    by_page = defaultdict(list)
+    for f in fields:
+        by_page[int(f["page_index"])].append(f)
+    current = base_pdf
+    for pi in sorted(by_page):
+        current = merge_page(current, pi, by_page[pi])
+
+    writer = PdfWriter()
+    for p in PdfReader(io.BytesIO(current)).pages:
+        writer.add_page(p)
+    for p in PdfReader(io.BytesIO(sign._certificate_for(**_CERT))).pages:
+        writer.add_page(p)
+    out = io.BytesIO()
+    writer.write(out)
+    final = sign.make_signed_pdf_non_interactive(out.getvalue())
+    sign.sha256_bytes(final)
+    return final
+
+
+def single_pass_sign(base_pdf: bytes, fields: list, values: dict) -> bytes:
+    final, _digest = sign.build_signed_pdf_from_template(base_pdf, fields, values, **_CERT)
+    return final
+
+
+_VARIANTS = {"legacy": legacy_sign, "single_pass": single_pass_sign}
+
+
+def _run_once(variant: str, base_pdf: bytes, conn) -> None:
+    fields, values = make_fields(fitz.open(stream=base_pdf, filetype="pdf").page_count)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = _VARIANTS[variant](base_pdf, fields, values)
+    elapsed = time.perf_counter() - t0
+    _current, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux; the delta includes MuPDF's C allocations that tracemalloc misses.
+    conn.send((elapsed, py_peak, max(0, rss_after - rss_before) * 1024, len(out)))
+    conn.close()
+
+
+def measure(variant: str, base_pdf: bytes) -> tuple:
+    parent, child = multiprocessing.Pipe(duplex=False)
+    proc = multiprocessing.Process(target=_run_once, args=(variant, base_pdf, child))
+    proc.start()
+    result = parent.recv()
+    proc.join()
+    return result
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pdf", help="Existing PDF to sign instead of a synthetic scan")
+    ap.add_argument("--pages", type=int, default=40, help="Synthetic scan page count (default 40)")
+    ap.add_argument("--dpi", type=int, default=150, help="Synthetic scan resolution (default 150)")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per variant; the median is reported")
+    args = ap.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "rb") as fh:
+            base_pdf = fh.read()
+    else:
+        base_pdf = make_scanned_pdf(args.pages, args.dpi)
+    pages = fitz.open(stream=base_pdf, filetype="pdf").page_count
+    print(f"Input: {pages} pages, {len(base_pdf) / 1e6:.1f} MB, {args.repeat} runs per variant")
+    print(f"{'variant':<12} {'median s':>9} {'py peak MB':>11} {'rss delta MB':>13} {'output MB':>10}")
+    for variant in _VARIANTS:
+        runs = [measure(variant, base_pdf) for _ in range(max(1, args.repeat))]
+        print(
+            f"{variant:<12} {statistics.median(r[0] for r in runs):>9.2f}"
+            f" {max(r[1] for r in runs) / 1e6:>11.1f} {max(r[2] for r in runs) / 1e6:>13.1f}"
+            f" {runs[0][3] / 1e6:>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,11 @@ Script para importar clientes de um arquivo CSV.
 Mapeia os campos da planilha para os campos existentes no modelo Client.
 Campos que não existem no modelo são ignorados.
 
+Os clientes existentes (nome e codigo) sao carregados numa unica consulta e os novos
+sao gravados em lotes (app/services/bulk_import.py).
+
 Uso:
-    python scripts/import_customers.py <caminho_do_csv>
+    python scripts/import_customers.py <caminho_do_csv> [--dry-run]
     
 Formato esperado do CSV:
     - COMPANY NAME (obrigatório)
@@ -24,7 +27,6 @@ Formato esperado do CSV:
 """
 import sys
 import os
-import csv
 import uuid
 import re
 
@@ -51,6 +53,7 @@ if database_url.startswith("postgresql"):
 try:
     from app.db import SessionLocal
     from app.models.models import Client, ClientContact
+    from app.services.bulk_import import ImportPlan, apply_plan, iter_csv_records, prefetch_index
 except ImportError as e:
     print(f"ERROR: Failed to import database components: {e}")
     sys.exit(1)
@@ -90,6 +93,81 @@ def normalize_field(value: str) -> str:
     return value if value else None
 
 
+def _first(row: dict, *names: str):
+    for name in names:
+        if row.get(name):
+            return row.get(name)
+    return None
+
+
+def plan_customers(rows, existing_names: set, existing_codes: set) -> ImportPlan:
+    """Planeja os clientes novos (e contatos) a partir das linhas do CSV."""
+    plan = ImportPlan()
+    for row_num, row in rows:
+        company_name = normalize_field(row.get('COMPANY NAME') or row.get('COMPANYNAME'))
+        if not company_name:
+            plan.skip(row_num, "COMPANY NAME vazio")
+            continue
+
+        # Verifica se ja existe um cliente com esse nome (no banco ou antes neste arquivo)
+        if company_name in existing_names:
+            plan.skip(row_num, f"Cliente '{company_name}' ja existe")
+            continue
+        existing_names.add(company_name)
+
+        client_data = {
+            'name': company_name,
+            'display_name': company_name,  # Usa o mesmo nome como display_name
+            'client_type': normalize_field(row.get('TYPE')),
+            'description': normalize_field(row.get('SPECIALTY') or row.get('COMPANY NOTES')),
+            'address_line1': normalize_field(row.get('STREET1') or row.get('STREET')),
+            'city': normalize_field(row.get('CITY')),
+            'province': normalize_field(row.get('STATE')),
+            'postal_code': normalize_field(row.get('ZIPCODE') or row.get('POSTAL CODE')),
+        }
+        client_data = {k: v for k, v in client_data.items() if v is not None}
+
+        # Gera um código único baseado no nome
+        base_code = company_name.lower().replace(" ", "-")[:20]
+        code = base_code
+        i = 1
+        while code in existing_codes:
+            code = f"{base_code}-{i}"
+            i += 1
+        existing_codes.add(code)
+        client_data['code'] = code
+        client_data['id'] = uuid.uuid4()
+
+        # Contatos para os telefones (variações dos nomes das colunas)
+        phone1 = clean_phone(
+            _first(row, 'PHONE1 AREACODE', 'PHONE1 A', 'PHONE1A', 'PHONE1 AREA CODE'),
+            _first(row, 'PHONE1 #', 'PHONE1#', 'PHONE1', 'PHONE1 NUMBER'),
+        )
+        phone2 = clean_phone(
+            _first(row, 'PHONE2 AREACODE', 'PHONE2 A', 'PHONE2A', 'PHONE2 AREA CODE'),
+            _first(row, 'PHONE2 #', 'PHONE2#', 'PHONE2', 'PHONE2 NUMBER'),
+        )
+        contacts = []
+        if phone1:
+            contacts.append((ClientContact, {
+                'client_id': client_data['id'],
+                'name': company_name,  # Usa o nome da empresa como nome do contato
+                'phone': phone1,
+                'is_primary': True,
+                'sort_index': 0,
+            }))
+        if phone2:
+            contacts.append((ClientContact, {
+                'client_id': client_data['id'],
+                'name': f"{company_name} (Secondary)",
+                'phone': phone2,
+                'is_primary': False,
+                'sort_index': 1,
+            }))
+        plan.create(row_num, f"'{company_name}' (codigo: {code})", client_data, children=contacts)
+    return plan
+
+
 def import_customers(csv_path: str, dry_run: bool = False):
     """Importa clientes de um arquivo CSV"""
     
@@ -98,130 +176,28 @@ def import_customers(csv_path: str, dry_run: bool = False):
         sys.exit(1)
     
     db = SessionLocal()
-    created_count = 0
-    skipped_count = 0
-    error_count = 0
-    
     try:
-        with open(csv_path, 'r', encoding='utf-8-sig') as f:
-            # Tenta detectar o delimitador, mas usa vírgula como padrão
-            try:
-                sample = f.read(1024)
-                f.seek(0)
-                sniffer = csv.Sniffer()
-                delimiter = sniffer.sniff(sample).delimiter
-            except:
-                delimiter = ','
-            
-            # Usa csv.QUOTE_MINIMAL para lidar com campos que contêm quebras de linha
-            reader = csv.DictReader(f, delimiter=delimiter, quoting=csv.QUOTE_MINIMAL)
-            
-            # Normaliza os nomes das colunas (remove espaços extras, converte para maiúsculas)
-            if reader.fieldnames:
-                fieldnames = [name.strip().upper() for name in reader.fieldnames]
-                reader.fieldnames = fieldnames
-            
-            print(f"Colunas encontradas: {', '.join(fieldnames)}")
-            print(f"\n{'[DRY RUN] ' if dry_run else ''}Iniciando importação...\n")
-            
-            for row_num, row in enumerate(reader, start=2):  # Começa em 2 porque linha 1 é header
-                try:
-                    # Mapeia os campos
-                    company_name = normalize_field(row.get('COMPANY NAME') or row.get('COMPANYNAME'))
-                    
-                    if not company_name:
-                        print(f"Linha {row_num}: Pulando - COMPANY NAME vazio")
-                        skipped_count += 1
-                        continue
-                    
-                    # Verifica se ja existe um cliente com esse nome
-                    existing = db.query(Client).filter(Client.name == company_name).first()
-                    if existing:
-                        print(f"Linha {row_num}: Cliente '{company_name}' ja existe, pulando...")
-                        skipped_count += 1
-                        continue
-                    
-                    # Prepara os dados do cliente
-                    client_data = {
-                        'name': company_name,
-                        'display_name': company_name,  # Usa o mesmo nome como display_name
-                        'client_type': normalize_field(row.get('TYPE')),
-                        'description': normalize_field(row.get('SPECIALTY') or row.get('COMPANY NOTES')),
-                        'address_line1': normalize_field(row.get('STREET1') or row.get('STREET')),
-                        'city': normalize_field(row.get('CITY')),
-                        'province': normalize_field(row.get('STATE')),
-                        'postal_code': normalize_field(row.get('ZIPCODE') or row.get('POSTAL CODE')),
-                    }
-                    
-                    # Remove campos None
-                    client_data = {k: v for k, v in client_data.items() if v is not None}
-                    
-                    # Gera um código único baseado no nome
-                    base_code = company_name.lower().replace(" ", "-")[:20]
-                    code = base_code
-                    i = 1
-                    while db.query(Client).filter(Client.code == code).first():
-                        code = f"{base_code}-{i}"
-                        i += 1
-                    client_data['code'] = code
-                    
-                    if not dry_run:
-                        # Cria o cliente
-                        client = Client(**client_data)
-                        db.add(client)
-                        db.commit()
-                        db.refresh(client)
-                        
-                        # Cria contatos para os telefones, se existirem
-                        # Tenta diferentes variações dos nomes das colunas de telefone
-                        phone1_area = row.get('PHONE1 AREACODE') or row.get('PHONE1 A') or row.get('PHONE1A') or row.get('PHONE1 AREA CODE')
-                        phone1_num = row.get('PHONE1 #') or row.get('PHONE1#') or row.get('PHONE1') or row.get('PHONE1 NUMBER')
-                        phone1 = clean_phone(phone1_area, phone1_num)
-                        
-                        phone2_area = row.get('PHONE2 AREACODE') or row.get('PHONE2 A') or row.get('PHONE2A') or row.get('PHONE2 AREA CODE')
-                        phone2_num = row.get('PHONE2 #') or row.get('PHONE2#') or row.get('PHONE2') or row.get('PHONE2 NUMBER')
-                        phone2 = clean_phone(phone2_area, phone2_num)
-                        
-                        # Cria primeiro contato (telefone principal)
-                        if phone1:
-                            contact1 = ClientContact(
-                                client_id=client.id,
-                                name=company_name,  # Usa o nome da empresa como nome do contato
-                                phone=phone1,
-                                is_primary=True,
-                                sort_index=0
-                            )
-                            db.add(contact1)
-                        
-                        # Cria segundo contato (telefone secundário), se existir
-                        if phone2:
-                            contact2 = ClientContact(
-                                client_id=client.id,
-                                name=f"{company_name} (Secondary)",
-                                phone=phone2,
-                                is_primary=False,
-                                sort_index=1
-                            )
-                            db.add(contact2)
-                        
-                        db.commit()
-                        created_count += 1
-                        print(f"Linha {row_num}: [OK] Cliente '{company_name}' criado (codigo: {code})")
-                    else:
-                        created_count += 1
-                        print(f"Linha {row_num}: [DRY RUN] Cliente '{company_name}' seria criado (codigo: {code})")
-                        print(f"         Dados: {client_data}")
-                
-                except Exception as e:
-                    error_count += 1
-                    print(f"Linha {row_num}: [ERRO] Erro ao processar: {e}")
-                    if not dry_run:
-                        db.rollback()
+        existing = prefetch_index(db, [Client.id, Client.name, Client.code], lambda r: r.id)
+        existing_names = {r.name for r in existing.values() if r.name}
+        existing_codes = {r.code for r in existing.values() if r.code}
+
+        print(f"\n{'[DRY RUN] ' if dry_run else ''}Iniciando importação...\n")
+        plan = plan_customers(iter_csv_records(csv_path, encoding='utf-8-sig'), existing_names, existing_codes)
+        plan.report()
+
+        error_count = 0
+        created_count = len(plan.creates)
+        if not dry_run:
+            result = apply_plan(db, Client, plan)
+            created_count = result.created
+            if result.error:
+                error_count += 1
+                print("Rode o script novamente para continuar; lotes ja gravados serao pulados.")
         
         print(f"\n{'='*60}")
         print(f"Importacao concluida!")
         print(f"  Criados: {created_count}")
-        print(f"  Pulados: {skipped_count}")
+        print(f"  Pulados: {len(plan.skipped)}")
         print(f"  Erros: {error_count}")
         print(f"{'='*60}")
     
@@ -19,6 +19,9 @@ Defaults aligned with NewCustomerModal / current app conventions:
   province      = full name (BC -> British Columbia, ON -> Ontario, ...)
   code          = next sequential 5-digit code (00001, 00002, ...)
 
+Existing clients are loaded once (dataforma_id / name / code) and new ones are
+written in bulk batches (app/services/bulk_import.py).
+
 Usage:
     python scripts/import_dataforma_customers_2026.py <path_to_csv> [--dry-run]
 
@@ -30,11 +33,12 @@ Example:
 from __future__ import annotations
 
 import argparse
-import csv
 import os
 import re
 import sys
-from typing import Iterable, Optional
+import uuid
+from types import SimpleNamespace
+from typing import Optional
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -56,6 +60,7 @@ if database_url.startswith("postgresql"):
 try:
     from app.db import SessionLocal
     from app.models.models import Client, ClientContact
+    from app.services.bulk_import import ImportPlan, apply_plan, detect_encoding, iter_csv_records, prefetch_index
 except ImportError as e:
     print(f"ERROR: Failed to import database components: {e}")
     sys.exit(1)
@@ -123,30 +128,6 @@ def normalize_text(value: Optional[str]) -> Optional[str]:
     return text or None
 
 
-def detect_encoding(path: str) -> str:
-    """Detect a encoding that can decode the entire file (not just a prefix)."""
-    with open(path, "rb") as fh:
-        raw = fh.read()
-    last_error: Exception | None = None
-    for encoding in ("utf-8-sig", "utf-8", "cp1252", "latin-1"):
-        try:
-            raw.decode(encoding)
-            return encoding
-        except UnicodeDecodeError as e:
-            last_error = e
-    raise RuntimeError(f"Could not decode CSV (last error: {last_error})")
-
-
-def open_csv(path: str):
-    """Open CSV trying UTF-8 first, then Windows-1252 (DataForma export)."""
-    encoding = detect_encoding(path)
-    return open(path, "r", encoding=encoding, newline=""), encoding
-
-
-def normalize_headers(fieldnames: Iterable[str]) -> list[str]:
-    return [str(name or "").strip().upper() for name in fieldnames]
-
-
 def title_city(city: Optional[str], company_name: Optional[str] = None) -> Optional[str]:
     if company_name:
         fixed = CITY_FIXES_BY_COMPANY.get(company_name.strip().lower())
@@ -291,51 +272,48 @@ def build_description(
     return text
 
 
-def next_client_code(db, reserved: set[str]) -> str:
-    existing = db.query(Client.code).filter(Client.code.isnot(None)).all()
-    numeric_codes: list[int] = []
-    for row in existing:
-        code_value = row[0] if isinstance(row, (tuple, list)) else row
-        if code_value and isinstance(code_value, str) and code_value.isdigit() and len(code_value) == 5:
-            numeric_codes.append(int(code_value))
+class ExistingClients:
+    """Existing clients loaded in one query: dataforma_id / name lookups and the code sequence."""
 
-    next_num = (max(numeric_codes) if numeric_codes else 0) + 1
-    while True:
-        code = f"{next_num:05d}"
-        if code in reserved:
-            next_num += 1
-            continue
-        taken = (
-            db.query(Client)
-            .filter(Client.code == code, Client.deleted_at.is_(None))
-            .first()
+    def __init__(self, db):
+        rows = prefetch_index(
+            db,
+            [Client.id, Client.code, Client.name, Client.display_name, Client.dataforma_id, Client.deleted_at],
+            lambda r: r.id,
         )
-        if taken:
-            next_num += 1
-            continue
-        reserved.add(code)
+        self.by_dataforma_id: dict[str, object] = {}
+        self.by_name: dict[str, object] = {}
+        self.codes: set[str] = set()
+        for row in rows.values():
+            if row.code:
+                self.codes.add(row.code)
+            if row.dataforma_id:
+                self.by_dataforma_id.setdefault(row.dataforma_id, row)
+            if row.deleted_at is None:
+                for name in (row.name, row.display_name):
+                    if name:
+                        self.by_name.setdefault(name.lower(), row)
+        numeric = [int(c) for c in self.codes if c.isdigit() and len(c) == 5]
+        self._next_code = (max(numeric) if numeric else 0) + 1
+
+    def find(self, dataforma_id: Optional[str], company_name: str):
+        if dataforma_id and dataforma_id in self.by_dataforma_id:
+            return self.by_dataforma_id[dataforma_id]
+        return self.by_name.get(company_name.lower())
+
+    def next_code(self) -> str:
+        while f"{self._next_code:05d}" in self.codes:
+            self._next_code += 1
+        code = f"{self._next_code:05d}"
+        self.codes.add(code)
         return code
 
-
-def find_existing_client(db, dataforma_id: Optional[str], company_name: str) -> Optional[Client]:
-    if dataforma_id:
-        by_df = db.query(Client).filter(Client.dataforma_id == dataforma_id).first()
-        if by_df:
-            return by_df
-    from sqlalchemy import func, or_
-
-    name_l = company_name.lower()
-    return (
-        db.query(Client)
-        .filter(
-            Client.deleted_at.is_(None),
-            or_(
-                func.lower(Client.name) == name_l,
-                func.lower(func.coalesce(Client.display_name, "")) == name_l,
-            ),
-        )
-        .first()
-    )
+    def add(self, client_data: dict) -> None:
+        """Rows planned in this run count as existing for later duplicates in the file."""
+        row = SimpleNamespace(code=client_data.get("code"), dataforma_id=client_data.get("dataforma_id"))
+        if client_data.get("dataforma_id"):
+            self.by_dataforma_id.setdefault(client_data["dataforma_id"], row)
+        self.by_name.setdefault(client_data["name"].lower(), row)
 
 
 def map_row(row: dict) -> tuple[Optional[dict], Optional[str], list[str], Optional[str], Optional[str]]:
@@ -409,142 +387,132 @@ def import_customers(
 
     # Dry-run validates mapping only — no DB connection (avoids hanging on remote Postgres).
     db = None if dry_run else SessionLocal()
-    created = skipped = errors = 0
-    reserved_codes: set[str] = set()
+    skipped = errors = 0
     province_counts: dict[str, int] = {}
     type_counts: dict[str, int] = {}
     type_remaps: dict[str, int] = {}
     created_rows: list[dict] = []
     skipped_rows: list[dict] = []
+    plan = ImportPlan()
 
     try:
-        fh, encoding = open_csv(csv_path)
-        with fh:
-            reader = csv.DictReader(fh)
-            if not reader.fieldnames:
-                print("ERROR: CSV has no header row")
-                return 1
-
-            reader.fieldnames = normalize_headers(reader.fieldnames)
-            print(f"Encoding: {encoding}", flush=True)
-            print(f"Columns: {', '.join(reader.fieldnames)}", flush=True)
-            print(f"\n{'[DRY RUN] ' if dry_run else ''}Starting import...\n", flush=True)
-
-            for row_num, row in enumerate(reader, start=2):
-                try:
-                    client_data, phone, emails, skip_reason, type_note = map_row(row)
-                    if skip_reason or not client_data:
-                        print(f"Line {row_num}: skip — {skip_reason or 'unmapped row'}", flush=True)
-                        skipped += 1
-                        skipped_rows.append(
-                            {
-                                "line": row_num,
-                                "name": normalize_text(row.get("COMPANY NAME")) or "",
-                                "reason": skip_reason or "unmapped row",
-                            }
-                        )
-                        continue
-
-                    company_name = client_data["name"]
-                    dataforma_id = client_data.get("dataforma_id")
-
-                    if type_note:
-                        type_remaps[type_note] = type_remaps.get(type_note, 0) + 1
-
-                    if db is not None:
-                        existing = find_existing_client(db, dataforma_id, company_name)
-                        if existing:
-                            reason = (
-                                f"dataforma_id={dataforma_id}"
-                                if dataforma_id and existing.dataforma_id == dataforma_id
-                                else f"name match (existing code={existing.code})"
-                            )
-                            print(f"Line {row_num}: skip — '{company_name}' already exists ({reason})", flush=True)
-                            skipped += 1
-                            skipped_rows.append(
-                                {
-                                    "line": row_num,
-                                    "name": company_name,
-                                    "reason": reason,
-                                    "existing_code": existing.code or "",
-                                }
-                            )
-                            continue
-                        code = next_client_code(db, reserved_codes)
-                    else:
-                        code = f"DRY-{created + 1:05d}"
-
-                    client_data["code"] = code
-                    province = client_data.get("province") or "(none)"
-                    province_counts[province] = province_counts.get(province, 0) + 1
-                    ctype = client_data.get("client_type") or "(none)"
-                    type_counts[ctype] = type_counts.get(ctype, 0) + 1
-
-                    review_row = {
+        encoding = detect_encoding(csv_path)
+        records = iter_csv_records(csv_path, encoding=encoding, delimiter=",")
+        existing = ExistingClients(db) if db is not None else None
+        print(f"Encoding: {encoding}", flush=True)
+        print(f"\n{'[DRY RUN] ' if dry_run else ''}Starting import...\n", flush=True)
+
+        for row_num, row in records:
+            client_data, phone, emails, skip_reason, type_note = map_row(row)
+            if skip_reason or not client_data:
+                print(f"Line {row_num}: skip — {skip_reason or 'unmapped row'}", flush=True)
+                skipped += 1
+                skipped_rows.append(
+                    {
                         "line": row_num,
-                        "code": code,
-                        "dataforma_id": dataforma_id or "",
-                        "name": company_name,
-                        "client_type": client_data.get("client_type") or "",
-                        "type_remap": type_note or "",
-                        "city": client_data.get("city") or "",
-                        "province": client_data.get("province") or "",
-                        "postal_code": client_data.get("postal_code") or "",
-                        "phone": phone or "",
-                        "billing_email": client_data.get("billing_email") or "",
-                        "address_line1": client_data.get("address_line1") or "",
+                        "name": normalize_text(row.get("COMPANY NAME")) or "",
+                        "reason": skip_reason or "unmapped row",
                     }
+                )
+                continue
+
+            company_name = client_data["name"]
+            dataforma_id = client_data.get("dataforma_id")
 
-                    if dry_run:
-                        created += 1
-                        created_rows.append(review_row)
-                        remap = f" (remapped {type_note})" if type_note else ""
-                        print(f"Line {row_num}: [DRY RUN] would create '{company_name}'{remap}", flush=True)
-                        print(
-                            f"         type={client_data.get('client_type')!r} "
-                            f"province={client_data.get('province')!r} "
-                            f"city={client_data.get('city')!r} "
-                            f"postal={client_data.get('postal_code')!r}",
-                            flush=True,
-                        )
-                        print(
-                            f"         phone={phone!r} "
-                            f"billing_email={client_data.get('billing_email')!r} "
-                            f"emails={emails}",
-                            flush=True,
-                        )
-                        continue
-
-                    client = Client(**client_data)
-                    db.add(client)
-                    db.flush()
-
-                    if phone:
-                        db.add(
-                            ClientContact(
-                                client_id=client.id,
-                                name=company_name,
-                                phone=phone,
-                                email=emails[0] if emails else None,
-                                is_primary=True,
-                                sort_index=0,
-                            )
-                        )
-
-                    db.commit()
-                    created += 1
-                    created_rows.append(review_row)
-                    print(
-                        f"Line {row_num}: [OK] created '{company_name}' "
-                        f"(code={code}, dataforma_id={dataforma_id})",
-                        flush=True,
+            if type_note:
+                type_remaps[type_note] = type_remaps.get(type_note, 0) + 1
+
+            if existing is not None:
+                found = existing.find(dataforma_id, company_name)
+                if found:
+                    reason = (
+                        f"dataforma_id={dataforma_id}"
+                        if dataforma_id and found.dataforma_id == dataforma_id
+                        else f"name match (existing code={found.code})"
+                    )
+                    print(f"Line {row_num}: skip — '{company_name}' already exists ({reason})", flush=True)
+                    skipped += 1
+                    skipped_rows.append(
+                        {
+                            "line": row_num,
+                            "name": company_name,
+                            "reason": reason,
+                            "existing_code": found.code or "",
+                        }
                     )
+                    continue
+                code = existing.next_code()
+            else:
+                code = f"DRY-{len(plan.creates) + 1:05d}"
+
+            client_data["code"] = code
+            client_data["id"] = uuid.uuid4()
+            if existing is not None:
+                existing.add(client_data)
+            province = client_data.get("province") or "(none)"
+            province_counts[province] = province_counts.get(province, 0) + 1
+            ctype = client_data.get("client_type") or "(none)"
+            type_counts[ctype] = type_counts.get(ctype, 0) + 1
+
+            created_rows.append(
+                {
+                    "line": row_num,
+                    "code": code,
+                    "dataforma_id": dataforma_id or "",
+                    "name": company_name,
+                    "client_type": client_data.get("client_type") or "",
+                    "type_remap": type_note or "",
+                    "city": client_data.get("city") or "",
+                    "province": client_data.get("province") or "",
+                    "postal_code": client_data.get("postal_code") or "",
+                    "phone": phone or "",
+                    "billing_email": client_data.get("billing_email") or "",
+                    "address_line1": client_data.get("address_line1") or "",
+                }
+            )
+            contacts = []
+            if phone:
+                contacts.append(
+                    (
+                        ClientContact,
+                        {
+                            "client_id": client_data["id"],
+                            "name": company_name,
+                            "phone": phone,
+                            "email": emails[0] if emails else None,
+                            "is_primary": True,
+                            "sort_index": 0,
+                        },
+                    )
+                )
+            plan.create(row_num, f"'{company_name}' (code={code}, dataforma_id={dataforma_id})", client_data, contacts)
+
+            if dry_run:
+                remap = f" (remapped {type_note})" if type_note else ""
+                print(f"Line {row_num}: [DRY RUN] would create '{company_name}'{remap}", flush=True)
+                print(
+                    f"         type={client_data.get('client_type')!r} "
+                    f"province={client_data.get('province')!r} "
+                    f"city={client_data.get('city')!r} "
+                    f"postal={client_data.get('postal_code')!r}",
+                    flush=True,
+                )
+                print(
+                    f"         phone={phone!r} "
+                    f"billing_email={client_data.get('billing_email')!r} "
+                    f"emails={emails}",
+                    flush=True,
+                )
 
-                except Exception as e:
-                    errors += 1
-                    print(f"Line {row_num}: [ERROR] {e}", flush=True)
-                    if db is not None:
-                        db.rollback()
+        created = len(plan.creates)
+        if db is not None:
+            result = apply_plan(db, Client, plan, log=lambda line: print(line, flush=True))
+            created = result.created
+            # Batches commit in file order, so the first `created` planned rows are in.
+            created_rows = created_rows[:created]
+            if result.error:
+                errors += 1
+                print("Re-run the import to resume; clients already written are skipped.", flush=True)
 
         print("\n" + "=" * 60, flush=True)
         print("Import finished" + (" (dry-run, no DB writes)" if dry_run else ""), flush=True)
@@ -4,6 +4,9 @@ Script to import fleet vehicles from the Fleet Master List tab of an Excel file.
 Maps columns from the Excel sheet to FleetAsset model fields.
 Creates assets with asset_type='vehicle'.
 
+The sheet is streamed (openpyxl read-only), existing vehicles and divisions are
+loaded once, and new assets are written in bulk batches (app/services/bulk_import.py).
+
 Usage:
     python scripts/import_fleet_vehicles_from_excel.py <path_to_xlsx> [--dry-run]
 
@@ -12,9 +15,11 @@ Expected columns (Fleet Master List tab):
     CONDITION, VEHICLE TYPE, LICENSE PLATE, VIN, YEAR, SLEEPS,
     VANCOUVER DECAL #, ICBC REGISTRATION #, FERRY LENGTH, GVWR
 """
+import importlib.util
 import sys
 import os
 import re
+from itertools import chain, islice
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -35,15 +40,15 @@ if database_url.startswith("postgresql"):
         print("ERROR: PostgreSQL database detected but psycopg2 is not installed.")
         sys.exit(1)
 
-try:
-    import openpyxl
-except ImportError:
+# iter_xlsx_rows imports openpyxl lazily; fail up front with an install hint instead.
+if importlib.util.find_spec("openpyxl") is None:
     print("ERROR: openpyxl is required. Install with: pip install openpyxl")
     sys.exit(1)
 
 try:
     from app.db import SessionLocal
     from app.models.models import FleetAsset, SettingList, SettingItem
+    from app.services.bulk_import import ImportPlan, apply_plan, iter_xlsx_rows, prefetch_index
 except ImportError as e:
     print(f"ERROR: Failed to import database components: {e}")
     sys.exit(1)
@@ -80,11 +85,10 @@ def normalize_field(value) -> str | None:
     return value if value else None
 
 
-def get_cell_value(cell) -> str | None:
+def get_cell_value(val) -> str | None:
     """Get cell value as string, handling None and empty."""
-    if cell is None or cell.value is None:
+    if val is None:
         return None
-    val = cell.value
     if isinstance(val, float) and (val != val or str(val) == "nan"):  # NaN check
         return None
     return str(val).strip() or None
@@ -181,36 +185,33 @@ def find_column_index(headers: list[str], canonical: str) -> int | None:
     return None
 
 
-def resolve_division_id(db, department: str | None):
-    """Resolve DEPARTMENT name to division_id (SettingItem from project_divisions list)."""
-    if not department or not str(department).strip():
-        return None
-    dept = str(department).strip()
+def load_division_ids(db) -> dict[str, object]:
+    """Lower-cased label (and value) -> division_id (SettingItem from project_divisions list)."""
     divisions_list = db.query(SettingList).filter(SettingList.name == "project_divisions").first()
     if not divisions_list:
-        return None
-    # Match by label (case-insensitive)
-    item = (
-        db.query(SettingItem)
-        .filter(
-            SettingItem.list_id == divisions_list.id,
-            SettingItem.label.ilike(dept),
-        )
-        .first()
+        return {}
+    items = prefetch_index(
+        db,
+        [SettingItem.id, SettingItem.label, SettingItem.value],
+        lambda r: r.id,
+        SettingItem.list_id == divisions_list.id,
     )
-    if item:
-        return item.id
-    # Fallback: match by value
-    item = (
-        db.query(SettingItem)
-        .filter(
-            SettingItem.list_id == divisions_list.id,
-            SettingItem.value.isnot(None),
-            SettingItem.value.ilike(dept),
-        )
-        .first()
-    )
-    return item.id if item else None
+    by_label: dict[str, object] = {}
+    by_value: dict[str, object] = {}
+    for item in items.values():
+        if item.label:
+            by_label.setdefault(item.label.strip().lower(), item.id)
+        if item.value:
+            by_value.setdefault(item.value.strip().lower(), item.id)
+    # Labels win over values (the old lookup tried label first)
+    return {**by_value, **by_label}
+
+
+def resolve_division_id(division_ids: dict[str, object], department: str | None):
+    """Resolve DEPARTMENT name to division_id (case-insensitive label, then value)."""
+    if not department or not str(department).strip():
+        return None
+    return division_ids.get(str(department).strip().lower())
 
 
 def is_row_empty(row: list) -> bool:
@@ -229,34 +230,27 @@ def import_fleet_vehicles(excel_path: str, dry_run: bool = False):
         print(f"ERROR: File not found: {excel_path}")
         sys.exit(1)
 
-    wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
     sheet_name = "Fleet Master List"
-    # Match sheet name with optional trailing/leading spaces
-    ws = None
-    for sn in wb.sheetnames:
-        if sn.strip() == sheet_name:
-            ws = wb[sn]
-            break
-    if ws is None:
-        print(f"ERROR: Sheet '{sheet_name}' not found. Available: {wb.sheetnames}")
+    rows = iter_xlsx_rows(excel_path, sheet_name)
+    try:
+        head = list(islice(rows, 10))
+    except KeyError as e:
+        print(f"ERROR: {e.args[0]}")
         sys.exit(1)
-    rows = list(ws.iter_rows())
-    wb.close()
 
-    if len(rows) < 2:
+    if len(head) < 2:
         print("ERROR: Sheet has no data rows (header + at least one row required).")
         sys.exit(1)
 
     # Find header row (first row with "UNIT" or "MAKE" or "VIN")
     header_row_idx = 0
-    for idx, row in enumerate(rows[:10]):
-        vals = [str(c.value or "").strip().upper() for c in row]
+    for idx, (_, values) in enumerate(head):
+        vals = [str(v or "").strip().upper() for v in values]
         if any("UNIT" in v or "MAKE" in v or "VIN" in v for v in vals if v):
             header_row_idx = idx
             break
 
-    header_row = rows[header_row_idx]
-    headers = [str(c.value or "").strip() for c in header_row]
+    headers = [str(v or "").strip() for v in head[header_row_idx][1]]
 
     # Build header index map
     col_map = {}
@@ -274,134 +268,119 @@ def import_fleet_vehicles(excel_path: str, dry_run: bool = False):
     print(f"\n{'[DRY RUN] ' if dry_run else ''}Starting import...\n")
 
     db = SessionLocal()
-    created_count = 0
-    skipped_count = 0
+    plan = ImportPlan()
     error_count = 0
 
-    # Data rows start after header row
-    data_rows = rows[header_row_idx + 1 :]
+    # Data rows start after header row (rest of the first 10, then the stream)
+    data_rows = chain(head[header_row_idx + 1 :], rows)
 
     try:
-        for row_num, row in enumerate(data_rows, start=header_row_idx + 2):
+        existing = prefetch_index(
+            db, [FleetAsset.id, FleetAsset.unit_number, FleetAsset.vin], lambda r: r.id, FleetAsset.asset_type == "vehicle"
+        )
+        unit_numbers = {r.unit_number for r in existing.values() if r.unit_number}
+        vins = {r.vin for r in existing.values() if r.vin}
+        division_ids = load_division_ids(db)
+
+        for row_num, row in data_rows:
             if is_row_empty(row):
-                skipped_count += 1
+                plan.skip(row_num, "empty row")
                 continue
 
-            try:
-                def get(col: str):
-                    idx = col_map.get(col)
-                    if idx is None or idx >= len(row):
-                        return None
-                    return get_cell_value(row[idx])
-
-                unit_number = normalize_field(get("UNIT #"))
-                make = normalize_field(get("MAKE"))
-                model = normalize_field(get("MODEL"))
-                vin = normalize_field(get("VIN"))
-
-                # Require at least unit_number or (make+model) or vin for identity
-                name = None
-                if make and model:
-                    name = f"{make} {model}".strip()
-                elif make:
-                    name = make
-                elif model:
-                    name = model
-                elif unit_number:
-                    name = unit_number or f"Vehicle {unit_number}"
-                elif vin:
-                    name = vin
-                else:
-                    print(f"Row {row_num}: SKIP - no UNIT #, MAKE/MODEL, or VIN")
-                    skipped_count += 1
+            def get(col: str):
+                idx = col_map.get(col)
+                if idx is None or idx >= len(row):
+                    return None
+                return get_cell_value(row[idx])
+
+            unit_number = normalize_field(get("UNIT #"))
+            make = normalize_field(get("MAKE"))
+            model = normalize_field(get("MODEL"))
+            vin = normalize_field(get("VIN"))
+
+            # Require at least unit_number or (make+model) or vin for identity
+            name = None
+            if make and model:
+                name = f"{make} {model}".strip()
+            elif make:
+                name = make
+            elif model:
+                name = model
+            elif unit_number:
+                name = unit_number or f"Vehicle {unit_number}"
+            elif vin:
+                name = vin
+            else:
+                plan.skip(row_num, "no UNIT #, MAKE/MODEL, or VIN")
+                continue
+
+            # Duplicate check (database, and earlier rows of this sheet)
+            if unit_number and unit_number in unit_numbers:
+                plan.skip(row_num, f"unit_number '{unit_number}' already exists")
+                continue
+            if vin and vin in vins:
+                plan.skip(row_num, f"VIN '{vin}' already exists")
+                continue
+            if unit_number:
+                unit_numbers.add(unit_number)
+            if vin:
+                vins.add(vin)
+
+            department = normalize_field(get("DEPARTMENT"))
+
+            asset_data = {
+                "asset_type": "vehicle",
+                "name": name,
+                "unit_number": unit_number,
+                "vin": vin,
+                "license_plate": normalize_field(get("LICENSE PLATE")),
+                "make": make,
+                "model": model,
+                "year": parse_year(get("YEAR")),
+                "condition": normalize_condition(get("CONDITION")),
+                "fuel_type": normalize_field(get("FUEL TYPE")),
+                "vehicle_type": normalize_field(get("VEHICLE TYPE")),
+                "yard_location": normalize_field(get("SLEEPS")),
+                "vancouver_decals": parse_vancouver_decals(get("VANCOUVER DECAL #")),
+                "icbc_registration_no": normalize_field(get("ICBC REGISTRATION #")),
+                "ferry_length": normalize_field(get("FERRY LENGTH")),
+                "gvw_kg": parse_gvwr(get("GVWR")),
+                "driver_contact_phone": normalize_field(get("CONTACT #")),
+                "division_id": resolve_division_id(division_ids, department),
+                "status": "active",
+            }
+
+            # Optional: add ASSIGNED DRIVER to notes if present
+            assigned_driver = normalize_field(get("ASSIGNED DRIVER"))
+            if assigned_driver:
+                asset_data["notes"] = f"Assigned driver (from import): {assigned_driver}"
+
+            # Build final dict - only include non-empty values, model defaults handle the rest
+            final_data = {}
+            for k, v in asset_data.items():
+                if v is None:
+                    continue
+                if isinstance(v, str) and not v.strip():
+                    continue
+                if isinstance(v, list) and len(v) == 0:
                     continue
+                final_data[k] = v
 
-                # Duplicate check
-                if unit_number:
-                    existing = db.query(FleetAsset).filter(
-                        FleetAsset.unit_number == unit_number,
-                        FleetAsset.asset_type == "vehicle",
-                    ).first()
-                    if existing:
-                        print(f"Row {row_num}: SKIP - unit_number '{unit_number}' already exists")
-                        skipped_count += 1
-                        continue
-
-                if vin:
-                    existing = db.query(FleetAsset).filter(
-                        FleetAsset.vin == vin,
-                        FleetAsset.asset_type == "vehicle",
-                    ).first()
-                    if existing:
-                        print(f"Row {row_num}: SKIP - VIN '{vin}' already exists")
-                        skipped_count += 1
-                        continue
-
-                department = normalize_field(get("DEPARTMENT"))
-                division_id = resolve_division_id(db, department) if department else None
-
-                vancouver_raw = get("VANCOUVER DECAL #")
-                vancouver_decals = parse_vancouver_decals(vancouver_raw)
-
-                asset_data = {
-                    "asset_type": "vehicle",
-                    "name": name,
-                    "unit_number": unit_number,
-                    "vin": vin,
-                    "license_plate": normalize_field(get("LICENSE PLATE")),
-                    "make": make,
-                    "model": model,
-                    "year": parse_year(get("YEAR")),
-                    "condition": normalize_condition(get("CONDITION")),
-                    "fuel_type": normalize_field(get("FUEL TYPE")),
-                    "vehicle_type": normalize_field(get("VEHICLE TYPE")),
-                    "yard_location": normalize_field(get("SLEEPS")),
-                    "vancouver_decals": vancouver_decals,
-                    "icbc_registration_no": normalize_field(get("ICBC REGISTRATION #")),
-                    "ferry_length": normalize_field(get("FERRY LENGTH")),
-                    "gvw_kg": parse_gvwr(get("GVWR")),
-                    "driver_contact_phone": normalize_field(get("CONTACT #")),
-                    "division_id": division_id,
-                    "status": "active",
-                }
-
-                # Optional: add ASSIGNED DRIVER to notes if present
-                assigned_driver = normalize_field(get("ASSIGNED DRIVER"))
-                if assigned_driver:
-                    asset_data["notes"] = f"Assigned driver (from import): {assigned_driver}"
-
-                # Build final dict - only include non-empty values, model defaults handle the rest
-                final_data = {}
-                for k, v in asset_data.items():
-                    if v is None:
-                        continue
-                    if isinstance(v, str) and not v.strip():
-                        continue
-                    if isinstance(v, list) and len(v) == 0:
-                        continue
-                    final_data[k] = v
-
-                if not dry_run:
-                    asset = FleetAsset(**final_data)
-                    db.add(asset)
-                    db.commit()
-                    db.refresh(asset)
-                    created_count += 1
-                    print(f"Row {row_num}: OK - created '{name}' (unit={unit_number}, vin={vin})")
-                else:
-                    created_count += 1
-                    print(f"Row {row_num}: [DRY RUN] would create '{name}' (unit={unit_number})")
-
-            except Exception as e:
+            plan.create(row_num, f"'{name}' (unit={unit_number}, vin={vin})", final_data)
+
+        plan.report()
+        created_count = len(plan.creates)
+        if not dry_run:
+            result = apply_plan(db, FleetAsset, plan)
+            created_count = result.created
+            if result.error:
                 error_count += 1
-                print(f"Row {row_num}: ERROR - {e}")
-                if not dry_run:
-                    db.rollback()
+                print("Re-run the import to resume; vehicles already written are skipped.")
 
         print(f"\n{'='*60}")
         print("Import complete!")
         print(f"  Created: {created_count}")
-        print(f"  Skipped: {skipped_count}")
+        print(f"  Skipped: {len(plan.skipped)}")
         print(f"  Errors:  {error_count}")
         print(f"{'='*60}")
 
@@ -5,6 +5,9 @@ Usage:
   python scripts/import_gas_cards_2026.py
   python scripts/import_gas_cards_2026.py --path "C:/path/to/2026 - Gas Card Information.xlsx"
   python scripts/import_gas_cards_2026.py --dry-run
+
+Cards and active assignments are loaded once; card changes go through a bulk
+import plan (app/services/bulk_import.py), so --dry-run shows the field diff.
 """
 from __future__ import annotations
 
@@ -12,7 +15,9 @@ import argparse
 import re
 import sys
 import os
+import uuid
 from datetime import date, datetime, timezone
+from types import SimpleNamespace
 from typing import Optional
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,11 +29,19 @@ try:
 except Exception:
     pass
 
-from openpyxl import load_workbook
 from sqlalchemy import text
 
 from app.db import SessionLocal, engine, Base
 from app.models.models import EmployeeProfile, FuelCard, FuelCardAssignment
+from app.services.bulk_import import (
+    ImportPlan,
+    apply_plan,
+    bulk_insert,
+    bulk_update,
+    iter_xlsx_rows,
+    normalize_columns,
+    prefetch_index,
+)
 
 
 DEFAULT_PATH = r"c:\Users\Raphael Coelho\Desktop\2026 - Gas Card Information.xlsx"
@@ -282,27 +295,29 @@ def ensure_schema(db):
 
 
 def read_rows(path: str):
-    wb = load_workbook(path, data_only=True, read_only=True)
-    if SHEET_NAME not in wb.sheetnames:
-        raise SystemExit(f"Sheet {SHEET_NAME!r} not found. Available: {wb.sheetnames}")
-    ws = wb[SHEET_NAME]
     out = []
-    for i, row in enumerate(ws.iter_rows(values_only=True), 1):
-        if i == 1:
-            continue
-        if row is None or row[0] is None or str(row[0]).strip() == "":
-            continue
-        out.append(
-            {
-                "card_number": _norm_space(str(row[0])),
-                "name_raw": row[1],
-                "pin": _norm_space(str(row[2])) if row[2] is not None else "",
-                "crew_raw": row[3],
-                "date_raw": row[4],
-            }
-        )
-    wb.close()
-    return out
+    try:
+        for i, row in iter_xlsx_rows(path, SHEET_NAME):
+            if i == 1:
+                continue
+            if row is None or row[0] is None or str(row[0]).strip() == "":
+                continue
+            out.append(
+                {
+                    "row_num": i,
+                    "card_number": _norm_space(str(row[0])),
+                    "name_raw": row[1],
+                    "pin": _norm_space(str(row[2])) if row[2] is not None else "",
+                    "crew_raw": row[3],
+                    "date_raw": row[4],
+                    "crew": row[3],
+                    "date_issued": row[4],
+                }
+            )
+    except KeyError as e:
+        raise SystemExit(e.args[0])
+    # Column-wise, once per distinct value (crews and issue dates repeat a lot)
+    return normalize_columns(out, {"crew": normalize_crew, "date_issued": parse_issue_date})
 
 
 def main():
@@ -323,43 +338,55 @@ def main():
         emp_index, by_last = build_employee_index(db)
         print(f"Employee name keys indexed: {len(emp_index)}")
 
-        created = 0
-        updated = 0
-        assigned = 0
+        cards = {
+            number: dict(row._mapping)
+            for number, row in prefetch_index(
+                db,
+                [FuelCard.id, FuelCard.card_number, FuelCard.pin, FuelCard.crew, FuelCard.date_issued, FuelCard.status],
+                lambda r: r.card_number,
+            ).items()
+        }
+        active_assignments = prefetch_index(
+            db,
+            [FuelCardAssignment.id, FuelCardAssignment.fuel_card_id, FuelCardAssignment.assigned_to_user_id],
+            lambda r: r.fuel_card_id,
+            FuelCardAssignment.is_active == True,  # noqa: E712
+        )
+
+        plan = ImportPlan()
+        new_assignments = []
+        returned_assignments = []
         skipped_assign = []
         now = datetime.now(timezone.utc)
 
         for row in rows:
+            row_num = row["row_num"]
             card_number = row["card_number"]
             pin = row["pin"] or "0000"
-            crew = normalize_crew(row["crew_raw"])
-            date_issued = parse_issue_date(row["date_raw"])
+            crew = row["crew"]
+            date_issued = row["date_issued"]
             status = infer_status(row["name_raw"], row["pin"], row["crew_raw"])
             holder = clean_holder_name(row["name_raw"])
+            values = {"pin": pin, "crew": crew, "date_issued": date_issued, "status": status}
 
-            existing = db.query(FuelCard).filter(FuelCard.card_number == card_number).first()
+            existing = cards.get(card_number)
             if existing:
-                existing.pin = pin
-                existing.crew = crew
-                existing.date_issued = date_issued
-                existing.status = status
-                existing.updated_at = now
-                card = existing
-                updated += 1
-                action = "update"
-            else:
-                card = FuelCard(
-                    card_number=card_number,
-                    pin=pin,
-                    date_issued=date_issued,
-                    crew=crew,
-                    status=status,
-                    notes=None,
+                card_id = existing["id"]
+                changed = plan.update(
+                    row_num,
+                    f"#{card_number}",
+                    card_id,
+                    {**values, "card_number": card_number, "updated_at": now},
+                    existing,
+                    ignore=("updated_at",),
                 )
-                db.add(card)
-                db.flush()
-                created += 1
+                action = "update" if changed else "unchanged"
+            else:
+                card_id = uuid.uuid4()
+                plan.create(row_num, f"#{card_number}", {**values, "id": card_id, "card_number": card_number, "notes": None})
                 action = "create"
+            # A card listed twice: later rows compare against (and update) this row's values
+            cards[card_number] = {**values, "id": card_id}
 
             match, reason = resolve_employee(emp_index, by_last, holder)
             assign_note = None
@@ -372,30 +399,22 @@ def main():
                 skipped_assign.append((card_number, holder, reason))
             else:
                 user_id, display = match
-                active = (
-                    db.query(FuelCardAssignment)
-                    .filter(
-                        FuelCardAssignment.fuel_card_id == card.id,
-                        FuelCardAssignment.is_active == True,  # noqa: E712
-                    )
-                    .first()
-                )
+                active = active_assignments.get(card_id)
                 if active and active.assigned_to_user_id == user_id:
                     assign_note = f"already assigned -> {display}"
                 else:
                     if active:
-                        active.is_active = False
-                        active.returned_at = now
-                    db.add(
-                        FuelCardAssignment(
-                            fuel_card_id=card.id,
-                            assigned_to_user_id=user_id,
-                            assigned_at=now,
-                            is_active=True,
-                            notes="Imported from 2026 Gas Card Information",
-                        )
-                    )
-                    assigned += 1
+                        returned_assignments.append({"id": active.id, "is_active": False, "returned_at": now})
+                    assignment = {
+                        "id": uuid.uuid4(),
+                        "fuel_card_id": card_id,
+                        "assigned_to_user_id": user_id,
+                        "assigned_at": now,
+                        "is_active": True,
+                        "notes": "Imported from 2026 Gas Card Information",
+                    }
+                    new_assignments.append(assignment)
+                    active_assignments[card_id] = SimpleNamespace(**assignment)
                     assign_note = f"assigned -> {display}"
 
             print(
@@ -404,15 +423,21 @@ def main():
             )
 
         if args.dry_run:
-            db.rollback()
-            print("\nDRY RUN — rolled back")
+            plan.report()
+            print("\nDRY RUN — nothing written")
         else:
+            result = apply_plan(db, FuelCard, plan)
+            if result.error:
+                raise SystemExit("Card import stopped; re-run to resume (assignments not written)")
+            # Insert first: a card listed twice may return an assignment planned earlier in this run
+            bulk_insert(db, FuelCardAssignment.__table__, new_assignments)
+            bulk_update(db, FuelCardAssignment.__table__, returned_assignments)
             db.commit()
             print("\nCommitted")
 
         print(
-            f"Summary: created={created} updated={updated} assigned={assigned} "
-            f"unmatched_holders={len(skipped_assign)}"
+            f"Summary: created={len(plan.creates)} updated={len(plan.updates)} unchanged={plan.unchanged} "
+            f"assigned={len(new_assignments)} unmatched_holders={len(skipped_assign)}"
         )
         if skipped_assign:
             print("\nCould not match (assign later):")
@@ -16,8 +16,11 @@ Rules:
   - Existing materials are updated (match by Code in description, else name+supplier)
   - Missing suppliers are created
 
+Existing materials are loaded once and the changes are written in bulk batches
+(app/services/bulk_import.py); --dry-run prints the field-level diff instead.
+
 Usage:
-    python scripts/import_products_from_pricing_csv.py <path_to_csv> [--dry-run]
+    python scripts/import_products_from_pricing_csv.py <path_to_csv> [--dry-run] [--batch-size N]
 
 Example:
     python scripts/import_products_from_pricing_csv.py ^
@@ -27,7 +30,6 @@ Example:
 from __future__ import annotations
 
 import argparse
-import csv
 import os
 import re
 import sys
@@ -59,6 +61,7 @@ try:
 
     from app.db import SessionLocal
     from app.models.models import Material, Supplier
+    from app.services.bulk_import import DEFAULT_BATCH_SIZE, ImportPlan, apply_plan, iter_csv_rows, prefetch_index
 except ImportError as e:
     print(f"ERROR: Failed to import database components: {e}")
     sys.exit(1)
@@ -180,73 +183,67 @@ def map_unit_and_coverage(
 
 
 def parse_csv(csv_path: str) -> list[ParsedProduct]:
-    if not os.path.exists(csv_path):
-        print(f"ERROR: File not found: {csv_path}")
-        sys.exit(1)
-
     current_supplier: Optional[str] = None
     raw_rows: list[ParsedProduct] = []
 
-    with open(csv_path, newline="", encoding="utf-8-sig") as f:
-        reader = csv.reader(f)
-        for row_num, row in enumerate(reader, start=1):
-            cells = [normalize_text(c) for c in row]
-            if not any(cells):
-                continue
-
-            first = cells[0]
-            if first in SUPPLIER_HEADERS:
-                current_supplier = SUPPLIER_HEADERS[first]
-                continue
-
-            if is_header_row(cells):
-                continue
-
-            if not current_supplier:
-                continue
-
-            name = first
-            code = cells[1] if len(cells) > 1 else ""
-            cost_raw = cells[2] if len(cells) > 2 else ""
-            quantity = cells[3] if len(cells) > 3 else ""
-            coverage_raw = cells[4] if len(cells) > 4 else ""
-            unit_col = cells[5] if len(cells) > 5 else ""
-
-            if not name or not code:
-                continue
-            # Skip stray header fragments
-            if code.strip().lower() in ("code", "convoy code"):
-                continue
-
-            price = parse_price(cost_raw)
-            if price is None:
-                print(
-                    f"Row {row_num}: SKIP - invalid/missing Cost for '{name}' ({code}): {cost_raw!r}"
-                )
-                continue
+    for row_num, row in iter_csv_rows(csv_path, encoding="utf-8-sig", delimiter=","):
+        cells = [normalize_text(c) for c in row]
+        if not any(cells):
+            continue
+
+        first = cells[0]
+        if first in SUPPLIER_HEADERS:
+            current_supplier = SUPPLIER_HEADERS[first]
+            continue
+
+        if is_header_row(cells):
+            continue
 
-            unit_type, coverage_ft2, coverage_for_notes, warnings = map_unit_and_coverage(
-                unit_col, coverage_raw
+        if not current_supplier:
+            continue
+
+        name = first
+        code = cells[1] if len(cells) > 1 else ""
+        cost_raw = cells[2] if len(cells) > 2 else ""
+        quantity = cells[3] if len(cells) > 3 else ""
+        coverage_raw = cells[4] if len(cells) > 4 else ""
+        unit_col = cells[5] if len(cells) > 5 else ""
+
+        if not name or not code:
+            continue
+        # Skip stray header fragments
+        if code.strip().lower() in ("code", "convoy code"):
+            continue
+
+        price = parse_price(cost_raw)
+        if price is None:
+            print(
+                f"Row {row_num}: SKIP - invalid/missing Cost for '{name}' ({code}): {cost_raw!r}"
             )
-            description = build_description(code, unit_col, coverage_for_notes if unit_col.upper() == "LF" else None)
-
-            raw_rows.append(
-                ParsedProduct(
-                    supplier=current_supplier,
-                    raw_name=name,
-                    name=name,  # resolved in second pass
-                    code=code,
-                    price=price,
-                    quantity=quantity,
-                    coverage_raw=coverage_raw,
-                    unit_col=unit_col,
-                    unit_type=unit_type,
-                    coverage_ft2=coverage_ft2,
-                    description=description,
-                    row_num=row_num,
-                    warnings=warnings,
-                )
+            continue
+
+        unit_type, coverage_ft2, coverage_for_notes, warnings = map_unit_and_coverage(
+            unit_col, coverage_raw
+        )
+        description = build_description(code, unit_col, coverage_for_notes if unit_col.upper() == "LF" else None)
+
+        raw_rows.append(
+            ParsedProduct(
+                supplier=current_supplier,
+                raw_name=name,
+                name=name,  # resolved in second pass
+                code=code,
+                price=price,
+                quantity=quantity,
+                coverage_raw=coverage_raw,
+                unit_col=unit_col,
+                unit_type=unit_type,
+                coverage_ft2=coverage_ft2,
+                description=description,
+                row_num=row_num,
+                warnings=warnings,
             )
+        )
 
     # Second pass: disambiguate duplicate names with Quantity suffix
     counts: dict[tuple[str, str], int] = defaultdict(int)
@@ -275,15 +272,17 @@ def parse_csv(csv_path: str) -> list[ParsedProduct]:
 
 def ensure_suppliers(db, supplier_names: set[str], dry_run: bool) -> dict[str, str]:
     """Ensure suppliers exist; return map of canonical name -> action (exists|created)."""
+    existing = prefetch_index(
+        db,
+        [Supplier.id, Supplier.name],
+        lambda r: r.name.lower() if r.name else None,
+        func.lower(Supplier.name).in_([n.lower() for n in supplier_names]),
+    )
     actions: dict[str, str] = {}
     for name in sorted(supplier_names):
-        existing = (
-            db.query(Supplier)
-            .filter(func.lower(Supplier.name) == name.lower())
-            .first()
-        )
-        if existing:
-            actions[name] = f"exists ({existing.id})"
+        found = existing.get(name.lower())
+        if found:
+            actions[name] = f"exists ({found.id})"
             continue
         actions[name] = "created"
         if dry_run:
@@ -292,6 +291,8 @@ def ensure_suppliers(db, supplier_names: set[str], dry_run: bool) -> dict[str, s
         db.add(row)
         db.flush()
         actions[name] = f"created ({row.id})"
+    if not dry_run:
+        db.commit()
     return actions
 
 
@@ -302,53 +303,99 @@ def extract_code_from_description(description: Optional[str]) -> Optional[str]:
     return m.group(1).strip() if m else None
 
 
-def find_existing_material(db, product: ParsedProduct) -> Optional[Material]:
-    # Prefer match by Code in description for same supplier
-    candidates = (
-        db.query(Material)
-        .filter(Material.supplier_name.isnot(None))
-        .filter(func.lower(Material.supplier_name) == product.supplier.lower())
-        .filter(Material.description.isnot(None))
-        .all()
-    )
-    for row in candidates:
-        existing_code = extract_code_from_description(row.description)
-        if existing_code and existing_code.lower() == product.code.lower():
-            return row
-
-    # Fallback: name + supplier
-    return (
-        db.query(Material)
-        .filter(Material.supplier_name.isnot(None))
-        .filter(func.lower(Material.name) == product.name.lower())
-        .filter(func.lower(Material.supplier_name) == product.supplier.lower())
-        .first()
+MATERIAL_COLUMNS = [
+    Material.id,
+    Material.name,
+    Material.supplier_name,
+    Material.unit,
+    Material.price,
+    Material.description,
+    Material.unit_type,
+    Material.coverage_ft2,
+    Material.coverage_sqs,
+    Material.coverage_m2,
+    Material.units_per_package,
+]
+
+
+def load_existing_materials(db, supplier_names: set[str]) -> tuple[dict, dict]:
+    """One query for the suppliers' materials -> (by (supplier, code), by (supplier, name)), lower-cased keys."""
+    rows = prefetch_index(
+        db,
+        MATERIAL_COLUMNS,
+        lambda r: r.id,
+        Material.supplier_name.isnot(None),
+        func.lower(Material.supplier_name).in_([n.lower() for n in supplier_names]),
     )
+    by_code: dict[tuple[str, str], object] = {}
+    by_name: dict[tuple[str, str], object] = {}
+    for row in sorted(rows.values(), key=lambda r: r.id):
+        supplier = row.supplier_name.lower()
+        code = extract_code_from_description(row.description)
+        if code:
+            by_code.setdefault((supplier, code.lower()), row)
+        if row.name:
+            by_name.setdefault((supplier, row.name.lower()), row)
+    return by_code, by_name
+
+
+def material_values(product: ParsedProduct) -> dict:
+    """Material columns owned by this import (coverage only kept for coverage units)."""
+    return {
+        "name": product.name,
+        "supplier_name": product.supplier,
+        "unit": product.quantity or None,
+        "price": product.price,
+        "description": product.description,
+        "unit_type": product.unit_type,
+        "coverage_ft2": product.coverage_ft2 if product.unit_type == "coverage" else None,
+        "coverage_sqs": None,
+        "coverage_m2": None,
+        "units_per_package": None,
+    }
+
+
+def plan_products(products: list[ParsedProduct], by_code: dict, by_name: dict) -> tuple[ImportPlan, int]:
+    """Plan creates/updates against the prefetched materials; returns (plan, duplicate-name errors)."""
+    plan = ImportPlan()
+    errors = 0
+    now = datetime.now(timezone.utc)
+    seen_batch: dict[tuple[str, str], ParsedProduct] = {}
+    for product in products:
+        key = (product.supplier.lower(), product.name.lower())
+        if key in seen_batch:
+            print(
+                f"Row {product.row_num}: ERROR - duplicate final name in CSV "
+                f"'{product.name}' / {product.supplier} (codes {seen_batch[key].code} & {product.code})"
+            )
+            errors += 1
+            continue
+        seen_batch[key] = product
+
+        for w in product.warnings:
+            print(f"Row {product.row_num}: WARNING - {w}")
+
+        label = f"{product.supplier} | {product.name} | code={product.code}"
+        values = material_values(product)
+        existing = by_code.get((product.supplier.lower(), product.code.lower())) or by_name.get(key)
+        if existing:
+            plan.update(
+                product.row_num,
+                f"id={existing.id} | {label}",
+                existing.id,
+                {**values, "last_updated": now},
+                existing._mapping,
+                ignore=("last_updated",),
+            )
+        else:
+            plan.create(product.row_num, label, {**values, "category": None, "last_updated": now})
+    return plan, errors
 
 
-def apply_material_fields(row: Material, product: ParsedProduct, *, is_create: bool) -> None:
-    row.name = product.name
-    row.supplier_name = product.supplier
-    row.unit = product.quantity or None
-    row.price = product.price
-    row.description = product.description
-    row.unit_type = product.unit_type
-    if product.unit_type == "coverage":
-        row.coverage_ft2 = product.coverage_ft2
-        row.coverage_sqs = None
-        row.coverage_m2 = None
-    else:
-        row.coverage_ft2 = None
-        row.coverage_sqs = None
-        row.coverage_m2 = None
-    if product.unit_type != "multiple":
-        row.units_per_package = None
-    row.last_updated = datetime.now(timezone.utc)
-    if is_create:
-        row.category = None
-
-
-def import_products(csv_path: str, dry_run: bool = False) -> int:
+def import_products(csv_path: str, dry_run: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    if not os.path.exists(csv_path):
+        print(f"ERROR: File not found: {csv_path}")
+        return 1
     products = parse_csv(csv_path)
     if not products:
         print("ERROR: No product rows parsed from CSV.")
@@ -358,11 +405,6 @@ def import_products(csv_path: str, dry_run: bool = False) -> int:
     print(f"{'[DRY RUN] ' if dry_run else ''}Starting import...\n")
 
     db = SessionLocal()
-    created = 0
-    updated = 0
-    skipped = 0
-    errors = 0
-
     try:
         supplier_names = {p.supplier for p in products}
         supplier_actions = ensure_suppliers(db, supplier_names, dry_run=dry_run)
@@ -371,88 +413,24 @@ def import_products(csv_path: str, dry_run: bool = False) -> int:
             print(f"  - {name}: {action}")
         print()
 
-        # Pre-check unique names within this import batch
-        seen_batch: dict[tuple[str, str], ParsedProduct] = {}
-        for product in products:
-            key = (product.supplier.lower(), product.name.lower())
-            if key in seen_batch:
-                print(
-                    f"Row {product.row_num}: ERROR - duplicate final name in CSV "
-                    f"'{product.name}' / {product.supplier} (codes {seen_batch[key].code} & {product.code})"
-                )
-                errors += 1
-                continue
-            seen_batch[key] = product
-
-            for w in product.warnings:
-                print(f"Row {product.row_num}: WARNING - {w}")
-
-            try:
-                if dry_run:
-                    existing = find_existing_material(db, product)
-                    action = "UPDATE" if existing else "CREATE"
-                    print(
-                        f"Row {product.row_num}: [{action}] {product.supplier} | {product.name} | "
-                        f"code={product.code} | price={product.price} | unit={product.quantity!r} | "
-                        f"unit_type={product.unit_type} | coverage_ft2={product.coverage_ft2}"
-                    )
-                    if existing:
-                        updated += 1
-                    else:
-                        created += 1
-                    continue
-
-                existing = find_existing_material(db, product)
-                if existing:
-                    apply_material_fields(existing, product, is_create=False)
-                    updated += 1
-                    print(
-                        f"Row {product.row_num}: UPDATED id={existing.id} | {product.supplier} | {product.name}"
-                    )
-                else:
-                    # Guard uniqueness before create
-                    clash = (
-                        db.query(Material)
-                        .filter(Material.supplier_name.isnot(None))
-                        .filter(func.lower(Material.name) == product.name.lower())
-                        .filter(func.lower(Material.supplier_name) == product.supplier.lower())
-                        .first()
-                    )
-                    if clash:
-                        print(
-                            f"Row {product.row_num}: SKIP - name+supplier clash with id={clash.id} "
-                            f"but code did not match (existing desc={clash.description!r})"
-                        )
-                        skipped += 1
-                        continue
-                    row = Material()
-                    apply_material_fields(row, product, is_create=True)
-                    db.add(row)
-                    db.flush()
-                    created += 1
-                    print(
-                        f"Row {product.row_num}: CREATED id={row.id} | {product.supplier} | {product.name}"
-                    )
-            except Exception as e:
-                errors += 1
-                print(f"Row {product.row_num}: ERROR - {product.name}: {e}")
-                db.rollback()
-                # reopen transactional state: continue with fresh flush path
-                if not dry_run:
-                    # After rollback we lose supplier inserts; re-ensure for remaining rows
-                    ensure_suppliers(db, supplier_names, dry_run=False)
-
+        by_code, by_name = load_existing_materials(db, supplier_names)
+        plan, errors = plan_products(products, by_code, by_name)
         if dry_run:
-            db.rollback()
+            plan.report()
+            created, updated = len(plan.creates), len(plan.updates)
         else:
-            db.commit()
+            result = apply_plan(db, Material, plan, batch_size=batch_size)
+            created, updated = result.created, result.updated
+            if result.error:
+                errors += 1
+                print("Re-run the import to resume; committed batches will show as unchanged.")
 
         print("\n" + "=" * 60)
         print(f"{'[DRY RUN] ' if dry_run else ''}Import complete")
-        print(f"  Created: {created}")
-        print(f"  Updated: {updated}")
-        print(f"  Skipped: {skipped}")
-        print(f"  Errors:  {errors}")
+        print(f"  Created:   {created}")
+        print(f"  Updated:   {updated}")
+        print(f"  Unchanged: {plan.unchanged}")
+        print(f"  Errors:    {errors}")
         print("=" * 60)
         return 1 if errors else 0
     except Exception as e:
@@ -471,8 +449,9 @@ def main() -> None:
         action="store_true",
         help="Parse and report without writing to the database",
     )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per committed batch")
     args = parser.parse_args()
-    raise SystemExit(import_products(args.csv_path, dry_run=args.dry_run))
+    raise SystemExit(import_products(args.csv_path, dry_run=args.dry_run, batch_size=args.batch_size))
 
 
 if __name__ == "__main__":
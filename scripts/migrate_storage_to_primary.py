@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Copy blobs that only exist in the legacy (fallback) storage account into the primary one.
+
+Reads AZURE_BLOB_CONNECTION/AZURE_BLOB_CONTAINER (primary) and
+AZURE_BLOB_FALLBACK_CONNECTION/AZURE_BLOB_FALLBACK_CONTAINER (source). Use --fallback-local
+to migrate a local dev storage directory instead. Progress is checkpointed after each batch;
+re-running the command resumes from the last finished FileObject id and first retries the
+keys whose copy failed (exit status 2 while any are left).
+
+Usage:
+    python scripts/migrate_storage_to_primary.py --dry-run
+    python scripts/migrate_storage_to_primary.py --concurrency 16 --batch-size 1000
+    python scripts/migrate_storage_to_primary.py --reset              # start over
+    python scripts/migrate_storage_to_primary.py --fallback-local var/storage
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.db import SessionLocal
+from app.storage.blob_provider import BlobStorageProvider
+from app.storage.hybrid_provider import HybridStorageProvider
+from app.storage.local_provider import LocalStorageProvider
+from app.storage.migration import DEFAULT_PROGRESS_PATH, migrate_missing_blobs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Copy missing FileObject blobs into the primary storage account")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel copies (default 8)")
+    parser.add_argument("--batch-size", type=int, default=500, help="FileObjects per checkpoint (default 500)")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after N FileObjects")
+    parser.add_argument("--provider", default="blob", help="FileObject.provider to migrate (default blob)")
+    parser.add_argument("--progress-file", default=DEFAULT_PROGRESS_PATH)
+    parser.add_argument("--reset", action="store_true", help="Ignore saved progress and start from the beginning")
+    parser.add_argument("--dry-run", action="store_true", help="Only count keys missing from the primary")
+    parser.add_argument("--fallback-local", default=None, help="Read from a local storage dir instead of a blob account")
+    args = parser.parse_args()
+
+    try:
+        primary = BlobStorageProvider()
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        return 1
+    if args.fallback_local:
+        fallback = LocalStorageProvider(args.fallback_local)
+    elif settings.azure_blob_fallback_connection:
+        fallback = BlobStorageProvider(
+            connection=settings.azure_blob_fallback_connection,
+            container=settings.azure_blob_fallback_container or settings.azure_blob_container,
+        )
+    else:
+        print("ERROR: set AZURE_BLOB_FALLBACK_CONNECTION or pass --fallback-local")
+        return 1
+
+    if args.reset and os.path.exists(args.progress_file):
+        os.remove(args.progress_file)
+
+    print("=" * 80)
+    print("MIGRATE STORAGE TO PRIMARY" + (" (DRY RUN)" if args.dry_run else ""))
+    print("=" * 80)
+
+    def _report(progress):
+        print(
+            f"  scanned={progress['scanned']} copied={progress['copied']} exists={progress['exists']} "
+            f"missing={progress['missing']} errors={progress['errors']} last_id={progress['last_id']}"
+        )
+
+    hybrid = HybridStorageProvider(primary, fallback)
+    result = migrate_missing_blobs(
+        SessionLocal,
+        hybrid,
+        provider_name=args.provider,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        progress_path=args.progress_file,
+        dry_run=args.dry_run,
+        limit=args.limit,
+        on_batch=_report,
+    )
+    print("-" * 80)
+    _report(result)
+    if args.dry_run:
+        print("DRY RUN: 'copied' is the number of keys that would be copied.")
+    return 0 if not result["errors"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
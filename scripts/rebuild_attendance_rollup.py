@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Rebuild attendance_daily_rollup from attendance (whole history by default).
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import SessionLocal
+from app.services.attendance_rollup import rebuild_rollup
+
+
+def run(start=None, end=None) -> None:
+    db = SessionLocal()
+    try:
+        rows = rebuild_rollup(db, start, end)
+        print(f"✅ attendance_daily_rollup rebuilt ({rows} rows)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip())
+    ap.add_argument("--start", type=date.fromisoformat, help="First local work date (YYYY-MM-DD)")
+    ap.add_argument("--end", type=date.fromisoformat, help="Last local work date (YYYY-MM-DD)")
+    args = ap.parse_args()
+    run(args.start, args.end)
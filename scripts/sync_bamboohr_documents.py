@@ -21,17 +21,14 @@ from app.db import SessionLocal
 from app.models.models import User, EmployeeDocument, FileObject, EmployeeProfile
 from app.services.bamboohr_client import BambooHRClient
 from app.storage.local_provider import LocalStorageProvider
-from app.storage.blob_provider import BlobStorageProvider
+from app.storage.registry import get_default_provider
 from app.storage.provider import StorageProvider
 from app.config import settings
 
 
 def get_storage() -> StorageProvider:
     """Get storage provider based on configuration"""
-    if settings.azure_blob_connection and settings.azure_blob_container:
-        return BlobStorageProvider()
-    else:
-        return LocalStorageProvider()
+    return get_default_provider()
 
 
 def find_user_by_bamboohr_id(db: Session, client: BambooHRClient, bamboohr_id: str) -> Optional[User]:
@@ -2,7 +2,7 @@
 Script para sincronizar funcionários do BambooHR para o MKHub
 
 Uso:
-    python scripts/sync_bamboohr_employees.py [--dry-run] [--update-existing]
+    python scripts/sync_bamboohr_employees.py [--dry-run] [--update-existing] [--full] [--since ISO] [--workers N]
 """
 import sys
 import os
@@ -20,10 +20,18 @@ from sqlalchemy.orm import Session
 from app.db import SessionLocal
 from app.models.models import User, EmployeeProfile, FileObject, EmployeeVisa, EmployeeEmergencyContact
 from app.services.bamboohr_client import BambooHRClient
+from app.services.bamboohr_sync import (
+    DEFAULT_WORKERS,
+    PrefetchedClient,
+    changed_employee_ids,
+    get_watermark,
+    map_bounded,
+    photo_unchanged,
+    set_watermark,
+)
 from app.auth.security import get_password_hash
 from app.config import settings
-from app.storage.local_provider import LocalStorageProvider
-from app.storage.blob_provider import BlobStorageProvider
+from app.storage.registry import get_default_provider
 from app.storage.provider import StorageProvider
 import hashlib
 from io import BytesIO
@@ -299,10 +307,7 @@ def normalize_city(city: Optional[str]) -> Optional[str]:
 
 def get_storage() -> StorageProvider:
     """Get storage provider based on configuration"""
-    if settings.azure_blob_connection and settings.azure_blob_container:
-        return BlobStorageProvider()
-    else:
-        return LocalStorageProvider()
+    return get_default_provider()
 
 
 def create_file_object(
@@ -386,6 +391,10 @@ def sync_employee_photo(
         import traceback
         traceback.print_exc()
         return False
+
+    if photo_unchanged(db, profile, photo_data):
+        print(f"  [SKIP]  Profile photo unchanged (same content hash)")
+        return False
     
     if dry_run:
         print(f"  [CREATE] Would download and set profile photo")
@@ -1344,25 +1353,53 @@ def create_or_update_user(
     return user, created
 
 
+def load_emails_with_photo(db: Session) -> Set[str]:
+    """Emails of users whose profile already has a photo (photo fetch can be skipped)."""
+    emails: Set[str] = set()
+    rows = (
+        db.query(User.email_personal, User.email_corporate)
+        .join(EmployeeProfile, EmployeeProfile.user_id == User.id)
+        .filter(EmployeeProfile.profile_photo_file_id.isnot(None))
+        .all()
+    )
+    for personal, corporate in rows:
+        for email in (personal, corporate):
+            if email:
+                emails.add(email.strip().lower())
+    return emails
+
+
 def sync_employees(
     dry_run: bool = False,
     update_existing: bool = True,
     limit: Optional[int] = None,
     include_photos: bool = True,
-    force_update_photos: bool = False
+    force_update_photos: bool = False,
+    since: Optional[datetime] = None,
+    full: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    client: Optional[BambooHRClient] = None,
 ):
-    """Sync employees from BambooHR"""
+    """
+    Sync employees from BambooHR
+
+    Without ``full``, only employees BambooHR reports as changed since ``since``
+    (default: the last complete sync) are fetched. Per-employee API calls run on
+    ``workers`` threads; database writes stay sequential on this thread.
+    """
     print("[SYNC] Starting BambooHR employee synchronization...")
     print(f"   Mode: {'DRY RUN' if dry_run else 'LIVE'}")
     print(f"   Update existing: {update_existing}")
     
     # Initialize client
-    try:
-        client = BambooHRClient()
-        print(f"   Connected to: {client.company_domain}.bamboohr.com")
-    except Exception as e:
-        print(f"[ERROR] Error initializing BambooHR client: {e}")
-        return
+    owns_client = client is None
+    if client is None:
+        try:
+            client = BambooHRClient()
+        except Exception as e:
+            print(f"[ERROR] Error initializing BambooHR client: {e}")
+            return
+    print(f"   Connected to: {client.base_url}")
     
     # Initialize storage (for photos)
     storage = None
@@ -1374,6 +1411,42 @@ def sync_employees(
             print(f"[WARN] Error initializing storage (photos will be skipped): {e}")
             include_photos = False
     
+    db = SessionLocal()
+    try:
+        _sync_employees(
+            db,
+            client,
+            storage,
+            dry_run=dry_run,
+            update_existing=update_existing,
+            limit=limit,
+            include_photos=include_photos,
+            force_update_photos=force_update_photos,
+            since=since,
+            full=full,
+            workers=workers,
+        )
+    finally:
+        db.close()
+        if owns_client:
+            client.close()
+
+
+def _sync_employees(
+    db: Session,
+    client: BambooHRClient,
+    storage: Optional[StorageProvider],
+    dry_run: bool,
+    update_existing: bool,
+    limit: Optional[int],
+    include_photos: bool,
+    force_update_photos: bool,
+    since: Optional[datetime],
+    full: bool,
+    workers: int,
+) -> None:
+    sync_started = datetime.now(timezone.utc)
+
     # Get employee directory
     try:
         print("\n[FETCH] Fetching employee directory...")
@@ -1387,35 +1460,84 @@ def sync_employees(
     except Exception as e:
         print(f"[ERROR] Error fetching employee directory: {e}")
         return
+
+    # Incremental: keep only employees changed since the last complete sync
+    if not full and since is None:
+        since = get_watermark(db)
+    if not full and since is not None:
+        try:
+            changed, deleted = changed_employee_ids(client, since)
+            employees = [emp for emp in employees if str(emp.get("id")) in changed]
+            print(f"   Changed since {since.isoformat()}: {len(employees)} employees ({len(deleted)} deleted in BambooHR, ignored)")
+        except Exception as e:
+            print(f"[WARN] Changed-since lookup failed, running a full sync: {e}")
+            since = None
+    else:
+        print("   Full sync (no changed-since point)")
     
     if limit:
         employees = employees[:limit]
         print(f"   Limiting to first {limit} employees")
     
     # Process each employee
-    db = SessionLocal()
     created_count = 0
     updated_count = 0
     skipped_count = 0
+    errors = 0
     sync_cache = BambooSyncCache(client)
     existing_emails: Set[str] = set()
     if not dry_run:
         existing_emails = load_existing_user_emails(db)
         print(f"   Loaded {len(existing_emails)} existing user emails for fast skip checks")
+    emails_with_photo: Set[str] = set()
+    if include_photos and storage and not force_update_photos:
+        emails_with_photo = load_emails_with_photo(db)
     # Warm table metadata once (visa / emergency contact resolution)
     sync_cache.get_available_tables()
+
+    def prefetch(emp: Dict[str, Any]):
+        """Worker thread: every BambooHR read this employee's sync will make."""
+        emp_id = str(emp.get("id"))
+        skip = should_skip_existing_import(client, emp_id, emp, existing_emails, update_existing)
+        api = PrefetchedClient(client)
+        if skip[0]:
+            return api, skip
+        try:
+            employee_data = api.fetch("get_employee", emp_id)
+        except Exception:
+            return api, skip
+        email = extract_personal_email(employee_data if isinstance(employee_data, dict) else {}) or extract_personal_email(emp)
+        if not email:
+            return api, skip
+        api.fetch("get_compensation", emp_id)
+        if include_photos and storage and (force_update_photos or email.lower() not in emails_with_photo):
+            api.fetch("get_employee_photo", emp_id)
+        # Only tables already resolved on an earlier employee; discovery stays on the main thread.
+        for table_name in (sync_cache.resolved_visa_table, sync_cache.resolved_emergency_table):
+            if table_name:
+                try:
+                    api.fetch("get_table_data", table_name, emp_id)
+                except Exception:
+                    pass
+        return api, skip
+
+    print(f"   Fetching with {workers} concurrent worker(s)")
     
     try:
-        for idx, emp in enumerate(employees, 1):
+        results = map_bounded(prefetch, employees, workers)
+        for idx, (emp, prefetched, prefetch_error) in enumerate(results, 1):
             emp_id = emp.get("id")
             name = f"{emp.get('displayName', '')} {emp.get('firstName', '')} {emp.get('lastName', '')}".strip()
             if not name:
                 name = f"Employee {emp_id}"
             print(f"\n[{idx}/{len(employees)}] Processing: {name} (ID: {emp_id})")
 
-            skip_existing, skip_email = should_skip_existing_import(
-                client, str(emp_id), emp, existing_emails, update_existing
-            )
+            if prefetch_error is not None:
+                print(f"  [ERROR] Error fetching employee from BambooHR: {prefetch_error}")
+                errors += 1
+                skipped_count += 1
+                continue
+            api, (skip_existing, skip_email) = prefetched
             if skip_existing:
                 if skip_email:
                     print(f"  [SKIP] Already in MKHub: {skip_email}")
@@ -1426,7 +1548,7 @@ def sync_employees(
             
             # Get full employee details
             try:
-                employee_data = client.get_employee(str(emp_id))
+                employee_data = api.get_employee(str(emp_id))
                 # Ensure ID is in the data and merge with directory data
                 employee_data["id"] = str(emp_id)
                 # Merge directory data (some fields might only be in directory)
@@ -1436,16 +1558,18 @@ def sync_employees(
             except Exception as e:
                 print(f"  [ERROR] Error fetching employee details: {e}")
                 safe_db_rollback(db)
+                errors += 1
                 skipped_count += 1
                 continue
             
             try:
                 user, created = create_or_update_user(
-                    db, employee_data, client=client, dry_run=dry_run, update_existing=update_existing, preserve_manual_fields=True
+                    db, employee_data, client=api, dry_run=dry_run, update_existing=update_existing, preserve_manual_fields=True
                 )
             except Exception as e:
                 print(f"  [ERROR] Error creating/updating user: {e}")
                 safe_db_rollback(db)
+                errors += 1
                 skipped_count += 1
                 continue
             
@@ -1454,30 +1578,33 @@ def sync_employees(
                 if include_photos and storage:
                     try:
                         sync_employee_photo(
-                            db, client, storage, user, str(emp_id), 
+                            db, api, storage, user, str(emp_id), 
                             dry_run=dry_run, force_update=force_update_photos
                         )
                     except Exception as e:
                         print(f"  [WARN] Error syncing photo: {e}")
                         safe_db_rollback(db)
+                        errors += 1
                 
                 # Sync visa information from custom tables
                 try:
                     sync_employee_visas(
-                        db, client, user, str(emp_id), employee_data=employee_data, dry_run=dry_run, sync_cache=sync_cache
+                        db, api, user, str(emp_id), employee_data=employee_data, dry_run=dry_run, sync_cache=sync_cache
                     )
                 except Exception as e:
                     print(f"  [WARN] Error syncing visas: {e}")
                     safe_db_rollback(db)
+                    errors += 1
                 
                 # Sync emergency contacts from custom tables or basic fields
                 try:
                     sync_employee_emergency_contacts(
-                        db, client, user, str(emp_id), employee_data, dry_run=dry_run, sync_cache=sync_cache
+                        db, api, user, str(emp_id), employee_data, dry_run=dry_run, sync_cache=sync_cache
                     )
                 except Exception as e:
                     print(f"  [WARN] Error syncing emergency contacts: {e}")
                     safe_db_rollback(db)
+                    errors += 1
 
                 if not dry_run:
                     try:
@@ -1485,6 +1612,7 @@ def sync_employees(
                     except Exception as e:
                         print(f"  [WARN] Error committing employee changes: {e}")
                         safe_db_rollback(db)
+                        errors += 1
                         skipped_count += 1
                         continue
                 
@@ -1498,6 +1626,11 @@ def sync_employees(
             else:
                 skipped_count += 1
         
+        # Only a complete, error-free run moves the changed-since point forward:
+        # any per-employee failure (fetch, upsert, photo/visa/contacts, commit)
+        # leaves it where it was so the next incremental run retries that employee.
+        if not dry_run and not limit and update_existing and errors == 0:
+            set_watermark(db, sync_started)
         if not dry_run:
             try:
                 db.commit()
@@ -1509,6 +1642,7 @@ def sync_employees(
         print(f"   Created: {created_count}")
         print(f"   Updated: {updated_count}")
         print(f"   Skipped: {skipped_count}")
+        print(f"   Errors: {errors}")
         print(f"   Total: {len(employees)}")
         print("="*50)
         
@@ -1518,8 +1652,6 @@ def sync_employees(
         traceback.print_exc()
         if not dry_run:
             safe_db_rollback(db)
-    finally:
-        db.close()
 
 
 def main():
@@ -1530,6 +1662,9 @@ def main():
     parser.add_argument("--limit", type=int, help="Limit number of employees to process")
     parser.add_argument("--no-photos", dest="include_photos", action="store_false", help="Skip profile photos")
     parser.add_argument("--force-update-photos", action="store_true", help="Update profile photos even if they already exist")
+    parser.add_argument("--full", action="store_true", help="Sync every employee, ignoring the last sync time")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only employees changed since this ISO timestamp")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent BambooHR requests")
     
     args = parser.parse_args()
     
@@ -1538,7 +1673,10 @@ def main():
         update_existing=args.update_existing,
         limit=args.limit,
         include_photos=args.include_photos,
-        force_update_photos=args.force_update_photos
+        force_update_photos=args.force_update_photos,
+        since=args.since,
+        full=args.full,
+        workers=args.workers,
     )
 
 
@@ -0,0 +1,33 @@
+"""In-memory SQLite databases for tests that only need a handful of tables."""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+
+
+def make_session_factory(*tables, threaded: bool = False) -> sessionmaker:
+    """sessionmaker bound to a fresh in-memory database holding only ``tables``
+    (models or Table objects). ``threaded`` shares its single connection across
+    threads, for code under test that opens sessions off the test thread."""
+    if threaded:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[getattr(t, "__table__", t) for t in tables])
+    return sessionmaker(bind=engine)
+
+
+def make_session(*tables, threaded: bool = False) -> Session:
+    return make_session_factory(*tables, threaded=threaded)()
+
+
+def close_session(db: Session) -> None:
+    """Close ``db`` and drop the in-memory database behind it."""
+    engine = db.get_bind()
+    db.close()
+    engine.dispose()
+
+
+def dispose_session_factory(factory: sessionmaker) -> None:
+    factory.kw["bind"].dispose()
@@ -0,0 +1,186 @@
+"""Tests for the keyset-paginated attendance ledger."""
+import unittest
+import uuid
+from datetime import date, datetime, time, timedelta
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import event
+
+from app.models.models import (
+    Attendance,
+    AttendanceDailyRollup,
+    AuditLog,
+    EmployeeProfile,
+    Project,
+    SettingItem,
+    SettingList,
+    Shift,
+    User,
+)
+from app.routes import settings as settings_routes
+from app.services.attendance_ledger import LedgerFilters, ledger_export_params, ledger_page, parse_ledger_filters
+from app.services.exports import iter_attendance_ledger_rows
+
+from db_helpers import close_session, make_session
+
+_T0 = datetime(2026, 3, 2, 15, 0)
+
+
+class TestAttendanceLedger(unittest.TestCase):
+    def setUp(self):
+        self.db = make_session(
+            User,
+            EmployeeProfile,
+            Project,
+            Shift,
+            Attendance,
+            AttendanceDailyRollup,
+            SettingList,
+            SettingItem,
+            AuditLog,
+        )
+        self.amy, self.bob, self.boss = (
+            User(id=uuid.uuid4(), username=n, email_personal=f"{n}@example.com", password_hash="x")
+            for n in ("amy", "bob", "boss")
+        )
+        self.db.add_all([self.amy, self.bob, self.boss])
+        self.db.add(EmployeeProfile(user_id=self.amy.id, first_name="Amy", last_name="Adams"))
+        self.project = Project(
+            id=uuid.uuid4(), code="P-1", name="Roof", client_id=uuid.uuid4(), address="1 Main St", address_city="Surrey"
+        )
+        self.db.add(self.project)
+        self.shift = self._shift("scheduled")
+        self.deleted_shift = self._shift("deleted")
+        self.db.flush()
+        # 12 punches over 6 days, two per day sharing a timestamp (ties are broken by id).
+        self.rows = []
+        for day in range(6):
+            for worker in (self.amy, self.bob):
+                start = _T0 + timedelta(days=day)
+                self.rows.append(
+                    self._attendance(worker, start, status="approved" if day % 2 else "pending", shift=self.shift)
+                )
+        self.orphan = self._attendance(self.amy, _T0 - timedelta(days=1), shift=self.deleted_shift)
+        self.db.add(
+            AuditLog(
+                id=uuid.uuid4(),
+                entity_type="shift",
+                entity_id=self.deleted_shift.id,
+                action="DELETE",
+                actor_id=self.boss.id,
+                timestamp_utc=_T0,
+            )
+        )
+        self.db.commit()
+
+    def tearDown(self):
+        close_session(self.db)
+
+    def _shift(self, status):
+        s = Shift(
+            id=uuid.uuid4(),
+            project_id=self.project.id,
+            worker_id=self.amy.id,
+            date=date(2026, 3, 2),
+            start_time=time(8),
+            end_time=time(16),
+            job_name="Install",
+            status=status,
+            created_by=self.boss.id,
+        )
+        self.db.add(s)
+        return s
+
+    def _attendance(self, worker, start, status="approved", shift=None):
+        a = Attendance(
+            id=uuid.uuid4(),
+            worker_id=worker.id,
+            shift_id=shift.id if shift else None,
+            clock_in_time=start,
+            clock_out_time=start + timedelta(hours=8),
+            break_minutes=30,
+            status=status,
+            source="app",
+            created_at=start,
+        )
+        self.db.add(a)
+        return a
+
+    def test_cursor_pages_cover_every_row_once_in_order(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            rows, cursor = ledger_page(self.db, LedgerFilters(), limit=5, cursor=cursor)
+            seen.extend(r.Attendance.id for r in rows)
+            pages += 1
+            if cursor is None:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 13)
+        self.assertEqual(len(set(seen)), 13)
+        by_id = {a.id: a for a in self.rows + [self.orphan]}
+        keys = [(by_id[i].clock_in_time, str(i)) for i in seen]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_filters_and_visibility(self):
+        f = parse_ledger_filters(status="approved", start_date="2026-03-03", end_date="2026-03-05")
+        rows, cursor = ledger_page(self.db, f, limit=50)
+        self.assertIsNone(cursor)
+        self.assertEqual(len(rows), 4)  # days 1 and 3, both workers
+        f.only_worker_id = self.bob.id
+        rows, _ = ledger_page(self.db, f, limit=50)
+        self.assertEqual({r.Attendance.worker_id for r in rows}, {self.bob.id})
+        with self.assertRaises(Exception):
+            parse_ledger_filters(worker_id="nope")
+        self.assertIsNone(parse_ledger_filters(worker_id="nope", strict=False).worker_id)
+
+    def test_items_are_enriched_with_two_queries(self):
+        amy_id = self.amy.id
+        statements = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+        rows, _ = ledger_page(self.db, LedgerFilters(worker_id=amy_id), limit=50)
+        items = settings_routes._ledger_items(self.db, rows)
+        self.assertEqual(len(statements), 2)  # joined page + audit lookup for the deleted shift
+
+        latest = items[0]
+        self.assertEqual(latest["worker_name"], "Amy Adams")
+        self.assertEqual(latest["project_name"], "Roof")
+        self.assertEqual(latest["project_address"], "1 Main St, Surrey")
+        self.assertEqual(latest["job_name"], "Install")
+        self.assertEqual(latest["hours_worked"], 8.0)
+        orphan = next(i for i in items if i["id"] == str(self.orphan.id))
+        self.assertTrue(orphan["shift_deleted"])
+        self.assertEqual(orphan["shift_deleted_by"], "boss")
+
+    def test_list_endpoint_returns_internal_rows_without_count(self):
+        user = MagicMock(id=self.bob.id)
+        with patch("app.auth.security._has_permission", return_value=False):
+            items = settings_routes.list_attendances(
+                worker_id=None,
+                start_date=None,
+                end_date=None,
+                status=None,
+                type_filter=None,
+                project_id=None,
+                record_kind="internal",
+                subcontractor_company_id=None,
+                db=self.db,
+                user=user,
+            )
+        self.assertEqual(len(items), 6)
+        self.assertEqual({i["worker_name"] for i in items}, {"bob"})
+        self.assertNotIn("_sort_ts", items[0])
+
+    def test_payroll_export_groups_by_worker_in_clock_order(self):
+        f = parse_ledger_filters(start_date="2026-03-02", end_date="2026-03-07")
+        rows = list(iter_attendance_ledger_rows(self.db, ledger_export_params(f)))
+        self.assertEqual(len(rows), 12)
+        workers = [r[2] for r in rows]
+        self.assertEqual(workers, sorted(workers))
+        amy_dates = [r[3] for r in rows if r[1] == "amy"]
+        self.assertEqual(amy_dates, sorted(amy_dates))
+        self.assertEqual(amy_dates[0], "2026-03-02")
+        self.assertEqual(rows[0][7], 7.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+"""Tests for the daily attendance rollup and the summaries that read from it."""
+import json
+import unittest
+import uuid
+from datetime import date, datetime, time, timedelta
+from unittest.mock import MagicMock, patch
+
+from fastapi import Response
+
+from app.models.models import (
+    Attendance,
+    AttendanceDailyRollup,
+    AuditLog,
+    EmployeeProfile,
+    Project,
+    ProjectTimeEntry,
+    SettingItem,
+    SettingList,
+    Shift,
+    User,
+)
+from app.routes import dispatch as dispatch_routes
+from app.routes import projects as project_routes
+from app.services.attendance_rollup import rebuild_rollup, rollup_rows
+
+from db_helpers import close_session, make_session
+
+# Sunday 2026-03-01; 16:00 UTC is 08:00 in America/Vancouver.
+_SUNDAY = date(2026, 3, 1)
+
+
+def _utc(d, hour):
+    return datetime.combine(d, time(hour))
+
+
+class TestAttendanceRollup(unittest.TestCase):
+    def setUp(self):
+        self.db = make_session(
+            User,
+            EmployeeProfile,
+            Project,
+            Shift,
+            Attendance,
+            AttendanceDailyRollup,
+            AuditLog,
+            ProjectTimeEntry,
+            SettingList,
+            SettingItem,
+        )
+        self.amy, self.bob = (
+            User(id=uuid.uuid4(), username=n, email_personal=f"{n}@example.com", password_hash="x") for n in ("amy", "bob")
+        )
+        self.db.add_all([self.amy, self.bob])
+        self.db.add(EmployeeProfile(user_id=self.amy.id, first_name="Amy", last_name="Adams"))
+        self.project = Project(id=uuid.uuid4(), code="P-1", name="Roof", client_id=uuid.uuid4())
+        self.db.add(self.project)
+        self.shift = Shift(
+            id=uuid.uuid4(),
+            project_id=self.project.id,
+            worker_id=self.amy.id,
+            date=_SUNDAY,
+            start_time=time(8),
+            end_time=time(16),
+            job_name="Install",
+            status="scheduled",
+            created_by=self.amy.id,
+        )
+        self.db.add(self.shift)
+        self.db.commit()
+
+    def tearDown(self):
+        close_session(self.db)
+
+    def _attendance(self, worker, day, hours=8, status="pending", shift=None, break_minutes=30, reason_text=None):
+        a = Attendance(
+            id=uuid.uuid4(),
+            worker_id=worker.id,
+            shift_id=shift.id if shift else None,
+            clock_in_time=_utc(day, 16),
+            clock_out_time=_utc(day, 16) + timedelta(hours=hours) if hours else None,
+            break_minutes=break_minutes,
+            status=status,
+            reason_text=reason_text,
+            source="app",
+        )
+        self.db.add(a)
+        return a
+
+    def _rows(self):
+        return {
+            (r.worker_id, r.work_date, r.project_key): r
+            for r in self.db.query(AttendanceDailyRollup).all()
+        }
+
+    def test_rows_follow_creates_edits_approvals_and_deletes(self):
+        monday = _SUNDAY + timedelta(days=1)
+        att = self._attendance(self.amy, monday, shift=self.shift)
+        self._attendance(self.amy, monday, hours=None, reason_text="JOB_TYPE:47")
+        self.db.commit()
+        rows = self._rows()
+        project_row = rows[(self.amy.id, monday, str(self.project.id))]
+        self.assertEqual(
+            (project_row.entries, project_row.gross_minutes, project_row.break_minutes, project_row.minutes),
+            (1, 480, 30, 450),
+        )
+        self.assertEqual(project_row.project_id, self.project.id)
+        shop_row = rows[(self.amy.id, monday, "job_47")]
+        self.assertEqual((shop_row.open_entries, shop_row.minutes, shop_row.pending_count), (1, 0, 1))
+
+        att.status = "approved"
+        self.db.commit()
+        project_row = self._rows()[(self.amy.id, monday, str(self.project.id))]
+        self.assertEqual((project_row.pending_count, project_row.approved_count), (0, 1))
+
+        tuesday = monday + timedelta(days=1)
+        att.clock_in_time = _utc(tuesday, 16)
+        att.clock_out_time = _utc(tuesday, 20)
+        self.db.commit()
+        rows = self._rows()
+        self.assertNotIn((self.amy.id, monday, str(self.project.id)), rows)
+        self.assertEqual(rows[(self.amy.id, tuesday, str(self.project.id))].minutes, 210)
+
+        self.db.delete(att)
+        self.db.commit()
+        self.assertEqual(set(self._rows()), {(self.amy.id, monday, "job_47")})
+
+    def test_local_date_and_break_policy(self):
+        timesheet = SettingList(id=uuid.uuid4(), name="timesheet")
+        self.db.add(timesheet)
+        default_break = SettingItem(id=uuid.uuid4(), list_id=timesheet.id, label="default_break_minutes", value="45")
+        self.db.add_all(
+            [
+                default_break,
+                SettingItem(
+                    id=uuid.uuid4(), list_id=timesheet.id, label="break_eligible_employees", value=json.dumps([str(self.bob.id)])
+                ),
+            ]
+        )
+        # 03:00 UTC on Tuesday is still Monday evening in Vancouver.
+        late = Attendance(
+            worker_id=self.bob.id,
+            clock_in_time=datetime(2026, 3, 3, 3),
+            clock_out_time=datetime(2026, 3, 3, 9),
+            status="approved",
+        )
+        self.db.add(late)
+        self.db.commit()
+        monday = date(2026, 3, 2)
+        row = self._rows()[(self.bob.id, monday, "")]
+        self.assertEqual((row.gross_minutes, row.break_minutes, row.minutes, row.default_break_entries), (360, 0, 360, 1))
+        read, = rollup_rows(self.db, monday, monday, [self.bob.id])
+        self.assertEqual((read.gross_minutes, read.break_minutes, read.minutes), (360, 45, 315))
+
+        # The default break is applied on read: a settings change needs no rebuild.
+        default_break.value = "60"
+        self.db.commit()
+        read, = rollup_rows(self.db, monday, monday, [self.bob.id])
+        self.assertEqual((read.break_minutes, read.minutes), (60, 300))
+        self.assertEqual(self._rows()[(self.bob.id, monday, "")].break_minutes, 0)
+
+    def test_rebuild_matches_incremental_rows(self):
+        for day in range(5):
+            self._attendance(self.amy, _SUNDAY + timedelta(days=day), shift=self.shift)
+            self._attendance(self.bob, _SUNDAY + timedelta(days=day), hours=4, status="approved", break_minutes=None)
+        self.db.commit()
+        incremental = {k: (r.entries, r.minutes, r.approved_count) for k, r in self._rows().items()}
+        self.db.query(AttendanceDailyRollup).delete()
+        self.db.commit()
+        self.assertEqual(rebuild_rollup(self.db, log=lambda _line: None), 10)
+        self.assertEqual({k: (r.entries, r.minutes, r.approved_count) for k, r in self._rows().items()}, incremental)
+
+    def test_weekly_summary_totals_and_worker_pages(self):
+        for day in range(3):
+            self._attendance(self.amy, _SUNDAY + timedelta(days=day), shift=self.shift)
+        self._attendance(self.bob, _SUNDAY + timedelta(days=2), hours=4, break_minutes=0)
+        self._attendance(self.bob, _SUNDAY + timedelta(days=9))  # next week
+        self.db.commit()
+        first_worker = min([self.amy, self.bob], key=lambda u: u.id)
+        user = MagicMock(id=uuid.uuid4())
+        with patch.object(dispatch_routes, "is_admin", return_value=True), patch(
+            "app.services.attendance_edit._has_permission", return_value=False
+        ):
+            page = dispatch_routes.get_weekly_attendance_summary(
+                week_start="2026-03-04", worker_id=None, limit=1, cursor=None, db=self.db, user=user
+            )
+            self.assertEqual(page["week_start"], "2026-03-01")
+            self.assertEqual(page["next_cursor"], str(first_worker.id))
+            self.assertEqual({d["worker_id"] for d in page["days"]}, {str(first_worker.id)})
+            rest = dispatch_routes.get_weekly_attendance_summary(
+                week_start="2026-03-01", worker_id=None, limit=1, cursor=page["next_cursor"], db=self.db, user=user
+            )
+            self.assertIsNone(rest["next_cursor"])
+            everyone = dispatch_routes.get_weekly_attendance_summary(
+                week_start="2026-03-01", worker_id=None, limit=100, cursor=None, db=self.db, user=user
+            )
+            month = dispatch_routes.get_attendance_period_summary(
+                period="month", start="2026-03", worker_id=str(self.bob.id), limit=100, cursor=None, db=self.db, user=user
+            )
+        self.assertEqual(len(everyone["days"]), 4)
+        self.assertEqual(everyone["reg_minutes"], 3 * 480 + 240)
+        self.assertEqual(everyone["total_minutes"], 3 * 450 + 240)
+        amy_days = [d for d in everyone["days"] if d["worker_id"] == str(self.amy.id)]
+        self.assertEqual([d["date"] for d in amy_days], ["2026-03-01", "2026-03-02", "2026-03-03"])
+        self.assertEqual((amy_days[0]["job_type"], amy_days[0]["job_name"]), ("Install", "Roof"))
+        self.assertEqual(amy_days[0]["worker_name"], "Amy Adams")
+        self.assertEqual(amy_days[0]["hours_worked_minutes"], 450)
+        self.assertEqual(month["end"], "2026-03-31")
+        self.assertEqual([w["totals"]["entries"] for w in month["workers"]], [2])
+        self.assertEqual(month["workers"][0]["totals"]["minutes"], 240 + 450)
+
+    def test_timesheet_pages_by_worker_and_hides_covered_manual_entries(self):
+        monday = _SUNDAY + timedelta(days=1)
+        self._attendance(self.amy, monday, shift=self.shift, status="approved")
+        self.db.add_all(
+            [
+                ProjectTimeEntry(project_id=self.project.id, user_id=self.amy.id, work_date=monday, minutes=480),
+                ProjectTimeEntry(project_id=self.project.id, user_id=self.bob.id, work_date=monday, minutes=120),
+            ]
+        )
+        self.db.commit()
+        user = MagicMock(id=self.amy.id)
+        response = Response()
+        kwargs = dict(project_id=self.project.id, month="2026-03", user_id=None, db=self.db, user=user)
+        with patch.object(project_routes, "_assert_project_line_read"):
+            everything = project_routes.list_timesheet(response=Response(), limit=None, cursor=None, **kwargs)
+            first = project_routes.list_timesheet(response=response, limit=1, cursor=None, **kwargs)
+            summary = project_routes.project_timesheet_summary(
+                project_id=self.project.id, month="2026-03", limit=10, cursor=None, db=self.db, user=user
+            )
+        self.assertEqual(
+            sorted((e["user_id"], e["is_from_attendance"]) for e in everything),
+            sorted([(str(self.amy.id), True), (str(self.bob.id), False)]),
+        )
+        attendance_entry = next(e for e in everything if e["is_from_attendance"])
+        self.assertEqual((attendance_entry["work_date"], attendance_entry["start_time"]), ("2026-03-02", "08:00:00"))
+        self.assertEqual((attendance_entry["minutes"], attendance_entry["break_minutes"]), (450, 30))
+        self.assertEqual(response.headers["X-Has-More"], "true")
+        self.assertEqual(len(first), 1)
+        self.assertEqual(response.headers["X-Next-Cursor"], first[0]["user_id"])
+        self.assertEqual(len(summary["workers"]), 1)
+        self.assertEqual(summary["workers"][0]["totals"]["approved_count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+"""Employee sync against a local fake BambooHR server."""
+import importlib.util
+import json
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from app.models.models import (
+    EmployeeEmergencyContact,
+    EmployeeProfile,
+    EmployeeVisa,
+    FileObject,
+    SettingItem,
+    SettingList,
+    User,
+)
+from app.services.bamboohr_client import BambooHRClient
+from app.services.bamboohr_sync import get_watermark, map_bounded
+from app.storage.local_provider import LocalStorageProvider
+
+from db_helpers import dispose_session_factory, make_session_factory
+
+_SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "sync_bamboohr_employees.py"
+
+EMPLOYEES = {
+    "1": {"id": "1", "firstName": "Amy", "lastName": "Adams", "homeEmail": "amy@example.com", "status": "Active"},
+    "2": {"id": "2", "firstName": "Bob", "lastName": "Brown", "homeEmail": "bob@example.com", "status": "Active"},
+}
+PHOTO = b"\xff\xd8\xff\xe0fake-jpeg"
+
+
+class FakeBambooHR(BaseHTTPRequestHandler):
+    """Directory, employee, changed-since and photo endpoints; everything else 404s."""
+
+    hits = Counter()
+    changed = {}
+    throttle_once = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.removeprefix("/api/v1")
+        self.hits[path] += 1
+        if path in self.throttle_once:
+            self.throttle_once.discard(path)
+            return self._send(429, headers={"Retry-After": "0"})
+        parts = path.strip("/").split("/")
+        if path == "/employees/directory":
+            return self._send(200, json.dumps({"employees": list(EMPLOYEES.values())}).encode())
+        if path == "/employees/changed":
+            assert parse_qs(url.query)["since"]
+            return self._send(200, json.dumps({"employees": self.changed}).encode())
+        if path == "/meta/tables":
+            return self._send(200, b"[]")
+        if len(parts) == 2 and parts[1] in EMPLOYEES:
+            return self._send(200, json.dumps(EMPLOYEES[parts[1]]).encode())
+        if len(parts) == 3 and parts[2] == "photo":
+            return self._send(200, PHOTO, content_type="image/jpeg")
+        return self._send(404)
+
+
+class TestBambooHRSync(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBambooHR)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        spec = importlib.util.spec_from_file_location("sync_bamboohr_employees_test", _SCRIPT)
+        cls.sync = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cls.sync)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FakeBambooHR.hits.clear()
+        FakeBambooHR.changed = {}
+        FakeBambooHR.throttle_once = set()
+        self.Session = make_session_factory(
+            User,
+            EmployeeProfile,
+            FileObject,
+            EmployeeVisa,
+            EmployeeEmergencyContact,
+            SettingList,
+            SettingItem,
+        )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = LocalStorageProvider(self.tmp.name)
+        host, port = self.server.server_address
+        self.client = BambooHRClient(api_key="k", base_url=f"http://{host}:{port}/api/v1")
+
+    def tearDown(self):
+        self.client.close()
+        dispose_session_factory(self.Session)
+        self.tmp.cleanup()
+
+    def _run(self, **kwargs):
+        with patch.object(self.sync, "SessionLocal", self.Session), patch.object(
+            self.sync, "get_storage", return_value=self.storage
+        ):
+            self.sync.sync_employees(client=self.client, workers=4, **kwargs)
+
+    def test_full_then_incremental_sync(self):
+        FakeBambooHR.throttle_once = {"/employees/1"}
+        self._run()
+        db = self.Session()
+        self.assertEqual(
+            sorted(u.email_personal for u in db.query(User).all()), ["amy@example.com", "bob@example.com"]
+        )
+        self.assertEqual(db.query(FileObject).count(), 2)
+        self.assertIsNotNone(get_watermark(db))
+        # The throttled request was retried after Retry-After.
+        self.assertEqual(FakeBambooHR.hits["/employees/1"], 2)
+        self.assertEqual(FakeBambooHR.hits["/employees/changed"], 0)
+        db.close()
+
+        FakeBambooHR.hits.clear()
+        FakeBambooHR.changed = {"2": {"id": "2", "action": "Updated", "lastChanged": "2026-01-01T00:00:00Z"}}
+        self._run(force_update_photos=True)
+        self.assertEqual(FakeBambooHR.hits["/employees/changed"], 1)
+        self.assertEqual(FakeBambooHR.hits["/employees/1"], 0)
+        self.assertEqual(FakeBambooHR.hits["/employees/2"], 1)
+        self.assertEqual(FakeBambooHR.hits["/employees/2/photo"], 1)
+        db = self.Session()
+        # Same photo bytes: no second upload.
+        self.assertEqual(db.query(FileObject).count(), 2)
+        db.close()
+
+    def test_per_employee_failure_keeps_watermark(self):
+        with patch.object(self.sync, "sync_employee_visas", side_effect=RuntimeError("visa table down")):
+            self._run()
+        db = self.Session()
+        self.assertIsNone(get_watermark(db))
+        db.close()
+
+        # Once the employees sync cleanly, the changed-since point moves forward.
+        self._run()
+        db = self.Session()
+        self.assertEqual(db.query(User).count(), 2)
+        self.assertIsNotNone(get_watermark(db))
+        db.close()
+
+    def test_map_bounded_keeps_input_order_and_reports_errors(self):
+        def work(n):
+            if n == 3:
+                raise ValueError("boom")
+            return n * n
+
+        out = list(map_bounded(work, range(6), workers=3))
+        self.assertEqual([item for item, _, _ in out], list(range(6)))
+        self.assertEqual([r for _, r, e in out if e is None], [0, 1, 4, 16, 25])
+        self.assertIsInstance(out[3][2], ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
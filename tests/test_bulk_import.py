@@ -0,0 +1,149 @@
+"""Tests for the shared bulk import pipeline and the pricing CSV import built on it."""
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from openpyxl import Workbook
+
+from app.models.models import Material, Supplier
+from app.services.bulk_import import (
+    ImportPlan,
+    apply_plan,
+    detect_encoding,
+    iter_csv_records,
+    iter_xlsx_rows,
+    normalize_columns,
+)
+
+from db_helpers import dispose_session_factory, make_session_factory
+
+_SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "import_products_from_pricing_csv.py"
+
+PRICING_CSV = """Material Price List,,,,,
+Convoy Products,,,,,
+Product,Code,Cost,Quantity,Coverage,Unit
+Shingle A,C-1,$10.00,Bundle,33,SQFT
+Nails,C-2,$5.50,Box,,EA
+Drip Edge,C-3,$7.25,Piece,10,LF
+White Cap,,,,,
+Sealant,W-1,$3.00,Tube,,EA
+"""
+
+
+class TestReaders(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_csv_records_sniff_delimiter_and_encoding(self):
+        path = self._path("legacy.csv")
+        with open(path, "wb") as fh:
+            fh.write(" Company Name ;City\nCaf\xe9 Roofing;Surrey\n".encode("cp1252"))
+        self.assertEqual(detect_encoding(path), "cp1252")
+        self.assertEqual(list(iter_csv_records(path)), [(2, {"COMPANY NAME": "Caf\xe9 Roofing", "CITY": "Surrey"})])
+
+    def test_xlsx_rows_stream_from_named_sheet(self):
+        path = self._path("fleet.xlsx")
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Fleet Master List "
+        ws.append(["UNIT #", "MAKE"])
+        ws.append(["T-1", "Ford"])
+        wb.save(path)
+        self.assertEqual(list(iter_xlsx_rows(path, "Fleet Master List")), [(1, ("UNIT #", "MAKE")), (2, ("T-1", "Ford"))])
+        with self.assertRaises(KeyError):
+            list(iter_xlsx_rows(path, "Missing"))
+
+    def test_normalize_columns_once_per_distinct_value(self):
+        calls = []
+
+        def upper(value):
+            calls.append(value)
+            return value.upper()
+
+        records = [{"unit": "ea"}, {"unit": "sqft"}, {"unit": "ea"}]
+        normalize_columns(records, {"unit": upper})
+        self.assertEqual([r["unit"] for r in records], ["EA", "SQFT", "EA"])
+        self.assertEqual(calls, ["ea", "sqft"])
+
+
+class TestBulkApply(unittest.TestCase):
+    def setUp(self):
+        self.Session = make_session_factory(Material, Supplier)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, "pricing.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as fh:
+            fh.write(PRICING_CSV)
+        spec = importlib.util.spec_from_file_location("import_products_test", _SCRIPT)
+        self.products = importlib.util.module_from_spec(spec)
+        # dataclasses resolve string annotations through sys.modules
+        with patch.dict(sys.modules, {spec.name: self.products}):
+            spec.loader.exec_module(self.products)
+
+    def tearDown(self):
+        dispose_session_factory(self.Session)
+        self.tmp.cleanup()
+
+    def _import(self, **kwargs):
+        out = StringIO()
+        with patch.object(self.products, "SessionLocal", self.Session), redirect_stdout(out):
+            code = self.products.import_products(self.csv_path, **kwargs)
+        return code, out.getvalue()
+
+    def _materials(self):
+        db = self.Session()
+        try:
+            return {m.name: (m.supplier_name, m.price, m.unit_type, m.coverage_ft2) for m in db.query(Material).all()}
+        finally:
+            db.close()
+
+    def test_dry_run_then_import_then_rerun_is_unchanged(self):
+        code, out = self._import(dry_run=True)
+        self.assertEqual(code, 0)
+        self.assertIn("[CREATE] Convoy | Shingle A | code=C-1", out)
+        self.assertEqual(self._materials(), {})
+
+        code, out = self._import(batch_size=2)
+        self.assertEqual(code, 0)
+        self.assertIn("Batch 2/2: created 2 row(s)", out)
+        materials = self._materials()
+        self.assertEqual(materials["Shingle A"], ("Convoy", 10.0, "coverage", 33.0))
+        self.assertEqual(materials["Sealant"][0], "White Cap")
+
+        code, out = self._import()
+        self.assertEqual(code, 0)
+        self.assertIn("Unchanged: 4", out)
+
+        with open(self.csv_path, "w", encoding="utf-8") as fh:
+            fh.write(PRICING_CSV.replace("$5.50", "$6.00"))
+        code, out = self._import(dry_run=True)
+        self.assertIn("[UPDATE] id=", out)
+        self.assertIn("price: 5.5 -> 6.0", out)
+        self._import()
+        self.assertEqual(self._materials()["Nails"][1], 6.0)
+        self.assertEqual(len(self._materials()), 4)
+
+    def test_failed_batch_stops_and_rerun_resumes(self):
+        plan = ImportPlan()
+        for i, name in enumerate(["a", "b", None, "d"], start=1):
+            plan.create(i, str(name), {"name": name})
+        db = self.Session()
+        result = apply_plan(db, Material, plan, batch_size=2, log=lambda _line: None)
+        self.assertEqual((result.batches, result.created, result.failed_batch), (1, 2, 2))
+        self.assertEqual(sorted(m.name for m in db.query(Material).all()), ["a", "b"])
+        db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Tests for the company folder path index, compiled ACLs and per-company tree cache."""
+import unittest
+import uuid
+from unittest.mock import MagicMock
+
+from app.models.models import ClientFolder, EmployeeProfile
+from app.services import company_folder_index as idx
+from app.services.company_folder_index import (
+    FolderViewer,
+    backfill_client_folder_paths,
+    compile_folder_acl,
+    current_folder_tree,
+    folder_acl_rows,
+    get_folder_tree,
+    subtree_acl_rows,
+)
+
+from db_helpers import close_session, make_session
+
+
+def _user(admin=False):
+    role = MagicMock()
+    role.name = "admin" if admin else "staff"
+    user = MagicMock()
+    user.id = uuid.uuid4()
+    user.roles = [role]
+    return user
+
+
+class TestFolderPathIndex(unittest.TestCase):
+    def setUp(self):
+        self.db = make_session(ClientFolder, EmployeeProfile)
+        self.client_id = uuid.uuid4()
+        idx.invalidate_folder_tree()
+
+    def tearDown(self):
+        close_session(self.db)
+
+    def _folder(self, name, parent=None, perms=None):
+        f = ClientFolder(client_id=self.client_id, name=name, parent_id=parent.id if parent else None,
+                         access_permissions=perms)
+        self.db.add(f)
+        self.db.commit()
+        return f
+
+    def test_paths_follow_inserts_and_moves(self):
+        root = self._folder("HR")
+        a = self._folder("A", root)
+        b = self._folder("B", a)
+        other = self._folder("Finance")
+        self.assertEqual(b.path, f"/{root.id}/{a.id}/{b.id}/")
+
+        a.parent_id = other.id
+        self.db.commit()
+        self.db.expire_all()
+        self.assertEqual(a.path, f"/{other.id}/{a.id}/")
+        self.assertEqual(b.path, f"/{other.id}/{a.id}/{b.id}/")
+
+        self.db.query(ClientFolder).update({ClientFolder.path: None})
+        self.db.commit()
+        self.assertEqual(backfill_client_folder_paths(self.db), 4)
+        self.db.expire_all()
+        self.assertEqual(b.path, f"/{other.id}/{a.id}/{b.id}/")
+
+    def test_tree_hides_restricted_folders_per_viewer(self):
+        root = self._folder("HR")
+        public = self._folder("Public", root, {"is_public": True})
+        staff = _user()
+        secret = self._folder("Secret", root, {"is_public": False, "allowed_user_ids": [str(staff.id)]})
+        by_div = self._folder("Ops", secret, {"is_public": False, "allowed_divisions": ["Roofing"]})
+
+        tree = get_folder_tree(self.db, self.client_id)
+        self.assertEqual(tree.descendants(root.id), {root.id, public.id, secret.id, by_div.id})
+        self.assertEqual(tree.hidden_ids(FolderViewer(self.db, _user(admin=True))), frozenset())
+        self.assertEqual(tree.hidden_ids(FolderViewer(self.db, staff)), frozenset({by_div.id}))
+        self.assertEqual(tree.hidden_ids(FolderViewer(self.db, _user())), frozenset({secret.id, by_div.id}))
+
+        roofer = _user()
+        self.db.add(EmployeeProfile(user_id=roofer.id, division="Roofing"))
+        self.db.commit()
+        self.assertEqual(tree.hidden_ids(FolderViewer(self.db, roofer)), frozenset({secret.id}))
+
+    def test_cache_is_dropped_on_folder_commit(self):
+        root = self._folder("HR")
+        tree = get_folder_tree(self.db, self.client_id)
+        self.assertIs(get_folder_tree(self.db, self.client_id), tree)
+        child = self._folder("New", root)
+        self.assertIn(child.id, get_folder_tree(self.db, self.client_id).descendants(root.id))
+
+        child.access_permissions = {"is_public": False}
+        self.db.commit()
+        self.assertEqual(get_folder_tree(self.db, self.client_id).hidden_ids(FolderViewer(self.db, _user())),
+                         frozenset({child.id}))
+
+    def test_folders_changed_by_another_worker_are_not_trusted_from_the_cache(self):
+        root = self._folder("HR")
+        public = self._folder("Public", root)
+        tree = get_folder_tree(self.db, self.client_id)
+        staff = FolderViewer(self.db, _user())
+
+        # Another worker's writes: no session events fire in this process, the cached tree stays.
+        secret_id = uuid.uuid4()
+        with self.db.get_bind().begin() as conn:
+            conn.execute(
+                ClientFolder.__table__.insert().values(
+                    id=secret_id, client_id=self.client_id, name="Secret", parent_id=root.id,
+                    path=f"/{root.id}/{secret_id}/", access_permissions={"is_public": False},
+                )
+            )
+            conn.execute(
+                ClientFolder.__table__.update()
+                .where(ClientFolder.id == public.id)
+                .values(access_permissions={"is_public": False})
+            )
+        self.assertIs(get_folder_tree(self.db, self.client_id), tree)
+        self.assertEqual(tree.hidden_ids(staff), frozenset())
+
+        rows = subtree_acl_rows(self.db, self.client_id, root.id)
+        self.assertEqual({r.id for r in rows}, {root.id, public.id, secret_id})
+        self.assertEqual(current_folder_tree(self.db, self.client_id, rows).hidden_ids(staff), {public.id, secret_id})
+        fresh = current_folder_tree(self.db, self.client_id, folder_acl_rows(self.db, self.client_id, [secret_id]))
+        self.assertIsNot(fresh, tree)
+        self.assertIn(secret_id, fresh.hidden_ids(staff))
+
+    def test_compile_acl(self):
+        self.assertIsNone(compile_folder_acl(None))
+        self.assertIsNone(compile_folder_acl({"allowed_user_ids": ["x"]}))
+        uid = uuid.uuid4()
+        acl = compile_folder_acl({"is_public": False, "allowed_user_ids": [str(uid), "bad"], "allowed_divisions": ["A"]})
+        self.assertTrue(acl.allows(uid, None))
+        self.assertTrue(acl.allows(uuid.uuid4(), "A"))
+        self.assertFalse(acl.allows(uuid.uuid4(), None))
+
+
+if __name__ == "__main__":
+    unittest.main()
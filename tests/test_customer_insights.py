@@ -0,0 +1,131 @@
+"""Tests for customer insights: persisted proposal totals, SQL range aggregation and the payload cache."""
+import unittest
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+from app.models.models import Project, Proposal
+from app.services import customer_insights as ci
+from app.services.project_customer_participation import serialize_list_row
+
+from db_helpers import close_session, make_session
+
+
+class TestCustomerInsights(unittest.TestCase):
+    def setUp(self):
+        self.db = make_session(Project, Proposal)
+        self.client_id = uuid.uuid4()
+        self.projects = []
+
+    def tearDown(self):
+        close_session(self.db)
+        ci.invalidate_customer_insights()
+
+    def _project(self, status, *, bidding=False, **kwargs):
+        p = Project(
+            id=uuid.uuid4(),
+            code=f"P-{len(self.projects)}",
+            name=status,
+            client_id=self.client_id,
+            status_label=status,
+            is_bidding=bidding,
+            created_at=kwargs.pop("created_at", datetime(2026, 1, 5, 9)),
+            **kwargs,
+        )
+        self.db.add(p)
+        self.projects.append(p)
+        return p
+
+    def _proposal(self, project, costs, *, change_order=False, created_at=datetime(2026, 1, 6), **data):
+        pr = Proposal(
+            id=uuid.uuid4(),
+            project_id=project.id,
+            client_id=self.client_id,
+            is_change_order=change_order,
+            created_at=created_at,
+            data={"additional_costs": [{"value": v, "quantity": 1} for v in costs], **data},
+        )
+        self.db.add(pr)
+        return pr
+
+    def _rollup(self):
+        return [serialize_list_row(p, "owner") for p in self.projects]
+
+    def _fixture(self):
+        finished = self._project("Finished", date_end=datetime(2026, 3, 10, 23, 30))
+        self._proposal(finished, [100, 50])
+        self._proposal(finished, [25], change_order=True)
+        bid = self._project("Refused", bidding=True, status_changed_at=datetime(2026, 2, 20))
+        self._proposal(bid, [300], created_at=datetime(2026, 1, 1))
+        self._proposal(bid, [400], created_at=datetime(2026, 1, 9))
+        self._proposal(bid, [999], change_order=True, created_at=datetime(2026, 1, 20))
+        self._project("In Progress", date_awarded=datetime(2026, 3, 2), cost_estimated=700)
+        self._project(" on hold ", date_awarded=datetime(2026, 2, 15), service_value=80)
+        self._project("Finished", date_end=datetime(2026, 2, 28))
+        self.db.commit()
+
+    def test_grand_total_persisted_on_save(self):
+        project = self._project("In Progress")
+        pr = self._proposal(project, [10, 20])
+        self.db.commit()
+        self.assertEqual(pr.grand_total, 30.0)
+        pr.data = {"total": 55, "additional_costs": []}
+        self.db.commit()
+        self.assertEqual(pr.grand_total, 55.0)
+
+    def test_value_maps_from_persisted_totals_match_legacy_json(self):
+        self._fixture()
+        values, missing, persisted = ci.build_proposal_value_maps(self.db, self._rollup())
+        self.assertTrue(persisted)
+        by_name = {p.name: values[str(p.id)] for p in self.projects if p.name != "Finished" or p.date_end.month == 3}
+        self.assertEqual(by_name, {"Finished": 175.0, "Refused": 400.0, "In Progress": 700.0, " on hold ": 80.0})
+        self.assertEqual(missing, 1)
+
+        # Rows saved before the column existed fall back to pricing the JSON.
+        self.db.query(Proposal).update({Proposal.grand_total: None})
+        self.db.commit()
+        legacy, legacy_missing, persisted = ci.build_proposal_value_maps(self.db, self._rollup())
+        self.assertFalse(persisted)
+        self.assertEqual((legacy, legacy_missing), (values, missing))
+
+    def test_sql_range_totals_match_python(self):
+        self._fixture()
+        rollup = self._rollup()
+        values, _, _ = ci.build_proposal_value_maps(self.db, rollup)
+        ranges = [("2026-03-01", "2026-03-31"), ("2026-01-29", "2026-02-28")]
+        sql = ci._range_totals_sql(self.db, rollup, ranges)
+        self.assertEqual(sql, [ci._range_totals(rollup, values, *r) for r in ranges])
+        self.assertEqual(sql[0], {"delivered_value": 175.0, "delivered_count": 1, "refused_count": 0, "converted_count": 1})
+        self.assertEqual(sql[1]["refused_count"], 1)
+
+    def test_cached_payload_dropped_when_a_proposal_changes(self):
+        project = self._project("In Progress")
+        other = Project(id=uuid.uuid4(), code="X", name="Other", client_id=uuid.uuid4())
+        self.db.add(other)
+        self.db.commit()
+        builds = []
+
+        def fake_build(db, client_uuid, user, date_from, date_to, client_created_at=None):
+            builds.append(client_uuid)
+            return {"rollup": [{"id": str(project.id)}], "related_memberships": []}
+
+        user = type("U", (), {"id": uuid.uuid4()})()
+        with patch.object(ci, "build_customer_insights_payload", fake_build):
+            get = lambda: ci.cached_customer_insights_payload(self.db, self.client_id, user, "2026-03-01", "2026-03-31")
+            self.assertIs(get(), get())
+            self.assertEqual(len(builds), 1)
+
+            self._proposal(other, [5]).client_id = other.client_id
+            self.db.commit()
+            get()
+            self.assertEqual(len(builds), 1)  # unrelated project
+
+            pr = self._proposal(project, [5])
+            pr.client_id = uuid.uuid4()  # proposal filed under another client still touches this project
+            self.db.commit()
+            get()
+            self.assertEqual(len(builds), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Tests for SQLAlchemy query instrumentation (per-request counts, slow-query log, Server-Timing)."""
+import unittest
+import uuid
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.logging import RequestIdMiddleware
+from app.services import db_metrics
+
+
+class TestDbMetrics(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+        self.name = f"test-{uuid.uuid4().hex[:8]}"
+        db_metrics.instrument_engine(self.engine, self.name)
+        with self.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+            conn.execute(text("INSERT INTO items (name) VALUES ('a'), ('b')"))
+        db_metrics.reset_db_stats()
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def _select(self, n=1):
+        with self.engine.connect() as conn:
+            for _ in range(n):
+                conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": 1}).all()
+
+    def test_queries_attributed_to_current_request(self):
+        self._select()
+        with db_metrics.track_request("req-1", "GET", "/items/1") as stats:
+            self._select(3)
+        self.assertIsNone(db_metrics.current_request_stats())
+        self.assertEqual((stats.queries, stats.slow), (3, 0))
+        self.assertGreater(stats.seconds, 0)
+        self.assertEqual(db_metrics.db_stats()["engines"][self.name]["queries"], 4)
+
+    def test_slow_query_logged_with_sampled_explain(self):
+        logged = []
+        with patch.object(db_metrics.settings, "db_slow_query_ms", 0), patch.object(
+            db_metrics.settings, "db_slow_query_explain_rate", 1.0
+        ), patch("app.services.system_log.enqueue_system_log", lambda *a, **kw: logged.append((a, kw))):
+            with db_metrics.track_request("req-2", "GET", "/items/1"):
+                self._select()
+        (args, kwargs), = logged
+        self.assertEqual(args[:2], ("warning", "db"))
+        self.assertIn("GET /items/1", args[2])
+        self.assertEqual(kwargs["request_id"], "req-2")
+        self.assertIn("SELECT name FROM items", kwargs["detail"])
+        self.assertIn("items", kwargs["extra"]["explain"])
+        self.assertEqual(db_metrics.db_stats()["engines"][self.name]["slow"], 1)
+
+    def test_middleware_sets_server_timing_and_endpoint_totals(self):
+        app = FastAPI()
+        app.add_middleware(db_metrics.DbMetricsMiddleware)
+        app.add_middleware(RequestIdMiddleware)
+
+        @app.get("/items/{item_id}")
+        def get_item(item_id: int):
+            self._select(2)
+            return {"id": item_id}
+
+        warnings = []
+        with patch.object(db_metrics.settings, "db_request_query_warn", 1), patch(
+            "app.services.system_log.enqueue_system_log", lambda *a, **kw: warnings.append(kw)
+        ):
+            response = TestClient(app).get("/items/7", headers={"X-Request-ID": "req-3"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db;dur=', response.headers["server-timing"])
+        self.assertIn('desc="2 queries"', response.headers["server-timing"])
+        self.assertEqual([w["request_id"] for w in warnings], ["req-3"])
+        endpoint, = [e for e in db_metrics.db_stats()["endpoints"] if e["endpoint"] == "GET /items/{item_id}"]
+        self.assertEqual((endpoint["requests"], endpoint["max_queries"]), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""Tests for the streaming CSV/XLSX export engine."""
+import io
+import unittest
+import uuid
+from datetime import date, datetime, time
+
+from openpyxl import load_workbook
+
+from app.models.models import (
+    Attendance,
+    AttendanceDailyRollup,
+    AuditLog,
+    EmployeeProfile,
+    FileObject,
+    Project,
+    ProjectTimeEntry,
+    SettingItem,
+    SettingList,
+    Shift,
+    SystemLog,
+    User,
+)
+from app.services.exports import (
+    JOB_STATUS_READY,
+    export_job_payload,
+    iter_csv_bytes,
+    iter_export_bytes,
+    iter_timesheet_rows,
+    iter_user_activity_rows,
+    run_export_job,
+    start_export_job,
+    write_xlsx,
+)
+
+from db_helpers import close_session, make_session_factory
+
+
+class _MemoryStorage:
+    def __init__(self):
+        self.blobs = {}
+
+    def copy_in(self, src, key):
+        self.blobs[key] = src.read()
+
+
+class TestExports(unittest.TestCase):
+    def setUp(self):
+        self.Session = make_session_factory(
+            User,
+            EmployeeProfile,
+            SystemLog,
+            AuditLog,
+            Project,
+            Shift,
+            Attendance,
+            AttendanceDailyRollup,
+            SettingList,
+            SettingItem,
+            ProjectTimeEntry,
+            FileObject,
+            threaded=True,
+        )
+        self.db = self.Session()
+        self.user = User(username="alice", email_personal="a@example.com", password_hash="x")
+        self.db.add(self.user)
+        self.db.flush()
+        self.db.add(EmployeeProfile(user_id=self.user.id, first_name="Alice", last_name="Smith"))
+        self.db.commit()
+
+    def tearDown(self):
+        close_session(self.db)
+
+    def test_csv_is_chunked_with_bom_and_header(self):
+        rows = ([i, f"row {i}", None] for i in range(2000))
+        chunks = list(iter_csv_bytes(["n", "label", "empty"], rows, chunk_bytes=1024))
+        self.assertGreater(len(chunks), 5)
+        text = b"".join(chunks).decode("utf-8")
+        self.assertTrue(text.startswith("\ufeffn,label,empty"))
+        self.assertIn("1999,row 1999,", text)
+
+    def test_xlsx_write_only_workbook(self):
+        buf = io.BytesIO()
+        count = write_xlsx(["a", "b"], iter([[1, "x\x01y"], [2, datetime(2026, 1, 2, 3, 4)]]), buf)
+        self.assertEqual(count, 2)
+        ws = load_workbook(io.BytesIO(buf.getvalue())).active
+        self.assertEqual([c.value for c in ws[1]], ["a", "b"])
+        self.assertEqual(ws["B2"].value, "xy")
+        self.assertEqual(ws["B3"].value, "2026-01-02T03:04:00")
+
+    def test_user_activity_merges_sources_newest_first(self):
+        uid = self.user.id
+        self.db.add_all(
+            [
+                SystemLog(level="info", category="auth", message="Login successful", user_id=uid,
+                          timestamp_utc=datetime(2026, 1, 1, 8, 0)),
+                SystemLog(level="info", category="page_view", message="Projects", user_id=uid,
+                          path="/projects", timestamp_utc=datetime(2026, 1, 3, 8, 0)),
+                AuditLog(entity_type="project", entity_id=uuid.uuid4(), action="UPDATE", actor_id=uid,
+                         timestamp_utc=datetime(2026, 1, 2, 8, 0)),
+            ]
+        )
+        self.db.commit()
+        rows = list(iter_user_activity_rows(self.db, {"user_id": uid}))
+        self.assertEqual([r[0] for r in rows], ["page_view", "audit", "sign_in"])
+
+    def _project_with_shift(self):
+        project = Project(code="P-1", name="Tower")
+        self.db.add(project)
+        self.db.flush()
+        shift = Shift(project_id=project.id, worker_id=self.user.id, date=date(2026, 3, 2),
+                      start_time=time(8), end_time=time(16), created_by=self.user.id)
+        self.db.add(shift)
+        self.db.flush()
+        return project, shift
+
+    def test_timesheet_hides_manual_entries_covered_by_attendance(self):
+        project, shift = self._project_with_shift()
+        self.db.add(Attendance(shift_id=shift.id, worker_id=self.user.id, status="approved",
+                               clock_in_time=datetime(2026, 3, 2, 8), clock_out_time=datetime(2026, 3, 2, 16, 30),
+                               break_minutes=30))
+        self.db.add_all(
+            [
+                ProjectTimeEntry(project_id=project.id, user_id=self.user.id, work_date=date(2026, 3, 2), minutes=480),
+                ProjectTimeEntry(project_id=project.id, user_id=self.user.id, work_date=date(2026, 3, 3),
+                                 start_time=time(7), minutes=120),
+                ProjectTimeEntry(project_id=project.id, user_id=self.user.id, work_date=date(2026, 4, 1), minutes=60),
+            ]
+        )
+        self.db.commit()
+        rows = list(iter_timesheet_rows(self.db, {"project_id": project.id, "month": "2026-03"}))
+        self.assertEqual([(r[0], r[8]) for r in rows], [("2026-03-02", "attendance"), ("2026-03-03", "manual")])
+        self.assertEqual(rows[0][1], "Alice Smith")
+        self.assertEqual(rows[0][6], 8.0)
+        self.assertEqual(rows[1][6], 2.0)
+
+    def test_stream_generator_uses_its_own_session(self):
+        project, _ = self._project_with_shift()
+        self.db.add(ProjectTimeEntry(project_id=project.id, user_id=self.user.id, work_date=date(2026, 3, 3), minutes=90))
+        self.db.commit()
+        body = b"".join(iter_export_bytes("timesheet", {"project_id": project.id}, "csv", session_factory=self.Session))
+        self.assertIn(b"2026-03-03,Alice Smith,alice", body)
+
+    def test_job_writes_file_object(self):
+        project, _ = self._project_with_shift()
+        self.db.add(ProjectTimeEntry(project_id=project.id, user_id=self.user.id, work_date=date(2026, 3, 3), minutes=90))
+        self.db.commit()
+        params = {"project_id": project.id}
+        fo = start_export_job(self.db, "timesheet", params, "xlsx", "timesheet-P-1", self.user.id,
+                              run_in_background=False)
+        storage = _MemoryStorage()
+        run_export_job(fo.id, params, session_factory=self.Session, storage=storage)
+
+        self.db.expire_all()
+        fo = self.db.query(FileObject).filter(FileObject.id == fo.id).one()
+        payload = export_job_payload(fo)
+        self.assertEqual(payload["status"], JOB_STATUS_READY)
+        self.assertEqual(payload["rows"], 1)
+        self.assertEqual(payload["filename"], "timesheet-P-1.xlsx")
+        ws = load_workbook(io.BytesIO(storage.blobs[fo.key])).active
+        self.assertEqual(ws["A2"].value, "2026-03-03")
+        self.assertEqual(fo.size_bytes, len(storage.blobs[fo.key]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Tests for the geocoding worker pool and its per-address cache."""
+import threading
+import unittest
+import uuid
+
+from app.models.models import ClientSite, GeocodeCache, Project
+from app.services.geocoding_queue import (
+    FakeGeocoder,
+    GeocodingQueue,
+    address_cache_key,
+    lookup_cached,
+)
+from app.services.project_geocoding_service import (
+    GEOCODE_ERROR,
+    GEOCODING_STATUS_MANUAL,
+    GeocodeResult,
+)
+
+from db_helpers import dispose_session_factory, make_session_factory
+
+MAIN_ST = "123 Main St, Vancouver, BC, Canada"
+
+
+class TestGeocodingQueue(unittest.TestCase):
+    def setUp(self):
+        self.Session = make_session_factory(Project, ClientSite, GeocodeCache, threaded=True)
+        self.addCleanup(dispose_session_factory, self.Session)
+        self.sleeps = []
+
+    def _queue(self, geocoder, **kw):
+        kw.setdefault("workers", 1)
+        kw.setdefault("rate_per_second", 0)
+        kw.setdefault("backoff_base", 0)
+        q = GeocodingQueue(self.Session, geocoder, sleep=self.sleeps.append, **kw)
+        self.addCleanup(q.stop)
+        return q
+
+    def _project(self, address="123 Main St", city="Vancouver", **kw):
+        db = self.Session()
+        p = Project(
+            id=uuid.uuid4(),
+            code=f"P-{uuid.uuid4().hex[:6]}",
+            name="P",
+            address=address,
+            address_city=city,
+            address_province="BC",
+            address_country="Canada",
+            **kw,
+        )
+        db.add(p)
+        db.commit()
+        pid = str(p.id)
+        db.close()
+        return pid
+
+    def _get(self, pid):
+        db = self.Session()
+        try:
+            return db.get(Project, uuid.UUID(pid))
+        finally:
+            db.close()
+
+    def test_in_flight_requests_share_one_call(self):
+        gate = threading.Event()
+        fake = FakeGeocoder({MAIN_ST: (49.28, -123.12)}, gate=gate)
+        q = self._queue(fake)
+        pids = [self._project() for _ in range(3)]
+        for pid in pids:
+            # Same address spelled differently still joins the in-flight job.
+            self.assertTrue(q.submit(pid, MAIN_ST if pid != pids[2] else "123 main st.  vancouver BC canada"))
+        gate.set()
+        q.wait_idle()
+
+        self.assertEqual(len(fake.calls), 1)
+        stats = q.stats()
+        self.assertEqual(stats["deduplicated"], 2)
+        self.assertEqual(stats["projects_updated"], 3)
+        for pid in pids:
+            project = self._get(pid)
+            self.assertEqual(project.geocoding_status, "success")
+            self.assertAlmostEqual(float(project.lat), 49.28)
+            self.assertTrue(project.geohash)
+
+    def test_cache_answers_later_projects(self):
+        fake = FakeGeocoder({MAIN_ST: (49.28, -123.12)})
+        q = self._queue(fake)
+        q.submit(self._project(), MAIN_ST)
+        q.wait_idle()
+        later = self._project()
+        q.submit(later, MAIN_ST)
+        q.wait_idle()
+
+        self.assertEqual(len(fake.calls), 1)
+        self.assertEqual(q.stats()["cache_hits"], 1)
+        self.assertEqual(self._get(later).geocoding_status, "success")
+
+    def test_not_found_is_cached_and_marks_failed(self):
+        fake = FakeGeocoder({})
+        q = self._queue(fake)
+        pid = self._project(address="nowhere")
+        q.submit(pid, "nowhere, Vancouver, BC, Canada")
+        q.wait_idle()
+
+        self.assertEqual(self._get(pid).geocoding_status, "failed")
+        db = self.Session()
+        self.assertIsNotNone(lookup_cached(db, address_cache_key("Nowhere, Vancouver, BC, Canada")))
+        db.close()
+
+    def test_retryable_errors_back_off_and_are_not_cached(self):
+        fake = FakeGeocoder({MAIN_ST: (49.28, -123.12)}, fail_first=2)
+        q = self._queue(fake, backoff_base=0.5)
+        pid = self._project()
+        q.submit(pid, MAIN_ST)
+        q.wait_idle()
+        self.assertEqual(len(fake.calls), 3)
+        self.assertEqual(q.stats()["retries"], 2)
+        self.assertGreaterEqual(len(self.sleeps), 2)
+        self.assertEqual(self._get(pid).geocoding_status, "success")
+
+        always_down = lambda address: GeocodeResult(GEOCODE_ERROR, error="quota", retryable=True)
+        q2 = self._queue(always_down, max_attempts=2)
+        other = self._project(address="1 Other Rd")
+        q2.submit(other, "1 Other Rd, Vancouver, BC, Canada")
+        q2.wait_idle()
+        self.assertEqual(self._get(other).geocoding_status, "failed")
+        db = self.Session()
+        self.assertIsNone(lookup_cached(db, address_cache_key("1 Other Rd, Vancouver, BC, Canada")))
+        db.close()
+
+    def test_manual_pins_and_changed_addresses_are_left_alone(self):
+        fake = FakeGeocoder({MAIN_ST: (49.28, -123.12)})
+        q = self._queue(fake, autostart=False)
+        manual = self._project(lat=1.5, lng=2.5, geocoding_status=GEOCODING_STATUS_MANUAL)
+        moved = self._project()
+        q.submit(manual, MAIN_ST)
+        q.submit(moved, MAIN_ST)
+        db = self.Session()
+        db.get(Project, uuid.UUID(moved)).address = "9 Elsewhere Ave"
+        db.commit()
+        db.close()
+        q.start()
+        q.wait_idle()
+
+        self.assertAlmostEqual(float(self._get(manual).lat), 1.5)
+        self.assertIsNone(self._get(moved).geocoding_status)
+        self.assertEqual(q.stats()["projects_updated"], 0)
+
+    def test_full_queue_drops(self):
+        q = self._queue(FakeGeocoder({}), max_size=1, autostart=False)
+        self.assertTrue(q.submit(self._project(), "a"))
+        self.assertFalse(q.submit(self._project(), "b"))
+        self.assertEqual(q.stats()["dropped"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
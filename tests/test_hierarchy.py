@@ -0,0 +1,87 @@
+"""Tests for the in-memory supervisor hierarchy index."""
+import unittest
+
+from sqlalchemy import event
+
+from app.models.models import EmployeeProfile, User
+from app.services.hierarchy import (
+    HierarchyIndex,
+    get_direct_reports,
+    get_manager_chain,
+    get_subtree_size,
+    invalidate_hierarchy_index,
+    is_in_chain,
+)
+
+from db_helpers import close_session, make_session
+
+
+class TestHierarchyIndex(unittest.TestCase):
+    def setUp(self):
+        # ceo <- vp <- (lead_a, lead_b); lead_a <- worker
+        self.index = HierarchyIndex(
+            {"vp": "ceo", "lead_a": "vp", "lead_b": "vp", "worker": "lead_a", "x": "y", "y": "x"}
+        )
+
+    def test_ancestors_and_is_above(self):
+        self.assertEqual(self.index.ancestors("worker"), ["lead_a", "vp", "ceo"])
+        self.assertEqual(self.index.ancestors("worker", max_depth=2), ["lead_a", "vp"])
+        self.assertTrue(self.index.is_above("ceo", "worker"))
+        self.assertFalse(self.index.is_above("lead_b", "worker"))
+        self.assertEqual(self.index.ancestors("x"), ["y"])
+
+    def test_descendants_and_subtree_size(self):
+        self.assertEqual(sorted(self.index.descendants("vp")), ["lead_a", "lead_b", "worker"])
+        self.assertEqual(self.index.subtree_size("ceo"), 4)
+        self.assertEqual(self.index.subtree_size("lead_a"), 1)
+        self.assertEqual(self.index.subtree_size("worker"), 0)
+        self.assertEqual(self.index.subtree_size("x"), 1)
+
+    def test_forest_restricted_to_visible_people(self):
+        forest = self.index.forest(["vp", "lead_a", "worker", "x", "y"])
+        self.assertEqual(forest["children"], {"vp": ["lead_a"], "lead_a": ["worker"], "x": ["y"]})
+        # x -> y -> x: the node where the cycle is detected becomes a root (same as the client).
+        self.assertEqual(forest["roots"], ["vp", "x"])
+
+
+class TestHierarchyDbHelpers(unittest.TestCase):
+    def setUp(self):
+        invalidate_hierarchy_index()
+        self.db = make_session(User, EmployeeProfile)
+        self.boss, self.mid, self.emp = (
+            User(username=n, email_personal=f"{n}@example.com", password_hash="x") for n in ("boss", "mid", "emp")
+        )
+        self.db.add_all([self.boss, self.mid, self.emp])
+        self.db.flush()
+        self.db.add(EmployeeProfile(user_id=self.mid.id, manager_user_id=self.boss.id))
+        self.emp_profile = EmployeeProfile(user_id=self.emp.id, manager_user_id=self.mid.id)
+        self.db.add(self.emp_profile)
+        self.db.commit()
+
+    def tearDown(self):
+        close_session(self.db)
+        invalidate_hierarchy_index()
+
+    def test_queries_hit_db_once_until_manager_changes(self):
+        boss, mid, emp = str(self.boss.id), str(self.mid.id), str(self.emp.id)
+        statements = []
+        event.listen(self.db.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+        self.assertEqual(get_manager_chain(emp, self.db), [mid, boss])
+        self.assertTrue(is_in_chain(boss, emp, self.db))
+        self.assertEqual(get_direct_reports(mid, self.db), [emp])
+        self.assertEqual(get_subtree_size(boss, self.db), 2)
+        self.assertEqual(len(statements), 1)
+
+        self.emp_profile.manager_user_id = self.boss.id
+        self.db.commit()
+        self.assertEqual(get_manager_chain(emp, self.db), [boss])
+        self.assertFalse(is_in_chain(mid, emp, self.db))
+
+    def test_invalid_ids(self):
+        self.assertEqual(get_manager_chain("not-a-uuid", self.db), [])
+        self.assertFalse(is_in_chain("nope", str(self.emp.id), self.db))
+
+
+if __name__ == "__main__":
+    unittest.main()
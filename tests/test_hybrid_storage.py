@@ -0,0 +1,150 @@
+"""Tests for the hybrid read-through provider and the bulk blob migration."""
+import os
+import tempfile
+import threading
+import unittest
+
+from app.models.models import FileObject
+from app.storage.hybrid_provider import HybridStorageProvider
+from app.storage.migration import load_progress, migrate_missing_blobs
+from app.storage.provider import StorageProvider
+
+from db_helpers import dispose_session_factory, make_session_factory
+
+
+class FakeProvider(StorageProvider):
+    def __init__(self, name, keys=()):
+        self.name = name
+        self.keys = set(keys)
+        self.exists_calls = 0
+        self.copied = []
+        self._lock = threading.Lock()
+
+    def generate_upload_url(self, key, content_type, expires_s):
+        return f"{self.name}://upload/{key}"
+
+    def get_download_url(self, key, expires_s):
+        return f"{self.name}://{key}" if key in self.keys else None
+
+    def exists(self, key):
+        with self._lock:
+            self.exists_calls += 1
+        return key in self.keys
+
+    def copy_in(self, src_stream_or_url, key):
+        with self._lock:
+            self.copied.append(key)
+            self.keys.add(key)
+
+    def delete(self, key):
+        self.keys.discard(key)
+
+
+class TestHybridStorageProvider(unittest.TestCase):
+    def setUp(self):
+        self.primary = FakeProvider("primary", {"a"})
+        self.fallback = FakeProvider("fallback", {"b", "c"})
+        self.hybrid = HybridStorageProvider(self.primary, self.fallback)
+
+    def tearDown(self):
+        self.hybrid.stop()
+
+    def test_existence_is_cached(self):
+        for _ in range(3):
+            self.assertEqual(self.hybrid.get_download_url("a", 60), "primary://a")
+        self.assertEqual(self.primary.exists_calls, 1)
+        self.assertEqual(self.hybrid.stats()["cache_hits"], 2)
+
+    def test_miss_serves_fallback_and_copies_in_background(self):
+        self.assertEqual(self.hybrid.get_download_url("b", 60), "fallback://b")
+        self.hybrid.wait_for_copies()
+        self.assertEqual(self.primary.copied, ["b"])
+        self.assertEqual(self.hybrid.get_download_url("b", 60), "primary://b")
+        self.assertIsNone(self.hybrid.get_download_url("zzz", 60))
+        self.assertEqual(self.hybrid.stats()["copied"], 1)
+
+    def test_negative_entries_expire_and_writes_update_cache(self):
+        hybrid = HybridStorageProvider(self.primary, self.fallback, missing_ttl_s=0)
+        self.assertFalse(hybrid.primary_has("new"))
+        self.primary.keys.add("new")  # e.g. uploaded by another worker
+        self.assertTrue(hybrid.primary_has("new"))
+        hybrid.delete("new")
+        self.assertFalse(hybrid.exists("new"))
+        hybrid.copy_in(b"x", "new")
+        calls = self.primary.exists_calls
+        self.assertTrue(hybrid.exists("new"))
+        self.assertEqual(self.primary.exists_calls, calls)
+
+    def test_server_side_copy_is_awaited_and_failures_counted(self):
+        statuses = {"b": ["pending", "pending", "success"], "c": ["pending", "failed"]}
+        self.primary.copy_status = lambda key: statuses[key].pop(0)
+        hybrid = HybridStorageProvider(self.primary, self.fallback, copy_poll_interval_s=0)
+        self.assertEqual(hybrid.copy_missing("b"), "copied")
+        self.assertEqual(statuses["b"], [])
+        self.assertTrue(hybrid.primary_has("b"))
+
+        hybrid.enqueue_copy("c")
+        hybrid.wait_for_copies()
+        hybrid.stop()
+        stats = hybrid.stats()
+        self.assertEqual((stats["copied"], stats["copy_errors"]), (0, 1))
+
+
+class TestMigrateMissingBlobs(unittest.TestCase):
+    def setUp(self):
+        self.Session = make_session_factory(FileObject)
+        db = self.Session()
+        for key in ("a", "b", "c", "gone"):
+            db.add(FileObject(provider="blob", container="cont", key=key))
+        db.add(FileObject(provider="local", container="local", key="local-only"))
+        db.commit()
+        db.close()
+        self.primary = FakeProvider("primary", {"a"})
+        self.hybrid = HybridStorageProvider(self.primary, FakeProvider("fallback", {"b", "c", "local-only"}))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.progress = os.path.join(self.tmp.name, "progress.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        dispose_session_factory(self.Session)
+
+    def test_copies_missing_and_resumes(self):
+        first = migrate_missing_blobs(
+            self.Session, self.hybrid, concurrency=2, batch_size=2, limit=2, progress_path=self.progress
+        )
+        self.assertEqual(first["scanned"], 2)
+        self.assertEqual(load_progress(self.progress)["last_id"], first["last_id"])
+
+        final = migrate_missing_blobs(self.Session, self.hybrid, concurrency=2, batch_size=2, progress_path=self.progress)
+        self.assertEqual(final["scanned"], 4)
+        self.assertEqual((final["exists"], final["copied"], final["missing"], final["errors"]), (1, 2, 1, 0))
+        self.assertEqual(sorted(self.primary.copied), ["b", "c"])
+
+    def test_failed_copies_are_retried_on_resume(self):
+        flaky = {"b"}
+        copy_in = self.primary.copy_in
+
+        def failing_copy_in(src, key):
+            if key in flaky:
+                raise OSError("connection reset")
+            copy_in(src, key)
+
+        self.primary.copy_in = failing_copy_in
+        first = migrate_missing_blobs(self.Session, self.hybrid, concurrency=2, batch_size=2, progress_path=self.progress)
+        self.assertEqual((first["scanned"], first["errors"], first["failed_keys"]), (4, 1, ["b"]))
+        self.assertEqual(load_progress(self.progress)["failed_keys"], ["b"])
+
+        flaky.clear()
+        final = migrate_missing_blobs(self.Session, self.hybrid, concurrency=2, batch_size=2, progress_path=self.progress)
+        self.assertEqual((final["scanned"], final["copied"], final["errors"], final["failed_keys"]), (4, 2, 0, []))
+        self.assertEqual(sorted(self.primary.copied), ["b", "c"])
+
+    def test_dry_run_copies_nothing(self):
+        result = migrate_missing_blobs(self.Session, self.hybrid, dry_run=True, progress_path=self.progress)
+        self.assertEqual(result["copied"], 3)
+        self.assertEqual(self.primary.copied, [])
+        self.assertFalse(os.path.exists(self.progress))
+
+
+if __name__ == "__main__":
+    unittest.main()
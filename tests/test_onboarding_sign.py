@@ -0,0 +1,114 @@
+"""Single-pass signing pipeline: overlays, certificate, flatten and hash in one save."""
+import hashlib
+import unittest
+from datetime import datetime, timezone
+
+import fitz
+
+from app.services.onboarding_sign import (
+    apply_template_field_overlays,
+    build_signed_pdf_from_template,
+    build_signed_pdf_with_certificate,
+)
+
+_NOW = datetime(2026, 8, 21, 18, 30, tzinfo=timezone.utc)
+_CERT = {
+    "document_name": "Offer letter",
+    "document_id": "doc-1",
+    "base_doc_hash": "hash",
+    "requested_by": "HR",
+    "requested_at": _NOW,
+    "acceptance_statement": "I agree.",
+    "signer_name": "Alice One",
+    "signer_email": "alice@example.com",
+    "signed_at": _NOW,
+    "ip_address": "127.0.0.1",
+    "user_agent": "Chrome",
+}
+
+
+def _base_pdf(with_widget=False) -> bytes:
+    doc = fitz.open()
+    doc.new_page(width=612, height=792)
+    page = doc.new_page(width=612, height=792)
+    # Cropped/offset MediaBox: overlay coordinates are raw PDF user space, like a ReportLab merge.
+    doc.xref_set_key(page.xref, "MediaBox", "[50 100 662 892]")
+    if with_widget:
+        widget = fitz.Widget()
+        widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+        widget.field_name = "name"
+        widget.rect = fitz.Rect(72, 72, 272, 92)
+        doc[0].add_widget(widget)
+    return doc.tobytes()
+
+
+def _png() -> bytes:
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 10), 1)
+    pix.clear_with(0)
+    return pix.tobytes("png")
+
+
+def _field(fid, ftype, page_index, x, y, w, h):
+    return {"id": fid, "type": ftype, "page_index": page_index, "rect": {"x": x, "y": y, "width": w, "height": h}}
+
+
+class TestSinglePassSigning(unittest.TestCase):
+    def test_fields_land_in_pdf_user_space(self):
+        fields = [
+            _field("t", "text", 0, 100, 200, 200, 20),
+            _field("o", "text", 1, 100, 200, 200, 20),
+            _field("s", "signature", 0, 100, 100, 200, 40),
+            _field("c", "checkbox", 0, 400, 400, 14, 14),
+        ]
+        values = {"t": "HELLO", "o": "OFFSET", "s": _png(), "c": True}
+        out = fitz.open(stream=apply_template_field_overlays(_base_pdf(), fields, values), filetype="pdf")
+
+        words = {w[4]: w for w in out[0].get_text("words")}
+        self.assertAlmostEqual(words["HELLO"][0], 102, delta=0.5)
+        self.assertAlmostEqual(words["HELLO"][3], 792 - 200, delta=3)
+        self.assertIn("4", words)  # ZapfDingbats check mark
+        # 40x10 image fitted into 200x40 keeps its aspect ratio and is centered.
+        self.assertEqual([tuple(round(v) for v in i["bbox"]) for i in out[0].get_image_info()],
+                         [(120, 652, 280, 692)])
+        offset = {w[4]: w for w in out[1].get_text("words")}["OFFSET"]
+        self.assertAlmostEqual(offset[0], 52, delta=0.5)
+
+    def test_long_single_line_is_truncated(self):
+        fields = [_field("t", "text", 0, 72, 72, 60, 14)]
+        out = fitz.open(stream=apply_template_field_overlays(_base_pdf(), fields, {"t": "x" * 200}), filetype="pdf")
+        text = out[0].get_text().strip()
+        self.assertTrue(text.endswith("..."))
+        self.assertEqual(len(text), int(60 / (9 * 0.45)))
+
+    def test_out_of_range_page_is_rejected(self):
+        with self.assertRaises(ValueError):
+            apply_template_field_overlays(_base_pdf(), [_field("t", "text", 5, 0, 0, 10, 10)], {"t": "x"})
+
+    def test_template_signing_appends_certificate_flattens_and_hashes(self):
+        fields = [_field("t", "text", 0, 100, 200, 200, 20)]
+        final, digest = build_signed_pdf_from_template(_base_pdf(with_widget=True), fields, {"t": "Alice"}, **_CERT)
+
+        self.assertEqual(digest, hashlib.sha256(final).hexdigest())
+        doc = fitz.open(stream=final, filetype="pdf")
+        self.assertEqual(doc.page_count, 3)
+        self.assertIn("Alice", doc[0].get_text())
+        self.assertEqual(list(doc[0].widgets()), [])
+        self.assertIn("Electronic Signature Certificate", doc[2].get_text())
+        self.assertIn("alice@example.com", doc[2].get_text())
+
+    def test_placement_signing_defaults_to_last_page(self):
+        final, digest = build_signed_pdf_with_certificate(
+            _base_pdf(),
+            _png(),
+            {"page_index": -1, "x": 100, "y": 300, "w": 150, "h": 50},
+            **_CERT,
+        )
+        doc = fitz.open(stream=final, filetype="pdf")
+        self.assertEqual(digest, hashlib.sha256(final).hexdigest())
+        self.assertIn("Signed by: Alice One", doc[1].get_text())
+        self.assertEqual(len(doc[1].get_image_info()), 1)
+        self.assertEqual(doc[0].get_image_info(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Tests for content-hashed PDF artifacts and the estimate PDF route that serves them."""
+import asyncio
+import json
+import tempfile
+import unittest
+import uuid
+from datetime import date, datetime
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import UploadFile
+
+from app.models.models import Estimate, EstimateItem, Material, Project
+from app.routes import estimate as estimate_routes
+from app.services import pdf_artifacts
+
+from db_helpers import close_session, make_session
+
+
+class _Form:
+    def __init__(self, items):
+        self._items = items
+
+    def multi_items(self):
+        return list(self._items)
+
+
+class TestPdfArtifacts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._dir = patch.object(pdf_artifacts, "PDF_ARTIFACT_CACHE_DIR", Path(self.tmp.name))
+        self._dir.start()
+
+    def tearDown(self):
+        self._dir.stop()
+        self.tmp.cleanup()
+
+    def test_content_key_is_canonical(self):
+        pid = uuid.uuid4()
+        a = {"b": [1, 2.5], "a": {"when": date(2026, 3, 1), "id": pid}, 3: b"raw"}
+        b = {3: b"raw", "a": {"id": str(pid), "when": "2026-03-01"}, "b": (1, 2.5)}
+        self.assertEqual(pdf_artifacts.content_key("estimate", a), pdf_artifacts.content_key("estimate", b))
+        self.assertNotEqual(pdf_artifacts.content_key("estimate", a), pdf_artifacts.content_key("quote", a))
+        self.assertNotEqual(
+            pdf_artifacts.content_key("estimate", a), pdf_artifacts.content_key("estimate", {**a, "b": [1, 2.6]})
+        )
+        current = pdf_artifacts.content_key("estimate", a)
+        with patch.dict(pdf_artifacts.TEMPLATE_VERSION, {"estimate": 99}):
+            self.assertNotEqual(pdf_artifacts.content_key("estimate", a), current)
+
+    def test_render_bytes_reuses_until_refresh(self):
+        calls = []
+
+        def render():
+            calls.append(1)
+            return b"%PDF-" + str(len(calls)).encode()
+
+        data = {"inspection_id": "x", "first_finalized_at": datetime(2026, 3, 1, 8)}
+        self.assertEqual(pdf_artifacts.render_bytes("safety_inspection", data, render), b"%PDF-1")
+        self.assertEqual(pdf_artifacts.render_bytes("safety_inspection", data, render), b"%PDF-1")
+        self.assertEqual(pdf_artifacts.render_bytes("safety_inspection", data, render, refresh=True), b"%PDF-2")
+        self.assertEqual(pdf_artifacts.render_bytes("safety_inspection", data, render), b"%PDF-2")
+        self.assertEqual(len(calls), 2)
+
+    def test_form_fingerprint_hashes_uploads_and_rewinds(self):
+        upload = UploadFile(file=BytesIO(b"cover-bytes"), filename="IMG_0001.jpg")
+        renamed = UploadFile(file=BytesIO(b"cover-bytes"), filename="other.jpg")
+        first = asyncio.run(pdf_artifacts.form_fingerprint(_Form([("cover_title", "Q"), ("cover_image", upload)])))
+        second = asyncio.run(pdf_artifacts.form_fingerprint(_Form([("cover_title", "Q"), ("cover_image", renamed)])))
+        self.assertEqual(first, second)
+        self.assertEqual(upload.file.read(), b"cover-bytes")
+
+    def test_eviction_drops_least_recently_used(self):
+        with patch.object(pdf_artifacts, "PDF_ARTIFACT_CACHE_MAX_FILES", 10):
+            for i in range(12):
+                pdf_artifacts.store_bytes("quote", f"k{i}", b"%PDF")
+        remaining = sorted(p.stem for p in Path(self.tmp.name, "quote").glob("*.pdf"))
+        self.assertLess(len(remaining), 12)
+        self.assertIn("k11", remaining)
+
+
+class TestEstimatePdfRoute(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._dir = patch.object(pdf_artifacts, "PDF_ARTIFACT_CACHE_DIR", Path(self.tmp.name))
+        self._dir.start()
+        self.db = make_session(Project, Material, Estimate, EstimateItem)
+        project = Project(id=uuid.uuid4(), code="P-1", name="Roof", client_id=uuid.uuid4(), address_city="Surrey")
+        self.db.add(project)
+        self.estimate = Estimate(id=1, project_id=project.id, created_at=datetime(2026, 3, 1), notes=json.dumps({"pst_rate": 7}))
+        self.db.add(self.estimate)
+        self.db.add(EstimateItem(estimate_id=1, quantity=2, unit_price=10.0, section="Roofing", description="Shingles"))
+        self.db.commit()
+        self.renders = []
+
+    def tearDown(self):
+        close_session(self.db)
+        self._dir.stop()
+        self.tmp.cleanup()
+
+    async def _fake_render(self, data, output_path):
+        self.renders.append(data)
+        with open(output_path, "wb") as fh:
+            fh.write(b"%PDF-1.4 estimate " + str(len(self.renders)).encode())
+
+    def _get(self):
+        with patch("app.proposals.pdf_estimate.generate_estimate_pdf", self._fake_render):
+            return asyncio.run(estimate_routes.generate_estimate_pdf(estimate_id=1, db=self.db, _=None))
+
+    def test_unchanged_estimate_served_from_artifact(self):
+        first = self._get()
+        second = self._get()
+        self.assertEqual(len(self.renders), 1)
+        self.assertEqual((first.headers["x-pdf-cache"], second.headers["x-pdf-cache"]), ("miss", "hit"))
+        self.assertEqual(first.headers["etag"], second.headers["etag"])
+        self.assertEqual(Path(second.path).read_bytes(), b"%PDF-1.4 estimate 1")
+        self.assertEqual(self.renders[0]["total"], 20.0)
+
+        self.estimate.notes = json.dumps({"pst_rate": 7, "profit_rate": 10})
+        self.db.commit()
+        third = self._get()
+        self.assertEqual(len(self.renders), 2)
+        self.assertEqual(third.headers["x-pdf-cache"], "miss")
+        self.assertNotEqual(third.headers["etag"], first.headers["etag"])
+
+
+if __name__ == "__main__":
+    unittest.main()
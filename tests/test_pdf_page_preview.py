@@ -0,0 +1,116 @@
+"""Tests for cached PDF page previews, sprites and the bounded render pool."""
+import json
+import tempfile
+import threading
+import unittest
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+import fitz
+from fastapi import HTTPException
+
+from app.services import pdf_page_preview as preview
+
+
+def _pdf(pages=3) -> bytes:
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=200, height=100 + 50 * i)
+        page.insert_text((20, 40), f"Page {i + 1}")
+    return doc.tobytes()
+
+
+class _Loader:
+    def __init__(self, data: bytes, gate: threading.Event = None):
+        self.data = data
+        self.gate = gate
+        self.calls = 0
+
+    def __call__(self) -> bytes:
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        return self.data
+
+
+class TestPdfPagePreview(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = patch.object(preview, "PDF_PREVIEW_CACHE_DIR", Path(tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.file_id = uuid.uuid4()
+
+    def test_page_is_rendered_once_then_served_from_cache(self):
+        loader = _Loader(_pdf())
+        first = preview.cached_pdf_page_png(self.file_id, 123, 1, 100, loader)
+        again = preview.cached_pdf_page_png(self.file_id, 123, 1, 100, loader)
+        self.assertEqual(first, again)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(fitz.Pixmap(first).width, 100)
+        # A replaced file (new size) or another width is a different entry.
+        preview.cached_pdf_page_png(self.file_id, 456, 1, 100, loader)
+        preview.cached_pdf_page_png(self.file_id, 123, 1, 120, loader)
+        self.assertEqual(loader.calls, 3)
+
+    def test_missing_page_is_404(self):
+        with self.assertRaises(HTTPException) as ctx:
+            preview.cached_pdf_page_png(self.file_id, 1, 9, 100, _Loader(_pdf()))
+        self.assertEqual(ctx.exception.status_code, 404)
+
+    def test_sprite_stacks_pages_with_layout(self):
+        loader = _Loader(_pdf(3))
+        png, layout = preview.cached_pdf_sprite(self.file_id, 1, 0, 50, 100, loader)
+        self.assertEqual(layout["page_count"], 3)
+        self.assertEqual([p["page"] for p in layout["pages"]], [0, 1, 2])
+        self.assertEqual([p["y"] for p in layout["pages"]], [0, 50, 125])
+        self.assertEqual(layout["height"], 225)
+        sprite = fitz.Pixmap(png)
+        self.assertEqual((sprite.width, sprite.height), (100, 225))
+
+        png2, layout2 = preview.cached_pdf_sprite(self.file_id, 1, 0, 50, 100, loader)
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual((png2, layout2), (png, json.loads(json.dumps(layout))))
+
+    def test_identical_concurrent_requests_share_one_render(self):
+        gate = threading.Event()
+        loader = _Loader(_pdf(), gate=gate)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(preview.cached_pdf_page_png(self.file_id, 1, 0, 100, loader))
+            )
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        gate.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(loader.calls, 1)
+
+    def test_pool_rejects_work_beyond_pending_limit(self):
+        pool = preview._RenderPool(workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        gate = threading.Event()
+        started = threading.Thread(target=lambda: pool.run("a", lambda: gate.wait(5)))
+        started.start()
+        try:
+            for _ in range(500):
+                if "a" in pool._inflight:
+                    break
+                threading.Event().wait(0.01)
+            with self.assertRaises(HTTPException) as ctx:
+                pool.run("b", lambda: None, timeout=1)
+            self.assertEqual(ctx.exception.status_code, 503)
+        finally:
+            gate.set()
+            started.join(5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Tests for the shared PDF resource registry."""
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+from app.proposals import pdf_resources
+
+
+def _png_bytes(color, size=(64, 64), mode="RGBA"):
+    buf = io.BytesIO()
+    Image.new(mode, size, color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class TestPdfResources(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        self.png_path = os.path.join(self.tmp.name, "page_template.png")
+        with open(self.png_path, "wb") as fh:
+            fh.write(_png_bytes((200, 0, 0, 128), size=(120, 170)))
+        self._patches = [
+            patch.object(pdf_resources, "BG_CACHE_DIR", self.cache_dir),
+            patch.object(pdf_resources, "_bg_readers", {}),
+            patch.object(pdf_resources, "_asset_readers", {}),
+            patch.object(pdf_resources, "_keyed_readers", type(pdf_resources._keyed_readers)()),
+            patch.object(pdf_resources, "_keyed_readers_size", 0),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self._patches):
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_fonts_register_once_and_fall_back(self):
+        self.assertTrue(pdf_resources.register_font("Montserrat"))
+        self.assertEqual(pdf_resources.font_name("Montserrat-Bold", "Helvetica-Bold"), "Montserrat-Bold")
+        self.assertEqual(pdf_resources.font_name("OpenSans", "Helvetica"), "Helvetica")
+        with patch.object(pdf_resources, "TTFont") as ttfont:
+            self.assertTrue(pdf_resources.register_font("Montserrat"))
+        ttfont.assert_not_called()
+
+    def test_background_converted_once_and_shared(self):
+        reader = pdf_resources.background_reader(self.png_path)
+        self.assertIs(pdf_resources.background_reader(self.png_path), reader)
+        cached = os.listdir(self.cache_dir)
+        self.assertEqual(len(cached), 1)
+        self.assertTrue(cached[0].startswith("page_template_") and cached[0].endswith(".jpg"))
+        # Each JPEG embed reads from its own handle, so concurrent builds do not share a file position.
+        self.assertIsNot(reader.jpeg_fh(), reader.jpeg_fh())
+        for _ in range(2):
+            c = canvas.Canvas(io.BytesIO())
+            c.drawImage(reader, 0, 0, width=100, height=140)
+            c.save()
+
+    def test_asset_reader_downscales(self):
+        reader = pdf_resources.asset_reader(self.png_path, max_dim=50)
+        self.assertEqual(max(reader.getSize()), 50)
+        self.assertIs(pdf_resources.asset_reader(self.png_path, max_dim=50), reader)
+        self.assertEqual(pdf_resources.asset_reader(self.png_path, max_dim=None).getSize(), (120, 170))
+
+    def test_uploaded_images_shared_by_content_and_bounded(self):
+        first = _png_bytes((0, 0, 255, 255))
+        reader = pdf_resources.image_reader_for_bytes(first)
+        self.assertIs(pdf_resources.image_reader_for_bytes(bytes(first)), reader)
+        loads = []
+        self.assertIsNone(pdf_resources.cached_image_reader("missing", lambda: loads.append(1)))
+        self.assertIsNone(pdf_resources.cached_image_reader("missing", lambda: loads.append(1)))
+        self.assertEqual(len(loads), 2)  # misses are not cached
+
+        with patch.object(pdf_resources.settings, "pdf_resource_cache_max_mb", 0):
+            pdf_resources.image_reader_for_bytes(_png_bytes((0, 255, 0, 255)))
+        usage = pdf_resources.memory_usage()
+        self.assertEqual((usage["uploaded_images"], usage["uploaded_image_bytes"]), (0, 0))
+
+    def test_qr_codes_memoized(self):
+        png = pdf_resources.qr_code_png("CERT-1", 64)
+        self.assertIs(pdf_resources.qr_code_png("CERT-1", 64), png)
+        self.assertEqual(Image.open(io.BytesIO(png)).size, (64, 64))
+
+
+if __name__ == "__main__":
+    unittest.main()
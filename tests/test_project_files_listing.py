@@ -0,0 +1,114 @@
+"""Tests for the project Files tab listing."""
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException, Response
+
+from app.auth.security import allowed_project_file_categories, project_file_category_allowed
+from app.models.models import ClientFile, FileObject, Project
+from app.routes import projects as projects_routes
+
+from db_helpers import close_session, make_session
+
+
+def _user(perms=None, admin=False):
+    role = MagicMock()
+    role.name = "admin" if admin else "staff"
+    role.permissions = perms or {}
+    user = MagicMock()
+    user.roles = [role]
+    user.permissions_override = None
+    return user
+
+
+class TestCategoryPrecompute(unittest.TestCase):
+    def test_admin_and_missing_config_allow_all(self):
+        self.assertIsNone(allowed_project_file_categories(_user(admin=True)))
+        self.assertTrue(project_file_category_allowed("anything", None))
+
+    def test_allow_list_is_case_insensitive_with_legacy_overlap(self):
+        user = _user({
+            "business:construction:projects:files:read": True,
+            "business:construction:projects:files:categories:read": ["Pictures", "uncategorized"],
+        })
+        with patch("app.auth.security._has_permission", return_value=True):
+            allowed = allowed_project_file_categories(user)
+        self.assertTrue(project_file_category_allowed("Photos", allowed))
+        self.assertTrue(project_file_category_allowed(None, allowed))
+        self.assertTrue(project_file_category_allowed("  ", allowed))
+        self.assertFalse(project_file_category_allowed("contracts", allowed))
+        self.assertFalse(project_file_category_allowed("contracts", frozenset()))
+
+
+@patch.object(projects_routes, "_assert_project_line_read", lambda user, proj: None)
+class TestListProjectFiles(unittest.TestCase):
+    def setUp(self):
+        self.db = make_session(Project, FileObject, ClientFile)
+        self.client_id = uuid.uuid4()
+        self.project = Project(id=uuid.uuid4(), code="P-1", name="P", client_id=self.client_id)
+        other = Project(id=uuid.uuid4(), code="P-2", name="Other", client_id=self.client_id)
+        self.db.add_all([self.project, other])
+        self.folder_id = uuid.uuid4()
+        base = datetime(2026, 1, 1)
+        specs = [
+            (self.project.id, "photos", None, "a.jpg", None),
+            (self.project.id, "contracts", self.folder_id, "b.pdf", None),
+            (self.project.id, None, None, "c.txt", None),
+            (self.project.id, "document-creator-edited", None, "d.png", None),
+            (self.project.id, "photos", None, "gone.jpg", base),
+            (other.id, "photos", None, "other.jpg", None),
+        ]
+        for i, (pid, cat, folder, name, deleted_at) in enumerate(specs):
+            fo = FileObject(id=uuid.uuid4(), provider="local", container="c", key=name, project_id=pid,
+                            content_type="image/jpeg" if name.endswith(".jpg") else None)
+            cf = ClientFile(id=uuid.uuid4(), client_id=self.client_id, file_object_id=fo.id, category=cat,
+                            folder_id=folder, original_name=name, uploaded_at=base + timedelta(minutes=i),
+                            deleted_at=deleted_at)
+            self.db.add_all([fo, cf])
+        self.db.commit()
+
+    def tearDown(self):
+        close_session(self.db)
+
+    def _list(self, user=None, **kw):
+        kw.setdefault("folder_id", None)
+        kw.setdefault("limit", None)
+        kw.setdefault("offset", 0)
+        response = Response()
+        out = projects_routes.list_project_files(
+            self.project.id, response, db=self.db, user=user or _user(admin=True), **kw
+        )
+        return [f["original_name"] for f in out], response
+
+    def test_only_live_files_of_this_project_newest_first(self):
+        names, _ = self._list()
+        self.assertEqual(names, ["d.png", "c.txt", "b.pdf", "a.jpg"])
+
+    def test_categories_filtered_in_sql(self):
+        user = _user()
+        with patch.object(projects_routes, "allowed_project_file_categories", return_value=frozenset({"photos", "pictures", "uncategorized"})), \
+                patch.object(projects_routes, "_has_project_feature_permission", return_value=False):
+            names, _ = self._list(user)
+        self.assertEqual(names, ["c.txt", "a.jpg"])
+        with patch.object(projects_routes, "allowed_project_file_categories", return_value=frozenset()), \
+                patch.object(projects_routes, "_has_project_feature_permission", return_value=True):
+            names, _ = self._list(user)
+        self.assertEqual(names, ["d.png"])
+
+    def test_folder_scope_and_pagination(self):
+        self.assertEqual(self._list(folder_id=str(self.folder_id))[0], ["b.pdf"])
+        self.assertEqual(self._list(folder_id="root")[0], ["d.png", "c.txt", "a.jpg"])
+        names, response = self._list(limit=3)
+        self.assertEqual(names, ["d.png", "c.txt", "b.pdf"])
+        self.assertEqual(response.headers["X-Has-More"], "true")
+        names, response = self._list(limit=3, offset=int(response.headers["X-Next-Offset"]))
+        self.assertEqual(names, ["a.jpg"])
+        self.assertEqual(response.headers["X-Has-More"], "false")
+        with self.assertRaises(HTTPException):
+            self._list(folder_id="nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ import unittest
 import uuid
 from unittest.mock import MagicMock, patch
 
+from app.models.models import Client, ClientSite, EmployeeProfile, Project, SettingItem, SettingList, User
 from app.services.map_address_format import format_map_address
 from app.services.project_geocoding_service import is_valid_coordinate
 from app.services.project_list_filters import (
@@ -10,7 +11,15 @@ from app.services.project_list_filters import (
     apply_bounding_box_filter,
     filters_from_query_params,
 )
-from app.services.project_map_service import _format_map_address, get_project_map_points
+from app.services.project_map_service import (
+    _format_map_address,
+    get_project_map_points,
+    map_points_response,
+    parse_tile,
+    tile_bounds,
+)
+
+from db_helpers import close_session, make_session
 
 
 class _ProjectStub:
@@ -106,54 +115,51 @@ class TestMapAddressFormat(unittest.TestCase):
 
 
 class TestMapPointsService(unittest.TestCase):
-    @patch("app.services.project_map_service.build_business_projects_query")
-    def test_opportunities_is_bidding_flag(self, mock_build):
-        p1 = _ProjectStub(lat=49.28, lng=-123.12, is_bidding=True)
-        mock_query = MagicMock()
-        mock_query.all.return_value = [p1]
-        mock_build.return_value = mock_query
-
-        db = MagicMock()
-        user = MagicMock()
-        get_project_map_points(
-            db, user, "construction", BusinessProjectListFilters(), is_bidding=True,
-        )
-
-        mock_build.assert_called_once()
-        self.assertEqual(mock_build.call_args.kwargs.get("is_bidding"), True)
-
-    @patch("app.services.project_map_service.build_business_projects_query")
-    def test_mapped_and_unmapped_counts(self, mock_build):
-        p1 = _ProjectStub(lat=49.28, lng=-123.12)
-        p2 = _ProjectStub(lat=None, lng=None)
-        mock_query = MagicMock()
-        mock_query.all.return_value = [p1, p2]
-        mock_build.return_value = mock_query
-
-        db = MagicMock()
-        user = MagicMock()
-        result = get_project_map_points(db, user, "construction", BusinessProjectListFilters())
-
-        self.assertEqual(result["total_matching"], 2)
+    def setUp(self):
+        self.db = make_session(User, EmployeeProfile, Project, Client, ClientSite, SettingList, SettingItem)
+        self.user = MagicMock()
+
+    def tearDown(self):
+        close_session(self.db)
+
+    def _add(self, lat, lng, **kw):
+        p = Project(name=kw.pop("name", "Test"), code=f"MK-{uuid.uuid4().hex[:8]}", lat=lat, lng=lng, **kw)
+        self.db.add(p)
+        self.db.commit()
+        return p
+
+    def _build(self, db, user, business_line, filters, *, is_bidding=False):
+        return self.db.query(Project).filter(Project.is_bidding == is_bidding, Project.deleted_at.is_(None))
+
+    def _points(self, **kw):
+        with patch("app.services.project_map_service.build_business_projects_query", side_effect=self._build) as mock_build:
+            result = get_project_map_points(self.db, self.user, "construction", BusinessProjectListFilters(), **kw)
+        self.mock_build = mock_build
+        return result
+
+    def test_opportunities_is_bidding_flag(self):
+        self._add(49.28, -123.12, is_bidding=True)
+        result = self._points(is_bidding=True)
+        self.assertEqual(self.mock_build.call_args.kwargs.get("is_bidding"), True)
+        self.assertEqual(result["total_matching"], 1)
+
+    def test_mapped_and_unmapped_counts(self):
+        self._add(49.28, -123.12)
+        self._add(None, None)
+        self._add(0, 0)
+        result = self._points()
+
+        self.assertEqual(result["total_matching"], 3)
         self.assertEqual(result["mapped_count"], 1)
-        self.assertEqual(result["unmapped_count"], 1)
+        self.assertEqual(result["unmapped_count"], 2)
         self.assertEqual(len(result["items"]), 1)
         self.assertEqual(result["items"][0]["latitude"], 49.28)
 
     @patch("app.services.project_map_service._load_users_map")
-    @patch("app.services.project_map_service.build_business_projects_query")
-    def test_admin_avatar_in_payload(self, mock_build, mock_users):
+    def test_admin_avatar_in_payload(self, mock_users):
         admin_id = uuid.uuid4()
         estimator_id = uuid.uuid4()
-        p1 = _ProjectStub(
-            lat=49.28,
-            lng=-123.12,
-            project_admin_id=admin_id,
-        )
-        p1.estimator_id = estimator_id
-        mock_query = MagicMock()
-        mock_query.all.return_value = [p1]
-        mock_build.return_value = mock_query
+        self._add(49.28, -123.12, project_admin_id=admin_id, estimator_id=estimator_id, status_label="Finished")
         mock_users.return_value = {
             str(admin_id): {
                 "id": str(admin_id),
@@ -167,9 +173,7 @@ class TestMapPointsService(unittest.TestCase):
             },
         }
 
-        db = MagicMock()
-        user = MagicMock()
-        result = get_project_map_points(db, user, "construction", BusinessProjectListFilters())
+        result = self._points()
 
         admin = result["items"][0]["project_admin"]
         estimator = result["items"][0]["estimator"]
@@ -187,6 +191,43 @@ class TestMapPointsService(unittest.TestCase):
         self.assertEqual(result["items"], [])
         self.assertEqual(result["total_matching"], 0)
 
+    @patch("app.services.project_map_service.LEAF_MAX_POINTS", 2)
+    def test_low_zoom_clusters_dense_cells(self):
+        for i in range(3):
+            self._add(49.2800 + i * 0.0001, -123.1200)
+        lone = self._add(43.65, -79.38, name="Toronto")
+        self.assertIsNotNone(lone.geohash)
+
+        result = self._points(north=60, south=40, east=-70, west=-130, zoom=5)
+        self.assertEqual(result["mode"], "clusters")
+        self.assertEqual([c["count"] for c in result["clusters"]], [3])
+        self.assertAlmostEqual(result["clusters"][0]["latitude"], 49.2801, places=4)
+        self.assertEqual([i["name"] for i in result["items"]], ["Toronto"])
+
+        zoomed = self._points(north=49.29, south=49.27, east=-123.11, west=-123.13, zoom=16)
+        self.assertEqual(zoomed["mode"], "points")
+        self.assertEqual(len(zoomed["items"]), 3)
+
+    def test_tile_maps_to_viewport(self):
+        self.assertEqual(parse_tile("2/1/1"), (2, 1, 1))
+        self.assertIsNone(parse_tile("2/4/0"))
+        bounds = tile_bounds(1, 0, 0)
+        self.assertEqual((bounds["west"], bounds["east"], bounds["south"]), (-180.0, 0.0, 0.0))
+        self._add(49.28, -123.12)
+        self.assertEqual(len(self._points(tile="1/0/0")["items"]), 1)
+        self.assertEqual(len(self._points(tile="1/1/0")["items"]), 0)
+
+
+class TestMapPointsResponse(unittest.TestCase):
+    def test_etag_round_trip(self):
+        request = MagicMock()
+        request.headers = {}
+        first = map_points_response(request, {"items": [], "total_matching": 0})
+        etag = first.headers["etag"]
+        request.headers = {"if-none-match": etag}
+        self.assertEqual(map_points_response(request, {"items": [], "total_matching": 0}).status_code, 304)
+        self.assertEqual(map_points_response(request, {"items": [], "total_matching": 1}).status_code, 200)
+
 
 if __name__ == "__main__":
     unittest.main()
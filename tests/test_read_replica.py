@@ -0,0 +1,87 @@
+"""Tests for read-replica routing (get_read_db) with two SQLite files standing in for primary and replica."""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app import db as app_db
+from app.models.models import Client
+
+
+class TestReadReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.primary = app_db._create_engine("sqlite:///" + os.path.join(self.tmp.name, "primary.db"), 2, 2)
+        self.replica = app_db._create_engine("sqlite:///" + os.path.join(self.tmp.name, "replica.db"), 2, 2)
+        for eng, name in ((self.primary, "primary"), (self.replica, "replica")):
+            with eng.begin() as conn:
+                conn.execute(text("CREATE TABLE marker (name TEXT)"))
+                conn.execute(text("INSERT INTO marker VALUES (:n)"), {"n": name})
+        read_only = {"autoflush": False, "future": True, "info": {"read_only": True}}
+        self._patches = [
+            patch.object(app_db, "engine", self.primary),
+            patch.object(app_db, "read_engine", self.replica),
+            patch.object(app_db, "ReadSessionLocal", sessionmaker(bind=self.replica, **read_only)),
+            patch.object(app_db, "PrimaryReadSessionLocal", sessionmaker(bind=self.primary, **read_only)),
+            patch.object(
+                app_db, "_replica_state", {"checked_at": None, "healthy": False, "lag_seconds": None, "error": None}
+            ),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self._patches):
+            p.stop()
+        self.primary.dispose()
+        self.replica.dispose()
+        self.tmp.cleanup()
+
+    def _read_marker(self):
+        gen = app_db.get_read_db()
+        session = next(gen)
+        try:
+            return session.execute(text("SELECT name FROM marker")).scalar()
+        finally:
+            gen.close()
+
+    def test_reads_go_to_healthy_replica(self):
+        self.assertEqual(self._read_marker(), "replica")
+        stats = app_db.pool_stats()
+        self.assertTrue(stats["replica"]["healthy"])
+        self.assertEqual(stats["replica"]["lag_seconds"], 0.0)
+        self.assertIn("checkedout", stats["primary"])
+
+    def test_lagging_or_failing_replica_falls_back_to_primary(self):
+        with patch.object(app_db, "replica_lag_seconds", return_value=120.0):
+            self.assertEqual(self._read_marker(), "primary")
+        self.assertEqual(app_db.pool_stats()["replica"]["lag_seconds"], 120.0)
+
+        # The last answer is reused until the check interval passes.
+        self.assertEqual(self._read_marker(), "primary")
+        with patch.object(app_db.settings, "read_replica_check_interval_seconds", 0):
+            self.assertEqual(self._read_marker(), "replica")
+            with patch.object(app_db, "replica_lag_seconds", side_effect=RuntimeError("replica down")):
+                self.assertEqual(self._read_marker(), "primary")
+        self.assertEqual(app_db.pool_stats()["replica"]["error"], "replica down")
+
+    def test_no_replica_configured_reads_primary(self):
+        with patch.object(app_db, "read_engine", None), patch.object(app_db, "ReadSessionLocal", None):
+            self.assertEqual(self._read_marker(), "primary")
+            self.assertIsNone(app_db.pool_stats()["replica"])
+
+    def test_read_session_rejects_writes(self):
+        session = app_db.read_session()
+        try:
+            session.add(Client(name="Acme"))
+            with self.assertRaises(RuntimeError):
+                session.flush()
+        finally:
+            session.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Tests for the materialized review cycle progress rows and the routes reading them."""
+import unittest
+import uuid
+from datetime import datetime, timezone
+
+from app.models.models import (
+    EmployeeProfile,
+    FormTemplate,
+    ReviewAssignment,
+    ReviewCycle,
+    ReviewCycleProgress,
+    User,
+)
+from app.routes.reviews import _build_director_meeting_board, compare_cycle_progress, cycle_hr_status, open_cycles_summary
+from app.services.review_progress import ensure_cycle_progress
+
+from db_helpers import close_session, make_session
+
+
+class TestReviewCycleProgress(unittest.TestCase):
+    def setUp(self):
+        self.db = make_session(
+            User, EmployeeProfile, FormTemplate, ReviewCycle, ReviewAssignment, ReviewCycleProgress
+        )
+        self.boss, self.amy, self.bob = (
+            User(username=n, email_personal=f"{n}@example.com", password_hash="x") for n in ("boss", "amy", "bob")
+        )
+        self.db.add_all([self.boss, self.amy, self.bob])
+        form = FormTemplate(name="Review", category="employee_review", definition={})
+        self.db.add(form)
+        self.db.flush()
+        self.cycle = ReviewCycle(
+            name="2026",
+            form_template_id=form.id,
+            status="active",
+            participant_scope={"mode": "explicit", "user_ids": [str(self.amy.id), str(self.bob.id)]},
+        )
+        self.db.add(self.cycle)
+        self.db.flush()
+        self.amy_self = self._assign(self.amy, self.amy)
+        self.amy_boss = self._assign(self.amy, self.boss)
+        self.bob_self = self._assign(self.bob, self.bob)
+        self.db.commit()
+        ensure_cycle_progress(self.db, [self.cycle])
+
+    def tearDown(self):
+        close_session(self.db)
+
+    def _assign(self, reviewee, reviewer, cycle=None):
+        a = ReviewAssignment(
+            id=uuid.uuid4(),
+            cycle_id=(cycle or self.cycle).id,
+            reviewee_user_id=reviewee.id,
+            reviewer_user_id=reviewer.id,
+            status="pending",
+            due_date=datetime(2026, 11, 1, tzinfo=timezone.utc),
+        )
+        self.db.add(a)
+        return a
+
+    def _row(self, user, cycle=None):
+        self.db.expire_all()
+        return self.db.get(ReviewCycleProgress, ((cycle or self.cycle).id, user.id))
+
+    def test_submit_updates_row_in_same_commit(self):
+        self.assertFalse(self._row(self.amy).both_done)
+        self.amy_self.status = "submitted"
+        self.db.commit()
+        row = self._row(self.amy)
+        self.assertTrue(row.employee_self_done)
+        self.assertFalse(row.both_done)
+        self.amy_boss.status = "submitted"
+        self.db.commit()
+        self.assertTrue(self._row(self.amy).both_done)
+        # Bob has no supervisor task: his self review alone completes him.
+        self.bob_self.status = "submitted"
+        self.db.commit()
+        self.assertTrue(self._row(self.bob).both_done)
+
+    def test_rollback_discards_pending_refresh(self):
+        self.amy_self.status = "submitted"
+        self.db.flush()
+        self.db.rollback()
+        self.assertFalse(self._row(self.amy).employee_self_done)
+
+    def test_schedule_change_refreshes_meeting_columns(self):
+        self.cycle.director_1on1_slot_config = {"duration_minutes": 45, "windows": []}
+        self.cycle.director_1on1_schedule = {str(self.amy.id): {"scheduled_at": "2026-11-02T15:00:00Z"}}
+        self.db.commit()
+        row = self._row(self.amy)
+        self.assertEqual(row.meeting_scheduled_at, "2026-11-02T15:00:00Z")
+        self.assertEqual(row.meeting_scheduled_until, "2026-11-02T15:45:00Z")
+
+        board = _build_director_meeting_board(self.cycle, self.db)
+        self.assertEqual(board["duration_minutes"], 45)
+
+        self.cycle.director_1on1_schedule = {}
+        self.db.commit()
+        self.assertIsNone(self._row(self.amy).meeting_scheduled_at)
+
+    def test_hr_status_reads_rows(self):
+        self.amy_self.status = "submitted"
+        self.db.commit()
+        rows = {r["display_name"]: r for r in cycle_hr_status(str(self.cycle.id), db=self.db)}
+        self.assertEqual(sorted(rows), ["amy", "bob"])
+        amy = rows["amy"]
+        self.assertTrue(amy["employee_self_done"])
+        self.assertTrue(amy["missing_supervisor"])
+        self.assertEqual(amy["supervisor_user_id"], str(self.boss.id))
+        self.assertEqual(amy["supervisor_display_name"], "boss")
+        self.assertEqual(amy["self_assignment_id"], str(self.amy_self.id))
+        self.assertFalse(rows["bob"]["missing_supervisor"])
+        self.assertTrue(rows["bob"]["missing_employee"])
+
+    def test_scope_change_rebuilds_membership(self):
+        self.cycle.participant_scope = {"mode": "explicit", "user_ids": [str(self.boss.id)]}
+        self.db.commit()
+        self.assertTrue(self._row(self.boss).in_scope)
+        # Amy keeps her row (she has assignments) but is no longer in scope.
+        self.assertFalse(self._row(self.amy).in_scope)
+
+    def test_open_summary_and_compare(self):
+        form_id = self.cycle.form_template_id
+        closed = ReviewCycle(name="2025", form_template_id=form_id, status="closed")
+        older = ReviewCycle(
+            name="2025b",
+            form_template_id=form_id,
+            status="active",
+            participant_scope={"mode": "explicit", "user_ids": [str(self.amy.id)]},
+        )
+        self.db.add_all([closed, older])
+        self.db.flush()
+        self._assign(self.amy, self.amy, cycle=older).status = "submitted"
+        self.amy_self.status = "submitted"
+        self.cycle.director_1on1_schedule = {str(self.bob.id): {"scheduled_at": "2026-11-02T15:00:00Z"}}
+        self.db.commit()
+
+        summary = {r["name"]: r for r in open_cycles_summary(db=self.db)}
+        self.assertEqual(sorted(summary), ["2025b", "2026"])
+        cur = summary["2026"]
+        self.assertEqual(
+            (cur["reviewees"], cur["employee_self_done"], cur["missing_employee"], cur["missing_supervisor"]),
+            (2, 1, 1, 1),
+        )
+        self.assertEqual(cur["meetings_scheduled"], 1)
+        self.assertEqual(summary["2025b"]["both_done"], 1)
+
+        out = compare_cycle_progress(f"{self.cycle.id},{older.id}", user_id=str(self.amy.id), db=self.db)
+        self.assertEqual([c["name"] for c in out["cycles"]], ["2026", "2025b"])
+        (amy,) = out["reviewees"]
+        self.assertFalse(amy["cycles"][str(self.cycle.id)]["both_done"])
+        self.assertTrue(amy["cycles"][str(older.id)]["both_done"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Tests for chunked storage writes and the async storage facade."""
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import anyio
+
+from app.storage import aio, provider as provider_mod
+from app.storage.aio import as_async
+from app.storage.blob_provider import _BlockBlobWriter
+from app.storage.local_provider import LocalStorageProvider
+from app.storage.provider import ChunkWriter, StorageProvider, UploadTooLarge
+
+
+class RecordingWriter(ChunkWriter):
+    max_parallel = 3
+
+    def __init__(self):
+        self.blocks = {}
+        self.committed = None
+        self.whole = None
+        self.aborted = False
+        self._lock = threading.Lock()
+
+    def write_block(self, index, data):
+        with self._lock:
+            self.blocks[index] = data
+
+    def write_whole(self, data):
+        self.whole = data
+
+    def commit(self, block_count):
+        self.committed = b"".join(self.blocks[i] for i in range(block_count))
+
+    def abort(self):
+        self.aborted = True
+
+
+class RecordingProvider(StorageProvider):
+    def __init__(self):
+        self.writers = []
+
+    def open_writer(self, key, content_type=None):
+        writer = RecordingWriter()
+        self.writers.append(writer)
+        return writer
+
+
+async def _source(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@mock.patch.object(aio, "CHUNK_SIZE", 4)
+@mock.patch.object(provider_mod, "CHUNK_SIZE", 4)
+class TestChunkedWrites(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.local = LocalStorageProvider(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_async_put_stages_blocks_in_order(self):
+        target = RecordingProvider()
+        size = anyio.run(as_async(target).put, "k", _source(b"abc", b"defghij", b"kl"))
+        self.assertEqual(size, 12)
+        writer = target.writers[0]
+        self.assertEqual(writer.committed, b"abcdefghijkl")
+        self.assertEqual(sorted(writer.blocks), [0, 1, 2])
+
+    def test_small_upload_is_single_shot(self):
+        target = RecordingProvider()
+        anyio.run(as_async(target).put, "k", b"abc")
+        self.assertEqual(target.writers[0].whole, b"abc")
+        self.assertEqual(target.put_chunks("k2", [b"a", b"bcd"]), 4)
+        self.assertEqual(target.writers[1].whole, b"abcd")
+
+    def test_size_limit_aborts(self):
+        target = RecordingProvider()
+        with self.assertRaises(UploadTooLarge):
+            anyio.run(lambda: as_async(target).put("k", _source(b"abcdefgh", b"ijkl"), max_bytes=10))
+        self.assertTrue(target.writers[0].aborted)
+        self.assertIsNone(target.writers[0].committed)
+
+    def test_local_roundtrip_and_abort_leaves_nothing(self):
+        store = as_async(self.local)
+        anyio.run(store.put, "a/b.txt", _source(b"hello ", b"world"))
+        self.assertEqual(self.local._get_path("a/b.txt").read_bytes(), b"hello world")
+        self.assertEqual(anyio.run(store.get, "a/b.txt"), b"hello world")
+        self.assertEqual(list(self.local.iter_chunks("a/b.txt", 4)), [b"hell", b"o wo", b"rld"])
+
+        with self.assertRaises(UploadTooLarge):
+            anyio.run(lambda: store.put("a/big.txt", _source(b"x" * 20), max_bytes=8))
+        self.assertFalse(self.local.exists("a/big.txt"))
+        self.assertEqual(sorted(p.name for p in self.local._get_path("a").iterdir()), ["b.txt"])
+        with self.assertRaises(FileNotFoundError):
+            anyio.run(store.get, "missing")
+
+
+class TestBlockBlobWriter(unittest.TestCase):
+    def test_commits_ordered_block_ids(self):
+        client = mock.Mock()
+        writer = _BlockBlobWriter(client, "application/pdf")
+        writer.write_block(1, b"b")
+        writer.write_block(0, b"a")
+        writer.commit(2)
+        staged = {c.args[1]: c.args[0] for c in client.stage_block.call_args_list}
+        blocks = client.commit_block_list.call_args.args[0]
+        self.assertEqual([b.id for b in blocks], [staged[b"a"], staged[b"b"]])
+        self.assertEqual(client.commit_block_list.call_args.kwargs["content_settings"].content_type, "application/pdf")
+
+
+if __name__ == "__main__":
+    unittest.main()
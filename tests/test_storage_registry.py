@@ -0,0 +1,85 @@
+"""Tests for the shared storage provider registry and signed-URL cache."""
+import unittest
+from unittest import mock
+
+from azure.storage.blob import BlobServiceClient
+
+from app.config import settings
+from app.storage import blob_provider
+from app.storage.blob_provider import BlobStorageProvider
+from app.storage.hybrid_provider import HybridStorageProvider
+from app.storage.local_provider import LocalStorageProvider
+from app.storage.metrics import reset_storage_stats, storage_stats
+from app.storage.registry import (
+    get_default_provider,
+    get_local_provider,
+    get_provider_for,
+    is_blob_backed,
+    reset_storage_providers,
+)
+
+CONN = "DefaultEndpointsProtocol=https;AccountName=acct;AccountKey=a2V5a2V5a2V5;EndpointSuffix=core.windows.net"
+
+
+class TestStorageRegistry(unittest.TestCase):
+    def setUp(self):
+        reset_storage_providers()
+        reset_storage_stats()
+
+    def tearDown(self):
+        reset_storage_providers()
+
+    def test_local_provider_is_shared(self):
+        with mock.patch.object(settings, "azure_blob_connection", None):
+            self.assertIs(get_default_provider(), get_local_provider())
+            self.assertIs(get_provider_for("blob"), get_local_provider())
+        self.assertIsInstance(get_local_provider(), LocalStorageProvider)
+
+    def test_blob_provider_is_built_once(self):
+        with mock.patch.object(settings, "azure_blob_connection", CONN), mock.patch.object(
+            settings, "azure_blob_container", "cont"
+        ):
+            first = get_provider_for("blob")
+            self.assertIsInstance(first, BlobStorageProvider)
+            self.assertIs(get_default_provider(), first)
+            self.assertIs(get_provider_for("local"), get_local_provider())
+
+    def test_hybrid_mode_wraps_fallback_account(self):
+        with mock.patch.object(settings, "azure_blob_connection", CONN), mock.patch.object(
+            settings, "azure_blob_container", "cont"
+        ), mock.patch.object(settings, "storage_provider", "hybrid"), mock.patch.object(
+            settings, "azure_blob_fallback_connection", CONN
+        ), mock.patch.object(settings, "azure_blob_fallback_container", "legacy"):
+            provider = get_provider_for("blob")
+            self.assertIsInstance(provider, HybridStorageProvider)
+            self.assertTrue(is_blob_backed(provider))
+            self.assertEqual(provider.fallback._container, "legacy")
+
+
+class TestSignedUrlCache(unittest.TestCase):
+    def setUp(self):
+        reset_storage_stats()
+        with mock.patch.object(settings, "azure_blob_container", "cont"):
+            self.provider = BlobStorageProvider(service=BlobServiceClient.from_connection_string(CONN))
+
+    def test_read_urls_reused_within_bucket(self):
+        with mock.patch.object(blob_provider.time, "time", return_value=1_000_000.0):
+            a = self.provider.get_download_url("/docs/a.pdf", 300)
+            b = self.provider.get_download_url("/docs/a.pdf", 300)
+            inline = self.provider.get_inline_url("/docs/a.pdf", 300, "application/pdf")
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, inline)
+        self.assertTrue(a.startswith("https://acct.blob.core.windows.net/cont/docs/a.pdf?"))
+        self.assertIn("rscd=inline", inline)
+
+        with mock.patch.object(blob_provider.time, "time", return_value=1_000_000.0 + blob_provider.SAS_BUCKET_S):
+            c = self.provider.get_download_url("/docs/a.pdf", 300)
+        self.assertNotEqual(a, c)
+
+        sas = storage_stats()["sas"]
+        self.assertEqual(sas["generated"], 3)
+        self.assertEqual(sas["cache_hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
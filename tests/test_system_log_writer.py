@@ -0,0 +1,92 @@
+"""Tests for the batched system log writer."""
+import unittest
+
+from app.models.models import SystemLog
+from app.services.system_log_writer import SystemLogWriter, build_row, path_shape
+
+from db_helpers import dispose_session_factory, make_session_factory
+
+
+class TestSystemLogWriter(unittest.TestCase):
+    def setUp(self):
+        self.Session = make_session_factory(SystemLog, threaded=True)
+
+    def tearDown(self):
+        dispose_session_factory(self.Session)
+
+    def _rows(self):
+        db = self.Session()
+        try:
+            return db.query(SystemLog).order_by(SystemLog.timestamp_utc).all()
+        finally:
+            db.close()
+
+    def test_flush_bulk_inserts_queued_rows(self):
+        writer = SystemLogWriter(self.Session, autostart=False)
+        for i in range(5):
+            writer.submit(build_row("warning", "request_error", f"m{i}", path=f"/p/{i}", status_code=404))
+        self.assertEqual(self._rows(), [])
+        writer.flush()
+        self.assertEqual(len(self._rows()), 5)
+        self.assertEqual(writer.stats()["written"], 5)
+
+    def test_repetitive_errors_are_sampled(self):
+        writer = SystemLogWriter(self.Session, autostart=False, sample_burst=3, sample_every=10)
+        kept = [
+            writer.submit(
+                build_row(
+                    "warning",
+                    "request_error",
+                    "Not found",
+                    path="/files/8a6f1c1e-0f4e-4c4b-9a53-2f7c8f1b0e11",
+                    method="GET",
+                    status_code=404,
+                )
+            )
+            for _ in range(23)
+        ]
+        self.assertEqual(sum(kept), 5)  # 3 burst + every 10th after it
+        writer.flush()
+        rows = self._rows()
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[-1].extra, {"sampled_suppressed": 9})
+
+    def test_errors_bypass_sampling(self):
+        writer = SystemLogWriter(self.Session, autostart=False, sample_burst=1)
+        for _ in range(4):
+            writer.submit(build_row("error", "request_error", "boom", path="/x", status_code=500))
+        writer.flush()
+        self.assertEqual(len(self._rows()), 4)
+
+    def test_login_failures_bypass_sampling(self):
+        writer = SystemLogWriter(self.Session, autostart=False, sample_burst=1)
+        for _ in range(4):
+            writer.submit(build_row("warning", "auth", "Login failed", path="/auth/login", method="POST"))
+        writer.flush()
+        self.assertEqual(len(self._rows()), 4)
+
+    def test_full_queue_drops_and_records_summary(self):
+        writer = SystemLogWriter(self.Session, autostart=False, max_size=2)
+        for i in range(4):
+            writer.submit(build_row("info", "auth", f"m{i}"), sample=False)
+        writer.flush()
+        rows = self._rows()
+        self.assertEqual(len(rows), 3)
+        summary = [r for r in rows if r.category == "background"]
+        self.assertEqual(summary[0].extra, {"dropped": 2})
+
+    def test_stop_flushes_pending_rows(self):
+        writer = SystemLogWriter(self.Session, flush_interval=60)
+        writer.submit(build_row("warning", "auth", "Login failed"))
+        writer.stop(timeout=2)
+        self.assertEqual(len(self._rows()), 1)
+
+    def test_path_shape_collapses_ids(self):
+        self.assertEqual(
+            path_shape("/projects/8a6f1c1e-0f4e-4c4b-9a53-2f7c8f1b0e11/files/12"),
+            "/projects/:id/files/:n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""Tests for the task board change feed."""
+import asyncio
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.models.models import TaskItem
+from app.services import task_feed
+from app.services.chat_hub import ChatHub
+from app.services.task_service import complete_tasks_for_origin, create_task_item
+from app.services.task_feed import (
+    after_cursor_filter,
+    decode_cursor,
+    division_channel,
+    encode_cursor,
+    task_channels,
+    user_channel,
+    viewer_channels,
+)
+
+from db_helpers import close_session, make_session
+
+
+class _FakeWs:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+class TestTaskFeedChannels(unittest.TestCase):
+    def test_reassignment_notifies_old_and_new_owner(self):
+        old_user, new_user, requester = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        task = TaskItem(id=uuid.uuid4(), title="t", assigned_to_id=new_user, requested_by_id=requester)
+        channels = task_channels(task, previous_user_id=old_user, previous_division="Roofing")
+        self.assertEqual(
+            channels,
+            {
+                user_channel(new_user),
+                user_channel(old_user),
+                user_channel(requester),
+                division_channel("Roofing"),
+            },
+        )
+
+    def test_viewer_channels(self):
+        uid = uuid.uuid4()
+        self.assertEqual(
+            viewer_channels(uid, ["Roofing", ""]),
+            [user_channel(uid), division_channel("Roofing")],
+        )
+
+    def test_cursor_round_trip(self):
+        ts = datetime(2026, 3, 1, 8, 30, 15, 123456)
+        tid = uuid.uuid4()
+        self.assertEqual(decode_cursor(encode_cursor(ts, tid)), (ts, tid))
+        self.assertIsNone(decode_cursor(None))
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_hub_publish_reaches_subscribed_channels_once(self):
+        hub = ChatHub()
+        a, b = _FakeWs(), _FakeWs()
+
+        async def run():
+            await hub.subscribe(a, ["tasks:user:1", "tasks:division:Roofing"])
+            await hub.subscribe(b, ["tasks:user:2"])
+            await hub.publish({"tasks:user:1", "tasks:division:Roofing"}, "task_changed", {"task_id": "x"})
+            await hub.unsubscribe(a)
+            await hub.publish({"tasks:user:1"}, "task_changed", {"task_id": "y"})
+
+        asyncio.run(run())
+        self.assertEqual(len(a.sent), 1)
+        self.assertEqual(b.sent, [])
+
+
+class TestTaskDeltaQuery(unittest.TestCase):
+    def setUp(self):
+        self.db = make_session(TaskItem)
+
+    def tearDown(self):
+        close_session(self.db)
+
+    def test_keyset_returns_only_rows_after_cursor(self):
+        base = datetime(2026, 1, 1, 12, 0, 0)
+        tasks = [
+            TaskItem(id=uuid.uuid4(), title=f"t{i}", updated_at=base + timedelta(seconds=i // 2))
+            for i in range(6)
+        ]
+        self.db.add_all(tasks)
+        self.db.commit()
+        ordered = sorted(tasks, key=lambda t: (t.updated_at, t.id.hex))
+        cursor = decode_cursor(encode_cursor(ordered[2].updated_at, ordered[2].id))
+        rows = (
+            self.db.query(TaskItem)
+            .filter(after_cursor_filter(cursor))
+            .order_by(TaskItem.updated_at.asc(), TaskItem.id.asc())
+            .all()
+        )
+        self.assertEqual([r.id for r in rows], [t.id for t in ordered[3:]])
+
+    def test_service_writes_publish_after_commit_only(self):
+        pushed = []
+
+        def create():
+            return create_task_item(
+                self.db,
+                title="Order parts",
+                description=None,
+                requested_by_id=None,
+                assigned_to_id=None,
+                origin_type="order",
+                origin_id="o-1",
+                assigned_division_label="Roofing",
+            )
+
+        with patch.object(task_feed, "_push", lambda channels, payload: pushed.append((channels, payload))):
+            create()
+            self.db.rollback()
+            self.assertEqual(pushed, [])
+
+            task = create()
+            task.status = "accepted"
+            self.assertEqual(pushed, [])
+            self.db.commit()
+            (channels, payload), = pushed
+            self.assertEqual(channels, {division_channel("Roofing")})
+            self.assertEqual((payload["task_id"], payload["kind"]), (str(task.id), "created"))
+
+            complete_tasks_for_origin(self.db, origin_type="order", origin_id="o-1")
+            self.db.commit()
+            self.assertEqual(pushed[1][1]["kind"], "updated")
+            self.assertEqual(pushed[1][1]["cursor"], encode_cursor(task.updated_at, task.id))
+            self.assertEqual(task.status, "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
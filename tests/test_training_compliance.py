@@ -0,0 +1,115 @@
+"""Tests for the set-based training compliance report."""
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+from app.models.models import (
+    EmployeeProfile,
+    TrainingCertificate,
+    TrainingCourse,
+    TrainingProgress,
+    User,
+)
+from app.services.audit_log_entries import display_name
+from app.services.training_compliance import (
+    STATUS_EXPIRING,
+    STATUS_OVERDUE,
+    get_compliance_sets,
+    get_compliance_summary,
+    invalidate_training_compliance_cache,
+    iter_compliance_csv,
+    list_overdue,
+)
+
+from db_helpers import close_session, make_session
+
+
+class TestTrainingCompliance(unittest.TestCase):
+    def setUp(self):
+        invalidate_training_compliance_cache()
+        self.db = make_session(User, EmployeeProfile, TrainingCourse, TrainingProgress, TrainingCertificate)
+        self.now = datetime(2026, 6, 1, 12, 0, 0)
+
+        self.alice = User(username="alice", email_personal="a@example.com", password_hash="x")
+        self.bob = User(username="bob", email_personal="b@example.com", password_hash="x")
+        self.db.add_all([self.alice, self.bob])
+        self.db.flush()
+        self.db.add(EmployeeProfile(user_id=self.alice.id, first_name="Alice", last_name="Smith"))
+        self.course = TrainingCourse(title="Fall Protection", status="published")
+        self.other = TrainingCourse(title="WHMIS", status="draft")
+        self.db.add_all([self.course, self.other])
+        self.db.flush()
+
+    def tearDown(self):
+        close_session(self.db)
+
+    def _cert(self, user, course, issued_days_ago, expires_in_days):
+        cert = TrainingCertificate(
+            user_id=user.id,
+            course_id=course.id,
+            issued_at=self.now - timedelta(days=issued_days_ago),
+            expires_at=self.now + timedelta(days=expires_in_days),
+            certificate_number=f"C-{uuid.uuid4().hex[:8]}",
+        )
+        self.db.add(cert)
+        self.db.flush()
+        return cert
+
+    def test_renewed_certificate_is_not_overdue(self):
+        self._cert(self.alice, self.course, issued_days_ago=400, expires_in_days=-35)
+        self._cert(self.alice, self.course, issued_days_ago=20, expires_in_days=345)
+        self.db.commit()
+        self.assertEqual(list_overdue(self.db, now=self.now), [])
+
+    def test_overdue_and_expiring_sets(self):
+        self._cert(self.alice, self.course, issued_days_ago=400, expires_in_days=-35)
+        self._cert(self.bob, self.other, issued_days_ago=350, expires_in_days=10)
+        self._cert(self.bob, self.course, issued_days_ago=10, expires_in_days=300)
+        self.db.commit()
+
+        sets = get_compliance_sets(self.db, now=self.now, expiring_within_days=30)
+        self.assertEqual(len(sets["overdue"]), 1)
+        overdue = sets["overdue"][0]
+        self.assertEqual(overdue["status"], STATUS_OVERDUE)
+        self.assertEqual(overdue["user_name"], "Alice Smith")
+        self.assertEqual(overdue["course_title"], "Fall Protection")
+        self.assertEqual(overdue["days_overdue"], 35)
+
+        self.assertEqual(len(sets["expiring_soon"]), 1)
+        expiring = sets["expiring_soon"][0]
+        self.assertEqual(expiring["status"], STATUS_EXPIRING)
+        self.assertEqual(expiring["user_name"], "bob")
+        self.assertEqual(expiring["days_remaining"], 10)
+
+    def test_summary_counts_and_cache(self):
+        self._cert(self.alice, self.course, issued_days_ago=400, expires_in_days=-1)
+        self.db.commit()
+        summary = get_compliance_summary(self.db)
+        self.assertEqual(summary["total_courses"], 2)
+        self.assertEqual(summary["published_courses"], 1)
+        self.assertEqual(summary["draft_courses"], 1)
+        self.assertEqual(summary["overdue_certificates"], 1)
+        self.assertEqual(summary["users_with_overdue"], 1)
+
+        self.db.add(TrainingCourse(title="New", status="draft"))
+        self.db.commit()
+        self.assertEqual(get_compliance_summary(self.db)["total_courses"], 2)
+        invalidate_training_compliance_cache()
+        self.assertEqual(get_compliance_summary(self.db)["total_courses"], 3)
+
+    def test_csv_export_streams_header_then_rows(self):
+        self._cert(self.alice, self.course, issued_days_ago=400, expires_in_days=-3)
+        self.db.commit()
+        chunks = list(iter_compliance_csv(self.db, include_expiring=False))
+        self.assertTrue(chunks[0].startswith("\ufeffEmployee,"))
+        self.assertEqual(len(chunks), 2)
+        self.assertIn("Alice Smith", chunks[1])
+        self.assertIn("Overdue", chunks[1])
+
+    def test_display_name_precedence(self):
+        self.assertEqual(display_name("Al", "Alice", "Smith", "alice", None), "Al")
+        self.assertEqual(display_name(None, None, None, None, "a@example.com"), "a@example.com")
+
+
+if __name__ == "__main__":
+    unittest.main()